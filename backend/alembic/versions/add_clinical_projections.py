@@ -0,0 +1,249 @@
+"""add clinical resource projection tables
+
+Revision ID: add_clinical_projections
+Revises: add_observation_projections
+Create Date: 2026-10-16
+
+Condition, MedicationRequest, Encounter, Immunization and
+AllergyIntolerance reads filtered and ordered by status, code and date
+through JSONB casts. These tables hold those fields as typed, indexed
+columns (see app.projections.extractors.clinical). Existing resources are
+backfilled with the same rules as those extractors;
+app.scripts.backfill_projections re-projects them after extractor changes.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_clinical_projections"
+down_revision: Union[str, Sequence[str], None] = "add_observation_projections"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> (columns, {index name: indexed columns})
+_TABLES: dict[str, tuple[list[sa.Column], dict[str, list[str]]]] = {
+    "condition_projections": (
+        [
+            sa.Column("code", sa.String(64), nullable=True),
+            sa.Column("display", sa.Text, nullable=True),
+            sa.Column("clinical_status", sa.String(32), nullable=True),
+            sa.Column("verification_status", sa.String(32), nullable=True),
+            sa.Column("onset_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("abatement_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("recorded_at", sa.DateTime(timezone=True), nullable=True),
+        ],
+        {
+            "ix_cond_proj_patient_status_onset": [
+                "patient_id",
+                "clinical_status",
+                "onset_at",
+            ],
+            "ix_cond_proj_patient_status_abatement": [
+                "patient_id",
+                "clinical_status",
+                "abatement_at",
+            ],
+        },
+    ),
+    "medication_request_projections": (
+        [
+            sa.Column("status", sa.String(32), nullable=True),
+            sa.Column("intent", sa.String(32), nullable=True),
+            sa.Column("code", sa.String(64), nullable=True),
+            sa.Column("display", sa.Text, nullable=True),
+            sa.Column("authored_at", sa.DateTime(timezone=True), nullable=True),
+        ],
+        {
+            "ix_medreq_proj_patient_status_authored": [
+                "patient_id",
+                "status",
+                "authored_at",
+            ],
+            "ix_medreq_proj_patient_display_authored": [
+                "patient_id",
+                "display",
+                "authored_at",
+            ],
+        },
+    ),
+    "encounter_projections": (
+        [
+            sa.Column("status", sa.String(32), nullable=True),
+            sa.Column("class_code", sa.String(32), nullable=True),
+            sa.Column("type_code", sa.String(64), nullable=True),
+            sa.Column("period_start", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("period_end", sa.DateTime(timezone=True), nullable=True),
+        ],
+        {"ix_enc_proj_patient_start": ["patient_id", "period_start"]},
+    ),
+    "immunization_projections": (
+        [
+            sa.Column("status", sa.String(32), nullable=True),
+            sa.Column("vaccine_code", sa.String(64), nullable=True),
+            sa.Column("occurrence_at", sa.DateTime(timezone=True), nullable=True),
+        ],
+        {"ix_imm_proj_patient_occurrence": ["patient_id", "occurrence_at"]},
+    ),
+    "allergy_intolerance_projections": (
+        [
+            sa.Column("clinical_status", sa.String(32), nullable=True),
+            sa.Column("verification_status", sa.String(32), nullable=True),
+            sa.Column("criticality", sa.String(32), nullable=True),
+            sa.Column("category", sa.String(32), nullable=True),
+            sa.Column("code", sa.String(64), nullable=True),
+            sa.Column("onset_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("recorded_at", sa.DateTime(timezone=True), nullable=True),
+        ],
+        {"ix_allergy_proj_patient_status": ["patient_id", "clinical_status"]},
+    ),
+}
+
+
+# FHIR date/dateTime values the extractors parse; partial dates ("2020",
+# "2020-05") and anything else project as NULL instead of failing the cast
+_TIMESTAMP_PATTERN = (
+    r"^\d{4}-\d{2}-\d{2}"
+    r"([T ]\d{2}(:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}(:?\d{2})?)?)?$"
+)
+
+
+def _json_path(path: str, *suffix: str) -> str:
+    """Postgres text[] path literal for a dotted FHIR path."""
+    return "'{" + ",".join([*path.split("."), *suffix]) + "}'"
+
+
+def _code(path: str, attr: str = "code") -> str:
+    """SQL for code_at: coding[0].<attr> of the concept (or first concept) at path."""
+    return (
+        f"coalesce(r.data #>> {_json_path(path, 'coding', '0', attr)}, "
+        f"r.data #>> {_json_path(path, '0', 'coding', '0', attr)})"
+    )
+
+
+def _string(path: str) -> str:
+    """SQL for string_at: the value at path if it is a JSON string."""
+    return (
+        f"CASE WHEN jsonb_typeof(r.data #> {_json_path(path)}) = 'string' "
+        f"THEN r.data #>> {_json_path(path)} END"
+    )
+
+
+def _datetime(*paths: str) -> str:
+    """SQL for datetime_at: the first present path, cast if parseable."""
+    cases = " ".join(
+        f"WHEN r.data #>> {_json_path(path)} IS NOT NULL THEN "
+        f"CASE WHEN r.data #>> {_json_path(path)} ~ '{_TIMESTAMP_PATTERN}' "
+        f"THEN (r.data #>> {_json_path(path)})::timestamptz END"
+        for path in paths
+    )
+    return f"CASE {cases} END"
+
+
+# table -> (resource type, {column: SQL expression}), mirroring
+# app.projections.extractors.clinical.CLINICAL_PROJECTION_FIELDS
+_BACKFILL: dict[str, tuple[str, dict[str, str]]] = {
+    "condition_projections": (
+        "Condition",
+        {
+            "code": _code("code"),
+            "display": _code("code", "display"),
+            "clinical_status": _code("clinicalStatus"),
+            "verification_status": _code("verificationStatus"),
+            "onset_at": _datetime("onsetDateTime", "onsetPeriod.start"),
+            "abatement_at": _datetime("abatementDateTime", "abatementPeriod.start"),
+            "recorded_at": _datetime("recordedDate"),
+        },
+    ),
+    "medication_request_projections": (
+        "MedicationRequest",
+        {
+            "status": _string("status"),
+            "intent": _string("intent"),
+            "code": _code("medicationCodeableConcept"),
+            "display": _code("medicationCodeableConcept", "display"),
+            "authored_at": _datetime("authoredOn"),
+        },
+    ),
+    "encounter_projections": (
+        "Encounter",
+        {
+            "status": _string("status"),
+            "class_code": _string("class.code"),
+            "type_code": _code("type"),
+            "period_start": _datetime("period.start"),
+            "period_end": _datetime("period.end"),
+        },
+    ),
+    "immunization_projections": (
+        "Immunization",
+        {
+            "status": _string("status"),
+            "vaccine_code": _code("vaccineCode"),
+            "occurrence_at": _datetime("occurrenceDateTime"),
+        },
+    ),
+    "allergy_intolerance_projections": (
+        "AllergyIntolerance",
+        {
+            "clinical_status": _code("clinicalStatus"),
+            "verification_status": _code("verificationStatus"),
+            "criticality": _string("criticality"),
+            "category": _string("category.0"),
+            "code": _code("code"),
+            "onset_at": _datetime("onsetDateTime"),
+            "recorded_at": _datetime("recordedDate"),
+        },
+    ),
+}
+
+
+def upgrade() -> None:
+    """Create the projection tables, backfill them and add their indexes."""
+    for table, (columns, indexes) in _TABLES.items():
+        op.create_table(
+            table,
+            sa.Column(
+                "fhir_resource_id",
+                postgresql.UUID(as_uuid=True),
+                sa.ForeignKey("fhir_resources.id", ondelete="CASCADE"),
+                primary_key=True,
+            ),
+            sa.Column("patient_id", postgresql.UUID(as_uuid=True), nullable=True),
+            *columns,
+            sa.Column(
+                "projected_at",
+                sa.DateTime(timezone=True),
+                nullable=False,
+                server_default=text("now()"),
+            ),
+        )
+
+    # Date-only values are cast at UTC midnight, as the extractors do
+    op.execute("SET LOCAL timezone = 'UTC'")
+    for table, (resource_type, expressions) in _BACKFILL.items():
+        op.execute(
+            f"""
+            INSERT INTO {table} (fhir_resource_id, patient_id, {", ".join(expressions)})
+            SELECT r.id, r.patient_id, {", ".join(expressions.values())}
+            FROM fhir_resources r
+            WHERE r.resource_type = '{resource_type}'
+            """
+        )
+
+    for table, (_columns, indexes) in _TABLES.items():
+        for name, indexed in indexes.items():
+            op.create_index(name, table, indexed)
+
+
+def downgrade() -> None:
+    """Drop the projection tables."""
+    for table, (_columns, indexes) in reversed(_TABLES.items()):
+        for name in indexes:
+            op.drop_index(name, table_name=table)
+        op.drop_table(table)
@@ -0,0 +1,42 @@
+"""add embedding_cache table
+
+Revision ID: add_embedding_cache
+Revises: add_ingest_jobs
+Create Date: 2026-10-16
+
+Content-addressed cache of embedding vectors keyed by SHA-256 of
+(model, text), so repeated resource texts are embedded only once.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_embedding_cache"
+down_revision: Union[str, Sequence[str], None] = "add_ingest_jobs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create embedding_cache table."""
+    op.create_table(
+        "embedding_cache",
+        sa.Column("key", sa.String(64), primary_key=True),
+        sa.Column("model", sa.String(100), nullable=False),
+        sa.Column("embedding", Vector(1536), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Drop embedding_cache table."""
+    op.drop_table("embedding_cache")
@@ -0,0 +1,36 @@
+"""add content_hash to fhir_resources
+
+Revision ID: add_fhir_content_hash
+Revises: add_fhir_upsert_key
+Create Date: 2026-10-16
+
+Add content_hash (SHA-256 hex of the canonical cleaned resource JSON).
+Bundle loading compares it to skip rewriting, re-graphing and re-embedding
+unchanged resources. Existing rows start NULL and are treated as changed on
+their next load, which backfills the hash.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_fhir_content_hash"
+down_revision: Union[str, Sequence[str], None] = "add_fhir_upsert_key"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add content_hash column to fhir_resources."""
+    op.add_column(
+        "fhir_resources",
+        sa.Column("content_hash", sa.String(64), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Remove content_hash column."""
+    op.drop_column("fhir_resources", "content_hash")
@@ -0,0 +1,50 @@
+"""add full-text search_vector to fhir_resources
+
+Revision ID: add_fhir_search_vector
+Revises: add_note_chunks
+Create Date: 2026-10-16
+
+Generated tsvector column over embedding_text with a GIN index, the
+lexical side of hybrid (full-text + vector) retrieval.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_fhir_search_vector"
+down_revision: Union[str, Sequence[str], None] = "add_note_chunks"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add generated search_vector column and its GIN index."""
+    op.add_column(
+        "fhir_resources",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR,
+            sa.Computed(
+                "to_tsvector('english', coalesce(embedding_text, ''))",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "idx_fhir_search_vector",
+        "fhir_resources",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    """Drop search_vector column and its index."""
+    op.drop_index("idx_fhir_search_vector", table_name="fhir_resources")
+    op.drop_column("fhir_resources", "search_vector")
@@ -0,0 +1,60 @@
+"""add trigram index and effective_date to fhir_resources
+
+Revision ID: add_fhir_trgm_effective_date
+Revises: add_fhir_search_vector
+Create Date: 2026-10-16
+
+pg_trgm GIN index on embedding_text so substring (ILIKE '%term%') name
+matches use an index, and a generated effective_date column (first of
+effectiveDateTime, onsetDateTime, authoredOn, period.start) indexed with
+patient_id so date range filters no longer evaluate a JSONB coalesce per row.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_fhir_trgm_effective_date"
+down_revision: Union[str, Sequence[str], None] = "add_fhir_search_vector"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add pg_trgm index, generated effective_date column and its index."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "idx_fhir_embedding_text_trgm",
+        "fhir_resources",
+        ["embedding_text"],
+        postgresql_using="gin",
+        postgresql_ops={"embedding_text": "gin_trgm_ops"},
+    )
+    op.add_column(
+        "fhir_resources",
+        sa.Column(
+            "effective_date",
+            sa.Text(),
+            sa.Computed(
+                "coalesce(data->>'effectiveDateTime', data->>'onsetDateTime', "
+                "data->>'authoredOn', data#>>'{period,start}')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "idx_fhir_patient_effective_date",
+        "fhir_resources",
+        ["patient_id", "effective_date"],
+    )
+
+
+def downgrade() -> None:
+    """Drop effective_date, its index and the trigram index."""
+    op.drop_index("idx_fhir_patient_effective_date", table_name="fhir_resources")
+    op.drop_column("fhir_resources", "effective_date")
+    op.drop_index("idx_fhir_embedding_text_trgm", table_name="fhir_resources")
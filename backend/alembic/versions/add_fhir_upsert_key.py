@@ -0,0 +1,55 @@
+"""add unique upsert key on (patient_id, fhir_id, resource_type)
+
+Revision ID: add_fhir_upsert_key
+Revises: add_compiled_summary_columns
+Create Date: 2026-10-16
+
+Bundle loading now bulk-upserts with INSERT ... ON CONFLICT, which needs a
+unique index as its conflict target. Duplicate rows (possible under the old
+ORM loader when a bundle repeated a resource) are removed first, keeping
+the most recently created row.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_fhir_upsert_key"
+down_revision: Union[str, Sequence[str], None] = "add_compiled_summary_columns"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Deduplicate rows and create the unique upsert index."""
+    op.execute(
+        text(
+            """
+            DELETE FROM fhir_resources f
+            USING (
+                SELECT id,
+                       row_number() OVER (
+                           PARTITION BY patient_id, fhir_id, resource_type
+                           ORDER BY created_at DESC, id
+                       ) AS rn
+                FROM fhir_resources
+                WHERE patient_id IS NOT NULL
+            ) d
+            WHERE f.id = d.id AND d.rn > 1
+            """
+        )
+    )
+    op.create_index(
+        "uq_fhir_patient_fhir_id_type",
+        "fhir_resources",
+        ["patient_id", "fhir_id", "resource_type"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Drop the unique upsert index."""
+    op.drop_index("uq_fhir_patient_fhir_id_type", table_name="fhir_resources")
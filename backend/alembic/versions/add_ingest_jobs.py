@@ -0,0 +1,106 @@
+"""add ingest_jobs table
+
+Revision ID: add_ingest_jobs
+Revises: add_fhir_content_hash
+Create Date: 2026-10-16
+
+Durable queue for deferred post-ingest work (graph build, embeddings,
+summary compilation). Workers claim rows with FOR UPDATE SKIP LOCKED.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_ingest_jobs"
+down_revision: Union[str, Sequence[str], None] = "add_fhir_content_hash"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create ingest_jobs table with enums and indexes."""
+    kind_enum = postgresql.ENUM(
+        "graph",
+        "embed",
+        "compile",
+        name="ingest_job_kind",
+        create_type=False,
+    )
+    kind_enum.create(op.get_bind(), checkfirst=True)
+
+    status_enum = postgresql.ENUM(
+        "pending",
+        "running",
+        "succeeded",
+        "failed",
+        name="ingest_job_status",
+        create_type=False,
+    )
+    status_enum.create(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        "ingest_jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("kind", kind_enum, nullable=False),
+        sa.Column("status", status_enum, nullable=False, server_default="pending"),
+        sa.Column(
+            "patient_id",
+            postgresql.UUID(as_uuid=True),
+            nullable=False,
+            comment="Canonical patient UUID the job works on",
+        ),
+        sa.Column(
+            "payload",
+            postgresql.JSONB,
+            nullable=False,
+            server_default=sa.text("'{}'::jsonb"),
+            comment="Kind-specific arguments, e.g. resource_ids",
+        ),
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("max_attempts", sa.Integer, nullable=False, server_default="5"),
+        sa.Column("last_error", sa.Text, nullable=True),
+        sa.Column(
+            "run_after",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+            comment="Earliest time the job may be claimed (retry backoff)",
+        ),
+        sa.Column("locked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+    op.create_index("ix_ingest_jobs_patient_id", "ingest_jobs", ["patient_id"])
+    op.create_index(
+        "idx_ingest_jobs_patient_kind", "ingest_jobs", ["patient_id", "kind"]
+    )
+    op.create_index(
+        "idx_ingest_jobs_claim",
+        "ingest_jobs",
+        ["run_after"],
+        postgresql_where=sa.text("status IN ('pending', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    """Drop ingest_jobs table and enums."""
+    op.drop_table("ingest_jobs")
+    op.execute("DROP TYPE IF EXISTS ingest_job_kind")
+    op.execute("DROP TYPE IF EXISTS ingest_job_status")
@@ -0,0 +1,73 @@
+"""add note_chunks table
+
+Revision ID: add_note_chunks
+Revises: add_embedding_cache
+Create Date: 2026-10-16
+
+Overlapping, embedded windows of DocumentReference clinical note text for
+passage-level semantic search. Existing notes are chunked by their next
+embed job (see app.scripts.chunk_notes).
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_note_chunks"
+down_revision: Union[str, Sequence[str], None] = "add_embedding_cache"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create note_chunks table with its HNSW index."""
+    op.create_table(
+        "note_chunks",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "resource_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("fhir_resources.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("patient_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("chunk_index", sa.Integer, nullable=False),
+        sa.Column("start_offset", sa.Integer, nullable=False),
+        sa.Column("content", sa.Text, nullable=False),
+        sa.Column("embedding", Vector(1536), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+        ),
+    )
+    op.create_index("ix_note_chunks_resource_id", "note_chunks", ["resource_id"])
+    op.create_index("ix_note_chunks_patient_id", "note_chunks", ["patient_id"])
+    op.create_index(
+        "uq_note_chunks_resource_index",
+        "note_chunks",
+        ["resource_id", "chunk_index"],
+        unique=True,
+    )
+    op.create_index(
+        "idx_note_chunks_embedding_hnsw",
+        "note_chunks",
+        ["embedding"],
+        postgresql_using="hnsw",
+        postgresql_with={"m": 16, "ef_construction": 64},
+        postgresql_ops={"embedding": "vector_cosine_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Drop note_chunks table."""
+    op.drop_index("idx_note_chunks_embedding_hnsw", table_name="note_chunks")
+    op.drop_index("uq_note_chunks_resource_index", table_name="note_chunks")
+    op.drop_index("ix_note_chunks_patient_id", table_name="note_chunks")
+    op.drop_index("ix_note_chunks_resource_id", table_name="note_chunks")
+    op.drop_table("note_chunks")
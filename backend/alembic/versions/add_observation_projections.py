@@ -0,0 +1,134 @@
+"""add observation_projections
+
+Revision ID: add_observation_projections
+Revises: add_patient_summaries
+Create Date: 2026-10-16
+
+Lab and vital queries filtered and ordered Observations by JSONB path
+expressions (code, category, effectiveDateTime) evaluated per row. This
+table holds those fields as typed, indexed columns, one row per
+Observation. Existing Observations are backfilled with the same rules as
+app.projections.extractors.observation (unparseable dates become NULL).
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_observation_projections"
+down_revision: Union[str, Sequence[str], None] = "add_patient_summaries"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# FHIR date/dateTime values the extractor parses; partial dates ("2020",
+# "2020-05") and anything else project as NULL instead of failing the cast
+_TIMESTAMP_PATTERN = (
+    r"^\d{4}-\d{2}-\d{2}"
+    r"([T ]\d{2}(:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}(:?\d{2})?)?)?$"
+)
+
+
+def _timestamptz(expr: str) -> str:
+    """SQL casting text expr to timestamptz, or NULL if it is not parseable."""
+    return f"CASE WHEN {expr} ~ '{_TIMESTAMP_PATTERN}' THEN ({expr})::timestamptz END"
+
+
+def upgrade() -> None:
+    """Create observation_projections and backfill it."""
+    op.create_table(
+        "observation_projections",
+        sa.Column(
+            "fhir_resource_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("fhir_resources.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("patient_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("loinc", sa.String(64), nullable=True),
+        sa.Column("category", sa.String(64), nullable=True),
+        sa.Column("effective_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("value", sa.Float, nullable=True),
+        sa.Column("unit", sa.Text, nullable=True),
+        sa.Column("interpretation", sa.String(20), nullable=True),
+        sa.Column("components", postgresql.JSONB, nullable=True),
+        sa.Column(
+            "projected_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=text("now()"),
+        ),
+    )
+
+    # Date-only values are cast at UTC midnight, as the extractor does
+    op.execute("SET LOCAL timezone = 'UTC'")
+    effective_at = _timestamptz(
+        "coalesce(nullif(r.data ->> 'effectiveDateTime', ''), "
+        "nullif(r.data #>> '{effectivePeriod,start}', ''), "
+        "nullif(r.data ->> 'issued', ''))"
+    )
+    op.execute(
+        """
+        INSERT INTO observation_projections (
+            fhir_resource_id, patient_id, loinc, category, effective_at,
+            value, unit, interpretation, components
+        )
+        SELECT
+            r.id,
+            r.patient_id,
+            r.data #>> '{code,coding,0,code}',
+            r.data #>> '{category,0,coding,0,code}',
+            {effective_at},
+            CASE WHEN jsonb_typeof(r.data #> '{valueQuantity,value}') = 'number'
+                 THEN (r.data #>> '{valueQuantity,value}')::double precision END,
+            r.data #>> '{valueQuantity,unit}',
+            r.data #>> '{interpretation,0,coding,0,code}',
+            (
+                SELECT jsonb_agg(
+                    jsonb_build_object(
+                        'loinc', c #>> '{code,coding,0,code}',
+                        'value', CASE
+                            WHEN jsonb_typeof(c #> '{valueQuantity,value}') = 'number'
+                            THEN c #> '{valueQuantity,value}'
+                            ELSE 'null'::jsonb END,
+                        'unit', c #>> '{valueQuantity,unit}',
+                        'interpretation', c #>> '{interpretation,0,coding,0,code}'
+                    )
+                    ORDER BY ord
+                )
+                FROM jsonb_array_elements(
+                    CASE WHEN jsonb_typeof(r.data -> 'component') = 'array'
+                         THEN r.data -> 'component' END
+                ) WITH ORDINALITY AS comp(c, ord)
+                WHERE jsonb_typeof(c) = 'object'
+            )
+        FROM fhir_resources r
+        WHERE r.resource_type = 'Observation'
+        """.replace("{effective_at}", effective_at)
+    )
+
+    op.create_index(
+        "ix_obs_proj_patient_loinc_effective",
+        "observation_projections",
+        ["patient_id", "loinc", "effective_at"],
+    )
+    op.create_index(
+        "ix_obs_proj_patient_category_effective",
+        "observation_projections",
+        ["patient_id", "category", "effective_at"],
+    )
+
+
+def downgrade() -> None:
+    """Drop observation_projections."""
+    op.drop_index(
+        "ix_obs_proj_patient_category_effective", table_name="observation_projections"
+    )
+    op.drop_index(
+        "ix_obs_proj_patient_loinc_effective", table_name="observation_projections"
+    )
+    op.drop_table("observation_projections")
@@ -0,0 +1,71 @@
+"""move compiled summaries to patient_summaries
+
+Revision ID: add_patient_summaries
+Revises: add_resource_embeddings
+Create Date: 2026-10-16
+
+compiled_summary (a large JSONB document on Patient rows) and compiled_at
+move off fhir_resources into a 1:1 satellite table keyed by the Patient
+row's id, so queries over Patient rows no longer read them. Existing
+summaries are backfilled.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_patient_summaries"
+down_revision: Union[str, Sequence[str], None] = "add_resource_embeddings"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create patient_summaries, backfill it, drop the old columns."""
+    op.create_table(
+        "patient_summaries",
+        sa.Column(
+            "patient_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("fhir_resources.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("compiled_summary", postgresql.JSONB, nullable=False),
+        sa.Column(
+            "compiled_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=text("now()"),
+        ),
+    )
+    op.execute(
+        "INSERT INTO patient_summaries (patient_id, compiled_summary, compiled_at) "
+        "SELECT id, compiled_summary, coalesce(compiled_at, now()) "
+        "FROM fhir_resources "
+        "WHERE resource_type = 'Patient' AND compiled_summary IS NOT NULL"
+    )
+    op.drop_column("fhir_resources", "compiled_at")
+    op.drop_column("fhir_resources", "compiled_summary")
+
+
+def downgrade() -> None:
+    """Move compiled summaries back onto fhir_resources."""
+    op.add_column(
+        "fhir_resources",
+        sa.Column("compiled_summary", postgresql.JSONB, nullable=True),
+    )
+    op.add_column(
+        "fhir_resources",
+        sa.Column("compiled_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.execute(
+        "UPDATE fhir_resources "
+        "SET compiled_summary = s.compiled_summary, compiled_at = s.compiled_at "
+        "FROM patient_summaries s WHERE s.patient_id = fhir_resources.id"
+    )
+    op.drop_table("patient_summaries")
@@ -0,0 +1,86 @@
+"""move resource embeddings to resource_embeddings with quantized indexes
+
+Revision ID: add_resource_embeddings
+Revises: add_fhir_trgm_effective_date
+Create Date: 2026-10-16
+
+Embeddings move off fhir_resources (whose heap pages every JSONB query
+scans) into a side table. The full-precision vector is kept for re-ranking;
+the HNSW indexes are built over its halfvec and binary-quantized forms.
+Requires pgvector >= 0.7 (halfvec, bit indexes, binary_quantize).
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_resource_embeddings"
+down_revision: Union[str, Sequence[str], None] = "add_fhir_trgm_effective_date"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create resource_embeddings, copy vectors over, drop the old column."""
+    op.create_table(
+        "resource_embeddings",
+        sa.Column(
+            "resource_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("fhir_resources.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("patient_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("embedding", Vector(1536), nullable=False),
+    )
+    op.execute(
+        "INSERT INTO resource_embeddings (resource_id, patient_id, embedding) "
+        "SELECT id, patient_id, embedding FROM fhir_resources "
+        "WHERE embedding IS NOT NULL"
+    )
+    op.create_index(
+        "ix_resource_embeddings_patient_id", "resource_embeddings", ["patient_id"]
+    )
+    op.execute(
+        "CREATE INDEX idx_resource_embeddings_halfvec_hnsw ON resource_embeddings "
+        "USING hnsw ((embedding::halfvec(1536)) halfvec_cosine_ops) "
+        "WITH (m = 16, ef_construction = 64)"
+    )
+    op.execute(
+        "CREATE INDEX idx_resource_embeddings_bit_hnsw ON resource_embeddings "
+        "USING hnsw ((binary_quantize(embedding)::bit(1536)) bit_hamming_ops) "
+        "WITH (m = 16, ef_construction = 64)"
+    )
+    op.drop_index("idx_fhir_embedding_hnsw", table_name="fhir_resources")
+    op.drop_column("fhir_resources", "embedding")
+
+
+def downgrade() -> None:
+    """Move embeddings back onto fhir_resources."""
+    op.add_column(
+        "fhir_resources",
+        sa.Column("embedding", Vector(1536), nullable=True),
+    )
+    op.execute(
+        "UPDATE fhir_resources SET embedding = e.embedding "
+        "FROM resource_embeddings e WHERE e.resource_id = fhir_resources.id"
+    )
+    op.create_index(
+        "idx_fhir_embedding_hnsw",
+        "fhir_resources",
+        ["embedding"],
+        postgresql_using="hnsw",
+        postgresql_with={"m": 16, "ef_construction": 64},
+        postgresql_ops={"embedding": "vector_cosine_ops"},
+    )
+    op.drop_index("idx_resource_embeddings_bit_hnsw", table_name="resource_embeddings")
+    op.drop_index(
+        "idx_resource_embeddings_halfvec_hnsw", table_name="resource_embeddings"
+    )
+    op.drop_index("ix_resource_embeddings_patient_id", table_name="resource_embeddings")
+    op.drop_table("resource_embeddings")
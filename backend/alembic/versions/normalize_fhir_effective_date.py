@@ -0,0 +1,83 @@
+"""store fhir_resources.effective_date as timestamptz
+
+Revision ID: normalize_fhir_effective_date
+Revises: add_clinical_projections
+Create Date: 2026-10-16
+
+effective_date was the raw text of the first FHIR date field, so range
+filters and ordering compared strings: "2024-01-05T10:00:00Z" sorted after a
+"2024-01-05" upper bound, and "2024-01-05T23:00:00-05:00" before
+"2024-01-06T01:00:00Z". The column is regenerated as a timestamptz through
+fhir_timestamptz(), an IMMUTABLE parse (generated columns reject the STABLE
+::timestamptz cast) that takes values without an offset as UTC and gives
+NULL for partial or invalid dates. Re-adding the stored column rewrites
+fhir_resources.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "normalize_fhir_effective_date"
+down_revision: Union[str, Sequence[str], None] = "add_clinical_projections"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_FHIR_TIMESTAMPTZ_FUNCTION = r"""
+CREATE OR REPLACE FUNCTION fhir_timestamptz(value text) RETURNS timestamptz
+LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE AS $$
+BEGIN
+    IF value !~ '^\d{4}-\d{2}-\d{2}([T ]\d{2}(:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}(:?\d{2})?)?)?$' THEN
+        RETURN NULL;
+    END IF;
+    IF value ~ '[T ].*(Z|[+-]\d{2}(:?\d{2})?)$' THEN
+        RETURN value::timestamptz;
+    END IF;
+    RETURN value::timestamp AT TIME ZONE 'UTC';
+EXCEPTION WHEN invalid_datetime_format OR datetime_field_overflow THEN
+    RETURN NULL;
+END
+$$
+"""
+
+_DATE_FIELDS = (
+    "coalesce(data->>'effectiveDateTime', data->>'onsetDateTime', "
+    "data->>'authoredOn', data#>>'{period,start}')"
+)
+
+
+def _replace_effective_date(column_type: sa.types.TypeEngine, expression: str) -> None:
+    """Re-create effective_date (and its index) with a new type and expression."""
+    op.drop_index("idx_fhir_patient_effective_date", table_name="fhir_resources")
+    op.drop_column("fhir_resources", "effective_date")
+    op.add_column(
+        "fhir_resources",
+        sa.Column(
+            "effective_date",
+            column_type,
+            sa.Computed(expression, persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "idx_fhir_patient_effective_date",
+        "fhir_resources",
+        ["patient_id", "effective_date"],
+    )
+
+
+def upgrade() -> None:
+    """Regenerate effective_date as a timestamptz."""
+    op.execute(_FHIR_TIMESTAMPTZ_FUNCTION)
+    _replace_effective_date(
+        sa.DateTime(timezone=True), f"fhir_timestamptz({_DATE_FIELDS})"
+    )
+
+
+def downgrade() -> None:
+    """Restore the text effective_date and drop fhir_timestamptz()."""
+    _replace_effective_date(sa.Text(), _DATE_FIELDS)
+    op.execute("DROP FUNCTION fhir_timestamptz(text)")
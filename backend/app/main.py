@@ -15,9 +15,19 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from app.config import settings
-from app.projections.extractors.task import register_task_projection
+from app.database import async_session_maker
+from app.projections.extractors import (
+    register_clinical_projections,
+    register_observation_projection,
+    register_task_projection,
+)
 from app.routes import chat, data, fhir, labs, patients, sessions, tasks
+from app.services.fhir_loader import (
+    register_ingest_job_handlers,
+    shutdown_preprocess_executor,
+)
 from app.services.graph import KnowledgeGraph
+from app.services.job_queue import start_job_workers, stop_job_workers
 
 logger = logging.getLogger(__name__)
 
@@ -26,8 +36,13 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Application lifespan events for startup/shutdown."""
     # Register projections
+    register_observation_projection()
+    register_clinical_projections()
     register_task_projection()
 
+    # Register post-ingest job handlers
+    register_ingest_job_handlers()
+
     # Startup: ensure Neo4j indexes exist
     graph = KnowledgeGraph()
     try:
@@ -39,9 +54,19 @@ async def lifespan(app: FastAPI):
     finally:
         await graph.close()
 
+    # Startup: drain the post-ingest job queue in the background
+    if settings.ingest_jobs_enabled:
+        await start_job_workers(
+            async_session_maker,
+            concurrency=settings.ingest_job_workers,
+            poll_interval=settings.ingest_job_poll_interval,
+        )
+
     yield  # Application runs here
 
-    # Shutdown: nothing needed currently
+    # Shutdown: stop job workers and release bundle preprocessing workers
+    await stop_job_workers()
+    shutdown_preprocess_executor()
 
 
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
@@ -76,7 +101,9 @@ app.add_middleware(SecurityHeadersMiddleware)
 
 # CORS middleware for frontend
 # Parse comma-separated origins from config
-_cors_origins = [origin.strip() for origin in settings.cors_origins.split(",") if origin.strip()]
+_cors_origins = [
+    origin.strip() for origin in settings.cors_origins.split(",") if origin.strip()
+]
 app.add_middleware(
     CORSMiddleware,
     allow_origins=_cors_origins,
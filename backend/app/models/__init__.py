@@ -1,14 +1,40 @@
 """SQLAlchemy models."""
 
 from app.models.auth import BetterAuthSession
+from app.models.embedding_cache import EmbeddingCache
 from app.models.fhir import FhirResource
-from app.models.projections.task import TaskProjection
+from app.models.ingest_job import IngestJob, IngestJobKind, IngestJobStatus
+from app.models.note_chunk import NoteChunk
+from app.models.patient_summary import PatientSummary
+from app.models.projections import (
+    AllergyIntoleranceProjection,
+    ConditionProjection,
+    EncounterProjection,
+    ImmunizationProjection,
+    MedicationRequestProjection,
+    ObservationProjection,
+    TaskProjection,
+)
+from app.models.resource_embedding import ResourceEmbedding
 from app.models.session import Session
 from app.models.task import Task
 
 __all__ = [
+    "AllergyIntoleranceProjection",
     "BetterAuthSession",
+    "ConditionProjection",
+    "EmbeddingCache",
+    "EncounterProjection",
     "FhirResource",
+    "ImmunizationProjection",
+    "IngestJob",
+    "IngestJobKind",
+    "IngestJobStatus",
+    "MedicationRequestProjection",
+    "NoteChunk",
+    "ObservationProjection",
+    "PatientSummary",
+    "ResourceEmbedding",
     "Session",
     "Task",
     "TaskProjection",
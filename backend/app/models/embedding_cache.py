@@ -0,0 +1,43 @@
+"""Content-addressed embedding cache.
+
+Synthea charts repeat the same resource_to_text output across resources and
+patients ("Observation: Body Height. Value: ..."). Vectors are cached by a
+hash of model + text so each distinct text is embedded once. Only the hash
+is stored, not the text, so the table holds no PHI beyond the vector.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import DateTime, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.config import settings
+from app.database import Base
+
+
+class EmbeddingCache(Base):
+    """Embedding vector keyed by SHA-256 of (model, text)."""
+
+    __tablename__ = "embedding_cache"
+
+    # SHA-256 hex of model + NUL + text (see embedding_cache_key)
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+
+    # Embedding model that produced the vector
+    model: Mapped[str] = mapped_column(String(100), nullable=False)
+
+    embedding: Mapped[Any] = mapped_column(
+        Vector(settings.embedding_dimension), nullable=False
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=text("now()"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<EmbeddingCache(key={self.key[:12]}..., model={self.model})>"
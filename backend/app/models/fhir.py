@@ -6,16 +6,47 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING, Any
 
-from pgvector.sqlalchemy import Vector
-from sqlalchemy import DateTime, Index, String, Text, text
-from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy import DDL, Computed, DateTime, Index, String, Text, event, text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
+from sqlalchemy.ext.associationproxy import AssociationProxy, association_proxy
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
+from app.models.patient_summary import PatientSummary
+from app.models.resource_embedding import ResourceEmbedding
 
 if TYPE_CHECKING:
+    from app.models.projections.allergy_intolerance import AllergyIntoleranceProjection
+    from app.models.projections.condition import ConditionProjection
+    from app.models.projections.encounter import EncounterProjection
+    from app.models.projections.immunization import ImmunizationProjection
+    from app.models.projections.medication_request import MedicationRequestProjection
+    from app.models.projections.observation import ObservationProjection
     from app.models.projections.task import TaskProjection
 
+# Parses a FHIR date/dateTime into timestamptz for the generated effective_date
+# column, which only accepts IMMUTABLE expressions. A plain ::timestamptz cast
+# is STABLE because it reads the session TimeZone; this function never does:
+# values without an offset are taken as UTC (as the projection extractors do),
+# and partial dates ("2020", "2020-05") or invalid values give NULL rather than
+# failing the write.
+FHIR_TIMESTAMPTZ_FUNCTION = r"""
+CREATE OR REPLACE FUNCTION fhir_timestamptz(value text) RETURNS timestamptz
+LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE AS $$
+BEGIN
+    IF value !~ '^\d{4}-\d{2}-\d{2}([T ]\d{2}(:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}(:?\d{2})?)?)?$' THEN
+        RETURN NULL;
+    END IF;
+    IF value ~ '[T ].*(Z|[+-]\d{2}(:?\d{2})?)$' THEN
+        RETURN value::timestamptz;
+    END IF;
+    RETURN value::timestamp AT TIME ZONE 'UTC';
+EXCEPTION WHEN invalid_datetime_format OR datetime_field_overflow THEN
+    RETURN NULL;
+END
+$$
+"""
+
 
 class FhirResource(Base):
     """FHIR resource stored with raw JSON data.
@@ -44,16 +75,39 @@ class FhirResource(Base):
     # The actual FHIR resource - stored as raw JSON per CLAUDE.md
     data: Mapped[dict] = mapped_column(JSONB, nullable=False)
 
-    # Embedding for vector similarity search (OpenAI text-embedding-3-small = 1536 dimensions)
-    embedding: Mapped[Any | None] = mapped_column(Vector(1536), nullable=True)
+    # SHA-256 of the canonical cleaned JSON, used to skip unchanged resources on re-load
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
-    # Text used to generate the embedding (for debugging/inspection)
-    embedding_text: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Text used to generate the embedding (for debugging/inspection); source of
+    # the lexical search indexes below, so it stays on this table but is
+    # only loaded when accessed
+    embedding_text: Mapped[str | None] = mapped_column(
+        Text, nullable=True, deferred=True
+    )
 
-    # Compiled patient summary (populated for Patient-type resources only)
-    compiled_summary: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
-    compiled_at: Mapped[datetime | None] = mapped_column(
-        DateTime(timezone=True), nullable=True
+    # Full-text search vector over embedding_text, maintained by Postgres
+    search_vector: Mapped[Any | None] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('english', coalesce(embedding_text, ''))", persisted=True
+        ),
+        nullable=True,
+        deferred=True,
+    )
+
+    # Clinical date of the resource (first of effectiveDateTime, onsetDateTime,
+    # authoredOn, period.start), materialized by Postgres for indexed range
+    # filters. Stored as an instant so dates, dateTimes and offsets compare
+    # chronologically; see FHIR_TIMESTAMPTZ_FUNCTION
+    effective_date: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        Computed(
+            "fhir_timestamptz(coalesce(data->>'effectiveDateTime', "
+            "data->>'onsetDateTime', data->>'authoredOn', "
+            "data#>>'{period,start}'))",
+            persisted=True,
+        ),
+        nullable=True,
     )
 
     # Metadata
@@ -62,27 +116,113 @@ class FhirResource(Base):
         server_default=text("now()"),
     )
 
+    # Embedding for vector similarity search, stored in resource_embeddings
+    # (EMBEDDING_DIMENSION, default 1536 for OpenAI text-embedding-3-small)
+    embedding_row: Mapped["ResourceEmbedding | None"] = relationship(
+        back_populates="resource",
+        uselist=False,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    embedding: AssociationProxy[Any | None] = association_proxy(
+        "embedding_row",
+        "embedding",
+        creator=lambda embedding: ResourceEmbedding(embedding=embedding),
+    )
+
+    # Compiled patient summary (Patient-type resources only), stored in
+    # patient_summaries
+    summary_row: Mapped["PatientSummary | None"] = relationship(
+        back_populates="resource",
+        uselist=False,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    compiled_summary: AssociationProxy[dict | None] = association_proxy(
+        "summary_row",
+        "compiled_summary",
+        creator=lambda summary: PatientSummary(compiled_summary=summary),
+    )
+    compiled_at: AssociationProxy[datetime | None] = association_proxy(
+        "summary_row", "compiled_at"
+    )
+
     # Relationships to projection tables
     task_projection: Mapped["TaskProjection | None"] = relationship(
         back_populates="fhir_resource",
         uselist=False,
         cascade="all, delete-orphan",
     )
+    observation_projection: Mapped["ObservationProjection | None"] = relationship(
+        back_populates="fhir_resource",
+        uselist=False,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    condition_projection: Mapped["ConditionProjection | None"] = relationship(
+        back_populates="fhir_resource",
+        uselist=False,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    medication_request_projection: Mapped["MedicationRequestProjection | None"] = (
+        relationship(
+            back_populates="fhir_resource",
+            uselist=False,
+            cascade="all, delete-orphan",
+            passive_deletes=True,
+        )
+    )
+    encounter_projection: Mapped["EncounterProjection | None"] = relationship(
+        back_populates="fhir_resource",
+        uselist=False,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    immunization_projection: Mapped["ImmunizationProjection | None"] = relationship(
+        back_populates="fhir_resource",
+        uselist=False,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    allergy_intolerance_projection: Mapped["AllergyIntoleranceProjection | None"] = (
+        relationship(
+            back_populates="fhir_resource",
+            uselist=False,
+            cascade="all, delete-orphan",
+            passive_deletes=True,
+        )
+    )
 
     __table_args__ = (
         Index("idx_fhir_type_patient", "resource_type", "patient_id"),
         Index("idx_fhir_data_gin", "data", postgresql_using="gin"),
         # Index for idempotency checks during bundle loading
         Index("idx_fhir_id_type", "fhir_id", "resource_type"),
-        # HNSW index for cosine similarity searches on embeddings
+        # Conflict target for bulk INSERT ... ON CONFLICT upserts
+        Index(
+            "uq_fhir_patient_fhir_id_type",
+            "patient_id",
+            "fhir_id",
+            "resource_type",
+            unique=True,
+        ),
+        # GIN index for full-text (lexical) search over embedding_text
+        Index("idx_fhir_search_vector", "search_vector", postgresql_using="gin"),
+        # Trigram GIN index for substring (ILIKE '%term%') matches on embedding_text
         Index(
-            "idx_fhir_embedding_hnsw",
-            "embedding",
-            postgresql_using="hnsw",
-            postgresql_with={"m": 16, "ef_construction": 64},
-            postgresql_ops={"embedding": "vector_cosine_ops"},
+            "idx_fhir_embedding_text_trgm",
+            "embedding_text",
+            postgresql_using="gin",
+            postgresql_ops={"embedding_text": "gin_trgm_ops"},
         ),
+        # Date range filters within a patient's chart
+        Index("idx_fhir_patient_effective_date", "patient_id", "effective_date"),
     )
 
     def __repr__(self) -> str:
         return f"<FhirResource(id={self.id}, type={self.resource_type}, fhir_id={self.fhir_id})>"
+
+
+# create_all (tests, fresh databases) needs the function before the table
+event.listen(FhirResource.__table__, "before_create", DDL(FHIR_TIMESTAMPTZ_FUNCTION))
@@ -0,0 +1,133 @@
+"""Ingest job model for deferred post-ingest processing.
+
+Bundle loading commits the canonical FHIR rows and enqueues graph build,
+embedding and summary compilation as jobs in this table. Workers claim
+jobs with SELECT ... FOR UPDATE SKIP LOCKED, so Postgres is the queue and
+no separate broker is needed.
+"""
+
+from __future__ import annotations
+
+import enum
+import uuid
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, Enum, Index, Integer, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class IngestJobKind(str, enum.Enum):
+    """Post-ingest work items."""
+
+    GRAPH = "graph"
+    EMBED = "embed"
+    COMPILE = "compile"
+
+
+class IngestJobStatus(str, enum.Enum):
+    """Job lifecycle states."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class IngestJob(Base):
+    """A retryable post-ingest job for one patient."""
+
+    __tablename__ = "ingest_jobs"
+
+    # === Identity ===
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+
+    # === Classification ===
+    kind: Mapped[IngestJobKind] = mapped_column(
+        Enum(
+            IngestJobKind,
+            name="ingest_job_kind",
+            create_constraint=True,
+            values_callable=lambda x: [e.value for e in x],
+        ),
+        nullable=False,
+    )
+    status: Mapped[IngestJobStatus] = mapped_column(
+        Enum(
+            IngestJobStatus,
+            name="ingest_job_status",
+            create_constraint=True,
+            values_callable=lambda x: [e.value for e in x],
+        ),
+        nullable=False,
+        default=IngestJobStatus.PENDING,
+    )
+
+    # === References ===
+    patient_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        nullable=False,
+        index=True,
+        comment="Canonical patient UUID the job works on",
+    )
+
+    # === Content ===
+    payload: Mapped[dict[str, Any]] = mapped_column(
+        JSONB,
+        nullable=False,
+        default=dict,
+        server_default=text("'{}'::jsonb"),
+        comment="Kind-specific arguments, e.g. resource_ids",
+    )
+
+    # === Retry ===
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=5)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # === Timing ===
+    run_after: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=text("now()"),
+        comment="Earliest time the job may be claimed (retry backoff)",
+    )
+    locked_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=text("now()"),
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=text("now()"),
+        onupdate=func.now(),
+    )
+    completed_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+
+    __table_args__ = (
+        # Claim query: oldest runnable job first
+        Index(
+            "idx_ingest_jobs_claim",
+            "run_after",
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+        Index("idx_ingest_jobs_patient_kind", "patient_id", "kind"),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<IngestJob(id={self.id}, kind={self.kind}, status={self.status}, "
+            f"patient_id={self.patient_id})>"
+        )
@@ -0,0 +1,86 @@
+"""Embedded passages of DocumentReference clinical notes.
+
+A DocumentReference embeds as one short header (type, date, description);
+the base64 note text itself is split into overlapping windows stored here,
+each with its own embedding, so narrative can be searched passage by passage.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Any
+
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, Text, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.config import settings
+from app.database import Base
+
+
+class NoteChunk(Base):
+    """One overlapping window of a DocumentReference's decoded note text."""
+
+    __tablename__ = "note_chunks"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+
+    # Parent DocumentReference; chunks are removed with it
+    resource_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("fhir_resources.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+
+    # Denormalized from the parent so searches stay patient-scoped without a join
+    patient_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        nullable=False,
+        index=True,
+    )
+
+    # Position of the window within the note
+    chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
+    start_offset: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # Passage text (a slice of the decoded note)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+
+    embedding: Mapped[Any] = mapped_column(
+        Vector(settings.embedding_dimension), nullable=False
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=text("now()"),
+    )
+
+    __table_args__ = (
+        Index(
+            "uq_note_chunks_resource_index",
+            "resource_id",
+            "chunk_index",
+            unique=True,
+        ),
+        # HNSW index for cosine similarity searches over passages
+        Index(
+            "idx_note_chunks_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<NoteChunk(resource_id={self.resource_id}, "
+            f"chunk_index={self.chunk_index})>"
+        )
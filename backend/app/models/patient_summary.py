@@ -0,0 +1,47 @@
+"""Compiled patient summaries, stored beside the Patient's fhir_resources row.
+
+A compiled summary is a large JSONB document that only Patient rows carry.
+Keeping it in its own table means queries over Patient rows (patient lists,
+existence checks) never read or de-TOAST it; it is fetched only when asked for.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import DateTime, ForeignKey, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.database import Base
+
+if TYPE_CHECKING:
+    from app.models.fhir import FhirResource
+
+
+class PatientSummary(Base):
+    """The compiled summary of one patient (absent until first compiled)."""
+
+    __tablename__ = "patient_summaries"
+
+    # The Patient row's id, which is the canonical patient_id
+    patient_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("fhir_resources.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    # Output of compile_patient_summary()
+    compiled_summary: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    compiled_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=text("now()"),
+    )
+
+    resource: Mapped["FhirResource"] = relationship(back_populates="summary_row")
+
+    def __repr__(self) -> str:
+        return f"<PatientSummary(patient_id={self.patient_id})>"
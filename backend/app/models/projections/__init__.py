@@ -4,6 +4,20 @@ Projection tables provide fast indexed queries over extracted FHIR fields
 while keeping the canonical FHIR JSON as the source of truth.
 """
 
+from app.models.projections.allergy_intolerance import AllergyIntoleranceProjection
+from app.models.projections.condition import ConditionProjection
+from app.models.projections.encounter import EncounterProjection
+from app.models.projections.immunization import ImmunizationProjection
+from app.models.projections.medication_request import MedicationRequestProjection
+from app.models.projections.observation import ObservationProjection
 from app.models.projections.task import TaskProjection
 
-__all__ = ["TaskProjection"]
+__all__ = [
+    "AllergyIntoleranceProjection",
+    "ConditionProjection",
+    "EncounterProjection",
+    "ImmunizationProjection",
+    "MedicationRequestProjection",
+    "ObservationProjection",
+    "TaskProjection",
+]
@@ -0,0 +1,82 @@
+"""AllergyIntolerance projection model.
+
+Provides indexed access to AllergyIntolerance fields extracted from FHIR JSON.
+The canonical data lives in fhir_resources.data; this table lets allergy
+lists filter and order by typed columns instead of JSONB path expressions.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import DateTime, ForeignKey, Index, String, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.database import Base
+
+if TYPE_CHECKING:
+    from app.models.fhir import FhirResource
+
+
+class AllergyIntoleranceProjection(Base):
+    """Projection table for FHIR AllergyIntolerance resources.
+
+    Extracts commonly queried fields from FHIR AllergyIntolerance JSON for indexed
+    access. Linked to FhirResource via foreign key with cascade delete.
+    """
+
+    __tablename__ = "allergy_intolerance_projections"
+
+    # Primary key is also the foreign key to fhir_resources
+    fhir_resource_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("fhir_resources.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    # Copied from the resource row so queries stay patient-scoped without a join
+    patient_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), nullable=True
+    )
+
+    # clinicalStatus / verificationStatus coding[0].code
+    clinical_status: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    verification_status: Mapped[str | None] = mapped_column(String(32), nullable=True)
+
+    # criticality (high, low, unable-to-assess) and category[0]
+    criticality: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    category: Mapped[str | None] = mapped_column(String(32), nullable=True)
+
+    # code.coding[0] code
+    code: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+    # onsetDateTime and recordedDate
+    onset_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    recorded_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    # Timestamp for when projection was last synced
+    projected_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=text("now()"),
+        nullable=False,
+    )
+
+    # Relationship to FhirResource
+    fhir_resource: Mapped["FhirResource"] = relationship(
+        back_populates="allergy_intolerance_projection",
+    )
+
+    __table_args__ = (
+        # Status-filtered allergy lists within a patient
+        Index("ix_allergy_proj_patient_status", "patient_id", "clinical_status"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<AllergyIntoleranceProjection(fhir_resource_id={self.fhir_resource_id}, code={self.code})>"
@@ -0,0 +1,98 @@
+"""Condition projection model.
+
+Provides indexed access to Condition fields extracted from FHIR JSON.
+The canonical data lives in fhir_resources.data; this table lets condition
+lists and the summary compiler filter and order by typed columns instead
+of JSONB path expressions.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import DateTime, ForeignKey, Index, String, Text, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.database import Base
+
+if TYPE_CHECKING:
+    from app.models.fhir import FhirResource
+
+
+class ConditionProjection(Base):
+    """Projection table for FHIR Condition resources.
+
+    Extracts commonly queried fields from FHIR Condition JSON for indexed
+    access. Linked to FhirResource via foreign key with cascade delete.
+    """
+
+    __tablename__ = "condition_projections"
+
+    # Primary key is also the foreign key to fhir_resources
+    fhir_resource_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("fhir_resources.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    # Copied from the resource row so queries stay patient-scoped without a join
+    patient_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), nullable=True
+    )
+
+    # code.coding[0] (SNOMED CT) code and display
+    code: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    display: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # clinicalStatus / verificationStatus coding[0].code
+    clinical_status: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    verification_status: Mapped[str | None] = mapped_column(String(32), nullable=True)
+
+    # onsetDateTime (or onsetPeriod.start)
+    onset_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    # abatementDateTime (or abatementPeriod.start)
+    abatement_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    # recordedDate
+    recorded_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    # Timestamp for when projection was last synced
+    projected_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=text("now()"),
+        nullable=False,
+    )
+
+    # Relationship to FhirResource
+    fhir_resource: Mapped["FhirResource"] = relationship(
+        back_populates="condition_projection",
+    )
+
+    __table_args__ = (
+        # Status-filtered lists in onset order, and recently resolved conditions
+        Index(
+            "ix_cond_proj_patient_status_onset",
+            "patient_id",
+            "clinical_status",
+            "onset_at",
+        ),
+        Index(
+            "ix_cond_proj_patient_status_abatement",
+            "patient_id",
+            "clinical_status",
+            "abatement_at",
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return f"<ConditionProjection(fhir_resource_id={self.fhir_resource_id}, code={self.code})>"
@@ -0,0 +1,79 @@
+"""Encounter projection model.
+
+Provides indexed access to Encounter fields extracted from FHIR JSON.
+The canonical data lives in fhir_resources.data; this table lets encounter
+lists and timelines filter and order by typed columns instead of JSONB
+path expressions.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import DateTime, ForeignKey, Index, String, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.database import Base
+
+if TYPE_CHECKING:
+    from app.models.fhir import FhirResource
+
+
+class EncounterProjection(Base):
+    """Projection table for FHIR Encounter resources.
+
+    Extracts commonly queried fields from FHIR Encounter JSON for indexed
+    access. Linked to FhirResource via foreign key with cascade delete.
+    """
+
+    __tablename__ = "encounter_projections"
+
+    # Primary key is also the foreign key to fhir_resources
+    fhir_resource_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("fhir_resources.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    # Copied from the resource row so queries stay patient-scoped without a join
+    patient_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), nullable=True
+    )
+
+    # status (finished, in-progress, ...)
+    status: Mapped[str | None] = mapped_column(String(32), nullable=True)
+
+    # class.code (AMB, EMER, IMP, ...) and type[0].coding[0].code
+    class_code: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    type_code: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+    # period.start / period.end
+    period_start: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    period_end: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    # Timestamp for when projection was last synced
+    projected_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=text("now()"),
+        nullable=False,
+    )
+
+    # Relationship to FhirResource
+    fhir_resource: Mapped["FhirResource"] = relationship(
+        back_populates="encounter_projection",
+    )
+
+    __table_args__ = (
+        # Encounters in date order within a patient
+        Index("ix_enc_proj_patient_start", "patient_id", "period_start"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<EncounterProjection(fhir_resource_id={self.fhir_resource_id}, type_code={self.type_code})>"
@@ -0,0 +1,75 @@
+"""Immunization projection model.
+
+Provides indexed access to Immunization fields extracted from FHIR JSON.
+The canonical data lives in fhir_resources.data; this table lets
+immunization lists filter and order by typed columns instead of JSONB path
+expressions.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import DateTime, ForeignKey, Index, String, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.database import Base
+
+if TYPE_CHECKING:
+    from app.models.fhir import FhirResource
+
+
+class ImmunizationProjection(Base):
+    """Projection table for FHIR Immunization resources.
+
+    Extracts commonly queried fields from FHIR Immunization JSON for indexed
+    access. Linked to FhirResource via foreign key with cascade delete.
+    """
+
+    __tablename__ = "immunization_projections"
+
+    # Primary key is also the foreign key to fhir_resources
+    fhir_resource_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("fhir_resources.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    # Copied from the resource row so queries stay patient-scoped without a join
+    patient_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), nullable=True
+    )
+
+    # status (completed, not-done, ...)
+    status: Mapped[str | None] = mapped_column(String(32), nullable=True)
+
+    # vaccineCode.coding[0] (CVX) code
+    vaccine_code: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+    # occurrenceDateTime
+    occurrence_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    # Timestamp for when projection was last synced
+    projected_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=text("now()"),
+        nullable=False,
+    )
+
+    # Relationship to FhirResource
+    fhir_resource: Mapped["FhirResource"] = relationship(
+        back_populates="immunization_projection",
+    )
+
+    __table_args__ = (
+        # Immunizations in date order within a patient
+        Index("ix_imm_proj_patient_occurrence", "patient_id", "occurrence_at"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<ImmunizationProjection(fhir_resource_id={self.fhir_resource_id}, vaccine_code={self.vaccine_code})>"
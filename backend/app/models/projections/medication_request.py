@@ -0,0 +1,88 @@
+"""MedicationRequest projection model.
+
+Provides indexed access to MedicationRequest fields extracted from FHIR JSON.
+The canonical data lives in fhir_resources.data; this table lets
+medication lists and dose histories filter and order by typed columns
+instead of JSONB path expressions.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import DateTime, ForeignKey, Index, String, Text, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.database import Base
+
+if TYPE_CHECKING:
+    from app.models.fhir import FhirResource
+
+
+class MedicationRequestProjection(Base):
+    """Projection table for FHIR MedicationRequest resources.
+
+    Extracts commonly queried fields from FHIR MedicationRequest JSON for indexed
+    access. Linked to FhirResource via foreign key with cascade delete.
+    """
+
+    __tablename__ = "medication_request_projections"
+
+    # Primary key is also the foreign key to fhir_resources
+    fhir_resource_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("fhir_resources.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    # Copied from the resource row so queries stay patient-scoped without a join
+    patient_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), nullable=True
+    )
+
+    # status (active, stopped, ...) and intent
+    status: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    intent: Mapped[str | None] = mapped_column(String(32), nullable=True)
+
+    # medicationCodeableConcept.coding[0] (RxNorm) code and display
+    code: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    display: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # authoredOn
+    authored_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    # Timestamp for when projection was last synced
+    projected_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=text("now()"),
+        nullable=False,
+    )
+
+    # Relationship to FhirResource
+    fhir_resource: Mapped["FhirResource"] = relationship(
+        back_populates="medication_request_projection",
+    )
+
+    __table_args__ = (
+        # Status-filtered lists, and one medication's history, in authoredOn order
+        Index(
+            "ix_medreq_proj_patient_status_authored",
+            "patient_id",
+            "status",
+            "authored_at",
+        ),
+        Index(
+            "ix_medreq_proj_patient_display_authored",
+            "patient_id",
+            "display",
+            "authored_at",
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return f"<MedicationRequestProjection(fhir_resource_id={self.fhir_resource_id}, code={self.code})>"
@@ -0,0 +1,94 @@
+"""Observation projection model.
+
+Provides indexed access to Observation fields extracted from FHIR JSON.
+The canonical data lives in fhir_resources.data; this table lets lab and
+vital queries filter and order by LOINC code, category and date without
+evaluating JSONB path expressions per row.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import DateTime, Float, ForeignKey, Index, String, Text, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.database import Base
+
+if TYPE_CHECKING:
+    from app.models.fhir import FhirResource
+
+
+class ObservationProjection(Base):
+    """Projection table for FHIR Observation resources.
+
+    Extracts commonly queried fields from FHIR Observation JSON for indexed
+    access. Linked to FhirResource via foreign key with cascade delete.
+    """
+
+    __tablename__ = "observation_projections"
+
+    # Primary key is also the foreign key to fhir_resources
+    fhir_resource_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("fhir_resources.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    # Copied from the resource row so queries stay patient-scoped without a join
+    patient_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), nullable=True
+    )
+
+    # code.coding[0].code and category[0].coding[0].code
+    loinc: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    category: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+    # effectiveDateTime (or effectivePeriod.start, or issued)
+    effective_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    # valueQuantity
+    value: Mapped[float | None] = mapped_column(Float, nullable=True)
+    unit: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # interpretation[0].coding[0].code (H, L, N, ...)
+    interpretation: Mapped[str | None] = mapped_column(String(20), nullable=True)
+
+    # Component values (e.g. systolic/diastolic): [{loinc, value, unit, interpretation}]
+    components: Mapped[list[dict[str, Any]] | None] = mapped_column(
+        JSONB, nullable=True
+    )
+
+    # Timestamp for when projection was last synced
+    projected_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=text("now()"),
+        nullable=False,
+    )
+
+    # Relationship to FhirResource
+    fhir_resource: Mapped["FhirResource"] = relationship(
+        back_populates="observation_projection",
+    )
+
+    __table_args__ = (
+        # Composite indexes for common query patterns: one code's history,
+        # and a category's results, each in date order within a patient
+        Index(
+            "ix_obs_proj_patient_loinc_effective", "patient_id", "loinc", "effective_at"
+        ),
+        Index(
+            "ix_obs_proj_patient_category_effective",
+            "patient_id",
+            "category",
+            "effective_at",
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return f"<ObservationProjection(fhir_resource_id={self.fhir_resource_id}, loinc={self.loinc})>"
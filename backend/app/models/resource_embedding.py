@@ -0,0 +1,87 @@
+"""Embeddings of FHIR resources, stored beside fhir_resources.
+
+Vectors live in their own table so the heap pages of fhir_resources (scanned
+by every JSONB query) don't carry ~6 KB of float32 per row. The full-precision
+vector is kept for re-ranking; candidate generation uses HNSW indexes over
+compact quantized forms of it (halfvec: 2 bytes per dimension, binary: 1 bit).
+"""
+
+from __future__ import annotations
+
+import uuid
+from typing import TYPE_CHECKING, Any
+
+from pgvector.sqlalchemy import BIT, HALFVEC, Vector
+from sqlalchemy import ForeignKey, Index, cast, event, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.config import settings
+from app.database import Base
+
+if TYPE_CHECKING:
+    from app.models.fhir import FhirResource
+
+
+class ResourceEmbedding(Base):
+    """The embedding of one FhirResource (absent until it is embedded)."""
+
+    __tablename__ = "resource_embeddings"
+
+    # One embedding per resource; removed with it
+    resource_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("fhir_resources.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    # Denormalized from the resource so searches stay patient-scoped without a join
+    patient_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        nullable=True,
+        index=True,
+    )
+
+    # Full-precision vector, used to re-rank quantized candidates
+    embedding: Mapped[Any] = mapped_column(
+        Vector(settings.embedding_dimension), nullable=False
+    )
+
+    resource: Mapped["FhirResource"] = relationship(back_populates="embedding_row")
+
+    def __repr__(self) -> str:
+        return f"<ResourceEmbedding(resource_id={self.resource_id})>"
+
+
+@event.listens_for(ResourceEmbedding, "before_insert")
+def _copy_patient_id(mapper: Any, connection: Any, target: ResourceEmbedding) -> None:
+    """Fill patient_id from the parent resource for ORM-created embeddings."""
+    if target.patient_id is None and target.resource is not None:
+        target.patient_id = target.resource.patient_id
+
+
+def halfvec_embedding(embedding: Any) -> Any:
+    """Half-precision form of a vector expression (matches the halfvec index)."""
+    return cast(embedding, HALFVEC(settings.embedding_dimension))
+
+
+def binary_embedding(embedding: Any) -> Any:
+    """Binary-quantized form of a vector expression (matches the bit index)."""
+    return cast(func.binary_quantize(embedding), BIT(settings.embedding_dimension))
+
+
+# HNSW indexes over the quantized forms (settings.vector_quantization picks one)
+Index(
+    "idx_resource_embeddings_halfvec_hnsw",
+    halfvec_embedding(ResourceEmbedding.embedding).label("embedding_halfvec"),
+    postgresql_using="hnsw",
+    postgresql_with={"m": 16, "ef_construction": 64},
+    postgresql_ops={"embedding_halfvec": "halfvec_cosine_ops"},
+)
+Index(
+    "idx_resource_embeddings_bit_hnsw",
+    binary_embedding(ResourceEmbedding.embedding).label("embedding_bit"),
+    postgresql_using="hnsw",
+    postgresql_with={"m": 16, "ef_construction": 64},
+    postgresql_ops={"embedding_bit": "bit_hamming_ops"},
+)
@@ -4,6 +4,12 @@ Extractors are pure functions that pull specific fields from FHIR JSON
 for projection tables.
 """
 
+from app.projections.extractors.clinical import register_clinical_projections
+from app.projections.extractors.observation import register_observation_projection
 from app.projections.extractors.task import register_task_projection
 
-__all__ = ["register_task_projection"]
+__all__ = [
+    "register_clinical_projections",
+    "register_observation_projection",
+    "register_task_projection",
+]
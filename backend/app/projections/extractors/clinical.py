@@ -0,0 +1,103 @@
+"""Declarative projections for loaded clinical resources.
+
+Condition, MedicationRequest, Encounter, Immunization and
+AllergyIntolerance projections only copy codes, statuses and dates out of
+the FHIR JSON, so each is declared as a list of path-based extractors
+rather than hand-written functions (compare observation.py and task.py).
+"""
+
+from app.projections.extractors.common import code_at, datetime_at, string_at
+from app.projections.registry import (
+    FieldExtractor,
+    ProjectionConfig,
+    ProjectionRegistry,
+)
+
+# resource type -> (table name, {column: extractor})
+CLINICAL_PROJECTION_FIELDS = {
+    "Condition": (
+        "condition_projections",
+        {
+            "code": code_at("code"),
+            "display": code_at("code", "display"),
+            "clinical_status": code_at("clinicalStatus"),
+            "verification_status": code_at("verificationStatus"),
+            "onset_at": datetime_at("onsetDateTime", "onsetPeriod.start"),
+            "abatement_at": datetime_at("abatementDateTime", "abatementPeriod.start"),
+            "recorded_at": datetime_at("recordedDate"),
+        },
+    ),
+    "MedicationRequest": (
+        "medication_request_projections",
+        {
+            "status": string_at("status"),
+            "intent": string_at("intent"),
+            "code": code_at("medicationCodeableConcept"),
+            "display": code_at("medicationCodeableConcept", "display"),
+            "authored_at": datetime_at("authoredOn"),
+        },
+    ),
+    "Encounter": (
+        "encounter_projections",
+        {
+            "status": string_at("status"),
+            "class_code": string_at("class.code"),
+            "type_code": code_at("type"),
+            "period_start": datetime_at("period.start"),
+            "period_end": datetime_at("period.end"),
+        },
+    ),
+    "Immunization": (
+        "immunization_projections",
+        {
+            "status": string_at("status"),
+            "vaccine_code": code_at("vaccineCode"),
+            "occurrence_at": datetime_at("occurrenceDateTime"),
+        },
+    ),
+    "AllergyIntolerance": (
+        "allergy_intolerance_projections",
+        {
+            "clinical_status": code_at("clinicalStatus"),
+            "verification_status": code_at("verificationStatus"),
+            "criticality": string_at("criticality"),
+            "category": string_at("category.0"),
+            "code": code_at("code"),
+            "onset_at": datetime_at("onsetDateTime"),
+            "recorded_at": datetime_at("recordedDate"),
+        },
+    ),
+}
+
+
+def register_clinical_projections() -> None:
+    """Register the clinical resource projections with the registry.
+
+    This should be called at application startup (and by scripts that load
+    bundles) alongside register_observation_projection.
+    """
+    # Import here to avoid circular imports; importing sync installs the
+    # flush-time listeners that sync_on_flush relies on
+    from app.models import projections as models
+    from app.projections import sync  # noqa: F401
+
+    model_classes = {
+        "Condition": models.ConditionProjection,
+        "MedicationRequest": models.MedicationRequestProjection,
+        "Encounter": models.EncounterProjection,
+        "Immunization": models.ImmunizationProjection,
+        "AllergyIntolerance": models.AllergyIntoleranceProjection,
+    }
+    for resource_type, (table_name, fields) in CLINICAL_PROJECTION_FIELDS.items():
+        ProjectionRegistry.register(
+            ProjectionConfig(
+                resource_type=resource_type,
+                table_name=table_name,
+                model_class=model_classes[resource_type],
+                extractors=[
+                    FieldExtractor(column, extractor)
+                    for column, extractor in fields.items()
+                ],
+                sync_on_flush=True,
+            )
+        )
@@ -0,0 +1,117 @@
+"""Shared helpers for FHIR field extractors.
+
+Building blocks for projections of loaded clinical data: reading codes and
+dates out of FHIR JSON, and small factories that turn a field path into an
+extractor so a projection can be declared as a list of FieldExtractors.
+"""
+
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import Any
+
+
+def get_path(data: Any, path: str) -> Any:
+    """Follow a dotted path through FHIR JSON.
+
+    Integer segments index into lists ("category.0.coding").
+
+    Args:
+        data: FHIR resource JSON (or any nested value).
+        path: Dotted path, e.g. "effectivePeriod.start".
+
+    Returns:
+        The value at the path, or None if any step is missing.
+    """
+    for key in path.split("."):
+        if isinstance(data, dict):
+            data = data.get(key)
+        elif isinstance(data, list) and key.isdigit():
+            index = int(key)
+            data = data[index] if index < len(data) else None
+        else:
+            return None
+        if data is None:
+            return None
+    return data
+
+
+def first_code(concept: Any, attr: str = "code") -> str | None:
+    """Get coding[0].<attr> from a CodeableConcept.
+
+    Args:
+        concept: FHIR CodeableConcept dict.
+        attr: Coding attribute to read ("code" or "display").
+
+    Returns:
+        Coding value or None if absent.
+    """
+    if not isinstance(concept, dict):
+        return None
+    codings = concept.get("coding") or []
+    if codings and isinstance(codings[0], dict):
+        return codings[0].get(attr)
+    return None
+
+
+def parse_datetime(value: Any) -> datetime | None:
+    """Parse a FHIR date or dateTime; values without an offset are taken as UTC.
+
+    Args:
+        value: FHIR date/dateTime string.
+
+    Returns:
+        Timezone-aware datetime or None if missing or unparseable.
+    """
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def numeric(value: Any) -> float | None:
+    """Return value as a float if it is a number (not a bool)."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+def code_at(path: str, attr: str = "code") -> Callable[[dict], str | None]:
+    """Extractor for coding[0].<attr> of the CodeableConcept at path.
+
+    A list-valued field (e.g. category) uses its first element.
+    """
+
+    def extract(data: dict) -> str | None:
+        concept = get_path(data, path)
+        if isinstance(concept, list):
+            concept = concept[0] if concept else None
+        return first_code(concept, attr)
+
+    return extract
+
+
+def datetime_at(*paths: str) -> Callable[[dict], datetime | None]:
+    """Extractor for the first of paths that holds a date/dateTime."""
+
+    def extract(data: dict) -> datetime | None:
+        for path in paths:
+            if (value := get_path(data, path)) is not None:
+                return parse_datetime(value)
+        return None
+
+    return extract
+
+
+def string_at(path: str) -> Callable[[dict], str | None]:
+    """Extractor for the string value at path."""
+
+    def extract(data: dict) -> str | None:
+        value = get_path(data, path)
+        return value if isinstance(value, str) else None
+
+    return extract
@@ -0,0 +1,153 @@
+"""Observation-specific extractors for FHIR Observation resources.
+
+Pure functions that extract fields from FHIR Observation JSON for the
+observation_projections table.
+"""
+
+from datetime import datetime
+from typing import Any
+
+from app.projections.extractors.common import first_code, numeric, parse_datetime
+from app.projections.registry import (
+    FieldExtractor,
+    ProjectionConfig,
+    ProjectionRegistry,
+)
+
+
+def extract_loinc(data: dict) -> str | None:
+    """Extract the LOINC code from FHIR Observation.code.coding[0].
+
+    Args:
+        data: FHIR Observation JSON.
+
+    Returns:
+        LOINC code or None.
+    """
+    return first_code(data.get("code"))
+
+
+def extract_category(data: dict) -> str | None:
+    """Extract the category code from FHIR Observation.category[0].
+
+    Args:
+        data: FHIR Observation JSON.
+
+    Returns:
+        Category code (laboratory, vital-signs, ...) or None.
+    """
+    categories = data.get("category") or []
+    return first_code(categories[0]) if categories else None
+
+
+def extract_effective_at(data: dict) -> datetime | None:
+    """Extract the clinical time of the Observation.
+
+    Args:
+        data: FHIR Observation JSON.
+
+    Returns:
+        effectiveDateTime, else effectivePeriod.start, else issued; or None.
+    """
+    period = data.get("effectivePeriod") or {}
+    return parse_datetime(
+        data.get("effectiveDateTime") or period.get("start") or data.get("issued")
+    )
+
+
+def extract_value(data: dict) -> float | None:
+    """Extract the numeric value from FHIR Observation.valueQuantity.
+
+    Args:
+        data: FHIR Observation JSON.
+
+    Returns:
+        Numeric value or None.
+    """
+    return numeric((data.get("valueQuantity") or {}).get("value"))
+
+
+def extract_unit(data: dict) -> str | None:
+    """Extract the unit from FHIR Observation.valueQuantity.
+
+    Args:
+        data: FHIR Observation JSON.
+
+    Returns:
+        Unit string or None.
+    """
+    return (data.get("valueQuantity") or {}).get("unit")
+
+
+def extract_interpretation(data: dict) -> str | None:
+    """Extract the interpretation code from FHIR Observation.interpretation[0].
+
+    Args:
+        data: FHIR Observation JSON.
+
+    Returns:
+        Interpretation code (H, L, N, ...) or None.
+    """
+    interpretations = data.get("interpretation") or []
+    return first_code(interpretations[0]) if interpretations else None
+
+
+def extract_components(data: dict) -> list[dict[str, Any]] | None:
+    """Extract component values (e.g. blood pressure systolic/diastolic).
+
+    Args:
+        data: FHIR Observation JSON.
+
+    Returns:
+        List of {loinc, value, unit, interpretation} dicts, or None if the
+        Observation has no components.
+    """
+    components = data.get("component") or []
+    if not components:
+        return None
+    extracted = []
+    for component in components:
+        if not isinstance(component, dict):
+            continue
+        quantity = component.get("valueQuantity") or {}
+        interpretations = component.get("interpretation") or []
+        extracted.append(
+            {
+                "loinc": first_code(component.get("code")),
+                "value": numeric(quantity.get("value")),
+                "unit": quantity.get("unit"),
+                "interpretation": (
+                    first_code(interpretations[0]) if interpretations else None
+                ),
+            }
+        )
+    return extracted
+
+
+def register_observation_projection() -> None:
+    """Register the Observation projection configuration with the registry.
+
+    This should be called at application startup (and by scripts that load
+    bundles) so lab and vital queries find their projection rows.
+    """
+    # Import here to avoid circular imports; importing sync installs the
+    # flush-time listeners that sync_on_flush relies on
+    from app.models.projections.observation import ObservationProjection
+    from app.projections import sync  # noqa: F401
+
+    config = ProjectionConfig(
+        resource_type="Observation",
+        table_name="observation_projections",
+        model_class=ObservationProjection,
+        extractors=[
+            FieldExtractor("loinc", extract_loinc),
+            FieldExtractor("category", extract_category),
+            FieldExtractor("effective_at", extract_effective_at),
+            FieldExtractor("value", extract_value),
+            FieldExtractor("unit", extract_unit),
+            FieldExtractor("interpretation", extract_interpretation),
+            FieldExtractor("components", extract_components),
+        ],
+        sync_on_flush=True,
+    )
+    ProjectionRegistry.register(config)
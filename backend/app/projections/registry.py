@@ -27,13 +27,22 @@ class ProjectionConfig:
     """Configuration for a resource type's projection.
 
     Defines how to extract fields from FHIR JSON into a projection table.
+
+    Args:
+        serializer_class: Converts application data to FHIR JSON, for
+            projections whose resources the application authors (Task);
+            None for read-only projections of loaded data.
+        sync_on_flush: Keep the projection in sync whenever a FhirResource
+            of this type is inserted or updated through the ORM (see
+            app.projections.sync), not only through FhirRepository.
     """
 
     resource_type: str
     table_name: str
     model_class: type
-    serializer_class: type
+    serializer_class: type | None = None
     extractors: list[FieldExtractor] = field(default_factory=list)
+    sync_on_flush: bool = False
 
     def extract(self, fhir_data: dict) -> dict:
         """Extract all projection fields from FHIR data.
@@ -0,0 +1,137 @@
+"""Bulk and flush-time projection sync.
+
+FhirRepository syncs projections one resource at a time. Bundle loading
+writes resources with multi-row INSERT ... ON CONFLICT statements instead,
+so it syncs their projections the same way with sync_projections. For
+configs with sync_on_flush, resources inserted or updated through the ORM
+(seed helpers, ad-hoc sessions) are synced by the mapper events below.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects.postgresql import Insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.fhir import FhirResource
+from app.projections.registry import ProjectionConfig, ProjectionRegistry
+
+logger = logging.getLogger(__name__)
+
+# Rows per projection upsert statement (keeps bind parameters well under
+# asyncpg's 32767 limit for projections of ~12 columns)
+SYNC_BATCH_SIZE = 1000
+
+
+def projection_row(
+    config: ProjectionConfig,
+    resource_id: uuid.UUID,
+    patient_id: uuid.UUID | None,
+    data: dict[str, Any],
+) -> dict[str, Any]:
+    """Build the projection table row for one resource.
+
+    Args:
+        config: The resource type's projection configuration.
+        resource_id: fhir_resources.id of the resource.
+        patient_id: The resource's patient, for projections with a patient_id column.
+        data: Raw FHIR resource JSON.
+
+    Returns:
+        Column values for config.model_class.
+    """
+    row = config.extract(data)
+    row["fhir_resource_id"] = resource_id
+    row["projected_at"] = datetime.now(timezone.utc)
+    if "patient_id" in config.model_class.__table__.c:
+        row["patient_id"] = patient_id
+    return row
+
+
+def upsert_statement(config: ProjectionConfig, rows: list[dict[str, Any]]) -> Insert:
+    """INSERT ... ON CONFLICT (fhir_resource_id) DO UPDATE for projection rows."""
+    table = config.model_class.__table__
+    stmt = pg_insert(table).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.fhir_resource_id],
+        set_={
+            name: stmt.excluded[name] for name in rows[0] if name != "fhir_resource_id"
+        },
+    )
+
+
+async def sync_projections(
+    db: AsyncSession,
+    resources: Iterable[tuple[uuid.UUID, uuid.UUID | None, str, dict[str, Any]]],
+) -> int:
+    """Upsert the projection rows of written resources, batched per type.
+
+    Args:
+        db: Async SQLAlchemy session.
+        resources: (resource id, patient id, resource type, FHIR data) of
+            each inserted or updated resource; types without a registered
+            projection are skipped.
+
+    Returns:
+        Number of projection rows written.
+    """
+    if not ProjectionRegistry.all_configs():
+        # Extractors are registered by each entry point at startup; one that
+        # skipped it would leave every projection table behind fhir_resources
+        logger.warning(
+            "No projections registered; resources were written without "
+            "projection rows. Call the app.projections.extractors "
+            "register_*_projection(s) functions at startup, then run "
+            "app.scripts.backfill_projections."
+        )
+        return 0
+
+    rows_by_type: defaultdict[str, list[dict[str, Any]]] = defaultdict(list)
+    configs: dict[str, ProjectionConfig] = {}
+    for resource_id, patient_id, resource_type, data in resources:
+        config = configs.get(resource_type) or ProjectionRegistry.get(resource_type)
+        if config is None:
+            continue
+        configs[resource_type] = config
+        rows_by_type[resource_type].append(
+            projection_row(config, resource_id, patient_id, data)
+        )
+
+    written = 0
+    for resource_type, rows in rows_by_type.items():
+        config = configs[resource_type]
+        for i in range(0, len(rows), SYNC_BATCH_SIZE):
+            batch = rows[i : i + SYNC_BATCH_SIZE]
+            await db.execute(upsert_statement(config, batch))
+            written += len(batch)
+    return written
+
+
+def _sync_flushed(connection: Connection, target: FhirResource) -> None:
+    config = ProjectionRegistry.get(target.resource_type)
+    if config is None or not config.sync_on_flush:
+        return
+    row = projection_row(config, target.id, target.patient_id, target.data)
+    connection.execute(upsert_statement(config, [row]))
+
+
+@event.listens_for(FhirResource, "after_insert")
+def _sync_inserted(mapper: Any, connection: Connection, target: FhirResource) -> None:
+    """Project ORM-inserted resources (sync_on_flush configs only)."""
+    _sync_flushed(connection, target)
+
+
+@event.listens_for(FhirResource, "after_update")
+def _sync_updated(mapper: Any, connection: Connection, target: FhirResource) -> None:
+    """Re-project ORM-updated resources whose data changed."""
+    if inspect(target).attrs.data.history.has_changes():
+        _sync_flushed(connection, target)
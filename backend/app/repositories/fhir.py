@@ -159,13 +159,15 @@ class FhirRepository:
 
         Checks the ProjectionRegistry for a registered projection configuration
         for the resource type. If found, extracts fields from the FHIR data
-        and upserts into the projection table.
+        and upserts into the projection table. Configs with sync_on_flush are
+        skipped: their rows were already written by the flush-time listeners
+        in app.projections.sync.
 
         Args:
             resource: The FhirResource to sync projection for.
         """
         config = ProjectionRegistry.get(resource.resource_type)
-        if not config:
+        if not config or config.sync_on_flush:
             return
 
         # Extract fields from FHIR data using configured extractors
@@ -5,9 +5,9 @@ import json
 import logging
 import time
 import uuid
+from collections.abc import AsyncGenerator
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from collections.abc import AsyncGenerator
 from typing import Any, Literal
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -22,12 +22,22 @@ from app.models import FhirResource
 from app.models.session import Session
 from app.schemas import AgentResponse
 from app.schemas.agent import ChatAgentResponse
-from app.services.agent import AgentService, build_system_prompt_quick, build_system_prompt_lightning, build_system_prompt_deep
+from app.services.agent import (
+    AgentService,
+    build_system_prompt_deep,
+    build_system_prompt_lightning,
+    build_system_prompt_quick,
+)
+from app.services.chart_builder import build_chart_for_type
 from app.services.compiler import compile_and_store, get_compiled_summary
 from app.services.fhir_loader import get_patient_profile
 from app.services.graph import KnowledgeGraph
-from app.services.query_classifier import QUICK_PROFILE, QueryProfile, QueryTier, classify_query
-from app.services.chart_builder import build_chart_for_type
+from app.services.query_classifier import (
+    QUICK_PROFILE,
+    QueryProfile,
+    QueryTier,
+    classify_query,
+)
 from app.services.table_builder import build_table_for_type
 
 logger = logging.getLogger(__name__)
@@ -183,11 +193,17 @@ class ChatContext:
     def build_prompt_for(self, profile: QueryProfile) -> str:
         """Build system prompt for a different tier profile."""
         if profile.system_prompt_mode == "lightning":
-            return build_system_prompt_lightning(self.compiled_summary, patient_profile=self.profile_summary)
+            return build_system_prompt_lightning(
+                self.compiled_summary, patient_profile=self.profile_summary
+            )
         elif profile.system_prompt_mode == "quick":
-            return build_system_prompt_quick(self.compiled_summary, patient_profile=self.profile_summary)
+            return build_system_prompt_quick(
+                self.compiled_summary, patient_profile=self.profile_summary
+            )
         else:
-            return build_system_prompt_deep(self.compiled_summary, patient_profile=self.profile_summary)
+            return build_system_prompt_deep(
+                self.compiled_summary, patient_profile=self.profile_summary
+            )
 
     async def cleanup(self) -> None:
         """Close all services."""
@@ -219,14 +235,14 @@ async def _prepare_chat_context(
     conversation_id = request.conversation_id or uuid.uuid4()
 
     # Validate patient exists FIRST (before initializing expensive services)
-    stmt = select(FhirResource).where(
+    stmt = select(FhirResource.data).where(
         FhirResource.id == request.patient_id,
         FhirResource.resource_type == "Patient",
     )
     result = await db.execute(stmt)
-    patient_resource = result.scalar_one_or_none()
+    patient_data = result.scalar_one_or_none()
 
-    if patient_resource is None:
+    if patient_data is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Patient not found",
@@ -241,11 +257,13 @@ async def _prepare_chat_context(
     summary_source = "cached"
     if compiled_summary is None:
         summary_source = "compiled"
-        logger.info("No cached summary for patient %s, compiling on-demand", request.patient_id)
+        logger.info(
+            "No cached summary for patient %s, compiling on-demand", request.patient_id
+        )
         compiled_summary = await compile_and_store(request.patient_id, graph, db)
 
     # Extract patient profile summary if available
-    profile = get_patient_profile(patient_resource.data)
+    profile = get_patient_profile(patient_data)
     profile_summary = _format_profile_summary(profile) if profile else None
 
     # Classify query and choose prompt mode
@@ -253,21 +271,29 @@ async def _prepare_chat_context(
     query_profile = await classify_query(request.message, has_history=has_history)
 
     if query_profile.system_prompt_mode == "lightning":
-        system_prompt = build_system_prompt_lightning(compiled_summary, patient_profile=profile_summary)
+        system_prompt = build_system_prompt_lightning(
+            compiled_summary, patient_profile=profile_summary
+        )
     elif query_profile.system_prompt_mode == "quick":
-        system_prompt = build_system_prompt_quick(compiled_summary, patient_profile=profile_summary)
+        system_prompt = build_system_prompt_quick(
+            compiled_summary, patient_profile=profile_summary
+        )
     else:
-        system_prompt = build_system_prompt_deep(compiled_summary, patient_profile=profile_summary)
+        system_prompt = build_system_prompt_deep(
+            compiled_summary, patient_profile=profile_summary
+        )
 
     elapsed_ms = (time.perf_counter() - t0) * 1000
     logger.info(
         "Chat context ready: patient=%s, summary=%s, tier=%s, model=%s, prompt_mode=%s, "
         "prompt=%d chars (~%d tokens), history=%d msgs, prep=%.0fms",
-        request.patient_id, summary_source,
+        request.patient_id,
+        summary_source,
         query_profile.tier.value,
         query_profile.model,
         query_profile.system_prompt_mode,
-        len(system_prompt), len(system_prompt) // 4,
+        len(system_prompt),
+        len(system_prompt) // 4,
         len(request.conversation_history) if request.conversation_history else 0,
         elapsed_ms,
     )
@@ -314,7 +340,9 @@ async def _persist_message(
             session = result.scalar_one_or_none()
 
             if session is None:
-                logger.warning("Session %s not found for %s message persistence", session_id, role)
+                logger.warning(
+                    "Session %s not found for %s message persistence", session_id, role
+                )
                 return
 
             messages = list(session.messages)
@@ -463,7 +491,9 @@ async def chat(
 
         # Persist assistant message when done
         if request.session_id:
-            await _persist_message(request.session_id, "assistant", agent_response.narrative)
+            await _persist_message(
+                request.session_id, "assistant", agent_response.narrative
+            )
 
         return ChatResponse(
             conversation_id=chat_ctx.conversation_id,
@@ -553,7 +583,9 @@ async def chat_stream(
         async def _inject_tables_and_emit(raw_json: str) -> str:
             """Collect deterministic tables and visualizations, inject into response, emit done."""
             tables = await _collect_tables(chat_ctx, db, request.patient_id)
-            visualizations = await _collect_visualizations(chat_ctx, db, request.patient_id)
+            visualizations = await _collect_visualizations(
+                chat_ctx, db, request.patient_id
+            )
             if tables or visualizations:
                 response_dict = json.loads(raw_json)
                 if tables:
@@ -572,11 +604,13 @@ async def chat_stream(
             if chat_ctx.query_profile.table_hint:
                 table = await build_table_for_type(
                     chat_ctx.query_profile.table_hint,
-                    patient_id=request.patient_id, db=db,
+                    patient_id=request.patient_id,
+                    db=db,
                 )
                 if table:
                     follow_ups = _TABLE_FOLLOW_UPS.get(
-                        chat_ctx.query_profile.table_hint, [],
+                        chat_ctx.query_profile.table_hint,
+                        [],
                     )
                     canned = {
                         "narrative": table.get("title", "Results"),
@@ -605,7 +639,10 @@ async def chat_stream(
                         chat_ctx.query_profile.chart_hint.get("loinc_codes", ["chart"])
                     )
                     follow_ups = _CHART_FOLLOW_UPS.get(
-                        "bp_trend" if "85354-9" in chat_ctx.query_profile.chart_hint.get("loinc_codes", []) else hint_key,
+                        "bp_trend"
+                        if "85354-9"
+                        in chat_ctx.query_profile.chart_hint.get("loinc_codes", [])
+                        else hint_key,
                         [],
                     )
                     canned = {
@@ -651,7 +688,9 @@ async def chat_stream(
                             )
                         )
                         if raw_done:
-                            final_response_json = await _inject_tables_and_emit(raw_done)
+                            final_response_json = await _inject_tables_and_emit(
+                                raw_done
+                            )
                     else:
                         # Lightning hit — inject tables and emit
                         raw_json = lightning_response.model_dump_json()
@@ -675,13 +714,19 @@ async def chat_stream(
 
         except ValueError as e:
             logger.error("ValueError in chat stream: %s", e, exc_info=True)
-            await event_queue.put(("error", json.dumps({"detail": "Invalid request parameters."})))
+            await event_queue.put(
+                ("error", json.dumps({"detail": "Invalid request parameters."}))
+            )
         except RuntimeError:
             logger.error("Agent response parsing failed in stream", exc_info=True)
-            await event_queue.put(("error", json.dumps({"detail": "Failed to generate response."})))
+            await event_queue.put(
+                ("error", json.dumps({"detail": "Failed to generate response."}))
+            )
         except Exception:
             logger.exception("Unexpected error during chat stream")
-            await event_queue.put(("error", json.dumps({"detail": "An error occurred during streaming."})))
+            await event_queue.put(
+                ("error", json.dumps({"detail": "An error occurred during streaming."}))
+            )
         finally:
             # Signal end of stream
             await event_queue.put(None)
@@ -707,7 +752,9 @@ async def chat_stream(
             await asyncio.wait_for(generate_and_persist(), timeout=600.0)
         except asyncio.TimeoutError:
             logger.error("Background generation task timed out after 10 minutes")
-            await event_queue.put(("error", json.dumps({"detail": "Request timed out."})))
+            await event_queue.put(
+                ("error", json.dumps({"detail": "Request timed out."}))
+            )
             await event_queue.put(None)
             await chat_ctx.cleanup()
 
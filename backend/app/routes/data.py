@@ -1,18 +1,29 @@
 """Patient data API routes for labs, medications, conditions, and timeline."""
 
 import uuid
-from datetime import date
+from datetime import date, datetime, time, timedelta, timezone
 from typing import Annotated, Any, Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import ColumnElement, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
 from app.auth import verify_bearer_token
 from app.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from app.database import get_db
-from app.models import FhirResource
+from app.models import (
+    ConditionProjection,
+    FhirResource,
+    MedicationRequestProjection,
+    ObservationProjection,
+)
+
+# Columns the list endpoints return; other (deferred or satellite) data stays unread
+_ITEM_COLUMNS = load_only(
+    FhirResource.fhir_id, FhirResource.resource_type, FhirResource.data
+)
 
 router = APIRouter(prefix="/patients", tags=["patient-data"])
 
@@ -232,26 +243,55 @@ def _get_clinical_status(resource_data: dict) -> str | None:
     return None
 
 
-def _sort_by_date_desc(resources: list[FhirResource]) -> list[FhirResource]:
-    """Sort resources by date in descending order (most recent first).
-
-    Caches date extraction to avoid redundant JSONB parsing.
+async def _page_by_projection(
+    db: AsyncSession,
+    projection: type,
+    conditions: list[ColumnElement[bool]],
+    date_column: ColumnElement[Any],
+    *,
+    skip: int,
+    limit: int,
+) -> PaginatedFhirResponse:
+    """Filter, order and paginate resources on a projection table's columns.
 
     Args:
-        resources: List of FhirResource objects.
+        db: Database session.
+        projection: Projection model class (e.g. ConditionProjection).
+        conditions: WHERE clauses over the projection's columns.
+        date_column: Date to order by, most recent first (undated last).
+        skip: Number of records to skip for pagination.
+        limit: Maximum number of records to return.
 
     Returns:
-        Sorted list of resources.
+        Paginated list of the matching FHIR resources.
     """
-    # Cache dates to avoid repeated extraction
-    resources_with_dates = [
-        (r, _extract_date_from_resource(r.data)) for r in resources
-    ]
-    resources_with_dates.sort(
-        key=lambda x: x[1] if x[1] else date.min,
-        reverse=True,
+    count_stmt = select(func.count()).select_from(projection).where(*conditions)
+    total = (await db.execute(count_stmt)).scalar_one()
+
+    stmt = (
+        select(FhirResource)
+        .join(projection, projection.fhir_resource_id == FhirResource.id)
+        .where(*conditions)
+        .order_by(date_column.desc().nulls_last(), FhirResource.id)
+        .offset(skip)
+        .limit(limit)
+        .options(_ITEM_COLUMNS)
+    )
+    result = await db.execute(stmt)
+
+    return PaginatedFhirResponse(
+        items=[
+            FhirResourceItem(
+                id=str(resource.id),
+                fhir_id=resource.fhir_id,
+                data=resource.data,
+            )
+            for resource in result.scalars().all()
+        ],
+        total=total,
+        skip=skip,
+        limit=limit,
     )
-    return [r for r, _ in resources_with_dates]
 
 
 # =============================================================================
@@ -293,53 +333,24 @@ async def get_patient_labs(
     if codes:
         loinc_codes = [c.strip() for c in codes.split(",") if c.strip()]
 
-    # Query all Observations for this patient
-    stmt = select(FhirResource).where(
-        FhirResource.patient_id == patient_id,
-        FhirResource.resource_type == "Observation",
-    )
-    result = await db.execute(stmt)
-    observations = result.scalars().all()
-
-    # Filter in Python (JSONB queries can be complex)
-    filtered = []
-    for obs in observations:
-        data = obs.data
-
-        # Filter by LOINC codes if provided
-        if loinc_codes:
-            obs_loinc_codes = _get_loinc_codes_from_resource(data)
-            if not any(code in loinc_codes for code in obs_loinc_codes):
-                continue
-
-        # Filter by date range
-        obs_date = _extract_date_from_resource(data)
-        if obs_date:
-            if from_date and obs_date < from_date:
-                continue
-            if to_date and obs_date > to_date:
-                continue
-
-        filtered.append(obs)
-
-    # Sort by date (most recent first) with cached date extraction
-    sorted_resources = _sort_by_date_desc(filtered)
-
-    total = len(sorted_resources)
-    paginated = sorted_resources[skip : skip + limit]
+    # Filter, order and paginate on observation_projections' indexed columns
+    proj = ObservationProjection
+    conditions = [proj.patient_id == patient_id]
+    if loinc_codes:
+        conditions.append(proj.loinc.in_(loinc_codes))
+    # Date bounds are inclusive whole (UTC) days; undated observations are
+    # kept, as they cannot be placed outside the range
+    if from_date:
+        start = datetime.combine(from_date, time.min, tzinfo=timezone.utc)
+        conditions.append(or_(proj.effective_at.is_(None), proj.effective_at >= start))
+    if to_date:
+        end = datetime.combine(
+            to_date + timedelta(days=1), time.min, tzinfo=timezone.utc
+        )
+        conditions.append(or_(proj.effective_at.is_(None), proj.effective_at < end))
 
-    return PaginatedFhirResponse(
-        items=[
-            FhirResourceItem(
-                id=str(obs.id),
-                fhir_id=obs.fhir_id,
-                data=obs.data,
-            )
-            for obs in paginated
-        ],
-        total=total,
-        skip=skip,
-        limit=limit,
+    return await _page_by_projection(
+        db, proj, conditions, proj.effective_at, skip=skip, limit=limit
     )
 
 
@@ -364,44 +375,14 @@ async def get_patient_medications(
     Returns:
         Paginated list of MedicationRequest FHIR resources.
     """
-    # Query MedicationRequest resources for this patient
-    stmt = select(FhirResource).where(
-        FhirResource.patient_id == patient_id,
-        FhirResource.resource_type == "MedicationRequest",
-    )
-    result = await db.execute(stmt)
-    medications = result.scalars().all()
-
-    # Filter by status if needed
-    filtered = []
-    for med in medications:
-        data = med.data
-
-        if status == "active":
-            med_status = _get_clinical_status(data)
-            if med_status not in ACTIVE_MEDICATION_STATUSES:
-                continue
-
-        filtered.append(med)
-
-    # Sort by authoredOn date (most recent first)
-    sorted_resources = _sort_by_date_desc(filtered)
-
-    total = len(sorted_resources)
-    paginated = sorted_resources[skip : skip + limit]
-
-    return PaginatedFhirResponse(
-        items=[
-            FhirResourceItem(
-                id=str(med.id),
-                fhir_id=med.fhir_id,
-                data=med.data,
-            )
-            for med in paginated
-        ],
-        total=total,
-        skip=skip,
-        limit=limit,
+    proj = MedicationRequestProjection
+    conditions = [proj.patient_id == patient_id]
+    if status == "active":
+        conditions.append(proj.status.in_(ACTIVE_MEDICATION_STATUSES))
+
+    # Most recently authored first
+    return await _page_by_projection(
+        db, proj, conditions, proj.authored_at, skip=skip, limit=limit
     )
 
 
@@ -426,42 +407,17 @@ async def get_patient_conditions(
     Returns:
         Paginated list of Condition FHIR resources.
     """
-    # Query Condition resources for this patient
-    stmt = select(FhirResource).where(
-        FhirResource.patient_id == patient_id,
-        FhirResource.resource_type == "Condition",
-    )
-    result = await db.execute(stmt)
-    conditions = result.scalars().all()
-
-    # Filter by status if needed
-    filtered = []
-    for cond in conditions:
-        data = cond.data
-
-        if status == "active":
-            cond_status = _get_clinical_status(data)
-            if cond_status not in ACTIVE_CONDITION_STATUSES:
-                continue
-
-        filtered.append(cond)
-
-    # Sort by onset date (most recent first)
-    sorted_resources = _sort_by_date_desc(filtered)
-
-    total = len(sorted_resources)
-    paginated = sorted_resources[skip : skip + limit]
-
-    return PaginatedFhirResponse(
-        items=[
-            FhirResourceItem(
-                id=str(cond.id),
-                fhir_id=cond.fhir_id,
-                data=cond.data,
-            )
-            for cond in paginated
-        ],
-        total=total,
+    proj = ConditionProjection
+    conditions = [proj.patient_id == patient_id]
+    if status == "active":
+        conditions.append(proj.clinical_status.in_(ACTIVE_CONDITION_STATUSES))
+
+    # Most recent onset first (recordedDate when there is no onset)
+    return await _page_by_projection(
+        db,
+        proj,
+        conditions,
+        func.coalesce(proj.onset_at, proj.recorded_at),
         skip=skip,
         limit=limit,
     )
@@ -513,9 +469,13 @@ async def get_patient_timeline(
             )
 
     # Query all requested resource types for this patient
-    stmt = select(FhirResource).where(
-        FhirResource.patient_id == patient_id,
-        FhirResource.resource_type.in_(requested_types),
+    stmt = (
+        select(FhirResource)
+        .where(
+            FhirResource.patient_id == patient_id,
+            FhirResource.resource_type.in_(requested_types),
+        )
+        .options(_ITEM_COLUMNS)
     )
     result = await db.execute(stmt)
     resources = result.scalars().all()
@@ -1,16 +1,35 @@
 """FHIR API routes for loading bundles."""
 
+import asyncio
 import uuid
+from datetime import datetime
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import verify_bearer_token
-from app.database import get_db
-from app.services.fhir_loader import load_bundle as load_bundle_service
+from app.config import settings
+from app.database import async_session_maker, get_db
+from app.services.bundle_stream import aiter_bundle_entries
+from app.services.fhir_loader import (
+    DEFAULT_IMPORT_WORKERS,
+    BundleLoadResult,
+    NdjsonSpool,
+    get_preprocess_executor,
+    import_ndjson,
+    sync_bundle,
+)
+from app.services.fhir_loader import (
+    load_bundle_stream as load_bundle_stream_service,
+)
 from app.services.graph import KnowledgeGraph
+from app.services.job_queue import (
+    get_patient_jobs,
+    notify_job_workers,
+    summarize_job_status,
+)
 
 router = APIRouter(prefix="/fhir", tags=["fhir"])
 
@@ -21,6 +40,14 @@ class BundleLoadResponse(BaseModel):
     message: str
     resources_loaded: int
     patient_id: uuid.UUID | None = None
+    # Change detection: only inserted/updated resources are re-graphed and re-embedded
+    resources_inserted: int = 0
+    resources_updated: int = 0
+    resources_unchanged: int = 0
+    resources_embedded: int = 0
+    # Graph build, embeddings and compile run as background jobs; poll
+    # GET /fhir/jobs/{patient_id} for their status
+    jobs_enqueued: bool = False
 
 
 @router.post("/load-bundle", response_model=BundleLoadResponse)
@@ -32,7 +59,8 @@ async def load_bundle(
     """Load a FHIR Bundle into PostgreSQL and Neo4j.
 
     Uses the fhir_loader service to store resources in PostgreSQL (source of truth)
-    and build the knowledge graph in Neo4j (derived view).
+    and build the knowledge graph in Neo4j (derived view). Re-loading a bundle
+    only processes resources whose content changed since the previous load.
 
     Args:
         bundle: A FHIR Bundle resource.
@@ -73,7 +101,55 @@ async def load_bundle(
     # Delegate to service layer (handles PostgreSQL and Neo4j)
     graph = KnowledgeGraph()
     try:
-        patient_id = await load_bundle_service(db, graph, bundle)
+        # Preprocessing runs in the shared executor so large bundles don't
+        # block the event loop for concurrent requests
+        result = await sync_bundle(
+            db,
+            graph,
+            bundle,
+            executor=get_preprocess_executor(),
+            defer=settings.ingest_jobs_enabled,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    finally:
+        await graph.close()
+
+    await _commit_and_notify(db, result)
+    return _load_response(result, resource_count)
+
+
+@router.post("/load-bundle/stream", response_model=BundleLoadResponse)
+async def load_bundle_stream(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    _user_id: str = Depends(verify_bearer_token),
+) -> BundleLoadResponse:
+    """Load a large FHIR Bundle by streaming the request body.
+
+    Unlike /load-bundle, the body is never parsed into one dict: entries are
+    decoded incrementally and loaded in fixed-size batches, so memory stays
+    bounded for multi-hundred-MB bulk-export bundles. Send the raw Bundle JSON
+    as the request body.
+
+    Returns:
+        Summary of loaded resources.
+
+    Raises:
+        HTTPException: 400 if the body is not a valid bundle.
+    """
+    graph = KnowledgeGraph()
+    try:
+        result = await load_bundle_stream_service(
+            db,
+            graph,
+            aiter_bundle_entries(request.stream()),
+            executor=get_preprocess_executor(),
+            defer=settings.ingest_jobs_enabled,
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -82,8 +158,164 @@ async def load_bundle(
     finally:
         await graph.close()
 
+    await _commit_and_notify(db, result)
+    return _load_response(result, result.inserted + result.updated + result.unchanged)
+
+
+class NdjsonImportResponse(BaseModel):
+    """Response from importing FHIR Bulk Data NDJSON."""
+
+    message: str
+    patients_loaded: int
+    patients_failed: int
+    resources_loaded: int
+    resources_inserted: int
+    resources_updated: int
+    resources_unchanged: int
+    resources_skipped: int
+    lines_invalid: int
+
+
+@router.post("/import-ndjson", response_model=NdjsonImportResponse)
+async def import_ndjson_body(
+    request: Request,
+    workers: int = Query(default=DEFAULT_IMPORT_WORKERS, ge=1, le=32),
+    _user_id: str = Depends(verify_bearer_token),
+) -> NdjsonImportResponse:
+    """Import FHIR Bulk Data ($export) NDJSON from the request body.
+
+    The body is one or more NDJSON files concatenated (any resource types,
+    one resource per line). Lines are spooled to disk grouped by patient as
+    they arrive, then patients are loaded in parallel, each in its own
+    transaction.
+
+    Args:
+        workers: Patients loaded concurrently.
+
+    Returns:
+        Import counts.
+
+    Raises:
+        HTTPException: 400 if the body contains no patient-linked resources.
+    """
+    with NdjsonSpool() as spool:
+        async for chunk in request.stream():
+            await asyncio.to_thread(spool.feed, chunk)
+        spool.finish()
+
+        if spool.spooled == 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No resources with a patient reference found",
+            )
+
+        graph = KnowledgeGraph()
+        try:
+            result = await import_ndjson(
+                async_session_maker,
+                graph,
+                spool,
+                workers=workers,
+                executor=get_preprocess_executor(),
+                defer=settings.ingest_jobs_enabled,
+            )
+        finally:
+            await graph.close()
+
+    if settings.ingest_jobs_enabled:
+        notify_job_workers()
+
+    return NdjsonImportResponse(
+        message="NDJSON import complete",
+        patients_loaded=result.patients_loaded,
+        patients_failed=result.patients_failed,
+        resources_loaded=result.resources_loaded,
+        resources_inserted=result.resources_inserted,
+        resources_updated=result.resources_updated,
+        resources_unchanged=result.resources_unchanged,
+        resources_skipped=result.resources_skipped,
+        lines_invalid=result.lines_invalid,
+    )
+
+
+def _load_response(result: BundleLoadResult, resource_count: int) -> BundleLoadResponse:
+    """Build the load response from a loader result."""
     return BundleLoadResponse(
         message="Bundle loaded successfully",
         resources_loaded=resource_count,
+        patient_id=result.patient_id,
+        resources_inserted=result.inserted,
+        resources_updated=result.updated,
+        resources_unchanged=result.unchanged,
+        resources_embedded=result.embedded,
+        jobs_enqueued=result.deferred,
+    )
+
+
+async def _commit_and_notify(db: AsyncSession, result: BundleLoadResult) -> None:
+    """Commit a deferred load's rows and jobs, then wake the job workers.
+
+    The commit is explicit (rather than left to get_db) so the jobs are
+    visible to the workers before they are woken.
+    """
+    if result.deferred:
+        await db.commit()
+        notify_job_workers()
+
+
+class IngestJobResponse(BaseModel):
+    """Status of one post-ingest job."""
+
+    id: uuid.UUID
+    kind: str
+    status: str
+    attempts: int
+    max_attempts: int
+    last_error: str | None = None
+    created_at: datetime
+    run_after: datetime
+    completed_at: datetime | None = None
+
+
+class PatientJobsResponse(BaseModel):
+    """Post-ingest job status for one patient."""
+
+    patient_id: uuid.UUID
+    # Latest job of each kind collapsed: failed, running, pending, succeeded or none
+    status: str
+    jobs: list[IngestJobResponse]
+
+
+@router.get("/jobs/{patient_id}", response_model=PatientJobsResponse)
+async def get_ingest_jobs(
+    patient_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    _user_id: str = Depends(verify_bearer_token),
+) -> PatientJobsResponse:
+    """Get the status of a patient's post-ingest jobs (newest first).
+
+    Args:
+        patient_id: Canonical patient UUID returned by a load.
+
+    Returns:
+        Overall status plus each job's kind, status, attempts and last error.
+    """
+    jobs = await get_patient_jobs(db, patient_id)
+    return PatientJobsResponse(
         patient_id=patient_id,
+        status=summarize_job_status(jobs),
+        jobs=[
+            IngestJobResponse(
+                id=job.id,
+                kind=job.kind.value,
+                status=job.status.value,
+                attempts=job.attempts,
+                max_attempts=job.max_attempts,
+                last_error=job.last_error,
+                created_at=job.created_at,
+                run_after=job.run_after,
+                completed_at=job.completed_at,
+            )
+            for job in jobs
+        ],
     )
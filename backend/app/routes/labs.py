@@ -10,12 +10,12 @@ import uuid
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import DateTime, func, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import verify_bearer_token
 from app.database import get_db
-from app.models import FhirResource
+from app.models import FhirResource, ObservationProjection
 
 router = APIRouter(prefix="/patients", tags=["labs"])
 
@@ -33,7 +33,9 @@ def _extract_observation_fields(obs: dict[str, Any]) -> dict[str, Any] | None:
     code_obj = obs.get("code", {})
     codings = code_obj.get("coding", [])
     test_name = (
-        codings[0].get("display", "Unknown") if codings else code_obj.get("text", "Unknown")
+        codings[0].get("display", "Unknown")
+        if codings
+        else code_obj.get("text", "Unknown")
     )
     loinc_code = codings[0].get("code") if codings else None
 
@@ -57,7 +59,9 @@ def _extract_observation_fields(obs: dict[str, Any]) -> dict[str, Any] | None:
     interpretation = None
     interp_list = obs.get("interpretation", [])
     if interp_list and isinstance(interp_list, list):
-        interp_codings = interp_list[0].get("coding", []) if isinstance(interp_list[0], dict) else []
+        interp_codings = (
+            interp_list[0].get("coding", []) if isinstance(interp_list[0], dict) else []
+        )
         if interp_codings:
             interpretation = interp_codings[0].get("code")
 
@@ -108,19 +112,16 @@ async def get_patient_labs(
         )
 
     # Fetch all laboratory observations, newest first
-    category_expr = FhirResource.data["category"][0]["coding"][0]["code"].as_string()
-    loinc_expr = FhirResource.data["code"]["coding"][0]["code"].as_string()
-    effective_dt = FhirResource.data["effectiveDateTime"].as_string()
-
+    proj = ObservationProjection
     stmt = (
-        select(FhirResource.data)
+        select(FhirResource.data, proj.loinc)
+        .join(FhirResource, FhirResource.id == proj.fhir_resource_id)
         .where(
-            FhirResource.patient_id == patient_id,
-            FhirResource.resource_type == "Observation",
-            category_expr == "laboratory",
-            loinc_expr.isnot(None),
+            proj.patient_id == patient_id,
+            proj.category == "laboratory",
+            proj.loinc.isnot(None),
         )
-        .order_by(func.cast(effective_dt, DateTime).desc())
+        .order_by(proj.effective_at.desc().nulls_last())
     )
 
     result = await db.execute(stmt)
@@ -129,10 +130,7 @@ async def get_patient_labs(
     # Group by LOINC code (maintains desc order within each group)
     by_loinc: dict[str, list[dict[str, Any]]] = {}
     for row in rows:
-        obs = row.data
-        loinc = obs.get("code", {}).get("coding", [{}])[0].get("code")
-        if loinc:
-            by_loinc.setdefault(loinc, []).append(obs)
+        by_loinc.setdefault(row.loinc, []).append(row.data)
 
     # Build response entries
     entries: list[dict[str, Any]] = []
@@ -153,10 +151,12 @@ async def get_patient_labs(
 
         fields["history"] = history
 
-        entries.append({
-            "type": "standalone",
-            "result": fields,
-        })
+        entries.append(
+            {
+                "type": "standalone",
+                "result": fields,
+            }
+        )
 
     # Stable sort by test name
     entries.sort(key=lambda e: e["result"]["test"])
@@ -3,7 +3,7 @@
 import uuid
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import verify_bearer_token
@@ -34,19 +34,18 @@ async def list_patients(
     limit = min(limit, MAX_PAGE_SIZE)
 
     # Get total count for pagination metadata
-    count_stmt = select(FhirResource).where(FhirResource.resource_type == "Patient")
-    count_result = await db.execute(count_stmt)
-    total = len(count_result.scalars().all())
+    count_stmt = select(func.count()).where(FhirResource.resource_type == "Patient")
+    total = (await db.execute(count_stmt)).scalar_one()
 
-    # Get paginated results
+    # Get paginated results (only the returned columns, never the summary)
     stmt = (
-        select(FhirResource)
+        select(FhirResource.id, FhirResource.fhir_id, FhirResource.data)
         .where(FhirResource.resource_type == "Patient")
         .offset(skip)
         .limit(limit)
     )
     result = await db.execute(stmt)
-    patients = result.scalars().all()
+    patients = result.all()
 
     return {
         "items": [
@@ -80,12 +79,12 @@ async def get_patient(
     Raises:
         HTTPException: 404 if patient not found.
     """
-    stmt = select(FhirResource).where(
+    stmt = select(FhirResource.id, FhirResource.fhir_id, FhirResource.data).where(
         FhirResource.id == patient_id,
         FhirResource.resource_type == "Patient",
     )
     result = await db.execute(stmt)
-    patient = result.scalar_one_or_none()
+    patient = result.one_or_none()
 
     if patient is None:
         raise HTTPException(
@@ -0,0 +1,188 @@
+"""Rebuild projection tables from the canonical FHIR JSON.
+
+Bundle loading and ORM writes keep projections in sync as resources are
+written. Resources stored before a projection existed (or before its
+extractors changed) are projected here: each registered resource type's
+rows are split into id batches that a pool of workers, each with its own
+session, extracts and upserts concurrently.
+
+Usage:
+    uv run python -m app.scripts.backfill_projections
+    uv run python -m app.scripts.backfill_projections --types Condition Encounter
+    uv run python -m app.scripts.backfill_projections --missing-only --workers 8
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import select
+
+from app.database import async_session_maker, engine
+from app.models import FhirResource
+from app.projections.extractors import (
+    register_clinical_projections,
+    register_observation_projection,
+    register_task_projection,
+)
+from app.projections.registry import ProjectionRegistry
+from app.projections.sync import sync_projections
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_WORKERS = 4
+
+
+@dataclass
+class BackfillStats:
+    """Projection rows written per resource type."""
+
+    resource_type: str
+    resources: int = 0
+    batches: int = 0
+
+
+async def _resource_ids(resource_type: str, missing_only: bool) -> list[uuid.UUID]:
+    """Ids of the resources to project, in primary-key order."""
+    stmt = select(FhirResource.id).where(FhirResource.resource_type == resource_type)
+    if missing_only:
+        model = ProjectionRegistry.get(resource_type).model_class
+        stmt = stmt.outerjoin(model, model.fhir_resource_id == FhirResource.id).where(
+            model.fhir_resource_id.is_(None)
+        )
+    async with async_session_maker() as session:
+        result = await session.execute(stmt.order_by(FhirResource.id))
+        return list(result.scalars().all())
+
+
+async def _project_batch(resource_ids: list[uuid.UUID]) -> int:
+    """Extract and upsert the projection rows of one id batch."""
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(
+                FhirResource.id,
+                FhirResource.patient_id,
+                FhirResource.resource_type,
+                FhirResource.data,
+            ).where(FhirResource.id.in_(resource_ids))
+        )
+        written = await sync_projections(session, result.tuples().all())
+        await session.commit()
+    return written
+
+
+async def backfill_type(
+    resource_type: str,
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = DEFAULT_WORKERS,
+    missing_only: bool = False,
+) -> BackfillStats:
+    """Project every stored resource of one type, batches in parallel.
+
+    Args:
+        resource_type: A resource type with a registered projection.
+        batch_size: Resources extracted and upserted per transaction.
+        workers: Batches in flight at once.
+        missing_only: Only project resources that have no projection row.
+
+    Returns:
+        Rows written and batches run.
+    """
+    stats = BackfillStats(resource_type)
+    resource_ids = await _resource_ids(resource_type, missing_only)
+
+    queue: asyncio.Queue[list[uuid.UUID]] = asyncio.Queue()
+    for i in range(0, len(resource_ids), batch_size):
+        queue.put_nowait(resource_ids[i : i + batch_size])
+
+    async def worker() -> None:
+        while not queue.empty():
+            batch = queue.get_nowait()
+            stats.resources += await _project_batch(batch)
+            stats.batches += 1
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return stats
+
+
+async def run_backfill(
+    resource_types: list[str],
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = DEFAULT_WORKERS,
+    missing_only: bool = False,
+) -> list[BackfillStats]:
+    """Backfill the projections of resource_types, one type at a time."""
+    results = []
+    try:
+        for resource_type in resource_types:
+            started = time.perf_counter()
+            stats = await backfill_type(
+                resource_type,
+                batch_size=batch_size,
+                workers=workers,
+                missing_only=missing_only,
+            )
+            elapsed = time.perf_counter() - started
+            print(
+                f"  {resource_type}: {stats.resources} rows in "
+                f"{stats.batches} batches ({elapsed:.1f}s)"
+            )
+            results.append(stats)
+    finally:
+        await engine.dispose()
+    return results
+
+
+def main() -> None:
+    """Main entry point for the projection backfill script."""
+    register_observation_projection()
+    register_clinical_projections()
+    register_task_projection()
+    registered = sorted(ProjectionRegistry.all_configs())
+
+    parser = argparse.ArgumentParser(description="Rebuild FHIR projection tables")
+    parser.add_argument(
+        "--types",
+        nargs="+",
+        choices=registered,
+        default=registered,
+        metavar="TYPE",
+        help=f"Resource types to project (default: all of {', '.join(registered)})",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Resources per batch (default {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Batches in flight at once (default {DEFAULT_WORKERS})",
+    )
+    parser.add_argument(
+        "--missing-only",
+        action="store_true",
+        help="Only project resources that have no projection row yet",
+    )
+    args = parser.parse_args()
+    if args.workers < 1 or args.batch_size < 1:
+        parser.error("--workers and --batch-size must be positive")
+
+    print("Backfilling projections")
+    asyncio.run(
+        run_backfill(
+            args.types,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            missing_only=args.missing_only,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
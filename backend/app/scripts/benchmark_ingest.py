@@ -0,0 +1,152 @@
+"""Benchmark FhirResource ingest: per-object ORM writes vs bulk upsert.
+
+Compares the previous ORM loader (OR-predicate existence lookup, one
+FhirResource object per resource, unit-of-work flush) against
+write_bundle_resources (multi-row INSERT ... ON CONFLICT ... RETURNING).
+Only the PostgreSQL write step is timed — no graph, embeddings or compile.
+
+Usage:
+    uv run python -m app.scripts.benchmark_ingest
+    uv run python -m app.scripts.benchmark_ingest path/to/bundle.json --repeat 5
+
+Every run happens in a transaction that is rolled back, so the database is
+left unchanged. Each run measures a cold insert (new patient) followed by a
+warm re-upsert of the same bundle.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session_maker, engine
+from app.models import FhirResource
+from app.services.fhir_loader import prepare_bundle_resources, write_bundle_resources
+
+Writer = Callable[[AsyncSession, list[dict[str, Any]]], Awaitable[Any]]
+
+
+async def _orm_write(db: AsyncSession, resources: list[dict[str, Any]]) -> None:
+    """Baseline: the per-object ORM write path load_bundle used previously."""
+    patient_fhir_id = next(
+        r.get("id", "") for r in resources if r.get("resourceType") == "Patient"
+    )
+    result = await db.execute(
+        select(FhirResource).where(
+            FhirResource.resource_type == "Patient",
+            FhirResource.fhir_id == patient_fhir_id,
+        )
+    )
+    existing_patient = result.scalars().first()
+    patient_id = existing_patient.id if existing_patient else uuid.uuid4()
+
+    conditions = [
+        and_(
+            FhirResource.fhir_id == r.get("id", ""),
+            FhirResource.resource_type == r.get("resourceType", ""),
+        )
+        for r in resources
+    ]
+    result = await db.execute(select(FhirResource).where(or_(*conditions)))
+    existing_by_key = {(r.fhir_id, r.resource_type): r for r in result.scalars()}
+
+    for resource in resources:
+        key = (resource.get("id", ""), resource.get("resourceType", ""))
+        existing = existing_by_key.get(key)
+        if existing:
+            existing.data = resource
+            existing.patient_id = patient_id
+        else:
+            db.add(
+                FhirResource(
+                    id=patient_id if key[1] == "Patient" else uuid.uuid4(),
+                    fhir_id=key[0],
+                    resource_type=key[1],
+                    patient_id=patient_id,
+                    data=resource,
+                )
+            )
+    await db.flush()
+
+
+async def _time_writer(
+    writer: Writer, resources: list[dict[str, Any]], repeat: int
+) -> tuple[list[float], list[float]]:
+    """Return (cold, warm) timings in seconds for each run."""
+    cold: list[float] = []
+    warm: list[float] = []
+    for _ in range(repeat):
+        async with async_session_maker() as session:
+            started = time.perf_counter()
+            await writer(session, resources)
+            cold.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await writer(session, resources)
+            warm.append(time.perf_counter() - started)
+
+            await session.rollback()
+    return cold, warm
+
+
+async def run_benchmark(bundle_path: Path, repeat: int) -> None:
+    """Time both writers against one bundle and print a comparison."""
+    with open(bundle_path) as f:
+        bundle = json.load(f)
+    resources = prepare_bundle_resources(bundle)
+    print(f"Bundle: {bundle_path.name} ({len(resources)} resources), {repeat} runs\n")
+
+    writers: dict[str, Writer] = {
+        "orm": _orm_write,
+        "bulk_upsert": write_bundle_resources,
+    }
+    medians: dict[str, tuple[float, float]] = {}
+    try:
+        for name, writer in writers.items():
+            cold, warm = await _time_writer(writer, resources, repeat)
+            medians[name] = (statistics.median(cold), statistics.median(warm))
+    finally:
+        await engine.dispose()
+
+    print(f"  {'writer':<12} {'cold (s)':>10} {'warm (s)':>10} {'res/s cold':>12}")
+    for name, (cold_s, warm_s) in medians.items():
+        print(
+            f"  {name:<12} {cold_s:>10.3f} {warm_s:>10.3f} "
+            f"{len(resources) / cold_s:>12.0f}"
+        )
+
+    orm_cold, orm_warm = medians["orm"]
+    bulk_cold, bulk_warm = medians["bulk_upsert"]
+    print(
+        f"\n  speedup: {orm_cold / bulk_cold:.1f}x cold, "
+        f"{orm_warm / bulk_warm:.1f}x warm"
+    )
+
+
+def main() -> None:
+    """Main entry point for the ingest benchmark."""
+    repo_root = Path(__file__).parent.parent.parent.parent
+    default_bundle = repo_root / "fixtures" / "synthea" / "patient_bundle_2.json"
+
+    parser = argparse.ArgumentParser(description="Benchmark FHIR ingest writers")
+    parser.add_argument("bundle", nargs="?", type=Path, default=default_bundle)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if not args.bundle.exists():
+        print(f"Bundle not found: {args.bundle}")
+        return
+
+    asyncio.run(run_benchmark(args.bundle, max(1, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""Benchmark query_patient_data latency on a large synthetic chart.
+
+Loads a synthetic chart (default 20,000 resources for one patient, plus
+other patients' rows for realistic table size) and times the Postgres side
+of the agent's query_patient_data tool:
+
+- legacy: the predicates _query_exact used before — embedding_text ILIKE
+  and a coalesce over four JSONB date paths — issued as raw SQL
+- indexed: _query_exact (effective_date column) and the lexical side of
+  HybridSearchService (full-text + pg_trgm substring match)
+
+Name searches are lexical only, so no embedding API is called.
+
+Usage:
+    uv run python -m app.scripts.benchmark_query_tool
+    uv run python -m app.scripts.benchmark_query_tool --resources 50000 --repeat 50
+
+Everything runs in a transaction that is rolled back, so the database is
+left unchanged.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import date, timedelta
+from typing import Any
+
+from sqlalchemy import and_, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session_maker, engine
+from app.models import FhirResource
+from app.services.agent_tools import _query_exact
+from app.services.hybrid_search import HybridQuery, HybridSearchService
+
+INSERT_BATCH_SIZE = 1000
+
+# (resource_type, date field, display names)
+_RESOURCE_SPECS: list[tuple[str, str, list[str]]] = [
+    (
+        "Observation",
+        "effectiveDateTime",
+        ["Hemoglobin A1c", "Glucose", "Creatinine", "Body weight", "Heart rate"],
+    ),
+    (
+        "Condition",
+        "onsetDateTime",
+        ["Hypertension", "Type 2 diabetes mellitus", "Chronic kidney disease"],
+    ),
+    ("MedicationRequest", "authoredOn", ["Lisinopril 10 MG", "Metformin 500 MG"]),
+    ("Encounter", "period", ["General examination", "Emergency room visit"]),
+    ("Procedure", "period", ["Renal ultrasound", "Colonoscopy"]),
+]
+
+Scenario = Callable[[AsyncSession, uuid.UUID], Awaitable[Any]]
+
+
+def _synthetic_rows(patient_id: uuid.UUID, count: int) -> list[dict[str, Any]]:
+    """Resource rows with embedding_text and a clinical date spread over 20 years."""
+    rng = random.Random(str(patient_id))
+    start = date(2005, 1, 1)
+    rows = []
+    for i in range(count):
+        resource_type, date_field, names = _RESOURCE_SPECS[i % len(_RESOURCE_SPECS)]
+        name = rng.choice(names)
+        when = (start + timedelta(days=rng.randrange(20 * 365))).isoformat()
+        data: dict[str, Any] = {"resourceType": resource_type, "id": f"r-{i}"}
+        if date_field == "period":
+            data["period"] = {"start": f"{when}T09:00:00Z"}
+        else:
+            data[date_field] = f"{when}T09:00:00Z"
+        rows.append(
+            {
+                "id": uuid.uuid4(),
+                "fhir_id": f"r-{i}",
+                "resource_type": resource_type,
+                "patient_id": patient_id,
+                "data": data,
+                "embedding_text": f"{resource_type}: {name}. Date: {when}",
+            }
+        )
+    return rows
+
+
+async def _load_chart(db: AsyncSession, patient_id: uuid.UUID, count: int) -> None:
+    """Insert the benchmark patient's chart plus background patients, then ANALYZE."""
+    patients = [patient_id] + [uuid.uuid4() for _ in range(4)]
+    table = FhirResource.__table__
+    for pid in patients:
+        rows = _synthetic_rows(pid, count)
+        for i in range(0, len(rows), INSERT_BATCH_SIZE):
+            await db.execute(pg_insert(table).values(rows[i : i + INSERT_BATCH_SIZE]))
+    await db.execute(text("ANALYZE fhir_resources"))
+
+
+async def _legacy_date_filter(db: AsyncSession, patient_id: uuid.UUID) -> Any:
+    clinical_date = func.coalesce(
+        FhirResource.data["effectiveDateTime"].astext,
+        FhirResource.data["onsetDateTime"].astext,
+        FhirResource.data["authoredOn"].astext,
+        FhirResource.data["period"]["start"].astext,
+    )
+    stmt = (
+        select(FhirResource.fhir_id, FhirResource.resource_type, FhirResource.data)
+        .where(
+            and_(
+                FhirResource.patient_id == patient_id,
+                FhirResource.resource_type == "Observation",
+                clinical_date >= "2023-01-01",
+                clinical_date <= "2023-03-31",
+            )
+        )
+        .limit(20)
+    )
+    return (await db.execute(stmt)).all()
+
+
+async def _legacy_name_filter(db: AsyncSession, patient_id: uuid.UUID) -> Any:
+    stmt = (
+        select(FhirResource.fhir_id, FhirResource.resource_type, FhirResource.data)
+        .where(
+            FhirResource.patient_id == patient_id,
+            FhirResource.embedding_text.ilike("%creatinine%"),
+        )
+        .limit(20)
+    )
+    return (await db.execute(stmt)).all()
+
+
+async def _indexed_date_filter(db: AsyncSession, patient_id: uuid.UUID) -> Any:
+    return await _query_exact(
+        patient_id=str(patient_id),
+        db=db,
+        resource_type="Observation",
+        date_from="2023-01-01",
+        date_to="2023-03-31",
+    )
+
+
+async def _indexed_name_search(db: AsyncSession, patient_id: uuid.UUID) -> Any:
+    return await HybridSearchService(db).search(
+        patient_id, HybridQuery(text="creatinine", limit=20)
+    )
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "legacy date range": _legacy_date_filter,
+    "indexed date range": _indexed_date_filter,
+    "legacy name ILIKE": _legacy_name_filter,
+    "indexed name (hybrid)": _indexed_name_search,
+}
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of the samples."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_benchmark(resources: int, repeat: int) -> None:
+    """Load a synthetic chart and print p50/p95 latency per scenario."""
+    patient_id = uuid.uuid4()
+    print(f"Chart: {resources} resources (plus 4 background patients), {repeat} runs\n")
+    try:
+        async with async_session_maker() as session:
+            await _load_chart(session, patient_id, resources)
+
+            timings: dict[str, list[float]] = {}
+            for name, scenario in SCENARIOS.items():
+                await scenario(session, patient_id)  # warm-up
+                samples = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    await scenario(session, patient_id)
+                    samples.append((time.perf_counter() - started) * 1000)
+                timings[name] = samples
+
+            await session.rollback()
+    finally:
+        await engine.dispose()
+
+    print(f"  {'scenario':<24} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    for name, samples in timings.items():
+        print(
+            f"  {name:<24} {statistics.median(samples):>10.2f} "
+            f"{_percentile(samples, 95):>10.2f}"
+        )
+
+
+def main() -> None:
+    """Main entry point for the query tool benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark query_patient_data")
+    parser.add_argument("--resources", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(max(1, args.resources), max(1, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Benchmark vector index strategies: recall and latency vs brute force.
+
+Loads synthetic patients whose embeddings cluster around a per-patient
+centroid (so one patient's rows are a small slice of the global HNSW graph)
+and runs VectorSearchService.search_similar under each index strategy
+(settings.vector_index_strategy). The "exact" strategy is the brute-force
+baseline: recall@k is the share of its results each strategy also returns.
+
+Usage:
+    uv run python -m app.scripts.benchmark_vector_search
+    uv run python -m app.scripts.benchmark_vector_search --patients 100 \\
+        --resources 500 --threshold 0.7 --ef-search 40
+
+Everything runs in a transaction that is rolled back, so the database is
+left unchanged.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.database import async_session_maker, engine
+from app.models import FhirResource, ResourceEmbedding
+from app.services.vector_search import (
+    EMBEDDING_DIMENSION,
+    INDEX_STRATEGIES,
+    VectorSearchService,
+)
+
+INSERT_BATCH_SIZE = 500
+
+# Per-dimension noise around a patient's centroid (~0.9 cosine similarity)
+CLUSTER_SPREAD = 0.01
+
+
+def _normalize(vector: list[float]) -> list[float]:
+    magnitude = sum(v * v for v in vector) ** 0.5
+    return [v / magnitude for v in vector]
+
+
+def _near(rng: random.Random, center: list[float], spread: float) -> list[float]:
+    """A unit vector near center (gaussian noise of the given scale)."""
+    return _normalize([c + rng.gauss(0.0, spread) for c in center])
+
+
+def _random_unit(rng: random.Random) -> list[float]:
+    return _normalize([rng.gauss(0.0, 1.0) for _ in range(EMBEDDING_DIMENSION)])
+
+
+async def _load_patients(
+    session, rng: random.Random, patients: int, resources: int
+) -> list[tuple[uuid.UUID, list[float]]]:
+    """Insert clustered embeddings for each patient; return (patient, centroid)."""
+    loaded = []
+    for p in range(patients):
+        patient_id = uuid.uuid4()
+        centroid = _random_unit(rng)
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "fhir_id": f"bench-{p}-{i}",
+                "resource_type": "Observation",
+                "patient_id": patient_id,
+                "data": {"resourceType": "Observation", "id": f"bench-{p}-{i}"},
+            }
+            for i in range(resources)
+        ]
+        vectors = [
+            {
+                "resource_id": row["id"],
+                "patient_id": patient_id,
+                "embedding": _near(rng, centroid, CLUSTER_SPREAD),
+            }
+            for row in rows
+        ]
+        for table, batch_rows in (
+            (FhirResource.__table__, rows),
+            (ResourceEmbedding.__table__, vectors),
+        ):
+            for i in range(0, len(batch_rows), INSERT_BATCH_SIZE):
+                batch = batch_rows[i : i + INSERT_BATCH_SIZE]
+                await session.execute(pg_insert(table).values(batch))
+        loaded.append((patient_id, centroid))
+    await session.execute(text("ANALYZE fhir_resources"))
+    await session.execute(text("ANALYZE resource_embeddings"))
+    return loaded
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of the samples."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_benchmark(
+    patients: int,
+    resources: int,
+    queries: int,
+    limit: int,
+    threshold: float,
+    ef_search: int | None,
+) -> None:
+    """Load synthetic patients and compare strategies against the exact scan."""
+    rng = random.Random(42)
+    print(
+        f"{patients} patients x {resources} embeddings, {queries} queries, "
+        f"top {limit}, threshold {threshold}\n"
+    )
+    try:
+        async with async_session_maker() as session:
+            loaded = await _load_patients(session, rng, patients, resources)
+            workload = [
+                (patient_id, _near(rng, centroid, CLUSTER_SPREAD))
+                for patient_id, centroid in (rng.choice(loaded) for _ in range(queries))
+            ]
+
+            results: dict[str, list[list[str]]] = {}
+            latencies: dict[str, list[float]] = {}
+            # Baseline first so every strategy is compared with the exact answer
+            for strategy in ("exact", *(s for s in INDEX_STRATEGIES if s != "exact")):
+                service = VectorSearchService(
+                    session, index_strategy=strategy, ef_search=ef_search
+                )
+                results[strategy], latencies[strategy] = [], []
+                for patient_id, query in workload:
+                    started = time.perf_counter()
+                    found = await service.search_similar(
+                        patient_id, query, limit=limit, threshold=threshold
+                    )
+                    latencies[strategy].append((time.perf_counter() - started) * 1000)
+                    results[strategy].append([r.fhir_id for r in found])
+
+            await session.rollback()
+    finally:
+        await engine.dispose()
+
+    print(f"  {'strategy':<10} {'recall@k':>9} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    for strategy, found in results.items():
+        hits = total = 0
+        for expected, actual in zip(results["exact"], found):
+            hits += len(set(expected) & set(actual))
+            total += len(expected)
+        recall = hits / total if total else 1.0
+        samples = latencies[strategy]
+        print(
+            f"  {strategy:<10} {recall:>9.3f} {statistics.median(samples):>10.2f} "
+            f"{_percentile(samples, 95):>10.2f}"
+        )
+
+
+def main() -> None:
+    """Main entry point for the vector search benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark vector index strategies")
+    parser.add_argument("--patients", type=int, default=50)
+    parser.add_argument("--resources", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--ef-search", type=int, default=None)
+    args = parser.parse_args()
+
+    asyncio.run(
+        run_benchmark(
+            patients=max(1, args.patients),
+            resources=max(1, args.resources),
+            queries=max(1, args.queries),
+            limit=args.limit,
+            threshold=args.threshold,
+            ef_search=args.ef_search,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
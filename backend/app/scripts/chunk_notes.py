@@ -0,0 +1,70 @@
+"""Backfill note chunks for DocumentReferences loaded before chunking existed.
+
+Enqueues one embed job per patient for the DocumentReferences that have a
+note attachment but no rows in note_chunks; the background workers chunk and
+embed them (the header embeddings are served from the embedding cache).
+
+Usage:
+    uv run python -m app.scripts.chunk_notes
+"""
+
+import asyncio
+import uuid
+from collections import defaultdict
+
+from sqlalchemy import exists, select
+
+from app.database import async_session_maker, engine
+from app.models import FhirResource, IngestJobKind, NoteChunk
+from app.services.job_queue import enqueue_job
+from app.services.note_chunks import decode_note_text
+
+
+async def enqueue_chunk_jobs() -> tuple[int, int]:
+    """Enqueue embed jobs for unchunked notes.
+
+    Returns:
+        Tuple of (notes enqueued, patients enqueued).
+    """
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(FhirResource.patient_id, FhirResource.id, FhirResource.data).where(
+                FhirResource.resource_type == "DocumentReference",
+                FhirResource.patient_id.is_not(None),
+                ~exists().where(NoteChunk.resource_id == FhirResource.id),
+            )
+        )
+        ids_by_patient: defaultdict[uuid.UUID, list[str]] = defaultdict(list)
+        for row in result.all():
+            if decode_note_text(row.data) is not None:
+                ids_by_patient[row.patient_id].append(str(row.id))
+
+        for patient_id, resource_ids in ids_by_patient.items():
+            enqueue_job(
+                session,
+                patient_id,
+                IngestJobKind.EMBED,
+                {"resource_ids": resource_ids},
+            )
+        await session.commit()
+
+    notes = sum(len(ids) for ids in ids_by_patient.values())
+    return notes, len(ids_by_patient)
+
+
+async def run_backfill() -> None:
+    """Enqueue the backfill and report the counts."""
+    try:
+        notes, patients = await enqueue_chunk_jobs()
+        print(f"Enqueued chunking for {notes} notes across {patients} patients")
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    """Main entry point for the note chunk backfill script."""
+    asyncio.run(run_backfill())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Import FHIR Bulk Data ($export) NDJSON into PostgreSQL and Neo4j.
+
+Accepts NDJSON files and/or directories of *.ndjson files (one file per
+resource type, as produced by $export). Resources are grouped by patient
+reference and many patients are loaded in parallel, each in its own
+transaction.
+
+Usage:
+    uv run python -m app.scripts.import_ndjson path/to/export/
+    uv run python -m app.scripts.import_ndjson Patient.ndjson Condition.ndjson
+    uv run python -m app.scripts.import_ndjson path/to/export/ --workers 8
+
+Re-importing is idempotent: unchanged resources are detected by content hash
+and skipped.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from pathlib import Path
+
+from app.database import async_session_maker, engine
+from app.projections.extractors import (
+    register_clinical_projections,
+    register_observation_projection,
+)
+from app.scripts.seed_database import verify_connections
+from app.services.fhir_loader import (
+    DEFAULT_IMPORT_WORKERS,
+    STREAM_BATCH_SIZE,
+    NdjsonImportResult,
+    find_ndjson_files,
+    get_preprocess_executor,
+    import_ndjson_files,
+    shutdown_preprocess_executor,
+)
+from app.services.graph import KnowledgeGraph
+
+logger = logging.getLogger(__name__)
+
+
+async def run_import(
+    paths: list[Path],
+    workers: int = DEFAULT_IMPORT_WORKERS,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> NdjsonImportResult:
+    """
+    Import NDJSON files after verifying database connections.
+
+    Args:
+        paths: NDJSON files and/or directories.
+        workers: Maximum patients loaded concurrently.
+        batch_size: Resources per write batch within a patient.
+
+    Returns:
+        NdjsonImportResult with import counts.
+    """
+    files = find_ndjson_files(paths)
+    if not files:
+        print("No NDJSON files found")
+        return NdjsonImportResult()
+
+    print(f"Found {len(files)} NDJSON files")
+
+    graph = KnowledgeGraph()
+    try:
+        print("\nVerifying database connections...")
+        if not await verify_connections(graph):
+            raise RuntimeError("Database connection verification failed")
+
+        print(f"\nImporting ({workers} patients in parallel)...")
+        started = time.perf_counter()
+        result = await import_ndjson_files(
+            async_session_maker,
+            graph,
+            files,
+            workers=workers,
+            batch_size=batch_size,
+            executor=get_preprocess_executor(),
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        await graph.close()
+        shutdown_preprocess_executor()
+        await engine.dispose()
+
+    print(f"\n  Patients loaded:    {result.patients_loaded}")
+    print(f"  Patients failed:    {result.patients_failed}")
+    print(
+        f"  Resources:          {result.resources_loaded} "
+        f"({result.resources_inserted} new, {result.resources_updated} changed, "
+        f"{result.resources_unchanged} unchanged)"
+    )
+    print(f"  Skipped (no patient reference): {result.resources_skipped}")
+    if result.lines_invalid:
+        print(f"  Invalid lines:      {result.lines_invalid}")
+    print(f"  Elapsed:            {elapsed:.1f}s")
+    return result
+
+
+def main() -> None:
+    """Main entry point for the NDJSON import script."""
+    parser = argparse.ArgumentParser(description="Import FHIR Bulk Data NDJSON")
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        type=Path,
+        help="NDJSON files or directories containing *.ndjson files",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_IMPORT_WORKERS,
+        help=f"Patients loaded concurrently (default {DEFAULT_IMPORT_WORKERS})",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=STREAM_BATCH_SIZE,
+        help=f"Resources per write batch (default {STREAM_BATCH_SIZE})",
+    )
+    args = parser.parse_args()
+
+    if args.workers < 1 or args.batch_size < 1:
+        parser.error("--workers and --batch-size must be positive")
+    missing = [p for p in args.paths if not p.exists()]
+    if missing:
+        parser.error(f"Not found: {', '.join(str(p) for p in missing)}")
+
+    # Bundle loading syncs projection rows for registered resource types
+    register_observation_projection()
+    register_clinical_projections()
+
+    result = asyncio.run(run_import(args.paths, args.workers, args.batch_size))
+    if result.patients_failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
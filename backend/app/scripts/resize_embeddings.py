@@ -0,0 +1,151 @@
+"""Resize the pgvector embedding columns to EMBEDDING_DIMENSION.
+
+Switching embedding backend or model (e.g. OpenAI's 1536-dimensional
+text-embedding-3-small to a 384-dimensional local model) changes the vector
+size. Vectors of different models are not comparable, so resizing clears the
+stored embeddings, note chunks and the embedding cache, rebuilds the HNSW
+indexes, and enqueues embed jobs so the background workers re-embed every
+patient with the configured backend.
+
+Usage:
+    EMBEDDING_BACKEND=local EMBEDDING_DIMENSION=384 \\
+        uv run python -m app.scripts.resize_embeddings
+    uv run python -m app.scripts.resize_embeddings --no-reembed
+"""
+
+import argparse
+import asyncio
+import uuid
+from collections import defaultdict
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.config import settings
+from app.database import async_session_maker, engine
+from app.models import FhirResource, IngestJobKind
+from app.services.embeddings import EMBEDDABLE_TYPES
+from app.services.job_queue import enqueue_job
+
+
+async def current_dimension(conn: AsyncConnection) -> int | None:
+    """Dimension of resource_embeddings.embedding (pgvector stores it as typmod)."""
+    result = await conn.execute(
+        text(
+            "SELECT atttypmod FROM pg_attribute "
+            "WHERE attrelid = 'resource_embeddings'::regclass "
+            "AND attname = 'embedding'"
+        )
+    )
+    typmod = result.scalar_one_or_none()
+    return typmod if typmod and typmod > 0 else None
+
+
+async def resize_columns(conn: AsyncConnection, dimension: int) -> None:
+    """Clear embeddings and retype the vector columns."""
+    await conn.execute(
+        text("DROP INDEX IF EXISTS idx_resource_embeddings_halfvec_hnsw")
+    )
+    await conn.execute(text("DROP INDEX IF EXISTS idx_resource_embeddings_bit_hnsw"))
+    await conn.execute(text("UPDATE fhir_resources SET embedding_text = NULL"))
+    await conn.execute(
+        text("TRUNCATE resource_embeddings, embedding_cache, note_chunks")
+    )
+    await conn.execute(text("DROP INDEX IF EXISTS idx_note_chunks_embedding_hnsw"))
+    for table in ("resource_embeddings", "embedding_cache", "note_chunks"):
+        await conn.execute(
+            text(f"ALTER TABLE {table} ALTER COLUMN embedding TYPE vector({dimension})")
+        )
+    # Quantized expression indexes carry the dimension in their casts
+    await conn.execute(
+        text(
+            "CREATE INDEX idx_resource_embeddings_halfvec_hnsw ON resource_embeddings "
+            f"USING hnsw ((embedding::halfvec({dimension})) halfvec_cosine_ops) "
+            "WITH (m = 16, ef_construction = 64)"
+        )
+    )
+    await conn.execute(
+        text(
+            "CREATE INDEX idx_resource_embeddings_bit_hnsw ON resource_embeddings "
+            f"USING hnsw ((binary_quantize(embedding)::bit({dimension})) "
+            "bit_hamming_ops) WITH (m = 16, ef_construction = 64)"
+        )
+    )
+    await conn.execute(
+        text(
+            "CREATE INDEX idx_note_chunks_embedding_hnsw ON note_chunks "
+            "USING hnsw (embedding vector_cosine_ops) "
+            "WITH (m = 16, ef_construction = 64)"
+        )
+    )
+
+
+async def enqueue_reembed_jobs() -> int:
+    """Enqueue one embed job per patient for its embeddable resources.
+
+    Returns:
+        Number of patients enqueued.
+    """
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(FhirResource.patient_id, FhirResource.id).where(
+                FhirResource.patient_id.is_not(None),
+                FhirResource.resource_type.in_(EMBEDDABLE_TYPES),
+            )
+        )
+        ids_by_patient: defaultdict[uuid.UUID, list[str]] = defaultdict(list)
+        for row in result.all():
+            ids_by_patient[row.patient_id].append(str(row.id))
+
+        for patient_id, resource_ids in ids_by_patient.items():
+            enqueue_job(
+                session,
+                patient_id,
+                IngestJobKind.EMBED,
+                {"resource_ids": resource_ids},
+            )
+        await session.commit()
+    return len(ids_by_patient)
+
+
+async def run_resize(dimension: int, reembed: bool = True) -> bool:
+    """
+    Resize the embedding columns if they don't match dimension.
+
+    Returns:
+        True if the columns were resized, False if already the right size.
+    """
+    try:
+        async with engine.begin() as conn:
+            current = await current_dimension(conn)
+            if current == dimension:
+                print(f"Embedding columns already have {dimension} dimensions")
+                return False
+            print(f"Resizing embedding columns: {current} -> {dimension}")
+            await resize_columns(conn, dimension)
+
+        if reembed:
+            patients = await enqueue_reembed_jobs()
+            print(f"Enqueued re-embedding for {patients} patients")
+        return True
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    """Main entry point for the resize script."""
+    parser = argparse.ArgumentParser(
+        description="Resize pgvector embedding columns to EMBEDDING_DIMENSION"
+    )
+    parser.add_argument(
+        "--no-reembed",
+        action="store_true",
+        help="Don't enqueue embed jobs after clearing the embeddings",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(run_resize(settings.embedding_dimension, reembed=not args.no_reembed))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,20 +5,74 @@ embedding narrative profiles as FHIR extensions on Patient resources.
 
 Usage:
     uv run python -m app.scripts.seed_database
+    uv run python -m app.scripts.seed_database --bulk --workers 8
+
+Bulk mode streams bundles through a bounded asyncio pipeline
+(parse -> clean -> enrich -> write -> graph/embed -> compile) with a
+separate concurrency limit per stage, and reports per-stage throughput.
 
 The script is idempotent - it can be run multiple times safely.
 Existing resources are updated via MERGE/upsert semantics.
 """
 
+import argparse
 import asyncio
 import json
+import logging
+import time
+from collections.abc import AsyncIterator
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 
 from sqlalchemy import text
 
 from app.database import async_session_maker, engine
-from app.services.fhir_loader import load_bundle_with_profile
+from app.projections.extractors import (
+    register_clinical_projections,
+    register_observation_projection,
+)
+from app.services.bundle_stream import aiter_bundle_file
+from app.services.compiler import compile_and_store
+from app.services.embeddings import EmbeddingService
+from app.services.fhir_loader import (
+    _add_profile_extension,
+    _generate_embeddings,
+    _store_embeddings,
+    clean_bundle_resources,
+    embedding_candidates,
+    enrich_bundle_resources,
+    get_preprocess_executor,
+    load_bundle_stream,
+    shutdown_preprocess_executor,
+    write_bundle_resources,
+)
 from app.services.graph import KnowledgeGraph
+from app.services.note_chunks import sync_note_chunks
+
+logger = logging.getLogger(__name__)
+
+# Pipeline stages in execution order (graph and embed run side by side)
+PIPELINE_STAGES = ("parse", "clean", "enrich", "write", "graph", "embed", "compile")
+
+# Default bundles in flight at once in bulk mode
+DEFAULT_WORKERS = 4
+
+# Default per-stage concurrency limits. CPU stages run in the preprocessing
+# executor (process pool by default);
+# write/compile are bounded by the Postgres pool, graph by Neo4j, and
+# embed by OpenAI rate limits.
+DEFAULT_STAGE_LIMITS: dict[str, int] = {
+    "parse": 2,
+    "clean": 2,
+    "enrich": 2,
+    "write": 4,
+    "graph": 2,
+    "embed": 4,
+    "compile": 2,
+}
 
 
 async def verify_connections(graph: KnowledgeGraph) -> bool:
@@ -47,6 +101,31 @@ async def verify_connections(graph: KnowledgeGraph) -> bool:
     return True
 
 
+def find_bundle_files(fixtures_dir: Path) -> list[Path]:
+    """Find all patient bundle files, excluding profile sidecars."""
+    bundle_files = sorted(fixtures_dir.glob("patient_bundle_*.json"))
+    return [f for f in bundle_files if ".profile." not in f.name]
+
+
+def _read_profile(bundle_path: Path) -> dict[str, Any] | None:
+    """Read the profile sidecar for a bundle, if one exists."""
+    profile_path = bundle_path.with_suffix(".profile.json")
+    if not profile_path.exists():
+        return None
+    with open(profile_path) as f:
+        return json.load(f)
+
+
+def _read_bundle(bundle_path: Path) -> dict[str, Any]:
+    """Read a bundle and attach its profile extension (parse stage)."""
+    with open(bundle_path) as f:
+        bundle = json.load(f)
+    profile = _read_profile(bundle_path)
+    if profile:
+        bundle = _add_profile_extension(bundle, profile)
+    return bundle
+
+
 async def seed_database(fixtures_dir: Path) -> dict[str, int]:
     """
     Seed database with all patient fixtures.
@@ -59,9 +138,7 @@ async def seed_database(fixtures_dir: Path) -> dict[str, int]:
     """
     stats = {"patients_loaded": 0, "resources_loaded": 0}
 
-    # Find all patient bundle files
-    bundle_files = sorted(fixtures_dir.glob("patient_bundle_*.json"))
-    bundle_files = [f for f in bundle_files if ".profile." not in f.name]
+    bundle_files = find_bundle_files(fixtures_dir)
 
     if not bundle_files:
         print(f"No patient bundles found in {fixtures_dir}")
@@ -83,68 +160,347 @@ async def seed_database(fixtures_dir: Path) -> dict[str, int]:
         for bundle_path in bundle_files:
             print(f"\n  Loading {bundle_path.name}...")
 
-            # Load bundle
-            with open(bundle_path) as f:
-                bundle = json.load(f)
-
             # Load corresponding profile if it exists
-            profile_path = bundle_path.with_suffix(".profile.json")
-            profile = None
-            if profile_path.exists():
-                with open(profile_path) as f:
-                    profile = json.load(f)
-                print(f"    Found profile: {profile_path.name}")
-
-            # Count resources in bundle
-            resource_count = len(bundle.get("entry", []))
+            profile = _read_profile(bundle_path)
+            if profile is not None:
+                print(
+                    f"    Found profile: {bundle_path.with_suffix('.profile.json').name}"
+                )
 
-            # Load into databases
+            # Stream entries from disk in batches rather than json.load-ing
+            # the whole bundle
             async with async_session_maker() as session:
-                patient_id = await load_bundle_with_profile(
+                result = await load_bundle_stream(
                     db=session,
                     graph=graph,
-                    bundle=bundle,
+                    entries=aiter_bundle_file(bundle_path),
                     profile=profile,
+                    executor=get_preprocess_executor(),
                 )
                 await session.commit()
 
-            print(f"    Patient ID: {patient_id}")
-            print(f"    Resources: {resource_count}")
+            resource_count = result.inserted + result.updated + result.unchanged
+            print(f"    Patient ID: {result.patient_id}")
+            print(
+                f"    Resources: {resource_count} "
+                f"({result.inserted} new, {result.updated} changed, "
+                f"{result.unchanged} unchanged)"
+            )
 
             stats["patients_loaded"] += 1
             stats["resources_loaded"] += resource_count
 
     finally:
         await graph.close()
+        shutdown_preprocess_executor()
+
+    return stats
+
+
+# =============================================================================
+# Bulk Pipeline
+# =============================================================================
+
+
+@dataclass
+class StageStats:
+    """Throughput counters for one pipeline stage."""
+
+    name: str
+    bundles: int = 0
+    resources: int = 0
+    seconds: float = 0.0
+
+    @property
+    def resources_per_second(self) -> float:
+        """Resources processed per second of stage busy time."""
+        return self.resources / self.seconds if self.seconds > 0 else 0.0
+
+
+class BulkSeedPipeline:
+    """Bounded asyncio pipeline that loads many bundles concurrently.
+
+    Each bundle flows through PIPELINE_STAGES on one worker task. A worker
+    acquires the stage's semaphore before running it, so every stage is
+    independently bounded while different bundles occupy different stages.
+    At most ``workers`` bundles are in memory at once.
+    """
+
+    def __init__(
+        self,
+        graph: KnowledgeGraph,
+        embedding_service: EmbeddingService | None = None,
+        workers: int = DEFAULT_WORKERS,
+        stage_limits: dict[str, int] | None = None,
+        executor: Executor | None = None,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self._limits = {**DEFAULT_STAGE_LIMITS, **(stage_limits or {})}
+        self._graph = graph
+        self._embedding_service = embedding_service
+        # None falls back to the event loop's default thread pool
+        self._executor = executor
+        self._workers = workers
+        self._semaphores = {
+            stage: asyncio.Semaphore(self._limits[stage]) for stage in PIPELINE_STAGES
+        }
+        self.stage_stats = {stage: StageStats(stage) for stage in PIPELINE_STAGES}
+
+    @asynccontextmanager
+    async def _stage(self, name: str, resources: int = 0) -> AsyncIterator[None]:
+        """Run a block under the stage's concurrency limit and record timing."""
+        async with self._semaphores[name]:
+            started = time.perf_counter()
+            try:
+                yield
+            finally:
+                stats = self.stage_stats[name]
+                stats.seconds += time.perf_counter() - started
+                stats.bundles += 1
+                stats.resources += resources
+
+    async def load_one(self, bundle_path: Path) -> tuple[Any, int]:
+        """Push one bundle through every stage and commit it.
+
+        Returns:
+            Tuple of (patient UUID, resource count).
+        """
+        loop = asyncio.get_running_loop()
+
+        async with self._stage("parse"):
+            bundle = await asyncio.to_thread(_read_bundle, bundle_path)
+
+        async with self._stage("clean", len(bundle.get("entry", []))):
+            resources = await loop.run_in_executor(
+                self._executor, clean_bundle_resources, bundle
+            )
+        del bundle
+        count = len(resources)
+
+        async with self._stage("enrich", count):
+            # Use the returned list: a process pool enriches a pickled copy
+            resources = await loop.run_in_executor(
+                self._executor, enrich_bundle_resources, resources
+            )
+
+        async with async_session_maker() as session:
+            async with self._stage("write", count):
+                patient_id, written = await write_bundle_resources(session, resources)
+            del resources
+
+            # Re-seeding only touches resources whose content hash changed
+            changed = [w.data for w in written if w.changed]
+            to_embed = embedding_candidates(written)
+
+            async def build_graph() -> None:
+                if not changed:
+                    return
+                async with self._stage("graph", len(changed)):
+                    await self._graph.build_from_fhir(str(patient_id), changed)
+
+            async def embed() -> None:
+                async with self._stage("embed", len(to_embed)):
+                    await _generate_embeddings(
+                        to_embed, self._embedding_service, db=session
+                    )
+                    await _store_embeddings(session, to_embed, patient_id)
+                    await sync_note_chunks(
+                        session, patient_id, to_embed, self._embedding_service
+                    )
+
+            await asyncio.gather(build_graph(), embed())
+
+            if changed:
+                async with self._stage("compile", count):
+                    try:
+                        await compile_and_store(patient_id, self._graph, session)
+                    except Exception as e:
+                        logger.warning(
+                            "Failed to compile summary for %s: %s", patient_id, e
+                        )
+
+            await session.commit()
+
+        return patient_id, count
+
+    async def run(self, bundle_files: list[Path]) -> dict[str, int]:
+        """Load all bundles, streaming them through a bounded work queue.
+
+        A failing bundle is reported and counted but does not stop the run.
+        """
+        stats = {"patients_loaded": 0, "resources_loaded": 0, "patients_failed": 0}
+        queue: asyncio.Queue[Path | None] = asyncio.Queue(maxsize=self._workers)
+
+        async def worker() -> None:
+            while (bundle_path := await queue.get()) is not None:
+                try:
+                    patient_id, count = await self.load_one(bundle_path)
+                except Exception as e:
+                    stats["patients_failed"] += 1
+                    print(f"  FAILED {bundle_path.name}: {e}")
+                    continue
+                stats["patients_loaded"] += 1
+                stats["resources_loaded"] += count
+                print(
+                    f"  Loaded {bundle_path.name} -> {patient_id} ({count} resources)"
+                )
+
+        tasks = [asyncio.create_task(worker()) for _ in range(self._workers)]
+        try:
+            for bundle_path in bundle_files:
+                await queue.put(bundle_path)
+            for _ in tasks:
+                await queue.put(None)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        return stats
+
+    def format_report(self, wall_seconds: float) -> str:
+        """Format per-stage throughput as a table."""
+        lines = [
+            f"  {'stage':<8} {'limit':>5} {'bundles':>8} {'busy s':>9} {'res/s':>10}",
+        ]
+        for stage in PIPELINE_STAGES:
+            s = self.stage_stats[stage]
+            lines.append(
+                f"  {stage:<8} {self._limits[stage]:>5} {s.bundles:>8} "
+                f"{s.seconds:>9.2f} {s.resources_per_second:>10.1f}"
+            )
+        lines.append(f"  wall time: {wall_seconds:.2f}s")
+        return "\n".join(lines)
+
+
+async def seed_database_bulk(
+    fixtures_dir: Path,
+    workers: int = DEFAULT_WORKERS,
+    stage_limits: dict[str, int] | None = None,
+) -> dict[str, int]:
+    """
+    Seed database with all patient fixtures using the bulk pipeline.
+
+    Args:
+        fixtures_dir: Directory containing patient_bundle_*.json files.
+        workers: Maximum bundles in flight at once.
+        stage_limits: Per-stage concurrency overrides keyed by stage name.
+
+    Returns:
+        Dictionary with counts: patients_loaded, resources_loaded, patients_failed.
+    """
+    bundle_files = find_bundle_files(fixtures_dir)
+    if not bundle_files:
+        print(f"No patient bundles found in {fixtures_dir}")
+        return {"patients_loaded": 0, "resources_loaded": 0, "patients_failed": 0}
+
+    print(f"Found {len(bundle_files)} patient bundles (bulk mode, {workers} workers)")
+
+    graph = KnowledgeGraph()
+    embedding_service = EmbeddingService()
+
+    try:
+        print("\nVerifying database connections...")
+        if not await verify_connections(graph):
+            raise RuntimeError("Database connection verification failed")
+
+        print("\nLoading patient bundles...")
+        pipeline = BulkSeedPipeline(
+            graph,
+            embedding_service=embedding_service,
+            workers=workers,
+            stage_limits=stage_limits,
+            executor=get_preprocess_executor(),
+        )
+        started = time.perf_counter()
+        stats = await pipeline.run(bundle_files)
+        wall_seconds = time.perf_counter() - started
+
+        print("\nStage throughput:")
+        print(pipeline.format_report(wall_seconds))
+    finally:
+        await embedding_service.close()
+        await graph.close()
+        shutdown_preprocess_executor()
 
     return stats
 
 
 def main() -> None:
     """Main entry point for the seed script."""
-    # Resolve fixtures directory — try repo-relative first, then Docker mount
-    repo_root = Path(__file__).parent.parent.parent.parent
-    fixtures_dir = repo_root / "fixtures" / "synthea"
-    if not fixtures_dir.exists():
-        # Docker: fixtures mounted at /fixtures
-        fixtures_dir = Path("/fixtures/synthea")
+    parser = argparse.ArgumentParser(description="Seed CruxMD with Synthea fixtures")
+    parser.add_argument(
+        "fixtures_dir",
+        nargs="?",
+        type=Path,
+        help="Directory of patient_bundle_*.json files (defaults to fixtures/synthea)",
+    )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Load bundles through the bounded concurrent pipeline",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Bundles in flight at once in bulk mode (default {DEFAULT_WORKERS})",
+    )
+    parser.add_argument(
+        "--stage-limit",
+        action="append",
+        default=[],
+        metavar="STAGE=N",
+        help="Override a stage concurrency limit, e.g. --stage-limit embed=8",
+    )
+    args = parser.parse_args()
+
+    stage_limits: dict[str, int] = {}
+    for override in args.stage_limit:
+        stage, _, value = override.partition("=")
+        if stage not in PIPELINE_STAGES or not value.isdigit() or int(value) < 1:
+            parser.error(f"Invalid --stage-limit {override!r}")
+        stage_limits[stage] = int(value)
+
+    fixtures_dir = args.fixtures_dir
+    if fixtures_dir is None:
+        # Resolve fixtures directory — try repo-relative first, then Docker mount
+        repo_root = Path(__file__).parent.parent.parent.parent
+        fixtures_dir = repo_root / "fixtures" / "synthea"
+        if not fixtures_dir.exists():
+            # Docker: fixtures mounted at /fixtures
+            fixtures_dir = Path("/fixtures/synthea")
 
     if not fixtures_dir.exists():
         print(f"Fixtures directory not found: {fixtures_dir}")
         print("Run fixture generation first (Stories 4.1 and 4.2)")
         return
 
+    # Bundle loading syncs projection rows for registered resource types
+    register_observation_projection()
+    register_clinical_projections()
+
     print("=" * 50)
     print("CruxMD Database Seeding")
     print("=" * 50)
 
-    stats = asyncio.run(seed_database(fixtures_dir))
+    if args.bulk:
+        stats = asyncio.run(
+            seed_database_bulk(
+                fixtures_dir, workers=args.workers, stage_limits=stage_limits
+            )
+        )
+    else:
+        stats = asyncio.run(seed_database(fixtures_dir))
 
     print("\n" + "=" * 50)
     print("Summary")
     print("=" * 50)
     print(f"  Patients loaded: {stats['patients_loaded']}")
     print(f"  Resources loaded: {stats['resources_loaded']}")
+    if stats.get("patients_failed"):
+        print(f"  Patients failed: {stats['patients_failed']}")
     print("\nDatabase seeding complete!")
 
 
@@ -23,7 +23,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
 from app.schemas import AgentResponse
 from app.schemas.agent import LightningResponse
-from app.services.agent_tools import TOOL_SCHEMAS, execute_tool
+from app.services.agent_tools import (
+    TOOL_SCHEMAS,
+    execute_query_patient_data_batch,
+    execute_tool,
+)
 from app.services.graph import KnowledgeGraph
 from app.services.query_classifier import QueryProfile
 
@@ -81,6 +85,7 @@ def _extract_usage(response: Any) -> dict[str, int]:
         "output_tokens": getattr(usage, "output_tokens", 0),
     }
 
+
 def _get_display_name(resource: dict[str, Any], code_field: str = "code") -> str | None:
     """Extract display name from a FHIR resource's code field.
 
@@ -106,15 +111,29 @@ def _get_display_name(resource: dict[str, Any], code_field: str = "code") -> str
 # boilerplate (system URIs, meta, profiles, identifiers, narrative HTML).
 
 # Top-level keys to strip (zero clinical value to the LLM)
-_STRIP_KEYS = frozenset({
-    "meta", "text", "identifier", "implicitRules", "language",
-    "contained", "extension", "modifierExtension",
-})
+_STRIP_KEYS = frozenset(
+    {
+        "meta",
+        "text",
+        "identifier",
+        "implicitRules",
+        "language",
+        "contained",
+        "extension",
+        "modifierExtension",
+    }
+)
 
 # Keys to strip from inner objects (noisy identifiers / serialisation artifacts)
-_STRIP_INNER_KEYS = frozenset({
-    "system", "use", "assigner", "rank", "postalCode",
-})
+_STRIP_INNER_KEYS = frozenset(
+    {
+        "system",
+        "use",
+        "assigner",
+        "rank",
+        "postalCode",
+    }
+)
 
 
 def _simplify_codeable_concept(cc: dict[str, Any]) -> str | dict[str, Any]:
@@ -144,12 +163,18 @@ def _simplify_reference(ref: dict[str, Any]) -> str | dict[str, Any]:
 
 def _is_codeable_concept(val: Any) -> bool:
     """Check if a value looks like a FHIR CodeableConcept."""
-    return isinstance(val, dict) and ("coding" in val or ("text" in val and len(val) <= 3))
+    return isinstance(val, dict) and (
+        "coding" in val or ("text" in val and len(val) <= 3)
+    )
 
 
 def _is_reference(val: Any) -> bool:
     """Check if a value looks like a FHIR Reference."""
-    return isinstance(val, dict) and "reference" in val and not isinstance(val.get("reference"), dict)
+    return (
+        isinstance(val, dict)
+        and "reference" in val
+        and not isinstance(val.get("reference"), dict)
+    )
 
 
 def _simplify_value(val: Any) -> Any:
@@ -179,14 +204,20 @@ def _simplify_dict(d: dict[str, Any]) -> dict[str, Any]:
         # Truncate ISO date strings anywhere in the tree.
         # Only match keys that genuinely contain dates — avoid false
         # positives like "location" matching on the "on" suffix.
-        if isinstance(simplified, str) and "T" in simplified and (
-            key.lower().endswith(("date", "datetime"))
-            or key in ("issued", "recorded", "started", "created", "authoredOn")
+        if (
+            isinstance(simplified, str)
+            and "T" in simplified
+            and (
+                key.lower().endswith(("date", "datetime"))
+                or key in ("issued", "recorded", "started", "created", "authoredOn")
+            )
         ):
             simplified = _truncate_date(simplified)
         # Truncate dates inside period objects anywhere in the tree
         if isinstance(simplified, dict) and key.lower() in (
-            "period", "billableperiod", "performedperiod",
+            "period",
+            "billableperiod",
+            "performedperiod",
         ):
             for pkey in ("start", "end"):
                 if isinstance(simplified.get(pkey), str):
@@ -233,7 +264,9 @@ def _prune_fhir_resource(resource: dict[str, Any]) -> dict[str, Any]:
     if resource.get("resourceType") == "DocumentReference":
         for content_item in resource.get("content", []):
             attachment = content_item.get("attachment", {})
-            if attachment.get("data") and "text/plain" in attachment.get("contentType", ""):
+            if attachment.get("data") and "text/plain" in attachment.get(
+                "contentType", ""
+            ):
                 try:
                     decoded = base64.b64decode(attachment["data"]).decode("utf-8")
                     extra["clinical_note"] = decoded
@@ -245,9 +278,13 @@ def _prune_fhir_resource(resource: dict[str, Any]) -> dict[str, Any]:
     filtered = {}
     skip_keys = _STRIP_KEYS | {
         # Device noise
-        "udiCarrier", "distinctIdentifier", "lotNumber", "serialNumber",
+        "udiCarrier",
+        "distinctIdentifier",
+        "lotNumber",
+        "serialNumber",
         # Claim/EOB noise
-        "insurance", "priority",
+        "insurance",
+        "priority",
     }
     for key, val in resource.items():
         if key in skip_keys:
@@ -262,7 +299,9 @@ def _prune_fhir_resource(resource: dict[str, Any]) -> dict[str, Any]:
     return pruned
 
 
-def _format_tier1_conditions(conditions: list[dict[str, Any]], tier: str = TIER_DEEP) -> str:
+def _format_tier1_conditions(
+    conditions: list[dict[str, Any]], tier: str = TIER_DEEP
+) -> str:
     """Format Tier 1 active conditions with treating meds, care plans, and procedures.
 
     Conditions are displayed as headers (hierarchical). Treating medications are
@@ -284,11 +323,15 @@ def _format_tier1_conditions(conditions: list[dict[str, Any]], tier: str = TIER_
         if isinstance(code_val, str):
             cond_display = code_val
         else:
-            cond_display = _get_display_name(cond) or cond.get("resourceType", "Unknown condition")
+            cond_display = _get_display_name(cond) or cond.get(
+                "resourceType", "Unknown condition"
+            )
         clinical_status = cond.get("clinicalStatus", "unknown")
         if isinstance(clinical_status, dict):
             status_codings = clinical_status.get("coding", [])
-            clinical_status = status_codings[0].get("code") if status_codings else "unknown"
+            clinical_status = (
+                status_codings[0].get("code") if status_codings else "unknown"
+            )
 
         onset = cond.get("onsetDateTime", "")
         if onset:
@@ -318,7 +361,10 @@ def _format_tier1_conditions(conditions: list[dict[str, Any]], tier: str = TIER_
                 if isinstance(mcc, str):
                     med_display = mcc
                 else:
-                    med_display = _get_display_name(med, "medicationCodeableConcept") or "Unknown medication"
+                    med_display = (
+                        _get_display_name(med, "medicationCodeableConcept")
+                        or "Unknown medication"
+                    )
                 med_status = med.get("status", "unknown")
                 recency = med.get("_recency", "")
                 if tier == TIER_LIGHTNING:
@@ -327,13 +373,18 @@ def _format_tier1_conditions(conditions: list[dict[str, Any]], tier: str = TIER_
                     dose_hist_str = ""
                     if med.get("_dose_history"):
                         dose_hist = med["_dose_history"]
-                        changes = [f"{d.get('dose', '?')} on {(d.get('authoredOn', ''))[:10]}" for d in dose_hist]
+                        changes = [
+                            f"{d.get('dose', '?')} on {(d.get('authoredOn', ''))[:10]}"
+                            for d in dose_hist
+                        ]
                         dose_hist_str = ", ".join(changes)
                     med_rows.append([med_display, med_status, recency, dose_hist_str])
             if tier == TIER_LIGHTNING:
                 table = _format_as_table(["Medication", "Status", "Recency"], med_rows)
             else:
-                table = _format_as_table(["Medication", "Status", "Recency", "Dose History"], med_rows)
+                table = _format_as_table(
+                    ["Medication", "Status", "Recency", "Dose History"], med_rows
+                )
             # Indent the table under the condition
             for table_line in table.split("\n"):
                 lines.append(f"    {table_line}")
@@ -347,8 +398,12 @@ def _format_tier1_conditions(conditions: list[dict[str, Any]], tier: str = TIER_
                     if isinstance(cat_val, str):
                         cp_display = cat_val
                     else:
-                        cp_display = _get_display_name(cp) or cp.get("title", "Unknown care plan")
-                        if cp_display == "Unknown care plan" and isinstance(cat_val, str):
+                        cp_display = _get_display_name(cp) or cp.get(
+                            "title", "Unknown care plan"
+                        )
+                        if cp_display == "Unknown care plan" and isinstance(
+                            cat_val, str
+                        ):
                             cp_display = cat_val
                     cp_status = cp.get("status", "unknown")
                     lines.append(f"      CarePlan: {cp_display} (status: {cp_status})")
@@ -409,7 +464,11 @@ def _allergy_row(a: dict[str, Any]) -> list[str]:
         display = _get_display_name(a) or "Unknown allergen"
     criticality = a.get("criticality", "unknown")
     categories = a.get("category", [])
-    cat = categories[0] if isinstance(categories, list) and categories else (categories if isinstance(categories, str) else "unknown")
+    cat = (
+        categories[0]
+        if isinstance(categories, list) and categories
+        else (categories if isinstance(categories, str) else "unknown")
+    )
     return [display, criticality, cat]
 
 
@@ -432,7 +491,9 @@ def _unlinked_med_row(med: dict[str, Any]) -> list[str]:
     if isinstance(mcc, str):
         display = mcc
     else:
-        display = _get_display_name(med, "medicationCodeableConcept") or "Unknown medication"
+        display = (
+            _get_display_name(med, "medicationCodeableConcept") or "Unknown medication"
+        )
     status = med.get("status", "unknown")
     recency = med.get("_recency", "")
     return [display, status, recency]
@@ -453,7 +514,9 @@ def _care_plan_display(cp: dict[str, Any]) -> str:
     return f"{display} (status: {status})"
 
 
-def _format_tier2_encounters(encounters: list[dict[str, Any]], tier: str = TIER_DEEP) -> str:
+def _format_tier2_encounters(
+    encounters: list[dict[str, Any]], tier: str = TIER_DEEP
+) -> str:
     """Format Tier 2 recent encounters.
 
     Args:
@@ -479,7 +542,11 @@ def _format_tier2_encounters(encounters: list[dict[str, Any]], tier: str = TIER_
             start = start[:10]
 
         class_info = enc.get("class", {})
-        class_code = class_info.get("code", "") if isinstance(class_info, dict) else str(class_info)
+        class_code = (
+            class_info.get("code", "")
+            if isinstance(class_info, dict)
+            else str(class_info)
+        )
 
         header = f"  [{start}] {enc_type}"
         if class_code:
@@ -510,7 +577,11 @@ def _format_tier2_encounters(encounters: list[dict[str, Any]], tier: str = TIER_
         for r in documented:
             clinical_note = r.get("clinical_note")
             if clinical_note:
-                note_preview = clinical_note[:500] + "..." if len(clinical_note) > 500 else clinical_note
+                note_preview = (
+                    clinical_note[:500] + "..."
+                    if len(clinical_note) > 500
+                    else clinical_note
+                )
                 lines.append(f"    Note: {note_preview}")
 
     return "\n".join(lines)
@@ -669,7 +740,8 @@ def _build_patient_summary_section(
     # Tier 1: Allergies
     tier1_allergies = compiled_summary.get("tier1_allergies", [])
     allergy_lines = _format_tier1_section(
-        "Allergies", tier1_allergies,
+        "Allergies",
+        tier1_allergies,
         headers=["Allergen", "Criticality", "Category"],
         row_fn=_allergy_row,
     )
@@ -681,7 +753,8 @@ def _build_patient_summary_section(
         tier1_unlinked = compiled_summary.get("tier1_unlinked_medications", [])
         if tier1_unlinked:
             unlinked_lines = _format_tier1_section(
-                "Medications (not linked to a condition)", tier1_unlinked,
+                "Medications (not linked to a condition)",
+                tier1_unlinked,
                 headers=["Medication", "Status", "Recency"],
                 row_fn=_unlinked_med_row,
             )
@@ -692,7 +765,8 @@ def _build_patient_summary_section(
     tier1_immunizations = compiled_summary.get("tier1_immunizations", [])
     if tier1_immunizations:
         imm_lines = _format_tier1_section(
-            "Immunizations", tier1_immunizations,
+            "Immunizations",
+            tier1_immunizations,
             headers=["Vaccine", "Date"],
             row_fn=_immunization_row,
         )
@@ -703,7 +777,9 @@ def _build_patient_summary_section(
     if tier != TIER_LIGHTNING:
         tier1_care_plans = compiled_summary.get("tier1_care_plans", [])
         if tier1_care_plans:
-            cp_lines = _format_tier1_section("Standalone Care Plans", tier1_care_plans, _care_plan_display)
+            cp_lines = _format_tier1_section(
+                "Standalone Care Plans", tier1_care_plans, _care_plan_display
+            )
             if cp_lines:
                 summary_parts.append(cp_lines)
 
@@ -765,11 +841,7 @@ def _build_safety_section_lightning(compiled_summary: dict[str, Any]) -> str:
     safety = compiled_summary.get("safety_constraints", {})
     safety_text = _format_safety_constraints_v2(safety)
 
-    return (
-        "## Safety Constraints\n"
-        "\n"
-        f"{safety_text}"
-    )
+    return f"## Safety Constraints\n\n{safety_text}"
 
 
 def build_system_prompt_lightning(
@@ -800,7 +872,9 @@ def build_system_prompt_lightning(
         "'Searching the full patient record for [value]...'"
     )
 
-    summary_section = _build_patient_summary_section(compiled_summary, patient_profile, tier=TIER_LIGHTNING)
+    summary_section = _build_patient_summary_section(
+        compiled_summary, patient_profile, tier=TIER_LIGHTNING
+    )
 
     safety_section = _build_safety_section_lightning(compiled_summary)
 
@@ -813,13 +887,15 @@ def build_system_prompt_lightning(
         "in the patient record above. If you found the answer, set to false."
     )
 
-    return "\n\n".join([
-        _PERSONA,
-        tier_instructions,
-        summary_section,
-        safety_section,
-        format_section,
-    ])
+    return "\n\n".join(
+        [
+            _PERSONA,
+            tier_instructions,
+            summary_section,
+            safety_section,
+            format_section,
+        ]
+    )
 
 
 def build_system_prompt_quick(
@@ -844,7 +920,9 @@ def build_system_prompt_quick(
         "Be concise and data-focused. Use tools to search when needed."
     )
 
-    summary_section = _build_patient_summary_section(compiled_summary, patient_profile, tier=TIER_QUICK)
+    summary_section = _build_patient_summary_section(
+        compiled_summary, patient_profile, tier=TIER_QUICK
+    )
 
     safety_section = _build_safety_section(compiled_summary)
 
@@ -864,13 +942,15 @@ def build_system_prompt_quick(
         "Keep the narrative to 1-2 sentences summarizing the key finding when a chart or table is shown."
     )
 
-    return "\n\n".join([
-        _PERSONA,
-        tier_instructions,
-        summary_section,
-        safety_section,
-        format_section,
-    ])
+    return "\n\n".join(
+        [
+            _PERSONA,
+            tier_instructions,
+            summary_section,
+            safety_section,
+            format_section,
+        ]
+    )
 
 
 def build_system_prompt_deep(
@@ -912,7 +992,9 @@ def build_system_prompt_deep(
     )
 
     # ── Section 2: Pre-compiled Patient Summary ──────────────────────────────
-    summary_section = _build_patient_summary_section(compiled_summary, patient_profile, tier=TIER_DEEP)
+    summary_section = _build_patient_summary_section(
+        compiled_summary, patient_profile, tier=TIER_DEEP
+    )
 
     # ── Section 3: Agent Reasoning Directives ────────────────────────────────
     reasoning_section = (
@@ -957,8 +1039,8 @@ def build_system_prompt_deep(
         "**Do NOT guess or fabricate clinical data — if you need it, call a tool.**\n"
         "\n"
         "### query_patient_data\n"
-        "Search patient data by name, resource type, and filters. Performs exact "
-        "matching with automatic semantic search fallback.\n"
+        "Search patient data by name, resource type, and filters. Names are "
+        "matched by combined keyword and semantic search.\n"
         "- Use for: finding specific conditions, medications, observations, procedures\n"
         "- Example: search for all HbA1c results, or all active medications\n"
         "\n"
@@ -1026,15 +1108,17 @@ def build_system_prompt_deep(
     )
 
     # ── Assemble ─────────────────────────────────────────────────────────────
-    return "\n\n".join([
-        _PERSONA,
-        tier_instructions,
-        summary_section,
-        reasoning_section,
-        tool_section,
-        safety_section,
-        format_section,
-    ])
+    return "\n\n".join(
+        [
+            _PERSONA,
+            tier_instructions,
+            summary_section,
+            reasoning_section,
+            tool_section,
+            safety_section,
+            format_section,
+        ]
+    )
 
 
 class AgentService:
@@ -1113,16 +1197,79 @@ class AgentService:
         """
         for item in response.output:
             if item.type == "function_call":
-                kwargs["input"].append({
-                    "type": "function_call",
-                    "id": item.id,
-                    "call_id": item.call_id,
-                    "name": item.name,
-                    "arguments": item.arguments,
-                })
+                kwargs["input"].append(
+                    {
+                        "type": "function_call",
+                        "id": item.id,
+                        "call_id": item.call_id,
+                        "name": item.name,
+                        "arguments": item.arguments,
+                    }
+                )
             else:
                 kwargs["input"].append(item)
 
+    async def _execute_tool_round(
+        self,
+        tool_calls: list[Any],
+        patient_id: str,
+        graph: KnowledgeGraph,
+        db: AsyncSession,
+    ) -> list[str]:
+        """Execute one round's tool calls, returning results in call order.
+
+        Multiple query_patient_data calls in the round are coalesced so their
+        names share one embedding request and one hybrid search query;
+        every other call runs through execute_tool in order.
+
+        Args:
+            tool_calls: function_call items from the model response.
+            patient_id: Current patient ID for tool execution.
+            graph: KnowledgeGraph instance.
+            db: AsyncSession instance.
+        """
+        results: dict[int, str] = {}
+        batched = [
+            i for i, tc in enumerate(tool_calls) if tc.name == "query_patient_data"
+        ]
+        if len(batched) > 1:
+            exec_start = time.perf_counter()
+            outputs = await execute_query_patient_data_batch(
+                [tool_calls[i].arguments for i in batched],
+                patient_id=patient_id,
+                graph=graph,
+                db=db,
+            )
+            results.update(zip(batched, outputs))
+            logger.info(
+                "  tool query_patient_data x%d (coalesced): %.0fms, result=%d chars",
+                len(batched),
+                (time.perf_counter() - exec_start) * 1000,
+                sum(len(output) for output in outputs),
+            )
+
+        for i, tool_call in enumerate(tool_calls):
+            if i in results:
+                continue
+            exec_start = time.perf_counter()
+            results[i] = await execute_tool(
+                name=tool_call.name,
+                arguments=tool_call.arguments,
+                patient_id=patient_id,
+                graph=graph,
+                db=db,
+                generated_tables=self.generated_tables,
+                generated_visualizations=self.generated_visualizations,
+            )
+            logger.info(
+                "  tool %s: %.0fms, result=%d chars",
+                tool_call.name,
+                (time.perf_counter() - exec_start) * 1000,
+                len(results[i]),
+            )
+
+        return [results[i] for i in range(len(tool_calls))]
+
     async def _execute_tool_calls(
         self,
         kwargs: dict[str, Any],
@@ -1151,14 +1298,15 @@ class AgentService:
             api_ms = (time.perf_counter() - round_start) * 1000
 
             tool_calls = [
-                item for item in response.output
-                if item.type == "function_call"
+                item for item in response.output if item.type == "function_call"
             ]
             if not tool_calls:
                 usage = _extract_usage(response)
                 logger.info(
                     "Tool round %d: no tool calls, responding directly (%.1fs, %s)",
-                    _round + 1, api_ms / 1000, usage or "no usage",
+                    _round + 1,
+                    api_ms / 1000,
+                    usage or "no usage",
                 )
                 kwargs.pop("tools", None)
                 kwargs["_last_response"] = response
@@ -1167,49 +1315,57 @@ class AgentService:
             tool_names = [tc.name for tc in tool_calls]
             logger.info(
                 "Tool round %d: %d call(s) %s (api=%.1fs)",
-                _round + 1, len(tool_calls), tool_names, api_ms / 1000,
+                _round + 1,
+                len(tool_calls),
+                tool_names,
+                api_ms / 1000,
             )
 
             self._append_response_output(kwargs, response)
 
             for tool_call in tool_calls:
-                yield ("tool_call", json.dumps({
-                    "name": tool_call.name,
-                    "call_id": tool_call.call_id,
-                    "arguments": tool_call.arguments,
-                }))
-
-                exec_start = time.perf_counter()
-                result = await execute_tool(
-                    name=tool_call.name,
-                    arguments=tool_call.arguments,
-                    patient_id=patient_id,
-                    graph=graph,
-                    db=db,
-                    generated_tables=self.generated_tables,
-                    generated_visualizations=self.generated_visualizations,
-                )
-                exec_ms = (time.perf_counter() - exec_start) * 1000
-                result_len = len(result)
-                logger.info(
-                    "  tool %s: %.0fms, result=%d chars",
-                    tool_call.name, exec_ms, result_len,
+                yield (
+                    "tool_call",
+                    json.dumps(
+                        {
+                            "name": tool_call.name,
+                            "call_id": tool_call.call_id,
+                            "arguments": tool_call.arguments,
+                        }
+                    ),
                 )
 
-                kwargs["input"].append({
-                    "type": "function_call_output",
-                    "call_id": tool_call.call_id,
-                    "output": result,
-                })
+            results = await self._execute_tool_round(
+                tool_calls,
+                patient_id,
+                graph,
+                db,
+            )
 
-                yield ("tool_result", json.dumps({
-                    "call_id": tool_call.call_id,
-                    "name": tool_call.name,
-                    "output": result,
-                }))
+            for tool_call, result in zip(tool_calls, results):
+                kwargs["input"].append(
+                    {
+                        "type": "function_call_output",
+                        "call_id": tool_call.call_id,
+                        "output": result,
+                    }
+                )
+
+                yield (
+                    "tool_result",
+                    json.dumps(
+                        {
+                            "call_id": tool_call.call_id,
+                            "name": tool_call.name,
+                            "output": result,
+                        }
+                    ),
+                )
 
         # Max rounds reached — remove tools to force text generation
-        logger.info("Max tool rounds (%d) reached, forcing final response", MAX_TOOL_ROUNDS)
+        logger.info(
+            "Max tool rounds (%d) reached, forcing final response", MAX_TOOL_ROUNDS
+        )
         kwargs.pop("tools", None)
         kwargs["_last_response"] = None
 
@@ -1288,25 +1444,42 @@ class AgentService:
         input_messages = self._build_input_messages(system_prompt, message, history)
 
         # Resolution: tier default, optionally boosted one level
-        base_effort = (query_profile.reasoning_effort if query_profile else None) or self._reasoning_effort
-        effective_effort = self._boost_effort(base_effort) if reasoning_boost else base_effort
-        effective_model = (query_profile.model if query_profile else None) or self._model
-        effective_max_tokens = (query_profile.max_output_tokens if query_profile else None) or self._max_output_tokens
+        base_effort = (
+            query_profile.reasoning_effort if query_profile else None
+        ) or self._reasoning_effort
+        effective_effort = (
+            self._boost_effort(base_effort) if reasoning_boost else base_effort
+        )
+        effective_model = (
+            query_profile.model if query_profile else None
+        ) or self._model
+        effective_max_tokens = (
+            query_profile.max_output_tokens if query_profile else None
+        ) or self._max_output_tokens
         use_reasoning = query_profile.reasoning if query_profile else True
         tools_available = graph is not None and db is not None
-        include_tools = tools_available and (query_profile.include_tools if query_profile else True)
-        response_schema_class = LightningResponse if (query_profile and query_profile.response_schema == "lightning") else AgentResponse
+        include_tools = tools_available and (
+            query_profile.include_tools if query_profile else True
+        )
+        response_schema_class = (
+            LightningResponse
+            if (query_profile and query_profile.response_schema == "lightning")
+            else AgentResponse
+        )
         prompt_chars = sum(len(m.get("content", "")) for m in input_messages)
 
         logger.info(
             "generate_response: model=%s, effort=%s, reasoning=%s, tools=%s, "
             "tier=%s, schema=%s, messages=%d, prompt_chars=%d (~%d tokens)",
-            effective_model, effective_effort,
+            effective_model,
+            effective_effort,
             "enabled" if use_reasoning else "disabled",
             "enabled" if include_tools else "disabled",
             query_profile.tier.value if query_profile else "default",
             response_schema_class.__name__,
-            len(input_messages), prompt_chars, prompt_chars // 4,
+            len(input_messages),
+            prompt_chars,
+            prompt_chars // 4,
         )
 
         kwargs: dict[str, Any] = {
@@ -1325,9 +1498,7 @@ class AgentService:
             # Run tool rounds (discard SSE events — non-streaming path).
             # _execute_tool_calls stores the final non-tool response in kwargs.
             tool_rounds = 0
-            async for _ in self._execute_tool_calls(
-                kwargs, patient_id, graph, db
-            ):
+            async for _ in self._execute_tool_calls(kwargs, patient_id, graph, db):
                 tool_rounds += 1
 
         # Reuse the response from _execute_tool_calls if available,
@@ -1363,9 +1534,9 @@ class AgentService:
         elapsed = time.perf_counter() - t0
         usage = _extract_usage(response)
         logger.info(
-            "generate_response complete: %.1fs, usage=%s, "
-            "insights=%d, follow_ups=%d",
-            elapsed, usage or "n/a",
+            "generate_response complete: %.1fs, usage=%s, insights=%d, follow_ups=%d",
+            elapsed,
+            usage or "n/a",
             len(agent_response.insights or []),
             len(agent_response.follow_ups or []),
         )
@@ -1414,25 +1585,42 @@ class AgentService:
         input_messages = self._build_input_messages(system_prompt, message, history)
 
         # Resolution: tier default, optionally boosted one level
-        base_effort = (query_profile.reasoning_effort if query_profile else None) or self._reasoning_effort
-        effective_effort = self._boost_effort(base_effort) if reasoning_boost else base_effort
-        effective_model = (query_profile.model if query_profile else None) or self._model
-        effective_max_tokens = (query_profile.max_output_tokens if query_profile else None) or self._max_output_tokens
+        base_effort = (
+            query_profile.reasoning_effort if query_profile else None
+        ) or self._reasoning_effort
+        effective_effort = (
+            self._boost_effort(base_effort) if reasoning_boost else base_effort
+        )
+        effective_model = (
+            query_profile.model if query_profile else None
+        ) or self._model
+        effective_max_tokens = (
+            query_profile.max_output_tokens if query_profile else None
+        ) or self._max_output_tokens
         use_reasoning = query_profile.reasoning if query_profile else True
         tools_available = graph is not None and db is not None
-        include_tools = tools_available and (query_profile.include_tools if query_profile else True)
-        response_schema_class = LightningResponse if (query_profile and query_profile.response_schema == "lightning") else AgentResponse
+        include_tools = tools_available and (
+            query_profile.include_tools if query_profile else True
+        )
+        response_schema_class = (
+            LightningResponse
+            if (query_profile and query_profile.response_schema == "lightning")
+            else AgentResponse
+        )
         prompt_chars = sum(len(m.get("content", "")) for m in input_messages)
 
         logger.info(
             "stream_response: model=%s, effort=%s, reasoning=%s, tools=%s, "
             "tier=%s, schema=%s, messages=%d, prompt_chars=%d (~%d tokens)",
-            effective_model, effective_effort,
+            effective_model,
+            effective_effort,
             "enabled" if use_reasoning else "disabled",
             "enabled" if include_tools else "disabled",
             query_profile.tier.value if query_profile else "default",
             response_schema_class.__name__,
-            len(input_messages), prompt_chars, prompt_chars // 4,
+            len(input_messages),
+            prompt_chars,
+            prompt_chars // 4,
         )
 
         kwargs: dict[str, Any] = {
@@ -1473,24 +1661,25 @@ class AgentService:
             api_ms = (time.perf_counter() - round_start) * 1000
 
             # Check if the model returned tool calls
-            tool_calls = [
-                item for item in final.output
-                if item.type == "function_call"
-            ]
+            tool_calls = [item for item in final.output if item.type == "function_call"]
 
             if not tool_calls:
                 # No tool calls — this is the final response
                 usage = _extract_usage(final)
                 logger.info(
                     "Stream round %d: no tool calls, finalising (%.1fs, %s)",
-                    _round + 1, api_ms / 1000, usage or "no usage",
+                    _round + 1,
+                    api_ms / 1000,
+                    usage or "no usage",
                 )
 
                 parsed_response = final.output_parsed
                 if parsed_response is None:
                     raw_output = getattr(final, "output_text", None)
                     if raw_output:
-                        parsed_response = response_schema_class.model_validate_json(raw_output)
+                        parsed_response = response_schema_class.model_validate_json(
+                            raw_output
+                        )
                     else:
                         raise RuntimeError(
                             "LLM response could not be parsed. "
@@ -1514,7 +1703,8 @@ class AgentService:
                     "insights=%d, follow_ups=%d",
                     total_elapsed,
                     f"{ttft:.0f}ms" if ttft else "n/a",
-                    tool_events, usage or "n/a",
+                    tool_events,
+                    usage or "n/a",
                     len(agent_response.insights or []),
                     len(agent_response.follow_ups or []),
                 )
@@ -1526,50 +1716,59 @@ class AgentService:
             tool_names = [tc.name for tc in tool_calls]
             logger.info(
                 "Stream round %d: %d tool call(s) %s (api=%.1fs)",
-                _round + 1, len(tool_calls), tool_names, api_ms / 1000,
+                _round + 1,
+                len(tool_calls),
+                tool_names,
+                api_ms / 1000,
             )
 
             self._append_response_output(kwargs, final)
 
             for tool_call in tool_calls:
-                yield ("tool_call", json.dumps({
-                    "name": tool_call.name,
-                    "call_id": tool_call.call_id,
-                    "arguments": tool_call.arguments,
-                }))
+                yield (
+                    "tool_call",
+                    json.dumps(
+                        {
+                            "name": tool_call.name,
+                            "call_id": tool_call.call_id,
+                            "arguments": tool_call.arguments,
+                        }
+                    ),
+                )
                 tool_events += 1
 
-                exec_start = time.perf_counter()
-                result = await execute_tool(
-                    name=tool_call.name,
-                    arguments=tool_call.arguments,
-                    patient_id=patient_id,
-                    graph=graph,
-                    db=db,
-                    generated_tables=self.generated_tables,
-                    generated_visualizations=self.generated_visualizations,
-                )
-                exec_ms = (time.perf_counter() - exec_start) * 1000
-                logger.info(
-                    "  tool %s: %.0fms, result=%d chars",
-                    tool_call.name, exec_ms, len(result),
+            results = await self._execute_tool_round(
+                tool_calls,
+                patient_id,
+                graph,
+                db,
+            )
+
+            for tool_call, result in zip(tool_calls, results):
+                kwargs["input"].append(
+                    {
+                        "type": "function_call_output",
+                        "call_id": tool_call.call_id,
+                        "output": result,
+                    }
                 )
 
-                kwargs["input"].append({
-                    "type": "function_call_output",
-                    "call_id": tool_call.call_id,
-                    "output": result,
-                })
-
-                yield ("tool_result", json.dumps({
-                    "call_id": tool_call.call_id,
-                    "name": tool_call.name,
-                    "output": result,
-                }))
+                yield (
+                    "tool_result",
+                    json.dumps(
+                        {
+                            "call_id": tool_call.call_id,
+                            "name": tool_call.name,
+                            "output": result,
+                        }
+                    ),
+                )
                 tool_events += 1
 
         # Max rounds exhausted — strip tools and force a final streaming call
-        logger.info("Max tool rounds (%d) reached, forcing final stream", MAX_TOOL_ROUNDS)
+        logger.info(
+            "Max tool rounds (%d) reached, forcing final stream", MAX_TOOL_ROUNDS
+        )
         kwargs.pop("tools", None)
 
         async with self._client.responses.stream(**kwargs) as stream:
@@ -1615,7 +1814,8 @@ class AgentService:
             "insights=%d, follow_ups=%d",
             total_elapsed,
             f"{ttft:.0f}ms" if ttft else "n/a",
-            tool_events, usage or "n/a",
+            tool_events,
+            usage or "n/a",
             len(agent_response.insights or []),
             len(agent_response.follow_ups or []),
         )
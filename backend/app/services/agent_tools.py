@@ -5,7 +5,7 @@ suitable for LLM consumption. Tools are designed to be called by the agent
 mid-reasoning to fetch additional patient data.
 
 Tools:
-  1. query_patient_data  — search by name/filters with pgvector fallback
+  1. query_patient_data  — hybrid full-text + pgvector search by name/filters
   2. explore_connections  — graph traversal from a single node
   3. get_patient_timeline — chronological encounter listing with events
 """
@@ -14,18 +14,23 @@ import json
 import logging
 from typing import Any
 
-from sqlalchemy import select, and_, func
+from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
+from app.config import settings
 from app.models import FhirResource
 from app.services.graph import KnowledgeGraph
+from app.services.hybrid_search import (
+    HybridQuery,
+    HybridSearchService,
+    resource_filter_conditions,
+)
+from app.services.vector_search import MAX_BATCH_QUERIES
 
 logger = logging.getLogger(__name__)
 
-# Minimum exact results before triggering pgvector semantic fallback
-_SEMANTIC_FALLBACK_THRESHOLD = 3
-
-# Similarity threshold for pgvector semantic search (0-1)
+# Similarity threshold for semantic candidates in hybrid search (0-1)
 _SEMANTIC_SIMILARITY_THRESHOLD = 0.4
 
 
@@ -48,8 +53,14 @@ SHOW_CLINICAL_TABLE_SCHEMA: dict[str, Any] = {
             "table_type": {
                 "type": "string",
                 "enum": [
-                    "medications", "lab_results", "vitals", "conditions",
-                    "allergies", "immunizations", "procedures", "encounters",
+                    "medications",
+                    "lab_results",
+                    "vitals",
+                    "conditions",
+                    "allergies",
+                    "immunizations",
+                    "procedures",
+                    "encounters",
                 ],
                 "description": "Type of clinical data table to display.",
             },
@@ -128,8 +139,8 @@ TOOL_SCHEMAS: list[dict[str, Any]] = [
         "description": (
             "Search patient data by name, resource type, and attribute filters. "
             "Use for finding conditions, medications, observations, procedures, "
-            "and other clinical data. Performs exact name matching with automatic "
-            "semantic search fallback when few results are found."
+            "and other clinical data. Names are matched by combined keyword and "
+            "semantic search, so synonyms and related terms are found too."
         ),
         "parameters": {
             "type": "object",
@@ -183,8 +194,14 @@ TOOL_SCHEMAS: list[dict[str, Any]] = [
                 },
             },
             "required": [
-                "resource_type", "name", "status", "category",
-                "date_from", "date_to", "include_full_resource", "limit",
+                "resource_type",
+                "name",
+                "status",
+                "category",
+                "date_from",
+                "date_to",
+                "include_full_resource",
+                "limit",
             ],
             "additionalProperties": False,
         },
@@ -229,7 +246,9 @@ TOOL_SCHEMAS: list[dict[str, Any]] = [
                 },
             },
             "required": [
-                "fhir_id", "resource_type", "include_full_resource",
+                "fhir_id",
+                "resource_type",
+                "include_full_resource",
                 "max_per_relationship",
             ],
             "additionalProperties": False,
@@ -306,13 +325,19 @@ async def execute_tool(
     # Handle show_clinical_table specially — generates table via side channel
     if name == "show_clinical_table":
         return await _execute_show_clinical_table(
-            args, patient_id, db, generated_tables,
+            args,
+            patient_id,
+            db,
+            generated_tables,
         )
 
     # Handle show_clinical_chart specially — generates chart via side channel
     if name == "show_clinical_chart":
         return await _execute_show_clinical_chart(
-            args, patient_id, db, generated_visualizations,
+            args,
+            patient_id,
+            db,
+            generated_visualizations,
         )
 
     handlers = {
@@ -320,14 +345,7 @@ async def execute_tool(
             patient_id=patient_id,
             db=db,
             graph=graph,
-            resource_type=args.get("resource_type"),
-            name=args.get("name"),
-            status=args.get("status"),
-            category=args.get("category"),
-            date_from=args.get("date_from"),
-            date_to=args.get("date_to"),
-            include_full_resource=args.get("include_full_resource", True),
-            limit=args.get("limit", 20),
+            **_query_patient_data_kwargs(args),
         ),
         "explore_connections": lambda: explore_connections(
             fhir_id=args["fhir_id"],
@@ -362,6 +380,7 @@ async def _execute_show_clinical_table(
 ) -> str:
     """Execute show_clinical_table: build table and store in side channel."""
     import uuid
+
     from app.services.table_builder import build_table_for_type
 
     table_type = args.get("table_type", "")
@@ -379,20 +398,24 @@ async def _execute_show_clinical_table(
         return json.dumps({"error": f"Failed to generate {table_type} table: {e}"})
 
     if table is None:
-        return json.dumps({
-            "displayed": False,
-            "message": f"No {table_type} data found for this patient.",
-        })
+        return json.dumps(
+            {
+                "displayed": False,
+                "message": f"No {table_type} data found for this patient.",
+            }
+        )
 
     # Store in side channel for attachment to final response
     if generated_tables is not None:
         generated_tables.append(table)
 
     row_count = len(table.get("rows", []))
-    return json.dumps({
-        "displayed": True,
-        "message": f"Table displayed: {table['title']} ({row_count} rows)",
-    })
+    return json.dumps(
+        {
+            "displayed": True,
+            "message": f"Table displayed: {table['title']} ({row_count} rows)",
+        }
+    )
 
 
 async def _execute_show_clinical_chart(
@@ -403,13 +426,16 @@ async def _execute_show_clinical_chart(
 ) -> str:
     """Execute show_clinical_chart: build chart and store in side channel."""
     import uuid
+
     from app.services.chart_builder import build_chart_for_type
 
     chart_type = args.get("chart_type", "")
     loinc_codes = args.get("loinc_codes")
     logger.info(
         "show_clinical_chart called: chart_type=%s, loinc_codes=%s, time_range=%s",
-        chart_type, loinc_codes, args.get("time_range"),
+        chart_type,
+        loinc_codes,
+        args.get("time_range"),
     )
     try:
         chart = await build_chart_for_type(
@@ -424,10 +450,12 @@ async def _execute_show_clinical_chart(
         return json.dumps({"error": f"Failed to generate {chart_type} chart: {e}"})
 
     if chart is None:
-        return json.dumps({
-            "displayed": False,
-            "message": f"No data found for {chart_type} chart.",
-        })
+        return json.dumps(
+            {
+                "displayed": False,
+                "message": f"No data found for {chart_type} chart.",
+            }
+        )
 
     # Store in side channel for attachment to final response
     if generated_visualizations is not None:
@@ -435,15 +463,52 @@ async def _execute_show_clinical_chart(
 
     title = chart.get("title", chart_type)
     data_points = 0
-    for series in (chart.get("series") or []):
+    for series in chart.get("series") or []:
         data_points += len(series.get("data_points") or [])
-    for event in (chart.get("events") or []):
+    for event in chart.get("events") or []:
         data_points += 1
 
-    return json.dumps({
-        "displayed": True,
-        "message": f"Chart displayed: {title} ({data_points} data points)",
-    })
+    return json.dumps(
+        {
+            "displayed": True,
+            "message": f"Chart displayed: {title} ({data_points} data points)",
+        }
+    )
+
+
+async def execute_query_patient_data_batch(
+    arguments: list[str],
+    patient_id: str,
+    graph: KnowledgeGraph,
+    db: AsyncSession,
+) -> list[str]:
+    """Execute several query_patient_data calls from one tool round together.
+
+    Args:
+        arguments: JSON-encoded arguments of each call, as sent by the LLM.
+        patient_id: Current patient ID (injected, not from LLM).
+        graph: KnowledgeGraph instance.
+        db: AsyncSession for Postgres queries.
+
+    Returns:
+        One tool result JSON string per call, in input order.
+    """
+    queries = [_query_patient_data_kwargs(json.loads(a)) for a in arguments]
+    return await query_patient_data_many(patient_id, db, graph, queries)
+
+
+def _query_patient_data_kwargs(args: dict[str, Any]) -> dict[str, Any]:
+    """Map LLM arguments to query_patient_data keyword arguments."""
+    return {
+        "resource_type": args.get("resource_type"),
+        "name": args.get("name"),
+        "status": args.get("status"),
+        "category": args.get("category"),
+        "date_from": args.get("date_from"),
+        "date_to": args.get("date_to"),
+        "include_full_resource": args.get("include_full_resource", True),
+        "limit": args.get("limit", 20),
+    }
 
 
 # =============================================================================
@@ -464,132 +529,229 @@ async def query_patient_data(
     include_full_resource: bool = True,
     limit: int = 20,
 ) -> str:
-    """Search patient data with exact name matching and optional semantic fallback.
+    """Search patient data by name (hybrid search) and/or attribute filters.
 
-    Primary: Postgres ILIKE on embedding_text + attribute filters.
-    Fallback: If <3 results and a name was provided, runs pgvector semantic
-    search (threshold 0.4) to find semantically similar resources.
+    With a name: HybridSearchService fuses Postgres full-text matches on
+    embedding_text with pgvector semantic matches (and clinical note
+    passages) by reciprocal rank fusion, in one query. If the name cannot
+    be embedded, the search is lexical only.
+    Without a name: attribute filters only.
 
-    Results are labeled by source ("exact" vs "semantic").
+    Results are labeled by source ("hybrid" vs "exact").
     Returns pruned FHIR JSON.
     """
-    try:
-        limit = min(max(1, limit), 100)
-        exact_results = await _query_exact(
-            patient_id=patient_id,
-            db=db,
-            resource_type=resource_type,
-            name=name,
-            status=status,
-            category=category,
-            date_from=date_from,
-            date_to=date_to,
-            limit=limit,
-        )
+    responses = await query_patient_data_many(
+        patient_id,
+        db,
+        graph,
+        [
+            {
+                "resource_type": resource_type,
+                "name": name,
+                "status": status,
+                "category": category,
+                "date_from": date_from,
+                "date_to": date_to,
+                "include_full_resource": include_full_resource,
+                "limit": limit,
+            }
+        ],
+    )
+    return responses[0]
+
+
+async def query_patient_data_many(
+    patient_id: str,
+    db: AsyncSession,
+    graph: KnowledgeGraph,
+    queries: list[dict[str, Any]],
+) -> list[str]:
+    """Run several query_patient_data calls, coalescing their hybrid searches.
+
+    The names of all calls are embedded in one request (through the
+    persistent embedding cache when enabled) and searched together with
+    HybridSearchService.search_many, one statement per MAX_BATCH_QUERIES
+    calls. Calls without a name run the filter query one after another on
+    the shared session.
+
+    Args:
+        patient_id: Current patient ID.
+        db: AsyncSession for Postgres queries.
+        graph: KnowledgeGraph instance.
+        queries: query_patient_data keyword arguments, one dict per call.
 
-        # Label exact results
-        results: list[dict[str, Any]] = []
-        seen_fhir_ids: set[str] = set()
-        for row in exact_results:
-            entry = _format_result_entry(row, "exact", include_full_resource)
-            results.append(entry)
-            seen_fhir_ids.add(row.fhir_id)
-
-        # Semantic fallback: if <3 exact results and name was provided
-        semantic_results: list[dict[str, Any]] = []
-        if name and len(exact_results) < _SEMANTIC_FALLBACK_THRESHOLD:
-            semantic_results = await _query_semantic(
+    Returns:
+        One JSON result per query, in input order (same format as
+        query_patient_data).
+    """
+    responses: list[str] = ["" for _ in queries]
+    named: list[tuple[int, dict[str, Any]]] = []
+    for i, query in enumerate(queries):
+        if query.get("name"):
+            named.append((i, query))
+            continue
+        try:
+            rows = await _query_exact(
                 patient_id=patient_id,
                 db=db,
-                name=name,
-                resource_type=resource_type,
-                limit=limit - len(exact_results),
-                seen_fhir_ids=seen_fhir_ids,
+                resource_type=query.get("resource_type"),
+                status=query.get("status"),
+                category=query.get("category"),
+                date_from=query.get("date_from"),
+                date_to=query.get("date_to"),
+                limit=_clamp_limit(query.get("limit", 20)),
+            )
+            include_full_resource = query.get("include_full_resource", True)
+            responses[i] = _format_query_response(
+                [
+                    _format_result_entry(row, "exact", include_full_resource)
+                    for row in rows
+                ]
+            )
+        except Exception as e:
+            logger.error(f"query_patient_data failed for {patient_id}: {e}")
+            responses[i] = json.dumps({"error": f"Error searching patient data: {e}"})
+
+    if not named:
+        return responses
+
+    embedding_by_name = await _embed_query_names(
+        db, list(dict.fromkeys(query["name"] for _, query in named))
+    )
+    hybrid = HybridSearchService(db, min_similarity=_SEMANTIC_SIMILARITY_THRESHOLD)
+    for start in range(0, len(named), MAX_BATCH_QUERIES):
+        batch = named[start : start + MAX_BATCH_QUERIES]
+        try:
+            found = await hybrid.search_many(
+                patient_id,
+                [
+                    HybridQuery(
+                        text=query["name"],
+                        embedding=embedding_by_name.get(query["name"]),
+                        limit=_clamp_limit(query.get("limit", 20)),
+                        resource_type=query.get("resource_type"),
+                        status=query.get("status"),
+                        category=query.get("category"),
+                        date_from=query.get("date_from"),
+                        date_to=query.get("date_to"),
+                    )
+                    for _, query in batch
+                ],
             )
-            results.extend(semantic_results)
+        except Exception as e:
+            logger.error(f"query_patient_data failed for {patient_id}: {e}")
+            for i, _ in batch:
+                responses[i] = json.dumps(
+                    {"error": f"Error searching patient data: {e}"}
+                )
+            continue
+        for (i, query), results in zip(batch, found):
+            include_full_resource = query.get("include_full_resource", True)
+            responses[i] = _format_query_response(
+                [_format_hybrid_entry(r, include_full_resource) for r in results]
+            )
+
+    return responses
+
+
+def _clamp_limit(limit: int) -> int:
+    """Clamp a requested result limit to 1-100."""
+    return min(max(1, limit), 100)
+
+
+async def _embed_query_names(
+    db: AsyncSession, names: list[str]
+) -> dict[str, list[float]]:
+    """Embed query names in one request; empty on failure (lexical-only search).
 
-        if not results:
-            return json.dumps({
+    Cache reads and writes run in a savepoint: a failed cache statement is
+    rolled back on its own instead of aborting the session's transaction,
+    which the search and the rest of the chat turn still use.
+    """
+    from app.services.embedding_cache import embed_texts_cached
+    from app.services.embeddings import EmbeddingService
+
+    try:
+        embedding_service = EmbeddingService()
+        try:
+            if settings.embedding_cache_enabled:
+                async with db.begin_nested():
+                    embeddings = await embed_texts_cached(db, embedding_service, names)
+            else:
+                embeddings = await embedding_service.embed_texts(names)
+        finally:
+            await embedding_service.close()
+    except Exception as e:
+        logger.warning(f"Query embedding failed, searching lexically only: {e}")
+        return {}
+    return dict(zip(names, embeddings))
+
+
+def _format_query_response(results: list[dict[str, Any]]) -> str:
+    """Serialize a query_patient_data result.
+
+    exact_count counts filter-query results and hybrid results with a
+    full-text match; semantic_count counts hybrid results with a vector or
+    note passage match. A hybrid result matched both ways counts in both.
+    """
+    if not results:
+        return json.dumps(
+            {
                 "results": [],
                 "total": 0,
                 "message": "No results found for the given criteria.",
-            })
+            }
+        )
 
-        return json.dumps({
+    matched = [set(entry.get("matched", ())) for entry in results]
+    return json.dumps(
+        {
             "results": results,
             "total": len(results),
-            "exact_count": len(exact_results),
-            "semantic_count": len(semantic_results),
-        })
-
-    except Exception as e:
-        logger.error(f"query_patient_data failed for {patient_id}: {e}")
-        return json.dumps({"error": f"Error searching patient data: {e}"})
+            "exact_count": sum(
+                entry["source"] == "exact" or "lexical" in signals
+                for entry, signals in zip(results, matched)
+            ),
+            "semantic_count": sum(
+                bool(signals & {"semantic", "passage"}) for signals in matched
+            ),
+        }
+    )
 
 
 async def _query_exact(
     patient_id: str,
     db: AsyncSession,
     resource_type: str | None = None,
-    name: str | None = None,
     status: str | None = None,
     category: str | None = None,
     date_from: str | None = None,
     date_to: str | None = None,
     limit: int = 20,
 ) -> list:
-    """Run Postgres ILIKE query on embedding_text with attribute filters."""
-    conditions = [FhirResource.patient_id == patient_id]
-
-    if resource_type:
-        conditions.append(FhirResource.resource_type == resource_type)
-
-    if name:
-        # Escape SQL LIKE wildcards in user-provided search term
-        safe_name = name.replace("%", r"\%").replace("_", r"\_")
-        conditions.append(
-            FhirResource.embedding_text.ilike(f"%{safe_name}%")
-        )
+    """Run a Postgres query on the attribute filters alone.
 
-    if status:
-        # Status can be in clinicalStatus.coding[0].code or status field
-        conditions.append(
-            func.coalesce(
-                FhirResource.data["clinicalStatus"]["coding"][0]["code"].astext,
-                FhirResource.data["status"].astext,
-            ).ilike(f"%{status}%")
-        )
-
-    if category:
-        conditions.append(
-            FhirResource.data["category"][0]["coding"][0]["code"].astext.ilike(
-                f"%{category}%"
-            )
-        )
-
-    if date_from:
-        # Check multiple date fields
-        conditions.append(
-            func.coalesce(
-                FhirResource.data["effectiveDateTime"].astext,
-                FhirResource.data["onsetDateTime"].astext,
-                FhirResource.data["authoredOn"].astext,
-                FhirResource.data["period"]["start"].astext,
-            ) >= date_from
-        )
-
-    if date_to:
-        conditions.append(
-            func.coalesce(
-                FhirResource.data["effectiveDateTime"].astext,
-                FhirResource.data["onsetDateTime"].astext,
-                FhirResource.data["authoredOn"].astext,
-                FhirResource.data["period"]["start"].astext,
-            ) <= date_to
-        )
+    Date ranges filter the indexed effective_date column, and only the
+    columns needed for the response are loaded (not the embedding).
+    """
+    conditions = [
+        FhirResource.patient_id == patient_id,
+        *resource_filter_conditions(
+            resource_type=resource_type,
+            status=status,
+            category=category,
+            date_from=date_from,
+            date_to=date_to,
+        ),
+    ]
 
     stmt = (
         select(FhirResource)
+        .options(
+            load_only(
+                FhirResource.fhir_id, FhirResource.resource_type, FhirResource.data
+            )
+        )
         .where(and_(*conditions))
         .limit(limit)
     )
@@ -598,56 +760,37 @@ async def _query_exact(
     return result.scalars().all()
 
 
-async def _query_semantic(
-    patient_id: str,
-    db: AsyncSession,
-    name: str,
-    resource_type: str | None = None,
-    limit: int = 20,
-    seen_fhir_ids: set[str] | None = None,
-) -> list[dict[str, Any]]:
-    """Run pgvector semantic search as fallback.
+def _format_hybrid_entry(result: Any, include_full_resource: bool) -> dict[str, Any]:
+    """Format a HybridResult into a result entry.
 
-    Uses VectorSearchService.search_by_text with EmbeddingService.embed_text.
+    A note matched by one of its passages is returned as that passage plus
+    note metadata rather than the whole note.
     """
-    try:
-        from app.services.compiler import prune_and_enrich
-        from app.services.embeddings import EmbeddingService
-        from app.services.vector_search import VectorSearchService
-
-        embedding_service = EmbeddingService()
-        vector_service = VectorSearchService(db)
-
-        search_results = await vector_service.search_by_text(
-            patient_id=patient_id,
-            query_text=name,
-            embed_fn=embedding_service.embed_text,
-            limit=limit,
-            threshold=_SEMANTIC_SIMILARITY_THRESHOLD,
+    entry: dict[str, Any] = {
+        "source": "hybrid",
+        "fhir_id": result.fhir_id,
+        "resource_type": result.resource_type,
+        "matched": result.signals,
+        "relevance_score": round(result.score, 4),
+    }
+    if result.similarity is not None:
+        entry["similarity_score"] = round(result.similarity, 3)
+
+    if result.passage is not None:
+        note = result.resource
+        type_obj = note.get("type", {})
+        codings = type_obj.get("coding", [])
+        entry["passage_similarity"] = round(result.passage_similarity, 3)
+        entry["note_type"] = (
+            codings[0].get("display") if codings else type_obj.get("text")
         )
+        entry["date"] = (note.get("date") or "")[:10] or None
+        entry["passage"] = result.passage
+    elif include_full_resource:
+        from app.services.compiler import prune_and_enrich
 
-        await embedding_service.close()
-
-        results: list[dict[str, Any]] = []
-        for sr in search_results:
-            if seen_fhir_ids and sr.fhir_id in seen_fhir_ids:
-                continue
-            if resource_type and sr.resource_type != resource_type:
-                continue
-            entry: dict[str, Any] = {
-                "source": "semantic",
-                "fhir_id": sr.fhir_id,
-                "resource_type": sr.resource_type,
-                "similarity_score": round(sr.score, 3),
-                "resource": prune_and_enrich(sr.resource),
-            }
-            results.append(entry)
-
-        return results
-
-    except Exception as e:
-        logger.warning(f"Semantic fallback failed: {e}")
-        return []
+        entry["resource"] = prune_and_enrich(result.resource)
+    return entry
 
 
 def _format_result_entry(
@@ -663,6 +806,7 @@ def _format_result_entry(
     }
     if include_full_resource:
         from app.services.compiler import prune_and_enrich
+
         entry["resource"] = prune_and_enrich(row.data)
     return entry
 
@@ -698,13 +842,15 @@ async def explore_connections(
         )
 
         if not grouped:
-            return json.dumps({
-                "fhir_id": fhir_id,
-                "resource_type": resource_type,
-                "connections": {},
-                "total": 0,
-                "message": f"No connections found for {resource_type or 'resource'} {fhir_id}.",
-            })
+            return json.dumps(
+                {
+                    "fhir_id": fhir_id,
+                    "resource_type": resource_type,
+                    "connections": {},
+                    "total": 0,
+                    "message": f"No connections found for {resource_type or 'resource'} {fhir_id}.",
+                }
+            )
 
         # Apply max_per_relationship limit and optionally strip full resource
         connections: dict[str, list[dict[str, Any]]] = {}
@@ -723,12 +869,14 @@ async def explore_connections(
             connections[rel_type] = trimmed
             total += len(trimmed)
 
-        return json.dumps({
-            "fhir_id": fhir_id,
-            "resource_type": resource_type,
-            "connections": connections,
-            "total": total,
-        })
+        return json.dumps(
+            {
+                "fhir_id": fhir_id,
+                "resource_type": resource_type,
+                "connections": connections,
+                "total": total,
+            }
+        )
 
     except Exception as e:
         logger.error(f"explore_connections failed for {fhir_id}: {e}")
@@ -750,7 +898,8 @@ async def get_patient_timeline(
 ) -> str:
     """Get patient encounter timeline with events, optionally including notes.
 
-    Queries Neo4j for encounters, then uses get_encounter_events for each.
+    Queries Neo4j for encounters, then fetches the events of all of them
+    with one get_encounter_events_batch call and one Postgres query.
     When include_notes=true, fetches DocumentReference via DOCUMENTED edge
     and decodes clinical note text.
     """
@@ -765,11 +914,13 @@ async def get_patient_timeline(
             date_range = ""
             if start_date or end_date:
                 date_range = f" ({start_date or '...'} to {end_date or '...'})"
-            return json.dumps({
-                "encounters": [],
-                "total": 0,
-                "message": f"No encounters found for this patient{date_range}.",
-            })
+            return json.dumps(
+                {
+                    "encounters": [],
+                    "total": 0,
+                    "message": f"No encounters found for this patient{date_range}.",
+                }
+            )
 
         # Collect all encounter fhir_ids for batch resource fetch
         encounter_fhir_ids = [e["fhir_id"] for e in encounters]
@@ -783,34 +934,36 @@ async def get_patient_timeline(
         enc_result = await db.execute(enc_stmt)
         enc_resources = {row.fhir_id: row.data for row in enc_result.all()}
 
+        # Events for every encounter in one graph query
+        events_by_encounter = await graph.get_encounter_events_batch(
+            patient_id, encounter_fhir_ids
+        )
+
+        # Batch-fetch all event resources from Postgres for pruning
+        all_event_fhir_ids = {
+            fid
+            for events in events_by_encounter.values()
+            for event_resources in events.values()
+            for r in event_resources
+            if (fid := r.get("id"))
+        }
+        event_resource_map: dict[str, dict[str, Any]] = {}
+        if all_event_fhir_ids:
+            ev_stmt = select(FhirResource.fhir_id, FhirResource.data).where(
+                FhirResource.patient_id == patient_id,
+                FhirResource.fhir_id.in_(list(all_event_fhir_ids)),
+            )
+            ev_result = await db.execute(ev_stmt)
+            event_resource_map = {row.fhir_id: row.data for row in ev_result.all()}
+
         timeline: list[dict[str, Any]] = []
 
         for enc in encounters:
             enc_fhir_id = enc["fhir_id"]
-            events = await graph.get_encounter_events(enc_fhir_id)
+            events = events_by_encounter[enc_fhir_id]
 
             # Build event groups with pruned FHIR JSON
             event_groups: dict[str, list[dict[str, Any]]] = {}
-            all_event_fhir_ids: list[str] = []
-
-            for event_type, event_resources in events.items():
-                if not event_resources:
-                    continue
-                for r in event_resources:
-                    fid = r.get("id")
-                    if fid:
-                        all_event_fhir_ids.append(fid)
-
-            # Batch-fetch event resources from Postgres for pruning
-            event_resource_map: dict[str, dict[str, Any]] = {}
-            if all_event_fhir_ids:
-                ev_stmt = select(FhirResource.fhir_id, FhirResource.data).where(
-                    FhirResource.fhir_id.in_(all_event_fhir_ids),
-                )
-                ev_result = await db.execute(ev_stmt)
-                event_resource_map = {
-                    row.fhir_id: row.data for row in ev_result.all()
-                }
 
             for event_type, event_resources in events.items():
                 if not event_resources:
@@ -842,10 +995,12 @@ async def get_patient_timeline(
 
             timeline.append(enc_entry)
 
-        return json.dumps({
-            "encounters": timeline,
-            "total": len(timeline),
-        })
+        return json.dumps(
+            {
+                "encounters": timeline,
+                "total": len(timeline),
+            }
+        )
 
     except Exception as e:
         logger.error(f"get_patient_timeline failed for {patient_id}: {e}")
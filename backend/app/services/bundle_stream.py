@@ -0,0 +1,208 @@
+"""Incremental FHIR Bundle parsing for bounded-memory loading.
+
+Parses a Bundle's entry[] array one item at a time from a file or an async
+byte stream, so only the entries of the current batch are held in memory
+instead of the whole document. Built on the stdlib JSONDecoder.raw_decode
+over a rolling text buffer, so it needs no extra dependency.
+"""
+
+import asyncio
+import codecs
+import json
+import re
+from collections.abc import AsyncIterable, AsyncIterator, Iterator
+from pathlib import Path
+from typing import IO, Any
+
+# Bytes read per chunk from files
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# Sentinel for "need more input before this value can be decoded"
+_INCOMPLETE = object()
+
+
+class BundleStreamParser:
+    """Push parser that yields Bundle entry[] items as they complete.
+
+    Feed raw chunks with feed(); each call returns the entries completed by
+    that chunk. Top-level members other than entry (resourceType, type, ...)
+    are collected in header. Call close() at end of input to flush and
+    validate.
+    """
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        # Pending characters required before a failed decode is retried;
+        # doubling keeps re-parsing of large entries amortized linear
+        self._need = 0
+        self._closed = False
+        self._state = "start"
+        self._key: str | None = None
+        self.header: dict[str, Any] = {}
+
+    def feed(self, data: bytes | str) -> list[dict[str, Any]]:
+        """Add a chunk of input and return newly completed entries."""
+        if isinstance(data, bytes):
+            data = self._utf8.decode(data)
+        self._buffer = self._buffer[self._pos :] + data
+        self._pos = 0
+        return self._drain()
+
+    def close(self) -> list[dict[str, Any]]:
+        """Mark end of input and return any remaining entries.
+
+        Raises:
+            ValueError: If the JSON is truncated or invalid, or the document
+                is not a Bundle.
+        """
+        self._buffer = self._buffer[self._pos :] + self._utf8.decode(b"", final=True)
+        self._pos = 0
+        self._closed = True
+        entries = self._drain()
+        if self._state != "done":
+            raise ValueError("Invalid bundle: truncated JSON")
+        if self.header.get("resourceType") != "Bundle":
+            raise ValueError("Invalid bundle: resourceType must be 'Bundle'")
+        return entries
+
+    def _skip_whitespace(self) -> bool:
+        """Advance past whitespace; return False if the buffer is exhausted."""
+        self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+        return self._pos < len(self._buffer)
+
+    def _decode_value(self) -> Any:
+        """Decode one JSON value at the cursor, or return _INCOMPLETE."""
+        pending = len(self._buffer) - self._pos
+        if not self._closed and pending < self._need:
+            return _INCOMPLETE
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError as e:
+            if self._closed:
+                raise ValueError(f"Invalid bundle JSON: {e}") from e
+            self._need = 2 * pending
+            return _INCOMPLETE
+        # A number at the very end of the buffer may continue in the next chunk
+        if end == len(self._buffer) and not self._closed:
+            self._need = pending + 1
+            return _INCOMPLETE
+        self._pos = end
+        self._need = 0
+        return value
+
+    def _drain(self) -> list[dict[str, Any]]:
+        """Consume as much of the buffer as possible."""
+        entries: list[dict[str, Any]] = []
+        while self._skip_whitespace():
+            char = self._buffer[self._pos]
+
+            if self._state == "start":
+                if char != "{":
+                    raise ValueError("Invalid bundle: expected a JSON object")
+                self._pos += 1
+                self._state = "key"
+
+            elif self._state == "key":
+                if char == ",":
+                    self._pos += 1
+                elif char == "}":
+                    self._pos += 1
+                    self._state = "done"
+                elif char == '"':
+                    key = self._decode_value()
+                    if key is _INCOMPLETE:
+                        break
+                    self._key = key
+                    self._state = "colon"
+                else:
+                    raise ValueError(f"Invalid bundle JSON at {char!r}")
+
+            elif self._state == "colon":
+                if char != ":":
+                    raise ValueError(f"Invalid bundle JSON at {char!r}")
+                self._pos += 1
+                self._state = "entry_open" if self._key == "entry" else "value"
+
+            elif self._state == "entry_open":
+                if char != "[":
+                    raise ValueError("Invalid bundle: entry must be an array")
+                self._pos += 1
+                self._state = "entries"
+
+            elif self._state == "entries":
+                if char == ",":
+                    self._pos += 1
+                elif char == "]":
+                    self._pos += 1
+                    self._state = "key"
+                else:
+                    entry = self._decode_value()
+                    if entry is _INCOMPLETE:
+                        break
+                    if isinstance(entry, dict):
+                        entries.append(entry)
+
+            elif self._state == "value":
+                value = self._decode_value()
+                if value is _INCOMPLETE:
+                    break
+                if self._key == "resourceType" and value != "Bundle":
+                    raise ValueError("Invalid bundle: resourceType must be 'Bundle'")
+                self.header[self._key] = value
+                self._state = "key"
+
+            else:  # done
+                raise ValueError("Invalid bundle: trailing data after JSON object")
+
+        return entries
+
+
+def iter_bundle_entries(
+    fp: IO[bytes] | IO[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[dict[str, Any]]:
+    """Yield Bundle entries from a file object without loading it whole.
+
+    Raises:
+        ValueError: If the file is not a valid FHIR Bundle.
+    """
+    parser = BundleStreamParser()
+    while chunk := fp.read(chunk_size):
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+async def aiter_bundle_entries(
+    chunks: AsyncIterable[bytes],
+) -> AsyncIterator[dict[str, Any]]:
+    """Yield Bundle entries from an async byte stream (e.g. a request body).
+
+    Raises:
+        ValueError: If the stream is not a valid FHIR Bundle.
+    """
+    parser = BundleStreamParser()
+    async for chunk in chunks:
+        for entry in parser.feed(chunk):
+            yield entry
+    for entry in parser.close():
+        yield entry
+
+
+async def aiter_bundle_file(
+    path: Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> AsyncIterator[dict[str, Any]]:
+    """Yield Bundle entries from a file, reading chunks off the event loop."""
+
+    async def chunks() -> AsyncIterator[bytes]:
+        with open(path, "rb") as fp:
+            while chunk := await asyncio.to_thread(fp.read, chunk_size):
+                yield chunk
+
+    async for entry in aiter_bundle_entries(chunks()):
+        yield entry
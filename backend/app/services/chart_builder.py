@@ -13,13 +13,18 @@ Mirrors patterns from:
 import logging
 import re
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any
 
-from sqlalchemy import DateTime, func, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import FhirResource
+from app.models import (
+    EncounterProjection,
+    FhirResource,
+    MedicationRequestProjection,
+    ObservationProjection,
+)
 from app.services.reference_ranges import (
     REFERENCE_RANGES,
     get_reference_range,
@@ -171,15 +176,15 @@ _GLUCOSE_RANGE_BANDS: list[dict[str, Any]] = [
 
 # LOINC code → range_bands lookup
 _RANGE_BANDS_BY_LOINC: dict[str, list[dict[str, Any]]] = {
-    "33914-3": _EGFR_RANGE_BANDS,    # eGFR (CKD-EPI)
-    "69405-9": _EGFR_RANGE_BANDS,    # eGFR (CKD-EPI, non-race)
-    "4548-4": _HBA1C_RANGE_BANDS,    # HbA1c
+    "33914-3": _EGFR_RANGE_BANDS,  # eGFR (CKD-EPI)
+    "69405-9": _EGFR_RANGE_BANDS,  # eGFR (CKD-EPI, non-race)
+    "4548-4": _HBA1C_RANGE_BANDS,  # HbA1c
     "2093-3": _CHOLESTEROL_RANGE_BANDS,  # Total Cholesterol
-    "18262-6": _LDL_RANGE_BANDS,     # LDL Direct
-    "13457-7": _LDL_RANGE_BANDS,     # LDL Calculated
-    "39156-5": _BMI_RANGE_BANDS,     # BMI
+    "18262-6": _LDL_RANGE_BANDS,  # LDL Direct
+    "13457-7": _LDL_RANGE_BANDS,  # LDL Calculated
+    "39156-5": _BMI_RANGE_BANDS,  # BMI
     "2345-7": _GLUCOSE_RANGE_BANDS,  # Glucose (serum/plasma)
-    "14749-6": _GLUCOSE_RANGE_BANDS, # Glucose (fasting)
+    "14749-6": _GLUCOSE_RANGE_BANDS,  # Glucose (fasting)
 }
 
 
@@ -275,9 +280,7 @@ def _build_bp_component_series(
         if not date_str:
             continue
         for comp in obs.get("component", []):
-            comp_code = (
-                comp.get("code", {}).get("coding", [{}])[0].get("code", "")
-            )
+            comp_code = comp.get("code", {}).get("coding", [{}])[0].get("code", "")
             vq = comp.get("valueQuantity", {})
             value = vq.get("value")
             if value is None:
@@ -290,19 +293,23 @@ def _build_bp_component_series(
 
     result = []
     if sys_points:
-        result.append({
-            "name": "Systolic",
-            "unit": unit,
-            "data_points": sys_points,
-            "_loinc": _BP_SYSTOLIC_LOINC,
-        })
+        result.append(
+            {
+                "name": "Systolic",
+                "unit": unit,
+                "data_points": sys_points,
+                "_loinc": _BP_SYSTOLIC_LOINC,
+            }
+        )
     if dia_points:
-        result.append({
-            "name": "Diastolic",
-            "unit": unit,
-            "data_points": dia_points,
-            "_loinc": _BP_DIASTOLIC_LOINC,
-        })
+        result.append(
+            {
+                "name": "Diastolic",
+                "unit": unit,
+                "data_points": dia_points,
+                "_loinc": _BP_DIASTOLIC_LOINC,
+            }
+        )
     return result
 
 
@@ -310,6 +317,7 @@ def _build_bp_component_series(
 # Trend Chart Builder
 # =============================================================================
 
+
 async def build_trend_chart(
     patient_id: uuid.UUID,
     db: AsyncSession,
@@ -331,40 +339,34 @@ async def build_trend_chart(
     if not loinc_codes:
         return None
 
-    loinc_expr = FhirResource.data["code"]["coding"][0]["code"].as_string()
-    effective_dt = FhirResource.data["effectiveDateTime"].as_string()
-
+    proj = ObservationProjection
     conditions = [
-        FhirResource.patient_id == patient_id,
-        FhirResource.resource_type == "Observation",
-        loinc_expr.in_(loinc_codes),
+        proj.patient_id == patient_id,
+        proj.loinc.in_(loinc_codes),
     ]
 
-    # Apply time range filter
+    # Apply time range filter (cutoff is naive local time; effective_at is UTC)
     if time_range:
         cutoff = _parse_time_range(time_range)
         if cutoff:
-            conditions.append(
-                func.cast(effective_dt, DateTime) >= cutoff
-            )
+            conditions.append(proj.effective_at >= cutoff.astimezone(timezone.utc))
 
     stmt = (
-        select(FhirResource.data)
+        select(FhirResource.data, proj.loinc)
+        .join(FhirResource, FhirResource.id == proj.fhir_resource_id)
         .where(*conditions)
-        .order_by(func.cast(effective_dt, DateTime).asc())
+        .order_by(proj.effective_at.asc())
     )
     result = await db.execute(stmt)
-    all_obs = [row.data for row in result.all()]
+    rows = result.all()
 
-    if not all_obs:
+    if not rows:
         return None
 
     # Group by LOINC code
     by_loinc: dict[str, list[dict[str, Any]]] = {}
-    for obs in all_obs:
-        loinc = obs.get("code", {}).get("coding", [{}])[0].get("code")
-        if loinc:
-            by_loinc.setdefault(loinc, []).append(obs)
+    for row in rows:
+        by_loinc.setdefault(row.loinc, []).append(row.data)
 
     # Build series for each LOINC code
     series: list[dict[str, Any]] = []
@@ -401,16 +403,20 @@ async def build_trend_chart(
                     high = bp_ref.get("high")
                     name = bp_s["name"]
                     if high is not None:
-                        all_reference_lines.append({
-                            "value": high,
-                            "label": str(int(high)),
-                            "series_name": name,
-                        })
-                series.append({
-                    "name": bp_s["name"],
-                    "unit": bp_s["unit"],
-                    "data_points": bp_s["data_points"],
-                })
+                        all_reference_lines.append(
+                            {
+                                "value": high,
+                                "label": str(int(high)),
+                                "series_name": name,
+                            }
+                        )
+                series.append(
+                    {
+                        "name": bp_s["name"],
+                        "unit": bp_s["unit"],
+                        "data_points": bp_s["data_points"],
+                    }
+                )
             chart_title_parts.append("Blood Pressure")
             continue
 
@@ -430,10 +436,12 @@ async def build_trend_chart(
             if value is None:
                 continue
             date_str = (obs.get("effectiveDateTime") or "")[:10]
-            data_points.append({
-                "date": date_str,
-                "value": value,
-            })
+            data_points.append(
+                {
+                    "date": date_str,
+                    "value": value,
+                }
+            )
 
         if not data_points:
             continue
@@ -450,15 +458,21 @@ async def build_trend_chart(
                 low = ref_range.get("low")
                 high = ref_range.get("high")
                 if low is not None:
-                    all_reference_lines.append({
-                        "value": low,
-                        "label": f"Low ({low} {unit})" if unit else f"Low ({low})",
-                    })
+                    all_reference_lines.append(
+                        {
+                            "value": low,
+                            "label": f"Low ({low} {unit})" if unit else f"Low ({low})",
+                        }
+                    )
                 if high is not None:
-                    all_reference_lines.append({
-                        "value": high,
-                        "label": f"High ({high} {unit})" if unit else f"High ({high})",
-                    })
+                    all_reference_lines.append(
+                        {
+                            "value": high,
+                            "label": f"High ({high} {unit})"
+                            if unit
+                            else f"High ({high})",
+                        }
+                    )
 
         # Compute current value + trend summary
         latest_value = data_points[-1]["value"]
@@ -474,11 +488,13 @@ async def build_trend_chart(
 
         chart_title_parts.append(series_name)
 
-        series.append({
-            "name": series_name,
-            "unit": unit or None,
-            "data_points": data_points,
-        })
+        series.append(
+            {
+                "name": series_name,
+                "unit": unit or None,
+                "data_points": data_points,
+            }
+        )
 
     if not series:
         return None
@@ -553,6 +569,7 @@ def _parse_time_range(time_range: str) -> datetime | None:
             return now.replace(year=year, month=month, day=day)
         elif time_range.endswith("d"):
             from datetime import timedelta
+
             days = int(time_range[:-1])
             return now - timedelta(days=days)
     except (ValueError, OverflowError):
@@ -587,14 +604,12 @@ async def _build_medication_timeline(
         return None
 
     # Query MedicationRequest resources for this patient
-    authored_on = FhirResource.data["authoredOn"].as_string()
+    proj = MedicationRequestProjection
     stmt = (
         select(FhirResource.data)
-        .where(
-            FhirResource.patient_id == patient_id,
-            FhirResource.resource_type == "MedicationRequest",
-        )
-        .order_by(func.cast(authored_on, DateTime).asc().nulls_last())
+        .join(proj, proj.fhir_resource_id == FhirResource.id)
+        .where(proj.patient_id == patient_id)
+        .order_by(proj.authored_at.asc().nulls_last())
     )
     result = await db.execute(stmt)
     meds = [row.data for row in result.all()]
@@ -654,10 +669,28 @@ async def _build_medication_timeline(
         gap_after = (trend_end - bar_end).days
 
         if gap_before > 0:
-            segments.append({"label": "", "flex": max(1, round((gap_before / total_days) * 100)), "active": False})
-        segments.append({"label": "", "flex": max(1, round((bar_days / total_days) * 100)), "active": True})
+            segments.append(
+                {
+                    "label": "",
+                    "flex": max(1, round((gap_before / total_days) * 100)),
+                    "active": False,
+                }
+            )
+        segments.append(
+            {
+                "label": "",
+                "flex": max(1, round((bar_days / total_days) * 100)),
+                "active": True,
+            }
+        )
         if gap_after > 0:
-            segments.append({"label": "", "flex": max(1, round((gap_after / total_days) * 100)), "active": False})
+            segments.append(
+                {
+                    "label": "",
+                    "flex": max(1, round((gap_after / total_days) * 100)),
+                    "active": False,
+                }
+            )
 
         timeline_rows.append({"drug": drug, "segments": segments})
 
@@ -668,6 +701,7 @@ async def _build_medication_timeline(
 # Encounter Timeline Builder
 # =============================================================================
 
+
 async def build_encounter_timeline(
     patient_id: uuid.UUID,
     db: AsyncSession,
@@ -681,15 +715,12 @@ async def build_encounter_timeline(
     Returns:
         ClinicalVisualization dict with type="encounter_timeline", or None if no data.
     """
-    period_start = FhirResource.data["period"]["start"].as_string()
-
+    proj = EncounterProjection
     stmt = (
         select(FhirResource.data)
-        .where(
-            FhirResource.patient_id == patient_id,
-            FhirResource.resource_type == "Encounter",
-        )
-        .order_by(func.cast(period_start, DateTime).desc().nulls_last())
+        .join(proj, proj.fhir_resource_id == FhirResource.id)
+        .where(proj.patient_id == patient_id)
+        .order_by(proj.period_start.desc().nulls_last())
     )
     result = await db.execute(stmt)
     resources = [row.data for row in result.all()]
@@ -711,7 +742,11 @@ async def build_encounter_timeline(
 
         # Class code (AMB/EMER/IMP)
         enc_class = enc.get("class", {})
-        class_code = enc_class.get("code", "AMB") if isinstance(enc_class, dict) else str(enc_class)
+        class_code = (
+            enc_class.get("code", "AMB")
+            if isinstance(enc_class, dict)
+            else str(enc_class)
+        )
 
         # Date
         period = enc.get("period", {})
@@ -727,12 +762,14 @@ async def build_encounter_timeline(
             if isinstance(first_reason, dict):
                 detail = _clean_display(_display_name({"code": first_reason}))
 
-        events.append({
-            "date": _format_date(date_str),
-            "title": _clean_display(type_display),
-            "detail": detail,
-            "category": class_code.upper() if class_code else "AMB",
-        })
+        events.append(
+            {
+                "date": _format_date(date_str),
+                "title": _clean_display(type_display),
+                "detail": detail,
+                "category": class_code.upper() if class_code else "AMB",
+            }
+        )
 
     if not events:
         return None
@@ -787,6 +824,8 @@ async def build_chart_for_type(
     if chart_type == "trend_chart":
         loinc_codes = kwargs.get("loinc_codes", [])
         time_range = kwargs.get("time_range")
-        return await builder(patient_id, db, loinc_codes=loinc_codes, time_range=time_range)
+        return await builder(
+            patient_id, db, loinc_codes=loinc_codes, time_range=time_range
+        )
     else:
         return await builder(patient_id, db)
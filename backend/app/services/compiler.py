@@ -12,18 +12,28 @@ Provides functions to:
 9. Compile full patient summary (12-step assembly pipeline)
 """
 
+import asyncio
 import copy
 import logging
+import time
 import uuid
+from collections.abc import Awaitable, Coroutine
 from datetime import date, datetime, timedelta, timezone
-from typing import Any
+from typing import Any, TypeVar
 
-from sqlalchemy import DateTime, func, or_, select
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import FhirResource
+from app.models import (
+    ConditionProjection,
+    FhirResource,
+    MedicationRequestProjection,
+    ObservationProjection,
+    PatientSummary,
+)
 from app.services.agent import _prune_fhir_resource
-from app.services.graph import KnowledgeGraph
+from app.services.graph import ConditionContext, KnowledgeGraph
 from app.services.reference_ranges import (
     build_fhir_interpretation,
     build_fhir_reference_range,
@@ -33,13 +43,17 @@ from app.services.reference_ranges import (
 
 logger = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
 # Observation categories we care about
-OBSERVATION_CATEGORIES = frozenset([
-    "vital-signs",
-    "laboratory",
-    "survey",
-    "social-history",
-])
+OBSERVATION_CATEGORIES = frozenset(
+    [
+        "vital-signs",
+        "laboratory",
+        "survey",
+        "social-history",
+    ]
+)
 
 # Threshold for "stable" trend determination (5%)
 TREND_THRESHOLD = 0.05
@@ -129,8 +143,8 @@ async def get_latest_observations_by_category(
 ) -> dict[str, list[dict[str, Any]]]:
     """Fetch the latest observation per LOINC code, grouped by category.
 
-    Groups observations by their LOINC code and category, taking the most
-    recent effectiveDateTime per group. Returns a dict keyed by category
+    Groups observations by their LOINC code and category (read from
+    observation_projections), taking the most recent per group. Returns a dict keyed by category
     (vital-signs, laboratory, survey, social-history).
 
     Args:
@@ -143,36 +157,26 @@ async def get_latest_observations_by_category(
     if isinstance(patient_id, str):
         patient_id = uuid.UUID(patient_id)
 
-    # Use a window function to rank observations by effectiveDateTime
-    # within each (LOINC code, category) group, then take rank 1.
-    #
-    # JSONB path expressions:
-    #   LOINC code:  data->'code'->'coding'->0->>'code'
-    #   Category:    data->'category'->0->'coding'->0->>'code'
-    #   DateTime:    data->>'effectiveDateTime'
-    loinc_code = FhirResource.data["code"]["coding"][0]["code"].as_string()
-    category_code = FhirResource.data["category"][0]["coding"][0]["code"].as_string()
-    effective_dt = FhirResource.data["effectiveDateTime"].as_string()
-
-    # Subquery: rank observations within each (loinc, category) group
+    # Use a window function to rank observations by effective time within
+    # each (LOINC code, category) group, then take rank 1. The projection's
+    # (patient_id, category, effective_at) index serves the filter and order.
+    proj = ObservationProjection
     ranked = (
         select(
             FhirResource.data,
-            loinc_code.label("loinc_code"),
-            category_code.label("category_code"),
+            proj.category.label("category_code"),
             func.row_number()
             .over(
-                partition_by=[loinc_code, category_code],
-                order_by=func.cast(effective_dt, DateTime).desc(),
+                partition_by=[proj.loinc, proj.category],
+                order_by=proj.effective_at.desc().nulls_last(),
             )
             .label("rn"),
         )
+        .join(FhirResource, FhirResource.id == proj.fhir_resource_id)
         .where(
-            FhirResource.patient_id == patient_id,
-            FhirResource.resource_type == "Observation",
-            loinc_code.isnot(None),
-            category_code.isnot(None),
-            category_code.in_(OBSERVATION_CATEGORIES),
+            proj.patient_id == patient_id,
+            proj.loinc.isnot(None),
+            proj.category.in_(OBSERVATION_CATEGORIES),
         )
         .subquery()
     )
@@ -231,7 +235,9 @@ async def compute_observation_trends(
     trend_candidates: list[tuple[int, str, str]] = []  # (index, loinc, date_str)
     for i, obs in enumerate(observations):
         value_quantity = obs.get("valueQuantity")
-        if not value_quantity or not isinstance(value_quantity.get("value"), (int, float)):
+        if not value_quantity or not isinstance(
+            value_quantity.get("value"), (int, float)
+        ):
             continue
         loinc = _extract_loinc_code(obs)
         date_str = obs.get("effectiveDateTime")
@@ -242,7 +248,9 @@ async def compute_observation_trends(
     previous_map: dict[tuple[str, str], dict[str, Any]] = {}
     if trend_candidates:
         previous_map = await _get_previous_observations_batch(
-            db, patient_id, [(loinc, date_str) for _, loinc, date_str in trend_candidates]
+            db,
+            patient_id,
+            [(loinc, date_str) for _, loinc, date_str in trend_candidates],
         )
 
     # Build result with trends and runtime interpretation
@@ -260,9 +268,7 @@ async def compute_observation_trends(
                 vq = obs_copy.get("valueQuantity")
                 if vq and isinstance(vq, dict):
                     unit = vq.get("unit") or vq.get("code")
-                obs_copy["referenceRange"] = build_fhir_reference_range(
-                    ref_range, unit
-                )
+                obs_copy["referenceRange"] = build_fhir_reference_range(ref_range, unit)
             else:
                 # Try component-based interpretation (e.g. Blood Pressure)
                 interpret_component_observation(obs_copy, patient_sex)
@@ -314,7 +320,7 @@ async def _get_previous_observations_batch(
 ) -> dict[tuple[str, str], dict[str, Any]]:
     """Fetch the most recent previous observation for each (LOINC code, date) pair.
 
-    Uses a single query with window functions to avoid N+1 queries.
+    Uses a single query over observation_projections to avoid N+1 queries.
 
     Args:
         db: Async SQLAlchemy session.
@@ -331,61 +337,37 @@ async def _get_previous_observations_batch(
     # Collect unique LOINC codes to filter DB rows
     unique_loincs = {loinc for loinc, _ in loinc_date_pairs}
 
-    loinc_expr = FhirResource.data["code"]["coding"][0]["code"].as_string()
-    effective_dt = FhirResource.data["effectiveDateTime"].as_string()
-
     # Fetch all candidate previous observations for these LOINC codes,
-    # ranked by date descending within each LOINC code
-    ranked = (
-        select(
-            FhirResource.data,
-            loinc_expr.label("loinc_code"),
-            effective_dt.label("effective_dt"),
-            func.row_number()
-            .over(
-                partition_by=loinc_expr,
-                order_by=func.cast(effective_dt, DateTime).desc(),
-            )
-            .label("rn"),
-        )
+    # newest first within each code (served by the projection's
+    # (patient_id, loinc, effective_at) index)
+    proj = ObservationProjection
+    query = (
+        select(FhirResource.data, proj.loinc, proj.effective_at)
+        .join(FhirResource, FhirResource.id == proj.fhir_resource_id)
         .where(
-            FhirResource.patient_id == patient_id,
-            FhirResource.resource_type == "Observation",
-            loinc_expr.in_(unique_loincs),
+            proj.patient_id == patient_id,
+            proj.loinc.in_(unique_loincs),
+            proj.effective_at.isnot(None),
         )
-        .subquery()
-    )
-
-    # Fetch all ranked rows (we need enough to find the "previous" for each pair)
-    query = select(
-        ranked.c.data,
-        ranked.c.loinc_code,
-        ranked.c.effective_dt,
+        .order_by(proj.loinc, proj.effective_at.desc())
     )
 
     result = await db.execute(query)
     rows = result.all()
 
-    # Group rows by LOINC code, sorted by date descending
-    by_loinc: dict[str, list[dict[str, Any]]] = {}
+    # Group rows by LOINC code (already sorted by date descending)
+    by_loinc: dict[str, list[tuple[datetime, dict[str, Any]]]] = {}
     for row in rows:
-        by_loinc.setdefault(row.loinc_code, []).append(row.data)
-
-    # Sort each group by effectiveDateTime descending (using parsed dates)
-    for loinc_code in by_loinc:
-        by_loinc[loinc_code].sort(
-            key=lambda obs: _parse_fhir_datetime(obs.get("effectiveDateTime", "")),
-            reverse=True,
-        )
+        by_loinc.setdefault(row.loinc, []).append((row.effective_at, row.data))
 
     # For each (loinc, date) pair, find the first observation strictly before the date
     previous_map: dict[tuple[str, str], dict[str, Any]] = {}
     for loinc_code, before_date_str in loinc_date_pairs:
-        obs_list = by_loinc.get(loinc_code, [])
         before_dt = _parse_fhir_datetime(before_date_str)
-        for obs in obs_list:
-            obs_dt = _parse_fhir_datetime(obs.get("effectiveDateTime", ""))
-            if obs_dt < before_dt:
+        if before_dt.tzinfo is None:
+            before_dt = before_dt.replace(tzinfo=timezone.utc)
+        for effective_at, obs in by_loinc.get(loinc_code, []):
+            if effective_at < before_dt:
                 previous_map[(loinc_code, before_date_str)] = obs
                 break
 
@@ -639,7 +621,9 @@ def compute_medication_recency(
     try:
         authored_dt = _parse_fhir_datetime(authored_on)
         # Convert to date for day-level comparison
-        authored_date = authored_dt.date() if isinstance(authored_dt, datetime) else authored_dt
+        authored_date = (
+            authored_dt.date() if isinstance(authored_dt, datetime) else authored_dt
+        )
     except (ValueError, TypeError):
         return {}
 
@@ -720,36 +704,74 @@ async def compute_dose_history(
         "dose", "authoredOn", and "status" keys. Empty list if no
         prior records with different doses exist.
     """
+    histories = await compute_dose_history_batch(db, patient_id, [active_med])
+    return histories[0]
+
+
+async def compute_dose_history_batch(
+    db: AsyncSession,
+    patient_id: uuid.UUID | str,
+    active_meds: list[dict[str, Any]],
+) -> list[list[dict[str, Any]]]:
+    """Compute dose history for several active medications with one query.
+
+    Fetches the patient's MedicationRequests for every active medication
+    display name at once, ordered by display then authoredOn, and groups
+    them per display in Python. Each medication's history follows the
+    rules of compute_dose_history.
+
+    Args:
+        db: Async SQLAlchemy session.
+        patient_id: The canonical patient UUID.
+        active_meds: Active MedicationRequest FHIR dicts.
+
+    Returns:
+        One dose history list per entry of active_meds, in the same order.
+    """
     if isinstance(patient_id, str):
         patient_id = uuid.UUID(patient_id)
 
-    med_display = _extract_med_display(active_med)
-    if not med_display:
-        return []
+    displays = {d for med in active_meds if (d := _extract_med_display(med))}
+    requests_by_display: dict[str, list[dict[str, Any]]] = {}
+    if displays:
+        # All MedicationRequests sharing a display with an active med
+        proj = MedicationRequestProjection
+        query = (
+            select(proj.display, FhirResource.data)
+            .join(proj, proj.fhir_resource_id == FhirResource.id)
+            .where(proj.patient_id == patient_id, proj.display.in_(displays))
+            .order_by(proj.display, proj.authored_at.asc())
+        )
+        result = await db.execute(query)
+        for row in result.all():
+            requests_by_display.setdefault(row.display, []).append(row.data)
 
-    current_dose = _extract_dosage_text(active_med)
-    current_fhir_id = active_med.get("id")
+    return [
+        _dose_history_from_requests(
+            med, requests_by_display.get(_extract_med_display(med) or "", [])
+        )
+        for med in active_meds
+    ]
 
-    # Query all MedicationRequests with same medication display
-    med_display_expr = FhirResource.data["medicationCodeableConcept"]["coding"][0]["display"].as_string()
-    authored_on_expr = FhirResource.data["authoredOn"].as_string()
 
-    query = (
-        select(FhirResource.data)
-        .where(
-            FhirResource.patient_id == patient_id,
-            FhirResource.resource_type == "MedicationRequest",
-            med_display_expr == med_display,
-        )
-        .order_by(func.cast(authored_on_expr, DateTime).asc())
-    )
+def _dose_history_from_requests(
+    active_med: dict[str, Any],
+    requests: list[dict[str, Any]],
+) -> list[dict[str, Any]]:
+    """Build dose history entries for active_med from same-display requests.
 
-    result = await db.execute(query)
-    rows = result.all()
+    Args:
+        active_med: The current active MedicationRequest FHIR dict.
+        requests: MedicationRequests with the same display, oldest first.
+
+    Returns:
+        Prior entries whose dosage differs from the active medication's.
+    """
+    current_dose = _extract_dosage_text(active_med)
+    current_fhir_id = active_med.get("id")
 
     history: list[dict[str, Any]] = []
-    for row in rows:
-        data = row.data if hasattr(row, "data") else row[0]
+    for data in requests:
         # Skip the active medication itself
         if data.get("id") == current_fhir_id:
             continue
@@ -785,6 +807,8 @@ async def infer_medication_condition_links(
 
     For medications without a direct TREATS edge, traverses:
     med -> PRESCRIBED -> encounter -> DIAGNOSED -> condition
+    for all medications in one graph query (see
+    KnowledgeGraph.get_inferred_condition_links).
 
     Args:
         unlinked_meds: List of medication dicts without TREATS edges.
@@ -796,53 +820,22 @@ async def infer_medication_condition_links(
         flagged with _inferred=True. Meds with no encounter link
         are collected under the "unlinked" key.
     """
-    result: dict[str, list[dict[str, Any]]] = {}
+    med_fhir_ids = [mid for med in unlinked_meds if (mid := med.get("id"))]
+    links: dict[str, list[str]] = {}
+    if med_fhir_ids:
+        links = await graph.get_inferred_condition_links(patient_id, med_fhir_ids)
 
+    result: dict[str, list[dict[str, Any]]] = {}
     for med in unlinked_meds:
-        med_fhir_id = med.get("id")
-        if not med_fhir_id:
-            result.setdefault("unlinked", []).append(med)
-            continue
-
-        # Get all connections from this medication node
-        connections = await graph.get_all_connections(
-            med_fhir_id, patient_id=patient_id
-        )
-
-        # Find encounters via PRESCRIBED relationship (incoming = encounter prescribed this med)
-        encounter_fhir_ids = [
-            c["fhir_id"]
-            for c in connections
-            if c["relationship"] == "PRESCRIBED"
-            and c["resource_type"] == "Encounter"
-        ]
-
-        if not encounter_fhir_ids:
+        condition_fhir_ids = links.get(med.get("id") or "", [])
+        if not condition_fhir_ids:
             result.setdefault("unlinked", []).append(med)
             continue
 
-        # For each encounter, find conditions via DIAGNOSED relationship
-        found_condition = False
-        for enc_fhir_id in encounter_fhir_ids:
-            enc_connections = await graph.get_all_connections(
-                enc_fhir_id, patient_id=patient_id
-            )
-
-            condition_fhir_ids = [
-                c["fhir_id"]
-                for c in enc_connections
-                if c["relationship"] == "DIAGNOSED"
-                and c["resource_type"] == "Condition"
-            ]
-
-            for cond_fhir_id in condition_fhir_ids:
-                med_copy = copy.deepcopy(med)
-                med_copy["_inferred"] = True
-                result.setdefault(cond_fhir_id, []).append(med_copy)
-                found_condition = True
-
-        if not found_condition:
-            result.setdefault("unlinked", []).append(med)
+        # Shallow flagged copy per condition; pruning builds fresh dicts,
+        # so the nested FHIR structure can be shared
+        for cond_fhir_id in condition_fhir_ids:
+            result.setdefault(cond_fhir_id, []).append({**med, "_inferred": True})
 
     return result
 
@@ -873,7 +866,9 @@ _EVENT_TYPE_MAP: dict[str, str] = {
 }
 
 
-def _build_patient_orientation(patient_data: dict[str, Any], compilation_date: date) -> str:
+def _build_patient_orientation(
+    patient_data: dict[str, Any], compilation_date: date
+) -> str:
     """Build a narrative orientation string from a Patient FHIR resource.
 
     Args:
@@ -900,8 +895,12 @@ def _build_patient_orientation(patient_data: dict[str, Any], compilation_date: d
         try:
             birth_date = datetime.fromisoformat(birth_date_str).date()
             age = (
-                compilation_date.year - birth_date.year
-                - ((compilation_date.month, compilation_date.day) < (birth_date.month, birth_date.day))
+                compilation_date.year
+                - birth_date.year
+                - (
+                    (compilation_date.month, compilation_date.day)
+                    < (birth_date.month, birth_date.day)
+                )
             )
             age_str = f" (age {age})"
         except (ValueError, TypeError):
@@ -937,19 +936,16 @@ async def _fetch_recently_resolved_conditions(
         List of FHIR Condition dicts.
     """
     cutoff = compilation_date - timedelta(days=_RECENTLY_RESOLVED_MONTHS * 30)
-    cutoff_dt = datetime(cutoff.year, cutoff.month, cutoff.day)
-
-    clinical_status_expr = FhirResource.data["clinicalStatus"]["coding"][0]["code"].as_string()
-    abatement_expr = FhirResource.data["abatementDateTime"].as_string()
+    cutoff_dt = datetime(cutoff.year, cutoff.month, cutoff.day, tzinfo=timezone.utc)
 
+    proj = ConditionProjection
     query = (
         select(FhirResource.data)
+        .join(proj, proj.fhir_resource_id == FhirResource.id)
         .where(
-            FhirResource.patient_id == patient_id,
-            FhirResource.resource_type == "Condition",
-            clinical_status_expr.in_(_RESOLVED_CONDITION_STATUSES),
-            abatement_expr.isnot(None),
-            func.cast(abatement_expr, DateTime) >= cutoff_dt,
+            proj.patient_id == patient_id,
+            proj.clinical_status.in_(_RESOLVED_CONDITION_STATUSES),
+            proj.abatement_at >= cutoff_dt,
         )
     )
 
@@ -972,13 +968,10 @@ async def _fetch_active_care_plans(
     """
     status_expr = FhirResource.data["status"].as_string()
 
-    query = (
-        select(FhirResource.data)
-        .where(
-            FhirResource.patient_id == patient_id,
-            FhirResource.resource_type == "CarePlan",
-            status_expr.in_(_ACTIVE_CARE_PLAN_STATUSES),
-        )
+    query = select(FhirResource.data).where(
+        FhirResource.patient_id == patient_id,
+        FhirResource.resource_type == "CarePlan",
+        status_expr.in_(_ACTIVE_CARE_PLAN_STATUSES),
     )
 
     result = await db.execute(query)
@@ -1013,343 +1006,497 @@ async def _fetch_encounter_fhir_resources(
     return {row.fhir_id: row.data for row in result.all()}
 
 
-async def compile_patient_summary(
-    patient_id: uuid.UUID | str,
-    graph: KnowledgeGraph,
-    db: AsyncSession,
-    compilation_date: date | None = None,
-) -> dict[str, Any]:
-    """Compile a full patient summary via 12-step assembly pipeline.
+class _CompileStages:
+    """Runs and times the stages of compile_patient_summary.
 
-    Assembles a structured summary containing:
-    - Patient orientation narrative
-    - Tier 1: Active conditions with treating meds/care plans/procedures,
-              recently resolved conditions, unlinked medications, allergies,
-              immunizations, standalone care plans
-    - Tier 2: Recent encounters with events and clinical notes
-    - Tier 3: Latest observations by category with trends
-    - Safety constraints derived from Tier 1
-
-    Args:
-        patient_id: The canonical patient UUID.
-        graph: KnowledgeGraph instance for traversal.
-        db: Async SQLAlchemy session.
-        compilation_date: Date to compile against. Defaults to today.
+    Stages are started as tasks in one TaskGroup and await the stages they
+    depend on, so independent reads overlap and compile wall time follows
+    the longest dependency chain rather than the sum of every read.
 
-    Returns:
-        Complete patient summary dict.
+    Graph reads each open their own Neo4j session and run concurrently.
+    Postgres stages share the caller's AsyncSession, which allows one
+    statement at a time, so they are serialized on a lock (their timing
+    starts once the lock is held).
     """
-    if isinstance(patient_id, str):
-        patient_id = uuid.UUID(patient_id)
 
-    if compilation_date is None:
-        compilation_date = date.today()
+    def __init__(self, task_group: asyncio.TaskGroup) -> None:
+        self._task_group = task_group
+        self._db_lock = asyncio.Lock()
+        self.timings: dict[str, float] = {}
+
+    def start(
+        self, name: str, work: Awaitable[_T], *, uses_db: bool = False
+    ) -> asyncio.Task[_T]:
+        """Start a stage as a task; await the task for its result."""
+        return self._task_group.create_task(
+            self.run(name, work, uses_db=uses_db), name=name
+        )
 
-    patient_id_str = str(patient_id)
+    def spawn(self, chain: Coroutine[Any, Any, _T]) -> asyncio.Task[_T]:
+        """Start a chain of stages that awaits its inputs before running."""
+        return self._task_group.create_task(chain)
 
-    # =========================================================================
-    # Step 1: Patient orientation narrative
-    # =========================================================================
-    patient_query = select(FhirResource.data).where(
+    async def run(self, name: str, work: Awaitable[_T], *, uses_db: bool = False) -> _T:
+        """Await one stage, recording its duration in milliseconds."""
+        if uses_db:
+            async with self._db_lock:
+                return await self._timed(name, work)
+        return await self._timed(name, work)
+
+    async def _timed(self, name: str, work: Awaitable[_T]) -> _T:
+        started = time.perf_counter()
+        try:
+            return await work
+        finally:
+            self.timings[name] = (time.perf_counter() - started) * 1000
+
+
+async def _fetch_patient_data(
+    db: AsyncSession,
+    patient_id: uuid.UUID,
+) -> dict[str, Any]:
+    """Fetch the Patient FHIR resource, or {} if it has not been loaded."""
+    query = select(FhirResource.data).where(
         FhirResource.patient_id == patient_id,
         FhirResource.resource_type == "Patient",
     )
-    patient_result = await db.execute(patient_query)
-    patient_row = patient_result.first()
-    patient_data = patient_row.data if patient_row else {}
-    patient_orientation = _build_patient_orientation(patient_data, compilation_date)
+    result = await db.execute(query)
+    row = result.first()
+    return row.data if row else {}
 
-    # =========================================================================
-    # Step 2: Tier 1 — active conditions, meds, allergies, care plans, immunizations
-    # =========================================================================
-    active_conditions = await graph.get_verified_conditions(patient_id_str)
-    active_meds_raw = await graph.get_verified_medications(patient_id_str)
-    allergies_raw = await graph.get_verified_allergies(patient_id_str)
-    immunizations_raw = await graph.get_verified_immunizations(patient_id_str)
-    recently_resolved_raw = await _fetch_recently_resolved_conditions(
-        db, patient_id, compilation_date
-    )
-    care_plans_raw = await _fetch_active_care_plans(db, patient_id)
 
-    # ---- Dedup raw resources BEFORE pruning (pruner strips codes) ----
-    active_conditions = _dedup_by_code(
-        active_conditions, "code", sort_key="onsetDateTime", sort_reverse=True,
-    )
-    active_meds_raw = _dedup_by_code(
-        active_meds_raw, "medicationCodeableConcept",
-        sort_key="authoredOn", sort_reverse=True,
-    )
-    allergies_raw = sorted(
-        _dedup_by_code(allergies_raw, "code"),
-        key=lambda a: _CRITICALITY_PRIORITY.get(
-            a.get("criticality", ""), _CRITICALITY_DEFAULT
-        ),
-    )
-    immunizations_raw = _dedup_by_code(
-        immunizations_raw, "vaccineCode",
-        sort_key="occurrenceDateTime", sort_reverse=True,
-    )
-    recently_resolved_raw = _dedup_by_code(
-        recently_resolved_raw, "code",
-        sort_key="onsetDateTime", sort_reverse=True,
-    )
+def _build_condition_entries(
+    conditions: list[dict[str, Any]],
+    contexts: dict[str, ConditionContext],
+    linked_med_ids: set[str],
+    linked_cp_ids: set[str],
+    seen_cp_ids: set[str],
+) -> list[dict[str, Any]]:
+    """Build Tier 1 condition entries with treating meds, care plans, procedures.
 
-    # For each active condition, compile_node_context to get treating meds,
-    # care plans, procedures
-    tier1_active_conditions: list[dict[str, Any]] = []
-    condition_linked_med_ids: set[str] = set()
-    condition_linked_cp_ids: set[str] = set()
-    # Track care plan IDs across conditions — include only under first condition
-    cross_condition_cp_ids: set[str] = set()
+    Records linked medication/care plan IDs for dedup. A care plan linked to
+    several conditions is only included under the first one (seen_cp_ids is
+    shared across calls so this holds between active and resolved lists).
 
-    for condition in active_conditions:
+    Args:
+        conditions: Deduplicated FHIR Condition dicts.
+        contexts: Graph context per condition FHIR ID, from
+            KnowledgeGraph.get_condition_context_batch.
+        linked_med_ids: Updated with the IDs of treating medications.
+        linked_cp_ids: Updated with the IDs of condition-linked care plans.
+        seen_cp_ids: Care plan IDs already placed under a condition.
+
+    Returns:
+        List of condition entry dicts.
+    """
+    entries: list[dict[str, Any]] = []
+    for condition in conditions:
         cond_fhir_id = _extract_fhir_id(condition)
         if not cond_fhir_id:
             continue
 
-        # Get treating meds, care plans, procedures via graph
-        treating_meds = await graph.get_medications_treating_condition(cond_fhir_id)
-        care_plans = await graph.get_care_plans_for_condition(cond_fhir_id)
-        procedures = await graph.get_procedures_for_condition(cond_fhir_id)
+        context = contexts.get(cond_fhir_id)
+        treating_meds = context["treating_medications"] if context else []
+        care_plans = context["care_plans"] if context else []
+        procedures = context["procedures"] if context else []
 
         # Dedup treating meds by RxNorm code, newest first
         treating_meds = _dedup_by_code(
-            treating_meds, "medicationCodeableConcept",
-            sort_key="authoredOn", sort_reverse=True,
+            treating_meds,
+            "medicationCodeableConcept",
+            sort_key="authoredOn",
+            sort_reverse=True,
         )
 
         # Track linked med/care-plan IDs for dedup
         for med in treating_meds:
             mid = _extract_fhir_id(med)
             if mid:
-                condition_linked_med_ids.add(mid)
+                linked_med_ids.add(mid)
 
         # Cross-condition care plan dedup — only include under first condition
         unique_care_plans = []
         for cp in care_plans:
             cpid = _extract_fhir_id(cp)
             if cpid:
-                condition_linked_cp_ids.add(cpid)
-                if cpid not in cross_condition_cp_ids:
-                    cross_condition_cp_ids.add(cpid)
+                linked_cp_ids.add(cpid)
+                if cpid not in seen_cp_ids:
+                    seen_cp_ids.add(cpid)
                     unique_care_plans.append(cp)
             else:
                 unique_care_plans.append(cp)
 
-        tier1_active_conditions.append({
-            "condition": prune_and_enrich(condition),
-            "treating_medications": [prune_and_enrich(m) for m in treating_meds],
-            "care_plans": [prune_and_enrich(cp) for cp in unique_care_plans],
-            "related_procedures": [prune_and_enrich(p) for p in procedures],
-        })
+        entries.append(
+            {
+                "condition": prune_and_enrich(condition),
+                "treating_medications": [prune_and_enrich(m) for m in treating_meds],
+                "care_plans": [prune_and_enrich(cp) for cp in unique_care_plans],
+                "related_procedures": [prune_and_enrich(p) for p in procedures],
+            }
+        )
+    return entries
 
-    # Recently resolved conditions (same structure, with dedup)
-    tier1_recently_resolved: list[dict[str, Any]] = []
-    for condition in recently_resolved_raw:
-        cond_fhir_id = _extract_fhir_id(condition)
-        if not cond_fhir_id:
-            continue
 
-        treating_meds = await graph.get_medications_treating_condition(cond_fhir_id)
-        care_plans = await graph.get_care_plans_for_condition(cond_fhir_id)
-        procedures = await graph.get_procedures_for_condition(cond_fhir_id)
+async def compile_patient_summary(
+    patient_id: uuid.UUID | str,
+    graph: KnowledgeGraph,
+    db: AsyncSession,
+    compilation_date: date | None = None,
+    *,
+    timings: dict[str, float] | None = None,
+) -> dict[str, Any]:
+    """Compile a full patient summary via 12-step assembly pipeline.
 
-        treating_meds = _dedup_by_code(
-            treating_meds, "medicationCodeableConcept",
-            sort_key="authoredOn", sort_reverse=True,
-        )
+    Assembles a structured summary containing:
+    - Patient orientation narrative
+    - Tier 1: Active conditions with treating meds/care plans/procedures,
+              recently resolved conditions, unlinked medications, allergies,
+              immunizations, standalone care plans
+    - Tier 2: Recent encounters with events and clinical notes
+    - Tier 3: Latest observations by category with trends
+    - Safety constraints derived from Tier 1
 
-        for med in treating_meds:
-            mid = _extract_fhir_id(med)
-            if mid:
-                condition_linked_med_ids.add(mid)
+    The reads behind steps 1-7 run as a DAG of stages (see _CompileStages):
+    the root graph and Postgres reads start together, and the Tier 1,
+    Tier 2 and Tier 3 chains each proceed as soon as their inputs arrive.
+    Steps 8-12 assemble the results once every chain has finished.
 
-        # Cross-condition care plan dedup
-        unique_care_plans = []
-        for cp in care_plans:
-            cpid = _extract_fhir_id(cp)
-            if cpid:
-                condition_linked_cp_ids.add(cpid)
-                if cpid not in cross_condition_cp_ids:
-                    cross_condition_cp_ids.add(cpid)
-                    unique_care_plans.append(cp)
-            else:
-                unique_care_plans.append(cp)
+    Args:
+        patient_id: The canonical patient UUID.
+        graph: KnowledgeGraph instance for traversal.
+        db: Async SQLAlchemy session.
+        compilation_date: Date to compile against. Defaults to today.
+        timings: If given, filled with each stage's duration in milliseconds.
+
+    Returns:
+        Complete patient summary dict.
+    """
+    if isinstance(patient_id, str):
+        patient_id = uuid.UUID(patient_id)
 
-        tier1_recently_resolved.append({
-            "condition": prune_and_enrich(condition),
-            "treating_medications": [prune_and_enrich(m) for m in treating_meds],
-            "care_plans": [prune_and_enrich(cp) for cp in unique_care_plans],
-            "related_procedures": [prune_and_enrich(p) for p in procedures],
-        })
+    if compilation_date is None:
+        compilation_date = date.today()
 
-    # =========================================================================
-    # Step 3: Encounter-inferred medication links for unlinked meds
-    # =========================================================================
-    unlinked_meds = [
-        m for m in active_meds_raw
-        if _extract_fhir_id(m) not in condition_linked_med_ids
-    ]
+    patient_id_str = str(patient_id)
+    started = time.perf_counter()
 
-    inferred_links: dict[str, list[dict[str, Any]]] = {}
-    if unlinked_meds:
-        inferred_links = await infer_medication_condition_links(
-            unlinked_meds, graph, patient_id_str
+    condition_linked_med_ids: set[str] = set()
+    condition_linked_cp_ids: set[str] = set()
+    tier2_resource_fhir_ids: set[str] = set()
+
+    async def tier1_chain() -> tuple[
+        list[dict[str, Any]], list[dict[str, Any]], list[dict[str, Any]]
+    ]:
+        """Steps 2-4: condition context, inferred med links, dose history."""
+        # ---- Dedup raw resources BEFORE pruning (pruner strips codes) ----
+        active_conditions = _dedup_by_code(
+            await conditions_task,
+            "code",
+            sort_key="onsetDateTime",
+            sort_reverse=True,
+        )
+        recently_resolved_raw = _dedup_by_code(
+            await resolved_task,
+            "code",
+            sort_key="onsetDateTime",
+            sort_reverse=True,
         )
 
-    # Merge inferred links into active conditions
-    for cond_entry in tier1_active_conditions:
-        cond_id = cond_entry["condition"].get("id", "")
-        if cond_id in inferred_links:
-            for med in inferred_links[cond_id]:
-                cond_entry["treating_medications"].append(prune_and_enrich(med))
-                mid = _extract_fhir_id(med)
-                if mid:
-                    condition_linked_med_ids.add(mid)
-
-    # Truly unlinked meds (no condition link at all) — dedup by code
-    truly_unlinked = _dedup_by_code(
-        inferred_links.get("unlinked", []),
-        "medicationCodeableConcept",
-        sort_key="authoredOn", sort_reverse=True,
-    )
+        # Treating meds, care plans and procedures for every condition in
+        # one graph query
+        condition_ids = [
+            cid
+            for c in (*active_conditions, *recently_resolved_raw)
+            if (cid := _extract_fhir_id(c))
+        ]
+        contexts = await stages.run(
+            "condition_context", graph.get_condition_context_batch(condition_ids)
+        )
 
-    # =========================================================================
-    # Step 4: Medication recency + dose history for all active meds
-    # =========================================================================
-    # Build lookup for raw meds by fhir_id (avoids O(n) scan per med)
-    raw_meds_by_id: dict[str, dict[str, Any]] = {
-        _extract_fhir_id(m): m for m in active_meds_raw if _extract_fhir_id(m)
-    }
+        # Care plan IDs are tracked across both lists — include only under
+        # the first condition
+        cross_condition_cp_ids: set[str] = set()
+        tier1_active_conditions = _build_condition_entries(
+            active_conditions,
+            contexts,
+            condition_linked_med_ids,
+            condition_linked_cp_ids,
+            cross_condition_cp_ids,
+        )
+        # Recently resolved conditions (same structure, with dedup)
+        tier1_recently_resolved = _build_condition_entries(
+            recently_resolved_raw,
+            contexts,
+            condition_linked_med_ids,
+            condition_linked_cp_ids,
+            cross_condition_cp_ids,
+        )
 
-    # Build enriched meds for tier1 conditions
-    for cond_entry in tier1_active_conditions:
-        enriched_meds = []
-        for med_pruned in cond_entry["treating_medications"]:
-            recency = compute_medication_recency(med_pruned, compilation_date)
+        # =====================================================================
+        # Step 3: Encounter-inferred medication links for unlinked meds
+        # =====================================================================
+        active_meds_raw = _dedup_by_code(
+            await medications_task,
+            "medicationCodeableConcept",
+            sort_key="authoredOn",
+            sort_reverse=True,
+        )
+        unlinked_meds = [
+            m
+            for m in active_meds_raw
+            if _extract_fhir_id(m) not in condition_linked_med_ids
+        ]
+
+        inferred_links: dict[str, list[dict[str, Any]]] = {}
+        if unlinked_meds:
+            inferred_links = await stages.run(
+                "inferred_links",
+                infer_medication_condition_links(unlinked_meds, graph, patient_id_str),
+            )
+
+        # Merge inferred links into active conditions
+        for cond_entry in tier1_active_conditions:
+            cond_id = cond_entry["condition"].get("id", "")
+            if cond_id in inferred_links:
+                for med in inferred_links[cond_id]:
+                    cond_entry["treating_medications"].append(prune_and_enrich(med))
+                    mid = _extract_fhir_id(med)
+                    if mid:
+                        condition_linked_med_ids.add(mid)
+
+        # Truly unlinked meds (no condition link at all) — dedup by code
+        truly_unlinked = _dedup_by_code(
+            inferred_links.get("unlinked", []),
+            "medicationCodeableConcept",
+            sort_key="authoredOn",
+            sort_reverse=True,
+        )
+
+        # =====================================================================
+        # Step 4: Medication recency + dose history for all active meds
+        # =====================================================================
+        # Build lookup for raw meds by fhir_id (avoids O(n) scan per med)
+        raw_meds_by_id: dict[str, dict[str, Any]] = {
+            _extract_fhir_id(m): m for m in active_meds_raw if _extract_fhir_id(m)
+        }
+
+        # Recency on the pruned meds; dose history needs the raw data
+        dose_targets: list[tuple[dict[str, Any], dict[str, Any]]] = []
+        for cond_entry in tier1_active_conditions:
+            for med_pruned in cond_entry["treating_medications"]:
+                recency = compute_medication_recency(med_pruned, compilation_date)
+                if recency:
+                    med_pruned.update(recency)
+                raw_med = raw_meds_by_id.get(med_pruned.get("id", ""))
+                if raw_med:
+                    dose_targets.append((med_pruned, raw_med))
+
+        # Enrich unlinked meds
+        enriched_unlinked: list[dict[str, Any]] = []
+        for med in truly_unlinked:
+            pruned = prune_and_enrich(med)
+            recency = compute_medication_recency(med, compilation_date)
             if recency:
-                med_pruned.update(recency)
-            # Dose history requires DB query on raw data
-            med_fhir_id = med_pruned.get("id", "")
-            raw_med = raw_meds_by_id.get(med_fhir_id)
-            if raw_med:
-                dose_history = await compute_dose_history(db, patient_id, raw_med)
+                pruned.update(recency)
+            dose_targets.append((pruned, med))
+            enriched_unlinked.append(pruned)
+
+        # Dose history for every med in one query
+        if dose_targets:
+            histories = await stages.run(
+                "dose_history",
+                compute_dose_history_batch(
+                    db, patient_id, [raw for _, raw in dose_targets]
+                ),
+                uses_db=True,
+            )
+            for (pruned, _), dose_history in zip(dose_targets, histories):
                 if dose_history:
-                    med_pruned["_dose_history"] = dose_history
-            enriched_meds.append(med_pruned)
-        cond_entry["treating_medications"] = enriched_meds
-
-    # Enrich unlinked meds
-    enriched_unlinked: list[dict[str, Any]] = []
-    for med in truly_unlinked:
-        pruned = prune_and_enrich(med)
-        recency = compute_medication_recency(med, compilation_date)
-        if recency:
-            pruned.update(recency)
-        dose_history = await compute_dose_history(db, patient_id, med)
-        if dose_history:
-            pruned["_dose_history"] = dose_history
-        enriched_unlinked.append(pruned)
+                    pruned["_dose_history"] = dose_history
 
-    # =========================================================================
-    # Step 5: Tier 2 — recent encounters with events and clinical notes
-    # =========================================================================
-    six_months_ago = (compilation_date - timedelta(days=180)).isoformat()
+        return tier1_active_conditions, tier1_recently_resolved, enriched_unlinked
 
-    # Get encounters sorted by date desc from graph
-    all_encounters = await graph.get_patient_encounters(patient_id_str)
+    async def tier2_chain() -> list[dict[str, Any]]:
+        """Step 5: recent encounters with events and clinical notes."""
+        six_months_ago = (compilation_date - timedelta(days=180)).isoformat()
 
-    # Fetch full encounter FHIR resources for recent window + last encounter
-    recent_enc_ids = []
-    for enc in all_encounters:
-        period_start = enc.get("period_start", "")
-        if period_start and period_start >= six_months_ago:
-            recent_enc_ids.append(enc["fhir_id"])
+        # Encounters come from the graph sorted by date desc
+        all_encounters = await encounters_task
 
-    # Ensure we have at least the most recent encounter
-    if all_encounters and all_encounters[0]["fhir_id"] not in recent_enc_ids:
-        recent_enc_ids.insert(0, all_encounters[0]["fhir_id"])
+        # Fetch full encounter FHIR resources for recent window + last encounter
+        recent_enc_ids = []
+        for enc in all_encounters:
+            period_start = enc.get("period_start", "")
+            if period_start and period_start >= six_months_ago:
+                recent_enc_ids.append(enc["fhir_id"])
 
-    encounter_resources = await _fetch_encounter_fhir_resources(
-        db, patient_id, recent_enc_ids
-    )
+        # Ensure we have at least the most recent encounter
+        if all_encounters and all_encounters[0]["fhir_id"] not in recent_enc_ids:
+            recent_enc_ids.insert(0, all_encounters[0]["fhir_id"])
 
-    # Find the last AMB encounter, fall back to any class
-    last_amb_fhir_id = None
-    for enc_fhir_id in recent_enc_ids:
-        enc_data = encounter_resources.get(enc_fhir_id, {})
-        class_code = enc_data.get("class", {}).get("code", "")
-        if class_code == "AMB":
-            last_amb_fhir_id = enc_fhir_id
-            break
-
-    if not last_amb_fhir_id and recent_enc_ids:
-        last_amb_fhir_id = recent_enc_ids[0]
-
-    # Build Tier 2 encounter list (ordered by date desc)
-    tier2_enc_fhir_ids = []
-    if last_amb_fhir_id:
-        tier2_enc_fhir_ids.append(last_amb_fhir_id)
-    for enc_id in recent_enc_ids:
-        if enc_id != last_amb_fhir_id and enc_id not in tier2_enc_fhir_ids:
-            tier2_enc_fhir_ids.append(enc_id)
-
-    tier2_encounters: list[dict[str, Any]] = []
-    tier2_resource_fhir_ids: set[str] = set()
+        encounter_resources = await stages.run(
+            "encounter_resources",
+            _fetch_encounter_fhir_resources(db, patient_id, recent_enc_ids),
+            uses_db=True,
+        )
 
-    for enc_fhir_id in tier2_enc_fhir_ids:
-        enc_data = encounter_resources.get(enc_fhir_id)
-        if not enc_data:
-            continue
+        # Find the last AMB encounter, fall back to any class
+        last_amb_fhir_id = None
+        for enc_fhir_id in recent_enc_ids:
+            enc_data = encounter_resources.get(enc_fhir_id, {})
+            class_code = enc_data.get("class", {}).get("code", "")
+            if class_code == "AMB":
+                last_amb_fhir_id = enc_fhir_id
+                break
 
-        # Get encounter events via graph
-        events = await graph.get_encounter_events(enc_fhir_id)
+        if not last_amb_fhir_id and recent_enc_ids:
+            last_amb_fhir_id = recent_enc_ids[0]
+
+        # Build Tier 2 encounter list (ordered by date desc)
+        tier2_enc_fhir_ids = []
+        if last_amb_fhir_id:
+            tier2_enc_fhir_ids.append(last_amb_fhir_id)
+        for enc_id in recent_enc_ids:
+            if enc_id != last_amb_fhir_id and enc_id not in tier2_enc_fhir_ids:
+                tier2_enc_fhir_ids.append(enc_id)
+        tier2_enc_fhir_ids = [
+            enc_id for enc_id in tier2_enc_fhir_ids if enc_id in encounter_resources
+        ]
 
-        # Track all resource IDs from events for dedup
-        for event_list in events.values():
-            for event_resource in event_list:
-                eid = _extract_fhir_id(event_resource)
-                if eid:
-                    tier2_resource_fhir_ids.add(eid)
+        # Get encounter events via graph, all encounters in one query
+        events_by_encounter = await stages.run(
+            "encounter_events",
+            graph.get_encounter_events_batch(patient_id_str, tier2_enc_fhir_ids),
+        )
 
-        # Compile events into pruned format grouped by relationship type
-        pruned_events: dict[str, list[dict[str, Any]]] = {}
+        tier2_encounters: list[dict[str, Any]] = []
+        for enc_fhir_id in tier2_enc_fhir_ids:
+            events = events_by_encounter[enc_fhir_id]
+            # Track all resource IDs from events for dedup
+            for event_list in events.values():
+                for event_resource in event_list:
+                    eid = _extract_fhir_id(event_resource)
+                    if eid:
+                        tier2_resource_fhir_ids.add(eid)
+
+            # Compile events into pruned format grouped by relationship type
+            pruned_events: dict[str, list[dict[str, Any]]] = {}
+
+            for event_key, rel_type in _EVENT_TYPE_MAP.items():
+                event_resources = events.get(event_key, [])
+                if event_resources:
+                    pruned_events[rel_type] = [
+                        prune_and_enrich(r) for r in event_resources
+                    ]
+
+            tier2_encounters.append(
+                {
+                    "encounter": prune_and_enrich(encounter_resources[enc_fhir_id]),
+                    "events": pruned_events,
+                }
+            )
+        return tier2_encounters
+
+    async def tier3_chain() -> tuple[
+        dict[str, list[dict[str, Any]]], dict[str, dict[str, Any]]
+    ]:
+        """Steps 6-7: latest observations by category with trends."""
+        tier3_raw = await stages.run(
+            "latest_observations",
+            get_latest_observations_by_category(db, patient_id),
+            uses_db=True,
+        )
 
-        for event_key, rel_type in _EVENT_TYPE_MAP.items():
-            event_resources = events.get(event_key, [])
-            if event_resources:
-                pruned_events[rel_type] = [
-                    prune_and_enrich(r) for r in event_resources
-                ]
+        all_tier3_obs: list[dict[str, Any]] = []
+        for obs_list in tier3_raw.values():
+            all_tier3_obs.extend(obs_list)
+
+        patient_data = await patient_task
+        enriched_obs = await stages.run(
+            "observation_trends",
+            compute_observation_trends(
+                db,
+                patient_id,
+                all_tier3_obs,
+                patient_sex=patient_data.get("gender"),
+            ),
+            uses_db=True,
+        )
 
-        tier2_encounters.append({
-            "encounter": prune_and_enrich(enc_data),
-            "events": pruned_events,
-        })
+        # Rebuild tier3 with trends by category
+        enriched_obs_by_id: dict[str, dict[str, Any]] = {}
+        for obs in enriched_obs:
+            oid = _extract_fhir_id(obs)
+            if oid:
+                enriched_obs_by_id[oid] = obs
+        return tier3_raw, enriched_obs_by_id
 
     # =========================================================================
-    # Step 6: Tier 3 — latest observations by category
+    # Steps 1-7: root reads and the three tier chains, run concurrently
     # =========================================================================
-    tier3_raw = await get_latest_observations_by_category(db, patient_id)
+    try:
+        async with asyncio.TaskGroup() as task_group:
+            stages = _CompileStages(task_group)
 
-    # =========================================================================
-    # Step 7: Observation trends
-    # =========================================================================
-    all_tier3_obs: list[dict[str, Any]] = []
-    for obs_list in tier3_raw.values():
-        all_tier3_obs.extend(obs_list)
+            # Step 1 (patient) and the Step 2/5 roots depend on nothing
+            patient_task = stages.start(
+                "patient", _fetch_patient_data(db, patient_id), uses_db=True
+            )
+            conditions_task = stages.start(
+                "conditions", graph.get_verified_conditions(patient_id_str)
+            )
+            medications_task = stages.start(
+                "medications", graph.get_verified_medications(patient_id_str)
+            )
+            allergies_task = stages.start(
+                "allergies", graph.get_verified_allergies(patient_id_str)
+            )
+            immunizations_task = stages.start(
+                "immunizations", graph.get_verified_immunizations(patient_id_str)
+            )
+            encounters_task = stages.start(
+                "encounters", graph.get_patient_encounters(patient_id_str)
+            )
+            resolved_task = stages.start(
+                "recently_resolved",
+                _fetch_recently_resolved_conditions(db, patient_id, compilation_date),
+                uses_db=True,
+            )
+            care_plans_task = stages.start(
+                "care_plans", _fetch_active_care_plans(db, patient_id), uses_db=True
+            )
+
+            tier1_task = stages.spawn(tier1_chain())
+            tier2_task = stages.spawn(tier2_chain())
+            tier3_task = stages.spawn(tier3_chain())
+    except ExceptionGroup as group:
+        # Surface the first failure itself, as the sequential pipeline did;
+        # the other stages have already been cancelled.
+        raise group.exceptions[0] from None
 
-    enriched_obs = await compute_observation_trends(
-        db, patient_id, all_tier3_obs,
-        patient_sex=patient_data.get("gender"),
+    tier1_active_conditions, tier1_recently_resolved, enriched_unlinked = (
+        tier1_task.result()
+    )
+    tier2_encounters = tier2_task.result()
+    tier3_raw, enriched_obs_by_id = tier3_task.result()
+    patient_orientation = _build_patient_orientation(
+        patient_task.result(), compilation_date
     )
 
-    # Rebuild tier3 with trends by category
-    enriched_obs_by_id: dict[str, dict[str, Any]] = {}
-    for obs in enriched_obs:
-        oid = _extract_fhir_id(obs)
-        if oid:
-            enriched_obs_by_id[oid] = obs
+    # ---- Dedup raw resources BEFORE pruning (pruner strips codes) ----
+    allergies_raw = sorted(
+        _dedup_by_code(allergies_task.result(), "code"),
+        key=lambda a: _CRITICALITY_PRIORITY.get(
+            a.get("criticality", ""), _CRITICALITY_DEFAULT
+        ),
+    )
+    immunizations_raw = _dedup_by_code(
+        immunizations_task.result(),
+        "vaccineCode",
+        sort_key="occurrenceDateTime",
+        sort_reverse=True,
+    )
+    care_plans_raw = care_plans_task.result()
 
     # =========================================================================
     # Step 8: Dedup Tier 3 vs Tier 2 by fhir_id
@@ -1378,8 +1525,7 @@ async def compile_patient_summary(
         prescribed = enc_entry["events"].get("PRESCRIBED", [])
         if prescribed:
             enc_entry["events"]["PRESCRIBED"] = [
-                m for m in prescribed
-                if m.get("id", "") not in condition_linked_med_ids
+                m for m in prescribed if m.get("id", "") not in condition_linked_med_ids
             ]
 
     # =========================================================================
@@ -1387,19 +1533,24 @@ async def compile_patient_summary(
     # =========================================================================
     safety_allergies = [prune_and_enrich(a) for a in allergies_raw]
     safety_constraints: dict[str, Any] = {
-        "active_allergies": safety_allergies if safety_allergies else [{"note": "None recorded"}],
+        "active_allergies": safety_allergies
+        if safety_allergies
+        else [{"note": "None recorded"}],
         "drug_interactions_note": "Review active medications for potential interactions.",
     }
 
     # =========================================================================
     # Step 11: Prune + enrich remaining resources
     # =========================================================================
-    tier1_allergies = safety_allergies if safety_allergies else [{"note": "None recorded"}]
+    tier1_allergies = (
+        safety_allergies if safety_allergies else [{"note": "None recorded"}]
+    )
     tier1_immunizations = [prune_and_enrich(im) for im in immunizations_raw]
 
     # Standalone care plans not linked to any condition
     tier1_care_plans = [
-        prune_and_enrich(cp) for cp in care_plans_raw
+        prune_and_enrich(cp)
+        for cp in care_plans_raw
         if _extract_fhir_id(cp) not in condition_linked_cp_ids
     ]
 
@@ -1423,6 +1574,16 @@ async def compile_patient_summary(
     summary["tier3_latest_observations"] = tier3_by_category
     summary["safety_constraints"] = safety_constraints
 
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(
+        "Compiled summary for patient %s in %.0fms (%s)",
+        patient_id,
+        elapsed_ms,
+        ", ".join(f"{name}={ms:.0f}ms" for name, ms in stages.timings.items()),
+    )
+    if timings is not None:
+        timings.update(stages.timings)
+
     return summary
 
 
@@ -1436,11 +1597,10 @@ async def compile_and_store(
     graph: KnowledgeGraph,
     db: AsyncSession,
 ) -> dict[str, Any]:
-    """Compile a patient summary and persist it to the Patient FhirResource row.
+    """Compile a patient summary and persist it for the Patient FhirResource row.
 
-    Calls compile_patient_summary, then writes the result to the
-    compiled_summary JSONB column and sets compiled_at on the Patient's
-    FhirResource row.
+    Calls compile_patient_summary, then upserts the result and compiled_at
+    into patient_summaries, keyed by the Patient row's id.
 
     Args:
         patient_id: The canonical patient UUID.
@@ -1458,19 +1618,31 @@ async def compile_and_store(
 
     summary = await compile_patient_summary(patient_id, graph, db)
 
-    # Fetch the Patient FhirResource row
+    # Only the Patient row's id is needed, not its data
     result = await db.execute(
-        select(FhirResource).where(
+        select(FhirResource.id).where(
             FhirResource.patient_id == patient_id,
             FhirResource.resource_type == "Patient",
         )
     )
-    patient_row = result.scalar_one_or_none()
-    if patient_row is None:
+    patient_row_id = result.scalar_one_or_none()
+    if patient_row_id is None:
         raise ValueError(f"No Patient FhirResource found for patient_id={patient_id}")
 
-    patient_row.compiled_summary = summary
-    patient_row.compiled_at = datetime.now(timezone.utc)
+    stmt = pg_insert(PatientSummary).values(
+        patient_id=patient_row_id,
+        compiled_summary=summary,
+        compiled_at=datetime.now(timezone.utc),
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[PatientSummary.patient_id],
+            set_={
+                "compiled_summary": stmt.excluded.compiled_summary,
+                "compiled_at": stmt.excluded.compiled_at,
+            },
+        )
+    )
 
     logger.info("Compiled and stored summary for patient %s", patient_id)
     return summary
@@ -1493,12 +1665,11 @@ async def get_compiled_summary(
         patient_id = uuid.UUID(patient_id)
 
     result = await db.execute(
-        select(FhirResource.compiled_summary).where(
+        select(PatientSummary.compiled_summary)
+        .join(FhirResource, FhirResource.id == PatientSummary.patient_id)
+        .where(
             FhirResource.patient_id == patient_id,
             FhirResource.resource_type == "Patient",
         )
     )
-    row = result.first()
-    if row is None:
-        return None
-    return row.compiled_summary
+    return result.scalar_one_or_none()
@@ -0,0 +1,169 @@
+"""Persistent embedding cache in front of EmbeddingService.
+
+Texts are looked up by embedding_cache_key(model, text) in the
+embedding_cache table; only misses are sent to the embedding API, and their
+vectors are written back in a short transaction of their own. Duplicates
+within one call are embedded once. Process-wide hit/miss counters are kept
+in cache_stats.
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import EmbeddingCache
+from app.services.embeddings import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+# Keys per lookup statement / rows per insert statement
+CACHE_LOOKUP_BATCH_SIZE = 1000
+CACHE_INSERT_BATCH_SIZE = 200
+
+
+def embedding_cache_key(model: str, text: str) -> str:
+    """SHA-256 hex of model and text (NUL-separated)."""
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class EmbeddingCacheStats:
+    """Cache hit/miss counters.
+
+    A hit is a text served without an API call (from the table, or a
+    duplicate of another text in the same call); a miss is a text sent to
+    the embedding API.
+    """
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of texts served from the cache (0.0 when unused)."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# Process-wide counters
+cache_stats = EmbeddingCacheStats()
+
+
+async def embed_texts_cached(
+    db: AsyncSession,
+    service: EmbeddingService,
+    texts: list[str],
+    stats: EmbeddingCacheStats | None = None,
+) -> list[list[float]]:
+    """Embed texts, using and filling the persistent cache.
+
+    Lookups run on the caller's session. New vectors are written through a
+    separate session on the same engine and committed at once: a loader
+    holding its transaction open through graph and compile work would
+    otherwise keep other loaders waiting on the shared keys it inserted.
+    A failed write is logged and skipped; the vectors are still returned.
+
+    Args:
+        db: Async SQLAlchemy session.
+        service: EmbeddingService used for cache misses.
+        texts: Texts to embed.
+        stats: Counters to update in addition to cache_stats.
+
+    Returns:
+        One embedding vector per input text, in input order.
+
+    Raises:
+        ValueError: If texts list is empty.
+    """
+    if not texts:
+        raise ValueError("texts list cannot be empty")
+
+    model = service.model
+    keys = [embedding_cache_key(model, text) for text in texts]
+    text_by_key = dict(zip(keys, texts))
+
+    vectors = await _lookup(db, list(text_by_key))
+    missing = [key for key in text_by_key if key not in vectors]
+    if missing:
+        embedded = await service.embed_texts([text_by_key[key] for key in missing])
+        new_vectors = dict(zip(missing, embedded))
+        await _insert(db, model, new_vectors)
+        vectors.update(new_vectors)
+
+    hits = len(texts) - len(missing)
+    for counters in (cache_stats, stats):
+        if counters is not None:
+            counters.hits += hits
+            counters.misses += len(missing)
+    logger.debug(
+        "Embedding cache: %d hits, %d misses (%.0f%% process hit rate)",
+        hits,
+        len(missing),
+        cache_stats.hit_rate * 100,
+    )
+
+    return [vectors[key] for key in keys]
+
+
+async def embed_text_cached(
+    db: AsyncSession,
+    service: EmbeddingService,
+    text: str,
+) -> list[float]:
+    """Embed a single text through the cache (e.g. a search query)."""
+    embeddings = await embed_texts_cached(db, service, [text])
+    return embeddings[0]
+
+
+async def _lookup(db: AsyncSession, keys: list[str]) -> dict[str, list[float]]:
+    """Fetch cached vectors for the given keys."""
+    found: dict[str, list[float]] = {}
+    for i in range(0, len(keys), CACHE_LOOKUP_BATCH_SIZE):
+        result = await db.execute(
+            select(EmbeddingCache.key, EmbeddingCache.embedding).where(
+                EmbeddingCache.key.in_(keys[i : i + CACHE_LOOKUP_BATCH_SIZE])
+            )
+        )
+        for row in result.all():
+            found[row.key] = _as_list(row.embedding)
+    return found
+
+
+def _cache_writer(db: AsyncSession) -> AsyncSession:
+    """A new session on the caller's engine, for committing cache rows."""
+    return AsyncSession(db.bind, expire_on_commit=False)
+
+
+async def _insert(
+    db: AsyncSession, model: str, vectors: dict[str, list[float]]
+) -> None:
+    """Insert and commit new cache rows, ignoring keys inserted first elsewhere."""
+    # Sorted so concurrent writers take row locks in the same order; each
+    # call commits on its own, so no lock outlives it
+    rows = [
+        {"key": key, "model": model, "embedding": vectors[key]}
+        for key in sorted(vectors)
+    ]
+    try:
+        async with _cache_writer(db) as writer:
+            for i in range(0, len(rows), CACHE_INSERT_BATCH_SIZE):
+                stmt = pg_insert(EmbeddingCache).values(
+                    rows[i : i + CACHE_INSERT_BATCH_SIZE]
+                )
+                await writer.execute(
+                    stmt.on_conflict_do_nothing(index_elements=["key"])
+                )
+            await writer.commit()
+    except Exception as e:
+        # The vectors are already computed; only their reuse is lost
+        logger.warning("Failed to store %d embedding cache rows: %s", len(rows), e)
+
+
+def _as_list(vector: Any) -> list[float]:
+    """Convert a pgvector value (numpy array) to a plain list."""
+    return vector.tolist() if hasattr(vector, "tolist") else list(vector)
@@ -1,9 +1,21 @@
-"""Embedding service for FHIR resources using OpenAI text-embedding-3-small."""
+"""Embedding service for FHIR resources.
 
+Embeddings come from a pluggable backend: OpenAI text-embedding-3-small by
+default, or a local sentence-transformers model run on CPU in a thread pool
+(EMBEDDING_BACKEND=local) for offline, low-latency operation.
+"""
+
+import asyncio
+import importlib.util
 import logging
+import random
+import threading
+import time
 from collections.abc import Callable
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Protocol
 
+import openai
 from openai import AsyncOpenAI
 
 from app.config import settings
@@ -13,12 +25,38 @@ logger = logging.getLogger(__name__)
 # Default embedding model
 DEFAULT_MODEL = "text-embedding-3-small"
 
-# Embedding dimension for text-embedding-3-small
-EMBEDDING_DIMENSION = 1536
+# Default model for the local backend (384 dimensions)
+DEFAULT_LOCAL_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Embedding dimension of the pgvector columns (EMBEDDING_DIMENSION setting);
+# every backend must produce vectors of this size
+EMBEDDING_DIMENSION = settings.embedding_dimension
+
+# Native output size of OpenAI models; other sizes are requested via the
+# API's dimensions parameter
+_OPENAI_NATIVE_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
 
 # Maximum texts per batch (OpenAI limit is 2048, but we use a conservative default)
 MAX_BATCH_SIZE = 100
 
+# Estimated tokens per request; batches are cut at whichever limit comes first
+MAX_BATCH_TOKENS = 16_000
+
+# Concurrent embedding requests per EmbeddingService.embed_texts call
+MAX_CONCURRENT_REQUESTS = 8
+
+# Retries for 429 / 5xx / connection errors, with exponential backoff + jitter
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+# Rough characters-per-token ratio for English text (no tokenizer dependency)
+_CHARS_PER_TOKEN = 4
+
 
 # =============================================================================
 # FHIR Resource Text Templates
@@ -72,7 +110,9 @@ def _template_observation(resource: dict[str, Any]) -> str:
     elif "valueCodeableConcept" in resource:
         vcc = resource["valueCodeableConcept"]
         vcc_codings = vcc.get("coding", [])
-        value_str = vcc_codings[0].get("display", "") if vcc_codings else vcc.get("text", "")
+        value_str = (
+            vcc_codings[0].get("display", "") if vcc_codings else vcc.get("text", "")
+        )
     elif "valueString" in resource:
         value_str = resource["valueString"]
     elif "valueBoolean" in resource:
@@ -292,7 +332,9 @@ def _template_document_reference(resource: dict[str, Any]) -> str:
     # Type
     type_obj = resource.get("type", {})
     type_codings = type_obj.get("coding", [])
-    type_display = type_codings[0].get("display", "") if type_codings else type_obj.get("text", "")
+    type_display = (
+        type_codings[0].get("display", "") if type_codings else type_obj.get("text", "")
+    )
 
     status = resource.get("status", "")
     date = resource.get("date", "")
@@ -482,7 +524,9 @@ def _template_device(resource: dict[str, Any]) -> str:
     """
     type_obj = resource.get("type", {})
     type_codings = type_obj.get("coding", [])
-    display = type_codings[0].get("display", "") if type_codings else type_obj.get("text", "")
+    display = (
+        type_codings[0].get("display", "") if type_codings else type_obj.get("text", "")
+    )
 
     status = resource.get("status", "")
     manufacture_date = resource.get("manufactureDate", "")
@@ -714,6 +758,304 @@ def resource_to_text(resource: dict[str, Any]) -> str | None:
     return template_fn(resource)
 
 
+# =============================================================================
+# Rate Limiting
+# =============================================================================
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text (about 4 characters per token)."""
+    return len(text) // _CHARS_PER_TOKEN + 1
+
+
+class TokenBucketLimiter:
+    """Token buckets for requests/minute and tokens/minute.
+
+    Each bucket holds up to one minute of budget and refills continuously.
+    acquire() waits until both buckets can cover a request, so concurrent
+    callers stay under the provider's RPM and TPM limits instead of
+    bouncing off 429s.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int) -> None:
+        if requests_per_minute < 1 or tokens_per_minute < 1:
+            raise ValueError("rate limits must be positive")
+        self._request_capacity = float(requests_per_minute)
+        self._token_capacity = float(tokens_per_minute)
+        self._requests = self._request_capacity
+        self._tokens = self._token_capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(
+            self._request_capacity,
+            self._requests + elapsed * self._request_capacity / 60,
+        )
+        self._tokens = min(
+            self._token_capacity,
+            self._tokens + elapsed * self._token_capacity / 60,
+        )
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until one request of the given token cost is allowed."""
+        # A request larger than a full bucket would never fit; let it drain it
+        tokens = min(float(tokens), self._token_capacity)
+        # The lock keeps waiters first-come first-served
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                wait = max(
+                    (1 - self._requests) * 60 / self._request_capacity,
+                    (tokens - self._tokens) * 60 / self._token_capacity,
+                )
+                await asyncio.sleep(wait)
+
+
+# One limiter per model, shared by every EmbeddingService in the process
+_rate_limiters: dict[str, TokenBucketLimiter] = {}
+
+
+def get_rate_limiter(model: str) -> TokenBucketLimiter:
+    """Return the process-wide limiter for an embedding model."""
+    if model not in _rate_limiters:
+        _rate_limiters[model] = TokenBucketLimiter(
+            settings.embedding_requests_per_minute,
+            settings.embedding_tokens_per_minute,
+        )
+    return _rate_limiters[model]
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and transport failures are retried."""
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Backoff for a retry: the server's Retry-After if given, else
+    exponential with jitter."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    delay = min(RETRY_BASE_DELAY * 2**attempt, RETRY_MAX_DELAY)
+    return delay * (0.5 + random.random() / 2)
+
+
+def _token_batches(
+    texts: list[str], max_items: int, max_tokens: int
+) -> list[tuple[int, list[str], int]]:
+    """Split texts into (offset, batch, estimated tokens) by item and token caps."""
+    batches: list[tuple[int, list[str], int]] = []
+    start = 0
+    batch: list[str] = []
+    batch_tokens = 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if batch and (len(batch) >= max_items or batch_tokens + tokens > max_tokens):
+            batches.append((start, batch, batch_tokens))
+            start, batch, batch_tokens = i, [], 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        batches.append((start, batch, batch_tokens))
+    return batches
+
+
+# =============================================================================
+# Embedding Backends
+# =============================================================================
+
+
+class EmbeddingBackend(Protocol):
+    """A source of embedding vectors for batches of texts."""
+
+    # Model identifier (part of the embedding cache key)
+    model: str
+    # Remote backends go through the rate limiter and retry loop
+    remote: bool
+
+    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        """Embed one batch, returning one vector per text in order."""
+        ...
+
+    async def close(self) -> None:
+        """Release resources held by the backend."""
+        ...
+
+
+class OpenAIEmbeddingBackend:
+    """OpenAI embeddings API backend (one request per batch)."""
+
+    remote = True
+
+    def __init__(
+        self,
+        client: AsyncOpenAI | None = None,
+        model: str = DEFAULT_MODEL,
+        dimensions: int = EMBEDDING_DIMENSION,
+    ):
+        if client is not None:
+            self._client = client
+        else:
+            # Retries are handled by EmbeddingService, behind the rate limiter
+            self._client = AsyncOpenAI(api_key=settings.openai_api_key, max_retries=0)
+        self.model = model
+        # Only send dimensions when shortening a model's native output
+        native = _OPENAI_NATIVE_DIMENSIONS.get(model)
+        self._dimensions = dimensions if native and dimensions != native else None
+
+    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        kwargs: dict[str, Any] = {}
+        if self._dimensions is not None:
+            kwargs["dimensions"] = self._dimensions
+        response = await self._client.embeddings.create(
+            model=self.model, input=texts, **kwargs
+        )
+        # Extract embeddings in order
+        return [item.embedding for item in response.data]
+
+    async def close(self) -> None:
+        """Close the OpenAI client connection.
+
+        Note: AsyncOpenAI manages its own connection pool and doesn't strictly
+        require explicit cleanup, but this method is provided for consistency
+        with other services (e.g., KnowledgeGraph).
+        """
+        await self._client.close()
+
+
+# Raised when EMBEDDING_BACKEND=local is used without the optional extra
+_LOCAL_BACKEND_MISSING = (
+    "EMBEDDING_BACKEND=local requires the sentence-transformers package; "
+    "install the local-embeddings extra (uv sync --extra local-embeddings, "
+    "or pip install 'cruxmd-backend[local-embeddings]')"
+)
+
+# Loaded local models, shared across services (loading takes seconds)
+_local_models: dict[str, Any] = {}
+_local_models_lock = threading.Lock()
+
+# Single worker: the model parallelizes internally, more threads only contend
+_local_executor: ThreadPoolExecutor | None = None
+
+
+def _get_local_executor() -> ThreadPoolExecutor:
+    global _local_executor
+    if _local_executor is None:
+        _local_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="local-embed"
+        )
+    return _local_executor
+
+
+def _load_local_model(model: str, device: str) -> Any:
+    """Load (once per process) a sentence-transformers model."""
+    with _local_models_lock:
+        if model not in _local_models:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as e:
+                raise RuntimeError(_LOCAL_BACKEND_MISSING) from e
+            _local_models[model] = SentenceTransformer(model, device=device)
+        return _local_models[model]
+
+
+class LocalEmbeddingBackend:
+    """In-process sentence-transformers backend, run in a thread pool.
+
+    The model is loaded lazily on first use and cached per process. Vectors
+    are L2-normalized, matching the cosine-distance index.
+    """
+
+    remote = False
+
+    def __init__(
+        self,
+        model: str = DEFAULT_LOCAL_MODEL,
+        device: str = "cpu",
+        dimensions: int = EMBEDDING_DIMENSION,
+        encoder: Any | None = None,
+    ):
+        """
+        Args:
+            model: sentence-transformers model name or local path.
+            device: Torch device ("cpu", "cuda", ...).
+            dimensions: Expected vector size; checked against the model.
+            encoder: Pre-loaded model with encode() (for testing).
+        """
+        self.model = model
+        self._device = device
+        self._dimensions = dimensions
+        self._encoder = encoder
+
+    def _encode(self, texts: list[str]) -> list[list[float]]:
+        if self._encoder is None:
+            self._encoder = _load_local_model(self.model, self._device)
+        model_dimensions = self._encoder.get_sentence_embedding_dimension()
+        if model_dimensions != self._dimensions:
+            raise ValueError(
+                f"Local embedding model {self.model} produces {model_dimensions}"
+                f"-dimensional vectors but EMBEDDING_DIMENSION is {self._dimensions}"
+            )
+        vectors = self._encoder.encode(
+            texts, normalize_embeddings=True, convert_to_numpy=True
+        )
+        return [vector.tolist() for vector in vectors]
+
+    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_local_executor(), self._encode, texts)
+
+    async def close(self) -> None:
+        """No-op: the loaded model is shared and kept for reuse."""
+
+
+def create_embedding_backend(
+    model: str | None = None,
+    client: AsyncOpenAI | None = None,
+) -> EmbeddingBackend:
+    """Build the backend selected by the EMBEDDING_BACKEND setting.
+
+    Args:
+        model: Model override; defaults to EMBEDDING_MODEL, then the
+            backend's default model.
+        client: Pre-configured AsyncOpenAI client; implies the OpenAI backend.
+
+    Raises:
+        ValueError: If EMBEDDING_BACKEND is not "openai" or "local".
+        RuntimeError: If EMBEDDING_BACKEND is "local" but sentence-transformers
+            is not installed.
+    """
+    model = model or settings.embedding_model or None
+    if client is not None or settings.embedding_backend == "openai":
+        return OpenAIEmbeddingBackend(client=client, model=model or DEFAULT_MODEL)
+    if settings.embedding_backend == "local":
+        # Fail at startup rather than on the first embedding request
+        if importlib.util.find_spec("sentence_transformers") is None:
+            raise RuntimeError(_LOCAL_BACKEND_MISSING)
+        return LocalEmbeddingBackend(
+            model=model or DEFAULT_LOCAL_MODEL,
+            device=settings.local_embedding_device,
+        )
+    raise ValueError(
+        f"Unknown EMBEDDING_BACKEND {settings.embedding_backend!r} "
+        "(expected 'openai' or 'local')"
+    )
+
+
 # =============================================================================
 # Embedding Service
 # =============================================================================
@@ -721,10 +1063,11 @@ def resource_to_text(resource: dict[str, Any]) -> str | None:
 
 class EmbeddingService:
     """
-    Embedding service using OpenAI text-embedding-3-small.
+    Embedding service over a pluggable EmbeddingBackend.
 
     Provides methods to embed text and FHIR resources, with batch support
-    to minimize API calls.
+    to minimize API calls. The backend comes from the EMBEDDING_BACKEND
+    setting unless one is passed in.
 
     Example:
         # Production usage
@@ -734,36 +1077,46 @@ class EmbeddingService:
         # Testing with mock client
         mock_client = MockAsyncOpenAI()
         service = EmbeddingService(client=mock_client)
+
+        # Explicit local backend
+        service = EmbeddingService(backend=LocalEmbeddingBackend())
     """
 
     def __init__(
         self,
         client: AsyncOpenAI | None = None,
-        model: str = DEFAULT_MODEL,
+        model: str | None = None,
+        rate_limiter: TokenBucketLimiter | None = None,
+        max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+        backend: EmbeddingBackend | None = None,
     ):
         """
         Initialize EmbeddingService.
 
         Args:
             client: Optional pre-configured AsyncOpenAI client (for testing).
-                   If not provided, creates one from settings.
-            model: Embedding model to use. Defaults to text-embedding-3-small.
+                   Implies the OpenAI backend.
+            model: Embedding model override (see create_embedding_backend).
+            rate_limiter: Optional limiter; defaults to the process-wide
+                limiter for the model (see get_rate_limiter). Only remote
+                backends are rate limited.
+            max_concurrency: Maximum in-flight requests per embed_texts call.
+            backend: Explicit backend; overrides client, model and settings.
         """
-        if client is not None:
-            self._client = client
-        else:
-            self._client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self._backend = backend or create_embedding_backend(model, client)
+        self._rate_limiter = None
+        if self._backend.remote:
+            self._rate_limiter = rate_limiter or get_rate_limiter(self._backend.model)
+        self._max_concurrency = max(1, max_concurrency)
 
-        self._model = model
+    @property
+    def model(self) -> str:
+        """Embedding model name (part of the embedding cache key)."""
+        return self._backend.model
 
     async def close(self) -> None:
-        """Close the OpenAI client connection.
-
-        Note: AsyncOpenAI manages its own connection pool and doesn't strictly
-        require explicit cleanup, but this method is provided for consistency
-        with other services (e.g., KnowledgeGraph).
-        """
-        await self._client.close()
+        """Release the backend (e.g. the OpenAI client connection)."""
+        await self._backend.close()
 
     async def embed_texts(
         self,
@@ -773,7 +1126,11 @@ class EmbeddingService:
         """
         Generate embeddings for a list of texts.
 
-        Automatically batches requests to stay within API limits.
+        Texts are split into batches capped at batch_size items and
+        MAX_BATCH_TOKENS estimated tokens. Batches are sent concurrently
+        (up to max_concurrency in flight) through the shared RPM/TPM rate
+        limiter, retried with backoff on 429, 5xx and connection errors, and
+        reassembled in input order.
 
         Args:
             texts: List of text strings to embed.
@@ -781,32 +1138,51 @@ class EmbeddingService:
 
         Returns:
             List of embedding vectors, one per input text.
-            Each vector has EMBEDDING_DIMENSION (1536) dimensions.
+            Each vector has EMBEDDING_DIMENSION dimensions.
 
         Raises:
             ValueError: If texts list is empty.
-            openai.APIError: If API call fails.
+            openai.APIError: If API call fails after retries.
         """
         if not texts:
             raise ValueError("texts list cannot be empty")
 
-        all_embeddings: list[list[float]] = []
-
-        # Process in batches
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i : i + batch_size]
+        batches = _token_batches(texts, batch_size, MAX_BATCH_TOKENS)
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+        all_embeddings: list[list[float]] = [[] for _ in texts]
 
-            response = await self._client.embeddings.create(
-                model=self._model,
-                input=batch,
-            )
-
-            # Extract embeddings in order
-            batch_embeddings = [item.embedding for item in response.data]
-            all_embeddings.extend(batch_embeddings)
+        async def run(offset: int, batch: list[str], tokens: int) -> None:
+            async with semaphore:
+                embeddings = await self._embed_batch(batch, tokens)
+            all_embeddings[offset : offset + len(batch)] = embeddings
 
+        await asyncio.gather(*(run(*batch) for batch in batches))
         return all_embeddings
 
+    async def _embed_batch(self, batch: list[str], tokens: int) -> list[list[float]]:
+        """Send one rate-limited embeddings request, retrying transient errors."""
+        if self._rate_limiter is None:
+            return await self._backend.embed_batch(batch)
+
+        attempt = 0
+        while True:
+            await self._rate_limiter.acquire(tokens)
+            try:
+                return await self._backend.embed_batch(batch)
+            except Exception as e:
+                if attempt >= MAX_RETRIES or not _is_retryable(e):
+                    raise
+                delay = _retry_delay(e, attempt)
+                attempt += 1
+                logger.warning(
+                    "Embedding request failed (%s), retry %d/%d in %.1fs",
+                    type(e).__name__,
+                    attempt,
+                    MAX_RETRIES,
+                    delay,
+                )
+                await asyncio.sleep(delay)
+
     async def embed_text(self, text: str) -> list[float]:
         """
         Generate embedding for a single text.
@@ -817,7 +1193,7 @@ class EmbeddingService:
             text: Text string to embed.
 
         Returns:
-            Embedding vector with EMBEDDING_DIMENSION (1536) dimensions.
+            Embedding vector with EMBEDDING_DIMENSION dimensions.
         """
         embeddings = await self.embed_texts([text])
         return embeddings[0]
@@ -880,4 +1256,7 @@ class EmbeddingService:
         embeddings = await self.embed_texts(texts, batch_size=batch_size)
 
         # Pair resources with their embeddings
-        return [(resource, embedding) for (resource, _), embedding in zip(embeddable, embeddings)]
+        return [
+            (resource, embedding)
+            for (resource, _), embedding in zip(embeddable, embeddings)
+        ]
@@ -1,26 +1,48 @@
 """FHIR Bundle loader service for PostgreSQL and Neo4j storage."""
 
 import asyncio
+import codecs
 import copy
+import hashlib
 import json
 import logging
+import multiprocessing
 import re
+import tempfile
 import uuid
+import zlib
+from collections.abc import AsyncIterable, AsyncIterator, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Any
 
-from sqlalchemy import select, or_, and_
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from app.models import FhirResource
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models import (
+    FhirResource,
+    IngestJob,
+    IngestJobKind,
+    PatientSummary,
+    ResourceEmbedding,
+)
+from app.projections.sync import sync_projections
 from app.services.compiler import compile_and_store
+from app.services.embedding_cache import embed_texts_cached
 from app.services.embeddings import EmbeddingService, resource_to_text
 from app.services.graph import KnowledgeGraph
+from app.services.job_queue import enqueue_job, register_job_handler
+from app.services.note_chunks import sync_note_chunks
 from app.services.reference_ranges import (
     build_fhir_interpretation,
     build_fhir_reference_range,
     interpret_component_observation,
     interpret_observation,
 )
+from app.services.vector_search import invalidate_patient_vectors
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +51,13 @@ PROFILE_EXTENSION_URL = (
     "http://cruxmd.ai/fhir/StructureDefinition/patient-narrative-profile"
 )
 
+# Rows per INSERT ... ON CONFLICT statement (5 bind params per row keeps
+# well under asyncpg's 32767-parameter limit)
+UPSERT_BATCH_SIZE = 1000
+
+# Bundle entries per batch when loading from a stream (load_bundle_stream)
+STREAM_BATCH_SIZE = 500
+
 
 def _strip_numbers_from_name(name_obj: dict[str, Any]) -> dict[str, Any]:
     """Strip trailing digits from FHIR HumanName fields.
@@ -36,6 +65,7 @@ def _strip_numbers_from_name(name_obj: dict[str, Any]) -> dict[str, Any]:
     Synthea appends numeric suffixes to patient names (e.g. "Andrés117").
     This cleans given, family, text, and prefix/suffix fields.
     """
+
     def strip(s: str | Any) -> str | Any:
         return re.sub(r"\d+", "", s).strip() if isinstance(s, str) else s
 
@@ -75,10 +105,15 @@ def _clean_reference_displays(resource: dict[str, Any]) -> dict[str, Any]:
     - reference objects: {"reference": "...", "display": "Dr. Duane703 Koelpin146"}
     - HumanName objects in practitioner/participant arrays
     """
+
     def _walk(obj: Any) -> None:
         if isinstance(obj, dict):
             # Clean reference.display fields (have both "reference" and "display")
-            if "reference" in obj and "display" in obj and isinstance(obj["display"], str):
+            if (
+                "reference" in obj
+                and "display" in obj
+                and isinstance(obj["display"], str)
+            ):
                 obj["display"] = _strip_display_digits(obj["display"])
             # Clean HumanName objects (have "family" or "given")
             if "family" in obj or "given" in obj:
@@ -114,8 +149,13 @@ def _enrich_observations(
     Also handles component-based observations (e.g. Blood Pressure) by
     adding interpretation to each component individually.
     """
-    patient_sex = _extract_patient_sex(entries)
+    _interpret_observations(resources, _extract_patient_sex(entries))
+
 
+def _interpret_observations(
+    resources: list[dict[str, Any]], patient_sex: str | None
+) -> None:
+    """Apply reference ranges/interpretation for a known patient sex in-place."""
     for resource in resources:
         if resource.get("resourceType") != "Observation":
             continue
@@ -135,30 +175,33 @@ def _enrich_observations(
         interpret_component_observation(resource, patient_sex)
 
 
-async def load_bundle(
-    db: AsyncSession,
-    graph: KnowledgeGraph,
-    bundle: dict[str, Any],
-) -> uuid.UUID:
-    """
-    Load a FHIR bundle into PostgreSQL and Neo4j.
+def clean_bundle_resources(bundle: dict[str, Any]) -> list[dict[str, Any]]:
+    """Extract resources from bundle entries and clean Synthea name artifacts.
 
-    Ordered writes: PostgreSQL first (source of truth), then Neo4j (derived view).
-    Uses upsert semantics for idempotency with batch lookups for performance.
+    Pure CPU work with no I/O. Resources are cleaned in-place.
 
     Args:
-        db: Async SQLAlchemy session.
-        graph: KnowledgeGraph instance for Neo4j operations.
         bundle: FHIR Bundle dict with "entry" array of resources.
 
     Returns:
-        The canonical patient UUID (PostgreSQL-generated).
+        List of FHIR resource dicts that have a resourceType.
+
+    Raises:
+        ValueError: If the bundle has no entries or no valid resources.
     """
     entries = bundle.get("entry", [])
     if not entries:
         raise ValueError("Bundle contains no entries")
 
-    # Extract all resources from bundle entries
+    resources_data = _clean_entries(entries)
+    if not resources_data:
+        raise ValueError("Bundle contains no valid resources")
+
+    return resources_data
+
+
+def _clean_entries(entries: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Extract and clean the resources of bundle entries (skips invalid ones)."""
     resources_data: list[dict[str, Any]] = []
     for entry in entries:
         resource = entry.get("resource", {})
@@ -166,13 +209,203 @@ async def load_bundle(
             _clean_patient_names(resource)
             _clean_reference_displays(resource)
             resources_data.append(resource)
+    return resources_data
 
-    if not resources_data:
-        raise ValueError("Bundle contains no valid resources")
 
-    # Enrich Observations with reference ranges and interpretation codes
-    _enrich_observations(entries, resources_data)
+def enrich_bundle_resources(resources: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Enrich Observations with reference ranges and interpretation codes.
+
+    Args:
+        resources: Cleaned resources from clean_bundle_resources. The
+            Patient among them supplies the sex for sex-aware ranges.
+
+    Returns:
+        The same resources list, enriched in-place.
+    """
+    _enrich_observations([{"resource": r} for r in resources], resources)
+    return resources
+
+
+def prepare_bundle_resources(bundle: dict[str, Any]) -> list[dict[str, Any]]:
+    """Clean and enrich all resources in a bundle.
+
+    Module-level (picklable) so it can run in a ProcessPoolExecutor.
+    """
+    return enrich_bundle_resources(clean_bundle_resources(bundle))
+
+
+def prepare_entry_batch(
+    entries: list[dict[str, Any]], patient_sex: str | None
+) -> list[dict[str, Any]]:
+    """Clean and enrich one batch of a streamed bundle.
 
+    The Patient may be in an earlier batch, so its sex is passed in rather
+    than looked up. Module-level (picklable) like prepare_bundle_resources.
+    """
+    resources = _clean_entries(entries)
+    _interpret_observations(resources, patient_sex)
+    return resources
+
+
+# =============================================================================
+# Preprocessing Executor
+# =============================================================================
+
+_preprocess_executor: Executor | None = None
+
+
+def get_preprocess_executor() -> Executor | None:
+    """Return the shared preprocessing executor, creating it on first use.
+
+    Configured by settings.fhir_preprocess_mode ("inline", "thread" or
+    "process") and settings.fhir_preprocess_workers.
+
+    Returns:
+        The shared Executor, or None when preprocessing runs inline.
+    """
+    global _preprocess_executor
+    if _preprocess_executor is not None:
+        return _preprocess_executor
+
+    mode = settings.fhir_preprocess_mode
+    workers = max(1, settings.fhir_preprocess_workers)
+    if mode == "process":
+        # spawn avoids forking a process that holds event loop / driver threads
+        _preprocess_executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    elif mode == "thread":
+        _preprocess_executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="fhir-preprocess"
+        )
+    elif mode != "inline":
+        raise ValueError(f"Unknown fhir_preprocess_mode: {mode!r}")
+
+    return _preprocess_executor
+
+
+def shutdown_preprocess_executor() -> None:
+    """Shut down the shared preprocessing executor, if one was created."""
+    global _preprocess_executor
+    if _preprocess_executor is not None:
+        _preprocess_executor.shutdown(wait=True, cancel_futures=True)
+        _preprocess_executor = None
+
+
+async def preprocess_bundle(
+    bundle: dict[str, Any],
+    executor: Executor | None = None,
+) -> list[dict[str, Any]]:
+    """Clean and enrich bundle resources, off the event loop if possible.
+
+    Args:
+        bundle: FHIR Bundle dict with "entry" array of resources.
+        executor: Optional executor for the CPU-bound work. When None the
+            work runs inline and the bundle's resources are mutated in-place;
+            with a process pool the caller's bundle is left untouched.
+
+    Returns:
+        Cleaned and enriched FHIR resource dicts.
+
+    Raises:
+        ValueError: If the bundle has no entries or no valid resources.
+    """
+    if executor is None:
+        return prepare_bundle_resources(bundle)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, prepare_bundle_resources, bundle)
+
+
+def compute_content_hash(resource: dict[str, Any]) -> str:
+    """Hash a cleaned FHIR resource over its canonical JSON form.
+
+    Keys are sorted and whitespace is dropped, so the hash only changes when
+    the resource content does.
+    """
+    canonical = json.dumps(
+        resource, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class WrittenResource:
+    """A resource row written by write_bundle_resources.
+
+    Lightweight stand-in for a hydrated FhirResource: carries the database id,
+    the FHIR data and its change status, and collects embedding output until
+    it is flushed back with _store_embeddings.
+    """
+
+    id: uuid.UUID
+    fhir_id: str
+    resource_type: str
+    data: dict[str, Any]
+    # "inserted", "updated" (content hash differed) or "unchanged"
+    status: str = "inserted"
+    # Whether an unchanged row already has an embedding from a previous load
+    has_embedding: bool = False
+    embedding: list[float] | None = None
+    embedding_text: str | None = None
+
+    @property
+    def changed(self) -> bool:
+        """True if this load inserted or rewrote the row."""
+        return self.status != "unchanged"
+
+
+@dataclass
+class BundleLoadResult:
+    """Outcome of loading one bundle: the patient plus per-resource counts."""
+
+    patient_id: uuid.UUID
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    embedded: int = 0
+    compiled: bool = False
+    # Graph build, embeddings and compile were enqueued as ingest jobs
+    deferred: bool = False
+
+    @property
+    def changed(self) -> int:
+        """Number of resources that were inserted or updated."""
+        return self.inserted + self.updated
+
+
+def embedding_candidates(written: list[WrittenResource]) -> list[WrittenResource]:
+    """Rows that need (re-)embedding: changed ones, plus unchanged ones whose
+    earlier embedding attempt failed or never ran."""
+    return [w for w in written if w.changed or not w.has_embedding]
+
+
+async def write_bundle_resources(
+    db: AsyncSession,
+    resources_data: list[dict[str, Any]],
+    force: bool = False,
+) -> tuple[uuid.UUID, list[WrittenResource]]:
+    """Bulk-upsert prepared resources into PostgreSQL, skipping unchanged ones.
+
+    Each resource is hashed (compute_content_hash) and compared with the hash
+    stored by the previous load; only new or changed resources are sent in
+    multi-row INSERT ... ON CONFLICT (patient_id, fhir_id, resource_type)
+    DO UPDATE statements. Rewritten rows have their embedding deleted so a
+    failed re-embed never leaves a stale vector behind.
+
+    Args:
+        db: Async SQLAlchemy session.
+        resources_data: Cleaned and enriched FHIR resource dicts.
+        force: Rewrite every resource even if its hash is unchanged.
+
+    Returns:
+        Tuple of (canonical patient UUID, all resources in the bundle with
+        their change status).
+
+    Raises:
+        ValueError: If the resources contain no Patient.
+    """
     # Find Patient resource and determine canonical ID
     patient_fhir_id: str | None = None
     for resource in resources_data:
@@ -183,137 +416,509 @@ async def load_bundle(
     if patient_fhir_id is None:
         raise ValueError("Bundle must contain a Patient resource")
 
-    # Check if patient already exists
-    existing_patient = await _find_existing_patient(db, patient_fhir_id)
-    patient_id = existing_patient.id if existing_patient else uuid.uuid4()
+    patient_id, existing = await _resolve_patient(db, patient_fhir_id)
+    written = await _write_resource_batch(
+        db, patient_id, resources_data, existing, force
+    )
+    return patient_id, written
 
-    # Batch lookup: find all existing resources in one query
-    existing_resources = await _find_existing_resources_batch(db, resources_data)
-    existing_by_key = {
-        (r.fhir_id, r.resource_type): r for r in existing_resources
-    }
 
-    # Track all FhirResource objects for embedding generation
-    all_fhir_resources: list[FhirResource] = []
+async def _resolve_patient(
+    db: AsyncSession, patient_fhir_id: str
+) -> tuple[uuid.UUID, dict[tuple[str, str], "_ExistingRow"]]:
+    """Return the canonical patient UUID and the stored state of its rows.
 
-    # Process all resources with batch lookup results
+    Reuses the canonical ID if the patient was loaded before; otherwise
+    assigns a new one (and there are no existing rows).
+
+    Concurrent first loads of one patient (parallel /load-bundle calls or
+    NDJSON import workers) would each see no Patient row and pick a
+    different UUID, and the (patient_id, fhir_id, resource_type) upsert key
+    would then store the patient twice. A transaction-scoped advisory lock
+    on the Patient's fhir_id makes the second load wait until the first
+    commits, so its lookup finds the committed row.
+    """
+    await db.execute(
+        select(
+            func.pg_advisory_xact_lock(
+                func.hashtextextended(f"Patient/{patient_fhir_id}", 0)
+            )
+        )
+    )
+    existing_patient_id = await _find_existing_patient_id(db, patient_fhir_id)
+    if existing_patient_id is None:
+        return uuid.uuid4(), {}
+    return existing_patient_id, await _find_existing_rows(db, existing_patient_id)
+
+
+async def _write_resource_batch(
+    db: AsyncSession,
+    patient_id: uuid.UUID,
+    resources_data: list[dict[str, Any]],
+    existing: dict[tuple[str, str], "_ExistingRow"],
+    force: bool = False,
+) -> list[WrittenResource]:
+    """Upsert the new or changed resources of one batch.
+
+    existing is updated in place with the rows written, so a key repeated in
+    a later batch of the same load compares against this one.
+    """
+    # One row per (fhir_id, resource_type) — a statement can't upsert the
+    # same key twice, so the last occurrence in the batch wins.
+    rows_by_key: dict[tuple[str, str], dict[str, Any]] = {}
     for resource in resources_data:
         resource_type = resource.get("resourceType", "")
         fhir_id = resource.get("id", "")
-
-        # Determine patient_id for this resource
-        # All resources get linked to the patient
-        resource_patient_id = patient_id
-
-        # Check if resource already exists using batch lookup results
-        existing = existing_by_key.get((fhir_id, resource_type))
-        if existing:
-            # Update existing resource
-            existing.data = resource
-            existing.patient_id = resource_patient_id
-            all_fhir_resources.append(existing)
+        rows_by_key[(fhir_id, resource_type)] = {
+            # Patient's id = patient_id for consistency
+            "id": patient_id if resource_type == "Patient" else uuid.uuid4(),
+            "fhir_id": fhir_id,
+            "resource_type": resource_type,
+            "patient_id": patient_id,
+            "data": resource,
+            "content_hash": compute_content_hash(resource),
+        }
+
+    written: dict[tuple[str, str], WrittenResource] = {}
+    pending: list[dict[str, Any]] = []
+    stale_embeddings: list[uuid.UUID] = []
+    for key, row in rows_by_key.items():
+        previous = existing.get(key)
+        if previous is None:
+            status = "inserted"
+        elif force or previous.content_hash != row["content_hash"]:
+            status = "updated"
         else:
-            # Create new resource
-            if resource_type == "Patient":
-                # Patient's id = patient_id for consistency
-                fhir_resource = FhirResource(
-                    id=patient_id,
-                    fhir_id=fhir_id,
-                    resource_type=resource_type,
-                    patient_id=resource_patient_id,
-                    data=resource,
-                )
-            else:
-                # Other resources get auto-generated id
-                fhir_resource = FhirResource(
-                    fhir_id=fhir_id,
-                    resource_type=resource_type,
-                    patient_id=resource_patient_id,
-                    data=resource,
-                )
-            db.add(fhir_resource)
-            all_fhir_resources.append(fhir_resource)
+            status = "unchanged"
+
+        written[key] = WrittenResource(
+            id=previous.id if previous is not None else row["id"],
+            fhir_id=row["fhir_id"],
+            resource_type=row["resource_type"],
+            data=row["data"],
+            status=status,
+            has_embedding=previous is not None and previous.has_embedding,
+        )
+        if status != "unchanged":
+            pending.append(row)
+        if status == "updated" and previous.has_embedding:
+            stale_embeddings.append(previous.id)
+
+    table = FhirResource.__table__
+    for i in range(0, len(pending), UPSERT_BATCH_SIZE):
+        stmt = pg_insert(table).values(pending[i : i + UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.patient_id, table.c.fhir_id, table.c.resource_type],
+            set_={
+                "data": stmt.excluded.data,
+                "content_hash": stmt.excluded.content_hash,
+                "embedding_text": None,
+            },
+        ).returning(table.c.id, table.c.fhir_id, table.c.resource_type)
+        result = await db.execute(stmt)
+        # A concurrent load may have inserted the row first; take its id
+        for row in result.all():
+            written[(row.fhir_id, row.resource_type)].id = row.id
+    if stale_embeddings:
+        await db.execute(
+            delete(ResourceEmbedding).where(
+                ResourceEmbedding.resource_id.in_(stale_embeddings)
+            )
+        )
+    # Keep projection tables (e.g. observation_projections) in step with
+    # the rows just written
+    await sync_projections(
+        db,
+        (
+            (w.id, patient_id, w.resource_type, w.data)
+            for w in written.values()
+            if w.status != "unchanged"
+        ),
+    )
+
+    for row in pending:
+        key = (row["fhir_id"], row["resource_type"])
+        existing[key] = _ExistingRow(
+            id=written[key].id, content_hash=row["content_hash"], has_embedding=False
+        )
+    if pending:
+        # Rewritten rows had their embeddings deleted
+        invalidate_patient_vectors(patient_id)
+
+    return list(written.values())
 
-    # Flush to get IDs assigned
-    await db.flush()
 
-    # Generate embeddings and build graph in parallel (they're independent operations)
-    await asyncio.gather(
-        _generate_embeddings(all_fhir_resources),
-        graph.build_from_fhir(str(patient_id), resources_data),
+async def _store_embeddings(
+    db: AsyncSession,
+    written: list[WrittenResource],
+    patient_id: uuid.UUID,
+) -> None:
+    """Persist embeddings collected on WrittenResource rows.
+
+    embedding_text is a bulk UPDATE of fhir_resources by id; the vectors are
+    upserted into resource_embeddings.
+    """
+    embedded = [w for w in written if w.embedding is not None]
+    if not embedded:
+        return
+    await db.execute(
+        update(FhirResource),
+        [{"id": w.id, "embedding_text": w.embedding_text} for w in embedded],
     )
+    table = ResourceEmbedding.__table__
+    for i in range(0, len(embedded), UPSERT_BATCH_SIZE):
+        stmt = pg_insert(table).values(
+            [
+                {
+                    "resource_id": w.id,
+                    "patient_id": patient_id,
+                    "embedding": w.embedding,
+                }
+                for w in embedded[i : i + UPSERT_BATCH_SIZE]
+            ]
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[table.c.resource_id],
+                set_={"embedding": stmt.excluded.embedding},
+            )
+        )
+
+
+async def sync_bundle(
+    db: AsyncSession,
+    graph: KnowledgeGraph,
+    bundle: dict[str, Any],
+    executor: Executor | None = None,
+    force: bool = False,
+    defer: bool = False,
+) -> BundleLoadResult:
+    """
+    Load a FHIR bundle, doing work only for resources that are new or changed.
+
+    Ordered writes: PostgreSQL first (source of truth), then Neo4j (derived view).
+    Resources whose content hash matches the stored one are not rewritten,
+    re-graphed or re-embedded, and the summary is only recompiled when
+    something changed, so re-syncing a chart costs O(delta) rather than
+    O(chart).
+
+    Args:
+        db: Async SQLAlchemy session.
+        graph: KnowledgeGraph instance for Neo4j operations.
+        bundle: FHIR Bundle dict with "entry" array of resources.
+        executor: Optional executor for CPU-bound preprocessing (see
+            get_preprocess_executor). Runs inline when None.
+        force: Reprocess every resource regardless of its content hash
+            (e.g. to rebuild a cleared graph).
+        defer: Only write the FHIR rows and enqueue graph build, embedding
+            and compilation as ingest jobs (committed with the rows).
+
+    Returns:
+        BundleLoadResult with the canonical patient UUID and change counts.
+    """
+    # Clean names and enrich Observations with reference ranges/interpretation
+    resources_data = await preprocess_bundle(bundle, executor)
+
+    patient_id, written = await write_bundle_resources(db, resources_data, force=force)
+    result = BundleLoadResult(patient_id=patient_id)
+    if defer:
+        work = _DeferredWork(graph_ids=[], embed_ids=[])
+        _count_written(result, written)
+        work.add(written)
+        await _enqueue_post_ingest_jobs(db, result, work)
+        return result
+
+    await _sync_written(db, graph, result, written)
+    await _finish_load(db, graph, result)
+    return result
+
+
+def _count_written(result: BundleLoadResult, written: list[WrittenResource]) -> None:
+    """Add a written batch's per-status counts to result."""
+    for w in written:
+        if w.status == "inserted":
+            result.inserted += 1
+        elif w.status == "updated":
+            result.updated += 1
+        else:
+            result.unchanged += 1
 
+
+async def _sync_written(
+    db: AsyncSession,
+    graph: KnowledgeGraph,
+    result: BundleLoadResult,
+    written: list[WrittenResource],
+    build_relationships: bool = True,
+) -> None:
+    """Graph and embed the changed part of a written batch; update counts."""
+    changed = [w for w in written if w.changed]
+    _count_written(result, written)
+
+    # Graph relationships are rebuilt patient-wide from the nodes already in
+    # Neo4j, so only the changed resources need to be MERGEd
+    to_embed = embedding_candidates(written)
+    if changed:
+        await asyncio.gather(
+            _generate_embeddings(to_embed, db=db),
+            graph.build_from_fhir(
+                str(result.patient_id),
+                [w.data for w in changed],
+                build_relationships=build_relationships,
+            ),
+        )
+    else:
+        await _generate_embeddings(to_embed, db=db)
+    await _store_embeddings(db, to_embed, result.patient_id)
+    invalidate_patient_vectors(result.patient_id)
+    await sync_note_chunks(db, result.patient_id, to_embed)
+    result.embedded += sum(1 for w in to_embed if w.embedding is not None)
+
+
+async def _finish_load(
+    db: AsyncSession, graph: KnowledgeGraph, result: BundleLoadResult
+) -> None:
+    """Recompile the summary if anything changed, then log the counts."""
     # Compile and store patient summary (requires graph + Postgres to be populated)
-    try:
-        await compile_and_store(patient_id, graph, db)
-    except Exception as e:
-        logger.warning("Failed to compile patient summary during bundle load: %s", e)
+    if result.changed or not await _has_compiled_summary(db, result.patient_id):
+        try:
+            await compile_and_store(result.patient_id, graph, db)
+            result.compiled = True
+        except Exception as e:
+            logger.warning(
+                "Failed to compile patient summary during bundle load: %s", e
+            )
+
+    logger.info(
+        "Loaded bundle for patient %s: %d inserted, %d updated, %d unchanged, "
+        "%d embedded",
+        result.patient_id,
+        result.inserted,
+        result.updated,
+        result.unchanged,
+        result.embedded,
+    )
+
+
+async def load_bundle_stream(
+    db: AsyncSession,
+    graph: KnowledgeGraph,
+    entries: AsyncIterable[dict[str, Any]],
+    profile: dict[str, Any] | None = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+    executor: Executor | None = None,
+    force: bool = False,
+    defer: bool = False,
+) -> BundleLoadResult:
+    """
+    Load a bundle from an incremental entry stream in fixed-size batches.
 
-    return patient_id
+    Counterpart of sync_bundle for bundles too large to hold in memory:
+    entries come from app.services.bundle_stream (a file or request body)
+    and each batch is cleaned, written, graphed and embedded before the next
+    is read. Entries are buffered only until the Patient is seen (Synthea
+    and bulk exports put it first). Graph relationships are built once after
+    the last batch and the summary is compiled once at the end.
 
+    Args:
+        db: Async SQLAlchemy session.
+        graph: KnowledgeGraph instance for Neo4j operations.
+        entries: Async iterable of Bundle entry dicts.
+        profile: Optional PatientProfile data to attach as FHIR extension.
+        batch_size: Entries processed per batch.
+        executor: Optional executor for CPU-bound preprocessing.
+        force: Reprocess every resource regardless of its content hash.
+        defer: Only write the FHIR rows and enqueue graph build, embedding
+            and compilation as ingest jobs (committed with the rows).
+
+    Returns:
+        BundleLoadResult with the canonical patient UUID and change counts.
+
+    Raises:
+        ValueError: If the stream has no entries, no valid resources or no
+            Patient, or is not valid Bundle JSON.
+    """
+    loop = asyncio.get_running_loop()
+    result: BundleLoadResult | None = None
+    work = _DeferredWork(graph_ids=[], embed_ids=[])
+    existing: dict[tuple[str, str], _ExistingRow] = {}
+    patient_sex: str | None = None
+    buffered: list[dict[str, Any]] = []
+
+    async for batch in _batched(entries, batch_size):
+        if result is None:
+            # Hold entries until the Patient arrives to fix the canonical id
+            buffered.extend(batch)
+            patient_entry = next(
+                (
+                    e
+                    for e in buffered
+                    if e.get("resource", {}).get("resourceType") == "Patient"
+                ),
+                None,
+            )
+            if patient_entry is None:
+                continue
+            if profile:
+                patient_entry["resource"] = _with_profile_extension(
+                    patient_entry["resource"], profile
+                )
+            patient = patient_entry["resource"]
+            patient_sex = patient.get("gender")
+            patient_id, existing = await _resolve_patient(db, patient.get("id", ""))
+            result = BundleLoadResult(patient_id=patient_id)
+            batch, buffered = buffered, []
+
+        if executor is None:
+            resources = prepare_entry_batch(batch, patient_sex)
+        else:
+            resources = await loop.run_in_executor(
+                executor, prepare_entry_batch, batch, patient_sex
+            )
+        written = await _write_resource_batch(
+            db, result.patient_id, resources, existing, force
+        )
+        if defer:
+            _count_written(result, written)
+            work.add(written)
+        else:
+            await _sync_written(db, graph, result, written, build_relationships=False)
+
+    if result is None:
+        if not buffered:
+            raise ValueError("Bundle contains no entries")
+        if not _clean_entries(buffered):
+            raise ValueError("Bundle contains no valid resources")
+        raise ValueError("Bundle must contain a Patient resource")
+
+    if defer:
+        await _enqueue_post_ingest_jobs(db, result, work)
+        return result
+
+    if result.changed:
+        await graph.build_relationships(str(result.patient_id))
+    await _finish_load(db, graph, result)
+    return result
+
+
+async def _batched(
+    items: AsyncIterable[dict[str, Any]], size: int
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Group an async iterable into lists of at most size items."""
+    batch: list[dict[str, Any]] = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def load_bundle(
+    db: AsyncSession,
+    graph: KnowledgeGraph,
+    bundle: dict[str, Any],
+    executor: Executor | None = None,
+) -> uuid.UUID:
+    """
+    Load a FHIR bundle into PostgreSQL and Neo4j.
+
+    Thin wrapper over sync_bundle for callers that only need the patient id.
+
+    Args:
+        db: Async SQLAlchemy session.
+        graph: KnowledgeGraph instance for Neo4j operations.
+        bundle: FHIR Bundle dict with "entry" array of resources.
+        executor: Optional executor for CPU-bound preprocessing (see
+            get_preprocess_executor). Runs inline when None.
+
+    Returns:
+        The canonical patient UUID (PostgreSQL-generated).
+    """
+    result = await sync_bundle(db, graph, bundle, executor=executor)
+    return result.patient_id
 
-async def _find_existing_patient(db: AsyncSession, fhir_id: str) -> FhirResource | None:
-    """Find existing Patient resource by fhir_id."""
+
+async def _find_existing_patient_id(db: AsyncSession, fhir_id: str) -> uuid.UUID | None:
+    """Find the canonical id of an existing Patient resource by fhir_id."""
     result = await db.execute(
-        select(FhirResource).where(
+        select(FhirResource.id).where(
             FhirResource.resource_type == "Patient",
             FhirResource.fhir_id == fhir_id,
         )
     )
-    return result.scalar_one_or_none()
+    return result.scalars().first()
 
 
-async def _find_existing_resources_batch(
-    db: AsyncSession, resources: list[dict[str, Any]]
-) -> list[FhirResource]:
-    """
-    Find all existing resources by (fhir_id, resource_type) pairs in a single query.
+@dataclass
+class _ExistingRow:
+    """Stored state of a resource row, used for change detection."""
 
-    This replaces N individual queries with one batch query for better performance.
-    Uses the idx_fhir_id_type index.
-    """
-    if not resources:
-        return []
+    id: uuid.UUID
+    content_hash: str | None
+    has_embedding: bool
 
-    # Build OR conditions for each (fhir_id, resource_type) pair
-    conditions = []
-    for resource in resources:
-        fhir_id = resource.get("id", "")
-        resource_type = resource.get("resourceType", "")
-        if fhir_id and resource_type:
-            conditions.append(
-                and_(
-                    FhirResource.fhir_id == fhir_id,
-                    FhirResource.resource_type == resource_type,
-                )
-            )
 
-    if not conditions:
-        return []
+async def _find_existing_rows(
+    db: AsyncSession, patient_id: uuid.UUID
+) -> dict[tuple[str, str], _ExistingRow]:
+    """Fetch id, content hash and embedding presence for a patient's rows.
 
+    Narrow select (no JSONB or vector payloads), keyed by (fhir_id, resource_type).
+    """
     result = await db.execute(
-        select(FhirResource).where(or_(*conditions))
+        select(
+            FhirResource.id,
+            FhirResource.fhir_id,
+            FhirResource.resource_type,
+            FhirResource.content_hash,
+            ResourceEmbedding.resource_id.is_not(None).label("has_embedding"),
+        )
+        .outerjoin(ResourceEmbedding)
+        .where(FhirResource.patient_id == patient_id)
     )
-    return list(result.scalars().all())
+    return {
+        (row.fhir_id, row.resource_type): _ExistingRow(
+            id=row.id,
+            content_hash=row.content_hash,
+            has_embedding=row.has_embedding,
+        )
+        for row in result.all()
+    }
+
+
+async def _has_compiled_summary(db: AsyncSession, patient_id: uuid.UUID) -> bool:
+    """Check whether the patient already has a compiled summary."""
+    result = await db.execute(
+        select(PatientSummary.patient_id).where(PatientSummary.patient_id == patient_id)
+    )
+    return result.scalars().first() is not None
 
 
 async def _generate_embeddings(
-    fhir_resources: list[FhirResource],
+    fhir_resources: Sequence[FhirResource | WrittenResource],
     embedding_service: EmbeddingService | None = None,
+    raise_errors: bool = False,
+    db: AsyncSession | None = None,
 ) -> None:
     """
     Generate embeddings for FHIR resources that support embedding.
 
-    Updates the embedding and embedding_text columns on each FhirResource.
+    Sets the embedding and embedding_text attributes on each resource.
     Failures are logged but do not block bundle loading (graceful degradation).
 
     Args:
-        fhir_resources: List of FhirResource objects to generate embeddings for.
+        fhir_resources: FhirResource or WrittenResource objects to embed.
         embedding_service: Optional EmbeddingService instance. If not provided,
             a new instance is created and closed after use.
+        raise_errors: Re-raise embedding failures instead of logging them
+            (ingest jobs rely on this to be retried).
+        db: Optional session; when given (and the cache is enabled), vectors
+            are served from and stored to the embedding cache table.
     """
     # Filter to only embeddable resources and generate text
-    embeddable: list[tuple[FhirResource, str]] = []
+    embeddable: list[tuple[FhirResource | WrittenResource, str]] = []
     for fhir_resource in fhir_resources:
         text = resource_to_text(fhir_resource.data)
         if text is not None:
@@ -331,10 +936,17 @@ async def _generate_embeddings(
         # Extract texts for batch embedding
         texts = [text for _, text in embeddable]
 
-        # Generate embeddings in batch
-        embeddings = await embedding_service.embed_texts(texts)
+        # Generate embeddings in batch, skipping texts embedded before
+        if db is not None and settings.embedding_cache_enabled:
+            # A failed cache statement rolls back to the savepoint; without
+            # it the error handled below would leave the load's transaction
+            # aborted and the rest of the load would fail
+            async with db.begin_nested():
+                embeddings = await embed_texts_cached(db, embedding_service, texts)
+        else:
+            embeddings = await embedding_service.embed_texts(texts)
 
-        # Update FhirResource objects with embeddings
+        # Update resource objects with embeddings
         for (fhir_resource, text), embedding in zip(embeddable, embeddings):
             fhir_resource.embedding = embedding
             fhir_resource.embedding_text = text
@@ -342,6 +954,8 @@ async def _generate_embeddings(
         logger.info(f"Generated embeddings for {len(embeddings)} resources")
 
     except Exception as e:
+        if raise_errors:
+            raise
         # Log error but don't fail bundle loading
         logger.warning("Failed to generate embeddings: %s", e)
 
@@ -356,6 +970,7 @@ async def load_bundle_with_profile(
     graph: KnowledgeGraph,
     bundle: dict[str, Any],
     profile: dict[str, Any] | None = None,
+    executor: Executor | None = None,
 ) -> uuid.UUID:
     """
     Load a FHIR bundle with an optional profile attached to the Patient resource.
@@ -369,6 +984,7 @@ async def load_bundle_with_profile(
         graph: KnowledgeGraph instance for Neo4j operations.
         bundle: FHIR Bundle dict with "entry" array of resources.
         profile: Optional PatientProfile data to attach as FHIR extension.
+        executor: Optional executor for CPU-bound preprocessing.
 
     Returns:
         The canonical patient UUID (PostgreSQL-generated).
@@ -377,7 +993,7 @@ async def load_bundle_with_profile(
         # Embed profile as FHIR extension on Patient resource before loading
         bundle = _add_profile_extension(bundle, profile)
 
-    return await load_bundle(db, graph, bundle)
+    return await load_bundle(db, graph, bundle, executor=executor)
 
 
 def _add_profile_extension(
@@ -387,36 +1003,467 @@ def _add_profile_extension(
     Add profile as FHIR extension to Patient resource in bundle.
 
     Creates a copy of the bundle with the profile embedded as a FHIR extension
-    on the Patient resource. This maintains FHIR-native architecture.
+    on the Patient resource. This maintains FHIR-native architecture. The
+    copy is deep because loading rewrites entries in place.
     """
     bundle = copy.deepcopy(bundle)
 
     for entry in bundle.get("entry", []):
         resource = entry.get("resource", {})
         if resource.get("resourceType") == "Patient":
-            # Initialize extensions array if not present
-            if "extension" not in resource:
-                resource["extension"] = []
-
-            # Remove any existing profile extension
-            resource["extension"] = [
-                ext
-                for ext in resource["extension"]
-                if ext.get("url") != PROFILE_EXTENSION_URL
-            ]
-
-            # Add profile as FHIR extension
-            resource["extension"].append(
-                {
-                    "url": PROFILE_EXTENSION_URL,
-                    "valueString": json.dumps(profile),
-                }
-            )
+            entry["resource"] = _with_profile_extension(resource, profile)
             break
 
     return bundle
 
 
+def _with_profile_extension(
+    resource: dict[str, Any], profile: dict[str, Any]
+) -> dict[str, Any]:
+    """Return a copy of a Patient resource carrying the profile extension.
+
+    Any existing profile extension is replaced; other extensions are kept.
+    """
+    extensions = [
+        ext
+        for ext in resource.get("extension", [])
+        if ext.get("url") != PROFILE_EXTENSION_URL
+    ]
+    extensions.append(
+        {
+            "url": PROFILE_EXTENSION_URL,
+            "valueString": json.dumps(profile),
+        }
+    )
+    return {**resource, "extension": extensions}
+
+
+# =============================================================================
+# FHIR Bulk Data (NDJSON) Import
+# =============================================================================
+
+# Spool shards for NDJSON grouping: a shard's resources are held in memory at
+# once, so more shards means lower peak memory for large exports
+NDJSON_SHARDS = 32
+
+# Default patients loaded concurrently during an NDJSON import
+DEFAULT_IMPORT_WORKERS = 4
+
+# Reference fields that point a resource at its patient, in lookup order
+_PATIENT_REFERENCE_FIELDS = ("subject", "patient", "beneficiary")
+
+
+def patient_key(resource: dict[str, Any]) -> str | None:
+    """Return the Patient fhir_id a resource belongs to, if any.
+
+    Patients map to their own id; other resources are resolved through their
+    subject/patient/beneficiary reference ("Patient/123", "urn:uuid:123" or
+    an absolute URL ending in Patient/123).
+    """
+    if resource.get("resourceType") == "Patient":
+        return resource.get("id") or None
+
+    for field in _PATIENT_REFERENCE_FIELDS:
+        ref = resource.get(field)
+        if not isinstance(ref, dict):
+            continue
+        reference = ref.get("reference", "")
+        if "Patient/" in reference:
+            return reference.rsplit("Patient/", 1)[1] or None
+        if reference.startswith("urn:uuid:"):
+            return reference[len("urn:uuid:") :] or None
+    return None
+
+
+@dataclass
+class NdjsonImportResult:
+    """Counts for an NDJSON import across all patients."""
+
+    patients_loaded: int = 0
+    patients_failed: int = 0
+    resources_inserted: int = 0
+    resources_updated: int = 0
+    resources_unchanged: int = 0
+    resources_embedded: int = 0
+    # Resources with no patient reference (Practitioner, Organization, ...)
+    resources_skipped: int = 0
+    # Lines that were not valid JSON resources
+    lines_invalid: int = 0
+
+    @property
+    def resources_loaded(self) -> int:
+        """Resources written or confirmed unchanged."""
+        return (
+            self.resources_inserted + self.resources_updated + self.resources_unchanged
+        )
+
+
+class NdjsonSpool:
+    """Groups NDJSON resources by patient via on-disk shards.
+
+    Bulk Data $export output is split by resource type, so a patient's
+    resources are scattered across files. Each line is routed to one of
+    NDJSON_SHARDS temp files by a hash of its patient reference; a shard
+    then holds whole patients and can be grouped in memory on its own.
+    Use as a context manager so the temp files are removed.
+    """
+
+    def __init__(self, shards: int = NDJSON_SHARDS) -> None:
+        self._dir = tempfile.TemporaryDirectory(prefix="cruxmd-ndjson-")
+        self._paths = [
+            Path(self._dir.name) / f"shard-{i}.ndjson" for i in range(shards)
+        ]
+        self._files = [open(p, "w", encoding="utf-8") for p in self._paths]
+        self._partial = ""
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.spooled = 0
+        self.skipped = 0
+        self.invalid = 0
+
+    def __enter__(self) -> "NdjsonSpool":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def add_line(self, line: str) -> None:
+        """Route one NDJSON line to its patient's shard."""
+        line = line.strip()
+        if not line:
+            return
+        try:
+            resource = json.loads(line)
+        except json.JSONDecodeError:
+            self.invalid += 1
+            return
+        if not isinstance(resource, dict) or not resource.get("resourceType"):
+            self.invalid += 1
+            return
+
+        key = patient_key(resource)
+        if key is None:
+            self.skipped += 1
+            return
+        shard = zlib.crc32(key.encode("utf-8")) % len(self._files)
+        self._files[shard].write(line + "\n")
+        self.spooled += 1
+
+    def add_file(self, path: Path) -> None:
+        """Spool every line of an NDJSON file."""
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                self.add_line(line)
+
+    def feed(self, chunk: bytes) -> None:
+        """Spool a chunk of a streamed NDJSON body (lines may span chunks)."""
+        text_chunk = self._partial + self._utf8.decode(chunk)
+        *lines, self._partial = text_chunk.split("\n")
+        for line in lines:
+            self.add_line(line)
+
+    def finish(self) -> None:
+        """Flush any trailing partial line and close the shard files."""
+        self.add_line(self._partial + self._utf8.decode(b"", final=True))
+        self._partial = ""
+        for f in self._files:
+            f.close()
+
+    async def patient_groups(
+        self,
+    ) -> AsyncIterator[dict[str, list[dict[str, Any]]]]:
+        """Yield one {patient fhir_id: resources} mapping per shard.
+
+        Each patient's Patient resource is placed first. Shards are read and
+        parsed in a worker thread so the event loop keeps serving requests.
+        """
+        for path in self._paths:
+            groups = await asyncio.to_thread(self._read_shard, path)
+            if groups:
+                yield groups
+
+    @staticmethod
+    def _read_shard(path: Path) -> dict[str, list[dict[str, Any]]]:
+        """Group one shard's resources by patient."""
+        groups: dict[str, list[dict[str, Any]]] = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                resource = json.loads(line)
+                group = groups.setdefault(patient_key(resource), [])
+                if resource.get("resourceType") == "Patient":
+                    group.insert(0, resource)
+                else:
+                    group.append(resource)
+        return groups
+
+    def close(self) -> None:
+        """Close shard files and delete the spool directory."""
+        for f in self._files:
+            if not f.closed:
+                f.close()
+        self._dir.cleanup()
+
+
+def find_ndjson_files(paths: Sequence[Path]) -> list[Path]:
+    """Expand files and directories into the NDJSON files to import."""
+    files: list[Path] = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(sorted(path.glob("*.ndjson")))
+        else:
+            files.append(path)
+    return files
+
+
+async def import_ndjson(
+    session_factory: async_sessionmaker[AsyncSession],
+    graph: KnowledgeGraph,
+    spool: NdjsonSpool,
+    workers: int = DEFAULT_IMPORT_WORKERS,
+    batch_size: int = STREAM_BATCH_SIZE,
+    executor: Executor | None = None,
+    defer: bool = False,
+) -> NdjsonImportResult:
+    """
+    Load spooled NDJSON resources, many patients in parallel.
+
+    Each patient is loaded through load_bundle_stream (batched writes,
+    content-hash change detection, graph, embeddings, compile) in its own
+    session and committed on its own, so one bad patient does not roll back
+    the rest.
+
+    Args:
+        session_factory: Session factory; each patient gets its own session.
+        graph: KnowledgeGraph instance for Neo4j operations.
+        spool: A finished NdjsonSpool.
+        workers: Maximum patients loaded concurrently.
+        batch_size: Resources per write batch within a patient.
+        executor: Optional executor for CPU-bound preprocessing.
+        defer: Enqueue graph build, embedding and compilation as ingest
+            jobs instead of running them inline.
+
+    Returns:
+        NdjsonImportResult with per-patient and per-resource counts.
+
+    Raises:
+        ValueError: If workers is less than 1.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+
+    result = NdjsonImportResult(
+        resources_skipped=spool.skipped, lines_invalid=spool.invalid
+    )
+    semaphore = asyncio.Semaphore(workers)
+
+    async def load_patient(key: str, resources: list[dict[str, Any]]) -> None:
+        async def entries() -> AsyncIterator[dict[str, Any]]:
+            for resource in resources:
+                yield {"resource": resource}
+
+        async with semaphore:
+            try:
+                async with session_factory() as session:
+                    loaded = await load_bundle_stream(
+                        session,
+                        graph,
+                        entries(),
+                        batch_size=batch_size,
+                        executor=executor,
+                        defer=defer,
+                    )
+                    await session.commit()
+            except Exception as e:
+                result.patients_failed += 1
+                logger.warning("NDJSON import failed for Patient/%s: %s", key, e)
+                return
+
+        result.patients_loaded += 1
+        result.resources_inserted += loaded.inserted
+        result.resources_updated += loaded.updated
+        result.resources_unchanged += loaded.unchanged
+        result.resources_embedded += loaded.embedded
+
+    async for groups in spool.patient_groups():
+        await asyncio.gather(
+            *(load_patient(key, resources) for key, resources in groups.items())
+        )
+
+    logger.info(
+        "NDJSON import: %d patients loaded, %d failed, %d resources "
+        "(%d skipped without a patient reference)",
+        result.patients_loaded,
+        result.patients_failed,
+        result.resources_loaded,
+        result.resources_skipped,
+    )
+    return result
+
+
+async def import_ndjson_files(
+    session_factory: async_sessionmaker[AsyncSession],
+    graph: KnowledgeGraph,
+    paths: Sequence[Path],
+    workers: int = DEFAULT_IMPORT_WORKERS,
+    batch_size: int = STREAM_BATCH_SIZE,
+    executor: Executor | None = None,
+) -> NdjsonImportResult:
+    """
+    Import FHIR Bulk Data NDJSON files (or directories of them).
+
+    Args:
+        session_factory: Session factory; each patient gets its own session.
+        graph: KnowledgeGraph instance for Neo4j operations.
+        paths: NDJSON files and/or directories containing *.ndjson files.
+        workers: Maximum patients loaded concurrently.
+        batch_size: Resources per write batch within a patient.
+        executor: Optional executor for CPU-bound preprocessing.
+
+    Returns:
+        NdjsonImportResult with per-patient and per-resource counts.
+    """
+    with NdjsonSpool() as spool:
+        for path in find_ndjson_files(paths):
+            await asyncio.to_thread(spool.add_file, path)
+        spool.finish()
+        return await import_ndjson(
+            session_factory,
+            graph,
+            spool,
+            workers=workers,
+            batch_size=batch_size,
+            executor=executor,
+        )
+
+
+# =============================================================================
+# Post-Ingest Jobs
+# =============================================================================
+
+
+@dataclass
+class _DeferredWork:
+    """Row ids collected during a deferred load, enqueued once at the end."""
+
+    graph_ids: list[str]
+    embed_ids: list[str]
+
+    def add(self, written: list[WrittenResource]) -> None:
+        """Collect the changed rows and the embeddable embedding candidates."""
+        self.graph_ids.extend(str(w.id) for w in written if w.changed)
+        self.embed_ids.extend(
+            str(w.id)
+            for w in embedding_candidates(written)
+            if resource_to_text(w.data) is not None
+        )
+
+
+async def _enqueue_post_ingest_jobs(
+    db: AsyncSession, result: BundleLoadResult, work: _DeferredWork
+) -> None:
+    """Enqueue the graph, embed and compile jobs for a deferred load.
+
+    The graph job enqueues compilation when it finishes, since the summary
+    reads from the graph. With nothing changed, compilation is enqueued
+    directly only if the patient has no summary yet.
+    """
+    result.deferred = True
+    patient_id = result.patient_id
+    if work.embed_ids:
+        enqueue_job(
+            db, patient_id, IngestJobKind.EMBED, {"resource_ids": work.embed_ids}
+        )
+    if work.graph_ids:
+        enqueue_job(
+            db, patient_id, IngestJobKind.GRAPH, {"resource_ids": work.graph_ids}
+        )
+    elif not await _has_compiled_summary(db, patient_id):
+        enqueue_job(db, patient_id, IngestJobKind.COMPILE)
+
+    logger.info(
+        "Wrote bundle for patient %s: %d inserted, %d updated, %d unchanged; "
+        "enqueued post-ingest jobs (%d to graph, %d to embed)",
+        patient_id,
+        result.inserted,
+        result.updated,
+        result.unchanged,
+        len(work.graph_ids),
+        len(work.embed_ids),
+    )
+
+
+async def _load_job_resources(
+    db: AsyncSession, resource_ids: list[str]
+) -> list[WrittenResource]:
+    """Fetch the rows a job refers to (ids deleted since are skipped)."""
+    ids = [uuid.UUID(resource_id) for resource_id in resource_ids]
+    resources: list[WrittenResource] = []
+    for i in range(0, len(ids), UPSERT_BATCH_SIZE):
+        result = await db.execute(
+            select(
+                FhirResource.id,
+                FhirResource.fhir_id,
+                FhirResource.resource_type,
+                FhirResource.data,
+            ).where(FhirResource.id.in_(ids[i : i + UPSERT_BATCH_SIZE]))
+        )
+        resources.extend(
+            WrittenResource(
+                id=row.id,
+                fhir_id=row.fhir_id,
+                resource_type=row.resource_type,
+                data=row.data,
+            )
+            for row in result.all()
+        )
+    return resources
+
+
+async def _run_graph_job(
+    db: AsyncSession, graph: KnowledgeGraph, job: IngestJob
+) -> None:
+    """MERGE changed resources into Neo4j, rebuild relationships once, then
+    enqueue compilation."""
+    resources = await _load_job_resources(db, job.payload.get("resource_ids", []))
+    # Rows come back unordered, and every node MERGE anchors on the Patient
+    # node: put the Patient resource in the first slice so a new patient's
+    # node exists before the other slices run
+    resources.sort(key=lambda r: r.resource_type != "Patient")
+    patient_id = str(job.patient_id)
+    for i in range(0, len(resources), STREAM_BATCH_SIZE):
+        await graph.build_from_fhir(
+            patient_id,
+            [r.data for r in resources[i : i + STREAM_BATCH_SIZE]],
+            build_relationships=False,
+        )
+    await graph.build_relationships(patient_id)
+    enqueue_job(db, job.patient_id, IngestJobKind.COMPILE)
+
+
+async def _run_embed_job(
+    db: AsyncSession, graph: KnowledgeGraph, job: IngestJob
+) -> None:
+    """Embed the job's resources and note chunks and store the vectors."""
+    resources = await _load_job_resources(db, job.payload.get("resource_ids", []))
+    await _generate_embeddings(resources, raise_errors=True, db=db)
+    await _store_embeddings(db, resources, job.patient_id)
+    invalidate_patient_vectors(job.patient_id)
+    await sync_note_chunks(db, job.patient_id, resources, raise_errors=True)
+
+
+async def _run_compile_job(
+    db: AsyncSession, graph: KnowledgeGraph, job: IngestJob
+) -> None:
+    """Compile and store the patient summary."""
+    await compile_and_store(job.patient_id, graph, db)
+
+
+def register_ingest_job_handlers() -> None:
+    """Register the post-ingest job handlers with the job queue."""
+    register_job_handler(IngestJobKind.GRAPH, _run_graph_job)
+    register_job_handler(IngestJobKind.EMBED, _run_embed_job)
+    register_job_handler(IngestJobKind.COMPILE, _run_compile_job)
+
+
 def get_patient_profile(patient_data: dict[str, Any]) -> dict[str, Any] | None:
     """
     Extract patient profile from FHIR Patient resource.
@@ -455,10 +1502,9 @@ async def get_patient_resources(
         List of raw FHIR resource dicts.
     """
     result = await db.execute(
-        select(FhirResource).where(FhirResource.patient_id == patient_id)
+        select(FhirResource.data).where(FhirResource.patient_id == patient_id)
     )
-    resources = result.scalars().all()
-    return [r.data for r in resources]
+    return list(result.scalars().all())
 
 
 async def get_patient_resource(
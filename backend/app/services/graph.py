@@ -4,7 +4,7 @@ import json
 import logging
 from typing import Any, NamedTuple, TypedDict
 
-from neo4j import AsyncGraphDatabase, AsyncDriver, AsyncSession
+from neo4j import AsyncDriver, AsyncGraphDatabase, AsyncSession
 
 from app.config import settings
 
@@ -49,7 +49,11 @@ def _extract_reference_ids(refs: list[dict[str, Any]]) -> list[str]:
     Returns:
         List of extracted IDs (None values filtered out)
     """
-    ids = [_extract_reference_id(ref.get("reference")) for ref in refs if ref.get("reference")]
+    ids = [
+        _extract_reference_id(ref.get("reference"))
+        for ref in refs
+        if ref.get("reference")
+    ]
     return [id for id in ids if id]
 
 
@@ -180,7 +184,9 @@ def _extract_observation_value(resource: dict[str, Any]) -> tuple[Any, str | Non
         Tuple of (value, unit) where unit may be None
     """
     if "valueQuantity" in resource:
-        return resource["valueQuantity"].get("value"), resource["valueQuantity"].get("unit")
+        return resource["valueQuantity"].get("value"), resource["valueQuantity"].get(
+            "unit"
+        )
     elif "valueCodeableConcept" in resource:
         value_codings = resource["valueCodeableConcept"].get("coding", [])
         return (value_codings[0].get("display") if value_codings else None), None
@@ -219,6 +225,14 @@ class EncounterEvents(TypedDict):
     medication_administrations: list[dict[str, Any]]
 
 
+class ConditionContext(TypedDict):
+    """Per-condition value of get_condition_context_batch."""
+
+    treating_medications: list[dict[str, Any]]
+    care_plans: list[dict[str, Any]]
+    procedures: list[dict[str, Any]]
+
+
 class ConnectionRecord(TypedDict):
     """Single connection returned by get_all_connections."""
 
@@ -283,6 +297,9 @@ class KnowledgeGraph:
     - Claim BILLED_FOR Encounter
     - Claim CLAIMS_DIAGNOSIS Condition
     - ExplanationOfBenefit EXPLAINS Claim
+
+    Inferred relationships (when settings.graph_inferred_treats_enabled):
+    - MedicationRequest INFERRED_TREATS Condition
     """
 
     class _EncounterRel(NamedTuple):
@@ -299,27 +316,63 @@ class KnowledgeGraph:
         _EncounterRel("DiagnosticReport", "HAS_DIAGNOSTIC_REPORT", "REPORTED", "dr"),
         _EncounterRel("Immunization", "HAS_IMMUNIZATION", "ADMINISTERED", "im"),
         _EncounterRel("CarePlan", "HAS_CARE_PLAN", "CREATED_DURING", "cp"),
-        _EncounterRel("DocumentReference", "HAS_DOCUMENT_REFERENCE", "DOCUMENTED", "docr"),
+        _EncounterRel(
+            "DocumentReference", "HAS_DOCUMENT_REFERENCE", "DOCUMENTED", "docr"
+        ),
         _EncounterRel("ImagingStudy", "HAS_IMAGING_STUDY", "IMAGED", "img"),
         _EncounterRel("CareTeam", "HAS_CARE_TEAM", "ASSEMBLED", "ct"),
-        _EncounterRel("MedicationAdministration", "HAS_MEDICATION_ADMINISTRATION", "GIVEN", "ma"),
+        _EncounterRel(
+            "MedicationAdministration", "HAS_MEDICATION_ADMINISTRATION", "GIVEN", "ma"
+        ),
     ]
 
+    # EncounterEvents key holding each encounter relationship's targets
+    _ENCOUNTER_EVENT_KEYS = {
+        "DIAGNOSED": "conditions",
+        "PRESCRIBED": "medications",
+        "RECORDED": "observations",
+        "PERFORMED": "procedures",
+        "REPORTED": "diagnostic_reports",
+        "ADMINISTERED": "immunizations",
+        "CREATED_DURING": "care_plans",
+        "DOCUMENTED": "document_references",
+        "IMAGED": "imaging_studies",
+        "ASSEMBLED": "care_teams",
+        "GIVEN": "medication_administrations",
+    }
+
     # Frozen whitelist for Cypher injection protection: only these values
     # may appear in dynamically constructed Cypher queries.
-    _VALID_LABELS = frozenset(
-        r.node_label for r in _ENCOUNTER_RELATIONSHIPS
-    ) | {"Patient", "Encounter", "Medication", "AllergyIntolerance",
-         "Claim", "ExplanationOfBenefit", "SupplyDelivery", "Device"}
-    _VALID_RELATIONSHIPS = frozenset(
-        r.patient_rel for r in _ENCOUNTER_RELATIONSHIPS
-    ) | frozenset(
-        r.encounter_rel for r in _ENCOUNTER_RELATIONSHIPS
-    ) | {"HAS_ALLERGY_INTOLERANCE", "HAS_ENCOUNTER", "HAS_DEVICE",
-         "HAS_CLAIM", "HAS_EOB", "HAS_SUPPLY_DELIVERY"}
-    _VALID_DISPLAY_PROPS = frozenset([
-        "display", "type_display", "procedure_display", "item_display",
-    ])
+    _VALID_LABELS = frozenset(r.node_label for r in _ENCOUNTER_RELATIONSHIPS) | {
+        "Patient",
+        "Encounter",
+        "Medication",
+        "AllergyIntolerance",
+        "Claim",
+        "ExplanationOfBenefit",
+        "SupplyDelivery",
+        "Device",
+    }
+    _VALID_RELATIONSHIPS = (
+        frozenset(r.patient_rel for r in _ENCOUNTER_RELATIONSHIPS)
+        | frozenset(r.encounter_rel for r in _ENCOUNTER_RELATIONSHIPS)
+        | {
+            "HAS_ALLERGY_INTOLERANCE",
+            "HAS_ENCOUNTER",
+            "HAS_DEVICE",
+            "HAS_CLAIM",
+            "HAS_EOB",
+            "HAS_SUPPLY_DELIVERY",
+        }
+    )
+    _VALID_DISPLAY_PROPS = frozenset(
+        [
+            "display",
+            "type_display",
+            "procedure_display",
+            "item_display",
+        ]
+    )
 
     def __init__(self, driver: AsyncDriver | None = None):
         """
@@ -381,7 +434,11 @@ class KnowledgeGraph:
                 ("imaging_study_fhir_id_unique", "ImagingStudy", "fhir_id"),
                 ("device_fhir_id_unique", "Device", "fhir_id"),
                 ("care_team_fhir_id_unique", "CareTeam", "fhir_id"),
-                ("medication_admin_fhir_id_unique", "MedicationAdministration", "fhir_id"),
+                (
+                    "medication_admin_fhir_id_unique",
+                    "MedicationAdministration",
+                    "fhir_id",
+                ),
                 ("medication_catalog_fhir_id_unique", "Medication", "fhir_id"),
                 ("claim_fhir_id_unique", "Claim", "fhir_id"),
                 ("eob_fhir_id_unique", "ExplanationOfBenefit", "fhir_id"),
@@ -402,13 +459,25 @@ class KnowledgeGraph:
                 ("medication_encounter", "MedicationRequest", "encounter_fhir_id"),
                 ("observation_encounter", "Observation", "encounter_fhir_id"),
                 ("procedure_encounter", "Procedure", "encounter_fhir_id"),
-                ("diagnostic_report_encounter", "DiagnosticReport", "encounter_fhir_id"),
+                (
+                    "diagnostic_report_encounter",
+                    "DiagnosticReport",
+                    "encounter_fhir_id",
+                ),
                 ("immunization_encounter", "Immunization", "encounter_fhir_id"),
                 ("careplan_encounter", "CarePlan", "encounter_fhir_id"),
-                ("document_reference_encounter", "DocumentReference", "encounter_fhir_id"),
+                (
+                    "document_reference_encounter",
+                    "DocumentReference",
+                    "encounter_fhir_id",
+                ),
                 ("imaging_study_encounter", "ImagingStudy", "encounter_fhir_id"),
                 ("care_team_encounter", "CareTeam", "encounter_fhir_id"),
-                ("medication_admin_encounter", "MedicationAdministration", "encounter_fhir_id"),
+                (
+                    "medication_admin_encounter",
+                    "MedicationAdministration",
+                    "encounter_fhir_id",
+                ),
             ]
 
             for name, label, prop in relationship_indexes:
@@ -642,6 +711,38 @@ class KnowledgeGraph:
             patient_id=patient_id,
         )
 
+    async def _build_inferred_relationships(
+        self, session: AsyncSession, patient_id: str
+    ) -> None:
+        """
+        Materialize encounter-inferred medication links for a specific patient.
+
+        Must run after the encounter and clinical reasoning passes. Existing
+        INFERRED_TREATS edges are replaced so a rebuild drops stale links
+        (e.g. for a medication that has since gained a TREATS edge).
+
+        Creates relationships:
+        - MedicationRequest -[:INFERRED_TREATS]-> Condition, for medications
+          without a TREATS edge, via PRESCRIBED -> Encounter -> DIAGNOSED
+        """
+        await session.run(
+            """
+            MATCH (p:Patient {id: $patient_id})-[:HAS_MEDICATION_REQUEST]->(m:MedicationRequest)
+            MATCH (m)-[r:INFERRED_TREATS]->(:Condition)
+            DELETE r
+            """,
+            patient_id=patient_id,
+        )
+        await session.run(
+            """
+            MATCH (p:Patient {id: $patient_id})-[:HAS_MEDICATION_REQUEST]->(m:MedicationRequest)
+            WHERE NOT (m)-[:TREATS]->(:Condition)
+            MATCH (m)<-[:PRESCRIBED]-(e:Encounter)-[:DIAGNOSED]->(c:Condition)
+            MERGE (m)-[:INFERRED_TREATS]->(c)
+            """,
+            patient_id=patient_id,
+        )
+
     # =========================================================================
     # Query Methods
     # =========================================================================
@@ -865,9 +966,67 @@ class KnowledgeGraph:
                 "document_references": _parse_fhir_nodes(record["document_references"]),
                 "imaging_studies": _parse_fhir_nodes(record["imaging_studies"]),
                 "care_teams": _parse_fhir_nodes(record["care_teams"]),
-                "medication_administrations": _parse_fhir_nodes(record["medication_administrations"]),
+                "medication_administrations": _parse_fhir_nodes(
+                    record["medication_administrations"]
+                ),
             }
 
+    async def get_encounter_events_batch(
+        self, patient_id: str, encounter_fhir_ids: list[str]
+    ) -> dict[str, EncounterEvents]:
+        """
+        Get the clinical events of many encounters in one query.
+
+        Batched form of get_encounter_events, scoped to the patient's
+        encounters. Each relationship is collected by its own pattern
+        comprehension per UNWOUND encounter, so the eleven event lists are
+        never multiplied into an OPTIONAL MATCH cross product.
+
+        Args:
+            patient_id: The canonical patient UUID.
+            encounter_fhir_ids: FHIR IDs of the encounters.
+
+        Returns:
+            Dict mapping every requested encounter FHIR ID to its events,
+            with empty lists for encounters that are not in the graph.
+        """
+        events: dict[str, EncounterEvents] = {
+            fhir_id: {key: [] for key in self._ENCOUNTER_EVENT_KEYS.values()}
+            for fhir_id in encounter_fhir_ids
+        }
+        if not events:
+            return events
+
+        columns = []
+        for rel in self._ENCOUNTER_RELATIONSHIPS:
+            # Validate against frozen whitelists to prevent Cypher injection
+            if rel.node_label not in self._VALID_LABELS:
+                raise ValueError(f"Invalid label: {rel.node_label}")
+            if rel.encounter_rel not in self._VALID_RELATIONSHIPS:
+                raise ValueError(f"Invalid rel: {rel.encounter_rel}")
+            columns.append(
+                f"[(e)-[:{rel.encounter_rel}]->(n:{rel.node_label}) | n.fhir_resource]"
+                f" AS {self._ENCOUNTER_EVENT_KEYS[rel.encounter_rel]}"
+            )
+
+        async with self._driver.session() as session:
+            result = await session.run(
+                f"""
+                UNWIND $encounter_ids AS encounter_id
+                MATCH (p:Patient {{id: $patient_id}})-[:HAS_ENCOUNTER]->(e:Encounter {{fhir_id: encounter_id}})
+                RETURN encounter_id, {", ".join(columns)}
+                """,
+                patient_id=patient_id,
+                encounter_ids=list(events),
+            )
+            async for record in result:
+                encounter_events = events[record["encounter_id"]]
+                for key in self._ENCOUNTER_EVENT_KEYS.values():
+                    encounter_events[key].extend(
+                        json.loads(resource) for resource in record[key] if resource
+                    )
+            return events
+
     async def get_medications_treating_condition(
         self, condition_fhir_id: str
     ) -> list[dict[str, Any]]:
@@ -946,6 +1105,103 @@ class KnowledgeGraph:
                     care_plans.append(json.loads(record["resource"]))
             return care_plans
 
+    async def get_condition_context_batch(
+        self, condition_fhir_ids: list[str]
+    ) -> dict[str, ConditionContext]:
+        """
+        Get treating medications, care plans and procedures for many conditions.
+
+        Batched form of get_medications_treating_condition,
+        get_care_plans_for_condition and get_procedures_for_condition: one
+        UNWIND query covers every condition, with a pattern comprehension
+        per relationship so the three lists never multiply into each other.
+
+        Args:
+            condition_fhir_ids: FHIR IDs of the conditions.
+
+        Returns:
+            Dict mapping every requested condition FHIR ID to its parsed FHIR
+            MedicationRequest, CarePlan and Procedure resources (empty lists
+            for conditions that are not in the graph).
+        """
+        contexts: dict[str, ConditionContext] = {
+            fhir_id: {"treating_medications": [], "care_plans": [], "procedures": []}
+            for fhir_id in condition_fhir_ids
+        }
+        if not contexts:
+            return contexts
+
+        async with self._driver.session() as session:
+            result = await session.run(
+                """
+                UNWIND $condition_ids AS condition_id
+                MATCH (c:Condition {fhir_id: condition_id})
+                RETURN condition_id,
+                       [(c)<-[:TREATS]-(m:MedicationRequest) | m.fhir_resource]
+                           AS medications,
+                       [(c)<-[:ADDRESSES]-(cp:CarePlan) | cp.fhir_resource]
+                           AS care_plans,
+                       [(c)<-[:TREATS]-(pr:Procedure) | pr.fhir_resource]
+                           AS procedures
+                """,
+                condition_ids=list(contexts),
+            )
+            async for record in result:
+                context = contexts[record["condition_id"]]
+                for key, column in (
+                    ("treating_medications", "medications"),
+                    ("care_plans", "care_plans"),
+                    ("procedures", "procedures"),
+                ):
+                    context[key].extend(
+                        json.loads(resource) for resource in record[column] if resource
+                    )
+            return contexts
+
+    async def get_inferred_condition_links(
+        self, patient_id: str, medication_fhir_ids: list[str]
+    ) -> dict[str, list[str]]:
+        """
+        Get conditions linked to medications through shared encounters.
+
+        A medication is linked to every condition diagnosed during an
+        encounter that prescribed it: (m)<-[:PRESCRIBED]-(e)-[:DIAGNOSED]->(c).
+        All medications are resolved in one patient-scoped UNWIND query.
+        When settings.graph_inferred_treats_enabled, the INFERRED_TREATS
+        edges materialized at build time are read instead.
+
+        Args:
+            patient_id: The canonical patient UUID.
+            medication_fhir_ids: FHIR IDs of the MedicationRequests.
+
+        Returns:
+            Dict mapping each medication FHIR ID to the FHIR IDs of its
+            inferred conditions. Medications without any are omitted.
+        """
+        if not medication_fhir_ids:
+            return {}
+
+        if settings.graph_inferred_treats_enabled:
+            link_pattern = "(m)-[:INFERRED_TREATS]->(c:Condition)"
+        else:
+            link_pattern = "(m)<-[:PRESCRIBED]-(:Encounter)-[:DIAGNOSED]->(c:Condition)"
+
+        async with self._driver.session() as session:
+            result = await session.run(
+                f"""
+                UNWIND $medication_ids AS medication_id
+                MATCH (p:Patient {{id: $patient_id}})-[:HAS_MEDICATION_REQUEST]->(m:MedicationRequest {{fhir_id: medication_id}})
+                MATCH {link_pattern}
+                RETURN medication_id, collect(DISTINCT c.fhir_id) AS condition_ids
+                """,
+                patient_id=patient_id,
+                medication_ids=medication_fhir_ids,
+            )
+            return {
+                record["medication_id"]: record["condition_ids"]
+                async for record in result
+            }
+
     async def search_nodes_by_name(
         self,
         patient_id: str,
@@ -1039,11 +1295,13 @@ class KnowledgeGraph:
                 )
                 async for record in result:
                     if record["fhir_id"]:
-                        results.append({
-                            "fhir_id": record["fhir_id"],
-                            "resource_type": label,
-                            "encounter_fhir_id": record["encounter_fhir_id"],
-                        })
+                        results.append(
+                            {
+                                "fhir_id": record["fhir_id"],
+                                "resource_type": label,
+                                "encounter_fhir_id": record["encounter_fhir_id"],
+                            }
+                        )
 
         return results
 
@@ -1075,11 +1333,13 @@ class KnowledgeGraph:
             )
             async for record in result:
                 if record["fhir_id"]:
-                    results.append({
-                        "fhir_id": record["fhir_id"],
-                        "resource_type": "Observation",
-                        "encounter_fhir_id": record["encounter_fhir_id"],
-                    })
+                    results.append(
+                        {
+                            "fhir_id": record["fhir_id"],
+                            "resource_type": "Observation",
+                            "encounter_fhir_id": record["encounter_fhir_id"],
+                        }
+                    )
 
         return results
 
@@ -1191,14 +1451,16 @@ class KnowledgeGraph:
             result = await session.run(query, **params)
             connections: list[ConnectionRecord] = []
             async for record in result:
-                connections.append({
-                    "relationship": record["relationship"],
-                    "direction": record["direction"],
-                    "fhir_id": record["fhir_id"],
-                    "resource_type": record["resource_type"],
-                    "name": record["name"],
-                    "fhir_resource": record["fhir_resource"],
-                })
+                connections.append(
+                    {
+                        "relationship": record["relationship"],
+                        "direction": record["direction"],
+                        "fhir_id": record["fhir_id"],
+                        "resource_type": record["resource_type"],
+                        "name": record["name"],
+                        "fhir_resource": record["fhir_resource"],
+                    }
+                )
             return connections
 
     # =========================================================================
@@ -1223,7 +1485,9 @@ class KnowledgeGraph:
 
     @staticmethod
     def _extract_medication_request_params(resource: dict[str, Any]) -> dict[str, Any]:
-        first_coding = _extract_first_coding(resource.get("medicationCodeableConcept", {}))
+        first_coding = _extract_first_coding(
+            resource.get("medicationCodeableConcept", {})
+        )
         return {
             "fhir_id": resource.get("id"),
             "code": first_coding.get("code"),
@@ -1232,7 +1496,9 @@ class KnowledgeGraph:
             "status": resource.get("status"),
             "authored_on": resource.get("authoredOn"),
             "encounter_fhir_id": _extract_encounter_fhir_id(resource),
-            "reason_fhir_ids": _extract_reference_ids(resource.get("reasonReference", [])),
+            "reason_fhir_ids": _extract_reference_ids(
+                resource.get("reasonReference", [])
+            ),
             "fhir_resource": json.dumps(resource),
         }
 
@@ -1296,7 +1562,9 @@ class KnowledgeGraph:
     @staticmethod
     def _extract_procedure_params(resource: dict[str, Any]) -> dict[str, Any]:
         first_coding = _extract_first_coding(resource.get("code", {}))
-        performed = resource.get("performedDateTime") or resource.get("performedPeriod", {}).get("start")
+        performed = resource.get("performedDateTime") or resource.get(
+            "performedPeriod", {}
+        ).get("start")
         return {
             "fhir_id": resource.get("id"),
             "code": first_coding.get("code"),
@@ -1305,7 +1573,9 @@ class KnowledgeGraph:
             "status": resource.get("status"),
             "performed_date": performed,
             "encounter_fhir_id": _extract_encounter_fhir_id(resource),
-            "reason_fhir_ids": _extract_reference_ids(resource.get("reasonReference", [])),
+            "reason_fhir_ids": _extract_reference_ids(
+                resource.get("reasonReference", [])
+            ),
             "fhir_resource": json.dumps(resource),
         }
 
@@ -1435,8 +1705,12 @@ class KnowledgeGraph:
         }
 
     @staticmethod
-    def _extract_medication_administration_params(resource: dict[str, Any]) -> dict[str, Any]:
-        first_coding = _extract_first_coding(resource.get("medicationCodeableConcept", {}))
+    def _extract_medication_administration_params(
+        resource: dict[str, Any],
+    ) -> dict[str, Any]:
+        first_coding = _extract_first_coding(
+            resource.get("medicationCodeableConcept", {})
+        )
         effective = resource.get("effectiveDateTime")
         if not effective:
             effective = resource.get("effectivePeriod", {}).get("start")
@@ -1448,7 +1722,9 @@ class KnowledgeGraph:
             "status": resource.get("status"),
             "effective_date": effective,
             "encounter_fhir_id": _extract_context_encounter_fhir_id(resource),
-            "reason_fhir_ids": _extract_reference_ids(resource.get("reasonReference", [])),
+            "reason_fhir_ids": _extract_reference_ids(
+                resource.get("reasonReference", [])
+            ),
             "medication_fhir_id": _extract_reference_id(
                 resource.get("medicationReference", {}).get("reference")
             ),
@@ -1514,7 +1790,9 @@ class KnowledgeGraph:
             "total_amount": total_amount,
             "total_currency": total_currency,
             "payment_amount": payment_amount,
-            "claim_fhir_id": _extract_reference_id(resource.get("claim", {}).get("reference")),
+            "claim_fhir_id": _extract_reference_id(
+                resource.get("claim", {}).get("reference")
+            ),
             "fhir_resource": json.dumps(resource),
         }
 
@@ -1522,7 +1800,9 @@ class KnowledgeGraph:
     def _extract_supply_delivery_params(resource: dict[str, Any]) -> dict[str, Any]:
         type_coding = _extract_first_coding(resource.get("type", {}))
         supplied_item = resource.get("suppliedItem", {})
-        item_coding = _extract_first_coding(supplied_item.get("itemCodeableConcept", {}))
+        item_coding = _extract_first_coding(
+            supplied_item.get("itemCodeableConcept", {})
+        )
         return {
             "fhir_id": resource.get("id"),
             "status": resource.get("status"),
@@ -1541,7 +1821,9 @@ class KnowledgeGraph:
 
     # Maps resource type -> (extractor, UNWIND Cypher query)
     _BATCH_QUERIES: dict[str, tuple[Any, str]] = {
-        "Condition": (_extract_condition_params, """
+        "Condition": (
+            _extract_condition_params,
+            """
             UNWIND $batch AS r
             MATCH (p:Patient {id: $patient_id})
             MERGE (n:Condition {fhir_id: r.fhir_id})
@@ -1550,8 +1832,11 @@ class KnowledgeGraph:
                 n.abatement_date = r.abatement_date, n.encounter_fhir_id = r.encounter_fhir_id,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
             MERGE (p)-[:HAS_CONDITION]->(n)
-        """),
-        "MedicationRequest": (_extract_medication_request_params, """
+        """,
+        ),
+        "MedicationRequest": (
+            _extract_medication_request_params,
+            """
             UNWIND $batch AS r
             MATCH (p:Patient {id: $patient_id})
             MERGE (n:MedicationRequest {fhir_id: r.fhir_id})
@@ -1560,8 +1845,11 @@ class KnowledgeGraph:
                 n.encounter_fhir_id = r.encounter_fhir_id, n.reason_fhir_ids = r.reason_fhir_ids,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
             MERGE (p)-[:HAS_MEDICATION_REQUEST]->(n)
-        """),
-        "AllergyIntolerance": (_extract_allergy_params, """
+        """,
+        ),
+        "AllergyIntolerance": (
+            _extract_allergy_params,
+            """
             UNWIND $batch AS r
             MATCH (p:Patient {id: $patient_id})
             MERGE (n:AllergyIntolerance {fhir_id: r.fhir_id})
@@ -1570,8 +1858,11 @@ class KnowledgeGraph:
                 n.criticality = r.criticality,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
             MERGE (p)-[:HAS_ALLERGY_INTOLERANCE]->(n)
-        """),
-        "Observation": (_extract_observation_params, """
+        """,
+        ),
+        "Observation": (
+            _extract_observation_params,
+            """
             UNWIND $batch AS r
             MATCH (p:Patient {id: $patient_id})
             MERGE (n:Observation {fhir_id: r.fhir_id})
@@ -1581,8 +1872,11 @@ class KnowledgeGraph:
                 n.encounter_fhir_id = r.encounter_fhir_id,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
             MERGE (p)-[:HAS_OBSERVATION]->(n)
-        """),
-        "Encounter": (_extract_encounter_params, """
+        """,
+        ),
+        "Encounter": (
+            _extract_encounter_params,
+            """
             UNWIND $batch AS r
             MATCH (p:Patient {id: $patient_id})
             MERGE (n:Encounter {fhir_id: r.fhir_id})
@@ -1592,8 +1886,11 @@ class KnowledgeGraph:
                 n.reason_display = r.reason_display, n.reason_code = r.reason_code,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
             MERGE (p)-[:HAS_ENCOUNTER]->(n)
-        """),
-        "Procedure": (_extract_procedure_params, """
+        """,
+        ),
+        "Procedure": (
+            _extract_procedure_params,
+            """
             UNWIND $batch AS r
             MATCH (p:Patient {id: $patient_id})
             MERGE (n:Procedure {fhir_id: r.fhir_id})
@@ -1602,8 +1899,11 @@ class KnowledgeGraph:
                 n.encounter_fhir_id = r.encounter_fhir_id, n.reason_fhir_ids = r.reason_fhir_ids,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
             MERGE (p)-[:HAS_PROCEDURE]->(n)
-        """),
-        "DiagnosticReport": (_extract_diagnostic_report_params, """
+        """,
+        ),
+        "DiagnosticReport": (
+            _extract_diagnostic_report_params,
+            """
             UNWIND $batch AS r
             MATCH (p:Patient {id: $patient_id})
             MERGE (n:DiagnosticReport {fhir_id: r.fhir_id})
@@ -1612,8 +1912,11 @@ class KnowledgeGraph:
                 n.encounter_fhir_id = r.encounter_fhir_id, n.result_fhir_ids = r.result_fhir_ids,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
             MERGE (p)-[:HAS_DIAGNOSTIC_REPORT]->(n)
-        """),
-        "Immunization": (_extract_immunization_params, """
+        """,
+        ),
+        "Immunization": (
+            _extract_immunization_params,
+            """
             UNWIND $batch AS r
             MATCH (p:Patient {id: $patient_id})
             MERGE (n:Immunization {fhir_id: r.fhir_id})
@@ -1622,8 +1925,11 @@ class KnowledgeGraph:
                 n.encounter_fhir_id = r.encounter_fhir_id,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
             MERGE (p)-[:HAS_IMMUNIZATION]->(n)
-        """),
-        "CarePlan": (_extract_careplan_params, """
+        """,
+        ),
+        "CarePlan": (
+            _extract_careplan_params,
+            """
             UNWIND $batch AS r
             MATCH (p:Patient {id: $patient_id})
             MERGE (n:CarePlan {fhir_id: r.fhir_id})
@@ -1633,8 +1939,11 @@ class KnowledgeGraph:
                 n.addresses_fhir_ids = r.addresses_fhir_ids,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
             MERGE (p)-[:HAS_CARE_PLAN]->(n)
-        """),
-        "DocumentReference": (_extract_document_reference_params, """
+        """,
+        ),
+        "DocumentReference": (
+            _extract_document_reference_params,
+            """
             UNWIND $batch AS r
             MATCH (p:Patient {id: $patient_id})
             MERGE (n:DocumentReference {fhir_id: r.fhir_id})
@@ -1643,8 +1952,11 @@ class KnowledgeGraph:
                 n.category = r.category, n.encounter_fhir_id = r.encounter_fhir_id,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
             MERGE (p)-[:HAS_DOCUMENT_REFERENCE]->(n)
-        """),
-        "ImagingStudy": (_extract_imaging_study_params, """
+        """,
+        ),
+        "ImagingStudy": (
+            _extract_imaging_study_params,
+            """
             UNWIND $batch AS r
             MATCH (p:Patient {id: $patient_id})
             MERGE (n:ImagingStudy {fhir_id: r.fhir_id})
@@ -1653,8 +1965,11 @@ class KnowledgeGraph:
                 n.body_site = r.body_site, n.encounter_fhir_id = r.encounter_fhir_id,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
             MERGE (p)-[:HAS_IMAGING_STUDY]->(n)
-        """),
-        "Device": (_extract_device_params, """
+        """,
+        ),
+        "Device": (
+            _extract_device_params,
+            """
             UNWIND $batch AS r
             MATCH (p:Patient {id: $patient_id})
             MERGE (n:Device {fhir_id: r.fhir_id})
@@ -1663,8 +1978,11 @@ class KnowledgeGraph:
                 n.expiration_date = r.expiration_date,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
             MERGE (p)-[:HAS_DEVICE]->(n)
-        """),
-        "CareTeam": (_extract_care_team_params, """
+        """,
+        ),
+        "CareTeam": (
+            _extract_care_team_params,
+            """
             UNWIND $batch AS r
             MATCH (p:Patient {id: $patient_id})
             MERGE (n:CareTeam {fhir_id: r.fhir_id})
@@ -1673,8 +1991,11 @@ class KnowledgeGraph:
                 n.encounter_fhir_id = r.encounter_fhir_id,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
             MERGE (p)-[:HAS_CARE_TEAM]->(n)
-        """),
-        "MedicationAdministration": (_extract_medication_administration_params, """
+        """,
+        ),
+        "MedicationAdministration": (
+            _extract_medication_administration_params,
+            """
             UNWIND $batch AS r
             MATCH (p:Patient {id: $patient_id})
             MERGE (n:MedicationAdministration {fhir_id: r.fhir_id})
@@ -1685,15 +2006,21 @@ class KnowledgeGraph:
                 n.medication_fhir_id = r.medication_fhir_id,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
             MERGE (p)-[:HAS_MEDICATION_ADMINISTRATION]->(n)
-        """),
-        "Medication": (_extract_medication_params, """
+        """,
+        ),
+        "Medication": (
+            _extract_medication_params,
+            """
             UNWIND $batch AS r
             MERGE (n:Medication {fhir_id: r.fhir_id})
             SET n.code = r.code, n.display = r.display, n.system = r.system,
                 n.status = r.status,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
-        """),
-        "Claim": (_extract_claim_params, """
+        """,
+        ),
+        "Claim": (
+            _extract_claim_params,
+            """
             UNWIND $batch AS r
             MATCH (p:Patient {id: $patient_id})
             MERGE (n:Claim {fhir_id: r.fhir_id})
@@ -1705,8 +2032,11 @@ class KnowledgeGraph:
                 n.diagnosis_fhir_ids = r.diagnosis_fhir_ids,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
             MERGE (p)-[:HAS_CLAIM]->(n)
-        """),
-        "ExplanationOfBenefit": (_extract_eob_params, """
+        """,
+        ),
+        "ExplanationOfBenefit": (
+            _extract_eob_params,
+            """
             UNWIND $batch AS r
             MATCH (p:Patient {id: $patient_id})
             MERGE (n:ExplanationOfBenefit {fhir_id: r.fhir_id})
@@ -1716,8 +2046,11 @@ class KnowledgeGraph:
                 n.claim_fhir_id = r.claim_fhir_id,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
             MERGE (p)-[:HAS_EOB]->(n)
-        """),
-        "SupplyDelivery": (_extract_supply_delivery_params, """
+        """,
+        ),
+        "SupplyDelivery": (
+            _extract_supply_delivery_params,
+            """
             UNWIND $batch AS r
             MATCH (p:Patient {id: $patient_id})
             MERGE (n:SupplyDelivery {fhir_id: r.fhir_id})
@@ -1726,7 +2059,8 @@ class KnowledgeGraph:
                 n.item_display = r.item_display, n.occurrence_date = r.occurrence_date,
                 n.fhir_resource = r.fhir_resource, n.updated_at = datetime()
             MERGE (p)-[:HAS_SUPPLY_DELIVERY]->(n)
-        """),
+        """,
+        ),
     }
 
     # =========================================================================
@@ -1734,7 +2068,10 @@ class KnowledgeGraph:
     # =========================================================================
 
     async def build_from_fhir(
-        self, patient_id: str, resources: list[dict[str, Any]]
+        self,
+        patient_id: str,
+        resources: list[dict[str, Any]],
+        build_relationships: bool = True,
     ) -> None:
         """
         Build graph nodes and relationships from FHIR resources.
@@ -1753,6 +2090,9 @@ class KnowledgeGraph:
         Args:
             patient_id: The canonical patient UUID (PostgreSQL-generated).
             resources: List of FHIR resources belonging to this patient.
+            build_relationships: Run the second pass. Batched loaders pass
+                False for each batch and call build_relationships() once at
+                the end, since the second pass is patient-wide.
         """
         async with self._driver.session() as session:
             tx = await session.begin_transaction()
@@ -1781,9 +2121,34 @@ class KnowledgeGraph:
                     await tx.run(query, patient_id=patient_id, batch=batch)
 
                 # Second pass: build inter-resource relationships (patient-scoped)
+                if build_relationships:
+                    await self._build_encounter_relationships(tx, patient_id)
+                    await self._build_clinical_reasoning_relationships(tx, patient_id)
+                    if settings.graph_inferred_treats_enabled:
+                        await self._build_inferred_relationships(tx, patient_id)
+
+                await tx.commit()
+            except Exception:
+                await tx.rollback()
+                raise
+
+    async def build_relationships(self, patient_id: str) -> None:
+        """
+        Build inter-resource relationships for a patient's existing nodes.
+
+        The second pass of build_from_fhir on its own, for loaders that create
+        nodes in several batches.
+
+        Args:
+            patient_id: The canonical patient UUID (PostgreSQL-generated).
+        """
+        async with self._driver.session() as session:
+            tx = await session.begin_transaction()
+            try:
                 await self._build_encounter_relationships(tx, patient_id)
                 await self._build_clinical_reasoning_relationships(tx, patient_id)
-
+                if settings.graph_inferred_treats_enabled:
+                    await self._build_inferred_relationships(tx, patient_id)
                 await tx.commit()
             except Exception:
                 await tx.rollback()
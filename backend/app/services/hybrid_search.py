@@ -0,0 +1,525 @@
+"""Hybrid lexical + vector search over FHIR resources.
+
+Pairs Postgres full-text search (the GIN-indexed search_vector tsvector over
+embedding_text, plus pg_trgm-indexed substring matches) with pgvector cosine
+search (quantized HNSW candidates re-ranked at full precision) and, for
+clinical notes, passage search over note_chunks. Each signal ranks its own
+candidates and the rankings are merged by weighted reciprocal rank fusion:
+
+    score(resource) = sum over signals of weight / (k + rank)
+
+Everything (candidate retrieval, fusion, and fetching the fused rows) runs in
+one SQL statement, and several queries can be batched into the same
+statement as UNION ALL branches.
+
+SECURITY: Like VectorSearchService, this service enforces patient-scoped
+queries but does NOT perform authentication or authorization.
+"""
+
+import logging
+import re
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import (
+    ColumnElement,
+    DateTime,
+    Float,
+    Integer,
+    Select,
+    Text,
+    and_,
+    cast,
+    func,
+    literal,
+    null,
+    or_,
+    select,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import FhirResource, NoteChunk
+from app.services.vector_search import (
+    EMBEDDING_DIMENSION,
+    MAX_BATCH_QUERIES,
+    MAX_LIMIT,
+    configure_index_scan,
+    index_scan_settings,
+    nearest_resources,
+    note_chunk_distance,
+    parse_uuid,
+    validate_query_embedding,
+)
+
+logger = logging.getLogger(__name__)
+
+# Text search configuration used by the search_vector column
+TEXT_SEARCH_CONFIG = "english"
+
+# Candidates taken from each signal before fusion
+CANDIDATES_PER_SIGNAL = 50
+
+# Semantic candidates below this cosine similarity are not fused
+DEFAULT_MIN_SIMILARITY = 0.4
+
+
+@dataclass
+class HybridQuery:
+    """One hybrid search request.
+
+    Attributes:
+        text: Query text for full-text search.
+        embedding: Query embedding for the vector and note passage signals;
+            None runs a lexical-only search.
+        limit: Maximum fused results to return.
+        resource_type: Optional FHIR resource type filter.
+        status: Optional status filter (substring of clinicalStatus or status).
+        category: Optional category code filter (substring).
+        date_from: Optional lower bound on the resource's clinical date.
+        date_to: Optional upper bound on the resource's clinical date.
+    """
+
+    text: str
+    embedding: list[float] | None = None
+    limit: int = 10
+    resource_type: str | None = None
+    status: str | None = None
+    category: str | None = None
+    date_from: str | None = None
+    date_to: str | None = None
+
+
+@dataclass
+class HybridResult:
+    """A FHIR resource ranked by fused lexical and semantic relevance.
+
+    Attributes:
+        resource: The FHIR resource data (raw JSON).
+        resource_type: The FHIR resource type.
+        fhir_id: The FHIR resource ID.
+        score: Reciprocal rank fusion score (higher is more relevant).
+        lexical_rank: Rank among full-text matches, or None if not matched.
+        similarity: Cosine similarity of the resource embedding, or None if
+            it was not a semantic candidate.
+        passage: Best matching note passage (DocumentReferences only).
+        passage_similarity: Cosine similarity of that passage.
+    """
+
+    resource: dict[str, Any]
+    resource_type: str
+    fhir_id: str
+    score: float
+    lexical_rank: int | None = None
+    similarity: float | None = None
+    passage: str | None = None
+    passage_similarity: float | None = None
+
+    @property
+    def signals(self) -> list[str]:
+        """Names of the signals that matched this resource."""
+        matched = []
+        if self.lexical_rank is not None:
+            matched.append("lexical")
+        if self.similarity is not None:
+            matched.append("semantic")
+        if self.passage is not None:
+            matched.append("passage")
+        return matched
+
+
+_DATE_ONLY = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def _fhir_instant(value: str) -> ColumnElement[Any]:
+    """A FHIR date/dateTime bound as a timestamptz (offset-less values are UTC)."""
+    return func.fhir_timestamptz(literal(value, Text), type_=DateTime(timezone=True))
+
+
+def resource_filter_conditions(
+    resource_type: str | None = None,
+    status: str | None = None,
+    category: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+) -> list[ColumnElement[bool]]:
+    """Attribute filter predicates on fhir_resources shared by the search paths."""
+    conditions: list[ColumnElement[bool]] = []
+
+    if resource_type:
+        conditions.append(FhirResource.resource_type == resource_type)
+
+    if status:
+        # Status can be in clinicalStatus.coding[0].code or status field
+        conditions.append(
+            func.coalesce(
+                FhirResource.data["clinicalStatus"]["coding"][0]["code"].astext,
+                FhirResource.data["status"].astext,
+            ).ilike(f"%{status}%")
+        )
+
+    if category:
+        conditions.append(
+            FhirResource.data["category"][0]["coding"][0]["code"].astext.ilike(
+                f"%{category}%"
+            )
+        )
+
+    # effective_date is the generated, indexed first-of-the-date-fields
+    # timestamptz; bounds are parsed by the same fhir_timestamptz(), and a
+    # date-only date_to takes in that whole day
+    if date_from:
+        conditions.append(FhirResource.effective_date >= _fhir_instant(date_from))
+    if date_to:
+        upper = _fhir_instant(date_to)
+        if _DATE_ONLY.fullmatch(date_to):
+            conditions.append(FhirResource.effective_date < upper + timedelta(days=1))
+        else:
+            conditions.append(FhirResource.effective_date <= upper)
+
+    return conditions
+
+
+class HybridSearchService:
+    """
+    Hybrid full-text + vector search with reciprocal rank fusion.
+
+    Example:
+        service = HybridSearchService(session)
+        results = await service.search(
+            patient_id,
+            HybridQuery(text="kidney function", embedding=vector, limit=5),
+        )
+        for result in results:
+            print(result.fhir_id, result.signals, f"{result.score:.4f}")
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        lexical_weight: float | None = None,
+        semantic_weight: float | None = None,
+        passage_weight: float | None = None,
+        rrf_k: int | None = None,
+        min_similarity: float = DEFAULT_MIN_SIMILARITY,
+        index_strategy: str | None = None,
+    ):
+        """
+        Initialize HybridSearchService.
+
+        Args:
+            session: Async SQLAlchemy session for database queries.
+            lexical_weight: RRF weight of the full-text signal
+                (default settings.hybrid_lexical_weight).
+            semantic_weight: RRF weight of the vector signal
+                (default settings.hybrid_semantic_weight).
+            passage_weight: RRF weight of the note passage signal
+                (default settings.hybrid_passage_weight).
+            rrf_k: RRF rank constant; larger values flatten the advantage of
+                top ranks (default settings.hybrid_rrf_k).
+            min_similarity: Minimum cosine similarity (0-1) for semantic
+                candidates to be fused.
+            index_strategy: Vector index strategy for the semantic signals
+                (default settings.vector_index_strategy).
+
+        Raises:
+            ValueError: If a weight is negative, rrf_k is negative or
+                min_similarity is out of range, or the index strategy is
+                unknown.
+        """
+        self._session = session
+        self.lexical_weight = (
+            settings.hybrid_lexical_weight if lexical_weight is None else lexical_weight
+        )
+        self.semantic_weight = (
+            settings.hybrid_semantic_weight
+            if semantic_weight is None
+            else semantic_weight
+        )
+        self.passage_weight = (
+            settings.hybrid_passage_weight if passage_weight is None else passage_weight
+        )
+        self.rrf_k = settings.hybrid_rrf_k if rrf_k is None else rrf_k
+        self.min_similarity = min_similarity
+        self._scan_settings = index_scan_settings(index_strategy)
+        self._exact = (index_strategy or settings.vector_index_strategy) == "exact"
+
+        if min(self.lexical_weight, self.semantic_weight, self.passage_weight) < 0:
+            raise ValueError("weights cannot be negative")
+        if self.rrf_k < 0:
+            raise ValueError("rrf_k cannot be negative")
+        if not (0.0 <= min_similarity <= 1.0):
+            raise ValueError("min_similarity must be between 0.0 and 1.0")
+
+    async def search(
+        self, patient_id: uuid.UUID | str, query: HybridQuery
+    ) -> list[HybridResult]:
+        """
+        Run one hybrid search.
+
+        SECURITY: All queries are scoped to the specified patient_id.
+
+        Args:
+            patient_id: The patient UUID to scope the search to.
+            query: The search request.
+
+        Returns:
+            HybridResult objects ordered by fused score (highest first).
+
+        Raises:
+            ValueError: If the query is invalid.
+        """
+        results = await self.search_many(patient_id, [query])
+        return results[0]
+
+    async def search_many(
+        self, patient_id: uuid.UUID | str, queries: list[HybridQuery]
+    ) -> list[list[HybridResult]]:
+        """
+        Run several hybrid searches in a single SQL statement.
+
+        Args:
+            patient_id: The patient UUID to scope the searches to.
+            queries: Search requests, at most MAX_BATCH_QUERIES.
+
+        Returns:
+            One list of HybridResult objects per query, in input order, each
+            ordered by fused score (highest first).
+
+        Raises:
+            ValueError: If a query is invalid or there are too many queries.
+        """
+        if not queries:
+            raise ValueError("queries cannot be empty")
+        if len(queries) > MAX_BATCH_QUERIES:
+            raise ValueError(
+                f"cannot search more than {MAX_BATCH_QUERIES} queries at once"
+            )
+        for query in queries:
+            _validate_query(query)
+        patient_id = parse_uuid(patient_id, "patient_id")
+
+        branches = [
+            self._fused_select(patient_id, query, ordinal)
+            for ordinal, query in enumerate(queries)
+        ]
+        statement = branches[0] if len(branches) == 1 else union_all(*branches)
+        if any(query.embedding is not None for query in queries):
+            await configure_index_scan(self._session, self._scan_settings)
+        result = await self._session.execute(statement)
+
+        grouped: list[list[HybridResult]] = [[] for _ in queries]
+        for row in result.all():
+            grouped[row.ord].append(
+                HybridResult(
+                    resource=row.data,
+                    resource_type=row.resource_type,
+                    fhir_id=row.fhir_id,
+                    score=row.score,
+                    lexical_rank=row.lexical_rank,
+                    similarity=_similarity(row.distance),
+                    passage=row.passage,
+                    passage_similarity=_similarity(row.passage_distance),
+                )
+            )
+        for results in grouped:
+            results.sort(key=lambda r: r.score, reverse=True)
+        return grouped
+
+    def _fused_select(
+        self, patient_id: uuid.UUID, query: HybridQuery, ordinal: int
+    ) -> Select:
+        """Build one query's candidates, fusion and result rows."""
+        filters = resource_filter_conditions(
+            resource_type=query.resource_type,
+            status=query.status,
+            category=query.category,
+            date_from=query.date_from,
+            date_to=query.date_to,
+        )
+        max_distance = 1 - self.min_similarity
+
+        # Lexical candidates: full-text matches plus substring matches (the
+        # trigram index), ranked by cover density then trigram word similarity
+        ts_query = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, query.text)
+        lexical_order = (
+            func.ts_rank_cd(FhirResource.search_vector, ts_query).desc(),
+            func.word_similarity(query.text, FhirResource.embedding_text).desc(),
+        )
+        lexical = (
+            select(
+                FhirResource.id,
+                func.row_number().over(order_by=lexical_order).label("rank"),
+            )
+            .where(
+                FhirResource.patient_id == patient_id,
+                or_(
+                    FhirResource.search_vector.op("@@")(ts_query),
+                    FhirResource.embedding_text.ilike(f"%{_escape_like(query.text)}%"),
+                ),
+                *filters,
+            )
+            .order_by(*lexical_order)
+            .limit(CANDIDATES_PER_SIGNAL)
+            .cte(f"lexical_{ordinal}")
+        )
+        ranked = [(lexical, self.lexical_weight)]
+
+        semantic = passages = None
+        if query.embedding is not None:
+            query_vector = cast(query.embedding, Vector(EMBEDDING_DIMENSION))
+
+            # Semantic candidates: nearest resource embeddings (quantized
+            # HNSW candidates re-ranked at full precision)
+            nearest = nearest_resources(
+                patient_id,
+                query_vector,
+                CANDIDATES_PER_SIGNAL,
+                resource_filters=tuple(filters),
+                exact=self._exact,
+            ).subquery()
+            semantic = (
+                select(
+                    nearest.c.resource_id.label("id"),
+                    nearest.c.distance,
+                    func.row_number().over(order_by=nearest.c.distance).label("rank"),
+                )
+                .where(nearest.c.distance <= max_distance)
+                .cte(f"semantic_{ordinal}")
+            )
+            ranked.append((semantic, self.semantic_weight))
+
+            if query.resource_type in (None, "DocumentReference"):
+                passages = _passage_candidates(
+                    patient_id, query_vector, max_distance, ordinal, self._exact
+                )
+                ranked.append((passages, self.passage_weight))
+
+        # Weighted reciprocal rank fusion over the candidate lists
+        contributions = union_all(
+            *(
+                select(
+                    candidates.c.id,
+                    (
+                        literal(weight, Float)
+                        / (literal(self.rrf_k, Float) + candidates.c.rank)
+                    ).label("score"),
+                )
+                for candidates, weight in ranked
+            )
+        ).subquery(f"contributions_{ordinal}")
+        fused = (
+            select(contributions.c.id, func.sum(contributions.c.score).label("score"))
+            .group_by(contributions.c.id)
+            .cte(f"fused_{ordinal}")
+        )
+
+        joined = fused.join(FhirResource, FhirResource.id == fused.c.id).outerjoin(
+            lexical, lexical.c.id == fused.c.id
+        )
+        columns: list[Any] = [
+            literal(ordinal, Integer).label("ord"),
+            FhirResource.data,
+            FhirResource.resource_type,
+            FhirResource.fhir_id,
+            fused.c.score,
+            lexical.c.rank.label("lexical_rank"),
+        ]
+        if semantic is not None:
+            joined = joined.outerjoin(semantic, semantic.c.id == fused.c.id)
+            columns.append(semantic.c.distance)
+        else:
+            columns.append(cast(null(), Float).label("distance"))
+        if passages is not None:
+            joined = joined.outerjoin(passages, passages.c.id == fused.c.id)
+            columns.extend(
+                [
+                    passages.c.content.label("passage"),
+                    passages.c.distance.label("passage_distance"),
+                ]
+            )
+        else:
+            columns.extend(
+                [
+                    cast(null(), Text).label("passage"),
+                    cast(null(), Float).label("passage_distance"),
+                ]
+            )
+
+        return (
+            select(*columns)
+            .select_from(joined)
+            .where(and_(FhirResource.patient_id == patient_id, *filters))
+            .order_by(fused.c.score.desc())
+            .limit(query.limit)
+        )
+
+
+def _passage_candidates(
+    patient_id: uuid.UUID,
+    query_vector: Any,
+    max_distance: float,
+    ordinal: int,
+    exact: bool = False,
+):
+    """Notes ranked by their best matching passage (one row per note)."""
+    distance = note_chunk_distance(query_vector, exact)
+    nearest = (
+        select(
+            NoteChunk.resource_id,
+            NoteChunk.content,
+            distance.label("distance"),
+        )
+        .where(NoteChunk.patient_id == patient_id)
+        .order_by(distance)
+        .limit(CANDIDATES_PER_SIGNAL)
+        .subquery()
+    )
+    best = (
+        select(
+            nearest.c.resource_id,
+            nearest.c.content,
+            nearest.c.distance,
+            func.row_number()
+            .over(partition_by=nearest.c.resource_id, order_by=nearest.c.distance)
+            .label("nth"),
+        )
+        .where(nearest.c.distance <= max_distance)
+        .subquery()
+    )
+    return (
+        select(
+            best.c.resource_id.label("id"),
+            best.c.content,
+            best.c.distance,
+            func.row_number().over(order_by=best.c.distance).label("rank"),
+        )
+        .where(best.c.nth == 1)
+        .cte(f"passages_{ordinal}")
+    )
+
+
+def _escape_like(term: str) -> str:
+    """Escape SQL LIKE wildcards in a user-provided search term."""
+    return term.replace("\\", "\\\\").replace("%", r"\%").replace("_", r"\_")
+
+
+def _validate_query(query: HybridQuery) -> None:
+    """Raise ValueError if a HybridQuery is invalid."""
+    if not query.text or not query.text.strip():
+        raise ValueError("query text cannot be empty")
+    if query.limit < 1:
+        raise ValueError("limit must be at least 1")
+    if query.limit > MAX_LIMIT:
+        raise ValueError(f"limit cannot exceed {MAX_LIMIT}")
+    if query.embedding is not None:
+        validate_query_embedding(query.embedding)
+
+
+def _similarity(distance: float | None) -> float | None:
+    """Convert a cosine distance to a similarity score."""
+    return None if distance is None else 1 - distance
@@ -0,0 +1,361 @@
+"""Durable Postgres-backed job queue for post-ingest work.
+
+Jobs live in the ingest_jobs table. enqueue_job adds a row to the caller's
+session, so it commits atomically with the FHIR rows it refers to.
+JobWorkerPool runs asyncio workers in-process; each claims one job at a time
+with SELECT ... FOR UPDATE SKIP LOCKED, so several app replicas can share
+the queue without double-processing and no separate broker is required.
+
+Failed jobs are retried with exponential backoff until max_attempts; a job
+left running by a crashed worker is re-claimed after JOB_LOCK_TIMEOUT.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import IngestJob, IngestJobKind, IngestJobStatus
+from app.services.graph import KnowledgeGraph
+
+logger = logging.getLogger(__name__)
+
+# Handler signature: (session, graph, job). The handler's writes are
+# committed together with the job's completion.
+JobHandler = Callable[[AsyncSession, KnowledgeGraph, IngestJob], Awaitable[None]]
+
+# Attempts before a job is marked failed
+DEFAULT_MAX_ATTEMPTS = 5
+
+# A running job not finished within this window is presumed dead and re-claimed
+JOB_LOCK_TIMEOUT = timedelta(minutes=15)
+
+# Retry backoff: RETRY_BASE_SECONDS * 2**(attempt - 1), capped
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 600
+
+# Stored error messages are truncated to this length
+MAX_ERROR_LENGTH = 2000
+
+_handlers: dict[IngestJobKind, JobHandler] = {}
+
+
+def register_job_handler(kind: IngestJobKind, handler: JobHandler) -> None:
+    """Register the handler that runs jobs of a kind."""
+    _handlers[kind] = handler
+
+
+def get_job_handler(kind: IngestJobKind) -> JobHandler | None:
+    """Return the handler registered for a job kind, if any."""
+    return _handlers.get(kind)
+
+
+# =============================================================================
+# Queue Operations
+# =============================================================================
+
+
+def enqueue_job(
+    db: AsyncSession,
+    patient_id: uuid.UUID,
+    kind: IngestJobKind,
+    payload: dict[str, Any] | None = None,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+) -> IngestJob:
+    """Add a pending job to the session (committed by the caller).
+
+    Args:
+        db: Async SQLAlchemy session.
+        patient_id: Canonical patient UUID the job works on.
+        kind: Job kind; must have a registered handler when it runs.
+        payload: Kind-specific arguments.
+        max_attempts: Attempts before the job is marked failed.
+
+    Returns:
+        The new IngestJob.
+    """
+    job = IngestJob(
+        id=uuid.uuid4(),
+        kind=kind,
+        status=IngestJobStatus.PENDING,
+        patient_id=patient_id,
+        payload=payload or {},
+        attempts=0,
+        max_attempts=max_attempts,
+    )
+    db.add(job)
+    return job
+
+
+async def claim_next_job(db: AsyncSession) -> IngestJob | None:
+    """Claim the oldest runnable job and commit the claim.
+
+    Runnable means pending and past its run_after, or running with a lock
+    older than JOB_LOCK_TIMEOUT. SKIP LOCKED lets concurrent workers claim
+    different jobs without blocking each other.
+
+    Returns:
+        The claimed job (status running, attempts incremented), or None.
+    """
+    now = datetime.now(timezone.utc)
+    result = await db.execute(
+        select(IngestJob)
+        .where(
+            or_(
+                and_(
+                    IngestJob.status == IngestJobStatus.PENDING,
+                    IngestJob.run_after <= now,
+                ),
+                and_(
+                    IngestJob.status == IngestJobStatus.RUNNING,
+                    IngestJob.locked_at < now - JOB_LOCK_TIMEOUT,
+                ),
+            )
+        )
+        .order_by(IngestJob.run_after)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    job = result.scalar_one_or_none()
+    if job is None:
+        await db.rollback()
+        return None
+
+    job.status = IngestJobStatus.RUNNING
+    job.locked_at = now
+    job.attempts += 1
+    await db.commit()
+    return job
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next attempt after attempts failures."""
+    seconds = RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1)
+    return timedelta(seconds=min(seconds, RETRY_MAX_SECONDS))
+
+
+async def complete_job(db: AsyncSession, job_id: uuid.UUID) -> None:
+    """Mark a job succeeded and commit (along with the handler's writes)."""
+    await db.execute(
+        update(IngestJob)
+        .where(IngestJob.id == job_id)
+        .values(
+            status=IngestJobStatus.SUCCEEDED,
+            completed_at=func.now(),
+            last_error=None,
+        )
+    )
+    await db.commit()
+
+
+async def fail_job(
+    db: AsyncSession,
+    job_id: uuid.UUID,
+    attempts: int,
+    max_attempts: int,
+    error: str,
+) -> IngestJobStatus:
+    """Record a failed attempt: schedule a retry, or fail the job for good.
+
+    Returns:
+        The job's new status (pending for a retry, failed otherwise).
+    """
+    values: dict[str, Any] = {"last_error": error[:MAX_ERROR_LENGTH], "locked_at": None}
+    if attempts >= max_attempts:
+        values.update(status=IngestJobStatus.FAILED, completed_at=func.now())
+    else:
+        values.update(
+            status=IngestJobStatus.PENDING,
+            run_after=datetime.now(timezone.utc) + retry_delay(attempts),
+        )
+    await db.execute(update(IngestJob).where(IngestJob.id == job_id).values(**values))
+    await db.commit()
+    return values["status"]
+
+
+async def get_patient_jobs(
+    db: AsyncSession, patient_id: uuid.UUID, limit: int = 50
+) -> list[IngestJob]:
+    """Return a patient's most recent jobs, newest first."""
+    result = await db.execute(
+        select(IngestJob)
+        .where(IngestJob.patient_id == patient_id)
+        .order_by(IngestJob.created_at.desc())
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+def summarize_job_status(jobs: list[IngestJob]) -> str:
+    """Collapse a patient's jobs into one status.
+
+    Uses the latest job of each kind: "failed" if any failed, else
+    "running", else "pending", else "succeeded"; "none" with no jobs.
+    """
+    latest: dict[IngestJobKind, IngestJob] = {}
+    for job in sorted(jobs, key=lambda j: j.created_at):
+        latest[job.kind] = job
+
+    statuses = {job.status for job in latest.values()}
+    for status in (
+        IngestJobStatus.FAILED,
+        IngestJobStatus.RUNNING,
+        IngestJobStatus.PENDING,
+        IngestJobStatus.SUCCEEDED,
+    ):
+        if status in statuses:
+            return status.value
+    return "none"
+
+
+# =============================================================================
+# Worker Pool
+# =============================================================================
+
+
+class JobWorkerPool:
+    """In-process asyncio workers that drain the ingest job queue.
+
+    Each worker loops: claim a job in its own session, run its handler,
+    commit completion (or record the failure), and sleep poll_interval when
+    the queue is empty. notify() wakes idle workers early.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        concurrency: int = 2,
+        poll_interval: float = 1.0,
+        graph: KnowledgeGraph | None = None,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self._session_factory = session_factory
+        self._concurrency = concurrency
+        self._poll_interval = poll_interval
+        self._graph = graph
+        self._owns_graph = graph is None
+        self._tasks: list[asyncio.Task[None]] = []
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+
+    async def start(self) -> None:
+        """Start the worker tasks."""
+        if self._tasks:
+            return
+        if self._graph is None:
+            self._graph = KnowledgeGraph()
+        self._stopping.clear()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"ingest-job-worker-{i}")
+            for i in range(self._concurrency)
+        ]
+        logger.info("Started %d ingest job workers", self._concurrency)
+
+    async def stop(self) -> None:
+        """Stop the workers, letting in-flight jobs finish."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+        if self._owns_graph and self._graph is not None:
+            await self._graph.close()
+            self._graph = None
+
+    def notify(self) -> None:
+        """Wake idle workers (call after committing new jobs)."""
+        self._wakeup.set()
+
+    async def run_once(self) -> bool:
+        """Claim and run a single job.
+
+        Returns:
+            True if a job was run (successfully or not), False if the queue
+            had nothing runnable.
+        """
+        async with self._session_factory() as db:
+            job = await claim_next_job(db)
+            if job is None:
+                return False
+
+            # Capture before running: a rollback expires the instance
+            job_id, kind, attempts, max_attempts = (
+                job.id,
+                job.kind,
+                job.attempts,
+                job.max_attempts,
+            )
+            handler = get_job_handler(kind)
+            try:
+                if handler is None:
+                    raise RuntimeError(f"No handler registered for {kind.value} jobs")
+                await handler(db, self._graph, job)
+                await complete_job(db, job_id)
+            except Exception as e:
+                await db.rollback()
+                status = await fail_job(db, job_id, attempts, max_attempts, str(e))
+                logger.warning(
+                    "Ingest job %s (%s) attempt %d/%d failed (%s): %s",
+                    job_id,
+                    kind.value,
+                    attempts,
+                    max_attempts,
+                    status.value,
+                    e,
+                )
+        return True
+
+    async def _worker(self) -> None:
+        """Worker loop: drain runnable jobs, then wait for work."""
+        while not self._stopping.is_set():
+            try:
+                ran = await self.run_once()
+            except Exception:
+                # Database unavailable etc. — back off and keep the worker alive
+                logger.exception("Ingest job worker error")
+                ran = False
+            if ran:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._poll_interval)
+            except TimeoutError:
+                pass
+
+
+_worker_pool: JobWorkerPool | None = None
+
+
+async def start_job_workers(
+    session_factory: async_sessionmaker[AsyncSession],
+    concurrency: int,
+    poll_interval: float,
+) -> JobWorkerPool:
+    """Start the shared worker pool (used by the app lifespan)."""
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = JobWorkerPool(
+            session_factory, concurrency=concurrency, poll_interval=poll_interval
+        )
+        await _worker_pool.start()
+    return _worker_pool
+
+
+async def stop_job_workers() -> None:
+    """Stop the shared worker pool, if running."""
+    global _worker_pool
+    if _worker_pool is not None:
+        await _worker_pool.stop()
+        _worker_pool = None
+
+
+def notify_job_workers() -> None:
+    """Wake the shared worker pool after enqueuing jobs (no-op if not running)."""
+    if _worker_pool is not None:
+        _worker_pool.notify()
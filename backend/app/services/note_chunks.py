@@ -0,0 +1,242 @@
+"""Chunked embeddings for DocumentReference clinical notes.
+
+resource_to_text reduces a DocumentReference to a short header, so the note
+itself (base64 text/plain attachments) is not searchable by meaning, and a
+long note would exceed the embedding model's input limit anyway. The decoded
+note is split into overlapping character windows, broken at whitespace, and
+each window is embedded into the note_chunks table. Chunks are replaced
+whenever their DocumentReference is (re-)embedded.
+"""
+
+import base64
+import binascii
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Any, Protocol, Sequence
+
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import NoteChunk
+from app.services.embedding_cache import embed_texts_cached
+from app.services.embeddings import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+# Window size in characters (~400 tokens), well under the model input limit
+NOTE_CHUNK_CHARS = 1600
+
+# Characters shared by consecutive windows, so a sentence that straddles a
+# boundary is whole in at least one chunk
+NOTE_CHUNK_OVERLAP = 200
+
+# Rows per INSERT statement
+CHUNK_INSERT_BATCH_SIZE = 500
+
+
+class _NoteResource(Protocol):
+    """Row with the attributes needed to chunk it (FhirResource, WrittenResource)."""
+
+    id: uuid.UUID
+    resource_type: str
+    data: dict[str, Any]
+
+
+@dataclass
+class NoteWindow:
+    """A passage of a note and its character offset in the decoded text."""
+
+    start_offset: int
+    text: str
+
+
+def decode_note_text(resource: dict[str, Any]) -> str | None:
+    """
+    Decode the plain-text clinical note attached to a DocumentReference.
+
+    Multiple text/plain attachments are joined with a blank line. Attachments
+    that are not valid base64 UTF-8 are skipped.
+
+    Args:
+        resource: FHIR DocumentReference dict.
+
+    Returns:
+        The note text, or None if the resource has no decodable note.
+    """
+    if resource.get("resourceType") != "DocumentReference":
+        return None
+
+    notes: list[str] = []
+    for content_item in resource.get("content", []):
+        attachment = content_item.get("attachment", {})
+        if not attachment.get("data"):
+            continue
+        if "text/plain" not in attachment.get("contentType", ""):
+            continue
+        try:
+            decoded = base64.b64decode(attachment["data"]).decode("utf-8")
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            logger.debug("Skipping undecodable attachment on %s", resource.get("id"))
+            continue
+        if decoded.strip():
+            notes.append(decoded.strip())
+
+    return "\n\n".join(notes) if notes else None
+
+
+def chunk_note_text(
+    text: str,
+    size: int = NOTE_CHUNK_CHARS,
+    overlap: int = NOTE_CHUNK_OVERLAP,
+) -> list[NoteWindow]:
+    """
+    Split note text into overlapping windows broken at whitespace.
+
+    Each window ends at the last whitespace in its second half (or at size
+    characters if there is none), and the next window starts overlap
+    characters before that end, moved forward to a word boundary.
+
+    Args:
+        text: Decoded note text.
+        size: Maximum window length in characters.
+        overlap: Characters shared by consecutive windows.
+
+    Returns:
+        Windows in note order; empty for blank text.
+
+    Raises:
+        ValueError: If size is not positive or overlap is not less than
+            half of size.
+    """
+    if size < 1:
+        raise ValueError("size must be at least 1")
+    if not 0 <= overlap < max(size // 2, 1):
+        raise ValueError("overlap must be less than half of size")
+
+    windows: list[NoteWindow] = []
+    length = len(text)
+    start = 0
+    while start < length:
+        end = min(start + size, length)
+        if end < length:
+            # Break at the last whitespace in the second half of the window
+            for i in range(end, start + size // 2, -1):
+                if text[i - 1].isspace():
+                    end = i
+                    break
+
+        segment = text[start:end]
+        passage = segment.strip()
+        if passage:
+            leading = len(segment) - len(segment.lstrip())
+            windows.append(NoteWindow(start_offset=start + leading, text=passage))
+        if end >= length:
+            break
+
+        # Step back by overlap, then forward to the start of a word (or keep
+        # the raw offset if the overlap has no word boundary)
+        start = end - overlap
+        for i in range(start, end):
+            if text[i - 1].isspace():
+                start = i
+                break
+
+    return windows
+
+
+def _note_header(resource: dict[str, Any]) -> str:
+    """Short context prefix for chunk embeddings (document type and date)."""
+    type_obj = resource.get("type", {})
+    codings = type_obj.get("coding", [])
+    if codings:
+        type_display = codings[0].get("display", "")
+    else:
+        type_display = type_obj.get("text", "")
+    header = f"Clinical note: {type_display or 'Clinical Document'}"
+    if resource.get("date"):
+        header += f". Date: {resource['date'][:10]}"
+    return header
+
+
+async def sync_note_chunks(
+    db: AsyncSession,
+    patient_id: uuid.UUID,
+    resources: Sequence[_NoteResource],
+    embedding_service: EmbeddingService | None = None,
+    raise_errors: bool = False,
+) -> int:
+    """
+    Replace the note chunks of the DocumentReferences among resources.
+
+    Windows are embedded (through the embedding cache when enabled) before
+    the old chunks are deleted, so an embedding failure leaves the previous
+    chunks in place. Failures are logged unless raise_errors is set.
+
+    Args:
+        db: Async SQLAlchemy session (caller commits).
+        patient_id: Canonical patient UUID that owns the resources.
+        resources: Rows being (re-)embedded; non-DocumentReferences are ignored.
+        embedding_service: Optional EmbeddingService. If not provided, a new
+            instance is created and closed after use.
+        raise_errors: Re-raise embedding failures (ingest jobs are retried).
+
+    Returns:
+        Number of chunks written.
+    """
+    notes = [r for r in resources if r.resource_type == "DocumentReference"]
+    if not notes:
+        return 0
+
+    rows: list[dict[str, Any]] = []
+    inputs: list[str] = []
+    for note in notes:
+        text = decode_note_text(note.data)
+        if text is None:
+            continue
+        header = _note_header(note.data)
+        for index, window in enumerate(chunk_note_text(text)):
+            rows.append(
+                {
+                    "resource_id": note.id,
+                    "patient_id": patient_id,
+                    "chunk_index": index,
+                    "start_offset": window.start_offset,
+                    "content": window.text,
+                }
+            )
+            inputs.append(f"{header}\n{window.text}")
+
+    if rows:
+        owns_service = embedding_service is None
+        if owns_service:
+            embedding_service = EmbeddingService()
+        try:
+            if settings.embedding_cache_enabled:
+                # Savepoint: a failed cache statement must not abort the
+                # transaction the chunk writes below still need
+                async with db.begin_nested():
+                    embeddings = await embed_texts_cached(db, embedding_service, inputs)
+            else:
+                embeddings = await embedding_service.embed_texts(inputs)
+        except Exception as e:
+            if raise_errors:
+                raise
+            logger.warning("Failed to embed note chunks: %s", e)
+            return 0
+        finally:
+            if owns_service:
+                await embedding_service.close()
+        for row, embedding in zip(rows, embeddings):
+            row["embedding"] = embedding
+
+    await db.execute(
+        delete(NoteChunk).where(NoteChunk.resource_id.in_([n.id for n in notes]))
+    )
+    for i in range(0, len(rows), CHUNK_INSERT_BATCH_SIZE):
+        await db.execute(insert(NoteChunk), rows[i : i + CHUNK_INSERT_BATCH_SIZE])
+
+    if rows:
+        logger.info("Stored %d note chunks for %d notes", len(rows), len(notes))
+    return len(rows)
@@ -13,13 +13,21 @@ Reuses extraction patterns from:
 import logging
 import re
 import uuid
+from collections.abc import Sequence
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import DateTime, func, select
+from sqlalchemy import DateTime, Row, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import FhirResource
+from app.models import (
+    ConditionProjection,
+    EncounterProjection,
+    FhirResource,
+    ImmunizationProjection,
+    MedicationRequestProjection,
+    ObservationProjection,
+)
 from app.services.reference_ranges import (
     build_fhir_interpretation,
     build_fhir_reference_range,
@@ -30,10 +38,18 @@ from app.services.reference_ranges import (
 logger = logging.getLogger(__name__)
 
 # Table type to builder function mapping (populated at module level below)
-TABLE_TYPES = frozenset({
-    "medications", "lab_results", "vitals", "conditions",
-    "allergies", "immunizations", "procedures", "encounters",
-})
+TABLE_TYPES = frozenset(
+    {
+        "medications",
+        "lab_results",
+        "vitals",
+        "conditions",
+        "allergies",
+        "immunizations",
+        "procedures",
+        "encounters",
+    }
+)
 
 # Default titles per table type
 _DEFAULT_TITLES: dict[str, str] = {
@@ -52,6 +68,7 @@ _DEFAULT_TITLES: dict[str, str] = {
 # Helper: extract display name from CodeableConcept
 # =============================================================================
 
+
 def _display_name(resource: dict[str, Any], field: str = "code") -> str:
     """Extract display string from a FHIR CodeableConcept field."""
     val = resource.get(field, {})
@@ -89,7 +106,9 @@ def _clean_display(name: str) -> str:
 
 
 # Small words that should stay lowercase in title case
-_TITLE_LOWER = frozenset({"for", "of", "the", "and", "in", "at", "to", "a", "an", "on", "or"})
+_TITLE_LOWER = frozenset(
+    {"for", "of", "the", "and", "in", "at", "to", "a", "an", "on", "or"}
+)
 
 
 def _title_case(s: str) -> str:
@@ -130,6 +149,7 @@ def _format_date(iso: str) -> str:
 # Medications
 # =============================================================================
 
+
 async def build_medications_table(
     patient_id: uuid.UUID,
     db: AsyncSession,
@@ -137,19 +157,16 @@ async def build_medications_table(
     status: str | None = None,
 ) -> dict[str, Any] | None:
     """Build a medications table from MedicationRequest resources."""
-    conditions = [
-        FhirResource.patient_id == patient_id,
-        FhirResource.resource_type == "MedicationRequest",
-    ]
+    proj = MedicationRequestProjection
+    conditions = [proj.patient_id == patient_id]
     if status:
-        status_expr = FhirResource.data["status"].as_string()
-        conditions.append(status_expr == status)
+        conditions.append(proj.status == status)
 
-    authored_on = FhirResource.data["authoredOn"].as_string()
     stmt = (
         select(FhirResource.data)
+        .join(proj, proj.fhir_resource_id == FhirResource.id)
         .where(*conditions)
-        .order_by(func.cast(authored_on, DateTime).desc().nulls_last())
+        .order_by(proj.authored_at.desc().nulls_last())
     )
     result = await db.execute(stmt)
     resources = [row.data for row in result.all()]
@@ -201,16 +218,20 @@ async def build_medications_table(
         elif isinstance(req, str):
             requester = req
 
-        rows.append({
-            "medication": med_display,
-            "frequency": frequency,
-            "reason": _clean_display(reason) if reason else None,
-            "status": _extract_status(med),
-            "authoredOn": _format_date((med.get("authoredOn") or "")[:10]),
-            "requester": requester,
-        })
+        rows.append(
+            {
+                "medication": med_display,
+                "frequency": frequency,
+                "reason": _clean_display(reason) if reason else None,
+                "status": _extract_status(med),
+                "authoredOn": _format_date((med.get("authoredOn") or "")[:10]),
+                "requester": requester,
+            }
+        )
 
-    title = "Active Medications" if status == "active" else _DEFAULT_TITLES["medications"]
+    title = (
+        "Active Medications" if status == "active" else _DEFAULT_TITLES["medications"]
+    )
     return {"type": "medications", "title": title, "rows": rows}
 
 
@@ -218,6 +239,15 @@ async def build_medications_table(
 # Lab Results
 # =============================================================================
 
+
+def _group_by_loinc(rows: Sequence[Row]) -> dict[str, list[dict[str, Any]]]:
+    """Group (data, loinc) observation rows by LOINC code, keeping row order."""
+    by_loinc: dict[str, list[dict[str, Any]]] = {}
+    for row in rows:
+        by_loinc.setdefault(row.loinc, []).append(row.data)
+    return by_loinc
+
+
 async def build_lab_results_table(
     patient_id: uuid.UUID,
     db: AsyncSession,
@@ -226,38 +256,28 @@ async def build_lab_results_table(
     panel: str | None = None,
 ) -> dict[str, Any] | None:
     """Build a lab results table from Observation resources (category=laboratory)."""
-    category_expr = FhirResource.data["category"][0]["coding"][0]["code"].as_string()
-    loinc_expr = FhirResource.data["code"]["coding"][0]["code"].as_string()
-    effective_dt = FhirResource.data["effectiveDateTime"].as_string()
-
+    proj = ObservationProjection
     conditions = [
-        FhirResource.patient_id == patient_id,
-        FhirResource.resource_type == "Observation",
-        category_expr == "laboratory",
-        loinc_expr.isnot(None),
+        proj.patient_id == patient_id,
+        proj.category == "laboratory",
+        proj.loinc.isnot(None),
     ]
 
     if codes:
-        conditions.append(loinc_expr.in_(codes))
+        conditions.append(proj.loinc.in_(codes))
 
     stmt = (
-        select(FhirResource.data)
+        select(FhirResource.data, proj.loinc)
+        .join(FhirResource, FhirResource.id == proj.fhir_resource_id)
         .where(*conditions)
-        .order_by(func.cast(effective_dt, DateTime).desc())
+        .order_by(proj.effective_at.desc().nulls_last())
     )
     result = await db.execute(stmt)
-    all_obs = [row.data for row in result.all()]
+    by_loinc = _group_by_loinc(result.all())
 
-    if not all_obs:
+    if not by_loinc:
         return None
 
-    # Group by LOINC code, build latest + history
-    by_loinc: dict[str, list[dict[str, Any]]] = {}
-    for obs in all_obs:
-        loinc = obs.get("code", {}).get("coding", [{}])[0].get("code")
-        if loinc:
-            by_loinc.setdefault(loinc, []).append(obs)
-
     rows: list[dict[str, Any]] = []
     for _loinc_code, observations in by_loinc.items():
         latest = observations[0]
@@ -268,7 +288,11 @@ async def build_lab_results_table(
 
         code_obj = latest.get("code", {})
         codings = code_obj.get("coding", [])
-        test_name = codings[0].get("display", "Unknown") if codings else code_obj.get("text", "Unknown")
+        test_name = (
+            codings[0].get("display", "Unknown")
+            if codings
+            else code_obj.get("text", "Unknown")
+        )
         unit = vq.get("unit", "")
         date_str = (latest.get("effectiveDateTime") or "")[:10]
 
@@ -289,7 +313,11 @@ async def build_lab_results_table(
         interpretation = "N"
         interp_list = latest.get("interpretation", [])
         if interp_list and isinstance(interp_list, list):
-            interp_codings = interp_list[0].get("coding", []) if isinstance(interp_list[0], dict) else []
+            interp_codings = (
+                interp_list[0].get("coding", [])
+                if isinstance(interp_list[0], dict)
+                else []
+            )
             if interp_codings:
                 interpretation = interp_codings[0].get("code", "N")
 
@@ -310,17 +338,19 @@ async def build_lab_results_table(
             if obs_val is not None:
                 history.append({"value": obs_val, "date": obs_date})
 
-        rows.append({
-            "test": test_name,
-            "value": value,
-            "unit": unit,
-            "rangeLow": range_low,
-            "rangeHigh": range_high,
-            "interpretation": interpretation,
-            "date": date_str,
-            "history": history,
-            "panel": panel,
-        })
+        rows.append(
+            {
+                "test": test_name,
+                "value": value,
+                "unit": unit,
+                "rangeLow": range_low,
+                "rangeHigh": range_high,
+                "interpretation": interpretation,
+                "date": date_str,
+                "history": history,
+                "panel": panel,
+            }
+        )
 
     # Sort by test name
     rows.sort(key=lambda r: r["test"])
@@ -328,54 +358,49 @@ async def build_lab_results_table(
     if not rows:
         return None
 
-    return {"type": "lab_results", "title": _DEFAULT_TITLES["lab_results"], "rows": rows}
+    return {
+        "type": "lab_results",
+        "title": _DEFAULT_TITLES["lab_results"],
+        "rows": rows,
+    }
 
 
 # =============================================================================
 # Vitals
 # =============================================================================
 
+
 async def build_vitals_table(
     patient_id: uuid.UUID,
     db: AsyncSession,
 ) -> dict[str, Any] | None:
     """Build a vitals table from Observation resources (category=vital-signs)."""
-    category_expr = FhirResource.data["category"][0]["coding"][0]["code"].as_string()
-    loinc_expr = FhirResource.data["code"]["coding"][0]["code"].as_string()
-    effective_dt = FhirResource.data["effectiveDateTime"].as_string()
-
+    proj = ObservationProjection
     stmt = (
-        select(FhirResource.data)
+        select(FhirResource.data, proj.loinc)
+        .join(FhirResource, FhirResource.id == proj.fhir_resource_id)
         .where(
-            FhirResource.patient_id == patient_id,
-            FhirResource.resource_type == "Observation",
-            category_expr == "vital-signs",
-            loinc_expr.isnot(None),
+            proj.patient_id == patient_id,
+            proj.category == "vital-signs",
+            proj.loinc.isnot(None),
         )
-        .order_by(func.cast(effective_dt, DateTime).desc())
+        .order_by(proj.effective_at.desc().nulls_last())
     )
     result = await db.execute(stmt)
-    all_obs = [row.data for row in result.all()]
+    by_loinc = _group_by_loinc(result.all())
 
-    if not all_obs:
+    if not by_loinc:
         return None
 
-    # Group by LOINC code
-    by_loinc: dict[str, list[dict[str, Any]]] = {}
-    for obs in all_obs:
-        loinc = obs.get("code", {}).get("coding", [{}])[0].get("code")
-        if loinc:
-            by_loinc.setdefault(loinc, []).append(obs)
-
     # LOINC codes with clinical ranges (display reference ranges for these)
     _RANGED_LOINCS = {
-        "85354-9",   # Blood pressure
-        "8867-4",    # Heart rate
-        "9279-1",    # Respiratory rate
-        "39156-5",   # BMI
-        "8310-5",    # Body temperature
-        "29463-7",   # Body weight
-        "8302-2",    # Body height
+        "85354-9",  # Blood pressure
+        "8867-4",  # Heart rate
+        "9279-1",  # Respiratory rate
+        "39156-5",  # BMI
+        "8310-5",  # Body temperature
+        "29463-7",  # Body weight
+        "8302-2",  # Body height
     }
     # Subset: LOINCs that also get trend history (excludes one-off vitals like temp)
     _TRENDED_LOINCS = _RANGED_LOINCS - {"8310-5"}
@@ -409,7 +434,11 @@ async def build_vitals_table(
                 elif comp_code == "8462-4":  # Diastolic
                     dia_val = comp_vq.get("value")
 
-            value_display = f"{sys_val}/{dia_val}" if sys_val and dia_val else str(sys_val or dia_val or "")
+            value_display = (
+                f"{sys_val}/{dia_val}"
+                if sys_val and dia_val
+                else str(sys_val or dia_val or "")
+            )
 
             # Interpret components
             interpret_component_observation(latest)
@@ -430,12 +459,19 @@ async def build_vitals_table(
                 comp_range_low = None
                 comp_range_high = None
                 for comp in latest.get("component", []):
-                    if comp.get("code", {}).get("coding", [{}])[0].get("code") == comp_loinc:
+                    if (
+                        comp.get("code", {}).get("coding", [{}])[0].get("code")
+                        == comp_loinc
+                    ):
                         comp_val = comp.get("valueQuantity", {}).get("value")
                         # Component interpretation
                         ci = comp.get("interpretation", [])
                         if ci and isinstance(ci, list):
-                            codings = ci[0].get("coding", []) if isinstance(ci[0], dict) else []
+                            codings = (
+                                ci[0].get("coding", [])
+                                if isinstance(ci[0], dict)
+                                else []
+                            )
                             if codings:
                                 comp_interp = codings[0].get("code", "N")
                         # Component reference range
@@ -450,43 +486,52 @@ async def build_vitals_table(
                                 comp_range_high = high_obj.get("value")
                         break
 
-                if _INTERP_SEVERITY.get(comp_interp, 0) > _INTERP_SEVERITY.get(worst_interp, 0):
+                if _INTERP_SEVERITY.get(comp_interp, 0) > _INTERP_SEVERITY.get(
+                    worst_interp, 0
+                ):
                     worst_interp = comp_interp
 
                 # History for this component (oldest → newest)
                 comp_history: list[dict[str, Any]] = []
                 for obs in reversed(observations):
                     for c in obs.get("component", []):
-                        if c.get("code", {}).get("coding", [{}])[0].get("code") == comp_loinc:
+                        if (
+                            c.get("code", {}).get("coding", [{}])[0].get("code")
+                            == comp_loinc
+                        ):
                             v = c.get("valueQuantity", {}).get("value")
                             d = (obs.get("effectiveDateTime") or "")[:10]
                             if v is not None:
                                 comp_history.append({"value": v, "date": d})
 
-                child_rows.append({
-                    "vital": comp_name,
-                    "value": str(comp_val) if comp_val is not None else "",
-                    "numericValue": comp_val,
+                child_rows.append(
+                    {
+                        "vital": comp_name,
+                        "value": str(comp_val) if comp_val is not None else "",
+                        "numericValue": comp_val,
+                        "unit": "mmHg",
+                        "rangeLow": comp_range_low,
+                        "rangeHigh": comp_range_high,
+                        "history": comp_history,
+                        "interpretation": comp_interp,
+                    }
+                )
+
+            rows.append(
+                {
+                    "vital": vital_name,
+                    "value": value_display,
+                    "numericValue": sys_val,
                     "unit": "mmHg",
-                    "rangeLow": comp_range_low,
-                    "rangeHigh": comp_range_high,
-                    "history": comp_history,
-                    "interpretation": comp_interp,
-                })
-
-            rows.append({
-                "vital": vital_name,
-                "value": value_display,
-                "numericValue": sys_val,
-                "unit": "mmHg",
-                "loinc": loinc_code,
-                "date": (latest.get("effectiveDateTime") or "")[:10],
-                "history": [],
-                "rangeLow": None,
-                "rangeHigh": None,
-                "interpretation": worst_interp,
-                "components": child_rows,
-            })
+                    "loinc": loinc_code,
+                    "date": (latest.get("effectiveDateTime") or "")[:10],
+                    "history": [],
+                    "rangeLow": None,
+                    "rangeHigh": None,
+                    "interpretation": worst_interp,
+                    "components": child_rows,
+                }
+            )
         else:
             # Standard vital
             vq = latest.get("valueQuantity", {})
@@ -514,7 +559,11 @@ async def build_vitals_table(
 
             interp_list = latest.get("interpretation", [])
             if interp_list and isinstance(interp_list, list):
-                interp_codings = interp_list[0].get("coding", []) if isinstance(interp_list[0], dict) else []
+                interp_codings = (
+                    interp_list[0].get("coding", [])
+                    if isinstance(interp_list[0], dict)
+                    else []
+                )
                 if interp_codings:
                     interpretation = interp_codings[0].get("code")
 
@@ -536,18 +585,20 @@ async def build_vitals_table(
                     if obs_val is not None:
                         history.append({"value": obs_val, "date": obs_date})
 
-            rows.append({
-                "vital": vital_name,
-                "value": str(value),
-                "numericValue": value,
-                "unit": unit,
-                "loinc": loinc_code,
-                "date": date_str,
-                "history": history,
-                "rangeLow": range_low,
-                "rangeHigh": range_high,
-                "interpretation": interpretation,
-            })
+            rows.append(
+                {
+                    "vital": vital_name,
+                    "value": str(value),
+                    "numericValue": value,
+                    "unit": unit,
+                    "loinc": loinc_code,
+                    "date": date_str,
+                    "history": history,
+                    "rangeLow": range_low,
+                    "rangeHigh": range_high,
+                    "interpretation": interpretation,
+                }
+            )
 
     if not rows:
         return None
@@ -559,6 +610,7 @@ async def build_vitals_table(
 # Conditions
 # =============================================================================
 
+
 async def build_conditions_table(
     patient_id: uuid.UUID,
     db: AsyncSession,
@@ -566,20 +618,16 @@ async def build_conditions_table(
     status: str | None = None,
 ) -> dict[str, Any] | None:
     """Build a conditions table from Condition resources."""
-    clinical_status_expr = FhirResource.data["clinicalStatus"]["coding"][0]["code"].as_string()
-
-    conditions = [
-        FhirResource.patient_id == patient_id,
-        FhirResource.resource_type == "Condition",
-    ]
+    proj = ConditionProjection
+    conditions = [proj.patient_id == patient_id]
     if status:
-        conditions.append(clinical_status_expr == status)
+        conditions.append(proj.clinical_status == status)
 
-    onset_expr = FhirResource.data["onsetDateTime"].as_string()
     stmt = (
         select(FhirResource.data)
+        .join(proj, proj.fhir_resource_id == FhirResource.id)
         .where(*conditions)
-        .order_by(func.cast(onset_expr, DateTime).desc().nulls_last())
+        .order_by(proj.onset_at.desc().nulls_last())
     )
     result = await db.execute(stmt)
     resources = [row.data for row in result.all()]
@@ -589,13 +637,18 @@ async def build_conditions_table(
 
     rows: list[dict[str, Any]] = []
     for cond in resources:
-        rows.append({
-            "condition": _clean_display(_display_name(cond)),
-            "clinicalStatus": _extract_status(cond, "clinicalStatus"),
-            "verificationStatus": _extract_status(cond, "verificationStatus"),
-            "onsetDate": _format_date((cond.get("onsetDateTime") or "")[:10]),
-            "abatementDate": _format_date((cond.get("abatementDateTime") or "")[:10]) or None,
-        })
+        rows.append(
+            {
+                "condition": _clean_display(_display_name(cond)),
+                "clinicalStatus": _extract_status(cond, "clinicalStatus"),
+                "verificationStatus": _extract_status(cond, "verificationStatus"),
+                "onsetDate": _format_date((cond.get("onsetDateTime") or "")[:10]),
+                "abatementDate": _format_date(
+                    (cond.get("abatementDateTime") or "")[:10]
+                )
+                or None,
+            }
+        )
 
     title = "Active Conditions" if status == "active" else _DEFAULT_TITLES["conditions"]
     return {"type": "conditions", "title": title, "rows": rows}
@@ -605,17 +658,15 @@ async def build_conditions_table(
 # Allergies
 # =============================================================================
 
+
 async def build_allergies_table(
     patient_id: uuid.UUID,
     db: AsyncSession,
 ) -> dict[str, Any] | None:
     """Build an allergies table from AllergyIntolerance resources."""
-    stmt = (
-        select(FhirResource.data)
-        .where(
-            FhirResource.patient_id == patient_id,
-            FhirResource.resource_type == "AllergyIntolerance",
-        )
+    stmt = select(FhirResource.data).where(
+        FhirResource.patient_id == patient_id,
+        FhirResource.resource_type == "AllergyIntolerance",
     )
     result = await db.execute(stmt)
     resources = [row.data for row in result.all()]
@@ -626,17 +677,22 @@ async def build_allergies_table(
     rows: list[dict[str, Any]] = []
     for allergy in resources:
         categories = allergy.get("category", [])
-        category = categories[0] if isinstance(categories, list) and categories else (
-            categories if isinstance(categories, str) else None
+        category = (
+            categories[0]
+            if isinstance(categories, list) and categories
+            else (categories if isinstance(categories, str) else None)
         )
 
-        rows.append({
-            "allergen": _clean_display(_display_name(allergy)),
-            "category": category,
-            "criticality": allergy.get("criticality", "low"),
-            "clinicalStatus": _extract_status(allergy, "clinicalStatus"),
-            "onsetDate": _format_date((allergy.get("onsetDateTime") or "")[:10]) or None,
-        })
+        rows.append(
+            {
+                "allergen": _clean_display(_display_name(allergy)),
+                "category": category,
+                "criticality": allergy.get("criticality", "low"),
+                "clinicalStatus": _extract_status(allergy, "clinicalStatus"),
+                "onsetDate": _format_date((allergy.get("onsetDateTime") or "")[:10])
+                or None,
+            }
+        )
 
     # Sort high criticality first
     rows.sort(key=lambda r: 0 if r["criticality"] == "high" else 1)
@@ -648,19 +704,18 @@ async def build_allergies_table(
 # Immunizations
 # =============================================================================
 
+
 async def build_immunizations_table(
     patient_id: uuid.UUID,
     db: AsyncSession,
 ) -> dict[str, Any] | None:
     """Build an immunizations table from Immunization resources."""
-    occurrence_dt = FhirResource.data["occurrenceDateTime"].as_string()
+    proj = ImmunizationProjection
     stmt = (
         select(FhirResource.data)
-        .where(
-            FhirResource.patient_id == patient_id,
-            FhirResource.resource_type == "Immunization",
-        )
-        .order_by(func.cast(occurrence_dt, DateTime).desc().nulls_last())
+        .join(proj, proj.fhir_resource_id == FhirResource.id)
+        .where(proj.patient_id == patient_id)
+        .order_by(proj.occurrence_at.desc().nulls_last())
     )
     result = await db.execute(stmt)
     resources = [row.data for row in result.all()]
@@ -681,22 +736,31 @@ async def build_immunizations_table(
             performer_list = imm.get("performer", [])
             if performer_list:
                 actor = performer_list[0].get("actor", {})
-                location = actor.get("display") if isinstance(actor, dict) else str(actor)
-
-        rows.append({
-            "vaccine": vaccine_name,
-            "date": _format_date((imm.get("occurrenceDateTime") or "")[:10]),
-            "status": imm.get("status", "unknown"),
-            "location": _title_case(location) if location else None,
-        })
+                location = (
+                    actor.get("display") if isinstance(actor, dict) else str(actor)
+                )
+
+        rows.append(
+            {
+                "vaccine": vaccine_name,
+                "date": _format_date((imm.get("occurrenceDateTime") or "")[:10]),
+                "status": imm.get("status", "unknown"),
+                "location": _title_case(location) if location else None,
+            }
+        )
 
-    return {"type": "immunizations", "title": _DEFAULT_TITLES["immunizations"], "rows": rows}
+    return {
+        "type": "immunizations",
+        "title": _DEFAULT_TITLES["immunizations"],
+        "rows": rows,
+    }
 
 
 # =============================================================================
 # Procedures
 # =============================================================================
 
+
 async def build_procedures_table(
     patient_id: uuid.UUID,
     db: AsyncSession,
@@ -715,7 +779,9 @@ async def build_procedures_table(
             func.coalesce(
                 func.cast(performed_dt, DateTime),
                 func.cast(performed_period, DateTime),
-            ).desc().nulls_last()
+            )
+            .desc()
+            .nulls_last()
         )
     )
     result = await db.execute(stmt)
@@ -749,12 +815,14 @@ async def build_procedures_table(
                 ref = refs[0]
                 reason = ref.get("display") if isinstance(ref, dict) else str(ref)
 
-        rows.append({
-            "procedure": _clean_display(_display_name(proc)),
-            "date": _format_date(date_str[:10]),
-            "location": _title_case(location) if location else None,
-            "reason": _clean_display(reason) if reason else None,
-        })
+        rows.append(
+            {
+                "procedure": _clean_display(_display_name(proc)),
+                "date": _format_date(date_str[:10]),
+                "location": _title_case(location) if location else None,
+                "reason": _clean_display(reason) if reason else None,
+            }
+        )
 
     return {"type": "procedures", "title": _DEFAULT_TITLES["procedures"], "rows": rows}
 
@@ -763,20 +831,18 @@ async def build_procedures_table(
 # Encounters
 # =============================================================================
 
+
 async def build_encounters_table(
     patient_id: uuid.UUID,
     db: AsyncSession,
 ) -> dict[str, Any] | None:
     """Build an encounters table from Encounter resources."""
-    period_start = FhirResource.data["period"]["start"].as_string()
-
+    proj = EncounterProjection
     stmt = (
         select(FhirResource.data)
-        .where(
-            FhirResource.patient_id == patient_id,
-            FhirResource.resource_type == "Encounter",
-        )
-        .order_by(func.cast(period_start, DateTime).desc().nulls_last())
+        .join(proj, proj.fhir_resource_id == FhirResource.id)
+        .where(proj.patient_id == patient_id)
+        .order_by(proj.period_start.desc().nulls_last())
     )
     result = await db.execute(stmt)
     resources = [row.data for row in result.all()]
@@ -798,7 +864,11 @@ async def build_encounters_table(
 
         # Class
         enc_class = enc.get("class", {})
-        class_code = enc_class.get("code", "AMB") if isinstance(enc_class, dict) else str(enc_class)
+        class_code = (
+            enc_class.get("code", "AMB")
+            if isinstance(enc_class, dict)
+            else str(enc_class)
+        )
 
         # Date
         period = enc.get("period", {})
@@ -825,13 +895,15 @@ async def build_encounters_table(
             if isinstance(loc, dict):
                 location = loc.get("display")
 
-        rows.append({
-            "type": _clean_display(type_display),
-            "encounterClass": class_code.upper() if class_code else "AMB",
-            "date": _format_date(date_str),
-            "provider": provider,
-            "location": _title_case(location) if location else None,
-        })
+        rows.append(
+            {
+                "type": _clean_display(type_display),
+                "encounterClass": class_code.upper() if class_code else "AMB",
+                "date": _format_date(date_str),
+                "provider": provider,
+                "location": _title_case(location) if location else None,
+            }
+        )
 
     return {"type": "encounters", "title": _DEFAULT_TITLES["encounters"], "rows": rows}
 
@@ -1,7 +1,14 @@
 """Vector search service for semantic search over FHIR resource embeddings.
 
 Uses pgvector's cosine distance operator with HNSW index for efficient
-similarity search, scoped to individual patients for security.
+similarity search, scoped to individual patients for security. Resource
+embeddings (resource_embeddings) are searched through an HNSW index over a
+binary or half-precision copy, then re-ranked at full precision. Because the
+patient filter is applied during the index walk, each search first applies
+the configured index strategy (settings.vector_index_strategy) to its
+transaction: iterative scans, a larger ef_search, or an exact scan. With
+settings.vector_cache_enabled, resource searches are instead answered
+exactly in-process from a per-patient embedding matrix (PatientVectorCache).
 
 SECURITY: This service enforces patient-scoped queries but does NOT perform
 authentication or authorization. API routes MUST verify that the authenticated
@@ -10,14 +17,31 @@ user has permission to access the requested patient_id before calling these meth
 
 import logging
 import math
+import time
 import uuid
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any
 
-from sqlalchemy import select
+import numpy as np
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    Select,
+    cast,
+    column,
+    func,
+    select,
+    true,
+    values,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import FhirResource
+from app.config import settings
+from app.models import FhirResource, NoteChunk, ResourceEmbedding
+from app.models.resource_embedding import binary_embedding, halfvec_embedding
+from app.services.embeddings import EMBEDDING_DIMENSION
 
 logger = logging.getLogger(__name__)
 
@@ -31,8 +55,17 @@ DEFAULT_LIMIT = 10
 # Hard maximum limit to prevent resource exhaustion
 MAX_LIMIT = 100
 
-# Expected embedding dimensions (text-embedding-3-small)
-EMBEDDING_DIMENSION = 1536
+# Maximum query vectors per batched search statement
+MAX_BATCH_QUERIES = 32
+
+# Index scan strategies (see settings.vector_index_strategy)
+INDEX_STRATEGIES = ("hnsw", "iterative", "exact")
+
+# Quantized forms used for candidate generation (see settings.vector_quantization)
+QUANTIZATIONS = ("binary", "halfvec")
+
+# Fewest quantized candidates re-ranked at full precision per query
+MIN_RERANK_CANDIDATES = 40
 
 
 @dataclass
@@ -52,6 +85,359 @@ class SearchResult:
     fhir_id: str
 
 
+@dataclass
+class PassageResult:
+    """A clinical note passage with its similarity score and parent resource.
+
+    Attributes:
+        text: The passage (a window of the decoded note text).
+        score: Cosine similarity score (0-1, higher is more similar).
+        chunk_index: Position of the passage within the note.
+        start_offset: Character offset of the passage in the decoded note.
+        resource: The parent DocumentReference data (raw JSON).
+        fhir_id: The parent DocumentReference's FHIR ID.
+    """
+
+    text: str
+    score: float
+    chunk_index: int
+    start_offset: int
+    resource: dict[str, Any]
+    fhir_id: str
+
+
+def index_scan_settings(
+    strategy: str | None = None,
+    ef_search: int | None = None,
+    max_scan_tuples: int | None = None,
+) -> dict[str, str]:
+    """
+    Planner/pgvector settings that implement a vector index strategy.
+
+    Args:
+        strategy: "hnsw", "iterative" or "exact"
+            (default settings.vector_index_strategy).
+        ef_search: HNSW candidate list size (default settings.vector_ef_search).
+        max_scan_tuples: Upper bound on tuples visited by an iterative scan
+            (default settings.vector_max_scan_tuples).
+
+    Returns:
+        Setting name -> value, applied per transaction by configure_index_scan
+        (empty for "exact").
+
+    Raises:
+        ValueError: If the strategy is unknown or a size is not positive.
+    """
+    strategy = strategy or settings.vector_index_strategy
+    ef_search = settings.vector_ef_search if ef_search is None else ef_search
+    max_scan_tuples = (
+        settings.vector_max_scan_tuples if max_scan_tuples is None else max_scan_tuples
+    )
+    if strategy not in INDEX_STRATEGIES:
+        raise ValueError(f"Unknown vector_index_strategy: {strategy!r}")
+    if ef_search < 1 or max_scan_tuples < 1:
+        raise ValueError("ef_search and max_scan_tuples must be at least 1")
+
+    if strategy == "exact":
+        # Exact searches order by expressions no HNSW index can serve (see
+        # nearest_resources and note_chunk_distance), so the planner needs no
+        # help; planner GUCs would also outlive the search in a shared session
+        return {}
+    scan = {"hnsw.ef_search": str(ef_search)}
+    if strategy == "iterative":
+        scan["hnsw.iterative_scan"] = "strict_order"
+        scan["hnsw.max_scan_tuples"] = str(max_scan_tuples)
+    return scan
+
+
+async def configure_index_scan(
+    session: AsyncSession, scan_settings: dict[str, str] | None = None
+) -> None:
+    """Apply index scan settings to the session's current transaction.
+
+    Uses set_config(..., is_local => true), so the settings end with the
+    transaction and never leak to other users of the pooled connection.
+    """
+    scan_settings = index_scan_settings() if scan_settings is None else scan_settings
+    if not scan_settings:
+        return
+    await session.execute(
+        select(
+            *(
+                func.set_config(name, value, True)
+                for name, value in scan_settings.items()
+            )
+        )
+    )
+
+
+def nearest_resources(
+    patient_id: uuid.UUID,
+    query_vector: ColumnElement[Any],
+    limit: int,
+    conditions: tuple[ColumnElement[bool], ...] = (),
+    resource_filters: tuple[ColumnElement[bool], ...] = (),
+    exact: bool = False,
+    quantization: str | None = None,
+    rerank_factor: int | None = None,
+) -> Select:
+    """
+    Select (resource_id, distance) of a patient's nearest resource embeddings.
+
+    Candidates are the limit * rerank_factor (at least MIN_RERANK_CANDIDATES)
+    nearest by the quantized HNSW index; they are re-ranked by full-precision
+    cosine distance and the closest limit returned, ordered by distance.
+
+    Args:
+        patient_id: The patient UUID to scope the search to.
+        query_vector: Vector-typed SQL expression to search for.
+        limit: Number of rows to return.
+        conditions: Extra predicates on resource_embeddings.
+        resource_filters: Predicates on fhir_resources (joined when given).
+        exact: Skip quantized candidates and order every row by full distance
+            (the "exact" index strategy).
+        quantization: "binary" or "halfvec" (default settings.vector_quantization).
+        rerank_factor: Candidates per result (default settings.vector_rerank_factor).
+
+    Raises:
+        ValueError: If the quantization is unknown.
+    """
+    quantization = quantization or settings.vector_quantization
+    rerank_factor = rerank_factor or settings.vector_rerank_factor
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown vector_quantization: {quantization!r}")
+
+    def scoped(*columns: Any) -> Select:
+        stmt = select(*columns).where(
+            ResourceEmbedding.patient_id == patient_id, *conditions
+        )
+        if resource_filters:
+            stmt = stmt.join(
+                FhirResource, FhirResource.id == ResourceEmbedding.resource_id
+            ).where(*resource_filters)
+        return stmt
+
+    if exact:
+        distance = ResourceEmbedding.embedding.cosine_distance(query_vector)
+        return (
+            scoped(ResourceEmbedding.resource_id, distance.label("distance"))
+            .order_by(distance)
+            .limit(limit)
+        )
+
+    if quantization == "binary":
+        candidate_distance = binary_embedding(
+            ResourceEmbedding.embedding
+        ).hamming_distance(binary_embedding(query_vector))
+    else:
+        candidate_distance = halfvec_embedding(
+            ResourceEmbedding.embedding
+        ).cosine_distance(halfvec_embedding(query_vector))
+    candidates = (
+        scoped(ResourceEmbedding.resource_id, ResourceEmbedding.embedding)
+        .order_by(candidate_distance)
+        .limit(max(limit * rerank_factor, MIN_RERANK_CANDIDATES))
+        .subquery("candidates")
+    )
+    distance = candidates.c.embedding.cosine_distance(query_vector)
+    return (
+        select(candidates.c.resource_id, distance.label("distance"))
+        .order_by(distance)
+        .limit(limit)
+    )
+
+
+def note_chunk_distance(query_vector: Any, exact: bool = False) -> ColumnElement:
+    """
+    Cosine distance from each note chunk to the query vector.
+
+    With exact, the distance is wrapped in an arithmetic no-op so ordering by
+    it cannot use idx_note_chunks_embedding_hnsw: every one of the patient's
+    chunks is scored and sorted instead of walking the approximate index.
+    """
+    distance = NoteChunk.embedding.cosine_distance(query_vector)
+    return distance + 0 if exact else distance
+
+
+@dataclass
+class _PatientVectors:
+    """One patient's embeddings as a contiguous, L2-normalized float32 matrix.
+
+    matrix is None for a patient with more than max_resources embeddings;
+    those are searched in Postgres instead and never cached.
+    """
+
+    ids: list[uuid.UUID]
+    fhir_ids: list[str]
+    resource_types: list[str]
+    matrix: np.ndarray | None
+    loaded_at: float
+
+    @property
+    def nbytes(self) -> int:
+        return 0 if self.matrix is None else self.matrix.nbytes
+
+
+class PatientVectorCache:
+    """
+    LRU cache of per-patient embedding matrices for exact in-process search.
+
+    A patient's corpus is small (a few thousand vectors), so one matrix
+    multiply gives exact cosine similarities faster than an ANN index scan,
+    with no recall loss. Entries are loaded on first search, evicted
+    least-recently-used past max_bytes, dropped by invalidate() when a load
+    rewrites the patient's embeddings, and expire after ttl_seconds (the
+    bound on staleness for loads run in another process).
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        max_resources: int,
+        ttl_seconds: float,
+    ):
+        """
+        Initialize PatientVectorCache.
+
+        Args:
+            max_bytes: Total matrix memory to keep before evicting.
+            max_resources: Largest per-patient corpus to cache.
+            ttl_seconds: Age after which an entry is reloaded.
+        """
+        self.max_bytes = max_bytes
+        self.max_resources = max_resources
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[uuid.UUID, _PatientVectors] = OrderedDict()
+        self._bytes = 0
+        # Bumped by every invalidation; a load that raced one is not stored
+        self._epoch = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by cached matrices."""
+        return self._bytes
+
+    def __contains__(self, patient_id: uuid.UUID) -> bool:
+        return patient_id in self._entries
+
+    def invalidate(self, patient_id: uuid.UUID | None = None) -> None:
+        """Drop one patient's entry, or every entry when patient_id is None."""
+        self._epoch += 1
+        if patient_id is None:
+            self._entries.clear()
+            self._bytes = 0
+            return
+        entry = self._entries.pop(patient_id, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+
+    async def get(
+        self, session: AsyncSession, patient_id: uuid.UUID
+    ) -> _PatientVectors:
+        """Return the patient's vectors, loading them on a miss."""
+        entry = self._entries.get(patient_id)
+        if entry is not None:
+            if time.monotonic() - entry.loaded_at < self.ttl_seconds:
+                self._entries.move_to_end(patient_id)
+                return entry
+            # Expired
+            del self._entries[patient_id]
+            self._bytes -= entry.nbytes
+
+        epoch = self._epoch
+        entry = await self._load(session, patient_id)
+        if epoch == self._epoch:
+            self._store(patient_id, entry)
+        return entry
+
+    async def _load(
+        self, session: AsyncSession, patient_id: uuid.UUID
+    ) -> _PatientVectors:
+        # Count first so an oversized corpus, which is not cached and so is
+        # checked on every search, never has its embeddings read
+        count = await session.scalar(
+            select(func.count()).select_from(
+                select(ResourceEmbedding.resource_id)
+                .where(ResourceEmbedding.patient_id == patient_id)
+                .limit(self.max_resources + 1)
+                .subquery()
+            )
+        )
+        if count > self.max_resources:
+            return _PatientVectors([], [], [], None, time.monotonic())
+
+        result = await session.execute(
+            select(
+                FhirResource.id,
+                FhirResource.fhir_id,
+                FhirResource.resource_type,
+                ResourceEmbedding.embedding,
+            )
+            .join(ResourceEmbedding, ResourceEmbedding.resource_id == FhirResource.id)
+            .where(
+                ResourceEmbedding.patient_id == patient_id,
+                FhirResource.patient_id == patient_id,
+            )
+            .limit(self.max_resources + 1)
+        )
+        rows = result.all()
+        if len(rows) > self.max_resources:
+            # Embeddings were added since the count
+            return _PatientVectors([], [], [], None, time.monotonic())
+
+        matrix = np.zeros((len(rows), EMBEDDING_DIMENSION), dtype=np.float32)
+        for i, row in enumerate(rows):
+            matrix[i] = row.embedding
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+        return _PatientVectors(
+            ids=[row.id for row in rows],
+            fhir_ids=[row.fhir_id for row in rows],
+            resource_types=[row.resource_type for row in rows],
+            matrix=matrix,
+            loaded_at=time.monotonic(),
+        )
+
+    def _store(self, patient_id: uuid.UUID, entry: _PatientVectors) -> None:
+        # An oversized marker holds no matrix, so byte-based eviction would
+        # never reclaim it; keeping one per large patient would grow unbounded
+        if entry.matrix is None or entry.nbytes > self.max_bytes:
+            return
+        self._entries[patient_id] = entry
+        self._bytes += entry.nbytes
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+
+
+_patient_vector_cache: PatientVectorCache | None = None
+
+
+def get_patient_vector_cache() -> PatientVectorCache | None:
+    """Return the shared patient vector cache, creating it on first use.
+
+    Returns:
+        The shared PatientVectorCache, or None when
+        settings.vector_cache_enabled is off.
+    """
+    global _patient_vector_cache
+    if not settings.vector_cache_enabled:
+        return None
+    if _patient_vector_cache is None:
+        _patient_vector_cache = PatientVectorCache(
+            max_bytes=settings.vector_cache_max_mb * 1024 * 1024,
+            max_resources=settings.vector_cache_max_resources,
+            ttl_seconds=settings.vector_cache_ttl_seconds,
+        )
+    return _patient_vector_cache
+
+
+def invalidate_patient_vectors(patient_id: uuid.UUID | str) -> None:
+    """Drop a patient's cached vectors after its embeddings were rewritten."""
+    if _patient_vector_cache is not None:
+        _patient_vector_cache.invalidate(parse_uuid(patient_id, "patient_id"))
+
+
 class VectorSearchService:
     """
     Vector search service for semantic similarity search over FHIR resources.
@@ -72,14 +458,35 @@ class VectorSearchService:
                 print(f"{result.resource_type}: {result.score:.3f}")
     """
 
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self,
+        session: AsyncSession,
+        index_strategy: str | None = None,
+        ef_search: int | None = None,
+        vector_cache: PatientVectorCache | None = None,
+    ):
         """
         Initialize VectorSearchService.
 
         Args:
             session: Async SQLAlchemy session for database queries.
+            index_strategy: "hnsw", "iterative" or "exact"
+                (default settings.vector_index_strategy).
+            ef_search: HNSW candidate list size
+                (default settings.vector_ef_search).
+            vector_cache: In-process cache that search_similar and
+                search_similar_many answer from by exact matrix search
+                (default get_patient_vector_cache(), None when disabled).
+
+        Raises:
+            ValueError: If the index strategy or ef_search is invalid.
         """
         self._session = session
+        self._scan_settings = index_scan_settings(index_strategy, ef_search)
+        self._exact = (index_strategy or settings.vector_index_strategy) == "exact"
+        self._vector_cache = (
+            vector_cache if vector_cache is not None else get_patient_vector_cache()
+        )
 
     async def search_similar(
         self,
@@ -97,7 +504,8 @@ class VectorSearchService:
         Args:
             patient_id: The patient UUID to scope the search to.
                        Can be a UUID object or string representation.
-            query_embedding: The query embedding vector (1536 dimensions).
+            query_embedding: The query embedding vector (EMBEDDING_DIMENSION
+                dimensions).
             limit: Maximum number of results to return. Defaults to 10, max 100.
             threshold: Minimum similarity score (0-1). Resources with lower
                       similarity are filtered out. Defaults to 0.7.
@@ -109,72 +517,41 @@ class VectorSearchService:
         Raises:
             ValueError: If parameters are invalid (wrong dimensions, out of range, etc.)
         """
-        # Validate embedding
-        if not query_embedding:
-            raise ValueError("query_embedding cannot be empty")
-        if len(query_embedding) != EMBEDDING_DIMENSION:
-            raise ValueError(
-                f"query_embedding must have exactly {EMBEDDING_DIMENSION} dimensions, "
-                f"got {len(query_embedding)}"
-            )
-        if not all(
-            isinstance(v, (int, float)) and not math.isnan(v) and not math.isinf(v)
-            for v in query_embedding
-        ):
-            raise ValueError("query_embedding contains invalid values (NaN or Inf)")
-
-        # Validate limit
-        if limit < 1:
-            raise ValueError("limit must be at least 1")
-        if limit > MAX_LIMIT:
-            raise ValueError(f"limit cannot exceed {MAX_LIMIT}")
-
-        # Validate threshold
-        if not (0.0 <= threshold <= 1.0):
-            raise ValueError("threshold must be between 0.0 and 1.0")
-
-        # Convert string patient_id to UUID if needed
-        if isinstance(patient_id, str):
-            try:
-                patient_id = uuid.UUID(patient_id)
-            except ValueError:
-                logger.warning("Invalid patient_id format attempted")
-                raise ValueError("Invalid patient_id format") from None
+        validate_query_embedding(query_embedding)
+        _validate_limit_and_threshold(limit, threshold)
+        patient_id = parse_uuid(patient_id, "patient_id")
+
+        cached = await self._search_cached(
+            patient_id, [query_embedding], limit, threshold
+        )
+        if cached is not None:
+            return cached[0]
 
         # pgvector's <=> operator returns cosine distance (0 = identical, 2 = opposite)
         # We convert to similarity: similarity = 1 - distance
         # Threshold on distance: distance <= 1 - threshold
         max_distance = 1 - threshold
 
-        # Build subquery to compute distance once (avoids duplicate calculation)
-        # The HNSW index (idx_fhir_embedding_hnsw) will be used automatically
-        distance_subquery = (
+        # Quantized HNSW candidates re-ranked at full precision
+        nearest = self._nearest(
+            patient_id, cast(query_embedding, Vector(EMBEDDING_DIMENSION)), limit
+        ).subquery("nearest")
+        query = (
             select(
                 FhirResource.data,
                 FhirResource.resource_type,
                 FhirResource.fhir_id,
-                FhirResource.embedding.cosine_distance(query_embedding).label("distance"),
+                nearest.c.distance,
             )
+            .join(nearest, FhirResource.id == nearest.c.resource_id)
             .where(
+                nearest.c.distance <= max_distance,
                 FhirResource.patient_id == patient_id,
-                FhirResource.embedding.isnot(None),
             )
-            .subquery()
-        )
-
-        # Filter and order on the computed distance column
-        query = (
-            select(
-                distance_subquery.c.data,
-                distance_subquery.c.resource_type,
-                distance_subquery.c.fhir_id,
-                distance_subquery.c.distance,
-            )
-            .where(distance_subquery.c.distance <= max_distance)
-            .order_by(distance_subquery.c.distance)
-            .limit(limit)
+            .order_by(nearest.c.distance)
         )
 
+        await configure_index_scan(self._session, self._scan_settings)
         result = await self._session.execute(query)
         rows = result.all()
 
@@ -234,6 +611,330 @@ class VectorSearchService:
             threshold=threshold,
         )
 
+    async def search_similar_many(
+        self,
+        patient_id: uuid.UUID | str,
+        query_embeddings: list[list[float]],
+        limit: int = DEFAULT_LIMIT,
+        threshold: float = DEFAULT_THRESHOLD,
+    ) -> list[list[SearchResult]]:
+        """
+        Run several similarity searches in a single SQL statement.
+
+        The query vectors are sent as a VALUES list and each one drives a
+        LATERAL top-k subquery (quantized HNSW candidates re-ranked by cosine
+        distance, see nearest_resources), replacing one round trip per query.
+
+        SECURITY: All queries are scoped to the specified patient_id.
+
+        Args:
+            patient_id: The patient UUID to scope the search to.
+            query_embeddings: Query vectors (EMBEDDING_DIMENSION dimensions
+                each), at most MAX_BATCH_QUERIES.
+            limit: Maximum results per query. Defaults to 10, max 100.
+            threshold: Minimum similarity score (0-1). Defaults to 0.7.
+
+        Returns:
+            One list of SearchResult objects per query embedding, in input
+            order, each ordered by similarity (highest first).
+
+        Raises:
+            ValueError: If parameters are invalid (wrong dimensions, too many
+                queries, out of range, etc.)
+        """
+        queries = _query_values(query_embeddings)
+        _validate_limit_and_threshold(limit, threshold)
+        patient_id = parse_uuid(patient_id, "patient_id")
+
+        cached = await self._search_cached(
+            patient_id, query_embeddings, limit, threshold
+        )
+        if cached is not None:
+            return cached
+
+        # Untyped VALUES parameters arrive as text; cast back to vector
+        query_vector = cast(queries.c.embedding, Vector(EMBEDDING_DIMENSION))
+        top_k = self._nearest(patient_id, query_vector, limit).lateral("top_k")
+        query = (
+            select(
+                queries.c.ord,
+                FhirResource.data,
+                FhirResource.resource_type,
+                FhirResource.fhir_id,
+                top_k.c.distance,
+            )
+            .select_from(queries)
+            .join(top_k, true())
+            .join(FhirResource, FhirResource.id == top_k.c.resource_id)
+            .where(
+                top_k.c.distance <= 1 - threshold,
+                FhirResource.patient_id == patient_id,
+            )
+            .order_by(queries.c.ord, top_k.c.distance)
+        )
+
+        await configure_index_scan(self._session, self._scan_settings)
+        result = await self._session.execute(query)
+
+        grouped: list[list[SearchResult]] = [[] for _ in query_embeddings]
+        for row in result.all():
+            grouped[row.ord].append(
+                SearchResult(
+                    resource=row.data,
+                    score=1 - row.distance,
+                    resource_type=row.resource_type,
+                    fhir_id=row.fhir_id,
+                )
+            )
+        return grouped
+
+    async def search_many(
+        self,
+        patient_id: uuid.UUID | str,
+        queries: list[str],
+        embed_many_fn,
+        limit: int = DEFAULT_LIMIT,
+        threshold: float = DEFAULT_THRESHOLD,
+    ) -> list[list[SearchResult]]:
+        """
+        Search for FHIR resources similar to each of several text queries.
+
+        Distinct query strings are embedded in one embed_many_fn call and
+        searched with one SQL statement (see search_similar_many).
+
+        Args:
+            patient_id: The patient UUID to scope the search to.
+            queries: Text queries to search for.
+            embed_many_fn: Async function that takes a list of texts and returns
+                one embedding vector per text. Typically
+                EmbeddingService.embed_texts.
+            limit: Maximum results per query. Defaults to 10.
+            threshold: Minimum similarity score (0-1). Defaults to 0.7.
+
+        Returns:
+            One list of SearchResult objects per query, in input order.
+
+        Raises:
+            ValueError: If queries is empty or contains an empty query.
+        """
+        if not queries:
+            raise ValueError("queries cannot be empty")
+        if any(not query or not query.strip() for query in queries):
+            raise ValueError("query_text cannot be empty")
+
+        distinct = list(dict.fromkeys(queries))
+        embeddings = await embed_many_fn(distinct)
+        results = await self.search_similar_many(
+            patient_id=patient_id,
+            query_embeddings=embeddings,
+            limit=limit,
+            threshold=threshold,
+        )
+        by_query = dict(zip(distinct, results))
+        return [list(by_query[query]) for query in queries]
+
+    async def search_note_passages(
+        self,
+        patient_id: uuid.UUID | str,
+        query_embedding: list[float],
+        limit: int = DEFAULT_LIMIT,
+        threshold: float = DEFAULT_THRESHOLD,
+    ) -> list[PassageResult]:
+        """
+        Search clinical note passages semantically similar to the query embedding.
+
+        Searches the note_chunks table (overlapping windows of DocumentReference
+        note text) rather than whole resources, so callers can cite the
+        relevant passage instead of the full note.
+
+        SECURITY: All queries are scoped to the specified patient_id.
+
+        Args:
+            patient_id: The patient UUID to scope the search to.
+            query_embedding: The query embedding vector (EMBEDDING_DIMENSION
+                dimensions).
+            limit: Maximum number of passages to return. Defaults to 10, max 100.
+            threshold: Minimum similarity score (0-1). Defaults to 0.7.
+
+        Returns:
+            List of PassageResult objects, ordered by similarity (highest first).
+
+        Raises:
+            ValueError: If parameters are invalid (wrong dimensions, out of range, etc.)
+        """
+        validate_query_embedding(query_embedding)
+        _validate_limit_and_threshold(limit, threshold)
+        patient_id = parse_uuid(patient_id, "patient_id")
+
+        max_distance = 1 - threshold
+
+        # The HNSW index (idx_note_chunks_embedding_hnsw) orders the chunks,
+        # unless the strategy is exact; the parent resource is joined for its
+        # data and FHIR ID
+        distance_subquery = (
+            select(
+                NoteChunk.content,
+                NoteChunk.chunk_index,
+                NoteChunk.start_offset,
+                NoteChunk.resource_id,
+                note_chunk_distance(query_embedding, self._exact).label("distance"),
+            )
+            .where(NoteChunk.patient_id == patient_id)
+            .subquery()
+        )
+
+        query = (
+            select(
+                distance_subquery.c.content,
+                distance_subquery.c.chunk_index,
+                distance_subquery.c.start_offset,
+                distance_subquery.c.distance,
+                FhirResource.data,
+                FhirResource.fhir_id,
+            )
+            .join(FhirResource, FhirResource.id == distance_subquery.c.resource_id)
+            .where(
+                distance_subquery.c.distance <= max_distance,
+                FhirResource.patient_id == patient_id,
+            )
+            .order_by(distance_subquery.c.distance)
+            .limit(limit)
+        )
+
+        await configure_index_scan(self._session, self._scan_settings)
+        result = await self._session.execute(query)
+
+        return [
+            PassageResult(
+                text=row.content,
+                score=1 - row.distance,
+                chunk_index=row.chunk_index,
+                start_offset=row.start_offset,
+                resource=row.data,
+                fhir_id=row.fhir_id,
+            )
+            for row in result.all()
+        ]
+
+    async def search_note_passages_by_text(
+        self,
+        patient_id: uuid.UUID | str,
+        query_text: str,
+        embed_fn,
+        limit: int = DEFAULT_LIMIT,
+        threshold: float = DEFAULT_THRESHOLD,
+    ) -> list[PassageResult]:
+        """
+        Search clinical note passages similar to a text query.
+
+        Args:
+            patient_id: The patient UUID to scope the search to.
+            query_text: The text query to search for.
+            embed_fn: Async function that takes text and returns embedding vector.
+            limit: Maximum number of passages to return. Defaults to 10.
+            threshold: Minimum similarity score (0-1). Defaults to 0.7.
+
+        Returns:
+            List of PassageResult objects, ordered by similarity (highest first).
+
+        Raises:
+            ValueError: If query_text is empty.
+        """
+        if not query_text or not query_text.strip():
+            raise ValueError("query_text cannot be empty")
+
+        query_embedding = await embed_fn(query_text)
+
+        return await self.search_note_passages(
+            patient_id=patient_id,
+            query_embedding=query_embedding,
+            limit=limit,
+            threshold=threshold,
+        )
+
+    async def search_note_passages_many(
+        self,
+        patient_id: uuid.UUID | str,
+        query_embeddings: list[list[float]],
+        limit: int = DEFAULT_LIMIT,
+        threshold: float = DEFAULT_THRESHOLD,
+    ) -> list[list[PassageResult]]:
+        """
+        Run several note passage searches in a single SQL statement.
+
+        Batched counterpart of search_note_passages, built like
+        search_similar_many (VALUES list of query vectors, LATERAL top-k).
+
+        Args:
+            patient_id: The patient UUID to scope the search to.
+            query_embeddings: Query vectors, at most MAX_BATCH_QUERIES.
+            limit: Maximum passages per query. Defaults to 10, max 100.
+            threshold: Minimum similarity score (0-1). Defaults to 0.7.
+
+        Returns:
+            One list of PassageResult objects per query embedding, in input
+            order, each ordered by similarity (highest first).
+
+        Raises:
+            ValueError: If parameters are invalid.
+        """
+        queries = _query_values(query_embeddings)
+        _validate_limit_and_threshold(limit, threshold)
+        patient_id = parse_uuid(patient_id, "patient_id")
+
+        # Untyped VALUES parameters arrive as text; cast back to vector
+        query_vector = cast(queries.c.embedding, Vector(EMBEDDING_DIMENSION))
+        distance = note_chunk_distance(query_vector, self._exact)
+        top_k = (
+            select(
+                NoteChunk.content,
+                NoteChunk.chunk_index,
+                NoteChunk.start_offset,
+                NoteChunk.resource_id,
+                distance.label("distance"),
+            )
+            .where(NoteChunk.patient_id == patient_id)
+            .order_by(distance)
+            .limit(limit)
+            .lateral("top_k")
+        )
+        query = (
+            select(
+                queries.c.ord,
+                top_k.c.content,
+                top_k.c.chunk_index,
+                top_k.c.start_offset,
+                top_k.c.distance,
+                FhirResource.data,
+                FhirResource.fhir_id,
+            )
+            .select_from(queries)
+            .join(top_k, true())
+            .join(FhirResource, FhirResource.id == top_k.c.resource_id)
+            .where(
+                top_k.c.distance <= 1 - threshold,
+                FhirResource.patient_id == patient_id,
+            )
+            .order_by(queries.c.ord, top_k.c.distance)
+        )
+
+        await configure_index_scan(self._session, self._scan_settings)
+        result = await self._session.execute(query)
+
+        grouped: list[list[PassageResult]] = [[] for _ in query_embeddings]
+        for row in result.all():
+            grouped[row.ord].append(
+                PassageResult(
+                    text=row.content,
+                    score=1 - row.distance,
+                    chunk_index=row.chunk_index,
+                    start_offset=row.start_offset,
+                    resource=row.data,
+                    fhir_id=row.fhir_id,
+                )
+            )
+        return grouped
+
     async def search_similar_to_resource(
         self,
         patient_id: uuid.UUID | str,
@@ -260,34 +961,14 @@ class VectorSearchService:
         Raises:
             ValueError: If parameters are invalid or source resource has no embedding.
         """
-        # Validate limit
-        if limit < 1:
-            raise ValueError("limit must be at least 1")
-        if limit > MAX_LIMIT:
-            raise ValueError(f"limit cannot exceed {MAX_LIMIT}")
-
-        # Validate threshold
-        if not (0.0 <= threshold <= 1.0):
-            raise ValueError("threshold must be between 0.0 and 1.0")
-
-        # Convert string IDs to UUIDs if needed
-        if isinstance(patient_id, str):
-            try:
-                patient_id = uuid.UUID(patient_id)
-            except ValueError:
-                logger.warning("Invalid patient_id format attempted")
-                raise ValueError("Invalid patient_id format") from None
-        if isinstance(resource_id, str):
-            try:
-                resource_id = uuid.UUID(resource_id)
-            except ValueError:
-                logger.warning("Invalid resource_id format attempted")
-                raise ValueError("Invalid resource_id format") from None
+        _validate_limit_and_threshold(limit, threshold)
+        patient_id = parse_uuid(patient_id, "patient_id")
+        resource_id = parse_uuid(resource_id, "resource_id")
 
         # First, get the embedding of the source resource
-        source_query = select(FhirResource.embedding).where(
-            FhirResource.id == resource_id,
-            FhirResource.patient_id == patient_id,  # Security: verify ownership
+        source_query = select(ResourceEmbedding.embedding).where(
+            ResourceEmbedding.resource_id == resource_id,
+            ResourceEmbedding.patient_id == patient_id,  # Security: verify ownership
         )
         result = await self._session.execute(source_query)
         row = result.first()
@@ -301,35 +982,28 @@ class VectorSearchService:
         # Calculate max distance from threshold
         max_distance = 1 - threshold
 
-        # Build subquery to compute distance once (avoids duplicate calculation)
-        distance_subquery = (
+        nearest = self._nearest(
+            patient_id,
+            cast(source_embedding, Vector(EMBEDDING_DIMENSION)),
+            limit,
+            conditions=(ResourceEmbedding.resource_id != resource_id,),
+        ).subquery("nearest")
+        query = (
             select(
                 FhirResource.data,
                 FhirResource.resource_type,
                 FhirResource.fhir_id,
-                FhirResource.embedding.cosine_distance(source_embedding).label("distance"),
+                nearest.c.distance,
             )
+            .join(nearest, FhirResource.id == nearest.c.resource_id)
             .where(
+                nearest.c.distance <= max_distance,
                 FhirResource.patient_id == patient_id,
-                FhirResource.embedding.isnot(None),
-                FhirResource.id != resource_id,  # Exclude source resource
-            )
-            .subquery()
-        )
-
-        # Filter and order on the computed distance column
-        query = (
-            select(
-                distance_subquery.c.data,
-                distance_subquery.c.resource_type,
-                distance_subquery.c.fhir_id,
-                distance_subquery.c.distance,
             )
-            .where(distance_subquery.c.distance <= max_distance)
-            .order_by(distance_subquery.c.distance)
-            .limit(limit)
+            .order_by(nearest.c.distance)
         )
 
+        await configure_index_scan(self._session, self._scan_settings)
         result = await self._session.execute(query)
         rows = result.all()
 
@@ -347,3 +1021,135 @@ class VectorSearchService:
             )
 
         return search_results
+
+    def _nearest(
+        self,
+        patient_id: uuid.UUID,
+        query_vector: ColumnElement[Any],
+        limit: int,
+        conditions: tuple[ColumnElement[bool], ...] = (),
+    ) -> Select:
+        """nearest_resources under this service's index strategy."""
+        return nearest_resources(
+            patient_id,
+            query_vector,
+            limit,
+            conditions=conditions,
+            exact=self._exact,
+        )
+
+    async def _search_cached(
+        self,
+        patient_id: uuid.UUID,
+        query_embeddings: list[list[float]],
+        limit: int,
+        threshold: float,
+    ) -> list[list[SearchResult]] | None:
+        """Exact search over the patient's cached embedding matrix.
+
+        Similarities for all queries come from one matrix multiply; only the
+        data of the resources returned is then read from Postgres.
+
+        Returns:
+            One result list per query (as search_similar_many), or None if
+            the cache is disabled or the patient's corpus is too large for it.
+        """
+        if self._vector_cache is None:
+            return None
+        vectors = await self._vector_cache.get(self._session, patient_id)
+        if vectors.matrix is None:
+            return None
+        if not vectors.ids:
+            return [[] for _ in query_embeddings]
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries /= np.where(norms == 0, 1, norms)
+        # Distances in float64, compared like the SQL path's distance filter
+        distances = 1 - (queries @ vectors.matrix.T).astype(np.float64)
+        max_distance = 1 - threshold
+
+        top: list[list[tuple[int, float]]] = []
+        for row in distances:
+            candidates = np.flatnonzero(row <= max_distance)
+            order = candidates[np.argsort(row[candidates], kind="stable")][:limit]
+            top.append([(int(i), float(row[i])) for i in order])
+
+        wanted = {vectors.ids[i] for hits in top for i, _ in hits}
+        data_by_id: dict[uuid.UUID, dict[str, Any]] = {}
+        if wanted:
+            result = await self._session.execute(
+                select(FhirResource.id, FhirResource.data).where(
+                    FhirResource.id.in_(wanted),
+                    FhirResource.patient_id == patient_id,
+                )
+            )
+            data_by_id = {row.id: row.data for row in result.all()}
+
+        return [
+            [
+                SearchResult(
+                    resource=data_by_id[vectors.ids[i]],
+                    score=1 - distance,
+                    resource_type=vectors.resource_types[i],
+                    fhir_id=vectors.fhir_ids[i],
+                )
+                for i, distance in hits
+                # Deleted since the matrix was loaded
+                if vectors.ids[i] in data_by_id
+            ]
+            for hits in top
+        ]
+
+
+def validate_query_embedding(query_embedding: list[float]) -> None:
+    """Raise ValueError unless query_embedding is a finite vector of the right size."""
+    if not query_embedding:
+        raise ValueError("query_embedding cannot be empty")
+    if len(query_embedding) != EMBEDDING_DIMENSION:
+        raise ValueError(
+            f"query_embedding must have exactly {EMBEDDING_DIMENSION} dimensions, "
+            f"got {len(query_embedding)}"
+        )
+    if not all(
+        isinstance(v, (int, float)) and not math.isnan(v) and not math.isinf(v)
+        for v in query_embedding
+    ):
+        raise ValueError("query_embedding contains invalid values (NaN or Inf)")
+
+
+def _validate_limit_and_threshold(limit: int, threshold: float) -> None:
+    """Raise ValueError if limit or threshold is out of range."""
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    if limit > MAX_LIMIT:
+        raise ValueError(f"limit cannot exceed {MAX_LIMIT}")
+    if not (0.0 <= threshold <= 1.0):
+        raise ValueError("threshold must be between 0.0 and 1.0")
+
+
+def parse_uuid(value: uuid.UUID | str, name: str) -> uuid.UUID:
+    """Convert a string ID to a UUID, raising ValueError if malformed."""
+    if isinstance(value, uuid.UUID):
+        return value
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        logger.warning("Invalid %s format attempted", name)
+        raise ValueError(f"Invalid {name} format") from None
+
+
+def _query_values(query_embeddings: list[list[float]]):
+    """Validate query vectors and wrap them as a VALUES (ord, embedding) list."""
+    if not query_embeddings:
+        raise ValueError("query_embeddings cannot be empty")
+    if len(query_embeddings) > MAX_BATCH_QUERIES:
+        raise ValueError(f"cannot search more than {MAX_BATCH_QUERIES} queries at once")
+    for query_embedding in query_embeddings:
+        validate_query_embedding(query_embedding)
+
+    return values(
+        column("ord", Integer),
+        column("embedding", Vector(EMBEDDING_DIMENSION)),
+        name="queries",
+    ).data(list(enumerate(query_embeddings)))
@@ -16,12 +16,17 @@ import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 from neo4j import AsyncGraphDatabase
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.auth import verify_bearer_token
 from app.config import settings
 from app.database import Base, get_db
 from app.main import app
+from app.projections.extractors import (
+    register_clinical_projections,
+    register_observation_projection,
+)
 from app.services.graph import KnowledgeGraph
 
 TEST_USER_ID = "test-user"
@@ -106,7 +111,14 @@ async def test_engine():
 
     engine = create_async_engine(db_url, echo=False)
 
+    # Lab, vital and clinical-list readers query projection tables, which
+    # resources seeded through the ORM populate at flush time
+    register_observation_projection()
+    register_clinical_projections()
+
     async with engine.begin() as conn:
+        # Trigram operator class used by idx_fhir_embedding_text_trgm
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
 
     yield engine
@@ -583,9 +595,7 @@ def sample_medication_with_encounter_and_reason() -> dict:
         "id": "medication-with-encounter",
         "subject": {"reference": "Patient/patient-test-123"},
         "encounter": {"reference": "Encounter/encounter-test-ghi"},
-        "reasonReference": [
-            {"reference": "Condition/condition-with-encounter"}
-        ],
+        "reasonReference": [{"reference": "Condition/condition-with-encounter"}],
         "medicationCodeableConcept": {
             "coding": [
                 {
@@ -631,9 +641,7 @@ def sample_procedure_with_encounter_and_reason() -> dict:
         "id": "procedure-with-encounter",
         "subject": {"reference": "Patient/patient-test-123"},
         "encounter": {"reference": "Encounter/encounter-test-ghi"},
-        "reasonReference": [
-            {"reference": "Condition/condition-with-encounter"}
-        ],
+        "reasonReference": [{"reference": "Condition/condition-with-encounter"}],
         "code": {
             "coding": [
                 {
@@ -656,9 +664,7 @@ def sample_diagnostic_report_with_encounter_and_results() -> dict:
         "id": "report-with-encounter",
         "subject": {"reference": "Patient/patient-test-123"},
         "encounter": {"reference": "Encounter/encounter-test-ghi"},
-        "result": [
-            {"reference": "Observation/observation-with-encounter"}
-        ],
+        "result": [{"reference": "Observation/observation-with-encounter"}],
         "code": {
             "coding": [
                 {
@@ -982,9 +988,7 @@ def sample_document_reference_with_encounter() -> dict:
         "status": "current",
         "date": "2024-01-15T09:30:00Z",
         "context": {
-            "encounter": [
-                {"reference": "Encounter/encounter-test-ghi"}
-            ],
+            "encounter": [{"reference": "Encounter/encounter-test-ghi"}],
         },
     }
 
@@ -1172,9 +1176,7 @@ def sample_medication_administration_with_reason() -> dict:
         "id": "medadmin-with-reason",
         "subject": {"reference": "Patient/patient-test-123"},
         "context": {"reference": "Encounter/encounter-test-ghi"},
-        "reasonReference": [
-            {"reference": "Condition/condition-with-encounter"}
-        ],
+        "reasonReference": [{"reference": "Condition/condition-with-encounter"}],
         "medicationCodeableConcept": {
             "coding": [
                 {
@@ -1241,9 +1243,7 @@ def sample_claim() -> dict:
                         }
                     ]
                 },
-                "encounter": [
-                    {"reference": "Encounter/encounter-test-ghi"}
-                ],
+                "encounter": [{"reference": "Encounter/encounter-test-ghi"}],
             }
         ],
         "diagnosis": [
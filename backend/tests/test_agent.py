@@ -13,30 +13,30 @@ import pytest
 from app.schemas import AgentResponse, FollowUp, Insight
 from app.schemas.agent import LightningResponse
 from app.services.agent import (
-    AgentService,
+    _PERSONA,
+    DEFAULT_MAX_OUTPUT_TOKENS,
     DEFAULT_MODEL,
     DEFAULT_REASONING_EFFORT,
-    DEFAULT_MAX_OUTPUT_TOKENS,
     TIER_DEEP,
-    TIER_QUICK,
     TIER_LIGHTNING,
-    _PERSONA,
-    build_system_prompt_quick,
-    build_system_prompt_lightning,
-    build_system_prompt_deep,
+    TIER_QUICK,
+    AgentService,
+    _allergy_row,
     _build_patient_summary_section,
     _build_safety_section,
     _build_safety_section_lightning,
     _format_as_table,
+    _format_safety_constraints_v2,
     _format_tier1_conditions,
     _format_tier2_encounters,
     _format_tier3_observations,
-    _format_safety_constraints_v2,
-    _allergy_row,
-    _immunization_row,
-    _unlinked_med_row,
     _get_display_name,
+    _immunization_row,
     _prune_fhir_resource,
+    _unlinked_med_row,
+    build_system_prompt_deep,
+    build_system_prompt_lightning,
+    build_system_prompt_quick,
 )
 from app.services.agent_tools import TOOL_SCHEMAS, execute_tool
 from app.services.query_classifier import (
@@ -45,7 +45,6 @@ from app.services.query_classifier import (
     QUICK_PROFILE,
 )
 
-
 # =============================================================================
 # Test Fixtures
 # =============================================================================
@@ -165,7 +164,9 @@ def create_mock_agent_response() -> AgentResponse:
             ),
         ],
         follow_ups=[
-            FollowUp(question="What is the patient's blood pressure trend?", intent="vitals"),
+            FollowUp(
+                question="What is the patient's blood pressure trend?", intent="vitals"
+            ),
         ],
     )
 
@@ -276,7 +277,8 @@ class TestAgentServiceGenerateResponse:
         service = AgentService(client=mock_client)
 
         response = await service.generate_response(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="What medications is this patient taking?",
         )
 
@@ -286,7 +288,9 @@ class TestAgentServiceGenerateResponse:
         mock_client.responses.parse.assert_called_once()
 
     @pytest.mark.asyncio
-    async def test_generate_response_with_history(self, system_prompt: str, patient_id: str):
+    async def test_generate_response_with_history(
+        self, system_prompt: str, patient_id: str
+    ):
         """Test response generation with conversation history."""
         mock_client = create_mock_openai_client()
         service = AgentService(client=mock_client)
@@ -297,7 +301,8 @@ class TestAgentServiceGenerateResponse:
         ]
 
         response = await service.generate_response(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="What about their medications?",
             history=history,
         )
@@ -309,31 +314,42 @@ class TestAgentServiceGenerateResponse:
         assert len(input_messages) == 4  # system + 2 history + current
 
     @pytest.mark.asyncio
-    async def test_generate_response_empty_message_raises(self, system_prompt: str, patient_id: str):
+    async def test_generate_response_empty_message_raises(
+        self, system_prompt: str, patient_id: str
+    ):
         """Test that empty message raises ValueError."""
         mock_client = create_mock_openai_client()
         service = AgentService(client=mock_client)
 
         with pytest.raises(ValueError, match="message cannot be empty"):
-            await service.generate_response(system_prompt=system_prompt, patient_id=patient_id, message="")
+            await service.generate_response(
+                system_prompt=system_prompt, patient_id=patient_id, message=""
+            )
 
     @pytest.mark.asyncio
-    async def test_generate_response_whitespace_message_raises(self, system_prompt: str, patient_id: str):
+    async def test_generate_response_whitespace_message_raises(
+        self, system_prompt: str, patient_id: str
+    ):
         """Test that whitespace-only message raises ValueError."""
         mock_client = create_mock_openai_client()
         service = AgentService(client=mock_client)
 
         with pytest.raises(ValueError, match="message cannot be empty"):
-            await service.generate_response(system_prompt=system_prompt, patient_id=patient_id, message="   ")
+            await service.generate_response(
+                system_prompt=system_prompt, patient_id=patient_id, message="   "
+            )
 
     @pytest.mark.asyncio
-    async def test_generate_response_reasoning_boost(self, system_prompt: str, patient_id: str):
+    async def test_generate_response_reasoning_boost(
+        self, system_prompt: str, patient_id: str
+    ):
         """Test reasoning_boost bumps effort one level (low -> medium)."""
         mock_client = create_mock_openai_client()
         service = AgentService(client=mock_client, reasoning_effort="low")
 
         await service.generate_response(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="Complex question",
             reasoning_boost=True,
         )
@@ -344,13 +360,16 @@ class TestAgentServiceGenerateResponse:
         assert effort == "medium"
 
     @pytest.mark.asyncio
-    async def test_generate_response_uses_correct_model(self, system_prompt: str, patient_id: str):
+    async def test_generate_response_uses_correct_model(
+        self, system_prompt: str, patient_id: str
+    ):
         """Test that correct model is passed to API."""
         mock_client = create_mock_openai_client()
         service = AgentService(client=mock_client, model="gpt-5.2-preview")
 
         await service.generate_response(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="Test question",
         )
 
@@ -358,13 +377,16 @@ class TestAgentServiceGenerateResponse:
         assert call_args.kwargs["model"] == "gpt-5.2-preview"
 
     @pytest.mark.asyncio
-    async def test_generate_response_uses_text_format(self, system_prompt: str, patient_id: str):
+    async def test_generate_response_uses_text_format(
+        self, system_prompt: str, patient_id: str
+    ):
         """Test that AgentResponse is passed as text_format."""
         mock_client = create_mock_openai_client()
         service = AgentService(client=mock_client)
 
         await service.generate_response(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="Test question",
         )
 
@@ -372,13 +394,16 @@ class TestAgentServiceGenerateResponse:
         assert call_args.kwargs["text_format"] is AgentResponse
 
     @pytest.mark.asyncio
-    async def test_generate_response_includes_max_tokens(self, system_prompt: str, patient_id: str):
+    async def test_generate_response_includes_max_tokens(
+        self, system_prompt: str, patient_id: str
+    ):
         """Test that max_output_tokens is passed to API."""
         mock_client = create_mock_openai_client()
         service = AgentService(client=mock_client, max_output_tokens=2048)
 
         await service.generate_response(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="Test question",
         )
 
@@ -386,7 +411,9 @@ class TestAgentServiceGenerateResponse:
         assert call_args.kwargs["max_output_tokens"] == 2048
 
     @pytest.mark.asyncio
-    async def test_generate_response_fallback_on_none(self, system_prompt: str, patient_id: str):
+    async def test_generate_response_fallback_on_none(
+        self, system_prompt: str, patient_id: str
+    ):
         """Test fallback when structured parsing returns None but raw text available."""
         mock_client = AsyncMock()
 
@@ -400,7 +427,8 @@ class TestAgentServiceGenerateResponse:
         service = AgentService(client=mock_client)
 
         response = await service.generate_response(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="Test question",
         )
 
@@ -408,7 +436,9 @@ class TestAgentServiceGenerateResponse:
         assert response.narrative == expected_response.narrative
 
     @pytest.mark.asyncio
-    async def test_generate_response_raises_on_parse_failure(self, system_prompt: str, patient_id: str):
+    async def test_generate_response_raises_on_parse_failure(
+        self, system_prompt: str, patient_id: str
+    ):
         """Test that RuntimeError is raised when all parsing fails."""
         mock_client = AsyncMock()
 
@@ -422,12 +452,15 @@ class TestAgentServiceGenerateResponse:
 
         with pytest.raises(RuntimeError, match="LLM response could not be parsed"):
             await service.generate_response(
-                system_prompt=system_prompt, patient_id=patient_id,
+                system_prompt=system_prompt,
+                patient_id=patient_id,
                 message="Test question",
             )
 
     @pytest.mark.asyncio
-    async def test_generate_response_filters_invalid_history(self, system_prompt: str, patient_id: str):
+    async def test_generate_response_filters_invalid_history(
+        self, system_prompt: str, patient_id: str
+    ):
         """Test that invalid history entries are filtered."""
         mock_client = create_mock_openai_client()
         service = AgentService(client=mock_client)
@@ -440,7 +473,8 @@ class TestAgentServiceGenerateResponse:
         ]
 
         await service.generate_response(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="Current question",
             history=history,
         )
@@ -489,17 +523,22 @@ class TestAgentServiceGenerateResponseStream:
     """Tests for AgentService.generate_response_stream method."""
 
     @pytest.mark.asyncio
-    async def test_stream_yields_reasoning_and_narrative(self, system_prompt: str, patient_id: str):
+    async def test_stream_yields_reasoning_and_narrative(
+        self, system_prompt: str, patient_id: str
+    ):
         """Test that stream yields reasoning and narrative deltas then done."""
         mock_client = AsyncMock()
         expected = create_mock_agent_response()
-        mock_client.responses.stream = MagicMock(return_value=create_mock_stream(expected))
+        mock_client.responses.stream = MagicMock(
+            return_value=create_mock_stream(expected)
+        )
 
         service = AgentService(client=mock_client)
 
         events = []
         async for event_type, data in service.generate_response_stream(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="What about diabetes?",
         ):
             events.append((event_type, data))
@@ -519,7 +558,9 @@ class TestAgentServiceGenerateResponseStream:
         mock_client.responses.parse.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_stream_empty_message_raises(self, system_prompt: str, patient_id: str):
+    async def test_stream_empty_message_raises(
+        self, system_prompt: str, patient_id: str
+    ):
         """Test that empty message raises ValueError."""
         mock_client = AsyncMock()
         service = AgentService(client=mock_client)
@@ -531,17 +572,20 @@ class TestAgentServiceGenerateResponseStream:
                 pass
 
     @pytest.mark.asyncio
-    async def test_stream_passes_correct_kwargs(self, system_prompt: str, patient_id: str):
+    async def test_stream_passes_correct_kwargs(
+        self, system_prompt: str, patient_id: str
+    ):
         """Test that stream call uses same params as generate_response."""
         mock_client = AsyncMock()
-        mock_client.responses.stream = MagicMock(
-            return_value=create_mock_stream()
-        )
+        mock_client.responses.stream = MagicMock(return_value=create_mock_stream())
 
-        service = AgentService(client=mock_client, model="gpt-5.2-preview", reasoning_effort="high")
+        service = AgentService(
+            client=mock_client, model="gpt-5.2-preview", reasoning_effort="high"
+        )
 
         async for _ in service.generate_response_stream(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="Test question",
         ):
             pass
@@ -556,7 +600,9 @@ class TestAgentServiceGenerateResponseStream:
         mock_client.responses.parse.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_stream_fallback_on_none_parsed(self, system_prompt: str, patient_id: str):
+    async def test_stream_fallback_on_none_parsed(
+        self, system_prompt: str, patient_id: str
+    ):
         """Test fallback when structured parsing returns None."""
         mock_client = AsyncMock()
         expected = create_mock_agent_response()
@@ -574,7 +620,8 @@ class TestAgentServiceGenerateResponseStream:
 
         events = []
         async for event_type, data in service.generate_response_stream(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="Test",
         ):
             events.append((event_type, data))
@@ -650,14 +697,27 @@ class TestExecuteTool:
         mock_result = MagicMock()
         mock_result.scalars.return_value.all.return_value = []
         mock_db.execute.return_value = mock_result
-
-        result = await execute_tool(
-            name="query_patient_data",
-            arguments='{"name": "diabetes", "resource_type": null, "status": null, "category": null, "date_from": null, "date_to": null, "include_full_resource": true, "limit": 20}',
-            patient_id="patient-123",
-            graph=mock_graph,
-            db=mock_db,
-        )
+        mock_hybrid = MagicMock()
+        mock_hybrid.search_many = AsyncMock(return_value=[[]])
+
+        with (
+            patch(
+                "app.services.agent_tools._embed_query_names",
+                new_callable=AsyncMock,
+                return_value={},
+            ),
+            patch(
+                "app.services.agent_tools.HybridSearchService",
+                return_value=mock_hybrid,
+            ),
+        ):
+            result = await execute_tool(
+                name="query_patient_data",
+                arguments='{"name": "diabetes", "resource_type": null, "status": null, "category": null, "date_from": null, "date_to": null, "include_full_resource": true, "limit": 20}',
+                patient_id="patient-123",
+                graph=mock_graph,
+                db=mock_db,
+            )
 
         parsed = json.loads(result)
         assert parsed["total"] == 0
@@ -715,7 +775,7 @@ def create_mock_openai_client_with_tools(
     responses = []
 
     # Tool call rounds
-    for tool_calls in (tool_responses or []):
+    for tool_calls in tool_responses or []:
         mock_resp = MagicMock()
         mock_resp.output = tool_calls
         mock_resp.output_parsed = None
@@ -737,13 +797,16 @@ class TestToolUseLoop:
     """Tests for the tool-use loop in generate_response."""
 
     @pytest.mark.asyncio
-    async def test_no_tools_when_graph_db_absent(self, system_prompt: str, patient_id: str):
+    async def test_no_tools_when_graph_db_absent(
+        self, system_prompt: str, patient_id: str
+    ):
         """Test that tools are not passed when graph/db not provided."""
         mock_client = create_mock_openai_client()
         service = AgentService(client=mock_client)
 
         await service.generate_response(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="What medications?",
         )
 
@@ -751,13 +814,16 @@ class TestToolUseLoop:
         assert "tools" not in call_args.kwargs
 
     @pytest.mark.asyncio
-    async def test_tools_passed_when_graph_db_provided(self, system_prompt: str, patient_id: str):
+    async def test_tools_passed_when_graph_db_provided(
+        self, system_prompt: str, patient_id: str
+    ):
         """Test that tools are passed when graph and db are provided."""
         mock_client = create_mock_openai_client()
         service = AgentService(client=mock_client)
 
         await service.generate_response(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="What medications?",
             graph=AsyncMock(),
             db=AsyncMock(),
@@ -776,7 +842,8 @@ class TestToolUseLoop:
         mock_execute.return_value = "Search results: diabetes found"
 
         tool_call = _make_function_call_item(
-            "query_patient_data", '{"name": "diabetes", "resource_type": null, "status": null, "category": null, "date_from": null, "date_to": null, "include_full_resource": true, "limit": 20}'
+            "query_patient_data",
+            '{"name": "diabetes", "resource_type": null, "status": null, "category": null, "date_from": null, "date_to": null, "include_full_resource": true, "limit": 20}',
         )
         mock_client = create_mock_openai_client_with_tools(
             tool_responses=[[tool_call]],
@@ -784,7 +851,8 @@ class TestToolUseLoop:
         service = AgentService(client=mock_client)
 
         response = await service.generate_response(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="Tell me about diabetes",
             graph=AsyncMock(),
             db=AsyncMock(),
@@ -795,8 +863,14 @@ class TestToolUseLoop:
         mock_execute.assert_called_once()
 
         # Verify function_call_output was fed back
-        second_call_input = mock_client.responses.parse.call_args_list[1].kwargs["input"]
-        outputs = [m for m in second_call_input if isinstance(m, dict) and m.get("type") == "function_call_output"]
+        second_call_input = mock_client.responses.parse.call_args_list[1].kwargs[
+            "input"
+        ]
+        outputs = [
+            m
+            for m in second_call_input
+            if isinstance(m, dict) and m.get("type") == "function_call_output"
+        ]
         assert len(outputs) == 1
         assert outputs[0]["output"] == "Search results: diabetes found"
         assert outputs[0]["call_id"] == "call_1"
@@ -810,10 +884,14 @@ class TestToolUseLoop:
         mock_execute.side_effect = ["Round 1 result", "Round 2 result"]
 
         round1_call = _make_function_call_item(
-            "query_patient_data", '{"name": "diabetes", "resource_type": null, "status": null, "category": null, "date_from": null, "date_to": null, "include_full_resource": true, "limit": 20}', "call_r1"
+            "query_patient_data",
+            '{"name": "diabetes", "resource_type": null, "status": null, "category": null, "date_from": null, "date_to": null, "include_full_resource": true, "limit": 20}',
+            "call_r1",
         )
         round2_call = _make_function_call_item(
-            "explore_connections", '{"fhir_id": "cond-1", "resource_type": "Condition", "include_full_resource": true, "max_per_relationship": 10}', "call_r2"
+            "explore_connections",
+            '{"fhir_id": "cond-1", "resource_type": "Condition", "include_full_resource": true, "max_per_relationship": 10}',
+            "call_r2",
         )
         mock_client = create_mock_openai_client_with_tools(
             tool_responses=[[round1_call], [round2_call]],
@@ -821,7 +899,8 @@ class TestToolUseLoop:
         service = AgentService(client=mock_client)
 
         response = await service.generate_response(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="Diabetes labs?",
             graph=AsyncMock(),
             db=AsyncMock(),
@@ -840,10 +919,14 @@ class TestToolUseLoop:
         mock_execute.side_effect = ["Result A", "Result B"]
 
         call_a = _make_function_call_item(
-            "query_patient_data", '{"name": "diabetes", "resource_type": null, "status": null, "category": null, "date_from": null, "date_to": null, "include_full_resource": true, "limit": 20}', "call_a"
+            "query_patient_data",
+            '{"name": "diabetes", "resource_type": null, "status": null, "category": null, "date_from": null, "date_to": null, "include_full_resource": true, "limit": 20}',
+            "call_a",
         )
         call_b = _make_function_call_item(
-            "explore_connections", '{"fhir_id": "cond-1", "resource_type": "Condition", "include_full_resource": true, "max_per_relationship": 10}', "call_b"
+            "explore_connections",
+            '{"fhir_id": "cond-1", "resource_type": "Condition", "include_full_resource": true, "max_per_relationship": 10}',
+            "call_b",
         )
         mock_client = create_mock_openai_client_with_tools(
             tool_responses=[[call_a, call_b]],
@@ -851,7 +934,8 @@ class TestToolUseLoop:
         service = AgentService(client=mock_client)
 
         response = await service.generate_response(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="Diabetes overview",
             graph=AsyncMock(),
             db=AsyncMock(),
@@ -861,6 +945,57 @@ class TestToolUseLoop:
         assert mock_execute.call_count == 2
         assert mock_client.responses.parse.call_count == 2
 
+    @pytest.mark.asyncio
+    @patch(
+        "app.services.agent.execute_query_patient_data_batch",
+        new_callable=AsyncMock,
+    )
+    @patch("app.services.agent.execute_tool", new_callable=AsyncMock)
+    async def test_query_calls_in_one_round_are_coalesced(
+        self, mock_execute, mock_batch, system_prompt: str, patient_id: str
+    ):
+        """Several query_patient_data calls in a round run as one batch."""
+        mock_batch.return_value = ["Result A", "Result C"]
+        mock_execute.return_value = "Result B"
+
+        calls = [
+            _make_function_call_item(
+                "query_patient_data", '{"name": "diabetes"}', "call_a"
+            ),
+            _make_function_call_item(
+                "explore_connections", '{"fhir_id": "cond-1"}', "call_b"
+            ),
+            _make_function_call_item("query_patient_data", '{"name": "a1c"}', "call_c"),
+        ]
+        mock_client = create_mock_openai_client_with_tools(tool_responses=[calls])
+        service = AgentService(client=mock_client)
+
+        await service.generate_response(
+            system_prompt=system_prompt,
+            patient_id=patient_id,
+            message="Diabetes overview",
+            graph=AsyncMock(),
+            db=AsyncMock(),
+        )
+
+        mock_batch.assert_awaited_once()
+        assert mock_batch.await_args.args[0] == [
+            '{"name": "diabetes"}',
+            '{"name": "a1c"}',
+        ]
+        mock_execute.assert_awaited_once()
+        second_input = mock_client.responses.parse.call_args_list[1].kwargs["input"]
+        outputs = [
+            (m["call_id"], m["output"])
+            for m in second_input
+            if isinstance(m, dict) and m.get("type") == "function_call_output"
+        ]
+        assert outputs == [
+            ("call_a", "Result A"),
+            ("call_b", "Result B"),
+            ("call_c", "Result C"),
+        ]
+
 
 def create_mock_tool_stream(tool_calls: list):
     """Create a mock stream that returns function_calls in final.output (no text events).
@@ -894,7 +1029,9 @@ class TestToolUseStreamLoop:
     """Tests for tool-use in generate_response_stream."""
 
     @pytest.mark.asyncio
-    async def test_stream_no_tools_when_graph_db_absent(self, system_prompt: str, patient_id: str):
+    async def test_stream_no_tools_when_graph_db_absent(
+        self, system_prompt: str, patient_id: str
+    ):
         """Test that streaming without graph/db skips tools entirely."""
         mock_client = AsyncMock()
         mock_client.responses.stream = MagicMock(return_value=create_mock_stream())
@@ -903,7 +1040,8 @@ class TestToolUseStreamLoop:
 
         events = []
         async for et, data in service.generate_response_stream(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="What medications?",
         ):
             events.append((et, data))
@@ -923,7 +1061,8 @@ class TestToolUseStreamLoop:
         mock_execute.return_value = "Tool result text"
 
         tool_call = _make_function_call_item(
-            "query_patient_data", '{"name": "diabetes", "resource_type": null, "status": null, "category": null, "date_from": null, "date_to": null, "include_full_resource": true, "limit": 20}'
+            "query_patient_data",
+            '{"name": "diabetes", "resource_type": null, "status": null, "category": null, "date_from": null, "date_to": null, "include_full_resource": true, "limit": 20}',
         )
 
         # First .stream() returns tool calls (tool round)
@@ -934,13 +1073,16 @@ class TestToolUseStreamLoop:
         final_stream = create_mock_stream(final_response)
 
         mock_client = AsyncMock()
-        mock_client.responses.stream = MagicMock(side_effect=[tool_stream, final_stream])
+        mock_client.responses.stream = MagicMock(
+            side_effect=[tool_stream, final_stream]
+        )
 
         service = AgentService(client=mock_client)
 
         events = []
         async for et, data in service.generate_response_stream(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="Diabetes info",
             graph=AsyncMock(),
             db=AsyncMock(),
@@ -1010,7 +1152,8 @@ class TestToolUseStreamLoop:
 
         events = []
         async for et, data in service.generate_response_stream(
-            system_prompt=system_prompt, patient_id=patient_id,
+            system_prompt=system_prompt,
+            patient_id=patient_id,
             message="Test max rounds",
             graph=AsyncMock(),
             db=AsyncMock(),
@@ -1150,9 +1293,7 @@ class TestPruneFhirResourceGeneral:
             "meta": {"versionId": "1"},
             "text": {"div": "<div>html</div>"},
             "identifier": [{"value": "abc"}],
-            "clinicalStatus": {
-                "coding": [{"code": "active", "display": "Active"}]
-            },
+            "clinicalStatus": {"coding": [{"code": "active", "display": "Active"}]},
         }
         pruned = _prune_fhir_resource(resource)
         assert "meta" not in pruned
@@ -1198,7 +1339,9 @@ def full_compiled_summary() -> dict:
                     "resourceType": "Condition",
                     "id": "cond-diabetes",
                     "code": {
-                        "coding": [{"code": "44054006", "display": "Type 2 diabetes mellitus"}]
+                        "coding": [
+                            {"code": "44054006", "display": "Type 2 diabetes mellitus"}
+                        ]
                     },
                     "clinicalStatus": "Active",
                     "onsetDateTime": "2015-03-10",
@@ -1212,7 +1355,11 @@ def full_compiled_summary() -> dict:
                         "_recency": "established",
                         "_duration_days": 3200,
                         "_dose_history": [
-                            {"dose": "250 MG", "authoredOn": "2015-03-10", "status": "completed"},
+                            {
+                                "dose": "250 MG",
+                                "authoredOn": "2015-03-10",
+                                "status": "completed",
+                            },
                         ],
                     },
                 ],
@@ -1231,7 +1378,9 @@ def full_compiled_summary() -> dict:
                     "resourceType": "Condition",
                     "id": "cond-hypertension",
                     "code": {
-                        "coding": [{"code": "38341003", "display": "Essential hypertension"}]
+                        "coding": [
+                            {"code": "38341003", "display": "Essential hypertension"}
+                        ]
                     },
                     "clinicalStatus": "Active",
                     "onsetDateTime": "2018-06-22",
@@ -1314,7 +1463,9 @@ def full_compiled_summary() -> dict:
                         {
                             "resourceType": "Condition",
                             "id": "cond-diabetes",
-                            "code": {"coding": [{"display": "Type 2 diabetes mellitus"}]},
+                            "code": {
+                                "coding": [{"display": "Type 2 diabetes mellitus"}]
+                            },
                         },
                     ],
                     "RECORDED": [
@@ -1339,7 +1490,9 @@ def full_compiled_summary() -> dict:
                 {
                     "resourceType": "Observation",
                     "id": "obs-hba1c",
-                    "code": {"coding": [{"code": "4548-4", "display": "Hemoglobin A1c"}]},
+                    "code": {
+                        "coding": [{"code": "4548-4", "display": "Hemoglobin A1c"}]
+                    },
                     "valueQuantity": {"value": 7.2, "unit": "%"},
                     "effectiveDateTime": "2026-01-10",
                     "referenceRange": [
@@ -1392,18 +1545,24 @@ class TestBuildSystemPromptDeep:
         assert "primary care physician" in prompt
         assert "chart review partner" in prompt
 
-    def test_minimal_summary_includes_patient_orientation(self, minimal_compiled_summary: dict):
+    def test_minimal_summary_includes_patient_orientation(
+        self, minimal_compiled_summary: dict
+    ):
         """Test that v2 prompt includes patient orientation."""
         prompt = build_system_prompt_deep(minimal_compiled_summary)
         assert "Jane Doe" in prompt
         assert "age 71" in prompt
 
-    def test_minimal_summary_includes_compilation_date(self, minimal_compiled_summary: dict):
+    def test_minimal_summary_includes_compilation_date(
+        self, minimal_compiled_summary: dict
+    ):
         """Test that v2 prompt includes compilation date."""
         prompt = build_system_prompt_deep(minimal_compiled_summary)
         assert "compiled 2026-02-05" in prompt
 
-    def test_minimal_summary_includes_reasoning_directives(self, minimal_compiled_summary: dict):
+    def test_minimal_summary_includes_reasoning_directives(
+        self, minimal_compiled_summary: dict
+    ):
         """Test that v2 prompt includes reasoning directives."""
         prompt = build_system_prompt_deep(minimal_compiled_summary)
         assert "Reasoning Directives" in prompt
@@ -1413,14 +1572,18 @@ class TestBuildSystemPromptDeep:
         assert "Temporal awareness" in prompt
         assert "Confidence calibration" in prompt
 
-    def test_minimal_summary_includes_tool_guidance(self, minimal_compiled_summary: dict):
+    def test_minimal_summary_includes_tool_guidance(
+        self, minimal_compiled_summary: dict
+    ):
         """Test that v2 prompt includes tool descriptions and usage guidance."""
         prompt = build_system_prompt_deep(minimal_compiled_summary)
         assert "query_patient_data" in prompt
         assert "explore_connections" in prompt
         assert "get_patient_timeline" in prompt
 
-    def test_minimal_summary_includes_trend_guidance(self, minimal_compiled_summary: dict):
+    def test_minimal_summary_includes_trend_guidance(
+        self, minimal_compiled_summary: dict
+    ):
         """Test that v2 prompt includes explicit _trend limitation guidance."""
         prompt = build_system_prompt_deep(minimal_compiled_summary)
         assert "_trend" in prompt
@@ -1428,7 +1591,9 @@ class TestBuildSystemPromptDeep:
         assert "multi-point trend analysis" in prompt.lower()
         assert "query_patient_data" in prompt
 
-    def test_minimal_summary_includes_dose_history_guidance(self, minimal_compiled_summary: dict):
+    def test_minimal_summary_includes_dose_history_guidance(
+        self, minimal_compiled_summary: dict
+    ):
         """Test that v2 prompt includes explicit _dose_history guidance."""
         prompt = build_system_prompt_deep(minimal_compiled_summary)
         assert "_dose_history" in prompt
@@ -1442,7 +1607,9 @@ class TestBuildSystemPromptDeep:
         assert "drug allergies" in prompt
         assert "Never recommend starting, stopping, or changing medications" in prompt
 
-    def test_minimal_summary_includes_response_format(self, minimal_compiled_summary: dict):
+    def test_minimal_summary_includes_response_format(
+        self, minimal_compiled_summary: dict
+    ):
         """Test that v2 prompt includes response format guidance."""
         prompt = build_system_prompt_deep(minimal_compiled_summary)
         assert "Response Format" in prompt
@@ -1457,7 +1624,9 @@ class TestBuildSystemPromptDeep:
         assert "cond-diabetes" in prompt
         assert "cond-hypertension" in prompt
 
-    def test_full_summary_includes_treating_medications(self, full_compiled_summary: dict):
+    def test_full_summary_includes_treating_medications(
+        self, full_compiled_summary: dict
+    ):
         """Test that v2 prompt includes treating medications as table with enrichments."""
         prompt = build_system_prompt_deep(full_compiled_summary)
         assert "Metformin 500 MG" in prompt
@@ -1481,7 +1650,9 @@ class TestBuildSystemPromptDeep:
         assert "Recently Resolved" in prompt
         assert "Acute bronchitis" in prompt
 
-    def test_full_summary_includes_unlinked_medications(self, full_compiled_summary: dict):
+    def test_full_summary_includes_unlinked_medications(
+        self, full_compiled_summary: dict
+    ):
         """Test that v2 prompt includes unlinked medications."""
         prompt = build_system_prompt_deep(full_compiled_summary)
         assert "Aspirin 81 MG" in prompt
@@ -1514,7 +1685,9 @@ class TestBuildSystemPromptDeep:
         assert "General examination" in prompt
         assert "good adherence" in prompt
 
-    def test_full_summary_includes_observations_with_trend(self, full_compiled_summary: dict):
+    def test_full_summary_includes_observations_with_trend(
+        self, full_compiled_summary: dict
+    ):
         """Test that v2 prompt includes observations as table with trend data."""
         prompt = build_system_prompt_deep(full_compiled_summary)
         assert "Hemoglobin A1c" in prompt
@@ -1539,7 +1712,9 @@ class TestBuildSystemPromptDeep:
     def test_with_patient_profile(self, minimal_compiled_summary: dict):
         """Test that patient profile is included when provided."""
         profile = "Active retired teacher who enjoys gardening and cooking."
-        prompt = build_system_prompt_deep(minimal_compiled_summary, patient_profile=profile)
+        prompt = build_system_prompt_deep(
+            minimal_compiled_summary, patient_profile=profile
+        )
         assert "Active retired teacher" in prompt
         assert "Profile:" in prompt
 
@@ -1551,7 +1726,9 @@ class TestBuildSystemPromptDeep:
     def test_prompt_token_count_reasonable(self, full_compiled_summary: dict):
         """Test that full prompt is within reasonable token range (~22-38k chars ~ 5.5-9.5k tokens)."""
         profile = "Active retired teacher who enjoys gardening and has 3 grandchildren."
-        prompt = build_system_prompt_deep(full_compiled_summary, patient_profile=profile)
+        prompt = build_system_prompt_deep(
+            full_compiled_summary, patient_profile=profile
+        )
         # The prompt itself (without a real patient with many conditions) should be
         # well-structured. With a real patient the compiled summary would be much larger.
         # For our test fixture, verify the prompt has reasonable structure.
@@ -1559,7 +1736,9 @@ class TestBuildSystemPromptDeep:
         # At minimum the template + fixture data should be > 3000 chars
         assert char_count > 3000, f"Prompt too short: {char_count} chars"
         # With our test data it shouldn't exceed 12k chars (includes table/viz type specs)
-        assert char_count < 12000, f"Prompt too long for test fixture: {char_count} chars"
+        assert char_count < 12000, (
+            f"Prompt too long for test fixture: {char_count} chars"
+        )
 
 
 class TestFormatAsTable:
@@ -1614,7 +1793,11 @@ class TestFormatTier1Conditions:
                         "_duration_days": 1800,
                         "_inferred": True,
                         "_dose_history": [
-                            {"dose": "250 MG", "authoredOn": "2020-01-01", "status": "completed"},
+                            {
+                                "dose": "250 MG",
+                                "authoredOn": "2020-01-01",
+                                "status": "completed",
+                            },
                         ],
                     },
                 ],
@@ -1791,54 +1974,72 @@ class TestBuildPatientSummaryLightning:
 
     def test_includes_patient_orientation(self, full_compiled_summary: dict):
         """Lightning summary includes patient demographics."""
-        result = _build_patient_summary_section(full_compiled_summary, tier=TIER_LIGHTNING)
+        result = _build_patient_summary_section(
+            full_compiled_summary, tier=TIER_LIGHTNING
+        )
         assert "John Smith" in result
         assert "compiled 2026-02-05" in result
 
     def test_includes_active_conditions(self, full_compiled_summary: dict):
         """Lightning summary includes active conditions."""
-        result = _build_patient_summary_section(full_compiled_summary, tier=TIER_LIGHTNING)
+        result = _build_patient_summary_section(
+            full_compiled_summary, tier=TIER_LIGHTNING
+        )
         assert "Type 2 diabetes mellitus" in result
         assert "Essential hypertension" in result
 
     def test_includes_observations(self, full_compiled_summary: dict):
         """Lightning summary includes observations."""
-        result = _build_patient_summary_section(full_compiled_summary, tier=TIER_LIGHTNING)
+        result = _build_patient_summary_section(
+            full_compiled_summary, tier=TIER_LIGHTNING
+        )
         assert "Hemoglobin A1c" in result
         assert "Systolic blood pressure" in result
 
     def test_excludes_encounters(self, full_compiled_summary: dict):
         """Lightning summary excludes Tier 2 encounters."""
-        result = _build_patient_summary_section(full_compiled_summary, tier=TIER_LIGHTNING)
+        result = _build_patient_summary_section(
+            full_compiled_summary, tier=TIER_LIGHTNING
+        )
         assert "Recent Encounters" not in result
         assert "General examination" not in result
 
     def test_excludes_care_plans(self, full_compiled_summary: dict):
         """Lightning summary excludes care plans."""
-        result = _build_patient_summary_section(full_compiled_summary, tier=TIER_LIGHTNING)
+        result = _build_patient_summary_section(
+            full_compiled_summary, tier=TIER_LIGHTNING
+        )
         assert "Standalone Care Plans" not in result
         assert "CarePlan:" not in result
 
     def test_excludes_recently_resolved(self, full_compiled_summary: dict):
         """Lightning summary excludes recently resolved conditions."""
-        result = _build_patient_summary_section(full_compiled_summary, tier=TIER_LIGHTNING)
+        result = _build_patient_summary_section(
+            full_compiled_summary, tier=TIER_LIGHTNING
+        )
         assert "Recently Resolved" not in result
 
     def test_excludes_unlinked_meds(self, full_compiled_summary: dict):
         """Lightning summary excludes unlinked medications."""
-        result = _build_patient_summary_section(full_compiled_summary, tier=TIER_LIGHTNING)
+        result = _build_patient_summary_section(
+            full_compiled_summary, tier=TIER_LIGHTNING
+        )
         assert "not linked to a condition" not in result
 
     def test_includes_profile_when_provided(self, full_compiled_summary: dict):
         """Lightning summary includes patient profile when provided."""
         result = _build_patient_summary_section(
-            full_compiled_summary, patient_profile="Active retired teacher.", tier=TIER_LIGHTNING
+            full_compiled_summary,
+            patient_profile="Active retired teacher.",
+            tier=TIER_LIGHTNING,
         )
         assert "Active retired teacher" in result
 
     def test_shorter_than_full_summary(self, full_compiled_summary: dict):
         """Lightning summary is shorter than the full summary."""
-        lightning = _build_patient_summary_section(full_compiled_summary, tier=TIER_LIGHTNING)
+        lightning = _build_patient_summary_section(
+            full_compiled_summary, tier=TIER_LIGHTNING
+        )
         full = _build_patient_summary_section(full_compiled_summary, tier=TIER_DEEP)
         assert len(lightning) < len(full)
 
@@ -2076,7 +2277,9 @@ class TestBuildSafetySectionLightning:
         assert "Safety Constraints" in result
         assert "ALLERGY: Penicillin" in result
 
-    def test_fabrication_guard_in_persona_not_safety(self, minimal_compiled_summary: dict):
+    def test_fabrication_guard_in_persona_not_safety(
+        self, minimal_compiled_summary: dict
+    ):
         """Fabrication guard moved to _PERSONA; lightning safety section no longer duplicates it."""
         result = _build_safety_section_lightning(minimal_compiled_summary)
         assert "Never fabricate" not in result
@@ -2242,7 +2445,9 @@ class TestGenerateResponseWithQueryProfile:
         """No query_profile → instance defaults used."""
         mock_client = create_mock_openai_client()
         service = AgentService(
-            client=mock_client, reasoning_effort="medium", max_output_tokens=16384,
+            client=mock_client,
+            reasoning_effort="medium",
+            max_output_tokens=16384,
         )
 
         await service.generate_response(
@@ -9,15 +9,17 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from app.config import settings
 from app.services.agent_tools import (
+    TOOL_SCHEMAS,
+    execute_query_patient_data_batch,
     execute_tool,
-    query_patient_data,
     explore_connections,
     get_patient_timeline,
-    TOOL_SCHEMAS,
+    query_patient_data,
+    query_patient_data_many,
 )
 
-
 # =============================================================================
 # Schema tests
 # =============================================================================
@@ -29,7 +31,13 @@ class TestToolSchemas:
 
     def test_tool_names(self):
         names = {t["name"] for t in TOOL_SCHEMAS}
-        assert names == {"query_patient_data", "explore_connections", "get_patient_timeline", "show_clinical_table", "show_clinical_chart"}
+        assert names == {
+            "query_patient_data",
+            "explore_connections",
+            "get_patient_timeline",
+            "show_clinical_table",
+            "show_clinical_chart",
+        }
 
     def test_all_schemas_have_required_fields(self):
         for schema in TOOL_SCHEMAS:
@@ -96,7 +104,7 @@ class TestExecuteTool:
         assert "Unknown tool" in parsed["error"]
 
     @pytest.mark.asyncio
-    async def test_dispatches_query_patient_data(self):
+    async def test_dispatches_query_patient_data(self, hybrid_service):
         db = AsyncMock()
         mock_result = MagicMock()
         mock_result.scalars.return_value.all.return_value = []
@@ -104,16 +112,18 @@ class TestExecuteTool:
 
         result = await execute_tool(
             name="query_patient_data",
-            arguments=json.dumps({
-                "name": "diabetes",
-                "resource_type": None,
-                "status": None,
-                "category": None,
-                "date_from": None,
-                "date_to": None,
-                "include_full_resource": True,
-                "limit": 20,
-            }),
+            arguments=json.dumps(
+                {
+                    "name": "diabetes",
+                    "resource_type": None,
+                    "status": None,
+                    "category": None,
+                    "date_from": None,
+                    "date_to": None,
+                    "include_full_resource": True,
+                    "limit": 20,
+                }
+            ),
             patient_id="p-1",
             graph=AsyncMock(),
             db=db,
@@ -128,12 +138,14 @@ class TestExecuteTool:
 
         result = await execute_tool(
             name="explore_connections",
-            arguments=json.dumps({
-                "fhir_id": "cond-1",
-                "resource_type": "Condition",
-                "include_full_resource": True,
-                "max_per_relationship": 10,
-            }),
+            arguments=json.dumps(
+                {
+                    "fhir_id": "cond-1",
+                    "resource_type": "Condition",
+                    "include_full_resource": True,
+                    "max_per_relationship": 10,
+                }
+            ),
             patient_id="p-1",
             graph=AsyncMock(),
             db=AsyncMock(),
@@ -149,11 +161,13 @@ class TestExecuteTool:
 
         result = await execute_tool(
             name="get_patient_timeline",
-            arguments=json.dumps({
-                "start_date": None,
-                "end_date": None,
-                "include_notes": False,
-            }),
+            arguments=json.dumps(
+                {
+                    "start_date": None,
+                    "end_date": None,
+                    "include_notes": False,
+                }
+            ),
             patient_id="p-1",
             graph=graph,
             db=AsyncMock(),
@@ -163,20 +177,26 @@ class TestExecuteTool:
         assert "No encounters found" in parsed["message"]
 
     @pytest.mark.asyncio
-    @patch("app.services.agent_tools._execute_show_clinical_chart", new_callable=AsyncMock)
+    @patch(
+        "app.services.agent_tools._execute_show_clinical_chart", new_callable=AsyncMock
+    )
     async def test_dispatches_show_clinical_chart(self, mock_chart):
-        mock_chart.return_value = json.dumps({
-            "displayed": True,
-            "message": "Chart displayed: HbA1c Trend (5 data points)",
-        })
+        mock_chart.return_value = json.dumps(
+            {
+                "displayed": True,
+                "message": "Chart displayed: HbA1c Trend (5 data points)",
+            }
+        )
 
         result = await execute_tool(
             name="show_clinical_chart",
-            arguments=json.dumps({
-                "chart_type": "trend_chart",
-                "loinc_codes": ["4548-4"],
-                "time_range": "1y",
-            }),
+            arguments=json.dumps(
+                {
+                    "chart_type": "trend_chart",
+                    "loinc_codes": ["4548-4"],
+                    "time_range": "1y",
+                }
+            ),
             patient_id="p-1",
             graph=AsyncMock(),
             db=AsyncMock(),
@@ -200,43 +220,97 @@ def _make_fhir_row(fhir_id: str, resource_type: str, data: dict) -> MagicMock:
     return row
 
 
+def _hybrid_result(fhir_id: str, resource_type: str = "Condition", **kwargs):
+    """Create a HybridResult for a minimal resource."""
+    from app.services.hybrid_search import HybridResult
+
+    resource = kwargs.pop("resource", {"resourceType": resource_type, "id": fhir_id})
+    return HybridResult(
+        resource=resource,
+        resource_type=resource_type,
+        fhir_id=fhir_id,
+        score=kwargs.pop("score", 0.0325),
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def hybrid_service():
+    """Patch HybridSearchService and the query embedding."""
+    service = MagicMock()
+    service.search_many = AsyncMock(return_value=[[]])
+    embedder = MagicMock()
+    embedder.embed_texts = AsyncMock(
+        side_effect=lambda texts: [[0.1] * 3 for _ in texts]
+    )
+    embedder.close = AsyncMock()
+    with (
+        patch(
+            "app.services.agent_tools.HybridSearchService", return_value=service
+        ) as cls,
+        patch("app.services.embeddings.EmbeddingService", return_value=embedder),
+        patch.object(settings, "embedding_cache_enabled", False),
+    ):
+        service.cls = cls
+        service.embedder = embedder
+        yield service
+
+
 class TestQueryPatientData:
     @pytest.mark.asyncio
-    async def test_returns_exact_results(self):
+    async def test_name_runs_hybrid_search(self, hybrid_service):
+        hybrid_service.search_many.return_value = [
+            [
+                _hybrid_result(
+                    "cond-1",
+                    resource={
+                        "resourceType": "Condition",
+                        "id": "cond-1",
+                        "code": {
+                            "coding": [{"display": "Diabetes", "code": "44054006"}]
+                        },
+                    },
+                    lexical_rank=1,
+                    similarity=0.8123,
+                )
+            ]
+        ]
         db = AsyncMock()
-        row = _make_fhir_row("cond-1", "Condition", {
-            "resourceType": "Condition",
-            "id": "cond-1",
-            "code": {"coding": [{"display": "Diabetes", "code": "44054006"}]},
-            "clinicalStatus": {"coding": [{"code": "active"}]},
-        })
-        mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = [row]
-        db.execute.return_value = mock_result
 
         result = await query_patient_data(
             patient_id="p-1",
             db=db,
             graph=AsyncMock(),
             name="diabetes",
+            resource_type="Condition",
+            status="active",
         )
         parsed = json.loads(result)
         assert parsed["total"] == 1
         assert parsed["exact_count"] == 1
-        assert parsed["results"][0]["source"] == "exact"
-        assert parsed["results"][0]["fhir_id"] == "cond-1"
-        assert parsed["results"][0]["resource"]["id"] == "cond-1"
+        assert parsed["semantic_count"] == 1
+        entry = parsed["results"][0]
+        assert entry["source"] == "hybrid"
+        assert entry["fhir_id"] == "cond-1"
+        assert entry["matched"] == ["lexical", "semantic"]
+        assert entry["relevance_score"] == 0.0325
+        assert entry["similarity_score"] == 0.812
+        assert entry["resource"]["id"] == "cond-1"
+
+        # One fused query, no separate exact query
+        db.execute.assert_not_called()
+        (query,) = hybrid_service.search_many.await_args.args[1]
+        assert query.text == "diabetes"
+        assert query.embedding == [0.1] * 3
+        assert query.resource_type == "Condition"
+        assert query.status == "active"
+        assert query.limit == 20
 
     @pytest.mark.asyncio
-    async def test_no_results_returns_message(self):
-        db = AsyncMock()
-        mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = []
-        db.execute.return_value = mock_result
-
+    async def test_no_results_returns_message(self, hybrid_service):
         result = await query_patient_data(
             patient_id="p-1",
-            db=db,
+            db=AsyncMock(),
             graph=AsyncMock(),
             name="nonexistent",
         )
@@ -245,78 +319,103 @@ class TestQueryPatientData:
         assert "No results found" in parsed["message"]
 
     @pytest.mark.asyncio
-    @patch("app.services.agent_tools._query_semantic", new_callable=AsyncMock)
-    async def test_triggers_semantic_fallback_when_few_exact(self, mock_semantic):
-        """When <3 exact results and name is provided, triggers pgvector fallback."""
-        db = AsyncMock()
-        # Return 1 exact result (below threshold of 3)
-        row = _make_fhir_row("cond-1", "Condition", {
-            "resourceType": "Condition",
-            "id": "cond-1",
-            "code": {"coding": [{"display": "Type 2 diabetes"}]},
-        })
-        mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = [row]
-        db.execute.return_value = mock_result
-
-        # Semantic search returns additional results
-        mock_semantic.return_value = [
-            {
-                "source": "semantic",
-                "fhir_id": "obs-1",
-                "resource_type": "Observation",
-                "similarity_score": 0.75,
-                "resource": {"resourceType": "Observation", "id": "obs-1"},
-            }
+    async def test_embedding_failure_searches_lexically(self, hybrid_service):
+        hybrid_service.embedder.embed_texts.side_effect = RuntimeError("API down")
+        hybrid_service.search_many.return_value = [
+            [_hybrid_result("cond-1", lexical_rank=1)]
         ]
 
         result = await query_patient_data(
             patient_id="p-1",
-            db=db,
+            db=AsyncMock(),
             graph=AsyncMock(),
             name="diabetes",
         )
         parsed = json.loads(result)
-        assert parsed["total"] == 2
+        assert parsed["total"] == 1
         assert parsed["exact_count"] == 1
-        assert parsed["semantic_count"] == 1
-        assert parsed["results"][1]["source"] == "semantic"
-        mock_semantic.assert_called_once()
+        assert parsed["semantic_count"] == 0
+        assert parsed["results"][0]["matched"] == ["lexical"]
+        (query,) = hybrid_service.search_many.await_args.args[1]
+        assert query.embedding is None
 
     @pytest.mark.asyncio
-    @patch("app.services.agent_tools._query_semantic", new_callable=AsyncMock)
-    async def test_no_semantic_fallback_when_enough_exact(self, mock_semantic):
-        """When >=3 exact results, no semantic fallback."""
+    async def test_cache_failure_rolls_back_to_savepoint(self, hybrid_service):
+        savepoint = MagicMock()
+        savepoint.__aenter__ = AsyncMock()
+        savepoint.__aexit__ = AsyncMock(return_value=False)
         db = AsyncMock()
-        rows = [
-            _make_fhir_row(f"r-{i}", "Condition", {
-                "resourceType": "Condition", "id": f"r-{i}",
-                "code": {"coding": [{"display": f"Condition {i}"}]},
-            })
-            for i in range(3)
+        db.begin_nested = MagicMock(return_value=savepoint)
+
+        with (
+            patch.object(settings, "embedding_cache_enabled", True),
+            patch(
+                "app.services.embedding_cache.embed_texts_cached",
+                AsyncMock(side_effect=RuntimeError("duplicate key")),
+            ),
+        ):
+            result = await query_patient_data(
+                patient_id="p-1", db=db, graph=AsyncMock(), name="diabetes"
+            )
+
+        assert json.loads(result)["total"] == 0
+        # The savepoint saw the error, so only the cache work is rolled back
+        exc_type = savepoint.__aexit__.await_args.args[0]
+        assert exc_type is RuntimeError
+        (query,) = hybrid_service.search_many.await_args.args[1]
+        assert query.embedding is None
+
+    @pytest.mark.asyncio
+    async def test_note_passage_replaces_note(self, hybrid_service):
+        note = {
+            "resourceType": "DocumentReference",
+            "id": "doc-1",
+            "type": {"coding": [{"display": "Progress note"}]},
+            "date": "2024-01-15T10:00:00Z",
+        }
+        hybrid_service.search_many.return_value = [
+            [
+                _hybrid_result(
+                    "doc-1",
+                    "DocumentReference",
+                    resource=note,
+                    passage="Chest pain resolved with rest.",
+                    passage_similarity=0.7,
+                )
+            ]
         ]
-        mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = rows
-        db.execute.return_value = mock_result
 
         result = await query_patient_data(
             patient_id="p-1",
-            db=db,
+            db=AsyncMock(),
             graph=AsyncMock(),
-            name="condition",
+            name="angina",
         )
         parsed = json.loads(result)
-        assert parsed["total"] == 3
-        assert parsed["exact_count"] == 3
-        mock_semantic.assert_not_called()
+        assert parsed["exact_count"] == 0
+        assert parsed["semantic_count"] == 1
+        entry = parsed["results"][0]
+        assert entry["matched"] == ["passage"]
+        assert entry["passage"] == "Chest pain resolved with rest."
+        assert entry["note_type"] == "Progress note"
+        assert entry["date"] == "2024-01-15"
+        assert "resource" not in entry
 
     @pytest.mark.asyncio
-    @patch("app.services.agent_tools._query_semantic", new_callable=AsyncMock)
-    async def test_no_semantic_fallback_when_no_name(self, mock_semantic):
-        """When no name provided, no semantic fallback even with 0 results."""
+    async def test_no_name_runs_filter_query(self, hybrid_service):
+        """Without a name, only the attribute filters are queried."""
         db = AsyncMock()
+        row = _make_fhir_row(
+            "cond-1",
+            "Condition",
+            {
+                "resourceType": "Condition",
+                "id": "cond-1",
+                "clinicalStatus": {"coding": [{"code": "active"}]},
+            },
+        )
         mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = []
+        mock_result.scalars.return_value.all.return_value = [row]
         db.execute.return_value = mock_result
 
         result = await query_patient_data(
@@ -324,26 +423,26 @@ class TestQueryPatientData:
             db=db,
             graph=AsyncMock(),
             resource_type="Condition",
+            status="active",
         )
         parsed = json.loads(result)
-        assert parsed["total"] == 0
-        mock_semantic.assert_not_called()
+        assert parsed["total"] == 1
+        assert parsed["exact_count"] == 1
+        assert parsed["semantic_count"] == 0
+        assert parsed["results"][0]["source"] == "exact"
+        assert parsed["results"][0]["resource"]["id"] == "cond-1"
+        hybrid_service.search_many.assert_not_called()
+        hybrid_service.embedder.embed_texts.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_include_full_resource_false(self):
-        db = AsyncMock()
-        row = _make_fhir_row("cond-1", "Condition", {
-            "resourceType": "Condition",
-            "id": "cond-1",
-            "code": {"coding": [{"display": "Hypertension"}]},
-        })
-        mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = [row]
-        db.execute.return_value = mock_result
+    async def test_include_full_resource_false(self, hybrid_service):
+        hybrid_service.search_many.return_value = [
+            [_hybrid_result("cond-1", lexical_rank=1)]
+        ]
 
         result = await query_patient_data(
             patient_id="p-1",
-            db=db,
+            db=AsyncMock(),
             graph=AsyncMock(),
             name="hypertension",
             include_full_resource=False,
@@ -352,7 +451,20 @@ class TestQueryPatientData:
         assert "resource" not in parsed["results"][0]
 
     @pytest.mark.asyncio
-    async def test_error_handling(self):
+    async def test_error_handling(self, hybrid_service):
+        hybrid_service.search_many.side_effect = Exception("db error")
+
+        result = await query_patient_data(
+            patient_id="p-1",
+            db=AsyncMock(),
+            graph=AsyncMock(),
+            name="test",
+        )
+        parsed = json.loads(result)
+        assert "error" in parsed
+
+    @pytest.mark.asyncio
+    async def test_filter_query_error_handling(self):
         db = AsyncMock()
         db.execute.side_effect = Exception("db error")
 
@@ -360,12 +472,117 @@ class TestQueryPatientData:
             patient_id="p-1",
             db=db,
             graph=AsyncMock(),
-            name="test",
+            resource_type="Condition",
         )
         parsed = json.loads(result)
         assert "error" in parsed
 
 
+class TestQueryPatientDataMany:
+    """Coalesced query_patient_data calls from one tool round."""
+
+    def _db(self, rows: list) -> AsyncMock:
+        db = AsyncMock()
+        mock_result = MagicMock()
+        mock_result.scalars.return_value.all.return_value = rows
+        db.execute.return_value = mock_result
+        return db
+
+    @pytest.mark.asyncio
+    async def test_one_embed_and_one_search_for_all_names(self, hybrid_service):
+        """Names are embedded in one request and searched in one statement."""
+        hybrid_service.search_many.return_value = [
+            [_hybrid_result("c-1", lexical_rank=1)],
+            [_hybrid_result("c-2", similarity=0.7)],
+            [],
+        ]
+
+        results = await query_patient_data_many(
+            "p-1",
+            self._db([]),
+            AsyncMock(),
+            [
+                {"name": "diabetes"},
+                {"name": "statin", "resource_type": "Condition", "limit": 500},
+                {"name": "diabetes", "resource_type": "MedicationRequest"},
+            ],
+        )
+
+        hybrid_service.embedder.embed_texts.assert_awaited_once_with(
+            ["diabetes", "statin"]
+        )
+        hybrid_service.search_many.assert_awaited_once()
+        queries = hybrid_service.search_many.await_args.args[1]
+        assert [q.text for q in queries] == ["diabetes", "statin", "diabetes"]
+        assert queries[1].resource_type == "Condition"
+        assert queries[1].limit == 100
+        parsed = [json.loads(r) for r in results]
+        assert [r["fhir_id"] for r in parsed[0]["results"]] == ["c-1"]
+        assert [r["fhir_id"] for r in parsed[1]["results"]] == ["c-2"]
+        assert parsed[2]["total"] == 0
+
+    @pytest.mark.asyncio
+    async def test_calls_without_name_skip_hybrid_search(self, hybrid_service):
+        row = _make_fhir_row(
+            "cond-1",
+            "Condition",
+            {
+                "resourceType": "Condition",
+                "id": "cond-1",
+            },
+        )
+        hybrid_service.search_many.return_value = [
+            [_hybrid_result("obs-1", "Observation", lexical_rank=1)]
+        ]
+
+        results = await query_patient_data_many(
+            "p-1",
+            self._db([row]),
+            AsyncMock(),
+            [{"resource_type": "Condition"}, {"name": "a1c", "limit": 5}],
+        )
+
+        (query,) = hybrid_service.search_many.await_args.args[1]
+        assert query.text == "a1c"
+        first, second = (json.loads(r) for r in results)
+        assert first["results"][0]["source"] == "exact"
+        assert second["results"][0]["fhir_id"] == "obs-1"
+
+    @pytest.mark.asyncio
+    async def test_searches_are_batched(self, hybrid_service):
+        from app.services.vector_search import MAX_BATCH_QUERIES
+
+        hybrid_service.search_many.side_effect = lambda pid, queries: [
+            [] for _ in queries
+        ]
+        queries = [{"name": f"term {i}"} for i in range(MAX_BATCH_QUERIES + 1)]
+
+        results = await query_patient_data_many(
+            "p-1", self._db([]), AsyncMock(), queries
+        )
+
+        assert hybrid_service.search_many.await_count == 2
+        assert len(results) == MAX_BATCH_QUERIES + 1
+
+    @pytest.mark.asyncio
+    @patch("app.services.agent_tools.query_patient_data_many", new_callable=AsyncMock)
+    async def test_batch_executor_parses_arguments(self, mock_many):
+        mock_many.return_value = ["a", "b"]
+
+        results = await execute_query_patient_data_batch(
+            ['{"name": "diabetes"}', '{"name": "a1c", "limit": 5}'],
+            patient_id="p-1",
+            graph=AsyncMock(),
+            db=AsyncMock(),
+        )
+
+        assert results == ["a", "b"]
+        queries = mock_many.await_args.args[3]
+        assert queries[0]["name"] == "diabetes"
+        assert queries[1]["limit"] == 5
+        assert queries[0]["include_full_resource"] is True
+
+
 # =============================================================================
 # explore_connections tests
 # =============================================================================
@@ -428,8 +645,7 @@ class TestExploreConnections:
         """Test that max_per_relationship limits results per edge type."""
         mock_compile.return_value = {
             "RECORDED": [
-                {"resourceType": "Observation", "id": f"obs-{i}"}
-                for i in range(20)
+                {"resourceType": "Observation", "id": f"obs-{i}"} for i in range(20)
             ],
         }
 
@@ -528,47 +744,55 @@ class TestGetPatientTimeline:
                 "period_end": "2024-01-15T09:30:00Z",
             },
         ]
-        graph.get_encounter_events.return_value = {
-            "conditions": [
-                {
-                    "resourceType": "Condition",
-                    "id": "cond-1",
-                    "code": {"coding": [{"display": "Hypertension"}]},
-                    "clinicalStatus": {"coding": [{"code": "active"}]},
-                }
-            ],
-            "medications": [],
-            "observations": [],
-            "procedures": [],
-            "diagnostic_reports": [],
-            "immunizations": [],
-            "care_plans": [],
-            "document_references": [],
-            "imaging_studies": [],
-            "care_teams": [],
-            "medication_administrations": [],
+        graph.get_encounter_events_batch.return_value = {
+            "enc-1": {
+                "conditions": [
+                    {
+                        "resourceType": "Condition",
+                        "id": "cond-1",
+                        "code": {"coding": [{"display": "Hypertension"}]},
+                        "clinicalStatus": {"coding": [{"code": "active"}]},
+                    }
+                ],
+                "medications": [],
+                "observations": [],
+                "procedures": [],
+                "diagnostic_reports": [],
+                "immunizations": [],
+                "care_plans": [],
+                "document_references": [],
+                "imaging_studies": [],
+                "care_teams": [],
+                "medication_administrations": [],
+            },
         }
 
         # Mock db for batch fetch of encounter and event resources
         db = AsyncMock()
         enc_result = MagicMock()
         enc_result.all.return_value = [
-            MagicMock(fhir_id="enc-1", data={
-                "resourceType": "Encounter",
-                "id": "enc-1",
-                "type": [{"coding": [{"display": "Outpatient visit"}]}],
-                "period": {"start": "2024-01-15T09:00:00Z"},
-            }),
+            MagicMock(
+                fhir_id="enc-1",
+                data={
+                    "resourceType": "Encounter",
+                    "id": "enc-1",
+                    "type": [{"coding": [{"display": "Outpatient visit"}]}],
+                    "period": {"start": "2024-01-15T09:00:00Z"},
+                },
+            ),
         ]
 
         event_result = MagicMock()
         event_result.all.return_value = [
-            MagicMock(fhir_id="cond-1", data={
-                "resourceType": "Condition",
-                "id": "cond-1",
-                "code": {"coding": [{"display": "Hypertension"}]},
-                "clinicalStatus": {"coding": [{"code": "active"}]},
-            }),
+            MagicMock(
+                fhir_id="cond-1",
+                data={
+                    "resourceType": "Condition",
+                    "id": "cond-1",
+                    "code": {"coding": [{"display": "Hypertension"}]},
+                    "clinicalStatus": {"coding": [{"code": "active"}]},
+                },
+            ),
         ]
 
         db.execute.side_effect = [enc_result, event_result]
@@ -598,7 +822,9 @@ class TestGetPatientTimeline:
         graph.get_patient_encounters.return_value = []
 
         result = await get_patient_timeline(
-            "p-1", graph, AsyncMock(),
+            "p-1",
+            graph,
+            AsyncMock(),
             start_date="2024-01-01",
             end_date="2024-12-31",
         )
@@ -617,24 +843,26 @@ class TestGetPatientTimeline:
                 "period_end": "2024-01-15T10:00:00Z",
             },
         ]
-        graph.get_encounter_events.return_value = {
-            "conditions": [],
-            "medications": [],
-            "observations": [],
-            "procedures": [],
-            "diagnostic_reports": [],
-            "immunizations": [],
-            "care_plans": [],
-            "document_references": [
-                {
-                    "resourceType": "DocumentReference",
-                    "id": "doc-1",
-                    "type": {"coding": [{"display": "Clinical Note"}]},
-                }
-            ],
-            "imaging_studies": [],
-            "care_teams": [],
-            "medication_administrations": [],
+        graph.get_encounter_events_batch.return_value = {
+            "enc-1": {
+                "conditions": [],
+                "medications": [],
+                "observations": [],
+                "procedures": [],
+                "diagnostic_reports": [],
+                "immunizations": [],
+                "care_plans": [],
+                "document_references": [
+                    {
+                        "resourceType": "DocumentReference",
+                        "id": "doc-1",
+                        "type": {"coding": [{"display": "Clinical Note"}]},
+                    }
+                ],
+                "imaging_studies": [],
+                "care_teams": [],
+                "medication_administrations": [],
+            },
         }
 
         db = AsyncMock()
@@ -645,7 +873,10 @@ class TestGetPatientTimeline:
         db.execute.side_effect = [enc_result, event_result]
 
         result = await get_patient_timeline(
-            "p-1", graph, db, include_notes=False,
+            "p-1",
+            graph,
+            db,
+            include_notes=False,
         )
         parsed = json.loads(result)
         enc = parsed["encounters"][0]
@@ -662,7 +893,68 @@ class TestGetPatientTimeline:
                 "period_end": "2024-01-15T10:00:00Z",
             },
         ]
-        graph.get_encounter_events.return_value = {
+        graph.get_encounter_events_batch.return_value = {
+            "enc-1": {
+                "conditions": [],
+                "medications": [],
+                "observations": [],
+                "procedures": [],
+                "diagnostic_reports": [],
+                "immunizations": [],
+                "care_plans": [],
+                "document_references": [
+                    {
+                        "resourceType": "DocumentReference",
+                        "id": "doc-1",
+                        "type": {"coding": [{"display": "Clinical Note"}]},
+                    }
+                ],
+                "imaging_studies": [],
+                "care_teams": [],
+                "medication_administrations": [],
+            },
+        }
+
+        db = AsyncMock()
+        enc_result = MagicMock()
+        enc_result.all.return_value = []
+        event_result = MagicMock()
+        event_result.all.return_value = [
+            MagicMock(
+                fhir_id="doc-1",
+                data={
+                    "resourceType": "DocumentReference",
+                    "id": "doc-1",
+                    "type": {"coding": [{"display": "Clinical Note"}]},
+                },
+            ),
+        ]
+        db.execute.side_effect = [enc_result, event_result]
+
+        result = await get_patient_timeline(
+            "p-1",
+            graph,
+            db,
+            include_notes=True,
+        )
+        parsed = json.loads(result)
+        enc = parsed["encounters"][0]
+        assert "document_references" in enc["events"]
+        assert len(enc["events"]["document_references"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_batches_events_across_encounters(self):
+        """Events for all encounters come from one graph call and one event query."""
+        graph = AsyncMock()
+        graph.get_patient_encounters.return_value = [
+            {
+                "fhir_id": f"enc-{i}",
+                "type_display": "Visit",
+                "period_start": f"2024-0{i}-01T09:00:00Z",
+            }
+            for i in (1, 2, 3)
+        ]
+        empty = {
             "conditions": [],
             "medications": [],
             "observations": [],
@@ -670,38 +962,39 @@ class TestGetPatientTimeline:
             "diagnostic_reports": [],
             "immunizations": [],
             "care_plans": [],
-            "document_references": [
-                {
-                    "resourceType": "DocumentReference",
-                    "id": "doc-1",
-                    "type": {"coding": [{"display": "Clinical Note"}]},
-                }
-            ],
+            "document_references": [],
             "imaging_studies": [],
             "care_teams": [],
             "medication_administrations": [],
         }
+        graph.get_encounter_events_batch.return_value = {
+            f"enc-{i}": {
+                **empty,
+                "observations": [{"resourceType": "Observation", "id": f"obs-{i}"}],
+            }
+            for i in (1, 2, 3)
+        }
 
         db = AsyncMock()
         enc_result = MagicMock()
         enc_result.all.return_value = []
         event_result = MagicMock()
-        event_result.all.return_value = [
-            MagicMock(fhir_id="doc-1", data={
-                "resourceType": "DocumentReference",
-                "id": "doc-1",
-                "type": {"coding": [{"display": "Clinical Note"}]},
-            }),
-        ]
+        event_result.all.return_value = []
         db.execute.side_effect = [enc_result, event_result]
 
-        result = await get_patient_timeline(
-            "p-1", graph, db, include_notes=True,
-        )
+        result = await get_patient_timeline("p-1", graph, db)
         parsed = json.loads(result)
-        enc = parsed["encounters"][0]
-        assert "document_references" in enc["events"]
-        assert len(enc["events"]["document_references"]) == 1
+
+        assert parsed["total"] == 3
+        graph.get_encounter_events_batch.assert_awaited_once_with(
+            "p-1", ["enc-1", "enc-2", "enc-3"]
+        )
+        assert db.execute.await_count == 2
+        assert [e["events"]["observations"][0]["id"] for e in parsed["encounters"]] == [
+            "obs-1",
+            "obs-2",
+            "obs-3",
+        ]
 
     @pytest.mark.asyncio
     async def test_error_handling(self):
@@ -0,0 +1,142 @@
+"""Tests for incremental FHIR Bundle parsing."""
+
+import io
+import json
+
+import pytest
+
+from app.services.bundle_stream import (
+    BundleStreamParser,
+    aiter_bundle_entries,
+    aiter_bundle_file,
+    iter_bundle_entries,
+)
+
+
+def _bundle(count: int = 50) -> dict:
+    """Build a bundle with a Patient followed by Observations."""
+    entries = [
+        {
+            "fullUrl": "urn:uuid:patient-1",
+            "resource": {
+                "resourceType": "Patient",
+                "id": "patient-1",
+                "name": [{"family": "Müller", "given": ["José"]}],
+            },
+        }
+    ]
+    for i in range(count):
+        entries.append(
+            {
+                "resource": {
+                    "resourceType": "Observation",
+                    "id": f"obs-{i}",
+                    "valueQuantity": {"value": i * 1.5, "unit": "mg/dL"},
+                }
+            }
+        )
+    return {"resourceType": "Bundle", "type": "collection", "entry": entries}
+
+
+class TestBundleStreamParser:
+    """Tests for the push parser."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+    def test_entries_survive_any_chunk_boundary(self, chunk_size):
+        """Entries should decode identically however the input is split."""
+        bundle = _bundle()
+        data = json.dumps(bundle, indent=2).encode("utf-8")
+
+        entries = list(iter_bundle_entries(io.BytesIO(data), chunk_size=chunk_size))
+
+        assert entries == bundle["entry"]
+
+    def test_collects_header_members(self):
+        """Top-level members before and after entry are kept in header."""
+        bundle = _bundle(2)
+        bundle["total"] = 3
+        parser = BundleStreamParser()
+
+        entries = parser.feed(json.dumps(bundle)) + parser.close()
+
+        assert len(entries) == 3
+        assert parser.header == {
+            "resourceType": "Bundle",
+            "type": "collection",
+            "total": 3,
+        }
+
+    def test_yields_entries_before_input_ends(self):
+        """Completed entries are returned without waiting for the end."""
+        data = json.dumps(_bundle(10))
+        parser = BundleStreamParser()
+
+        first = parser.feed(data[: len(data) // 2])
+
+        assert 0 < len(first) < 11
+
+    def test_rejects_non_bundle(self):
+        """A resourceType other than Bundle is rejected as soon as it is read."""
+        parser = BundleStreamParser()
+        with pytest.raises(ValueError, match="resourceType must be 'Bundle'"):
+            parser.feed('{"resourceType": "Patient", "id": "x"}')
+
+    def test_rejects_missing_resource_type(self):
+        """A document without resourceType is rejected at close."""
+        parser = BundleStreamParser()
+        parser.feed('{"entry": []}')
+        with pytest.raises(ValueError, match="resourceType must be 'Bundle'"):
+            parser.close()
+
+    def test_rejects_truncated_json(self):
+        """Input that ends mid-document raises at close."""
+        data = json.dumps(_bundle(3))
+        parser = BundleStreamParser()
+        parser.feed(data[:-10])
+        with pytest.raises(ValueError):
+            parser.close()
+
+    def test_rejects_non_object(self):
+        """The document must be a JSON object."""
+        with pytest.raises(ValueError, match="expected a JSON object"):
+            BundleStreamParser().feed("[1, 2]")
+
+    def test_rejects_non_array_entry(self):
+        """entry must be an array."""
+        with pytest.raises(ValueError, match="entry must be an array"):
+            BundleStreamParser().feed('{"resourceType": "Bundle", "entry": {}}')
+
+    def test_rejects_trailing_data(self):
+        """Only whitespace may follow the Bundle object."""
+        parser = BundleStreamParser()
+        with pytest.raises(ValueError, match="trailing data"):
+            parser.feed('{"resourceType": "Bundle", "entry": []} {}')
+
+
+class TestAsyncIteration:
+    """Tests for the async entry iterators."""
+
+    @pytest.mark.asyncio
+    async def test_aiter_bundle_entries(self):
+        """Async byte chunks yield the same entries."""
+        bundle = _bundle(20)
+        data = json.dumps(bundle).encode("utf-8")
+
+        async def chunks():
+            for i in range(0, len(data), 100):
+                yield data[i : i + 100]
+
+        entries = [entry async for entry in aiter_bundle_entries(chunks())]
+
+        assert entries == bundle["entry"]
+
+    @pytest.mark.asyncio
+    async def test_aiter_bundle_file(self, tmp_path):
+        """Entries stream from a file on disk."""
+        bundle = _bundle(20)
+        path = tmp_path / "bundle.json"
+        path.write_text(json.dumps(bundle))
+
+        entries = [entry async for entry in aiter_bundle_file(path, chunk_size=256)]
+
+        assert entries == bundle["entry"]
@@ -20,8 +20,7 @@ from unittest.mock import AsyncMock, MagicMock
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import FhirResource
-from app.services.graph import KnowledgeGraph
+from app.models import FhirResource, PatientSummary
 from app.services.compiler import (
     OBSERVATION_CATEGORIES,
     TREND_THRESHOLD,  # noqa: F401 — used by TestComputeTrend for threshold assertions
@@ -37,6 +36,7 @@ from app.services.compiler import (
     compile_node_context,
     compile_patient_summary,
     compute_dose_history,
+    compute_dose_history_batch,
     compute_medication_recency,
     compute_observation_trends,
     fetch_resources_by_fhir_ids,
@@ -45,7 +45,7 @@ from app.services.compiler import (
     infer_medication_condition_links,
     prune_and_enrich,
 )
-
+from app.services.graph import KnowledgeGraph
 
 # =============================================================================
 # Helper factories
@@ -66,7 +66,9 @@ def make_observation(
         "resourceType": "Observation",
         "id": fhir_id or f"obs-{loinc_code}-{effective_dt}",
         "code": {
-            "coding": [{"system": "http://loinc.org", "code": loinc_code, "display": display}],
+            "coding": [
+                {"system": "http://loinc.org", "code": loinc_code, "display": display}
+            ],
         },
         "category": [
             {
@@ -94,21 +96,29 @@ class TestGetLatestObservationsByCategory:
     """Tests for fetching latest observations grouped by LOINC + category."""
 
     @pytest.mark.asyncio
-    async def test_returns_latest_per_loinc_per_category(self, db_session: AsyncSession):
+    async def test_returns_latest_per_loinc_per_category(
+        self, db_session: AsyncSession
+    ):
         """Should return only the most recent observation per LOINC code per category."""
         patient_id = uuid.uuid4()
 
         # Two glucose observations — only the latest should appear
-        older_glucose = make_observation("2345-7", "laboratory", "2024-01-01T10:00:00Z", 95.0)
-        newer_glucose = make_observation("2345-7", "laboratory", "2024-06-15T10:00:00Z", 110.0)
+        older_glucose = make_observation(
+            "2345-7", "laboratory", "2024-01-01T10:00:00Z", 95.0
+        )
+        newer_glucose = make_observation(
+            "2345-7", "laboratory", "2024-06-15T10:00:00Z", 110.0
+        )
 
         for obs in [older_glucose, newer_glucose]:
-            db_session.add(FhirResource(
-                fhir_id=obs["id"],
-                resource_type="Observation",
-                patient_id=patient_id,
-                data=obs,
-            ))
+            db_session.add(
+                FhirResource(
+                    fhir_id=obs["id"],
+                    resource_type="Observation",
+                    patient_id=patient_id,
+                    data=obs,
+                )
+            )
         await db_session.flush()
 
         result = await get_latest_observations_by_category(db_session, patient_id)
@@ -121,18 +131,24 @@ class TestGetLatestObservationsByCategory:
         """Should group observations into the correct categories."""
         patient_id = uuid.uuid4()
 
-        vitals_obs = make_observation("8867-4", "vital-signs", "2024-06-01T10:00:00Z", 72.0)
+        vitals_obs = make_observation(
+            "8867-4", "vital-signs", "2024-06-01T10:00:00Z", 72.0
+        )
         lab_obs = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 95.0)
         survey_obs = make_observation("44249-1", "survey", "2024-06-01T10:00:00Z", 5.0)
-        social_obs = make_observation("72166-2", "social-history", "2024-06-01T10:00:00Z")
+        social_obs = make_observation(
+            "72166-2", "social-history", "2024-06-01T10:00:00Z"
+        )
 
         for obs in [vitals_obs, lab_obs, survey_obs, social_obs]:
-            db_session.add(FhirResource(
-                fhir_id=obs["id"],
-                resource_type="Observation",
-                patient_id=patient_id,
-                data=obs,
-            ))
+            db_session.add(
+                FhirResource(
+                    fhir_id=obs["id"],
+                    resource_type="Observation",
+                    patient_id=patient_id,
+                    data=obs,
+                )
+            )
         await db_session.flush()
 
         result = await get_latest_observations_by_category(db_session, patient_id)
@@ -147,13 +163,17 @@ class TestGetLatestObservationsByCategory:
         """Observations with categories outside the known set should be excluded."""
         patient_id = uuid.uuid4()
 
-        unknown_obs = make_observation("12345-6", "imaging", "2024-06-01T10:00:00Z", 1.0)
-        db_session.add(FhirResource(
-            fhir_id=unknown_obs["id"],
-            resource_type="Observation",
-            patient_id=patient_id,
-            data=unknown_obs,
-        ))
+        unknown_obs = make_observation(
+            "12345-6", "imaging", "2024-06-01T10:00:00Z", 1.0
+        )
+        db_session.add(
+            FhirResource(
+                fhir_id=unknown_obs["id"],
+                resource_type="Observation",
+                patient_id=patient_id,
+                data=unknown_obs,
+            )
+        )
         await db_session.flush()
 
         result = await get_latest_observations_by_category(db_session, patient_id)
@@ -170,18 +190,22 @@ class TestGetLatestObservationsByCategory:
         obs_a = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 95.0)
         obs_b = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 200.0)
 
-        db_session.add(FhirResource(
-            fhir_id=obs_a["id"],
-            resource_type="Observation",
-            patient_id=patient_a,
-            data=obs_a,
-        ))
-        db_session.add(FhirResource(
-            fhir_id=obs_b["id"],
-            resource_type="Observation",
-            patient_id=patient_b,
-            data=obs_b,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id=obs_a["id"],
+                resource_type="Observation",
+                patient_id=patient_a,
+                data=obs_a,
+            )
+        )
+        db_session.add(
+            FhirResource(
+                fhir_id=obs_b["id"],
+                resource_type="Observation",
+                patient_id=patient_b,
+                data=obs_b,
+            )
+        )
         await db_session.flush()
 
         result = await get_latest_observations_by_category(db_session, patient_a)
@@ -195,12 +219,14 @@ class TestGetLatestObservationsByCategory:
         patient_id = uuid.uuid4()
 
         obs = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 95.0)
-        db_session.add(FhirResource(
-            fhir_id=obs["id"],
-            resource_type="Observation",
-            patient_id=patient_id,
-            data=obs,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id=obs["id"],
+                resource_type="Observation",
+                patient_id=patient_id,
+                data=obs,
+            )
+        )
         await db_session.flush()
 
         result = await get_latest_observations_by_category(db_session, str(patient_id))
@@ -223,15 +249,19 @@ class TestGetLatestObservationsByCategory:
         patient_id = uuid.uuid4()
 
         glucose = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 95.0)
-        creatinine = make_observation("2160-0", "laboratory", "2024-06-01T10:00:00Z", 1.2)
+        creatinine = make_observation(
+            "2160-0", "laboratory", "2024-06-01T10:00:00Z", 1.2
+        )
 
         for obs in [glucose, creatinine]:
-            db_session.add(FhirResource(
-                fhir_id=obs["id"],
-                resource_type="Observation",
-                patient_id=patient_id,
-                data=obs,
-            ))
+            db_session.add(
+                FhirResource(
+                    fhir_id=obs["id"],
+                    resource_type="Observation",
+                    patient_id=patient_id,
+                    data=obs,
+                )
+            )
         await db_session.flush()
 
         result = await get_latest_observations_by_category(db_session, patient_id)
@@ -244,12 +274,14 @@ class TestGetLatestObservationsByCategory:
         patient_id = uuid.uuid4()
 
         obs = make_observation("72166-2", "social-history", "2024-06-01T10:00:00Z")
-        db_session.add(FhirResource(
-            fhir_id=obs["id"],
-            resource_type="Observation",
-            patient_id=patient_id,
-            data=obs,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id=obs["id"],
+                resource_type="Observation",
+                patient_id=patient_id,
+                data=obs,
+            )
+        )
         await db_session.flush()
 
         result = await get_latest_observations_by_category(db_session, patient_id)
@@ -272,17 +304,23 @@ class TestComputeObservationTrends:
         patient_id = uuid.uuid4()
 
         # Previous observation in the DB
-        prev_obs = make_observation("2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0)
-        db_session.add(FhirResource(
-            fhir_id=prev_obs["id"],
-            resource_type="Observation",
-            patient_id=patient_id,
-            data=prev_obs,
-        ))
+        prev_obs = make_observation(
+            "2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0
+        )
+        db_session.add(
+            FhirResource(
+                fhir_id=prev_obs["id"],
+                resource_type="Observation",
+                patient_id=patient_id,
+                data=prev_obs,
+            )
+        )
         await db_session.flush()
 
         # Current observation to compute trend for
-        current_obs = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 120.0)
+        current_obs = make_observation(
+            "2345-7", "laboratory", "2024-06-01T10:00:00Z", 120.0
+        )
 
         result = await compute_observation_trends(db_session, patient_id, [current_obs])
 
@@ -298,16 +336,22 @@ class TestComputeObservationTrends:
         """Should detect a falling trend when current < previous by more than 5%."""
         patient_id = uuid.uuid4()
 
-        prev_obs = make_observation("2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0)
-        db_session.add(FhirResource(
-            fhir_id=prev_obs["id"],
-            resource_type="Observation",
-            patient_id=patient_id,
-            data=prev_obs,
-        ))
+        prev_obs = make_observation(
+            "2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0
+        )
+        db_session.add(
+            FhirResource(
+                fhir_id=prev_obs["id"],
+                resource_type="Observation",
+                patient_id=patient_id,
+                data=prev_obs,
+            )
+        )
         await db_session.flush()
 
-        current_obs = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 80.0)
+        current_obs = make_observation(
+            "2345-7", "laboratory", "2024-06-01T10:00:00Z", 80.0
+        )
 
         result = await compute_observation_trends(db_session, patient_id, [current_obs])
 
@@ -320,17 +364,23 @@ class TestComputeObservationTrends:
         """Should detect stable when change is within 5% threshold."""
         patient_id = uuid.uuid4()
 
-        prev_obs = make_observation("2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0)
-        db_session.add(FhirResource(
-            fhir_id=prev_obs["id"],
-            resource_type="Observation",
-            patient_id=patient_id,
-            data=prev_obs,
-        ))
+        prev_obs = make_observation(
+            "2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0
+        )
+        db_session.add(
+            FhirResource(
+                fhir_id=prev_obs["id"],
+                resource_type="Observation",
+                patient_id=patient_id,
+                data=prev_obs,
+            )
+        )
         await db_session.flush()
 
         # 3% change — within the 5% threshold
-        current_obs = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 103.0)
+        current_obs = make_observation(
+            "2345-7", "laboratory", "2024-06-01T10:00:00Z", 103.0
+        )
 
         result = await compute_observation_trends(db_session, patient_id, [current_obs])
 
@@ -341,7 +391,9 @@ class TestComputeObservationTrends:
         """Should omit _trend when there is no previous observation."""
         patient_id = uuid.uuid4()
 
-        current_obs = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 100.0)
+        current_obs = make_observation(
+            "2345-7", "laboratory", "2024-06-01T10:00:00Z", 100.0
+        )
 
         result = await compute_observation_trends(db_session, patient_id, [current_obs])
 
@@ -367,15 +419,19 @@ class TestComputeObservationTrends:
         patient_id = uuid.uuid4()
 
         prev_obs = make_observation("2345-7", "laboratory", "2024-01-01T10:00:00Z", 0.0)
-        db_session.add(FhirResource(
-            fhir_id=prev_obs["id"],
-            resource_type="Observation",
-            patient_id=patient_id,
-            data=prev_obs,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id=prev_obs["id"],
+                resource_type="Observation",
+                patient_id=patient_id,
+                data=prev_obs,
+            )
+        )
         await db_session.flush()
 
-        current_obs = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 5.0)
+        current_obs = make_observation(
+            "2345-7", "laboratory", "2024-06-01T10:00:00Z", 5.0
+        )
 
         result = await compute_observation_trends(db_session, patient_id, [current_obs])
 
@@ -388,15 +444,19 @@ class TestComputeObservationTrends:
         patient_id = uuid.uuid4()
 
         prev_obs = make_observation("2345-7", "laboratory", "2024-01-01T10:00:00Z", 0.0)
-        db_session.add(FhirResource(
-            fhir_id=prev_obs["id"],
-            resource_type="Observation",
-            patient_id=patient_id,
-            data=prev_obs,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id=prev_obs["id"],
+                resource_type="Observation",
+                patient_id=patient_id,
+                data=prev_obs,
+            )
+        )
         await db_session.flush()
 
-        current_obs = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 0.0)
+        current_obs = make_observation(
+            "2345-7", "laboratory", "2024-06-01T10:00:00Z", 0.0
+        )
 
         result = await compute_observation_trends(db_session, patient_id, [current_obs])
 
@@ -409,17 +469,23 @@ class TestComputeObservationTrends:
         """Should compute correct timespan_days between observations."""
         patient_id = uuid.uuid4()
 
-        prev_obs = make_observation("2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0)
-        db_session.add(FhirResource(
-            fhir_id=prev_obs["id"],
-            resource_type="Observation",
-            patient_id=patient_id,
-            data=prev_obs,
-        ))
+        prev_obs = make_observation(
+            "2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0
+        )
+        db_session.add(
+            FhirResource(
+                fhir_id=prev_obs["id"],
+                resource_type="Observation",
+                patient_id=patient_id,
+                data=prev_obs,
+            )
+        )
         await db_session.flush()
 
         # ~152 days later
-        current_obs = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 120.0)
+        current_obs = make_observation(
+            "2345-7", "laboratory", "2024-06-01T10:00:00Z", 120.0
+        )
 
         result = await compute_observation_trends(db_session, patient_id, [current_obs])
 
@@ -430,16 +496,22 @@ class TestComputeObservationTrends:
         """Should include previous_date in trend metadata."""
         patient_id = uuid.uuid4()
 
-        prev_obs = make_observation("2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0)
-        db_session.add(FhirResource(
-            fhir_id=prev_obs["id"],
-            resource_type="Observation",
-            patient_id=patient_id,
-            data=prev_obs,
-        ))
+        prev_obs = make_observation(
+            "2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0
+        )
+        db_session.add(
+            FhirResource(
+                fhir_id=prev_obs["id"],
+                resource_type="Observation",
+                patient_id=patient_id,
+                data=prev_obs,
+            )
+        )
         await db_session.flush()
 
-        current_obs = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 120.0)
+        current_obs = make_observation(
+            "2345-7", "laboratory", "2024-06-01T10:00:00Z", 120.0
+        )
 
         result = await compute_observation_trends(db_session, patient_id, [current_obs])
 
@@ -451,22 +523,34 @@ class TestComputeObservationTrends:
         patient_id = uuid.uuid4()
 
         # Previous glucose in DB
-        prev_glucose = make_observation("2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0)
-        db_session.add(FhirResource(
-            fhir_id=prev_glucose["id"],
-            resource_type="Observation",
-            patient_id=patient_id,
-            data=prev_glucose,
-        ))
+        prev_glucose = make_observation(
+            "2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0
+        )
+        db_session.add(
+            FhirResource(
+                fhir_id=prev_glucose["id"],
+                resource_type="Observation",
+                patient_id=patient_id,
+                data=prev_glucose,
+            )
+        )
         await db_session.flush()
 
         # Current: glucose (has previous) + creatinine (no previous) + non-numeric
-        current_glucose = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 120.0)
-        current_creatinine = make_observation("2160-0", "laboratory", "2024-06-01T10:00:00Z", 1.2)
-        current_social = make_observation("72166-2", "social-history", "2024-06-01T10:00:00Z")
+        current_glucose = make_observation(
+            "2345-7", "laboratory", "2024-06-01T10:00:00Z", 120.0
+        )
+        current_creatinine = make_observation(
+            "2160-0", "laboratory", "2024-06-01T10:00:00Z", 1.2
+        )
+        current_social = make_observation(
+            "72166-2", "social-history", "2024-06-01T10:00:00Z"
+        )
 
         result = await compute_observation_trends(
-            db_session, patient_id, [current_glucose, current_creatinine, current_social]
+            db_session,
+            patient_id,
+            [current_glucose, current_creatinine, current_social],
         )
 
         assert len(result) == 3
@@ -479,18 +563,26 @@ class TestComputeObservationTrends:
         """Should accept patient_id as a string."""
         patient_id = uuid.uuid4()
 
-        prev_obs = make_observation("2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0)
-        db_session.add(FhirResource(
-            fhir_id=prev_obs["id"],
-            resource_type="Observation",
-            patient_id=patient_id,
-            data=prev_obs,
-        ))
+        prev_obs = make_observation(
+            "2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0
+        )
+        db_session.add(
+            FhirResource(
+                fhir_id=prev_obs["id"],
+                resource_type="Observation",
+                patient_id=patient_id,
+                data=prev_obs,
+            )
+        )
         await db_session.flush()
 
-        current_obs = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 120.0)
+        current_obs = make_observation(
+            "2345-7", "laboratory", "2024-06-01T10:00:00Z", 120.0
+        )
 
-        result = await compute_observation_trends(db_session, str(patient_id), [current_obs])
+        result = await compute_observation_trends(
+            db_session, str(patient_id), [current_obs]
+        )
 
         assert "_trend" in result[0]
 
@@ -499,16 +591,22 @@ class TestComputeObservationTrends:
         """The original observation dicts should not be mutated."""
         patient_id = uuid.uuid4()
 
-        prev_obs = make_observation("2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0)
-        db_session.add(FhirResource(
-            fhir_id=prev_obs["id"],
-            resource_type="Observation",
-            patient_id=patient_id,
-            data=prev_obs,
-        ))
+        prev_obs = make_observation(
+            "2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0
+        )
+        db_session.add(
+            FhirResource(
+                fhir_id=prev_obs["id"],
+                resource_type="Observation",
+                patient_id=patient_id,
+                data=prev_obs,
+            )
+        )
         await db_session.flush()
 
-        current_obs = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 120.0)
+        current_obs = make_observation(
+            "2345-7", "laboratory", "2024-06-01T10:00:00Z", 120.0
+        )
 
         await compute_observation_trends(db_session, patient_id, [current_obs])
 
@@ -521,18 +619,24 @@ class TestComputeObservationTrends:
         patient_id = uuid.uuid4()
 
         old_obs = make_observation("2345-7", "laboratory", "2023-01-01T10:00:00Z", 80.0)
-        recent_obs = make_observation("2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0)
+        recent_obs = make_observation(
+            "2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0
+        )
 
         for obs in [old_obs, recent_obs]:
-            db_session.add(FhirResource(
-                fhir_id=obs["id"],
-                resource_type="Observation",
-                patient_id=patient_id,
-                data=obs,
-            ))
+            db_session.add(
+                FhirResource(
+                    fhir_id=obs["id"],
+                    resource_type="Observation",
+                    patient_id=patient_id,
+                    data=obs,
+                )
+            )
         await db_session.flush()
 
-        current_obs = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 120.0)
+        current_obs = make_observation(
+            "2345-7", "laboratory", "2024-06-01T10:00:00Z", 120.0
+        )
 
         result = await compute_observation_trends(db_session, patient_id, [current_obs])
 
@@ -548,25 +652,31 @@ class TestComputeObservationTrends:
 
         # Patient B has a previous glucose of 200.0
         prev_b = make_observation("2345-7", "laboratory", "2024-01-01T10:00:00Z", 200.0)
-        db_session.add(FhirResource(
-            fhir_id=prev_b["id"] + "-b",
-            resource_type="Observation",
-            patient_id=patient_b,
-            data=prev_b,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id=prev_b["id"] + "-b",
+                resource_type="Observation",
+                patient_id=patient_b,
+                data=prev_b,
+            )
+        )
 
         # Patient A has a previous glucose of 100.0
         prev_a = make_observation("2345-7", "laboratory", "2024-01-01T10:00:00Z", 100.0)
-        db_session.add(FhirResource(
-            fhir_id=prev_a["id"] + "-a",
-            resource_type="Observation",
-            patient_id=patient_a,
-            data=prev_a,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id=prev_a["id"] + "-a",
+                resource_type="Observation",
+                patient_id=patient_a,
+                data=prev_a,
+            )
+        )
         await db_session.flush()
 
         # Compute trends for patient A with current glucose 120.0
-        current_a = make_observation("2345-7", "laboratory", "2024-06-01T10:00:00Z", 120.0)
+        current_a = make_observation(
+            "2345-7", "laboratory", "2024-06-01T10:00:00Z", 120.0
+        )
         result = await compute_observation_trends(db_session, patient_a, [current_a])
 
         assert len(result) == 1
@@ -585,7 +695,10 @@ class TestComputeObservationTrends:
         assert "interpretation" not in obs
 
         result = await compute_observation_trends(
-            db_session, patient_id, [obs], patient_sex="male",
+            db_session,
+            patient_id,
+            [obs],
+            patient_sex="male",
         )
 
         assert len(result) == 1
@@ -600,7 +713,9 @@ class TestComputeObservationTrends:
         assert "interpretation" not in obs
 
     @pytest.mark.asyncio
-    async def test_runtime_interpretation_skips_if_already_present(self, db_session: AsyncSession):
+    async def test_runtime_interpretation_skips_if_already_present(
+        self, db_session: AsyncSession
+    ):
         """Should NOT overwrite existing interpretation."""
         patient_id = uuid.uuid4()
 
@@ -609,7 +724,10 @@ class TestComputeObservationTrends:
         obs["interpretation"] = [{"coding": [{"code": "N", "display": "Normal"}]}]
 
         result = await compute_observation_trends(
-            db_session, patient_id, [obs], patient_sex="male",
+            db_session,
+            patient_id,
+            [obs],
+            patient_sex="male",
         )
 
         # Should preserve the original "N", not overwrite with "H"
@@ -636,29 +754,39 @@ class TestExtractLoincCode:
 
 class TestComputeTrend:
     def test_rising(self):
-        trend = _compute_trend(120.0, 100.0, "2024-06-01T10:00:00Z", "2024-01-01T10:00:00Z")
+        trend = _compute_trend(
+            120.0, 100.0, "2024-06-01T10:00:00Z", "2024-01-01T10:00:00Z"
+        )
         assert trend["direction"] == "rising"
         assert trend["delta"] == 20.0
         assert trend["delta_percent"] == 20.0
 
     def test_falling(self):
-        trend = _compute_trend(80.0, 100.0, "2024-06-01T10:00:00Z", "2024-01-01T10:00:00Z")
+        trend = _compute_trend(
+            80.0, 100.0, "2024-06-01T10:00:00Z", "2024-01-01T10:00:00Z"
+        )
         assert trend["direction"] == "falling"
         assert trend["delta"] == -20.0
         assert trend["delta_percent"] == -20.0
 
     def test_stable_within_threshold(self):
-        trend = _compute_trend(103.0, 100.0, "2024-06-01T10:00:00Z", "2024-01-01T10:00:00Z")
+        trend = _compute_trend(
+            103.0, 100.0, "2024-06-01T10:00:00Z", "2024-01-01T10:00:00Z"
+        )
         assert trend["direction"] == "stable"
 
     def test_exact_threshold_is_stable(self):
         # 5% change exactly — should be stable (<=5%)
-        trend = _compute_trend(105.0, 100.0, "2024-06-01T10:00:00Z", "2024-01-01T10:00:00Z")
+        trend = _compute_trend(
+            105.0, 100.0, "2024-06-01T10:00:00Z", "2024-01-01T10:00:00Z"
+        )
         assert trend["direction"] == "stable"
 
     def test_just_above_threshold_is_rising(self):
         # 5.1% change — should be rising
-        trend = _compute_trend(105.1, 100.0, "2024-06-01T10:00:00Z", "2024-01-01T10:00:00Z")
+        trend = _compute_trend(
+            105.1, 100.0, "2024-06-01T10:00:00Z", "2024-01-01T10:00:00Z"
+        )
         assert trend["direction"] == "rising"
 
     def test_zero_previous_nonzero_current(self):
@@ -667,7 +795,9 @@ class TestComputeTrend:
         assert trend["delta_percent"] is None
 
     def test_zero_previous_negative_current(self):
-        trend = _compute_trend(-3.0, 0.0, "2024-06-01T10:00:00Z", "2024-01-01T10:00:00Z")
+        trend = _compute_trend(
+            -3.0, 0.0, "2024-06-01T10:00:00Z", "2024-01-01T10:00:00Z"
+        )
         assert trend["direction"] == "falling"
         assert trend["delta_percent"] is None
 
@@ -677,7 +807,9 @@ class TestComputeTrend:
         assert trend["delta_percent"] is None
 
     def test_timespan_computation(self):
-        trend = _compute_trend(120.0, 100.0, "2024-06-01T10:00:00Z", "2024-01-01T10:00:00Z")
+        trend = _compute_trend(
+            120.0, 100.0, "2024-06-01T10:00:00Z", "2024-01-01T10:00:00Z"
+        )
         assert trend["timespan_days"] == 152
 
 
@@ -730,7 +862,13 @@ class TestPruneAndEnrich:
             "meta": {"versionId": "1", "lastUpdated": "2024-01-01"},
             "text": {"div": "<div>HTML</div>"},
             "code": {
-                "coding": [{"system": "http://snomed.info/sct", "code": "123", "display": "Hypertension"}],
+                "coding": [
+                    {
+                        "system": "http://snomed.info/sct",
+                        "code": "123",
+                        "display": "Hypertension",
+                    }
+                ],
             },
             "clinicalStatus": {
                 "coding": [{"code": "active"}],
@@ -805,13 +943,21 @@ class TestFetchResourcesByFhirIds:
             fhir_id="cond-abc",
             resource_type="Condition",
             patient_id=patient_id,
-            data={"resourceType": "Condition", "id": "cond-abc", "code": {"text": "Diabetes"}},
+            data={
+                "resourceType": "Condition",
+                "id": "cond-abc",
+                "code": {"text": "Diabetes"},
+            },
         )
         r2 = FhirResource(
             fhir_id="med-xyz",
             resource_type="MedicationRequest",
             patient_id=patient_id,
-            data={"resourceType": "MedicationRequest", "id": "med-xyz", "status": "active"},
+            data={
+                "resourceType": "MedicationRequest",
+                "id": "med-xyz",
+                "status": "active",
+            },
         )
         db_session.add_all([r1, r2])
         await db_session.flush()
@@ -1089,7 +1235,11 @@ class TestCompileNodeContext:
         resources = [
             MagicMock(
                 fhir_id=f"med-{i}",
-                data={"resourceType": "MedicationRequest", "id": f"med-{i}", "status": "active"},
+                data={
+                    "resourceType": "MedicationRequest",
+                    "id": f"med-{i}",
+                    "status": "active",
+                },
             )
             for i in range(5)
         ]
@@ -1209,7 +1359,11 @@ class TestCompileNodeContext:
             ),
             MagicMock(
                 fhir_id="med-1",
-                data={"resourceType": "MedicationRequest", "id": "med-1", "status": "active"},
+                data={
+                    "resourceType": "MedicationRequest",
+                    "id": "med-1",
+                    "status": "active",
+                },
             ),
             MagicMock(
                 fhir_id="cond-2",
@@ -1363,9 +1517,7 @@ class TestExtractDosageText:
             "dosageInstruction": [
                 {
                     "text": "fallback text",
-                    "doseAndRate": [
-                        {"doseQuantity": {"value": 10, "unit": "MG"}}
-                    ],
+                    "doseAndRate": [{"doseQuantity": {"value": 10, "unit": "MG"}}],
                 }
             ],
         }
@@ -1409,7 +1561,9 @@ class TestComputeDoseHistory:
     """Tests for compute_dose_history() with real DB."""
 
     @pytest.mark.asyncio
-    async def test_returns_prior_records_with_different_dose(self, db_session: AsyncSession):
+    async def test_returns_prior_records_with_different_dose(
+        self, db_session: AsyncSession
+    ):
         """Should return prior MedicationRequests with different dosages."""
         patient_id = uuid.uuid4()
 
@@ -1422,12 +1576,14 @@ class TestComputeDoseHistory:
             dose_value=5,
             dose_unit="MG",
         )
-        db_session.add(FhirResource(
-            fhir_id="med-old",
-            resource_type="MedicationRequest",
-            patient_id=patient_id,
-            data=prior_med,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="med-old",
+                resource_type="MedicationRequest",
+                patient_id=patient_id,
+                data=prior_med,
+            )
+        )
 
         # Current active med: different dose
         active_med = _make_med_request(
@@ -1438,12 +1594,14 @@ class TestComputeDoseHistory:
             dose_value=10,
             dose_unit="MG",
         )
-        db_session.add(FhirResource(
-            fhir_id="med-current",
-            resource_type="MedicationRequest",
-            patient_id=patient_id,
-            data=active_med,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="med-current",
+                resource_type="MedicationRequest",
+                patient_id=patient_id,
+                data=active_med,
+            )
+        )
         await db_session.flush()
 
         result = await compute_dose_history(db_session, patient_id, active_med)
@@ -1467,12 +1625,14 @@ class TestComputeDoseHistory:
             dose_value=10,
             dose_unit="MG",
         )
-        db_session.add(FhirResource(
-            fhir_id="med-refill",
-            resource_type="MedicationRequest",
-            patient_id=patient_id,
-            data=refill_med,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="med-refill",
+                resource_type="MedicationRequest",
+                patient_id=patient_id,
+                data=refill_med,
+            )
+        )
 
         active_med = _make_med_request(
             fhir_id="med-current",
@@ -1482,12 +1642,14 @@ class TestComputeDoseHistory:
             dose_value=10,
             dose_unit="MG",
         )
-        db_session.add(FhirResource(
-            fhir_id="med-current",
-            resource_type="MedicationRequest",
-            patient_id=patient_id,
-            data=active_med,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="med-current",
+                resource_type="MedicationRequest",
+                patient_id=patient_id,
+                data=active_med,
+            )
+        )
         await db_session.flush()
 
         result = await compute_dose_history(db_session, patient_id, active_med)
@@ -1507,12 +1669,14 @@ class TestComputeDoseHistory:
             dose_value=500,
             dose_unit="MG",
         )
-        db_session.add(FhirResource(
-            fhir_id="med-only",
-            resource_type="MedicationRequest",
-            patient_id=patient_id,
-            data=active_med,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="med-only",
+                resource_type="MedicationRequest",
+                patient_id=patient_id,
+                data=active_med,
+            )
+        )
         await db_session.flush()
 
         result = await compute_dose_history(db_session, patient_id, active_med)
@@ -1543,12 +1707,14 @@ class TestComputeDoseHistory:
         )
 
         for med in [mid_med, old_med]:  # Insert out of order to test sorting
-            db_session.add(FhirResource(
-                fhir_id=med["id"],
-                resource_type="MedicationRequest",
-                patient_id=patient_id,
-                data=med,
-            ))
+            db_session.add(
+                FhirResource(
+                    fhir_id=med["id"],
+                    resource_type="MedicationRequest",
+                    patient_id=patient_id,
+                    data=med,
+                )
+            )
 
         active_med = _make_med_request(
             fhir_id="med-current",
@@ -1558,12 +1724,14 @@ class TestComputeDoseHistory:
             dose_value=20,
             dose_unit="MG",
         )
-        db_session.add(FhirResource(
-            fhir_id="med-current",
-            resource_type="MedicationRequest",
-            patient_id=patient_id,
-            data=active_med,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="med-current",
+                resource_type="MedicationRequest",
+                patient_id=patient_id,
+                data=active_med,
+            )
+        )
         await db_session.flush()
 
         result = await compute_dose_history(db_session, patient_id, active_med)
@@ -1585,12 +1753,14 @@ class TestComputeDoseHistory:
             dose_value=10,
             dose_unit="MG",
         )
-        db_session.add(FhirResource(
-            fhir_id="med-current",
-            resource_type="MedicationRequest",
-            patient_id=patient_id,
-            data=active_med,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="med-current",
+                resource_type="MedicationRequest",
+                patient_id=patient_id,
+                data=active_med,
+            )
+        )
         await db_session.flush()
 
         result = await compute_dose_history(db_session, patient_id, active_med)
@@ -1626,12 +1796,14 @@ class TestComputeDoseHistory:
             dose_value=250,
             dose_unit="MG",
         )
-        db_session.add(FhirResource(
-            fhir_id="med-old",
-            resource_type="MedicationRequest",
-            patient_id=patient_id,
-            data=prior_med,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="med-old",
+                resource_type="MedicationRequest",
+                patient_id=patient_id,
+                data=prior_med,
+            )
+        )
 
         active_med = _make_med_request(
             fhir_id="med-current",
@@ -1641,12 +1813,14 @@ class TestComputeDoseHistory:
             dose_value=500,
             dose_unit="MG",
         )
-        db_session.add(FhirResource(
-            fhir_id="med-current",
-            resource_type="MedicationRequest",
-            patient_id=patient_id,
-            data=active_med,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="med-current",
+                resource_type="MedicationRequest",
+                patient_id=patient_id,
+                data=active_med,
+            )
+        )
         await db_session.flush()
 
         result = await compute_dose_history(db_session, str(patient_id), active_med)
@@ -1668,12 +1842,14 @@ class TestComputeDoseHistory:
             dose_value=5,
             dose_unit="MG",
         )
-        db_session.add(FhirResource(
-            fhir_id="med-b-old",
-            resource_type="MedicationRequest",
-            patient_id=patient_b,
-            data=prior_b,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="med-b-old",
+                resource_type="MedicationRequest",
+                patient_id=patient_b,
+                data=prior_b,
+            )
+        )
 
         active_med = _make_med_request(
             fhir_id="med-a-current",
@@ -1683,19 +1859,91 @@ class TestComputeDoseHistory:
             dose_value=10,
             dose_unit="MG",
         )
-        db_session.add(FhirResource(
-            fhir_id="med-a-current",
-            resource_type="MedicationRequest",
-            patient_id=patient_a,
-            data=active_med,
-        ))
-        await db_session.flush()
-
+        db_session.add(
+            FhirResource(
+                fhir_id="med-a-current",
+                resource_type="MedicationRequest",
+                patient_id=patient_a,
+                data=active_med,
+            )
+        )
+        await db_session.flush()
+
         result = await compute_dose_history(db_session, patient_a, active_med)
 
         assert result == []
 
 
+class TestComputeDoseHistoryBatch:
+    """Tests for compute_dose_history_batch() with real DB."""
+
+    @pytest.mark.asyncio
+    async def test_groups_history_per_medication(self, db_session: AsyncSession):
+        """One call returns each active med's history, in input order."""
+        patient_id = uuid.uuid4()
+        meds = [
+            _make_med_request(
+                fhir_id="lis-old",
+                display="Lisinopril 10 MG",
+                status="stopped",
+                authored_on="2025-01-01",
+                dose_value=5,
+            ),
+            _make_med_request(
+                fhir_id="lis-current",
+                display="Lisinopril 10 MG",
+                authored_on="2025-06-01",
+                dose_value=10,
+            ),
+            _make_med_request(
+                fhir_id="met-old",
+                display="Metformin 500 MG",
+                status="completed",
+                authored_on="2024-03-01",
+                dose_value=250,
+            ),
+            _make_med_request(
+                fhir_id="met-older",
+                display="Metformin 500 MG",
+                status="stopped",
+                authored_on="2023-03-01",
+                dose_value=100,
+            ),
+            _make_med_request(
+                fhir_id="met-current",
+                display="Metformin 500 MG",
+                authored_on="2025-02-01",
+                dose_value=500,
+            ),
+        ]
+        for med in meds:
+            db_session.add(
+                FhirResource(
+                    fhir_id=med["id"],
+                    resource_type="MedicationRequest",
+                    patient_id=patient_id,
+                    data=med,
+                )
+            )
+        await db_session.flush()
+
+        no_display = {"resourceType": "MedicationRequest", "id": "med-x"}
+        result = await compute_dose_history_batch(
+            db_session, patient_id, [meds[4], no_display, meds[1]]
+        )
+
+        assert [[e["authoredOn"] for e in h] for h in result] == [
+            ["2023-03-01", "2024-03-01"],
+            [],
+            ["2025-01-01"],
+        ]
+
+    @pytest.mark.asyncio
+    async def test_empty_input(self, db_session: AsyncSession):
+        """No active meds means no history and no query."""
+        assert await compute_dose_history_batch(db_session, uuid.uuid4(), []) == []
+
+
 # =============================================================================
 # Tests for infer_medication_condition_links
 # =============================================================================
@@ -1704,40 +1952,21 @@ class TestComputeDoseHistory:
 class TestInferMedicationConditionLinks:
     """Tests for infer_medication_condition_links() with mocked graph."""
 
+    @staticmethod
+    def _graph_with_links(links: dict[str, list[str]]) -> AsyncMock:
+        """Mock graph whose encounter traversal yields links (med id -> condition ids)."""
+        mock_graph = AsyncMock(spec=KnowledgeGraph)
+        mock_graph.get_inferred_condition_links.side_effect = (
+            lambda patient_id, med_ids: {m: links[m] for m in med_ids if m in links}
+        )
+        return mock_graph
+
     @pytest.mark.asyncio
     async def test_infers_link_via_encounter(self):
         """Should infer med->condition link via PRESCRIBED->encounter->DIAGNOSED->condition."""
         patient_id = str(uuid.uuid4())
         med = _make_med_request(fhir_id="med-1", display="Lisinopril 10 MG")
-
-        mock_graph = AsyncMock(spec=KnowledgeGraph)
-
-        # First call: get_all_connections for med-1 -> returns PRESCRIBED encounter
-        # Second call: get_all_connections for enc-1 -> returns DIAGNOSED condition
-        mock_graph.get_all_connections.side_effect = [
-            # Connections from med-1
-            [
-                {
-                    "relationship": "PRESCRIBED",
-                    "direction": "incoming",
-                    "fhir_id": "enc-1",
-                    "resource_type": "Encounter",
-                    "name": None,
-                    "fhir_resource": None,
-                },
-            ],
-            # Connections from enc-1
-            [
-                {
-                    "relationship": "DIAGNOSED",
-                    "direction": "outgoing",
-                    "fhir_id": "cond-1",
-                    "resource_type": "Condition",
-                    "name": None,
-                    "fhir_resource": None,
-                },
-            ],
-        ]
+        mock_graph = self._graph_with_links({"med-1": ["cond-1"]})
 
         result = await infer_medication_condition_links([med], mock_graph, patient_id)
 
@@ -1748,23 +1977,11 @@ class TestInferMedicationConditionLinks:
         assert "unlinked" not in result
 
     @pytest.mark.asyncio
-    async def test_unlinked_when_no_encounter(self):
-        """Meds with no PRESCRIBED encounter should go to 'unlinked' bucket."""
+    async def test_unlinked_when_no_encounter_condition(self):
+        """Meds with no encounter-diagnosed condition should go to 'unlinked' bucket."""
         patient_id = str(uuid.uuid4())
         med = _make_med_request(fhir_id="med-orphan", display="Orphan Drug")
-
-        mock_graph = AsyncMock(spec=KnowledgeGraph)
-        mock_graph.get_all_connections.return_value = [
-            # No PRESCRIBED relationships
-            {
-                "relationship": "TREATS",
-                "direction": "outgoing",
-                "fhir_id": "cond-99",
-                "resource_type": "Condition",
-                "name": None,
-                "fhir_resource": None,
-            },
-        ]
+        mock_graph = self._graph_with_links({})
 
         result = await infer_medication_condition_links([med], mock_graph, patient_id)
 
@@ -1773,89 +1990,18 @@ class TestInferMedicationConditionLinks:
         assert result["unlinked"][0]["id"] == "med-orphan"
 
     @pytest.mark.asyncio
-    async def test_unlinked_when_encounter_has_no_conditions(self):
-        """Meds with encounters but no DIAGNOSED conditions should go to 'unlinked'."""
-        patient_id = str(uuid.uuid4())
-        med = _make_med_request(fhir_id="med-no-diag", display="Generic Med")
-
-        mock_graph = AsyncMock(spec=KnowledgeGraph)
-        mock_graph.get_all_connections.side_effect = [
-            # Med -> encounter via PRESCRIBED
-            [
-                {
-                    "relationship": "PRESCRIBED",
-                    "direction": "incoming",
-                    "fhir_id": "enc-empty",
-                    "resource_type": "Encounter",
-                    "name": None,
-                    "fhir_resource": None,
-                },
-            ],
-            # Encounter has no DIAGNOSED conditions
-            [
-                {
-                    "relationship": "RECORDED",
-                    "direction": "outgoing",
-                    "fhir_id": "obs-1",
-                    "resource_type": "Observation",
-                    "name": None,
-                    "fhir_resource": None,
-                },
-            ],
-        ]
-
-        result = await infer_medication_condition_links([med], mock_graph, patient_id)
-
-        assert "unlinked" in result
-        assert len(result["unlinked"]) == 1
-
-    @pytest.mark.asyncio
-    async def test_multiple_conditions_from_one_encounter(self):
-        """One encounter can diagnose multiple conditions linked to the same med."""
+    async def test_multiple_conditions_for_one_med(self):
+        """An encounter can diagnose multiple conditions linked to the same med."""
         patient_id = str(uuid.uuid4())
         med = _make_med_request(fhir_id="med-multi", display="Multi Drug")
-
-        mock_graph = AsyncMock(spec=KnowledgeGraph)
-        mock_graph.get_all_connections.side_effect = [
-            # Med connections
-            [
-                {
-                    "relationship": "PRESCRIBED",
-                    "direction": "incoming",
-                    "fhir_id": "enc-1",
-                    "resource_type": "Encounter",
-                    "name": None,
-                    "fhir_resource": None,
-                },
-            ],
-            # Encounter with two diagnosed conditions
-            [
-                {
-                    "relationship": "DIAGNOSED",
-                    "direction": "outgoing",
-                    "fhir_id": "cond-a",
-                    "resource_type": "Condition",
-                    "name": None,
-                    "fhir_resource": None,
-                },
-                {
-                    "relationship": "DIAGNOSED",
-                    "direction": "outgoing",
-                    "fhir_id": "cond-b",
-                    "resource_type": "Condition",
-                    "name": None,
-                    "fhir_resource": None,
-                },
-            ],
-        ]
+        mock_graph = self._graph_with_links({"med-multi": ["cond-a", "cond-b"]})
 
         result = await infer_medication_condition_links([med], mock_graph, patient_id)
 
-        assert "cond-a" in result
-        assert "cond-b" in result
         assert len(result["cond-a"]) == 1
         assert len(result["cond-b"]) == 1
         assert all(m["_inferred"] is True for m in result["cond-a"])
+        assert result["cond-a"][0] is not result["cond-b"][0]
 
     @pytest.mark.asyncio
     async def test_med_without_id_goes_to_unlinked(self):
@@ -1870,7 +2016,7 @@ class TestInferMedicationConditionLinks:
         assert "unlinked" in result
         assert len(result["unlinked"]) == 1
         # Graph should not have been called
-        mock_graph.get_all_connections.assert_not_called()
+        mock_graph.get_inferred_condition_links.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_does_not_mutate_input(self):
@@ -1878,30 +2024,7 @@ class TestInferMedicationConditionLinks:
         patient_id = str(uuid.uuid4())
         med = _make_med_request(fhir_id="med-1", display="Test Med")
         original = copy.deepcopy(med)
-
-        mock_graph = AsyncMock(spec=KnowledgeGraph)
-        mock_graph.get_all_connections.side_effect = [
-            [
-                {
-                    "relationship": "PRESCRIBED",
-                    "direction": "incoming",
-                    "fhir_id": "enc-1",
-                    "resource_type": "Encounter",
-                    "name": None,
-                    "fhir_resource": None,
-                },
-            ],
-            [
-                {
-                    "relationship": "DIAGNOSED",
-                    "direction": "outgoing",
-                    "fhir_id": "cond-1",
-                    "resource_type": "Condition",
-                    "name": None,
-                    "fhir_resource": None,
-                },
-            ],
-        ]
+        mock_graph = self._graph_with_links({"med-1": ["cond-1"]})
 
         await infer_medication_condition_links([med], mock_graph, patient_id)
 
@@ -1918,65 +2041,25 @@ class TestInferMedicationConditionLinks:
         result = await infer_medication_condition_links([], mock_graph, patient_id)
 
         assert result == {}
-        mock_graph.get_all_connections.assert_not_called()
+        mock_graph.get_inferred_condition_links.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_mixed_linked_and_unlinked(self):
-        """Should properly separate meds with/without encounter links."""
+    async def test_mixed_linked_and_unlinked_in_one_query(self):
+        """Should separate meds with/without encounter links using a single graph call."""
         patient_id = str(uuid.uuid4())
         med_linked = _make_med_request(fhir_id="med-linked", display="Drug A")
         med_unlinked = _make_med_request(fhir_id="med-unlinked", display="Drug B")
-
-        mock_graph = AsyncMock(spec=KnowledgeGraph)
-        mock_graph.get_all_connections.side_effect = [
-            # med-linked -> has PRESCRIBED encounter
-            [
-                {
-                    "relationship": "PRESCRIBED",
-                    "direction": "incoming",
-                    "fhir_id": "enc-1",
-                    "resource_type": "Encounter",
-                    "name": None,
-                    "fhir_resource": None,
-                },
-            ],
-            # enc-1 -> has DIAGNOSED condition
-            [
-                {
-                    "relationship": "DIAGNOSED",
-                    "direction": "outgoing",
-                    "fhir_id": "cond-1",
-                    "resource_type": "Condition",
-                    "name": None,
-                    "fhir_resource": None,
-                },
-            ],
-            # med-unlinked -> no PRESCRIBED encounters
-            [],
-        ]
+        mock_graph = self._graph_with_links({"med-linked": ["cond-1"]})
 
         result = await infer_medication_condition_links(
             [med_linked, med_unlinked], mock_graph, patient_id
         )
 
-        assert "cond-1" in result
         assert result["cond-1"][0]["_inferred"] is True
-        assert "unlinked" in result
         assert result["unlinked"][0]["id"] == "med-unlinked"
-
-    @pytest.mark.asyncio
-    async def test_no_connections_at_all(self):
-        """Med with zero graph connections goes to unlinked."""
-        patient_id = str(uuid.uuid4())
-        med = _make_med_request(fhir_id="med-isolated", display="Isolated Drug")
-
-        mock_graph = AsyncMock(spec=KnowledgeGraph)
-        mock_graph.get_all_connections.return_value = []
-
-        result = await infer_medication_condition_links([med], mock_graph, patient_id)
-
-        assert "unlinked" in result
-        assert len(result["unlinked"]) == 1
+        mock_graph.get_inferred_condition_links.assert_awaited_once_with(
+            patient_id, ["med-linked", "med-unlinked"]
+        )
 
 
 # =============================================================================
@@ -2014,7 +2097,13 @@ def _make_condition(
         "resourceType": "Condition",
         "id": fhir_id,
         "code": {
-            "coding": [{"system": "http://snomed.info/sct", "code": snomed_code, "display": display}],
+            "coding": [
+                {
+                    "system": "http://snomed.info/sct",
+                    "code": snomed_code,
+                    "display": display,
+                }
+            ],
         },
         "clinicalStatus": {
             "coding": [{"code": clinical_status}],
@@ -2118,6 +2207,7 @@ def _make_document_reference(
 ) -> dict:
     """Build a minimal FHIR DocumentReference with base64 note."""
     import base64
+
     encoded = base64.b64encode(note_text.encode()).decode()
     return {
         "resourceType": "DocumentReference",
@@ -2144,7 +2234,7 @@ def _setup_mock_graph(
     treating_meds: dict[str, list[dict]] | None = None,
     care_plans_for_cond: dict[str, list[dict]] | None = None,
     procedures_for_cond: dict[str, list[dict]] | None = None,
-    infer_connections: list | None = None,
+    inferred_links: dict[str, list[str]] | None = None,
 ) -> AsyncMock:
     """Set up a fully mocked KnowledgeGraph for compile_patient_summary tests."""
     mock_graph = AsyncMock(spec=KnowledgeGraph)
@@ -2155,50 +2245,58 @@ def _setup_mock_graph(
 
     # Encounters returned from get_patient_encounters
     enc_records = []
-    for enc in (encounters or []):
+    for enc in encounters or []:
         period = enc.get("period", {})
-        enc_records.append({
-            "fhir_id": enc["id"],
-            "type_display": enc.get("type", [{}])[0].get("coding", [{}])[0].get("display", ""),
-            "period_start": period.get("start", ""),
-            "period_end": period.get("end", ""),
-        })
+        enc_records.append(
+            {
+                "fhir_id": enc["id"],
+                "type_display": enc.get("type", [{}])[0]
+                .get("coding", [{}])[0]
+                .get("display", ""),
+                "period_start": period.get("start", ""),
+                "period_end": period.get("end", ""),
+            }
+        )
     mock_graph.get_patient_encounters.return_value = enc_records
 
-    # get_encounter_events returns per-encounter events
+    # get_encounter_events_batch returns events per requested encounter
     _default_events = {
-        "conditions": [], "medications": [], "observations": [],
-        "procedures": [], "diagnostic_reports": [], "immunizations": [],
-        "care_plans": [], "document_references": [], "imaging_studies": [],
-        "care_teams": [], "medication_administrations": [],
+        "conditions": [],
+        "medications": [],
+        "observations": [],
+        "procedures": [],
+        "diagnostic_reports": [],
+        "immunizations": [],
+        "care_plans": [],
+        "document_references": [],
+        "imaging_studies": [],
+        "care_teams": [],
+        "medication_administrations": [],
+    }
+    encounter_events = encounter_events or {}
+    mock_graph.get_encounter_events_batch.side_effect = lambda patient_id, enc_ids: {
+        enc_id: encounter_events.get(enc_id, _default_events) for enc_id in enc_ids
     }
-    if encounter_events:
-        mock_graph.get_encounter_events.side_effect = lambda fhir_id: encounter_events.get(
-            fhir_id, _default_events
-        )
-    else:
-        mock_graph.get_encounter_events.return_value = _default_events
 
     # Condition-linked queries
     treating_meds = treating_meds or {}
     care_plans_for_cond = care_plans_for_cond or {}
     procedures_for_cond = procedures_for_cond or {}
 
-    mock_graph.get_medications_treating_condition.side_effect = (
-        lambda cond_id: treating_meds.get(cond_id, [])
-    )
-    mock_graph.get_care_plans_for_condition.side_effect = (
-        lambda cond_id: care_plans_for_cond.get(cond_id, [])
-    )
-    mock_graph.get_procedures_for_condition.side_effect = (
-        lambda cond_id: procedures_for_cond.get(cond_id, [])
-    )
-
-    # For infer_medication_condition_links
-    if infer_connections is not None:
-        mock_graph.get_all_connections.side_effect = infer_connections
-    else:
-        mock_graph.get_all_connections.return_value = []
+    mock_graph.get_condition_context_batch.side_effect = lambda cond_ids: {
+        cond_id: {
+            "treating_medications": treating_meds.get(cond_id, []),
+            "care_plans": care_plans_for_cond.get(cond_id, []),
+            "procedures": procedures_for_cond.get(cond_id, []),
+        }
+        for cond_id in cond_ids
+    }
+
+    # For infer_medication_condition_links (med id -> condition ids)
+    inferred_links = inferred_links or {}
+    mock_graph.get_inferred_condition_links.side_effect = lambda patient_id, med_ids: {
+        m: inferred_links[m] for m in med_ids if m in inferred_links
+    }
 
     return mock_graph
 
@@ -2251,7 +2349,11 @@ class TestBuildPatientOrientation:
         assert "age 41" in result
 
     def test_missing_name(self):
-        patient = {"resourceType": "Patient", "gender": "male", "birthDate": "1990-01-01"}
+        patient = {
+            "resourceType": "Patient",
+            "gender": "male",
+            "birthDate": "1990-01-01",
+        }
         result = _build_patient_orientation(patient, date(2026, 2, 5))
         assert "Unknown" in result
 
@@ -2262,7 +2364,10 @@ class TestBuildPatientOrientation:
         assert "Unknown" not in result.split(", ")[1:]  # not in any part after name
 
     def test_missing_birth_date(self):
-        patient = {"resourceType": "Patient", "name": [{"given": ["Bob"], "family": "Smith"}]}
+        patient = {
+            "resourceType": "Patient",
+            "name": [{"given": ["Bob"], "family": "Smith"}],
+        }
         result = _build_patient_orientation(patient, date(2026, 2, 5))
         assert "Bob Smith" in result
         assert "DOB" not in result
@@ -2286,12 +2391,14 @@ class TestCompilePatientSummary:
         """Summary contains all required top-level keys."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
         await db_session.flush()
 
         mock_graph = _setup_mock_graph()
@@ -2311,17 +2418,68 @@ class TestCompilePatientSummary:
         assert "tier3_latest_observations" in result
         assert "safety_constraints" in result
 
+    @pytest.mark.asyncio
+    async def test_records_stage_timings(self, db_session: AsyncSession):
+        """Every root read runs once and each stage's duration is reported."""
+        patient_id = uuid.uuid4()
+        mock_graph = _setup_mock_graph(conditions=[_make_condition()])
+
+        timings: dict[str, float] = {}
+        await compile_patient_summary(
+            patient_id, mock_graph, db_session, date(2026, 2, 5), timings=timings
+        )
+
+        for read in (
+            mock_graph.get_verified_conditions,
+            mock_graph.get_verified_medications,
+            mock_graph.get_verified_allergies,
+            mock_graph.get_verified_immunizations,
+            mock_graph.get_patient_encounters,
+        ):
+            read.assert_awaited_once_with(str(patient_id))
+        mock_graph.get_condition_context_batch.assert_awaited_once_with(["cond-1"])
+        assert {
+            "patient",
+            "conditions",
+            "medications",
+            "allergies",
+            "immunizations",
+            "encounters",
+            "recently_resolved",
+            "care_plans",
+            "condition_context",
+            "encounter_resources",
+            "latest_observations",
+            "observation_trends",
+        } <= timings.keys()
+        assert all(ms >= 0 for ms in timings.values())
+
+    @pytest.mark.asyncio
+    async def test_stage_failure_propagates(self, db_session: AsyncSession):
+        """A failing stage raises its own exception, not an ExceptionGroup."""
+        mock_graph = _setup_mock_graph()
+        mock_graph.get_verified_allergies.side_effect = RuntimeError("neo4j down")
+
+        with pytest.raises(RuntimeError, match="neo4j down"):
+            await compile_patient_summary(
+                uuid.uuid4(), mock_graph, db_session, date(2026, 2, 5)
+            )
+
     @pytest.mark.asyncio
     async def test_patient_orientation_narrative(self, db_session: AsyncSession):
         """Should produce a proper orientation narrative from patient data."""
         patient_id = uuid.uuid4()
-        patient = _make_patient_resource(given="Alice", family="Johnson", birth_date="1990-05-20")
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        patient = _make_patient_resource(
+            given="Alice", family="Johnson", birth_date="1990-05-20"
+        )
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
         await db_session.flush()
 
         mock_graph = _setup_mock_graph()
@@ -2338,12 +2496,14 @@ class TestCompilePatientSummary:
         """Should handle patient with no conditions, meds, allergies, etc."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
         await db_session.flush()
 
         mock_graph = _setup_mock_graph()
@@ -2366,12 +2526,14 @@ class TestCompilePatientSummary:
         """When no allergies, should show 'None recorded'."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
         await db_session.flush()
 
         mock_graph = _setup_mock_graph(allergies=[])
@@ -2380,19 +2542,23 @@ class TestCompilePatientSummary:
         )
 
         assert result["tier1_allergies"] == [{"note": "None recorded"}]
-        assert result["safety_constraints"]["active_allergies"] == [{"note": "None recorded"}]
+        assert result["safety_constraints"]["active_allergies"] == [
+            {"note": "None recorded"}
+        ]
 
     @pytest.mark.asyncio
     async def test_allergies_present(self, db_session: AsyncSession):
         """When allergies exist, should include them in tier1 and safety."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
         await db_session.flush()
 
         allergy = _make_allergy(fhir_id="allergy-pen", display="Penicillin")
@@ -2412,12 +2578,14 @@ class TestCompilePatientSummary:
         """Active conditions should include treating medications."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
         await db_session.flush()
 
         condition = _make_condition(fhir_id="cond-htn", display="Hypertension")
@@ -2450,12 +2618,14 @@ class TestCompilePatientSummary:
         """Medications should have _recency and _duration_days enrichments."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
         await db_session.flush()
 
         condition = _make_condition(fhir_id="cond-1")
@@ -2484,12 +2654,14 @@ class TestCompilePatientSummary:
         """Active meds with prior dose changes should have _dose_history."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
 
         # Prior med with different dose
         prior_med = _make_med_request(
@@ -2500,12 +2672,14 @@ class TestCompilePatientSummary:
             dose_value=5,
             dose_unit="MG",
         )
-        db_session.add(FhirResource(
-            fhir_id="med-old",
-            resource_type="MedicationRequest",
-            patient_id=patient_id,
-            data=prior_med,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="med-old",
+                resource_type="MedicationRequest",
+                patient_id=patient_id,
+                data=prior_med,
+            )
+        )
 
         # Active med
         active_med = _make_med_request(
@@ -2516,12 +2690,14 @@ class TestCompilePatientSummary:
             dose_value=10,
             dose_unit="MG",
         )
-        db_session.add(FhirResource(
-            fhir_id="med-current",
-            resource_type="MedicationRequest",
-            patient_id=patient_id,
-            data=active_med,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="med-current",
+                resource_type="MedicationRequest",
+                patient_id=patient_id,
+                data=active_med,
+            )
+        )
         await db_session.flush()
 
         condition = _make_condition(fhir_id="cond-1")
@@ -2545,12 +2721,14 @@ class TestCompilePatientSummary:
         """Meds not linked to any condition should appear in unlinked list."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
         await db_session.flush()
 
         med = _make_med_request(
@@ -2562,7 +2740,7 @@ class TestCompilePatientSummary:
         mock_graph = _setup_mock_graph(
             medications=[med],
             # No conditions, no treating links
-            # get_all_connections returns empty => unlinked
+            # No inferred encounter links => unlinked
         )
 
         result = await compile_patient_summary(
@@ -2577,24 +2755,32 @@ class TestCompilePatientSummary:
         """Meds already in Tier 1 condition context should not repeat in Tier 2 PRESCRIBED."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
 
-        encounter = _make_encounter(fhir_id="enc-1", period_start="2026-01-15T10:00:00Z")
-        db_session.add(FhirResource(
-            fhir_id="enc-1",
-            resource_type="Encounter",
-            patient_id=patient_id,
-            data=encounter,
-        ))
+        encounter = _make_encounter(
+            fhir_id="enc-1", period_start="2026-01-15T10:00:00Z"
+        )
+        db_session.add(
+            FhirResource(
+                fhir_id="enc-1",
+                resource_type="Encounter",
+                patient_id=patient_id,
+                data=encounter,
+            )
+        )
         await db_session.flush()
 
         condition = _make_condition(fhir_id="cond-1")
-        med = _make_med_request(fhir_id="med-1", display="Metformin", authored_on="2025-06-01")
+        med = _make_med_request(
+            fhir_id="med-1", display="Metformin", authored_on="2025-06-01"
+        )
 
         # Med is linked to condition via TREATS
         mock_graph = _setup_mock_graph(
@@ -2604,10 +2790,17 @@ class TestCompilePatientSummary:
             encounters=[encounter],
             encounter_events={
                 "enc-1": {
-                    "conditions": [], "medications": [med], "observations": [],
-                    "procedures": [], "diagnostic_reports": [], "immunizations": [],
-                    "care_plans": [], "document_references": [], "imaging_studies": [],
-                    "care_teams": [], "medication_administrations": [],
+                    "conditions": [],
+                    "medications": [med],
+                    "observations": [],
+                    "procedures": [],
+                    "diagnostic_reports": [],
+                    "immunizations": [],
+                    "care_plans": [],
+                    "document_references": [],
+                    "imaging_studies": [],
+                    "care_teams": [],
+                    "medication_administrations": [],
                 },
             },
         )
@@ -2621,7 +2814,9 @@ class TestCompilePatientSummary:
 
         # Med should be REMOVED from Tier 2 PRESCRIBED (dedup)
         if result["tier2_recent_encounters"]:
-            prescribed = result["tier2_recent_encounters"][0]["events"].get("PRESCRIBED", [])
+            prescribed = result["tier2_recent_encounters"][0]["events"].get(
+                "PRESCRIBED", []
+            )
             med_ids = [m["id"] for m in prescribed]
             assert "med-1" not in med_ids
 
@@ -2630,12 +2825,14 @@ class TestCompilePatientSummary:
         """Completed immunizations should appear in tier1_immunizations."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
         await db_session.flush()
 
         imm = _make_immunization(fhir_id="imm-flu", display="Influenza Vaccine")
@@ -2653,12 +2850,14 @@ class TestCompilePatientSummary:
         """Recently resolved conditions should appear when present."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
 
         # Resolved condition within 6 months
         resolved_cond = _make_condition(
@@ -2667,12 +2866,14 @@ class TestCompilePatientSummary:
             clinical_status="resolved",
             abatement_dt="2025-12-01T00:00:00Z",
         )
-        db_session.add(FhirResource(
-            fhir_id="cond-resolved",
-            resource_type="Condition",
-            patient_id=patient_id,
-            data=resolved_cond,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="cond-resolved",
+                resource_type="Condition",
+                patient_id=patient_id,
+                data=resolved_cond,
+            )
+        )
         await db_session.flush()
 
         mock_graph = _setup_mock_graph()
@@ -2683,19 +2884,23 @@ class TestCompilePatientSummary:
 
         assert "tier1_recently_resolved" in result
         assert len(result["tier1_recently_resolved"]) == 1
-        assert result["tier1_recently_resolved"][0]["condition"]["id"] == "cond-resolved"
+        assert (
+            result["tier1_recently_resolved"][0]["condition"]["id"] == "cond-resolved"
+        )
 
     @pytest.mark.asyncio
     async def test_old_resolved_conditions_excluded(self, db_session: AsyncSession):
         """Conditions resolved more than 6 months ago should be excluded."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
 
         # Resolved condition > 6 months ago
         old_resolved = _make_condition(
@@ -2704,12 +2909,14 @@ class TestCompilePatientSummary:
             clinical_status="resolved",
             abatement_dt="2024-01-01T00:00:00Z",
         )
-        db_session.add(FhirResource(
-            fhir_id="cond-old",
-            resource_type="Condition",
-            patient_id=patient_id,
-            data=old_resolved,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="cond-old",
+                resource_type="Condition",
+                patient_id=patient_id,
+                data=old_resolved,
+            )
+        )
         await db_session.flush()
 
         mock_graph = _setup_mock_graph()
@@ -2725,20 +2932,26 @@ class TestCompilePatientSummary:
         """Tier 2 should include encounter events grouped by relationship."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
 
-        encounter = _make_encounter(fhir_id="enc-recent", period_start="2026-01-20T10:00:00Z")
-        db_session.add(FhirResource(
-            fhir_id="enc-recent",
-            resource_type="Encounter",
-            patient_id=patient_id,
-            data=encounter,
-        ))
+        encounter = _make_encounter(
+            fhir_id="enc-recent", period_start="2026-01-20T10:00:00Z"
+        )
+        db_session.add(
+            FhirResource(
+                fhir_id="enc-recent",
+                resource_type="Encounter",
+                patient_id=patient_id,
+                data=encounter,
+            )
+        )
         await db_session.flush()
 
         diagnosed_cond = _make_condition(fhir_id="cond-diagnosed")
@@ -2778,34 +2991,45 @@ class TestCompilePatientSummary:
         """Clinical notes from encounter DocumentReferences should be in Tier 2."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
 
-        encounter = _make_encounter(fhir_id="enc-1", period_start="2026-01-20T10:00:00Z")
-        db_session.add(FhirResource(
-            fhir_id="enc-1",
-            resource_type="Encounter",
-            patient_id=patient_id,
-            data=encounter,
-        ))
+        encounter = _make_encounter(
+            fhir_id="enc-1", period_start="2026-01-20T10:00:00Z"
+        )
+        db_session.add(
+            FhirResource(
+                fhir_id="enc-1",
+                resource_type="Encounter",
+                patient_id=patient_id,
+                data=encounter,
+            )
+        )
         await db_session.flush()
 
         doc_ref = _make_document_reference(
-            fhir_id="doc-1",
-            note_text="Patient stable. Continue medications."
+            fhir_id="doc-1", note_text="Patient stable. Continue medications."
         )
 
         encounter_events = {
             "enc-1": {
-                "conditions": [], "medications": [], "observations": [],
-                "procedures": [], "diagnostic_reports": [], "immunizations": [],
+                "conditions": [],
+                "medications": [],
+                "observations": [],
+                "procedures": [],
+                "diagnostic_reports": [],
+                "immunizations": [],
                 "care_plans": [],
                 "document_references": [doc_ref],
-                "imaging_studies": [], "care_teams": [], "medication_administrations": [],
+                "imaging_studies": [],
+                "care_teams": [],
+                "medication_administrations": [],
             },
         }
 
@@ -2832,22 +3056,26 @@ class TestCompilePatientSummary:
         """Tier 3 should contain latest observations by category."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
 
         obs = make_observation(
             "2345-7", "laboratory", "2024-06-15T10:00:00Z", 110.0, fhir_id="obs-glucose"
         )
-        db_session.add(FhirResource(
-            fhir_id="obs-glucose",
-            resource_type="Observation",
-            patient_id=patient_id,
-            data=obs,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="obs-glucose",
+                resource_type="Observation",
+                patient_id=patient_id,
+                data=obs,
+            )
+        )
         await db_session.flush()
 
         mock_graph = _setup_mock_graph()
@@ -2864,20 +3092,24 @@ class TestCompilePatientSummary:
         """Care plans not linked to conditions should be standalone in tier1_care_plans."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
 
         care_plan = _make_care_plan(fhir_id="cp-standalone", title="Wellness Plan")
-        db_session.add(FhirResource(
-            fhir_id="cp-standalone",
-            resource_type="CarePlan",
-            patient_id=patient_id,
-            data=care_plan,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="cp-standalone",
+                resource_type="CarePlan",
+                patient_id=patient_id,
+                data=care_plan,
+            )
+        )
         await db_session.flush()
 
         mock_graph = _setup_mock_graph()
@@ -2896,23 +3128,27 @@ class TestCompilePatientSummary:
         """Care plans linked to conditions should NOT appear in standalone care plans."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
 
         # Care plan linked to condition
         care_plan = _make_care_plan(
             fhir_id="cp-linked", title="HTN Management", addresses_ids=["cond-1"]
         )
-        db_session.add(FhirResource(
-            fhir_id="cp-linked",
-            resource_type="CarePlan",
-            patient_id=patient_id,
-            data=care_plan,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="cp-linked",
+                resource_type="CarePlan",
+                patient_id=patient_id,
+                data=care_plan,
+            )
+        )
         await db_session.flush()
 
         condition = _make_condition(fhir_id="cond-1", display="Hypertension")
@@ -2936,12 +3172,14 @@ class TestCompilePatientSummary:
         """Safety constraints should always be present with allergies and drug note."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
         await db_session.flush()
 
         allergy = _make_allergy(fhir_id="allergy-1", display="Penicillin")
@@ -2960,12 +3198,14 @@ class TestCompilePatientSummary:
         """Should accept patient_id as a string."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
         await db_session.flush()
 
         mock_graph = _setup_mock_graph()
@@ -2981,41 +3221,61 @@ class TestCompilePatientSummary:
         """Clinical notes for ALL Tier 2 encounters should be included, not just the last."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
 
         enc1 = _make_encounter(fhir_id="enc-1", period_start="2026-01-10T10:00:00Z")
         enc2 = _make_encounter(fhir_id="enc-2", period_start="2026-01-20T10:00:00Z")
         for enc in [enc1, enc2]:
-            db_session.add(FhirResource(
-                fhir_id=enc["id"],
-                resource_type="Encounter",
-                patient_id=patient_id,
-                data=enc,
-            ))
+            db_session.add(
+                FhirResource(
+                    fhir_id=enc["id"],
+                    resource_type="Encounter",
+                    patient_id=patient_id,
+                    data=enc,
+                )
+            )
         await db_session.flush()
 
-        doc1 = _make_document_reference(fhir_id="doc-1", note_text="Note from encounter 1.")
-        doc2 = _make_document_reference(fhir_id="doc-2", note_text="Note from encounter 2.")
+        doc1 = _make_document_reference(
+            fhir_id="doc-1", note_text="Note from encounter 1."
+        )
+        doc2 = _make_document_reference(
+            fhir_id="doc-2", note_text="Note from encounter 2."
+        )
 
         encounter_events = {
             "enc-1": {
-                "conditions": [], "medications": [], "observations": [],
-                "procedures": [], "diagnostic_reports": [], "immunizations": [],
+                "conditions": [],
+                "medications": [],
+                "observations": [],
+                "procedures": [],
+                "diagnostic_reports": [],
+                "immunizations": [],
                 "care_plans": [],
                 "document_references": [doc1],
-                "imaging_studies": [], "care_teams": [], "medication_administrations": [],
+                "imaging_studies": [],
+                "care_teams": [],
+                "medication_administrations": [],
             },
             "enc-2": {
-                "conditions": [], "medications": [], "observations": [],
-                "procedures": [], "diagnostic_reports": [], "immunizations": [],
+                "conditions": [],
+                "medications": [],
+                "observations": [],
+                "procedures": [],
+                "diagnostic_reports": [],
+                "immunizations": [],
                 "care_plans": [],
                 "document_references": [doc2],
-                "imaging_studies": [], "care_teams": [], "medication_administrations": [],
+                "imaging_studies": [],
+                "care_teams": [],
+                "medication_administrations": [],
             },
         }
 
@@ -3033,7 +3293,9 @@ class TestCompilePatientSummary:
         for enc_entry in result["tier2_recent_encounters"]:
             assert "clinical_notes" not in enc_entry
             documented = enc_entry["events"].get("DOCUMENTED", [])
-            all_notes.extend(d["clinical_note"] for d in documented if "clinical_note" in d)
+            all_notes.extend(
+                d["clinical_note"] for d in documented if "clinical_note" in d
+            )
         assert len(all_notes) == 2
 
     @pytest.mark.asyncio
@@ -3056,12 +3318,14 @@ class TestCompilePatientSummary:
         """Should default to today's date when compilation_date is None."""
         patient_id = uuid.uuid4()
         patient = _make_patient_resource()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient,
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient,
+            )
+        )
         await db_session.flush()
 
         mock_graph = _setup_mock_graph()
@@ -3085,13 +3349,15 @@ class TestCompileAndStore:
         """Should persist compiled_summary and compiled_at on Patient row."""
         patient_id = uuid.uuid4()
         patient_data = _make_patient_resource()
-        db_session.add(FhirResource(
-            id=patient_id,
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=patient_data,
-        ))
+        db_session.add(
+            FhirResource(
+                id=patient_id,
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=patient_data,
+            )
+        )
         await db_session.flush()
 
         mock_graph = _setup_mock_graph()
@@ -3102,30 +3368,28 @@ class TestCompileAndStore:
         assert "patient_orientation" in result
         assert "compilation_date" in result
 
-        # Verify it was persisted on the Patient row
-        from sqlalchemy import select as sa_select
-        row = await db_session.execute(
-            sa_select(FhirResource).where(
-                FhirResource.patient_id == patient_id,
-                FhirResource.resource_type == "Patient",
-            )
+        # Verify it was persisted for the Patient row
+        stored = await db_session.get(PatientSummary, patient_id)
+        assert stored is not None
+        assert (
+            stored.compiled_summary["patient_orientation"]
+            == result["patient_orientation"]
         )
-        patient_row = row.scalar_one()
-        assert patient_row.compiled_summary is not None
-        assert patient_row.compiled_summary["patient_orientation"] == result["patient_orientation"]
-        assert patient_row.compiled_at is not None
+        assert stored.compiled_at is not None
 
     @pytest.mark.asyncio
     async def test_accepts_string_patient_id(self, db_session: AsyncSession):
         """Should accept patient_id as string and convert to UUID."""
         patient_id = uuid.uuid4()
-        db_session.add(FhirResource(
-            id=patient_id,
-            fhir_id="patient-str",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=_make_patient_resource(fhir_id="patient-str"),
-        ))
+        db_session.add(
+            FhirResource(
+                id=patient_id,
+                fhir_id="patient-str",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=_make_patient_resource(fhir_id="patient-str"),
+            )
+        )
         await db_session.flush()
 
         mock_graph = _setup_mock_graph()
@@ -3143,14 +3407,16 @@ class TestCompileAndStore:
     async def test_overwrites_existing_summary(self, db_session: AsyncSession):
         """Re-compilation should overwrite existing compiled_summary."""
         patient_id = uuid.uuid4()
-        db_session.add(FhirResource(
-            id=patient_id,
-            fhir_id="patient-overwrite",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=_make_patient_resource(fhir_id="patient-overwrite"),
-            compiled_summary={"old": "summary"},
-        ))
+        db_session.add(
+            FhirResource(
+                id=patient_id,
+                fhir_id="patient-overwrite",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=_make_patient_resource(fhir_id="patient-overwrite"),
+                compiled_summary={"old": "summary"},
+            )
+        )
         await db_session.flush()
 
         mock_graph = _setup_mock_graph()
@@ -3160,16 +3426,9 @@ class TestCompileAndStore:
         assert "old" not in result
         assert "patient_orientation" in result
 
-        from sqlalchemy import select as sa_select
-        row = await db_session.execute(
-            sa_select(FhirResource).where(
-                FhirResource.patient_id == patient_id,
-                FhirResource.resource_type == "Patient",
-            )
-        )
-        patient_row = row.scalar_one()
-        assert "old" not in patient_row.compiled_summary
-        assert patient_row.compiled_summary["patient_orientation"] == result["patient_orientation"]
+        stored = await get_compiled_summary(patient_id, db_session)
+        assert "old" not in stored
+        assert stored["patient_orientation"] == result["patient_orientation"]
 
 
 # =============================================================================
@@ -3184,15 +3443,20 @@ class TestGetCompiledSummary:
     async def test_returns_stored_summary(self, db_session: AsyncSession):
         """Should return the stored compiled_summary dict."""
         patient_id = uuid.uuid4()
-        summary_data = {"patient_orientation": "Jane Doe", "compilation_date": "2026-02-05"}
-        db_session.add(FhirResource(
-            id=patient_id,
-            fhir_id="patient-get",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=_make_patient_resource(fhir_id="patient-get"),
-            compiled_summary=summary_data,
-        ))
+        summary_data = {
+            "patient_orientation": "Jane Doe",
+            "compilation_date": "2026-02-05",
+        }
+        db_session.add(
+            FhirResource(
+                id=patient_id,
+                fhir_id="patient-get",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=_make_patient_resource(fhir_id="patient-get"),
+                compiled_summary=summary_data,
+            )
+        )
         await db_session.flush()
 
         result = await get_compiled_summary(patient_id, db_session)
@@ -3203,13 +3467,15 @@ class TestGetCompiledSummary:
     async def test_returns_none_when_not_compiled(self, db_session: AsyncSession):
         """Should return None if compiled_summary is NULL."""
         patient_id = uuid.uuid4()
-        db_session.add(FhirResource(
-            id=patient_id,
-            fhir_id="patient-null",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=_make_patient_resource(fhir_id="patient-null"),
-        ))
+        db_session.add(
+            FhirResource(
+                id=patient_id,
+                fhir_id="patient-null",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=_make_patient_resource(fhir_id="patient-null"),
+            )
+        )
         await db_session.flush()
 
         result = await get_compiled_summary(patient_id, db_session)
@@ -3226,14 +3492,16 @@ class TestGetCompiledSummary:
         """Should accept patient_id as string and convert to UUID."""
         patient_id = uuid.uuid4()
         summary_data = {"test": True}
-        db_session.add(FhirResource(
-            id=patient_id,
-            fhir_id="patient-str-get",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=_make_patient_resource(fhir_id="patient-str-get"),
-            compiled_summary=summary_data,
-        ))
+        db_session.add(
+            FhirResource(
+                id=patient_id,
+                fhir_id="patient-str-get",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=_make_patient_resource(fhir_id="patient-str-get"),
+                compiled_summary=summary_data,
+            )
+        )
         await db_session.flush()
 
         result = await get_compiled_summary(str(patient_id), db_session)
@@ -3253,13 +3521,15 @@ class TestOnDemandFallback:
     async def test_fallback_compiles_when_none(self, db_session: AsyncSession):
         """When get_compiled_summary returns None, compile_and_store as fallback."""
         patient_id = uuid.uuid4()
-        db_session.add(FhirResource(
-            id=patient_id,
-            fhir_id="patient-fallback",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=_make_patient_resource(fhir_id="patient-fallback"),
-        ))
+        db_session.add(
+            FhirResource(
+                id=patient_id,
+                fhir_id="patient-fallback",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=_make_patient_resource(fhir_id="patient-fallback"),
+            )
+        )
         await db_session.flush()
 
         # First: no compiled summary
@@ -3281,15 +3551,20 @@ class TestOnDemandFallback:
     async def test_no_fallback_when_already_compiled(self, db_session: AsyncSession):
         """When get_compiled_summary returns a value, no fallback needed."""
         patient_id = uuid.uuid4()
-        existing_summary = {"patient_orientation": "Pre-compiled", "compilation_date": "2026-01-01"}
-        db_session.add(FhirResource(
-            id=patient_id,
-            fhir_id="patient-precompiled",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=_make_patient_resource(fhir_id="patient-precompiled"),
-            compiled_summary=existing_summary,
-        ))
+        existing_summary = {
+            "patient_orientation": "Pre-compiled",
+            "compilation_date": "2026-01-01",
+        }
+        db_session.add(
+            FhirResource(
+                id=patient_id,
+                fhir_id="patient-precompiled",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=_make_patient_resource(fhir_id="patient-precompiled"),
+                compiled_summary=existing_summary,
+            )
+        )
         await db_session.flush()
 
         summary = await get_compiled_summary(patient_id, db_session)
@@ -3360,40 +3635,76 @@ class TestDedupByCode:
     def test_dedup_medications_by_rxnorm(self):
         """Should keep only the newest medication per RxNorm code."""
         meds = [
-            _make_med_request(fhir_id="med-old", rxnorm_code="860975", display="Metformin", authored_on="2025-01-01"),
-            _make_med_request(fhir_id="med-new", rxnorm_code="860975", display="Metformin", authored_on="2025-06-01"),
+            _make_med_request(
+                fhir_id="med-old",
+                rxnorm_code="860975",
+                display="Metformin",
+                authored_on="2025-01-01",
+            ),
+            _make_med_request(
+                fhir_id="med-new",
+                rxnorm_code="860975",
+                display="Metformin",
+                authored_on="2025-06-01",
+            ),
         ]
-        result = _dedup_by_code(meds, "medicationCodeableConcept", sort_key="authoredOn", sort_reverse=True)
+        result = _dedup_by_code(
+            meds, "medicationCodeableConcept", sort_key="authoredOn", sort_reverse=True
+        )
         assert len(result) == 1
         assert result[0]["id"] == "med-new"
 
     def test_dedup_immunizations_by_cvx(self):
         """Should keep only the newest immunization per CVX code."""
         imms = [
-            _make_immunization(fhir_id="imm-old", cvx_code="140", display="Flu", occurrence_dt="2024-10-01"),
-            _make_immunization(fhir_id="imm-new", cvx_code="140", display="Flu", occurrence_dt="2025-10-01"),
+            _make_immunization(
+                fhir_id="imm-old",
+                cvx_code="140",
+                display="Flu",
+                occurrence_dt="2024-10-01",
+            ),
+            _make_immunization(
+                fhir_id="imm-new",
+                cvx_code="140",
+                display="Flu",
+                occurrence_dt="2025-10-01",
+            ),
         ]
-        result = _dedup_by_code(imms, "vaccineCode", sort_key="occurrenceDateTime", sort_reverse=True)
+        result = _dedup_by_code(
+            imms, "vaccineCode", sort_key="occurrenceDateTime", sort_reverse=True
+        )
         assert len(result) == 1
         assert result[0]["id"] == "imm-new"
 
     def test_dedup_conditions_by_snomed(self):
         """Should keep only the newest condition per SNOMED code."""
         conds = [
-            _make_condition(fhir_id="cond-old", snomed_code="44054006", onset_dt="2020-01-01"),
-            _make_condition(fhir_id="cond-new", snomed_code="44054006", onset_dt="2024-01-01"),
+            _make_condition(
+                fhir_id="cond-old", snomed_code="44054006", onset_dt="2020-01-01"
+            ),
+            _make_condition(
+                fhir_id="cond-new", snomed_code="44054006", onset_dt="2024-01-01"
+            ),
         ]
-        result = _dedup_by_code(conds, "code", sort_key="onsetDateTime", sort_reverse=True)
+        result = _dedup_by_code(
+            conds, "code", sort_key="onsetDateTime", sort_reverse=True
+        )
         assert len(result) == 1
         assert result[0]["id"] == "cond-new"
 
     def test_keeps_different_codes(self):
         """Should keep resources with different codes."""
         meds = [
-            _make_med_request(fhir_id="med-a", rxnorm_code="860975", display="Metformin"),
-            _make_med_request(fhir_id="med-b", rxnorm_code="316049", display="Lisinopril"),
+            _make_med_request(
+                fhir_id="med-a", rxnorm_code="860975", display="Metformin"
+            ),
+            _make_med_request(
+                fhir_id="med-b", rxnorm_code="316049", display="Lisinopril"
+            ),
         ]
-        result = _dedup_by_code(meds, "medicationCodeableConcept", sort_key="authoredOn")
+        result = _dedup_by_code(
+            meds, "medicationCodeableConcept", sort_key="authoredOn"
+        )
         assert len(result) == 2
 
     def test_empty_list(self):
@@ -3423,10 +3734,16 @@ class TestDedupByCode:
     def test_display_fallback_dedup(self):
         """Should dedup by display when no code is present."""
         meds = [
-            _make_med_request(fhir_id="med-a", display="Aspirin", authored_on="2025-01-01"),
-            _make_med_request(fhir_id="med-b", display="Aspirin", authored_on="2025-06-01"),
+            _make_med_request(
+                fhir_id="med-a", display="Aspirin", authored_on="2025-01-01"
+            ),
+            _make_med_request(
+                fhir_id="med-b", display="Aspirin", authored_on="2025-06-01"
+            ),
         ]
-        result = _dedup_by_code(meds, "medicationCodeableConcept", sort_key="authoredOn", sort_reverse=True)
+        result = _dedup_by_code(
+            meds, "medicationCodeableConcept", sort_key="authoredOn", sort_reverse=True
+        )
         assert len(result) == 1
         assert result[0]["id"] == "med-b"
 
@@ -3443,17 +3760,29 @@ class TestCompilePatientSummaryDedup:
     async def test_duplicate_meds_deduped_in_conditions(self, db_session: AsyncSession):
         """Treating medications with same RxNorm code should be deduped, keeping newest."""
         patient_id = uuid.uuid4()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=_make_patient_resource(),
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=_make_patient_resource(),
+            )
+        )
         await db_session.flush()
 
         condition = _make_condition(fhir_id="cond-1")
-        med_old = _make_med_request(fhir_id="med-old", rxnorm_code="860975", display="Metformin", authored_on="2024-01-01")
-        med_new = _make_med_request(fhir_id="med-new", rxnorm_code="860975", display="Metformin", authored_on="2025-06-01")
+        med_old = _make_med_request(
+            fhir_id="med-old",
+            rxnorm_code="860975",
+            display="Metformin",
+            authored_on="2024-01-01",
+        )
+        med_new = _make_med_request(
+            fhir_id="med-new",
+            rxnorm_code="860975",
+            display="Metformin",
+            authored_on="2025-06-01",
+        )
 
         mock_graph = _setup_mock_graph(
             conditions=[condition],
@@ -3461,7 +3790,9 @@ class TestCompilePatientSummaryDedup:
             treating_meds={"cond-1": [med_old, med_new]},
         )
 
-        result = await compile_patient_summary(patient_id, mock_graph, db_session, date(2026, 2, 5))
+        result = await compile_patient_summary(
+            patient_id, mock_graph, db_session, date(2026, 2, 5)
+        )
 
         cond_entry = result["tier1_active_conditions"][0]
         assert len(cond_entry["treating_medications"]) == 1
@@ -3471,20 +3802,28 @@ class TestCompilePatientSummaryDedup:
     async def test_duplicate_immunizations_deduped(self, db_session: AsyncSession):
         """Immunizations with same CVX code should be deduped, keeping newest."""
         patient_id = uuid.uuid4()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=_make_patient_resource(),
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=_make_patient_resource(),
+            )
+        )
         await db_session.flush()
 
-        imm_old = _make_immunization(fhir_id="imm-old", cvx_code="140", display="Flu", occurrence_dt="2024-10-01")
-        imm_new = _make_immunization(fhir_id="imm-new", cvx_code="140", display="Flu", occurrence_dt="2025-10-01")
+        imm_old = _make_immunization(
+            fhir_id="imm-old", cvx_code="140", display="Flu", occurrence_dt="2024-10-01"
+        )
+        imm_new = _make_immunization(
+            fhir_id="imm-new", cvx_code="140", display="Flu", occurrence_dt="2025-10-01"
+        )
 
         mock_graph = _setup_mock_graph(immunizations=[imm_old, imm_new])
 
-        result = await compile_patient_summary(patient_id, mock_graph, db_session, date(2026, 2, 5))
+        result = await compile_patient_summary(
+            patient_id, mock_graph, db_session, date(2026, 2, 5)
+        )
 
         assert len(result["tier1_immunizations"]) == 1
         assert result["tier1_immunizations"][0]["id"] == "imm-new"
@@ -3493,20 +3832,34 @@ class TestCompilePatientSummaryDedup:
     async def test_duplicate_conditions_deduped(self, db_session: AsyncSession):
         """Conditions with same SNOMED code should be deduped, keeping newest onset."""
         patient_id = uuid.uuid4()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=_make_patient_resource(),
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=_make_patient_resource(),
+            )
+        )
         await db_session.flush()
 
-        cond_old = _make_condition(fhir_id="cond-old", snomed_code="44054006", display="Diabetes", onset_dt="2020-01-01")
-        cond_new = _make_condition(fhir_id="cond-new", snomed_code="44054006", display="Diabetes", onset_dt="2024-01-01")
+        cond_old = _make_condition(
+            fhir_id="cond-old",
+            snomed_code="44054006",
+            display="Diabetes",
+            onset_dt="2020-01-01",
+        )
+        cond_new = _make_condition(
+            fhir_id="cond-new",
+            snomed_code="44054006",
+            display="Diabetes",
+            onset_dt="2024-01-01",
+        )
 
         mock_graph = _setup_mock_graph(conditions=[cond_old, cond_new])
 
-        result = await compile_patient_summary(patient_id, mock_graph, db_session, date(2026, 2, 5))
+        result = await compile_patient_summary(
+            patient_id, mock_graph, db_session, date(2026, 2, 5)
+        )
 
         assert len(result["tier1_active_conditions"]) == 1
         assert result["tier1_active_conditions"][0]["condition"]["id"] == "cond-new"
@@ -3515,21 +3868,39 @@ class TestCompilePatientSummaryDedup:
     async def test_allergies_sorted_by_criticality(self, db_session: AsyncSession):
         """Allergies should be sorted by criticality: high, low, unable-to-assess."""
         patient_id = uuid.uuid4()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=_make_patient_resource(),
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=_make_patient_resource(),
+            )
+        )
         await db_session.flush()
 
-        allergy_low = _make_allergy(fhir_id="al-low", display="Dust", allergy_code="A1", criticality="low")
-        allergy_high = _make_allergy(fhir_id="al-high", display="Penicillin", allergy_code="A2", criticality="high")
-        allergy_unknown = _make_allergy(fhir_id="al-unk", display="Latex", allergy_code="A3", criticality="unable-to-assess")
+        allergy_low = _make_allergy(
+            fhir_id="al-low", display="Dust", allergy_code="A1", criticality="low"
+        )
+        allergy_high = _make_allergy(
+            fhir_id="al-high",
+            display="Penicillin",
+            allergy_code="A2",
+            criticality="high",
+        )
+        allergy_unknown = _make_allergy(
+            fhir_id="al-unk",
+            display="Latex",
+            allergy_code="A3",
+            criticality="unable-to-assess",
+        )
 
-        mock_graph = _setup_mock_graph(allergies=[allergy_low, allergy_high, allergy_unknown])
+        mock_graph = _setup_mock_graph(
+            allergies=[allergy_low, allergy_high, allergy_unknown]
+        )
 
-        result = await compile_patient_summary(patient_id, mock_graph, db_session, date(2026, 2, 5))
+        result = await compile_patient_summary(
+            patient_id, mock_graph, db_session, date(2026, 2, 5)
+        )
 
         allergy_ids = [a["id"] for a in result["tier1_allergies"]]
         assert allergy_ids == ["al-high", "al-low", "al-unk"]
@@ -3538,20 +3909,28 @@ class TestCompilePatientSummaryDedup:
     async def test_duplicate_allergies_deduped(self, db_session: AsyncSession):
         """Allergies with same code should be deduped."""
         patient_id = uuid.uuid4()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=_make_patient_resource(),
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=_make_patient_resource(),
+            )
+        )
         await db_session.flush()
 
-        allergy1 = _make_allergy(fhir_id="al-1", display="Penicillin", allergy_code="7980")
-        allergy2 = _make_allergy(fhir_id="al-2", display="Penicillin", allergy_code="7980")
+        allergy1 = _make_allergy(
+            fhir_id="al-1", display="Penicillin", allergy_code="7980"
+        )
+        allergy2 = _make_allergy(
+            fhir_id="al-2", display="Penicillin", allergy_code="7980"
+        )
 
         mock_graph = _setup_mock_graph(allergies=[allergy1, allergy2])
 
-        result = await compile_patient_summary(patient_id, mock_graph, db_session, date(2026, 2, 5))
+        result = await compile_patient_summary(
+            patient_id, mock_graph, db_session, date(2026, 2, 5)
+        )
 
         assert len(result["tier1_allergies"]) == 1
 
@@ -3559,16 +3938,22 @@ class TestCompilePatientSummaryDedup:
     async def test_care_plan_cross_condition_dedup(self, db_session: AsyncSession):
         """A care plan shared by two conditions should only appear under the first."""
         patient_id = uuid.uuid4()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=_make_patient_resource(),
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=_make_patient_resource(),
+            )
+        )
         await db_session.flush()
 
-        cond1 = _make_condition(fhir_id="cond-1", snomed_code="38341003", display="Hypertension")
-        cond2 = _make_condition(fhir_id="cond-2", snomed_code="44054006", display="Diabetes")
+        cond1 = _make_condition(
+            fhir_id="cond-1", snomed_code="38341003", display="Hypertension"
+        )
+        cond2 = _make_condition(
+            fhir_id="cond-2", snomed_code="44054006", display="Diabetes"
+        )
         shared_cp = _make_care_plan(fhir_id="cp-shared", title="Lifestyle Plan")
 
         mock_graph = _setup_mock_graph(
@@ -3579,7 +3964,9 @@ class TestCompilePatientSummaryDedup:
             },
         )
 
-        result = await compile_patient_summary(patient_id, mock_graph, db_session, date(2026, 2, 5))
+        result = await compile_patient_summary(
+            patient_id, mock_graph, db_session, date(2026, 2, 5)
+        )
 
         # Care plan should appear under first condition only
         cond1_cps = result["tier1_active_conditions"][0]["care_plans"]
@@ -3592,24 +3979,38 @@ class TestCompilePatientSummaryDedup:
     async def test_unlinked_meds_deduped(self, db_session: AsyncSession):
         """Truly unlinked meds should be deduped by RxNorm code."""
         patient_id = uuid.uuid4()
-        db_session.add(FhirResource(
-            fhir_id="patient-1",
-            resource_type="Patient",
-            patient_id=patient_id,
-            data=_make_patient_resource(),
-        ))
+        db_session.add(
+            FhirResource(
+                fhir_id="patient-1",
+                resource_type="Patient",
+                patient_id=patient_id,
+                data=_make_patient_resource(),
+            )
+        )
         await db_session.flush()
 
         # Two meds with same RxNorm, no condition link
-        med_old = _make_med_request(fhir_id="med-old", rxnorm_code="860975", display="Metformin", authored_on="2024-01-01")
-        med_new = _make_med_request(fhir_id="med-new", rxnorm_code="860975", display="Metformin", authored_on="2025-06-01")
+        med_old = _make_med_request(
+            fhir_id="med-old",
+            rxnorm_code="860975",
+            display="Metformin",
+            authored_on="2024-01-01",
+        )
+        med_new = _make_med_request(
+            fhir_id="med-new",
+            rxnorm_code="860975",
+            display="Metformin",
+            authored_on="2025-06-01",
+        )
 
         mock_graph = _setup_mock_graph(
             medications=[med_old, med_new],
             # No treating_meds — both are unlinked
         )
 
-        result = await compile_patient_summary(patient_id, mock_graph, db_session, date(2026, 2, 5))
+        result = await compile_patient_summary(
+            patient_id, mock_graph, db_session, date(2026, 2, 5)
+        )
 
         # active_meds_raw is deduped, so only one ends up unlinked
         assert len(result["tier1_unlinked_medications"]) == 1
@@ -8,11 +8,14 @@ import pytest
 import pytest_asyncio
 from fastapi import FastAPI
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy.dialects import postgresql
 
 from app.auth import verify_bearer_token
 from app.database import get_db
 from app.models import FhirResource
 from app.routes.data import (
+    ACTIVE_CONDITION_STATUSES,
+    ACTIVE_MEDICATION_STATUSES,
     TIMELINE_RESOURCE_TYPES,
     _extract_date_from_resource,
     _get_clinical_status,
@@ -21,7 +24,6 @@ from app.routes.data import (
 )
 from tests.conftest import stub_verify_bearer_token
 
-
 # =============================================================================
 # Test Fixtures
 # =============================================================================
@@ -390,7 +392,9 @@ class TestGetPatientLabs:
             mock_result = MagicMock()
             if call_count == 1:  # Patient query
                 mock_result.scalar_one_or_none.return_value = patient_resource
-            else:  # Observations query
+            elif call_count == 2:  # Count query
+                mock_result.scalar_one.return_value = 1
+            else:  # Observations page query
                 mock_scalars = MagicMock()
                 mock_scalars.all.return_value = [obs_resource]
                 mock_result.scalars.return_value = mock_scalars
@@ -438,7 +442,9 @@ class TestGetPatientMedications:
             mock_result = MagicMock()
             if call_count == 1:
                 mock_result.scalar_one_or_none.return_value = patient_resource
-            else:
+            elif call_count == 2:  # Count query
+                mock_result.scalar_one.return_value = 1
+            else:  # Page query
                 mock_scalars = MagicMock()
                 mock_scalars.all.return_value = [med_resource]
                 mock_result.scalars.return_value = mock_scalars
@@ -457,7 +463,11 @@ class TestGetPatientMedications:
 
     @pytest.mark.asyncio
     async def test_medications_filters_active_only(
-        self, data_client, sample_patient_data, sample_medication_data, sample_medication_stopped
+        self,
+        data_client,
+        sample_patient_data,
+        sample_medication_data,
+        sample_medication_stopped,
     ):
         """Medications endpoint should filter to active only when status=active."""
         client, mock_db = data_client
@@ -467,9 +477,6 @@ class TestGetPatientMedications:
         active_med = _make_fhir_resource(
             "MedicationRequest", "med1", sample_medication_data, patient_id
         )
-        stopped_med = _make_fhir_resource(
-            "MedicationRequest", "med2", sample_medication_stopped, patient_id
-        )
 
         call_count = 0
 
@@ -479,9 +486,11 @@ class TestGetPatientMedications:
             mock_result = MagicMock()
             if call_count == 1:
                 mock_result.scalar_one_or_none.return_value = patient_resource
-            else:
+            elif call_count == 2:  # Count query
+                mock_result.scalar_one.return_value = 1
+            else:  # Page query
                 mock_scalars = MagicMock()
-                mock_scalars.all.return_value = [active_med, stopped_med]
+                mock_scalars.all.return_value = [active_med]
                 mock_result.scalars.return_value = mock_scalars
             return mock_result
 
@@ -496,6 +505,12 @@ class TestGetPatientMedications:
         data = response.json()
         assert data["total"] == 1
         assert data["items"][0]["data"]["status"] == "active"
+        # The status filter is applied in SQL, on the projection's status
+        page_stmt = mock_db.execute.call_args_list[2].args[0]
+        params = page_stmt.compile(dialect=postgresql.dialect()).params
+        assert set(params["status_1"]) == ACTIVE_MEDICATION_STATUSES
+        # so the stopped med is excluded by the query, not returned
+        assert sample_medication_stopped["status"] not in params["status_1"]
 
 
 # =============================================================================
@@ -527,7 +542,9 @@ class TestGetPatientConditions:
             mock_result = MagicMock()
             if call_count == 1:
                 mock_result.scalar_one_or_none.return_value = patient_resource
-            else:
+            elif call_count == 2:  # Count query
+                mock_result.scalar_one.return_value = 1
+            else:  # Page query
                 mock_scalars = MagicMock()
                 mock_scalars.all.return_value = [cond_resource]
                 mock_result.scalars.return_value = mock_scalars
@@ -546,7 +563,11 @@ class TestGetPatientConditions:
 
     @pytest.mark.asyncio
     async def test_conditions_filters_active_only(
-        self, data_client, sample_patient_data, sample_condition_data, sample_condition_inactive
+        self,
+        data_client,
+        sample_patient_data,
+        sample_condition_data,
+        sample_condition_inactive,
     ):
         """Conditions endpoint should filter to active only when status=active."""
         client, mock_db = data_client
@@ -556,9 +577,6 @@ class TestGetPatientConditions:
         active_cond = _make_fhir_resource(
             "Condition", "cond1", sample_condition_data, patient_id
         )
-        inactive_cond = _make_fhir_resource(
-            "Condition", "cond2", sample_condition_inactive, patient_id
-        )
 
         call_count = 0
 
@@ -568,9 +586,11 @@ class TestGetPatientConditions:
             mock_result = MagicMock()
             if call_count == 1:
                 mock_result.scalar_one_or_none.return_value = patient_resource
-            else:
+            elif call_count == 2:  # Count query
+                mock_result.scalar_one.return_value = 1
+            else:  # Page query
                 mock_scalars = MagicMock()
-                mock_scalars.all.return_value = [active_cond, inactive_cond]
+                mock_scalars.all.return_value = [active_cond]
                 mock_result.scalars.return_value = mock_scalars
             return mock_result
 
@@ -584,6 +604,13 @@ class TestGetPatientConditions:
         assert response.status_code == 200
         data = response.json()
         assert data["total"] == 1
+        page_stmt = mock_db.execute.call_args_list[2].args[0]
+        params = page_stmt.compile(dialect=postgresql.dialect()).params
+        assert set(params["clinical_status_1"]) == ACTIVE_CONDITION_STATUSES
+        inactive_status = sample_condition_inactive["clinicalStatus"]["coding"][0][
+            "code"
+        ]
+        assert inactive_status not in params["clinical_status_1"]
 
 
 # =============================================================================
@@ -721,7 +748,11 @@ class TestGetPatientTimeline:
 
     @pytest.mark.asyncio
     async def test_timeline_pagination(
-        self, data_client, sample_patient_data, sample_encounter_data, sample_condition_data
+        self,
+        data_client,
+        sample_patient_data,
+        sample_encounter_data,
+        sample_condition_data,
     ):
         """Timeline should support pagination."""
         client, mock_db = data_client
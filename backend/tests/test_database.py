@@ -6,7 +6,7 @@ from datetime import datetime, timezone
 import pytest
 
 from app.database import Base, async_session_maker, engine
-from app.models import FhirResource
+from app.models import FhirResource, PatientSummary
 
 
 class TestFhirResourceModel:
@@ -26,10 +26,10 @@ class TestFhirResourceModel:
             "patient_id",
             "data",
             "created_at",
-            "embedding",
+            "content_hash",
             "embedding_text",
-            "compiled_summary",
-            "compiled_at",
+            "search_vector",
+            "effective_date",
         }
         assert expected == column_names
 
@@ -41,10 +41,25 @@ class TestFhirResourceModel:
     def test_fhir_resource_indexes(self):
         """FhirResource should have required indexes."""
         index_names = {idx.name for idx in FhirResource.__table__.indexes}
-        # Should have composite index, GIN index, and HNSW embedding index
+        # Should have composite index and GIN index (vector indexes live on
+        # resource_embeddings)
         assert "idx_fhir_type_patient" in index_names
         assert "idx_fhir_data_gin" in index_names
-        assert "idx_fhir_embedding_hnsw" in index_names
+
+    def test_satellite_columns_are_not_on_fhir_resources(self):
+        """Embeddings and compiled summaries live in 1:1 satellite tables."""
+        column_names = {c.name for c in FhirResource.__table__.columns}
+        assert "embedding" not in column_names
+        assert "compiled_summary" not in column_names
+        assert {c.name for c in PatientSummary.__table__.columns} == {
+            "patient_id",
+            "compiled_summary",
+            "compiled_at",
+        }
+
+    def test_embedding_text_is_deferred(self):
+        """embedding_text is only loaded when accessed."""
+        assert FhirResource.embedding_text.property.deferred is True
 
     def test_fhir_resource_repr(self):
         """FhirResource repr should include key identifiers."""
@@ -79,11 +94,11 @@ class TestDatabaseSetup:
 
 
 class TestCompiledSummaryPersistence:
-    """Tests for compiled_summary and compiled_at column persistence."""
+    """Tests for compiled_summary and compiled_at persistence (patient_summaries)."""
 
     @pytest.mark.asyncio
     async def test_compiled_fields_default_to_none(self, db_session):
-        """FhirResource without compiled fields should default to None."""
+        """FhirResource without compiled fields has no summary row."""
         resource = FhirResource(
             fhir_id="patient-no-summary",
             resource_type="Patient",
@@ -92,9 +107,7 @@ class TestCompiledSummaryPersistence:
         db_session.add(resource)
         await db_session.commit()
 
-        reloaded = await db_session.get(FhirResource, resource.id)
-        assert reloaded.compiled_summary is None
-        assert reloaded.compiled_at is None
+        assert await db_session.get(PatientSummary, resource.id) is None
 
     @pytest.mark.asyncio
     async def test_compiled_fields_round_trip(self, db_session):
@@ -115,7 +128,9 @@ class TestCompiledSummaryPersistence:
         db_session.add(resource)
         await db_session.commit()
 
-        reloaded = await db_session.get(FhirResource, resource.id)
+        reloaded = await db_session.get(
+            PatientSummary, resource.id, populate_existing=True
+        )
         assert reloaded.compiled_summary == summary
         assert reloaded.compiled_at == compiled_time
 
@@ -0,0 +1,168 @@
+"""Tests for the persistent embedding cache."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.embedding_cache import (
+    EmbeddingCacheStats,
+    embed_text_cached,
+    embed_texts_cached,
+    embedding_cache_key,
+)
+
+MODEL = "text-embedding-3-small"
+
+
+def _service(vectors_for=lambda texts: [[float(len(t))] * 3 for t in texts]):
+    service = MagicMock()
+    service.model = MODEL
+    service.embed_texts = AsyncMock(side_effect=vectors_for)
+    return service
+
+
+def _db(cached: dict[str, list[float]] | None = None) -> MagicMock:
+    """Session whose first execute (the lookup) returns cached rows."""
+    cached = cached or {}
+    lookup = MagicMock()
+    lookup.all.return_value = [
+        MagicMock(key=key, embedding=vector) for key, vector in cached.items()
+    ]
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=lookup)
+    return db
+
+
+def _writer(error: Exception | None = None) -> MagicMock:
+    """Stand-in for the separate session that commits cache rows."""
+    writer = MagicMock()
+    writer.__aenter__ = AsyncMock(return_value=writer)
+    writer.__aexit__ = AsyncMock(return_value=False)
+    writer.execute = AsyncMock(side_effect=error)
+    writer.commit = AsyncMock()
+    return writer
+
+
+def _patch_writer(writer: MagicMock):
+    return patch("app.services.embedding_cache._cache_writer", return_value=writer)
+
+
+class TestEmbeddingCacheKey:
+    """Tests for cache key derivation."""
+
+    def test_key_is_stable(self):
+        assert embedding_cache_key(MODEL, "a") == embedding_cache_key(MODEL, "a")
+
+    def test_key_depends_on_model(self):
+        """The same text under another model is a different entry."""
+        assert embedding_cache_key(MODEL, "a") != embedding_cache_key("other", "a")
+
+    def test_key_is_sha256_hex(self):
+        assert len(embedding_cache_key(MODEL, "a")) == 64
+
+
+class TestEmbedTextsCached:
+    """Tests for cache lookups and fills."""
+
+    @pytest.mark.asyncio
+    async def test_misses_are_embedded_once_and_stored(self):
+        """Duplicate texts hit the API once; new vectors are inserted."""
+        db = _db()
+        writer = _writer()
+        service = _service()
+        stats = EmbeddingCacheStats()
+
+        with _patch_writer(writer):
+            result = await embed_texts_cached(db, service, ["ab", "abc", "ab"], stats)
+
+        assert result == [[2.0] * 3, [3.0] * 3, [2.0] * 3]
+        service.embed_texts.assert_awaited_once_with(["ab", "abc"])
+        # One lookup on the caller's session, one committed insert beside it
+        assert db.execute.await_count == 1
+        assert writer.execute.await_count == 1
+        writer.commit.assert_awaited_once()
+        assert stats.misses == 2
+        assert stats.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_write_still_returns_vectors(self):
+        """A cache write error costs reuse, not the caller's embeddings."""
+        db = _db()
+        writer = _writer(RuntimeError("deadlock detected"))
+
+        with _patch_writer(writer):
+            result = await embed_texts_cached(db, _service(), ["ab"])
+
+        assert result == [[2.0] * 3]
+        writer.commit.assert_not_awaited()
+        # Nothing was sent on the caller's session after the lookup
+        assert db.execute.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_hits_skip_the_api(self):
+        """Cached texts are served from the table; only misses are embedded."""
+        cached = {embedding_cache_key(MODEL, "cached"): [9.0, 9.0, 9.0]}
+        db = _db(cached)
+        service = _service()
+        stats = EmbeddingCacheStats()
+
+        with _patch_writer(_writer()):
+            result = await embed_texts_cached(db, service, ["cached", "new"], stats)
+
+        assert result == [[9.0, 9.0, 9.0], [3.0] * 3]
+        service.embed_texts.assert_awaited_once_with(["new"])
+        assert stats.hits == 1
+        assert stats.misses == 1
+        assert stats.hit_rate == 0.5
+
+    @pytest.mark.asyncio
+    async def test_all_hits_make_no_api_call_or_insert(self):
+        cached = {embedding_cache_key(MODEL, "x"): [1.0, 2.0, 3.0]}
+        db = _db(cached)
+        writer = _writer()
+        service = _service()
+
+        with _patch_writer(writer):
+            result = await embed_text_cached(db, service, "x")
+
+        assert result == [1.0, 2.0, 3.0]
+        service.embed_texts.assert_not_awaited()
+        assert db.execute.await_count == 1
+        writer.execute.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_numpy_vectors_are_returned_as_lists(self):
+        """pgvector returns numpy arrays; callers get plain lists."""
+        array = MagicMock()
+        array.tolist.return_value = [0.5, 0.5]
+        db = _db({embedding_cache_key(MODEL, "x"): array})
+
+        result = await embed_texts_cached(db, _service(), ["x"])
+
+        assert result == [[0.5, 0.5]]
+
+    @pytest.mark.asyncio
+    async def test_rejects_empty_input(self):
+        with pytest.raises(ValueError, match="cannot be empty"):
+            await embed_texts_cached(MagicMock(), _service(), [])
+
+    def test_hit_rate_without_traffic(self):
+        assert EmbeddingCacheStats().hit_rate == 0.0
+
+
+@pytest.mark.integration
+class TestEmbeddingCacheIntegration:
+    """Round trip against PostgreSQL."""
+
+    @pytest.mark.asyncio
+    async def test_second_call_is_served_from_table(self, db_session):
+        dims = 1536
+        service = _service(lambda texts: [[0.1] * dims for _ in texts])
+        stats = EmbeddingCacheStats()
+
+        first = await embed_texts_cached(db_session, service, ["Condition: A"], stats)
+        second = await embed_texts_cached(db_session, service, ["Condition: A"], stats)
+
+        assert service.embed_texts.await_count == 1
+        assert second[0] == pytest.approx(first[0])
+        assert stats.hits == 1
@@ -3,27 +3,37 @@
 Uses mock OpenAI client to avoid real API calls.
 """
 
-from unittest.mock import AsyncMock, MagicMock
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
+import openai
 import pytest
 
+from app.config import settings
 from app.services.embeddings import (
-    EmbeddingService,
-    EMBEDDING_DIMENSION,
     EMBEDDABLE_TYPES,
-    resource_to_text,
-    _template_condition,
-    _template_observation,
-    _template_medication_request,
+    EMBEDDING_DIMENSION,
+    MAX_RETRIES,
+    EmbeddingService,
+    LocalEmbeddingBackend,
+    OpenAIEmbeddingBackend,
+    TokenBucketLimiter,
     _template_allergy_intolerance,
-    _template_procedure,
-    _template_encounter,
+    _template_care_plan,
+    _template_condition,
     _template_diagnostic_report,
     _template_document_reference,
-    _template_care_plan,
+    _template_encounter,
+    _template_medication_request,
+    _template_observation,
+    _template_procedure,
+    _token_batches,
+    create_embedding_backend,
+    estimate_tokens,
+    resource_to_text,
 )
 
-
 # =============================================================================
 # Mock OpenAI Client
 # =============================================================================
@@ -62,9 +72,7 @@ class TestTemplateCondition:
         """Test templating a basic Condition resource."""
         resource = {
             "resourceType": "Condition",
-            "code": {
-                "coding": [{"display": "Type 2 Diabetes Mellitus"}]
-            },
+            "code": {"coding": [{"display": "Type 2 Diabetes Mellitus"}]},
             "clinicalStatus": {"coding": [{"code": "active"}]},
             "onsetDateTime": "2020-01-15",
         }
@@ -171,9 +179,7 @@ class TestTemplateMedicationRequest:
         """Test medication with dosage instructions."""
         resource = {
             "resourceType": "MedicationRequest",
-            "medicationCodeableConcept": {
-                "coding": [{"display": "Lisinopril 10 MG"}]
-            },
+            "medicationCodeableConcept": {"coding": [{"display": "Lisinopril 10 MG"}]},
             "status": "active",
             "dosageInstruction": [{"text": "Take once daily in the morning"}],
         }
@@ -704,3 +710,343 @@ class TestEmbeddingService:
 
         call_args = mock_client.embeddings.create.call_args
         assert call_args.kwargs["model"] == custom_model
+
+
+# =============================================================================
+# Concurrency, Rate Limiting and Retry Tests
+# =============================================================================
+
+
+def _echo_client(delay_for=None) -> AsyncMock:
+    """Mock client whose embeddings encode each input's numeric suffix."""
+    client = AsyncMock()
+    state = {"in_flight": 0, "peak": 0, "calls": 0}
+
+    async def create(model, input):
+        state["calls"] += 1
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(delay_for(input) if delay_for else 0)
+        state["in_flight"] -= 1
+        response = MagicMock()
+        response.data = [
+            MagicMock(embedding=[float(text.split()[-1])]) for text in input
+        ]
+        return response
+
+    client.embeddings.create = create
+    client.state = state
+    return client
+
+
+def _status_error(status_code: int, headers: dict | None = None):
+    request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+    response = httpx.Response(status_code, request=request, headers=headers)
+    if status_code == 429:
+        return openai.RateLimitError("rate limited", response=response, body=None)
+    if status_code >= 500:
+        return openai.InternalServerError("server error", response=response, body=None)
+    return openai.BadRequestError("bad request", response=response, body=None)
+
+
+def _unlimited() -> TokenBucketLimiter:
+    return TokenBucketLimiter(1_000_000, 100_000_000)
+
+
+class TestTokenBatches:
+    """Tests for token-aware batch splitting."""
+
+    def test_batches_cut_at_token_budget(self):
+        """Long texts make smaller batches than short ones."""
+        long_text = "x" * 400  # ~101 estimated tokens
+        batches = _token_batches([long_text] * 10, max_items=100, max_tokens=250)
+
+        assert [len(batch) for _, batch, _ in batches] == [2, 2, 2, 2, 2]
+        assert [offset for offset, _, _ in batches] == [0, 2, 4, 6, 8]
+
+    def test_batches_cut_at_item_cap(self):
+        batches = _token_batches(["a"] * 5, max_items=2, max_tokens=10_000)
+        assert [len(batch) for _, batch, _ in batches] == [2, 2, 1]
+
+    def test_oversized_text_gets_its_own_batch(self):
+        """A single text over the budget is still sent (alone)."""
+        batches = _token_batches(["x" * 1000, "y"], max_items=10, max_tokens=10)
+        assert [batch for _, batch, _ in batches] == [["x" * 1000], ["y"]]
+
+    def test_estimate_tokens(self):
+        assert estimate_tokens("") == 1
+        assert estimate_tokens("x" * 400) == 101
+
+
+class TestConcurrentEmbedding:
+    """Tests for concurrent dispatch and ordered reassembly."""
+
+    @pytest.mark.asyncio
+    async def test_batches_run_concurrently_in_input_order(self):
+        """Batches overlap in flight; results follow input order even when
+        later batches finish first."""
+        texts = [f"text {i}" for i in range(40)]
+        # Earlier batches are slower, so completion order is reversed
+        client = _echo_client(lambda batch: 0.05 - int(batch[0].split()[-1]) / 1000)
+        service = EmbeddingService(
+            client=client, rate_limiter=_unlimited(), max_concurrency=4
+        )
+
+        results = await service.embed_texts(texts, batch_size=5)
+
+        assert results == [[float(i)] for i in range(40)]
+        assert client.state["calls"] == 8
+        assert client.state["peak"] == 4
+
+    @pytest.mark.asyncio
+    async def test_every_request_passes_the_rate_limiter(self):
+        limiter = MagicMock()
+        limiter.acquire = AsyncMock()
+        service = EmbeddingService(client=_echo_client(), rate_limiter=limiter)
+
+        await service.embed_texts([f"t {i}" for i in range(10)], batch_size=3)
+
+        assert limiter.acquire.await_count == 4
+
+
+class TestEmbeddingRetry:
+    """Tests for retry with backoff on transient errors."""
+
+    def _service(self, side_effect) -> tuple[EmbeddingService, AsyncMock]:
+        client = AsyncMock()
+        client.embeddings.create = AsyncMock(side_effect=side_effect)
+        return EmbeddingService(client=client, rate_limiter=_unlimited()), client
+
+    def _response(self, n: int = 1):
+        response = MagicMock()
+        response.data = [MagicMock(embedding=[0.5]) for _ in range(n)]
+        return response
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("status_code", [429, 500, 503])
+    async def test_retries_transient_errors(self, status_code):
+        service, client = self._service([_status_error(status_code), self._response()])
+
+        with patch("app.services.embeddings.asyncio.sleep", new=AsyncMock()) as sleep:
+            result = await service.embed_texts(["a"])
+
+        assert result == [[0.5]]
+        assert client.embeddings.create.await_count == 2
+        sleep.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_honors_retry_after(self):
+        service, _ = self._service(
+            [_status_error(429, {"retry-after": "7"}), self._response()]
+        )
+
+        with patch("app.services.embeddings.asyncio.sleep", new=AsyncMock()) as sleep:
+            await service.embed_texts(["a"])
+
+        sleep.assert_awaited_once_with(7.0)
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self):
+        service, client = self._service([_status_error(400)])
+
+        with pytest.raises(openai.BadRequestError):
+            await service.embed_texts(["a"])
+
+        assert client.embeddings.create.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self):
+        service, client = self._service(
+            [_status_error(429) for _ in range(MAX_RETRIES + 1)]
+        )
+
+        with patch("app.services.embeddings.asyncio.sleep", new=AsyncMock()):
+            with pytest.raises(openai.RateLimitError):
+                await service.embed_texts(["a"])
+
+        assert client.embeddings.create.await_count == MAX_RETRIES + 1
+
+
+class TestTokenBucketLimiter:
+    """Tests for the RPM/TPM token bucket."""
+
+    @pytest.mark.asyncio
+    async def test_waits_when_request_budget_is_spent(self):
+        """With 60 RPM the second immediate request waits about a second."""
+        clock = [0.0]
+
+        async def fake_sleep(seconds):
+            clock[0] += seconds
+
+        with (
+            patch(
+                "app.services.embeddings.time.monotonic",
+                side_effect=lambda: clock[0],
+            ),
+            patch("app.services.embeddings.asyncio.sleep", side_effect=fake_sleep),
+        ):
+            limiter = TokenBucketLimiter(requests_per_minute=1, tokens_per_minute=1000)
+            await limiter.acquire(10)
+            assert clock[0] == 0.0
+            await limiter.acquire(10)
+
+        assert clock[0] == pytest.approx(60.0)
+
+    @pytest.mark.asyncio
+    async def test_waits_for_token_budget(self):
+        """Token cost above the remaining budget waits for refill."""
+        clock = [0.0]
+
+        async def fake_sleep(seconds):
+            clock[0] += seconds
+
+        with (
+            patch(
+                "app.services.embeddings.time.monotonic",
+                side_effect=lambda: clock[0],
+            ),
+            patch("app.services.embeddings.asyncio.sleep", side_effect=fake_sleep),
+        ):
+            limiter = TokenBucketLimiter(
+                requests_per_minute=1000, tokens_per_minute=600
+            )
+            await limiter.acquire(600)
+            await limiter.acquire(300)
+
+        # 300 tokens at 10 tokens/second
+        assert clock[0] == pytest.approx(30.0)
+
+    def test_rejects_non_positive_limits(self):
+        with pytest.raises(ValueError):
+            TokenBucketLimiter(0, 100)
+
+
+# =============================================================================
+# Embedding Backend Tests
+# =============================================================================
+
+
+class _FakeEncoder:
+    """Stand-in for a sentence-transformers model."""
+
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION):
+        self.dimension = dimension
+        self.calls: list[list[str]] = []
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, texts, normalize_embeddings, convert_to_numpy):
+        self.calls.append(list(texts))
+        vectors = []
+        for text in texts:
+            vector = MagicMock()
+            vector.tolist.return_value = [float(len(text))] * self.dimension
+            vectors.append(vector)
+        return vectors
+
+
+class TestLocalEmbeddingBackend:
+    """Tests for the in-process backend."""
+
+    @pytest.mark.asyncio
+    async def test_embeds_in_thread_pool_without_rate_limiter(self):
+        """Local batches bypass the limiter and run off the event loop."""
+        encoder = _FakeEncoder()
+        limiter = MagicMock()
+        limiter.acquire = AsyncMock()
+        service = EmbeddingService(
+            backend=LocalEmbeddingBackend(model="local-test", encoder=encoder),
+            rate_limiter=limiter,
+        )
+
+        result = await service.embed_texts(["ab", "abc"])
+
+        assert [v[0] for v in result] == [2.0, 3.0]
+        assert encoder.calls == [["ab", "abc"]]
+        limiter.acquire.assert_not_awaited()
+        assert service.model == "local-test"
+
+    @pytest.mark.asyncio
+    async def test_dimension_mismatch_is_rejected(self):
+        """A model whose output doesn't fit the vector column fails loudly."""
+        backend = LocalEmbeddingBackend(
+            model="small", encoder=_FakeEncoder(dimension=384), dimensions=1536
+        )
+
+        with pytest.raises(ValueError, match="384-dimensional"):
+            await backend.embed_batch(["a"])
+
+    @pytest.mark.asyncio
+    async def test_missing_package_raises_helpful_error(self):
+        """Without sentence-transformers installed the error says what to do."""
+        backend = LocalEmbeddingBackend(model="not-loaded-model")
+
+        with patch.dict("sys.modules", {"sentence_transformers": None}):
+            with pytest.raises(RuntimeError, match="sentence-transformers"):
+                await backend.embed_batch(["a"])
+
+
+class TestCreateEmbeddingBackend:
+    """Tests for backend selection from settings."""
+
+    def test_default_is_openai(self):
+        with patch.object(settings, "embedding_backend", "openai"):
+            backend = create_embedding_backend(client=AsyncMock())
+        assert isinstance(backend, OpenAIEmbeddingBackend)
+        assert backend.model == "text-embedding-3-small"
+
+    def test_local_backend_from_settings(self):
+        with (
+            patch.object(settings, "embedding_backend", "local"),
+            patch.object(settings, "embedding_model", ""),
+            patch("importlib.util.find_spec", return_value=MagicMock()),
+        ):
+            backend = create_embedding_backend()
+        assert isinstance(backend, LocalEmbeddingBackend)
+        assert backend.model == "sentence-transformers/all-MiniLM-L6-v2"
+
+    def test_model_setting_overrides_default(self):
+        with (
+            patch.object(settings, "embedding_backend", "local"),
+            patch.object(settings, "embedding_model", "BAAI/bge-small-en-v1.5"),
+            patch("importlib.util.find_spec", return_value=MagicMock()),
+        ):
+            backend = create_embedding_backend()
+        assert backend.model == "BAAI/bge-small-en-v1.5"
+
+    def test_local_backend_without_package_raises(self):
+        """Selecting the local backend without the extra fails immediately."""
+        with (
+            patch.object(settings, "embedding_backend", "local"),
+            patch.dict("sys.modules", {"sentence_transformers": None}),
+        ):
+            with pytest.raises(RuntimeError, match="local-embeddings"):
+                create_embedding_backend()
+
+    def test_unknown_backend_raises(self):
+        with patch.object(settings, "embedding_backend", "nope"):
+            with pytest.raises(ValueError, match="Unknown EMBEDDING_BACKEND"):
+                create_embedding_backend()
+
+
+class TestOpenAIDimensions:
+    """Tests for requesting shortened OpenAI embeddings."""
+
+    @pytest.mark.asyncio
+    async def test_native_dimension_sends_no_parameter(self):
+        client = create_mock_openai_client()
+        backend = OpenAIEmbeddingBackend(client=client, dimensions=1536)
+
+        await backend.embed_batch(["a"])
+
+        assert "dimensions" not in client.embeddings.create.call_args.kwargs
+
+    @pytest.mark.asyncio
+    async def test_smaller_dimension_is_requested(self):
+        client = create_mock_openai_client()
+        backend = OpenAIEmbeddingBackend(client=client, dimensions=512)
+
+        await backend.embed_batch(["a"])
+
+        assert client.embeddings.create.call_args.kwargs["dimensions"] == 512
@@ -1,14 +1,15 @@
 """Tests for FHIR API routes."""
 
+from unittest.mock import AsyncMock
+
 import pytest
 import pytest_asyncio
 from fastapi import FastAPI
 from httpx import ASGITransport, AsyncClient
-from unittest.mock import AsyncMock
 
 from app.auth import verify_bearer_token
 from app.database import get_db
-from app.routes.fhir import router, BundleLoadResponse
+from app.routes.fhir import BundleLoadResponse, router
 from tests.conftest import stub_verify_bearer_token
 
 
@@ -87,6 +88,115 @@ class TestLoadBundle:
         assert "no valid resources found" in response.json()["detail"]
 
 
+class TestLoadBundleStream:
+    """Tests for POST /fhir/load-bundle/stream endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_stream_requires_bundle_type(self, fhir_client):
+        """Streaming load should reject non-Bundle documents."""
+        client, _ = fhir_client
+        response = await client.post(
+            "/fhir/load-bundle/stream",
+            content=b'{"resourceType": "Patient", "id": "123"}',
+            headers={"Authorization": "Bearer test-token"},
+        )
+        assert response.status_code == 400
+        assert "resourceType must be 'Bundle'" in response.json()["detail"]
+
+    @pytest.mark.asyncio
+    async def test_stream_requires_entries(self, fhir_client):
+        """Streaming load should require at least one entry."""
+        client, _ = fhir_client
+        response = await client.post(
+            "/fhir/load-bundle/stream",
+            content=b'{"resourceType": "Bundle", "entry": []}',
+            headers={"Authorization": "Bearer test-token"},
+        )
+        assert response.status_code == 400
+        assert "no entries" in response.json()["detail"]
+
+    @pytest.mark.asyncio
+    async def test_stream_rejects_truncated_json(self, fhir_client):
+        """Streaming load should reject a truncated body."""
+        client, _ = fhir_client
+        response = await client.post(
+            "/fhir/load-bundle/stream",
+            content=b'{"resourceType": "Bundle", "entry": [{"resource": {',
+            headers={"Authorization": "Bearer test-token"},
+        )
+        assert response.status_code == 400
+
+
+class TestImportNdjson:
+    """Tests for POST /fhir/import-ndjson endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_import_requires_patient_linked_resources(self, fhir_client):
+        """A body with no patient-linked resources is rejected."""
+        client, _ = fhir_client
+        response = await client.post(
+            "/fhir/import-ndjson",
+            content=b'{"resourceType": "Practitioner", "id": "dr1"}\nnot json\n',
+            headers={"Authorization": "Bearer test-token"},
+        )
+        assert response.status_code == 400
+        assert "No resources with a patient reference" in response.json()["detail"]
+
+    @pytest.mark.asyncio
+    async def test_import_validates_workers(self, fhir_client):
+        """workers must be a positive integer."""
+        client, _ = fhir_client
+        response = await client.post(
+            "/fhir/import-ndjson?workers=0",
+            content=b"",
+            headers={"Authorization": "Bearer test-token"},
+        )
+        assert response.status_code == 422
+
+
+class TestIngestJobs:
+    """Tests for GET /fhir/jobs/{patient_id}."""
+
+    @pytest.mark.asyncio
+    async def test_returns_job_status(self, fhir_client):
+        """Jobs are listed with an overall status."""
+        import uuid
+        from datetime import datetime, timezone
+        from unittest.mock import patch
+
+        from app.models import IngestJob, IngestJobKind, IngestJobStatus
+
+        client, _ = fhir_client
+        patient_id = uuid.uuid4()
+        now = datetime.now(timezone.utc)
+        job = IngestJob(
+            id=uuid.uuid4(),
+            kind=IngestJobKind.EMBED,
+            status=IngestJobStatus.PENDING,
+            patient_id=patient_id,
+            payload={},
+            attempts=1,
+            max_attempts=5,
+            last_error="rate limited",
+            created_at=now,
+            run_after=now,
+        )
+
+        with patch(
+            "app.routes.fhir.get_patient_jobs", new=AsyncMock(return_value=[job])
+        ):
+            response = await client.get(
+                f"/fhir/jobs/{patient_id}",
+                headers={"Authorization": "Bearer test-token"},
+            )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "pending"
+        assert data["jobs"][0]["kind"] == "embed"
+        assert data["jobs"][0]["last_error"] == "rate limited"
+
+
 class TestBundleLoadResponse:
     """Tests for BundleLoadResponse model."""
 
@@ -127,3 +237,6 @@ class TestFhirRouterStructure:
         """Router should have load-bundle endpoint."""
         routes = [r.path for r in router.routes]
         assert "/fhir/load-bundle" in routes
+        assert "/fhir/load-bundle/stream" in routes
+        assert "/fhir/import-ndjson" in routes
+        assert "/fhir/jobs/{patient_id}" in routes
@@ -4,20 +4,43 @@ import uuid
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from sqlalchemy import select
-
-from app.models import FhirResource
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+from app.config import settings
+from app.models import FhirResource, IngestJob, IngestJobKind, PatientSummary
+from app.projections.extractors import (
+    register_clinical_projections,
+    register_observation_projection,
+)
 from app.services.fhir_loader import (
+    PROFILE_EXTENSION_URL,
+    STREAM_BATCH_SIZE,
+    NdjsonSpool,
+    WrittenResource,
+    _add_profile_extension,
+    _enrich_observations,
+    _extract_patient_sex,
+    _generate_embeddings,
+    _run_embed_job,
+    _run_graph_job,
+    _store_embeddings,
+    compute_content_hash,
+    embedding_candidates,
+    find_ndjson_files,
     get_patient_profile,
     get_patient_resource,
     get_patient_resources,
+    get_preprocess_executor,
+    import_ndjson,
     load_bundle,
+    load_bundle_stream,
     load_bundle_with_profile,
-    _add_profile_extension,
-    _enrich_observations,
-    _extract_patient_sex,
-    _generate_embeddings,
-    PROFILE_EXTENSION_URL,
+    patient_key,
+    preprocess_bundle,
+    shutdown_preprocess_executor,
+    sync_bundle,
+    write_bundle_resources,
 )
 from tests.conftest import create_bundle
 
@@ -131,6 +154,60 @@ class TestLoadBundle:
         resources = result.scalars().all()
         assert len(resources) == 2
 
+    @pytest.mark.asyncio
+    async def test_concurrent_first_loads_share_one_patient(
+        self, test_engine, sample_patient, sample_condition
+    ):
+        """Parallel first loads of a patient resolve to one canonical row."""
+        import asyncio
+
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+        session_maker = async_sessionmaker(test_engine, class_=AsyncSession)
+
+        async def first_load() -> uuid.UUID:
+            async with session_maker() as session:
+                patient_id, _ = await write_bundle_resources(
+                    session, [sample_patient, sample_condition]
+                )
+                # Hold the transaction open so the loads overlap
+                await asyncio.sleep(0.05)
+                await session.commit()
+                return patient_id
+
+        first_id, second_id = await asyncio.gather(first_load(), first_load())
+
+        assert first_id == second_id
+        async with session_maker() as session:
+            result = await session.execute(
+                select(FhirResource.patient_id).where(
+                    FhirResource.fhir_id == sample_patient["id"],
+                    FhirResource.resource_type == "Patient",
+                )
+            )
+            assert result.scalars().all() == [first_id]
+
+    @pytest.mark.asyncio
+    async def test_reload_only_processes_changed_resources(
+        self, db_session, graph, sample_patient, sample_condition, sample_observation
+    ):
+        """Re-loading a bundle should report and rewrite only the delta."""
+        first = await sync_bundle(
+            db_session, graph, create_bundle([sample_patient, sample_condition])
+        )
+        await db_session.commit()
+        assert (first.inserted, first.updated, first.unchanged) == (2, 0, 0)
+
+        changed_condition = {**sample_condition, "onsetDateTime": "2021-01-01"}
+        second = await sync_bundle(
+            db_session,
+            graph,
+            create_bundle([sample_patient, changed_condition, sample_observation]),
+        )
+
+        assert second.patient_id == first.patient_id
+        assert (second.inserted, second.updated, second.unchanged) == (1, 1, 1)
+
     @pytest.mark.asyncio
     async def test_load_bundle_stores_raw_fhir(self, db_session, graph, sample_patient):
         """Test that load_bundle stores raw FHIR JSON data."""
@@ -411,7 +488,9 @@ class TestObservationEnrichment:
         """Blood pressure (component-based) should get per-component interpretation."""
         obs = {
             "resourceType": "Observation",
-            "code": {"coding": [{"code": "85354-9", "display": "Blood pressure panel"}]},
+            "code": {
+                "coding": [{"code": "85354-9", "display": "Blood pressure panel"}]
+            },
             "component": [
                 {
                     "code": {"coding": [{"code": "8462-4", "display": "Diastolic BP"}]},
@@ -455,6 +534,105 @@ class TestObservationEnrichment:
         assert obs["referenceRange"][0]["high"]["value"] == 24.9
 
 
+class TestPreprocessBundle:
+    """Tests for off-loop bundle preprocessing (clean + enrich)."""
+
+    def _make_bundle(self) -> dict:
+        return create_bundle(
+            [
+                {
+                    "resourceType": "Patient",
+                    "id": "patient-1",
+                    "gender": "female",
+                    "name": [{"family": "Smith123", "given": ["Jane45"]}],
+                },
+                {
+                    "resourceType": "Observation",
+                    "id": "obs-1",
+                    "code": {
+                        "coding": [{"system": "http://loinc.org", "code": "2339-0"}]
+                    },
+                    "valueQuantity": {"value": 250, "unit": "mg/dL"},
+                    "performer": [
+                        {"reference": "Practitioner/1", "display": "Dr. Duane703"}
+                    ],
+                },
+            ]
+        )
+
+    @pytest.mark.asyncio
+    async def test_inline_cleans_and_enriches(self):
+        resources = await preprocess_bundle(self._make_bundle())
+
+        patient, obs = resources
+        assert patient["name"][0]["family"] == "Smith"
+        assert patient["name"][0]["given"] == ["Jane"]
+        assert obs["performer"][0]["display"] == "Dr. Duane"
+        assert obs["interpretation"][0]["coding"][0]["code"] == "H"
+
+    @pytest.mark.asyncio
+    async def test_thread_pool_matches_inline(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        expected = await preprocess_bundle(self._make_bundle())
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            result = await preprocess_bundle(self._make_bundle(), executor)
+
+        assert result == expected
+
+    @pytest.mark.asyncio
+    async def test_process_pool_matches_inline_and_leaves_input_untouched(self):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        expected = await preprocess_bundle(self._make_bundle())
+        bundle = self._make_bundle()
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            result = await preprocess_bundle(bundle, executor)
+
+        assert result == expected
+        # Work happened on a pickled copy in the child process
+        assert bundle["entry"][0]["resource"]["name"][0]["family"] == "Smith123"
+
+    @pytest.mark.asyncio
+    async def test_executor_propagates_validation_errors(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            with pytest.raises(ValueError, match="no entries"):
+                await preprocess_bundle(
+                    {"resourceType": "Bundle", "entry": []}, executor
+                )
+
+    def test_get_preprocess_executor_respects_mode(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        shutdown_preprocess_executor()
+        try:
+            with patch("app.services.fhir_loader.settings") as mock_settings:
+                mock_settings.fhir_preprocess_mode = "inline"
+                mock_settings.fhir_preprocess_workers = 2
+                assert get_preprocess_executor() is None
+
+                mock_settings.fhir_preprocess_mode = "thread"
+                executor = get_preprocess_executor()
+                assert isinstance(executor, ThreadPoolExecutor)
+                # Shared instance is reused
+                assert get_preprocess_executor() is executor
+        finally:
+            shutdown_preprocess_executor()
+
+    def test_get_preprocess_executor_rejects_unknown_mode(self):
+        shutdown_preprocess_executor()
+        with patch("app.services.fhir_loader.settings") as mock_settings:
+            mock_settings.fhir_preprocess_mode = "gpu"
+            mock_settings.fhir_preprocess_workers = 1
+            with pytest.raises(ValueError, match="fhir_preprocess_mode"):
+                get_preprocess_executor()
+
+
 class TestPatientProfile:
     """Tests for patient profile functions."""
 
@@ -502,6 +680,18 @@ class TestPatientProfile:
             "resource"
         ].get("extension") == original_patient.get("extension", [])
 
+    def test_add_profile_extension_copies_every_entry(
+        self, sample_patient, sample_observation, sample_profile
+    ):
+        """Test that loading can rewrite the copy without touching the input."""
+        bundle = create_bundle([sample_patient, sample_observation])
+
+        result = _add_profile_extension(bundle, sample_profile)
+
+        assert result["entry"][1]["resource"] is not bundle["entry"][1]["resource"]
+        result["entry"][1]["resource"]["interpretation"] = []
+        assert "interpretation" not in bundle["entry"][1]["resource"]
+
     def test_add_profile_extension_replaces_existing(
         self, sample_patient, sample_profile
     ):
@@ -729,9 +919,7 @@ class TestGenerateEmbeddings:
         mock_client.embeddings.create = AsyncMock(return_value=mock_response)
         mock_client.close = AsyncMock()
 
-        with patch(
-            "app.services.fhir_loader.EmbeddingService"
-        ) as mock_service_class:
+        with patch("app.services.fhir_loader.EmbeddingService") as mock_service_class:
             mock_service = MagicMock()
             mock_service.embed_texts = AsyncMock(
                 return_value=[
@@ -767,9 +955,7 @@ class TestGenerateEmbeddings:
             "Provenance", "prov-1", provenance_data
         )
 
-        with patch(
-            "app.services.fhir_loader.EmbeddingService"
-        ) as mock_service_class:
+        with patch("app.services.fhir_loader.EmbeddingService") as mock_service_class:
             mock_service = MagicMock()
             mock_service.embed_texts = AsyncMock(return_value=[])
             mock_service.close = AsyncMock()
@@ -787,30 +973,22 @@ class TestGenerateEmbeddings:
     @pytest.mark.asyncio
     async def test_generate_embeddings_handles_empty_list(self):
         """Test that _generate_embeddings handles empty resource list."""
-        with patch(
-            "app.services.fhir_loader.EmbeddingService"
-        ) as mock_service_class:
+        with patch("app.services.fhir_loader.EmbeddingService") as mock_service_class:
             await _generate_embeddings([])
 
             # EmbeddingService should not be instantiated for empty list
             mock_service_class.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_generate_embeddings_graceful_degradation(
-        self, sample_condition
-    ):
+    async def test_generate_embeddings_graceful_degradation(self, sample_condition):
         """Test that _generate_embeddings handles API errors gracefully."""
         condition_resource = self._create_mock_fhir_resource(
             "Condition", "cond-1", sample_condition
         )
 
-        with patch(
-            "app.services.fhir_loader.EmbeddingService"
-        ) as mock_service_class:
+        with patch("app.services.fhir_loader.EmbeddingService") as mock_service_class:
             mock_service = MagicMock()
-            mock_service.embed_texts = AsyncMock(
-                side_effect=Exception("API Error")
-            )
+            mock_service.embed_texts = AsyncMock(side_effect=Exception("API Error"))
             mock_service.close = AsyncMock()
             mock_service_class.return_value = mock_service
 
@@ -827,9 +1005,7 @@ class TestGenerateEmbeddings:
             "Condition", "cond-1", sample_condition
         )
 
-        with patch(
-            "app.services.fhir_loader.EmbeddingService"
-        ) as mock_service_class:
+        with patch("app.services.fhir_loader.EmbeddingService") as mock_service_class:
             mock_service = MagicMock()
             mock_service.embed_texts = AsyncMock(
                 return_value=[self._create_mock_embedding()]
@@ -843,6 +1019,904 @@ class TestGenerateEmbeddings:
             mock_service.close.assert_called_once()
 
 
+class TestStoreEmbeddings:
+    """Unit tests for embedding write-back on bulk-upserted rows."""
+
+    def _written(self, resource_type: str, data: dict) -> WrittenResource:
+        return WrittenResource(
+            id=uuid.uuid4(),
+            fhir_id=data.get("id", ""),
+            resource_type=resource_type,
+            data=data,
+        )
+
+    @pytest.mark.asyncio
+    async def test_generate_embeddings_accepts_written_resources(
+        self, sample_condition
+    ):
+        """WrittenResource rows receive embeddings like ORM objects do."""
+        written = self._written("Condition", sample_condition)
+
+        with patch("app.services.fhir_loader.EmbeddingService") as mock_service_class:
+            mock_service = MagicMock()
+            mock_service.embed_texts = AsyncMock(return_value=[[0.1] * 1536])
+            mock_service.close = AsyncMock()
+            mock_service_class.return_value = mock_service
+
+            await _generate_embeddings([written])
+
+        assert written.embedding == [0.1] * 1536
+        assert "Condition:" in written.embedding_text
+
+    @pytest.mark.asyncio
+    async def test_generate_embeddings_uses_cache_with_session(self, sample_condition):
+        """With a session, texts go through the persistent embedding cache."""
+        written = self._written("Condition", sample_condition)
+        db = MagicMock()
+
+        with (
+            patch("app.services.fhir_loader.EmbeddingService") as mock_service_class,
+            patch(
+                "app.services.fhir_loader.embed_texts_cached",
+                new=AsyncMock(return_value=[[0.3] * 1536]),
+            ) as cached,
+        ):
+            mock_service = MagicMock()
+            mock_service.embed_texts = AsyncMock()
+            mock_service.close = AsyncMock()
+            mock_service_class.return_value = mock_service
+
+            await _generate_embeddings([written], db=db)
+
+        cached.assert_awaited_once()
+        assert cached.await_args.args[0] is db
+        mock_service.embed_texts.assert_not_awaited()
+        assert written.embedding == [0.3] * 1536
+
+    @pytest.mark.asyncio
+    async def test_store_embeddings_updates_only_embedded_rows(
+        self, sample_condition, sample_patient
+    ):
+        """Only rows with an embedding are written: text on the resource,
+        vector upserted into resource_embeddings."""
+        embedded = self._written("Condition", sample_condition)
+        embedded.embedding = [0.2] * 1536
+        embedded.embedding_text = "Condition: test"
+        skipped = self._written("Patient", sample_patient)
+        patient_id = uuid.uuid4()
+
+        db = MagicMock()
+        db.execute = AsyncMock()
+
+        await _store_embeddings(db, [embedded, skipped], patient_id)
+
+        assert db.execute.await_count == 2
+        update_call, upsert_call = db.execute.call_args_list
+        assert update_call.args[1] == [
+            {"id": embedded.id, "embedding_text": "Condition: test"}
+        ]
+        upsert = upsert_call.args[0]
+        assert upsert.table.name == "resource_embeddings"
+        params = upsert.compile(dialect=postgresql.dialect()).params
+        assert params["resource_id_m0"] == embedded.id
+        assert params["patient_id_m0"] == patient_id
+
+    @pytest.mark.asyncio
+    async def test_store_embeddings_noop_without_embeddings(self, sample_patient):
+        """No statement is issued when nothing was embedded."""
+        db = MagicMock()
+        db.execute = AsyncMock()
+
+        await _store_embeddings(
+            db, [self._written("Patient", sample_patient)], uuid.uuid4()
+        )
+
+        db.execute.assert_not_called()
+
+
+class TestContentHashChangeDetection:
+    """Unit tests for content-hash based change detection on re-load."""
+
+    def _result(self, scalar=None, rows=None) -> MagicMock:
+        """Mock an AsyncSession.execute result."""
+        result = MagicMock()
+        result.scalars.return_value.first.return_value = scalar
+        result.all.return_value = rows or []
+        return result
+
+    def test_hash_ignores_key_order(self):
+        """Canonical JSON makes the hash independent of key order."""
+        a = {"resourceType": "Condition", "id": "c1", "code": {"text": "x"}}
+        b = {"code": {"text": "x"}, "id": "c1", "resourceType": "Condition"}
+        assert compute_content_hash(a) == compute_content_hash(b)
+
+    def test_hash_changes_with_content(self):
+        """Any content change produces a different hash."""
+        a = {"resourceType": "Condition", "id": "c1", "code": {"text": "x"}}
+        b = {"resourceType": "Condition", "id": "c1", "code": {"text": "y"}}
+        assert compute_content_hash(a) != compute_content_hash(b)
+
+    @pytest.mark.asyncio
+    async def test_write_skips_unchanged_resources(
+        self, sample_patient, sample_condition, sample_observation
+    ):
+        """Only new and changed resources are sent to the upsert."""
+        patient_id = uuid.uuid4()
+        condition_id = uuid.uuid4()
+        changed_observation = {**sample_observation, "status": "amended"}
+        observation_id = uuid.uuid4()
+        existing_rows = [
+            MagicMock(
+                id=patient_id,
+                fhir_id=sample_patient["id"],
+                resource_type="Patient",
+                content_hash=compute_content_hash(sample_patient),
+                has_embedding=False,
+            ),
+            MagicMock(
+                id=observation_id,
+                fhir_id=sample_observation["id"],
+                resource_type="Observation",
+                content_hash=compute_content_hash(sample_observation),
+                has_embedding=True,
+            ),
+        ]
+        returned = [
+            MagicMock(
+                id=condition_id,
+                fhir_id=sample_condition["id"],
+                resource_type="Condition",
+            ),
+            MagicMock(
+                id=observation_id,
+                fhir_id=sample_observation["id"],
+                resource_type="Observation",
+            ),
+        ]
+        db = MagicMock()
+        db.execute = AsyncMock(
+            side_effect=[
+                self._result(),
+                self._result(scalar=patient_id),
+                self._result(rows=existing_rows),
+                self._result(rows=returned),
+                self._result(),
+                self._result(),
+                self._result(),
+            ]
+        )
+        register_observation_projection()
+        register_clinical_projections()
+
+        result_id, written = await write_bundle_resources(
+            db, [sample_patient, sample_condition, changed_observation]
+        )
+
+        assert result_id == patient_id
+        statuses = {w.resource_type: w.status for w in written}
+        assert statuses == {
+            "Patient": "unchanged",
+            "Condition": "inserted",
+            "Observation": "updated",
+        }
+        assert {w.resource_type: w.id for w in written}["Condition"] == condition_id
+        # Patient lock, lookup, existing-row scan, one upsert batch, stale
+        # embedding delete, then one projection upsert per written type (not
+        # the unchanged Patient)
+        assert db.execute.await_count == 7
+        lock = db.execute.call_args_list[0].args[0]
+        assert "pg_advisory_xact_lock" in str(lock)
+        stale = db.execute.call_args_list[4].args[0]
+        assert stale.table.name == "resource_embeddings"
+        projections = [c.args[0].table.name for c in db.execute.call_args_list[5:]]
+        assert projections == ["condition_projections", "observation_projections"]
+
+    @pytest.mark.asyncio
+    async def test_force_rewrites_unchanged_resources(self, sample_patient):
+        """force=True treats every existing resource as updated."""
+        patient_id = uuid.uuid4()
+        existing_rows = [
+            MagicMock(
+                id=patient_id,
+                fhir_id=sample_patient["id"],
+                resource_type="Patient",
+                content_hash=compute_content_hash(sample_patient),
+                has_embedding=False,
+            )
+        ]
+        returned = [
+            MagicMock(
+                id=patient_id, fhir_id=sample_patient["id"], resource_type="Patient"
+            )
+        ]
+        db = MagicMock()
+        db.execute = AsyncMock(
+            side_effect=[
+                self._result(),
+                self._result(scalar=patient_id),
+                self._result(rows=existing_rows),
+                self._result(rows=returned),
+            ]
+        )
+
+        _, written = await write_bundle_resources(db, [sample_patient], force=True)
+
+        assert [w.status for w in written] == ["updated"]
+
+    def test_embedding_candidates(self):
+        """Changed rows and unchanged rows lacking an embedding are re-embedded."""
+
+        def row(status, has_embedding):
+            return WrittenResource(
+                id=uuid.uuid4(),
+                fhir_id="x",
+                resource_type="Condition",
+                data={},
+                status=status,
+                has_embedding=has_embedding,
+            )
+
+        inserted = row("inserted", False)
+        updated = row("updated", True)
+        missing = row("unchanged", False)
+        embedded = row("unchanged", True)
+
+        assert embedding_candidates([inserted, updated, missing, embedded]) == [
+            inserted,
+            updated,
+            missing,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_sync_unchanged_bundle_skips_graph_and_compile(
+        self, sample_patient, sample_condition
+    ):
+        """An unchanged re-load does no graph, embedding or compile work."""
+        patient_id = uuid.uuid4()
+        written = [
+            WrittenResource(
+                id=uuid.uuid4(),
+                fhir_id=r["id"],
+                resource_type=r["resourceType"],
+                data=r,
+                status="unchanged",
+                has_embedding=True,
+            )
+            for r in (sample_patient, sample_condition)
+        ]
+        graph = MagicMock()
+        graph.build_from_fhir = AsyncMock()
+
+        with (
+            patch(
+                "app.services.fhir_loader.write_bundle_resources",
+                new=AsyncMock(return_value=(patient_id, written)),
+            ),
+            patch("app.services.fhir_loader.EmbeddingService") as mock_service_class,
+            patch(
+                "app.services.fhir_loader._has_compiled_summary",
+                new=AsyncMock(return_value=True),
+            ),
+            patch(
+                "app.services.fhir_loader.compile_and_store", new=AsyncMock()
+            ) as compile_mock,
+        ):
+            result = await sync_bundle(
+                MagicMock(), graph, create_bundle([sample_patient, sample_condition])
+            )
+
+        assert result.patient_id == patient_id
+        assert (result.inserted, result.updated, result.unchanged) == (0, 0, 2)
+        assert result.embedded == 0
+        assert result.compiled is False
+        graph.build_from_fhir.assert_not_called()
+        mock_service_class.assert_not_called()
+        compile_mock.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_sync_graphs_only_changed_resources(
+        self, sample_patient, sample_condition
+    ):
+        """Only inserted/updated resources are passed to the graph builder."""
+        patient_id = uuid.uuid4()
+        written = [
+            WrittenResource(
+                id=patient_id,
+                fhir_id=sample_patient["id"],
+                resource_type="Patient",
+                data=sample_patient,
+                status="unchanged",
+                has_embedding=True,
+            ),
+            WrittenResource(
+                id=uuid.uuid4(),
+                fhir_id=sample_condition["id"],
+                resource_type="Condition",
+                data=sample_condition,
+                status="updated",
+            ),
+        ]
+        graph = MagicMock()
+        graph.build_from_fhir = AsyncMock()
+        db = MagicMock()
+        db.execute = AsyncMock()
+
+        with (
+            patch(
+                "app.services.fhir_loader.write_bundle_resources",
+                new=AsyncMock(return_value=(patient_id, written)),
+            ),
+            patch("app.services.fhir_loader.EmbeddingService") as mock_service_class,
+            patch.object(settings, "embedding_cache_enabled", False),
+            patch(
+                "app.services.fhir_loader.compile_and_store", new=AsyncMock()
+            ) as compile_mock,
+        ):
+            mock_service = MagicMock()
+            mock_service.embed_texts = AsyncMock(return_value=[[0.1] * 1536])
+            mock_service.close = AsyncMock()
+            mock_service_class.return_value = mock_service
+
+            result = await sync_bundle(
+                db, graph, create_bundle([sample_patient, sample_condition])
+            )
+
+        graph.build_from_fhir.assert_awaited_once_with(
+            str(patient_id), [sample_condition], build_relationships=True
+        )
+        assert result.updated == 1
+        assert result.embedded == 1
+        assert result.compiled is True
+        compile_mock.assert_awaited_once()
+
+
+class TestLoadBundleStream:
+    """Unit tests for batched loading from an entry stream."""
+
+    async def _entries(self, resources: list[dict]):
+        for resource in resources:
+            yield {"resource": resource}
+
+    async def _fake_write(self, db, patient_id, resources, existing, force=False):
+        return [
+            WrittenResource(
+                id=uuid.uuid4(),
+                fhir_id=r["id"],
+                resource_type=r["resourceType"],
+                data=r,
+            )
+            for r in resources
+        ]
+
+    def _patch_io(self, write):
+        from contextlib import ExitStack
+
+        patient_id = uuid.uuid4()
+        stack = ExitStack()
+        stack.enter_context(
+            patch(
+                "app.services.fhir_loader._resolve_patient",
+                new=AsyncMock(return_value=(patient_id, {})),
+            )
+        )
+        stack.enter_context(
+            patch("app.services.fhir_loader._write_resource_batch", side_effect=write)
+        )
+        stack.enter_context(
+            patch("app.services.fhir_loader._generate_embeddings", new=AsyncMock())
+        )
+        stack.enter_context(
+            patch("app.services.fhir_loader._store_embeddings", new=AsyncMock())
+        )
+        compile_mock = stack.enter_context(
+            patch("app.services.fhir_loader.compile_and_store", new=AsyncMock())
+        )
+        return stack, patient_id, compile_mock
+
+    def _graph(self) -> MagicMock:
+        graph = MagicMock()
+        graph.build_from_fhir = AsyncMock()
+        graph.build_relationships = AsyncMock()
+        return graph
+
+    @pytest.mark.asyncio
+    async def test_loads_in_fixed_size_batches(
+        self, sample_patient, sample_condition, sample_observation
+    ):
+        """Each batch is written separately; relationships are built once."""
+        resources = [sample_patient, sample_condition, sample_observation]
+        batches: list[int] = []
+
+        async def write(db, patient_id, batch, existing, force=False):
+            batches.append(len(batch))
+            return await self._fake_write(db, patient_id, batch, existing, force)
+
+        graph = self._graph()
+        stack, patient_id, compile_mock = self._patch_io(write)
+        with stack:
+            result = await load_bundle_stream(
+                MagicMock(), graph, self._entries(resources), batch_size=2
+            )
+
+        assert batches == [2, 1]
+        assert result.patient_id == patient_id
+        assert result.inserted == 3
+        assert graph.build_from_fhir.await_count == 2
+        for call in graph.build_from_fhir.await_args_list:
+            assert call.kwargs["build_relationships"] is False
+        graph.build_relationships.assert_awaited_once_with(str(patient_id))
+        compile_mock.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_buffers_until_patient_arrives(
+        self, sample_patient, sample_condition, sample_observation
+    ):
+        """Entries before the Patient are held and written with it."""
+        resources = [sample_condition, sample_observation, sample_patient]
+        batches: list[list[str]] = []
+
+        async def write(db, patient_id, batch, existing, force=False):
+            batches.append([r["resourceType"] for r in batch])
+            return await self._fake_write(db, patient_id, batch, existing, force)
+
+        stack, _, _ = self._patch_io(write)
+        with stack:
+            result = await load_bundle_stream(
+                MagicMock(), self._graph(), self._entries(resources), batch_size=1
+            )
+
+        assert batches == [["Condition", "Observation", "Patient"]]
+        assert result.inserted == 3
+
+    @pytest.mark.asyncio
+    async def test_attaches_profile_to_patient(self, sample_patient):
+        """The profile extension is added to the streamed Patient."""
+        sample_profile = {"preferred_name": "Johnny", "occupation": "Teacher"}
+        written: list[dict] = []
+
+        async def write(db, patient_id, batch, existing, force=False):
+            written.extend(batch)
+            return await self._fake_write(db, patient_id, batch, existing, force)
+
+        stack, _, _ = self._patch_io(write)
+        with stack:
+            await load_bundle_stream(
+                MagicMock(),
+                self._graph(),
+                self._entries([sample_patient]),
+                profile=sample_profile,
+            )
+
+        assert get_patient_profile(written[0]) == sample_profile
+        assert "extension" not in sample_patient
+
+    @pytest.mark.asyncio
+    async def test_rejects_stream_without_patient(self, sample_condition):
+        """A stream with resources but no Patient raises ValueError."""
+        stack, _, _ = self._patch_io(self._fake_write)
+        with stack, pytest.raises(ValueError, match="must contain a Patient"):
+            await load_bundle_stream(
+                MagicMock(), self._graph(), self._entries([sample_condition])
+            )
+
+    @pytest.mark.asyncio
+    async def test_rejects_empty_stream(self):
+        """A stream with no entries raises ValueError."""
+        stack, _, _ = self._patch_io(self._fake_write)
+        with stack, pytest.raises(ValueError, match="no entries"):
+            await load_bundle_stream(MagicMock(), self._graph(), self._entries([]))
+
+
+class TestNdjsonImport:
+    """Unit tests for FHIR Bulk Data NDJSON import."""
+
+    def _write_export(self, tmp_path) -> None:
+        """Write a two-patient export split by resource type."""
+        import json
+
+        files = {
+            "Patient.ndjson": [
+                {"resourceType": "Patient", "id": "p1"},
+                {"resourceType": "Patient", "id": "p2"},
+            ],
+            "Condition.ndjson": [
+                {
+                    "resourceType": "Condition",
+                    "id": "c1",
+                    "subject": {"reference": "Patient/p1"},
+                },
+                {
+                    "resourceType": "Condition",
+                    "id": "c2",
+                    "subject": {"reference": "urn:uuid:p2"},
+                },
+            ],
+            "Immunization.ndjson": [
+                {
+                    "resourceType": "Immunization",
+                    "id": "i1",
+                    "patient": {"reference": "Patient/p1"},
+                },
+            ],
+            "Practitioner.ndjson": [
+                {"resourceType": "Practitioner", "id": "dr1"},
+            ],
+        }
+        for name, resources in files.items():
+            (tmp_path / name).write_text(
+                "\n".join(json.dumps(r) for r in resources) + "\n"
+            )
+
+    def test_patient_key_resolves_references(self):
+        """Patients map to themselves; others via subject/patient references."""
+        assert patient_key({"resourceType": "Patient", "id": "p1"}) == "p1"
+        condition = {
+            "resourceType": "Condition",
+            "subject": {"reference": "Patient/p1"},
+        }
+        assert patient_key(condition) == "p1"
+        assert (
+            patient_key(
+                {
+                    "resourceType": "Claim",
+                    "patient": {"reference": "https://fhir.example/Patient/p2"},
+                }
+            )
+            == "p2"
+        )
+        coverage = {
+            "resourceType": "Coverage",
+            "beneficiary": {"reference": "urn:uuid:p3"},
+        }
+        assert patient_key(coverage) == "p3"
+        assert patient_key({"resourceType": "Practitioner", "id": "dr1"}) is None
+
+    @pytest.mark.asyncio
+    async def test_spool_groups_resources_by_patient(self, tmp_path):
+        """Resources scattered across type files are grouped per patient."""
+        self._write_export(tmp_path)
+
+        with NdjsonSpool(shards=4) as spool:
+            for path in find_ndjson_files([tmp_path]):
+                spool.add_file(path)
+            spool.finish()
+            groups: dict[str, list[dict]] = {}
+            async for shard in spool.patient_groups():
+                groups.update(shard)
+
+        assert spool.spooled == 5
+        assert spool.skipped == 1
+        assert sorted(groups) == ["p1", "p2"]
+        assert [r["id"] for r in groups["p1"]][0] == "p1"
+        assert sorted(r["id"] for r in groups["p1"]) == ["c1", "i1", "p1"]
+        assert [r["id"] for r in groups["p2"]] == ["p2", "c2"]
+
+    @pytest.mark.asyncio
+    async def test_spool_feed_handles_split_lines(self):
+        """Streamed chunks may split lines (and UTF-8 sequences) anywhere."""
+        import json
+
+        patient = {
+            "resourceType": "Patient",
+            "id": "p1",
+            "name": [{"family": "Müller"}],
+        }
+        condition = {
+            "resourceType": "Condition",
+            "subject": {"reference": "Patient/p1"},
+        }
+        body = (json.dumps(patient) + "\nnot json\n" + json.dumps(condition)).encode(
+            "utf-8"
+        )
+
+        with NdjsonSpool(shards=2) as spool:
+            for i in range(0, len(body), 5):
+                spool.feed(body[i : i + 5])
+            spool.finish()
+            groups = [g async for g in spool.patient_groups()]
+
+        assert spool.spooled == 2
+        assert spool.invalid == 1
+        assert groups[0]["p1"][0]["name"][0]["family"] == "Müller"
+
+    @pytest.mark.asyncio
+    async def test_import_loads_patients_in_parallel(self, tmp_path):
+        """Each patient is loaded in its own session; failures are counted."""
+        import asyncio
+
+        from app.services.fhir_loader import BundleLoadResult
+
+        self._write_export(tmp_path)
+        in_flight = 0
+        peak = 0
+
+        async def fake_load(session, graph, entries, **kwargs):
+            nonlocal in_flight, peak
+            resources = [e["resource"] async for e in entries]
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if resources[0]["id"] == "p2":
+                raise ValueError("boom")
+            return BundleLoadResult(patient_id=uuid.uuid4(), inserted=len(resources))
+
+        session = MagicMock()
+        session.commit = AsyncMock()
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=None)
+        session_factory = MagicMock(return_value=session)
+
+        with NdjsonSpool(shards=1) as spool:
+            for path in find_ndjson_files([tmp_path]):
+                spool.add_file(path)
+            spool.finish()
+            with patch(
+                "app.services.fhir_loader.load_bundle_stream", side_effect=fake_load
+            ):
+                result = await import_ndjson(
+                    session_factory, MagicMock(), spool, workers=2
+                )
+
+        assert result.patients_loaded == 1
+        assert result.patients_failed == 1
+        assert result.resources_inserted == 3
+        assert result.resources_skipped == 1
+        assert peak == 2
+        assert session.commit.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_import_rejects_zero_workers(self):
+        """Worker count must be positive."""
+        with NdjsonSpool(shards=1) as spool:
+            spool.finish()
+            with pytest.raises(ValueError):
+                await import_ndjson(MagicMock(), MagicMock(), spool, workers=0)
+
+
+class TestDeferredIngest:
+    """Unit tests for enqueuing post-ingest work instead of running it inline."""
+
+    def _written(self, resources: list[dict], status: str = "inserted"):
+        return [
+            WrittenResource(
+                id=uuid.uuid4(),
+                fhir_id=r["id"],
+                resource_type=r["resourceType"],
+                data=r,
+                status=status,
+            )
+            for r in resources
+        ]
+
+    def _graph(self) -> MagicMock:
+        graph = MagicMock()
+        graph.build_from_fhir = AsyncMock()
+        graph.build_relationships = AsyncMock()
+        return graph
+
+    def _enqueued(self, enqueue: MagicMock) -> dict:
+        """Map each enqueued job kind to its payload."""
+        return {
+            c.args[2]: c.args[3] if len(c.args) > 3 else None
+            for c in enqueue.call_args_list
+        }
+
+    @pytest.mark.asyncio
+    async def test_sync_bundle_defers_graph_embed_and_compile(
+        self, sample_patient, sample_condition
+    ):
+        """With defer, only the rows are written and jobs are enqueued."""
+        patient_id = uuid.uuid4()
+        written = self._written([sample_patient, sample_condition])
+        graph = self._graph()
+        bundle = create_bundle([sample_patient, sample_condition])
+
+        with (
+            patch(
+                "app.services.fhir_loader.write_bundle_resources",
+                new=AsyncMock(return_value=(patient_id, written)),
+            ),
+            patch("app.services.fhir_loader.enqueue_job") as enqueue,
+            patch("app.services.fhir_loader._generate_embeddings") as embed,
+            patch("app.services.fhir_loader.compile_and_store") as compile_mock,
+        ):
+            result = await sync_bundle(MagicMock(), graph, bundle, defer=True)
+
+        assert result.deferred is True
+        assert result.inserted == 2
+        graph.build_from_fhir.assert_not_called()
+        embed.assert_not_called()
+        compile_mock.assert_not_called()
+
+        jobs = self._enqueued(enqueue)
+        assert set(jobs) == {IngestJobKind.GRAPH, IngestJobKind.EMBED}
+        assert set(jobs[IngestJobKind.GRAPH]["resource_ids"]) == {
+            str(w.id) for w in written
+        }
+        assert set(jobs[IngestJobKind.EMBED]["resource_ids"]) == {
+            str(w.id) for w in written
+        }
+
+    @pytest.mark.asyncio
+    async def test_unchanged_reload_only_compiles_when_missing(self, sample_patient):
+        """Nothing changed and no summary: only a compile job is enqueued."""
+        written = self._written([sample_patient], status="unchanged")
+        written[0].has_embedding = True
+        bundle = create_bundle([sample_patient])
+
+        with (
+            patch(
+                "app.services.fhir_loader.write_bundle_resources",
+                new=AsyncMock(return_value=(uuid.uuid4(), written)),
+            ),
+            patch(
+                "app.services.fhir_loader._has_compiled_summary",
+                new=AsyncMock(return_value=False),
+            ),
+            patch("app.services.fhir_loader.enqueue_job") as enqueue,
+        ):
+            result = await sync_bundle(MagicMock(), self._graph(), bundle, defer=True)
+
+        assert result.unchanged == 1
+        assert list(self._enqueued(enqueue)) == [IngestJobKind.COMPILE]
+
+    @pytest.mark.asyncio
+    async def test_stream_enqueues_once_after_all_batches(
+        self, sample_patient, sample_condition, sample_observation
+    ):
+        """A deferred stream load enqueues one set of jobs for every batch."""
+        resources = [sample_patient, sample_condition, sample_observation]
+        graph = self._graph()
+
+        async def entries():
+            for resource in resources:
+                yield {"resource": resource}
+
+        async def fake_write(db, patient_id, batch, existing, force=False):
+            return self._written(batch)
+
+        with (
+            patch(
+                "app.services.fhir_loader._resolve_patient",
+                new=AsyncMock(return_value=(uuid.uuid4(), {})),
+            ),
+            patch(
+                "app.services.fhir_loader._write_resource_batch",
+                side_effect=fake_write,
+            ),
+            patch("app.services.fhir_loader.enqueue_job") as enqueue,
+        ):
+            result = await load_bundle_stream(
+                MagicMock(), graph, entries(), batch_size=1, defer=True
+            )
+
+        assert result.inserted == 3
+        graph.build_relationships.assert_not_called()
+        jobs = self._enqueued(enqueue)
+        assert enqueue.call_count == 2
+        assert len(jobs[IngestJobKind.GRAPH]["resource_ids"]) == 3
+
+    @pytest.mark.asyncio
+    async def test_graph_job_builds_relationships_once_then_compiles(
+        self, sample_patient, sample_condition
+    ):
+        """The graph job MERGEs nodes, links them once and enqueues compile."""
+        job = IngestJob(
+            id=uuid.uuid4(),
+            kind=IngestJobKind.GRAPH,
+            patient_id=uuid.uuid4(),
+            payload={"resource_ids": []},
+        )
+        graph = self._graph()
+        rows = self._written([sample_patient, sample_condition])
+
+        with (
+            patch(
+                "app.services.fhir_loader._load_job_resources",
+                new=AsyncMock(return_value=rows),
+            ),
+            patch("app.services.fhir_loader.enqueue_job") as enqueue,
+        ):
+            await _run_graph_job(MagicMock(), graph, job)
+
+        graph.build_from_fhir.assert_awaited_once_with(
+            str(job.patient_id),
+            [sample_patient, sample_condition],
+            build_relationships=False,
+        )
+        graph.build_relationships.assert_awaited_once_with(str(job.patient_id))
+        assert enqueue.call_args.args[2] == IngestJobKind.COMPILE
+
+    @pytest.mark.asyncio
+    async def test_graph_job_merges_patient_in_first_slice(
+        self, sample_patient, sample_condition
+    ):
+        """A Patient row loaded last still lands in the first MERGE slice."""
+        job = IngestJob(
+            id=uuid.uuid4(),
+            kind=IngestJobKind.GRAPH,
+            patient_id=uuid.uuid4(),
+            payload={"resource_ids": []},
+        )
+        graph = self._graph()
+        conditions = [
+            {**sample_condition, "id": f"condition-{i}"}
+            for i in range(STREAM_BATCH_SIZE + 1)
+        ]
+        rows = self._written([*conditions, sample_patient])
+
+        with (
+            patch(
+                "app.services.fhir_loader._load_job_resources",
+                new=AsyncMock(return_value=rows),
+            ),
+            patch("app.services.fhir_loader.enqueue_job"),
+        ):
+            await _run_graph_job(MagicMock(), graph, job)
+
+        slices = [c.args[1] for c in graph.build_from_fhir.await_args_list]
+        assert len(slices) == 2
+        assert slices[0][0] == sample_patient
+        assert sum(len(s) for s in slices) == len(conditions) + 1
+
+    @pytest.mark.asyncio
+    async def test_embed_job_raises_so_it_is_retried(self, sample_condition):
+        """Embedding failures propagate out of the job instead of being logged."""
+        job = IngestJob(
+            id=uuid.uuid4(),
+            kind=IngestJobKind.EMBED,
+            patient_id=uuid.uuid4(),
+            payload={"resource_ids": []},
+        )
+        service = MagicMock()
+        service.embed_texts = AsyncMock(side_effect=RuntimeError("429"))
+        service.close = AsyncMock()
+
+        with (
+            patch(
+                "app.services.fhir_loader._load_job_resources",
+                new=AsyncMock(return_value=self._written([sample_condition])),
+            ),
+            patch("app.services.fhir_loader.EmbeddingService", return_value=service),
+            patch.object(settings, "embedding_cache_enabled", False),
+            patch("app.services.fhir_loader._store_embeddings") as store,
+        ):
+            with pytest.raises(RuntimeError, match="429"):
+                await _run_embed_job(MagicMock(), MagicMock(), job)
+
+        store.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_embed_job_chunks_notes(self, sample_document_reference):
+        """Embed jobs also replace the note chunks of their DocumentReferences."""
+        job = IngestJob(
+            id=uuid.uuid4(),
+            kind=IngestJobKind.EMBED,
+            patient_id=uuid.uuid4(),
+            payload={"resource_ids": []},
+        )
+        resources = self._written([sample_document_reference])
+        db = MagicMock()
+
+        with (
+            patch(
+                "app.services.fhir_loader._load_job_resources",
+                new=AsyncMock(return_value=resources),
+            ),
+            patch("app.services.fhir_loader._generate_embeddings", new=AsyncMock()),
+            patch("app.services.fhir_loader._store_embeddings", new=AsyncMock()),
+            patch(
+                "app.services.fhir_loader.sync_note_chunks", new=AsyncMock()
+            ) as sync_chunks,
+        ):
+            await _run_embed_job(db, MagicMock(), job)
+
+        sync_chunks.assert_awaited_once_with(
+            db, job.patient_id, resources, raise_errors=True
+        )
+
+
 # =============================================================================
 # Tests for load_bundle compilation trigger
 # =============================================================================
@@ -863,16 +1937,10 @@ class TestLoadBundleCompilationTrigger:
         bundle = create_bundle([sample_patient])
         patient_id = await load_bundle(db_session, graph, bundle)
 
-        result = await db_session.execute(
-            select(FhirResource).where(
-                FhirResource.patient_id == patient_id,
-                FhirResource.resource_type == "Patient",
-            )
-        )
-        patient = result.scalar_one()
-        assert patient.compiled_summary is not None
-        assert "patient_orientation" in patient.compiled_summary
-        assert patient.compiled_at is not None
+        summary = await db_session.get(PatientSummary, patient_id)
+        assert summary is not None
+        assert "patient_orientation" in summary.compiled_summary
+        assert summary.compiled_at is not None
 
     @pytest.mark.asyncio
     async def test_reload_bundle_recompiles_summary(
@@ -885,29 +1953,51 @@ class TestLoadBundleCompilationTrigger:
         patient_id = await load_bundle(db_session, graph, bundle)
         await db_session.flush()
 
-        result = await db_session.execute(
-            select(FhirResource).where(
-                FhirResource.patient_id == patient_id,
-                FhirResource.resource_type == "Patient",
-            )
+        compiled_at = select(PatientSummary.compiled_at).where(
+            PatientSummary.patient_id == patient_id
         )
-        patient = result.scalar_one()
-        first_compiled_at = patient.compiled_at
+        first_compiled_at = (await db_session.execute(compiled_at)).scalar_one()
         assert first_compiled_at is not None
 
         # Second load (recompile) — idempotent via upsert
         await load_bundle(db_session, graph, bundle)
 
         # Re-query to get updated row
-        result2 = await db_session.execute(
-            select(FhirResource).where(
-                FhirResource.patient_id == patient_id,
-                FhirResource.resource_type == "Patient",
+        second_compiled_at = (await db_session.execute(compiled_at)).scalar_one()
+        assert second_compiled_at >= first_compiled_at
+
+    @pytest.mark.asyncio
+    async def test_cache_failure_does_not_abort_load(
+        self, db_session, graph, sample_patient, sample_condition
+    ):
+        """A failing embedding cache insert leaves the load committable."""
+
+        async def failing_insert(db, model, vectors):
+            # NOT NULL violation inside the load's own transaction
+            await db.execute(text("INSERT INTO embedding_cache (key) VALUES (NULL)"))
+
+        service = MagicMock()
+        service.embed_texts = AsyncMock(
+            side_effect=lambda texts: [[0.1] * 1536 for _ in texts]
+        )
+        service.close = AsyncMock()
+        bundle = create_bundle([sample_patient, sample_condition])
+
+        with (
+            patch.object(settings, "embedding_cache_enabled", True),
+            patch("app.services.fhir_loader.EmbeddingService", return_value=service),
+            patch("app.services.embedding_cache._insert", side_effect=failing_insert),
+        ):
+            patient_id = await load_bundle(db_session, graph, bundle)
+        await db_session.commit()
+
+        result = await db_session.execute(
+            select(FhirResource.resource_type).where(
+                FhirResource.patient_id == patient_id
             )
         )
-        patient2 = result2.scalar_one()
-        assert patient2.compiled_at is not None
-        assert patient2.compiled_at >= first_compiled_at
+        assert sorted(result.scalars()) == ["Condition", "Patient"]
+        assert await db_session.get(PatientSummary, patient_id) is not None
 
     @pytest.mark.asyncio
     async def test_compilation_failure_does_not_block_load(
@@ -926,12 +2016,11 @@ class TestLoadBundleCompilationTrigger:
         # Bundle load should still succeed
         assert patient_id is not None
         result = await db_session.execute(
-            select(FhirResource).where(
+            select(FhirResource.id).where(
                 FhirResource.patient_id == patient_id,
                 FhirResource.resource_type == "Patient",
             )
         )
-        patient = result.scalar_one()
-        assert patient is not None
-        # compiled_summary should be None since compilation failed
-        assert patient.compiled_summary is None
+        assert result.scalar_one() is not None
+        # No compiled summary since compilation failed
+        assert await db_session.get(PatientSummary, patient_id) is None
@@ -5,21 +5,23 @@ Requires Neo4j to be running.
 """
 
 import json
+from unittest.mock import patch
 
 import pytest
 
+from app.config import settings
 from app.services.graph import (
     KnowledgeGraph,
-    _extract_reference_id,
-    _extract_reference_ids,
-    _extract_first_coding,
+    _extract_claim_diagnosis_fhir_ids,
+    _extract_claim_encounter_fhir_ids,
     _extract_clinical_status,
-    _extract_encounter_fhir_id,
-    _extract_observation_value,
     _extract_context_encounter_fhir_id,
     _extract_doc_ref_encounter_fhir_id,
-    _extract_claim_encounter_fhir_ids,
-    _extract_claim_diagnosis_fhir_ids,
+    _extract_encounter_fhir_id,
+    _extract_first_coding,
+    _extract_observation_value,
+    _extract_reference_id,
+    _extract_reference_ids,
 )
 
 # All tests in this module require Neo4j
@@ -1065,7 +1067,8 @@ async def test_encounter_recorded_observation_relationship(
 ):
     """Test Encounter -[:RECORDED]-> Observation relationship is created."""
     await graph.build_from_fhir(
-        patient_id, [sample_patient, sample_encounter, sample_observation_with_encounter]
+        patient_id,
+        [sample_patient, sample_encounter, sample_observation_with_encounter],
     )
 
     async with neo4j_driver.session() as session:
@@ -1149,7 +1152,9 @@ async def test_encounter_reported_diagnostic_report_relationship(
         record = await result.single()
 
     assert record is not None
-    assert record["report_id"] == sample_diagnostic_report_with_encounter_and_results["id"]
+    assert (
+        record["report_id"] == sample_diagnostic_report_with_encounter_and_results["id"]
+    )
 
 
 # =============================================================================
@@ -1335,7 +1340,10 @@ async def test_get_encounter_events(
     assert events["conditions"][0]["resourceType"] == "Condition"
 
     assert len(events["medications"]) == 1
-    assert events["medications"][0]["id"] == sample_medication_with_encounter_and_reason["id"]
+    assert (
+        events["medications"][0]["id"]
+        == sample_medication_with_encounter_and_reason["id"]
+    )
     assert events["medications"][0]["resourceType"] == "MedicationRequest"
 
     assert len(events["observations"]) == 1
@@ -1343,14 +1351,62 @@ async def test_get_encounter_events(
     assert events["observations"][0]["resourceType"] == "Observation"
 
     assert len(events["procedures"]) == 1
-    assert events["procedures"][0]["id"] == sample_procedure_with_encounter_and_reason["id"]
+    assert (
+        events["procedures"][0]["id"]
+        == sample_procedure_with_encounter_and_reason["id"]
+    )
     assert events["procedures"][0]["resourceType"] == "Procedure"
 
     assert len(events["diagnostic_reports"]) == 1
-    assert events["diagnostic_reports"][0]["id"] == sample_diagnostic_report_with_encounter_and_results["id"]
+    assert (
+        events["diagnostic_reports"][0]["id"]
+        == sample_diagnostic_report_with_encounter_and_results["id"]
+    )
     assert events["diagnostic_reports"][0]["resourceType"] == "DiagnosticReport"
 
 
+@pytest.mark.asyncio
+async def test_get_encounter_events_batch_matches_single(
+    graph: KnowledgeGraph,
+    patient_id: str,
+    sample_patient,
+    sample_encounter,
+    sample_condition_with_encounter,
+    sample_medication_with_encounter_and_reason,
+    sample_observation_with_encounter,
+    sample_procedure_with_encounter_and_reason,
+    sample_diagnostic_report_with_encounter_and_results,
+):
+    """Test get_encounter_events_batch returns the same events as get_encounter_events."""
+    await graph.build_from_fhir(
+        patient_id,
+        [
+            sample_patient,
+            sample_encounter,
+            sample_condition_with_encounter,
+            sample_medication_with_encounter_and_reason,
+            sample_observation_with_encounter,
+            sample_procedure_with_encounter_and_reason,
+            sample_diagnostic_report_with_encounter_and_results,
+        ],
+    )
+
+    batch = await graph.get_encounter_events_batch(
+        patient_id, [sample_encounter["id"], "nonexistent-encounter"]
+    )
+
+    assert batch[sample_encounter["id"]] == await graph.get_encounter_events(
+        sample_encounter["id"]
+    )
+    assert all(events == [] for events in batch["nonexistent-encounter"].values())
+    assert len(batch["nonexistent-encounter"]) == 11
+    # Encounters of other patients are not visible
+    other = await graph.get_encounter_events_batch(
+        "other-patient", [sample_encounter["id"]]
+    )
+    assert all(events == [] for events in other[sample_encounter["id"]].values())
+
+
 @pytest.mark.asyncio
 async def test_get_encounter_events_empty_for_nonexistent(graph: KnowledgeGraph):
     """Test get_encounter_events returns empty collections for nonexistent encounter."""
@@ -1383,7 +1439,9 @@ async def test_get_medications_treating_condition(
         ],
     )
 
-    meds = await graph.get_medications_treating_condition(sample_condition_with_encounter["id"])
+    meds = await graph.get_medications_treating_condition(
+        sample_condition_with_encounter["id"]
+    )
 
     assert len(meds) == 1
     assert meds[0]["id"] == sample_medication_with_encounter_and_reason["id"]
@@ -1410,13 +1468,141 @@ async def test_get_procedures_for_condition(
         ],
     )
 
-    procs = await graph.get_procedures_for_condition(sample_condition_with_encounter["id"])
+    procs = await graph.get_procedures_for_condition(
+        sample_condition_with_encounter["id"]
+    )
 
     assert len(procs) == 1
     assert procs[0]["id"] == sample_procedure_with_encounter_and_reason["id"]
     assert procs[0]["resourceType"] == "Procedure"
 
 
+@pytest.mark.asyncio
+async def test_get_condition_context_batch(
+    graph: KnowledgeGraph,
+    patient_id: str,
+    sample_patient,
+    sample_encounter,
+    sample_condition_with_encounter,
+    sample_medication_with_encounter_and_reason,
+    sample_procedure_with_encounter_and_reason,
+):
+    """Test get_condition_context_batch returns every condition's context in one call."""
+    await graph.build_from_fhir(
+        patient_id,
+        [
+            sample_patient,
+            sample_encounter,
+            sample_condition_with_encounter,
+            sample_medication_with_encounter_and_reason,
+            sample_procedure_with_encounter_and_reason,
+        ],
+    )
+
+    condition_id = sample_condition_with_encounter["id"]
+    contexts = await graph.get_condition_context_batch(
+        [condition_id, "nonexistent-condition"]
+    )
+
+    context = contexts[condition_id]
+    assert [m["id"] for m in context["treating_medications"]] == [
+        sample_medication_with_encounter_and_reason["id"]
+    ]
+    assert [p["id"] for p in context["procedures"]] == [
+        sample_procedure_with_encounter_and_reason["id"]
+    ]
+    assert context["care_plans"] == []
+    assert contexts["nonexistent-condition"] == {
+        "treating_medications": [],
+        "care_plans": [],
+        "procedures": [],
+    }
+    assert await graph.get_condition_context_batch([]) == {}
+
+
+@pytest.fixture
+def sample_medication_without_reason(
+    sample_medication_with_encounter_and_reason,
+) -> dict:
+    """MedicationRequest prescribed during the encounter with no reasonReference."""
+    med = dict(sample_medication_with_encounter_and_reason, id="medication-no-reason")
+    del med["reasonReference"]
+    return med
+
+
+@pytest.mark.asyncio
+async def test_get_inferred_condition_links_traverses_encounters(
+    graph: KnowledgeGraph,
+    patient_id: str,
+    sample_patient,
+    sample_encounter,
+    sample_condition_with_encounter,
+    sample_medication_without_reason,
+):
+    """Test meds are linked to conditions diagnosed during their prescribing encounter."""
+    await graph.build_from_fhir(
+        patient_id,
+        [
+            sample_patient,
+            sample_encounter,
+            sample_condition_with_encounter,
+            sample_medication_without_reason,
+        ],
+    )
+
+    links = await graph.get_inferred_condition_links(
+        patient_id, [sample_medication_without_reason["id"], "nonexistent-med"]
+    )
+
+    assert links == {
+        sample_medication_without_reason["id"]: [sample_condition_with_encounter["id"]]
+    }
+
+
+@pytest.mark.asyncio
+async def test_inferred_treats_materialized_at_build(
+    graph: KnowledgeGraph,
+    patient_id: str,
+    neo4j_driver,
+    sample_patient,
+    sample_encounter,
+    sample_condition_with_encounter,
+    sample_medication_with_encounter_and_reason,
+    sample_medication_without_reason,
+):
+    """Test INFERRED_TREATS edges are built only for meds without a TREATS edge."""
+    with patch.object(settings, "graph_inferred_treats_enabled", True):
+        await graph.build_from_fhir(
+            patient_id,
+            [
+                sample_patient,
+                sample_encounter,
+                sample_condition_with_encounter,
+                sample_medication_with_encounter_and_reason,
+                sample_medication_without_reason,
+            ],
+        )
+        links = await graph.get_inferred_condition_links(
+            patient_id, [sample_medication_without_reason["id"]]
+        )
+
+    async with neo4j_driver.session() as session:
+        result = await session.run(
+            """
+            MATCH (m:MedicationRequest)-[:INFERRED_TREATS]->(c:Condition)
+            RETURN m.fhir_id as med_id, c.fhir_id as condition_id
+            """
+        )
+        edges = [(record["med_id"], record["condition_id"]) async for record in result]
+
+    assert edges == [
+        (sample_medication_without_reason["id"], sample_condition_with_encounter["id"])
+    ]
+    assert links == {
+        sample_medication_without_reason["id"]: [sample_condition_with_encounter["id"]]
+    }
+
+
 # =============================================================================
 # Tests for encounter_fhir_id stored on nodes
 # =============================================================================
@@ -1611,7 +1797,10 @@ async def test_build_from_fhir_creates_immunization_with_relationship(
     imm_node = record["im"]
     assert imm_node["fhir_id"] == sample_immunization["id"]
     assert imm_node["code"] == sample_immunization["vaccineCode"]["coding"][0]["code"]
-    assert imm_node["display"] == sample_immunization["vaccineCode"]["coding"][0]["display"]
+    assert (
+        imm_node["display"]
+        == sample_immunization["vaccineCode"]["coding"][0]["display"]
+    )
     assert imm_node["status"] == sample_immunization["status"]
 
 
@@ -1668,7 +1857,8 @@ async def test_encounter_administered_immunization_relationship(
 ):
     """Test Encounter -[:ADMINISTERED]-> Immunization relationship is created."""
     await graph.build_from_fhir(
-        patient_id, [sample_patient, sample_encounter, sample_immunization_with_encounter]
+        patient_id,
+        [sample_patient, sample_encounter, sample_immunization_with_encounter],
     )
 
     async with neo4j_driver.session() as session:
@@ -1720,9 +1910,7 @@ async def test_search_nodes_by_name_multiple_terms(
 
     cond_display = sample_condition["code"]["coding"][0]["display"]
     med_display = sample_medication["medicationCodeableConcept"]["coding"][0]["display"]
-    results = await graph.search_nodes_by_name(
-        patient_id, [cond_display, med_display]
-    )
+    results = await graph.search_nodes_by_name(patient_id, [cond_display, med_display])
 
     fhir_ids = {r["fhir_id"] for r in results}
     assert sample_condition["id"] in fhir_ids
@@ -1963,7 +2151,9 @@ async def test_careplan_uses_title_over_category(
     sample_careplan_with_title,
 ):
     """Test that CarePlan prefers title over category display."""
-    await graph.build_from_fhir(patient_id, [sample_patient, sample_careplan_with_title])
+    await graph.build_from_fhir(
+        patient_id, [sample_patient, sample_careplan_with_title]
+    )
 
     async with neo4j_driver.session() as session:
         result = await session.run(
@@ -2018,7 +2208,11 @@ async def test_careplan_addresses_condition_relationship(
     """Test CarePlan -[:ADDRESSES]-> Condition relationship is created."""
     await graph.build_from_fhir(
         patient_id,
-        [sample_patient, sample_condition_with_encounter, sample_careplan_with_addresses],
+        [
+            sample_patient,
+            sample_condition_with_encounter,
+            sample_careplan_with_addresses,
+        ],
     )
 
     async with neo4j_driver.session() as session:
@@ -2047,7 +2241,11 @@ async def test_careplan_stores_addresses_fhir_ids(
     """Test that CarePlan node stores addresses_fhir_ids for ADDRESSES relationship."""
     await graph.build_from_fhir(
         patient_id,
-        [sample_patient, sample_condition_with_encounter, sample_careplan_with_addresses],
+        [
+            sample_patient,
+            sample_condition_with_encounter,
+            sample_careplan_with_addresses,
+        ],
     )
 
     async with neo4j_driver.session() as session:
@@ -2088,11 +2286,7 @@ class TestExtractDocRefEncounterFhirId:
     """Unit tests for _extract_doc_ref_encounter_fhir_id helper."""
 
     def test_extracts_encounter_from_context_array(self):
-        resource = {
-            "context": {
-                "encounter": [{"reference": "Encounter/enc-789"}]
-            }
-        }
+        resource = {"context": {"encounter": [{"reference": "Encounter/enc-789"}]}}
         assert _extract_doc_ref_encounter_fhir_id(resource) == "enc-789"
 
     def test_handles_empty_encounter_array(self):
@@ -2274,7 +2468,9 @@ async def test_build_from_fhir_creates_medication_administration(
     sample_medication_administration,
 ):
     """Test MedicationAdministration node creation with HAS_MEDICATION_ADMINISTRATION relationship."""
-    await graph.build_from_fhir(patient_id, [sample_patient, sample_medication_administration])
+    await graph.build_from_fhir(
+        patient_id, [sample_patient, sample_medication_administration]
+    )
 
     async with neo4j_driver.session() as session:
         result = await session.run(
@@ -2527,7 +2723,11 @@ async def test_encounter_given_medication_administration(
     """Test Encounter -[:GIVEN]-> MedicationAdministration relationship."""
     await graph.build_from_fhir(
         patient_id,
-        [sample_patient, sample_encounter, sample_medication_administration_with_encounter],
+        [
+            sample_patient,
+            sample_encounter,
+            sample_medication_administration_with_encounter,
+        ],
     )
 
     async with neo4j_driver.session() as session:
@@ -2597,7 +2797,12 @@ async def test_claim_billed_for_encounter(
     """Test Claim -[:BILLED_FOR]-> Encounter relationship."""
     await graph.build_from_fhir(
         patient_id,
-        [sample_patient, sample_encounter, sample_condition_with_encounter, sample_claim],
+        [
+            sample_patient,
+            sample_encounter,
+            sample_condition_with_encounter,
+            sample_claim,
+        ],
     )
 
     async with neo4j_driver.session() as session:
@@ -2627,7 +2832,12 @@ async def test_claim_claims_diagnosis_condition(
     """Test Claim -[:CLAIMS_DIAGNOSIS]-> Condition relationship."""
     await graph.build_from_fhir(
         patient_id,
-        [sample_patient, sample_encounter, sample_condition_with_encounter, sample_claim],
+        [
+            sample_patient,
+            sample_encounter,
+            sample_condition_with_encounter,
+            sample_claim,
+        ],
     )
 
     async with neo4j_driver.session() as session:
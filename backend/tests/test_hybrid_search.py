@@ -0,0 +1,570 @@
+"""Tests for hybrid lexical + vector search with reciprocal rank fusion."""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import FhirResource, NoteChunk
+from app.services.hybrid_search import (
+    HybridQuery,
+    HybridResult,
+    HybridSearchService,
+    resource_filter_conditions,
+)
+from app.services.vector_search import EMBEDDING_DIMENSION, MAX_BATCH_QUERIES
+
+
+def _embedding(values: list[float]) -> list[float]:
+    """Unit-length embedding with the given leading values."""
+    result = values + [0.0] * (EMBEDDING_DIMENSION - len(values))
+    magnitude = sum(v * v for v in result) ** 0.5
+    return [v / magnitude for v in result]
+
+
+def _mock_session(rows: list) -> MagicMock:
+    session = MagicMock()
+    result = MagicMock()
+    result.all.return_value = rows
+    session.execute = AsyncMock(return_value=result)
+    return session
+
+
+def _row(ordinal: int, fhir_id: str, score: float, **kwargs) -> MagicMock:
+    row = MagicMock()
+    row.ord = ordinal
+    row.fhir_id = fhir_id
+    row.resource_type = "Condition"
+    row.data = {"resourceType": "Condition", "id": fhir_id}
+    row.score = score
+    row.lexical_rank = kwargs.get("lexical_rank")
+    row.distance = kwargs.get("distance")
+    row.passage = kwargs.get("passage")
+    row.passage_distance = kwargs.get("passage_distance")
+    return row
+
+
+def _compiled_sql(session: MagicMock) -> str:
+    statement = session.execute.await_args.args[0]
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+# =============================================================================
+# Unit Tests (no database)
+# =============================================================================
+
+
+class TestHybridResult:
+    def test_signals(self):
+        result = HybridResult(
+            resource={},
+            resource_type="DocumentReference",
+            fhir_id="doc-1",
+            score=0.03,
+            lexical_rank=2,
+            passage="Chest pain.",
+            passage_similarity=0.8,
+        )
+
+        assert result.signals == ["lexical", "passage"]
+
+
+class TestHybridSearchServiceInit:
+    def test_weights_default_to_settings(self):
+        with (
+            patch.object(settings, "hybrid_lexical_weight", 0.5),
+            patch.object(settings, "hybrid_semantic_weight", 2.0),
+            patch.object(settings, "hybrid_passage_weight", 0.25),
+            patch.object(settings, "hybrid_rrf_k", 10),
+        ):
+            service = HybridSearchService(MagicMock())
+
+        assert service.lexical_weight == 0.5
+        assert service.semantic_weight == 2.0
+        assert service.passage_weight == 0.25
+        assert service.rrf_k == 10
+
+    def test_explicit_weights_override_settings(self):
+        service = HybridSearchService(MagicMock(), lexical_weight=0.0, rrf_k=0)
+
+        assert service.lexical_weight == 0.0
+        assert service.rrf_k == 0
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"lexical_weight": -1.0},
+            {"semantic_weight": -0.1},
+            {"passage_weight": -0.5},
+            {"rrf_k": -1},
+            {"min_similarity": 1.5},
+            {"index_strategy": "ivfflat"},
+        ],
+    )
+    def test_invalid_arguments_raise(self, kwargs):
+        with pytest.raises(ValueError):
+            HybridSearchService(MagicMock(), **kwargs)
+
+
+class TestSearchStatement:
+    @pytest.mark.asyncio
+    async def test_single_statement_fuses_all_signals(self):
+        session = _mock_session([])
+        service = HybridSearchService(session)
+
+        await service.search(
+            uuid.uuid4(),
+            HybridQuery(text="kidney function", embedding=_embedding([1.0])),
+        )
+
+        # Index scan settings for the transaction, then the one search statement
+        assert session.execute.await_count == 2
+        setup = session.execute.await_args_list[0].args[0]
+        assert "set_config" in str(setup.compile(dialect=postgresql.dialect()))
+        sql = _compiled_sql(session)
+        assert "websearch_to_tsquery" in sql
+        assert "lexical_0" in sql
+        assert "semantic_0" in sql
+        assert "passages_0" in sql
+        assert "note_chunks" in sql
+
+    @pytest.mark.asyncio
+    async def test_without_embedding_is_lexical_only(self):
+        session = _mock_session([])
+        service = HybridSearchService(session)
+
+        await service.search(uuid.uuid4(), HybridQuery(text="metformin"))
+
+        sql = _compiled_sql(session)
+        assert "lexical_0" in sql
+        assert "semantic_0" not in sql
+        assert "note_chunks" not in sql
+
+    @pytest.mark.asyncio
+    async def test_lexical_signal_includes_substring_matches(self):
+        session = _mock_session([])
+        service = HybridSearchService(session)
+
+        await service.search(uuid.uuid4(), HybridQuery(text="100%_dose"))
+
+        sql = _compiled_sql(session)
+        assert "ILIKE" in sql
+        assert "word_similarity" in sql
+        params = (
+            session.execute.await_args.args[0]
+            .compile(dialect=postgresql.dialect())
+            .params
+        )
+        assert r"%100\%\_dose%" in params.values()
+
+    @pytest.mark.asyncio
+    async def test_passages_have_their_own_weight(self):
+        session = _mock_session([])
+        service = HybridSearchService(
+            session, lexical_weight=0.0, semantic_weight=1.75, passage_weight=0.125
+        )
+
+        await service.search(
+            uuid.uuid4(), HybridQuery(text="chest pain", embedding=_embedding([1.0]))
+        )
+
+        params = (
+            session.execute.await_args.args[0]
+            .compile(dialect=postgresql.dialect())
+            .params
+        )
+        weights = list(params.values())
+        assert weights.count(0.125) == 1
+        assert weights.count(1.75) == 1
+
+    @pytest.mark.asyncio
+    async def test_lexical_only_search_skips_index_scan_settings(self):
+        session = _mock_session([])
+        service = HybridSearchService(session)
+
+        await service.search(uuid.uuid4(), HybridQuery(text="metformin"))
+
+        session.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_other_resource_types_skip_note_passages(self):
+        session = _mock_session([])
+        service = HybridSearchService(session)
+
+        await service.search(
+            uuid.uuid4(),
+            HybridQuery(
+                text="metformin",
+                embedding=_embedding([1.0]),
+                resource_type="MedicationRequest",
+            ),
+        )
+
+        sql = _compiled_sql(session)
+        assert "semantic_0" in sql
+        assert "note_chunks" not in sql
+
+    @pytest.mark.asyncio
+    async def test_batched_queries_are_one_statement(self):
+        session = _mock_session(
+            [
+                _row(1, "c-3", 0.01, lexical_rank=5),
+                _row(0, "c-1", 0.016, lexical_rank=1),
+                _row(1, "c-2", 0.03, lexical_rank=1, distance=0.2),
+            ]
+        )
+        service = HybridSearchService(session)
+
+        results = await service.search_many(
+            uuid.uuid4(),
+            [HybridQuery(text="diabetes"), HybridQuery(text="statin")],
+        )
+
+        session.execute.assert_awaited_once()
+        sql = _compiled_sql(session)
+        assert "UNION ALL" in sql
+        assert "fused_0" in sql and "fused_1" in sql
+        assert [r.fhir_id for r in results[0]] == ["c-1"]
+        # Grouped per query and ordered by fused score
+        assert [r.fhir_id for r in results[1]] == ["c-2", "c-3"]
+        assert results[1][0].similarity == pytest.approx(0.8)
+        assert results[1][0].signals == ["lexical", "semantic"]
+
+
+class TestValidation:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "query",
+        [
+            HybridQuery(text="  "),
+            HybridQuery(text="a1c", limit=0),
+            HybridQuery(text="a1c", limit=1000),
+            HybridQuery(text="a1c", embedding=[0.1, 0.2]),
+        ],
+    )
+    async def test_invalid_query_raises(self, query):
+        service = HybridSearchService(_mock_session([]))
+
+        with pytest.raises(ValueError):
+            await service.search(uuid.uuid4(), query)
+
+    @pytest.mark.asyncio
+    async def test_invalid_patient_id_raises(self):
+        service = HybridSearchService(_mock_session([]))
+
+        with pytest.raises(ValueError, match="patient_id"):
+            await service.search("not-a-uuid", HybridQuery(text="a1c"))
+
+    @pytest.mark.asyncio
+    async def test_too_many_queries_raises(self):
+        service = HybridSearchService(_mock_session([]))
+        queries = [HybridQuery(text="a1c")] * (MAX_BATCH_QUERIES + 1)
+
+        with pytest.raises(ValueError, match="queries"):
+            await service.search_many(uuid.uuid4(), queries)
+
+
+class TestResourceFilterConditions:
+    def test_no_filters(self):
+        assert resource_filter_conditions() == []
+
+    def test_one_condition_per_filter(self):
+        conditions = resource_filter_conditions(
+            resource_type="Condition",
+            status="active",
+            category="laboratory",
+            date_from="2024-01-01",
+            date_to="2024-12-31",
+        )
+
+        assert len(conditions) == 5
+
+    def test_date_filters_use_effective_date_column(self):
+        conditions = resource_filter_conditions(
+            date_from="2024-01-01", date_to="2024-12-31"
+        )
+
+        for condition in conditions:
+            sql = str(condition.compile(dialect=postgresql.dialect()))
+            assert "effective_date" in sql
+            assert "coalesce" not in sql
+
+    def test_date_bounds_compare_as_instants(self):
+        lower, upper = resource_filter_conditions(
+            date_from="2024-01-01", date_to="2024-12-31T12:00:00-05:00"
+        )
+
+        for condition, op in ((lower, ">="), (upper, "<=")):
+            compiled = condition.compile(dialect=postgresql.dialect())
+            assert f"effective_date {op} fhir_timestamptz(" in str(compiled)
+
+    def test_date_only_upper_bound_covers_whole_day(self):
+        (upper,) = resource_filter_conditions(date_to="2024-01-05")
+
+        compiled = upper.compile(dialect=postgresql.dialect())
+        assert "effective_date < fhir_timestamptz(" in str(compiled)
+        assert timedelta(days=1) in compiled.params.values()
+
+
+# =============================================================================
+# Integration Tests (database)
+# =============================================================================
+
+
+@pytest_asyncio.fixture
+async def patient_id() -> uuid.UUID:
+    return uuid.uuid4()
+
+
+@pytest_asyncio.fixture
+async def hybrid_db(db_session: AsyncSession, patient_id: uuid.UUID) -> dict:
+    """Resources that match by keyword, by meaning, or both."""
+    specs = {
+        # Matches "kidney" by keyword and by meaning
+        "both": (
+            "Condition",
+            "Condition: Chronic kidney disease stage 3. Status: active",
+            _embedding([1.0, 0.1]),
+        ),
+        # Matches by meaning only (no shared words)
+        "semantic": (
+            "Observation",
+            "Observation: eGFR 45 mL/min/1.73m2",
+            _embedding([0.9, 0.3]),
+        ),
+        # Matches by keyword only
+        "lexical": (
+            "Procedure",
+            "Procedure: Kidney ultrasound",
+            _embedding([0.0, 0.0, 1.0]),
+        ),
+        "unrelated": (
+            "Condition",
+            "Condition: Seasonal allergic rhinitis",
+            _embedding([0.0, 1.0]),
+        ),
+    }
+    resources = {}
+    for key, (resource_type, text, embedding) in specs.items():
+        resource = FhirResource(
+            fhir_id=f"{key}-{uuid.uuid4()}",
+            resource_type=resource_type,
+            patient_id=patient_id,
+            data={"resourceType": resource_type},
+            embedding=embedding,
+            embedding_text=text,
+        )
+        db_session.add(resource)
+        resources[key] = resource
+
+    # Another patient's identical match must never be returned
+    db_session.add(
+        FhirResource(
+            fhir_id=f"other-{uuid.uuid4()}",
+            resource_type="Condition",
+            patient_id=uuid.uuid4(),
+            data={"resourceType": "Condition"},
+            embedding=_embedding([1.0, 0.1]),
+            embedding_text="Condition: Chronic kidney disease stage 3",
+        )
+    )
+    await db_session.flush()
+    return resources
+
+
+class TestHybridSearchIntegration:
+    @pytest.mark.asyncio
+    async def test_resource_matching_both_signals_ranks_first(
+        self, db_session, patient_id, hybrid_db
+    ):
+        service = HybridSearchService(db_session)
+
+        results = await service.search(
+            patient_id,
+            HybridQuery(text="kidney", embedding=_embedding([1.0, 0.1])),
+        )
+
+        fhir_ids = [r.fhir_id for r in results]
+        assert fhir_ids[0] == hybrid_db["both"].fhir_id
+        assert results[0].signals == ["lexical", "semantic"]
+        assert hybrid_db["semantic"].fhir_id in fhir_ids
+        assert hybrid_db["lexical"].fhir_id in fhir_ids
+        assert hybrid_db["unrelated"].fhir_id not in fhir_ids
+        assert len(results) == 3
+
+    @pytest.mark.asyncio
+    async def test_lexical_only_search(self, db_session, patient_id, hybrid_db):
+        service = HybridSearchService(db_session)
+
+        results = await service.search(patient_id, HybridQuery(text="kidneys"))
+
+        # Stemmed full-text match, scoped to the patient
+        assert {r.fhir_id for r in results} == {
+            hybrid_db["both"].fhir_id,
+            hybrid_db["lexical"].fhir_id,
+        }
+        assert all(r.similarity is None for r in results)
+
+    @pytest.mark.asyncio
+    async def test_filters_apply_to_every_signal(
+        self, db_session, patient_id, hybrid_db
+    ):
+        service = HybridSearchService(db_session)
+
+        results = await service.search(
+            patient_id,
+            HybridQuery(
+                text="kidney",
+                embedding=_embedding([1.0, 0.1]),
+                resource_type="Observation",
+            ),
+        )
+
+        assert [r.fhir_id for r in results] == [hybrid_db["semantic"].fhir_id]
+
+    @pytest.mark.asyncio
+    async def test_note_matched_by_passage(self, db_session, patient_id):
+        note = FhirResource(
+            fhir_id=f"doc-{uuid.uuid4()}",
+            resource_type="DocumentReference",
+            patient_id=patient_id,
+            data={"resourceType": "DocumentReference"},
+            embedding=_embedding([0.0, 1.0]),
+            embedding_text="Clinical note: Progress note",
+        )
+        db_session.add(note)
+        await db_session.flush()
+        db_session.add(
+            NoteChunk(
+                resource_id=note.id,
+                patient_id=patient_id,
+                chunk_index=0,
+                start_offset=0,
+                content="Reports exertional chest pain relieved by rest.",
+                embedding=_embedding([1.0]),
+            )
+        )
+        await db_session.flush()
+        service = HybridSearchService(db_session)
+
+        results = await service.search(
+            patient_id, HybridQuery(text="angina", embedding=_embedding([1.0]))
+        )
+
+        assert [r.fhir_id for r in results] == [note.fhir_id]
+        assert results[0].passage.startswith("Reports exertional chest pain")
+        assert results[0].passage_similarity == pytest.approx(1.0, abs=1e-4)
+
+    @pytest.mark.asyncio
+    async def test_batched_searches_match_single_searches(
+        self, db_session, patient_id, hybrid_db
+    ):
+        service = HybridSearchService(db_session)
+        queries = [
+            HybridQuery(text="kidney", embedding=_embedding([1.0, 0.1])),
+            HybridQuery(text="rhinitis"),
+        ]
+
+        batched = await service.search_many(patient_id, queries)
+
+        for query, results in zip(queries, batched):
+            single = await service.search(patient_id, query)
+            assert [r.fhir_id for r in results] == [r.fhir_id for r in single]
+        assert [r.fhir_id for r in batched[1]] == [hybrid_db["unrelated"].fhir_id]
+
+    @pytest.mark.asyncio
+    async def test_partial_word_matches_by_substring(
+        self, db_session, patient_id, hybrid_db
+    ):
+        service = HybridSearchService(db_session)
+
+        # "rhin" is not a full-text token of "rhinitis"; the trigram path finds it
+        results = await service.search(patient_id, HybridQuery(text="rhin"))
+
+        assert [r.fhir_id for r in results] == [hybrid_db["unrelated"].fhir_id]
+        assert results[0].lexical_rank == 1
+
+    @pytest.mark.asyncio
+    async def test_effective_date_generated_from_resource_dates(
+        self, db_session, patient_id
+    ):
+        dated = {
+            "Observation": {"effectiveDateTime": "2024-03-01T10:00:00Z"},
+            "Condition": {"onsetDateTime": "2019-06-15"},
+            "Encounter": {"period": {"start": "2022-11-02T08:00:00Z"}},
+        }
+        for resource_type, fields in dated.items():
+            db_session.add(
+                FhirResource(
+                    fhir_id=f"dated-{uuid.uuid4()}",
+                    resource_type=resource_type,
+                    patient_id=patient_id,
+                    data={"resourceType": resource_type, **fields},
+                    embedding_text=f"{resource_type}: dated",
+                )
+            )
+        await db_session.flush()
+        service = HybridSearchService(db_session)
+
+        results = await service.search(
+            patient_id,
+            HybridQuery(text="dated", date_from="2022-01-01", date_to="2024-12-31"),
+        )
+
+        assert sorted(r.resource_type for r in results) == [
+            "Encounter",
+            "Observation",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_effective_date_compares_mixed_forms_chronologically(
+        self, db_session, patient_id
+    ):
+        # Lexically, "2024-01-05T10:00:00Z" > "2024-01-05" and
+        # "2024-01-05T23:00:00-05:00" < "2024-01-06"
+        dated = {
+            "same-day": "2024-01-05T10:00:00Z",
+            "offset": "2024-01-05T23:00:00-05:00",
+            "date-only": "2024-01-05",
+            "invalid": "2024-02-30",
+        }
+        for label, value in dated.items():
+            db_session.add(
+                FhirResource(
+                    fhir_id=label,
+                    resource_type="Observation",
+                    patient_id=patient_id,
+                    data={"resourceType": "Observation", "effectiveDateTime": value},
+                    embedding_text="Observation: dated",
+                )
+            )
+        await db_session.flush()
+        service = HybridSearchService(db_session)
+
+        on_the_fifth = await service.search(
+            patient_id,
+            HybridQuery(text="dated", date_from="2024-01-05", date_to="2024-01-05"),
+        )
+        from_the_sixth = await service.search(
+            patient_id, HybridQuery(text="dated", date_from="2024-01-06")
+        )
+
+        assert sorted(r.fhir_id for r in on_the_fifth) == ["date-only", "same-day"]
+        assert [r.fhir_id for r in from_the_sixth] == ["offset"]
+        stored = await db_session.execute(
+            select(FhirResource.fhir_id, FhirResource.effective_date)
+            .where(FhirResource.patient_id == patient_id)
+            .order_by(FhirResource.effective_date)
+        )
+        assert stored.all() == [
+            ("date-only", datetime(2024, 1, 5, tzinfo=timezone.utc)),
+            ("same-day", datetime(2024, 1, 5, 10, tzinfo=timezone.utc)),
+            ("offset", datetime(2024, 1, 6, 4, tzinfo=timezone.utc)),
+            ("invalid", None),
+        ]
@@ -0,0 +1,336 @@
+"""Tests for the post-ingest job queue."""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.models import IngestJob, IngestJobKind, IngestJobStatus
+from app.services import job_queue
+from app.services.job_queue import (
+    RETRY_BASE_SECONDS,
+    RETRY_MAX_SECONDS,
+    JobWorkerPool,
+    claim_next_job,
+    enqueue_job,
+    fail_job,
+    register_job_handler,
+    retry_delay,
+    summarize_job_status,
+)
+
+
+def _job(
+    kind: IngestJobKind = IngestJobKind.EMBED,
+    status: IngestJobStatus = IngestJobStatus.RUNNING,
+    attempts: int = 1,
+    max_attempts: int = 5,
+    created_at: datetime | None = None,
+) -> IngestJob:
+    return IngestJob(
+        id=uuid.uuid4(),
+        kind=kind,
+        status=status,
+        patient_id=uuid.uuid4(),
+        payload={},
+        attempts=attempts,
+        max_attempts=max_attempts,
+        created_at=created_at or datetime.now(timezone.utc),
+    )
+
+
+def _session_factory(db: AsyncMock) -> MagicMock:
+    """Session factory whose sessions are the given mock."""
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=db)
+    session.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(return_value=session)
+
+
+@pytest.fixture
+def handlers():
+    """Isolate the handler registry per test."""
+    with patch.dict(job_queue._handlers, clear=True):
+        yield job_queue._handlers
+
+
+class TestEnqueue:
+    """Tests for enqueue_job."""
+
+    def test_adds_pending_job_to_session(self):
+        """Jobs are added to the caller's session, not committed."""
+        db = MagicMock()
+        patient_id = uuid.uuid4()
+
+        job = enqueue_job(db, patient_id, IngestJobKind.GRAPH, {"resource_ids": ["a"]})
+
+        db.add.assert_called_once_with(job)
+        db.commit.assert_not_called()
+        assert job.status == IngestJobStatus.PENDING
+        assert job.patient_id == patient_id
+        assert job.payload == {"resource_ids": ["a"]}
+        assert job.attempts == 0
+
+    def test_payload_defaults_to_empty(self):
+        """A job without arguments gets an empty payload."""
+        job = enqueue_job(MagicMock(), uuid.uuid4(), IngestJobKind.COMPILE)
+        assert job.payload == {}
+
+
+class TestRetry:
+    """Tests for backoff and failure recording."""
+
+    def test_retry_delay_doubles(self):
+        """Backoff doubles with each failed attempt."""
+        assert retry_delay(1) == timedelta(seconds=RETRY_BASE_SECONDS)
+        assert retry_delay(2) == timedelta(seconds=RETRY_BASE_SECONDS * 2)
+        assert retry_delay(3) == timedelta(seconds=RETRY_BASE_SECONDS * 4)
+
+    def test_retry_delay_is_capped(self):
+        """Backoff never exceeds RETRY_MAX_SECONDS."""
+        assert retry_delay(50) == timedelta(seconds=RETRY_MAX_SECONDS)
+
+    @pytest.mark.asyncio
+    async def test_fail_job_schedules_retry(self):
+        """A failure below max_attempts puts the job back to pending."""
+        db = AsyncMock()
+
+        status = await fail_job(db, uuid.uuid4(), 1, 5, "boom")
+
+        assert status == IngestJobStatus.PENDING
+        db.execute.assert_awaited_once()
+        db.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_fail_job_gives_up_at_max_attempts(self):
+        """The last allowed attempt marks the job failed."""
+        db = AsyncMock()
+
+        status = await fail_job(db, uuid.uuid4(), 5, 5, "boom")
+
+        assert status == IngestJobStatus.FAILED
+
+
+class TestClaim:
+    """Tests for claim_next_job."""
+
+    @pytest.mark.asyncio
+    async def test_claim_marks_job_running(self):
+        """A claimed job is running, locked and has its attempt counted."""
+        job = _job(status=IngestJobStatus.PENDING, attempts=0)
+        db = AsyncMock()
+        db.execute.return_value = MagicMock(
+            scalar_one_or_none=MagicMock(return_value=job)
+        )
+
+        claimed = await claim_next_job(db)
+
+        assert claimed is job
+        assert job.status == IngestJobStatus.RUNNING
+        assert job.locked_at is not None
+        assert job.attempts == 1
+        db.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_claim_uses_skip_locked(self):
+        """The claim query locks rows with FOR UPDATE SKIP LOCKED."""
+        db = AsyncMock()
+        db.execute.return_value = MagicMock(
+            scalar_one_or_none=MagicMock(return_value=None)
+        )
+
+        assert await claim_next_job(db) is None
+
+        stmt = db.execute.await_args.args[0]
+        assert stmt._for_update_arg.skip_locked is True
+
+
+class TestSummarizeJobStatus:
+    """Tests for collapsing a patient's jobs into one status."""
+
+    def test_no_jobs(self):
+        assert summarize_job_status([]) == "none"
+
+    def test_latest_job_per_kind_wins(self):
+        """A succeeded retry supersedes an earlier failed job of the same kind."""
+        now = datetime.now(timezone.utc)
+        jobs = [
+            _job(IngestJobKind.EMBED, IngestJobStatus.FAILED, created_at=now),
+            _job(
+                IngestJobKind.EMBED,
+                IngestJobStatus.SUCCEEDED,
+                created_at=now + timedelta(seconds=1),
+            ),
+        ]
+        assert summarize_job_status(jobs) == "succeeded"
+
+    def test_in_progress_before_succeeded(self):
+        jobs = [
+            _job(IngestJobKind.EMBED, IngestJobStatus.SUCCEEDED),
+            _job(IngestJobKind.COMPILE, IngestJobStatus.PENDING),
+        ]
+        assert summarize_job_status(jobs) == "pending"
+
+    def test_failed_dominates(self):
+        jobs = [
+            _job(IngestJobKind.GRAPH, IngestJobStatus.RUNNING),
+            _job(IngestJobKind.EMBED, IngestJobStatus.FAILED),
+        ]
+        assert summarize_job_status(jobs) == "failed"
+
+
+class TestJobWorkerPool:
+    """Tests for the in-process worker pool."""
+
+    def test_requires_positive_concurrency(self):
+        with pytest.raises(ValueError, match="at least 1"):
+            JobWorkerPool(MagicMock(), concurrency=0)
+
+    @pytest.mark.asyncio
+    async def test_run_once_with_empty_queue(self, handlers):
+        """Nothing runnable returns False."""
+        pool = JobWorkerPool(_session_factory(AsyncMock()), graph=MagicMock())
+        with patch(
+            "app.services.job_queue.claim_next_job", new=AsyncMock(return_value=None)
+        ):
+            assert await pool.run_once() is False
+
+    @pytest.mark.asyncio
+    async def test_run_once_runs_handler_and_completes(self, handlers):
+        """The registered handler runs, then the job is marked succeeded."""
+        job = _job(IngestJobKind.COMPILE)
+        db = AsyncMock()
+        graph = MagicMock()
+        handler = AsyncMock()
+        register_job_handler(IngestJobKind.COMPILE, handler)
+        pool = JobWorkerPool(_session_factory(db), graph=graph)
+
+        with (
+            patch(
+                "app.services.job_queue.claim_next_job",
+                new=AsyncMock(return_value=job),
+            ),
+            patch("app.services.job_queue.complete_job", new=AsyncMock()) as complete,
+            patch("app.services.job_queue.fail_job", new=AsyncMock()) as fail,
+        ):
+            assert await pool.run_once() is True
+
+        handler.assert_awaited_once_with(db, graph, job)
+        complete.assert_awaited_once_with(db, job.id)
+        fail.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_handler_error_is_recorded_for_retry(self, handlers):
+        """A raising handler rolls back and records the failed attempt."""
+        job = _job(IngestJobKind.EMBED, attempts=2, max_attempts=5)
+        db = AsyncMock()
+        register_job_handler(
+            IngestJobKind.EMBED, AsyncMock(side_effect=RuntimeError("rate limited"))
+        )
+        pool = JobWorkerPool(_session_factory(db), graph=MagicMock())
+
+        with (
+            patch(
+                "app.services.job_queue.claim_next_job",
+                new=AsyncMock(return_value=job),
+            ),
+            patch("app.services.job_queue.complete_job", new=AsyncMock()) as complete,
+            patch(
+                "app.services.job_queue.fail_job",
+                new=AsyncMock(return_value=IngestJobStatus.PENDING),
+            ) as fail,
+        ):
+            assert await pool.run_once() is True
+
+        db.rollback.assert_awaited_once()
+        complete.assert_not_awaited()
+        fail.assert_awaited_once_with(db, job.id, 2, 5, "rate limited")
+
+    @pytest.mark.asyncio
+    async def test_missing_handler_fails_job(self, handlers):
+        """A job kind with no registered handler is recorded as a failure."""
+        job = _job(IngestJobKind.GRAPH)
+        pool = JobWorkerPool(_session_factory(AsyncMock()), graph=MagicMock())
+
+        with (
+            patch(
+                "app.services.job_queue.claim_next_job",
+                new=AsyncMock(return_value=job),
+            ),
+            patch(
+                "app.services.job_queue.fail_job",
+                new=AsyncMock(return_value=IngestJobStatus.PENDING),
+            ) as fail,
+        ):
+            await pool.run_once()
+
+        assert "No handler registered" in fail.await_args.args[4]
+
+    @pytest.mark.asyncio
+    async def test_workers_survive_errors_and_stop(self, handlers):
+        """Worker loops keep polling after errors and exit on stop()."""
+        pool = JobWorkerPool(
+            MagicMock(), concurrency=2, poll_interval=0.01, graph=MagicMock()
+        )
+        calls = 0
+
+        async def failing_run_once():
+            nonlocal calls
+            calls += 1
+            raise ConnectionRefusedError("database unavailable")
+
+        with patch.object(pool, "run_once", side_effect=failing_run_once):
+            await pool.start()
+            await asyncio.sleep(0.05)
+            await pool.stop()
+
+        assert calls >= 2
+        assert pool._tasks == []
+
+    @pytest.mark.asyncio
+    async def test_notify_wakes_idle_workers(self, handlers):
+        """notify() makes an idle worker poll again without waiting."""
+        pool = JobWorkerPool(
+            MagicMock(), concurrency=1, poll_interval=60, graph=MagicMock()
+        )
+        polled = asyncio.Event()
+        results = iter([False, True])
+
+        async def run_once():
+            try:
+                return next(results)
+            except StopIteration:
+                polled.set()
+                return False
+
+        with patch.object(pool, "run_once", side_effect=run_once):
+            await pool.start()
+            await asyncio.sleep(0.01)
+            pool.notify()
+            await asyncio.wait_for(polled.wait(), timeout=1)
+            await pool.stop()
+
+
+@pytest.mark.integration
+class TestJobQueueIntegration:
+    """Claim/complete round trips against PostgreSQL."""
+
+    @pytest.mark.asyncio
+    async def test_claim_skips_future_and_finished_jobs(self, db_session):
+        """Only pending jobs past their run_after are claimed."""
+        patient_id = uuid.uuid4()
+        runnable = enqueue_job(db_session, patient_id, IngestJobKind.COMPILE)
+        later = enqueue_job(db_session, patient_id, IngestJobKind.EMBED)
+        later.run_after = datetime.now(timezone.utc) + timedelta(hours=1)
+        done = enqueue_job(db_session, patient_id, IngestJobKind.GRAPH)
+        done.status = IngestJobStatus.SUCCEEDED
+        await db_session.flush()
+
+        claimed = await claim_next_job(db_session)
+
+        assert claimed is not None
+        assert claimed.id == runnable.id
+        assert claimed.status == IngestJobStatus.RUNNING
+        assert await claim_next_job(db_session) is None
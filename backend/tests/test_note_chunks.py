@@ -0,0 +1,220 @@
+"""Tests for clinical note chunking and chunk embedding."""
+
+import base64
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.config import settings
+from app.services.fhir_loader import WrittenResource
+from app.services.note_chunks import (
+    chunk_note_text,
+    decode_note_text,
+    sync_note_chunks,
+)
+
+
+def _with_note(resource: dict, note: str) -> dict:
+    """Copy of a DocumentReference with note attached as base64 text/plain."""
+    return {
+        **resource,
+        "content": [
+            {
+                "attachment": {
+                    "contentType": "text/plain; charset=utf-8",
+                    "data": base64.b64encode(note.encode("utf-8")).decode("ascii"),
+                }
+            }
+        ],
+    }
+
+
+def _written(resource: dict) -> WrittenResource:
+    return WrittenResource(
+        id=uuid.uuid4(),
+        fhir_id=resource["id"],
+        resource_type=resource["resourceType"],
+        data=resource,
+    )
+
+
+def _service(dims: int = 3) -> MagicMock:
+    service = MagicMock()
+    service.embed_texts = AsyncMock(
+        side_effect=lambda texts: [[0.1] * dims for _ in texts]
+    )
+    service.close = AsyncMock()
+    return service
+
+
+class TestDecodeNoteText:
+    """Tests for extracting the note from a DocumentReference."""
+
+    def test_decodes_plain_text_attachment(self, sample_document_reference):
+        resource = _with_note(sample_document_reference, "Patient reports chest pain.")
+
+        assert decode_note_text(resource) == "Patient reports chest pain."
+
+    def test_no_attachment_returns_none(self, sample_document_reference):
+        assert decode_note_text(sample_document_reference) is None
+
+    def test_skips_non_text_and_invalid_attachments(self, sample_document_reference):
+        resource = {
+            **sample_document_reference,
+            "content": [
+                {"attachment": {"contentType": "application/pdf", "data": "JVBERi0="}},
+                {"attachment": {"contentType": "text/plain", "data": "//79"}},
+            ],
+        }
+
+        assert decode_note_text(resource) is None
+
+    def test_other_resource_types_return_none(self, sample_condition):
+        assert decode_note_text(sample_condition) is None
+
+
+class TestChunkNoteText:
+    """Tests for splitting notes into overlapping windows."""
+
+    def test_short_note_is_one_window(self):
+        windows = chunk_note_text("  Brief note.  ", size=100, overlap=10)
+
+        assert len(windows) == 1
+        assert windows[0].text == "Brief note."
+        assert windows[0].start_offset == 2
+
+    def test_windows_overlap_and_break_at_whitespace(self):
+        text = " ".join(f"word{i}" for i in range(200))
+
+        windows = chunk_note_text(text, size=100, overlap=30)
+
+        assert len(windows) > 1
+        for window in windows:
+            assert len(window.text) <= 100
+            # Offsets point back into the note, and no word is cut in half
+            assert text[window.start_offset :].startswith(window.text)
+            assert window.text.split()[0] in text.split()
+            assert window.text.split()[-1] in text.split()
+        for prev, nxt in zip(windows, windows[1:]):
+            assert nxt.start_offset < prev.start_offset + len(prev.text)
+        assert windows[-1].text.endswith("word199")
+
+    def test_text_without_whitespace_is_cut_at_size(self):
+        windows = chunk_note_text("x" * 250, size=100, overlap=20)
+
+        assert [len(w.text) for w in windows] == [100, 100, 90]
+
+    def test_blank_text_has_no_windows(self):
+        assert chunk_note_text("   \n ") == []
+
+    def test_rejects_large_overlap(self):
+        with pytest.raises(ValueError, match="overlap"):
+            chunk_note_text("text", size=100, overlap=50)
+
+
+class TestSyncNoteChunks:
+    """Tests for replacing a note's chunk rows."""
+
+    @pytest.mark.asyncio
+    async def test_embeds_windows_and_replaces_chunks(self, sample_document_reference):
+        note = _written(
+            _with_note(sample_document_reference, "Assessment: stable angina.")
+        )
+        patient_id = uuid.uuid4()
+        db = MagicMock()
+        db.execute = AsyncMock()
+        service = _service()
+
+        with patch.object(settings, "embedding_cache_enabled", False):
+            count = await sync_note_chunks(db, patient_id, [note], service)
+
+        assert count == 1
+        (texts,) = service.embed_texts.await_args.args
+        # Embedded with the note type and date as context
+        assert texts == [
+            "Clinical note: Summary of episode note. Date: 2024-01-15\n"
+            "Assessment: stable angina."
+        ]
+        # DELETE of the old chunks, then one INSERT
+        assert db.execute.await_count == 2
+        rows = db.execute.await_args_list[1].args[1]
+        assert rows[0]["resource_id"] == note.id
+        assert rows[0]["patient_id"] == patient_id
+        assert rows[0]["content"] == "Assessment: stable angina."
+        assert rows[0]["embedding"] == [0.1] * 3
+        service.close.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_non_notes_are_ignored(self, sample_condition):
+        db = MagicMock()
+        db.execute = AsyncMock()
+        service = _service()
+
+        count = await sync_note_chunks(
+            db, uuid.uuid4(), [_written(sample_condition)], service
+        )
+
+        assert count == 0
+        db.execute.assert_not_awaited()
+        service.embed_texts.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_note_without_text_clears_old_chunks(self, sample_document_reference):
+        """A note whose attachment was removed loses its chunks."""
+        db = MagicMock()
+        db.execute = AsyncMock()
+        service = _service()
+
+        count = await sync_note_chunks(
+            db, uuid.uuid4(), [_written(sample_document_reference)], service
+        )
+
+        assert count == 0
+        db.execute.assert_awaited_once()
+        service.embed_texts.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_cache_failure_rolls_back_to_savepoint(
+        self, sample_document_reference
+    ):
+        """A failed cache statement is undone without aborting the caller."""
+        note = _written(_with_note(sample_document_reference, "Plan: follow up."))
+        savepoint = MagicMock()
+        savepoint.__aenter__ = AsyncMock()
+        savepoint.__aexit__ = AsyncMock(return_value=False)
+        db = MagicMock()
+        db.execute = AsyncMock()
+        db.begin_nested = MagicMock(return_value=savepoint)
+
+        with (
+            patch.object(settings, "embedding_cache_enabled", True),
+            patch(
+                "app.services.note_chunks.embed_texts_cached",
+                AsyncMock(side_effect=RuntimeError("deadlock detected")),
+            ),
+        ):
+            count = await sync_note_chunks(db, uuid.uuid4(), [note], _service())
+
+        assert count == 0
+        assert savepoint.__aexit__.await_args.args[0] is RuntimeError
+        db.execute.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_embedding_failure_keeps_old_chunks(self, sample_document_reference):
+        note = _written(_with_note(sample_document_reference, "Plan: follow up."))
+        db = MagicMock()
+        db.execute = AsyncMock()
+        service = _service()
+        service.embed_texts.side_effect = RuntimeError("API down")
+
+        with patch.object(settings, "embedding_cache_enabled", False):
+            count = await sync_note_chunks(db, uuid.uuid4(), [note], service)
+
+            assert count == 0
+            db.execute.assert_not_awaited()
+
+            with pytest.raises(RuntimeError, match="API down"):
+                await sync_note_chunks(
+                    db, uuid.uuid4(), [note], service, raise_errors=True
+                )
@@ -1,25 +1,52 @@
 """Tests for the FHIR projection system."""
 
 import json
+import logging
 import uuid
-from datetime import date
+from datetime import date, datetime, timezone
+from unittest.mock import AsyncMock
 
+import pytest
+from sqlalchemy import select
 
-from app.projections.registry import FieldExtractor, ProjectionConfig, ProjectionRegistry
-from app.projections.serializers.task import TaskFhirSerializer
-from app.projections.status import get_cruxmd_status, get_fhir_status
+from app.models import FhirResource, ObservationProjection
+from app.projections.extractors import (
+    register_clinical_projections,
+    register_observation_projection,
+)
+from app.projections.extractors.clinical import CLINICAL_PROJECTION_FIELDS
+from app.projections.extractors.common import get_path
+from app.projections.extractors.observation import (
+    extract_category as extract_obs_category,
+)
+from app.projections.extractors.observation import (
+    extract_components,
+    extract_effective_at,
+    extract_interpretation,
+    extract_loinc,
+    extract_unit,
+    extract_value,
+)
 from app.projections.extractors.task import (
-    extract_status,
-    extract_priority,
     extract_category,
-    extract_task_type,
-    extract_title,
+    extract_context_config,
     extract_due_on,
+    extract_priority,
     extract_priority_score,
     extract_provenance,
-    extract_context_config,
     extract_session_id,
+    extract_status,
+    extract_task_type,
+    extract_title,
+)
+from app.projections.registry import (
+    FieldExtractor,
+    ProjectionConfig,
+    ProjectionRegistry,
 )
+from app.projections.serializers.task import TaskFhirSerializer
+from app.projections.status import get_cruxmd_status, get_fhir_status
+from app.projections.sync import sync_projections
 
 
 class TestProjectionRegistry:
@@ -31,6 +58,7 @@ class TestProjectionRegistry:
 
     def test_register_and_get(self):
         """Test registering and retrieving a projection config."""
+
         # Create a mock model class
         class MockModel:
             pass
@@ -57,6 +85,7 @@ class TestProjectionRegistry:
 
     def test_has_projection(self):
         """Test checking if projection exists."""
+
         class MockModel:
             pass
 
@@ -85,6 +114,7 @@ class TestProjectionConfig:
 
     def test_extract_fields(self):
         """Test extracting fields from FHIR data."""
+
         class MockModel:
             pass
 
@@ -293,11 +323,7 @@ class TestTaskExtractors:
 
     def test_extract_due_on(self):
         """Test extracting due date."""
-        fhir_data = {
-            "restriction": {
-                "period": {"end": "2026-02-15"}
-            }
-        }
+        fhir_data = {"restriction": {"period": {"end": "2026-02-15"}}}
         assert extract_due_on(fhir_data) == date(2026, 2, 15)
 
         fhir_data = {}
@@ -415,3 +441,279 @@ class TestRoundTrip:
         assert extracted_config["panels"][0]["component"] == "LabPanel"
 
         assert extract_session_id(fhir) == str(original_data["session_id"])
+
+
+class TestObservationExtractors:
+    """Tests for Observation field extractors."""
+
+    def test_extract_codes(self):
+        """LOINC, category and interpretation come from coding[0]."""
+        fhir_data = {
+            "code": {"coding": [{"system": "http://loinc.org", "code": "4548-4"}]},
+            "category": [{"coding": [{"code": "laboratory"}]}],
+            "interpretation": [{"coding": [{"code": "H"}]}],
+        }
+        assert extract_loinc(fhir_data) == "4548-4"
+        assert extract_obs_category(fhir_data) == "laboratory"
+        assert extract_interpretation(fhir_data) == "H"
+
+        assert extract_loinc({}) is None
+        assert extract_obs_category({"category": []}) is None
+        assert extract_interpretation({}) is None
+
+    def test_extract_effective_at(self):
+        """effectiveDateTime wins, then effectivePeriod.start, then issued."""
+        assert extract_effective_at(
+            {"effectiveDateTime": "2024-01-15T10:30:00Z", "issued": "2024-02-01"}
+        ) == datetime(2024, 1, 15, 10, 30, tzinfo=timezone.utc)
+        assert extract_effective_at(
+            {"effectivePeriod": {"start": "2024-01-15T10:30:00-05:00"}}
+        ) == datetime(2024, 1, 15, 15, 30, tzinfo=timezone.utc)
+        # Date-only values are taken as UTC midnight
+        assert extract_effective_at({"issued": "2024-01-15"}) == datetime(
+            2024, 1, 15, tzinfo=timezone.utc
+        )
+        assert extract_effective_at({"effectiveDateTime": "not-a-date"}) is None
+        assert extract_effective_at({}) is None
+
+    def test_extract_value_and_unit(self):
+        """Only numeric valueQuantity values are projected."""
+        fhir_data = {"valueQuantity": {"value": 6.3, "unit": "%"}}
+        assert extract_value(fhir_data) == 6.3
+        assert extract_unit(fhir_data) == "%"
+
+        assert extract_value({"valueQuantity": {"value": "6.3"}}) is None
+        assert extract_value({"valueQuantity": {"value": True}}) is None
+        assert extract_value({"valueString": "positive"}) is None
+
+    def test_extract_components(self):
+        """Components are flattened to {loinc, value, unit, interpretation}."""
+        fhir_data = {
+            "component": [
+                {
+                    "code": {"coding": [{"code": "8480-6"}]},
+                    "valueQuantity": {"value": 142, "unit": "mm[Hg]"},
+                    "interpretation": [{"coding": [{"code": "H"}]}],
+                },
+                {
+                    "code": {"coding": [{"code": "8462-4"}]},
+                    "valueQuantity": {"value": 88, "unit": "mm[Hg]"},
+                },
+            ]
+        }
+        assert extract_components(fhir_data) == [
+            {
+                "loinc": "8480-6",
+                "value": 142.0,
+                "unit": "mm[Hg]",
+                "interpretation": "H",
+            },
+            {
+                "loinc": "8462-4",
+                "value": 88.0,
+                "unit": "mm[Hg]",
+                "interpretation": None,
+            },
+        ]
+        assert extract_components({}) is None
+
+
+class TestObservationProjectionSync:
+    """ORM writes keep observation_projections in step with fhir_resources."""
+
+    @pytest.mark.asyncio
+    async def test_flush_projects_and_reprojects(self, db_session):
+        """Inserting or changing an Observation upserts its projection row."""
+        register_observation_projection()
+        patient_id = uuid.uuid4()
+        data = {
+            "resourceType": "Observation",
+            "id": "obs-1",
+            "code": {"coding": [{"code": "4548-4"}]},
+            "category": [{"coding": [{"code": "laboratory"}]}],
+            "effectiveDateTime": "2024-01-15T10:30:00Z",
+            "valueQuantity": {"value": 6.3, "unit": "%"},
+        }
+        resource = FhirResource(
+            fhir_id="obs-1",
+            resource_type="Observation",
+            patient_id=patient_id,
+            data=data,
+        )
+        db_session.add(resource)
+        await db_session.flush()
+
+        row = (
+            await db_session.execute(
+                select(ObservationProjection).where(
+                    ObservationProjection.fhir_resource_id == resource.id
+                )
+            )
+        ).scalar_one()
+        assert row.patient_id == patient_id
+        assert row.loinc == "4548-4"
+        assert row.category == "laboratory"
+        assert row.value == 6.3
+
+        resource.data = {**data, "valueQuantity": {"value": 7.1, "unit": "%"}}
+        await db_session.flush()
+
+        value = (
+            await db_session.execute(
+                select(ObservationProjection.value).where(
+                    ObservationProjection.fhir_resource_id == resource.id
+                )
+            )
+        ).scalar_one()
+        assert value == 7.1
+
+
+class TestSyncProjections:
+    """Tests for bulk projection sync."""
+
+    def setup_method(self):
+        """Start from an empty registry."""
+        ProjectionRegistry._clear_for_testing()
+
+    def teardown_method(self):
+        """Restore the projections the rest of the suite expects."""
+        register_observation_projection()
+        register_clinical_projections()
+
+    @pytest.mark.asyncio
+    async def test_empty_registry_warns(self, caplog):
+        """Syncing before any extractor is registered is logged, not silent."""
+        db = AsyncMock()
+        resources = [(uuid.uuid4(), uuid.uuid4(), "Condition", {"id": "c1"})]
+
+        with caplog.at_level(logging.WARNING, logger="app.projections.sync"):
+            written = await sync_projections(db, resources)
+
+        assert written == 0
+        db.execute.assert_not_awaited()
+        assert "No projections registered" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_unregistered_type_skipped_quietly(self, caplog):
+        """Types without a projection are skipped without a warning."""
+        register_clinical_projections()
+        db = AsyncMock()
+        resources = [(uuid.uuid4(), uuid.uuid4(), "Patient", {"id": "p1"})]
+
+        with caplog.at_level(logging.WARNING, logger="app.projections.sync"):
+            written = await sync_projections(db, resources)
+
+        assert written == 0
+        db.execute.assert_not_awaited()
+        assert caplog.text == ""
+
+
+class TestClinicalProjections:
+    """Tests for the declarative clinical resource projections."""
+
+    def setup_method(self):
+        """Register the clinical projections on a clean registry."""
+        ProjectionRegistry._clear_for_testing()
+        register_clinical_projections()
+
+    def test_get_path(self):
+        """Dotted paths walk dicts and index lists; missing steps give None."""
+        data = {"category": [{"coding": [{"code": "food"}]}], "period": {}}
+        assert get_path(data, "category.0.coding.0.code") == "food"
+        assert get_path(data, "category.1.coding") is None
+        assert get_path(data, "period.start") is None
+        assert get_path(data, "status.code") is None
+
+    def test_all_types_registered(self):
+        """Each clinical type projects into its own table at flush time."""
+        for resource_type, (table_name, _fields) in CLINICAL_PROJECTION_FIELDS.items():
+            config = ProjectionRegistry.get(resource_type)
+            assert config is not None
+            assert config.table_name == table_name
+            assert config.model_class.__tablename__ == table_name
+            assert config.sync_on_flush is True
+            columns = set(config.model_class.__table__.c.keys())
+            assert {e.target_column for e in config.extractors} <= columns
+
+    def test_condition_fields(self):
+        """Condition status, code and dates are extracted."""
+        config = ProjectionRegistry.get("Condition")
+        extracted = config.extract(
+            {
+                "resourceType": "Condition",
+                "code": {"coding": [{"code": "44054006", "display": "Diabetes"}]},
+                "clinicalStatus": {"coding": [{"code": "resolved"}]},
+                "verificationStatus": {"coding": [{"code": "confirmed"}]},
+                "onsetDateTime": "2019-03-01T08:00:00Z",
+                "abatementDateTime": "2024-01-15",
+            }
+        )
+        assert extracted["code"] == "44054006"
+        assert extracted["display"] == "Diabetes"
+        assert extracted["clinical_status"] == "resolved"
+        assert extracted["verification_status"] == "confirmed"
+        assert extracted["onset_at"] == datetime(2019, 3, 1, 8, tzinfo=timezone.utc)
+        assert extracted["abatement_at"] == datetime(2024, 1, 15, tzinfo=timezone.utc)
+        assert extracted["recorded_at"] is None
+
+    def test_medication_request_fields(self):
+        """MedicationRequest status, RxNorm code/display and authoredOn."""
+        config = ProjectionRegistry.get("MedicationRequest")
+        extracted = config.extract(
+            {
+                "status": "active",
+                "intent": "order",
+                "medicationCodeableConcept": {
+                    "coding": [{"code": "314076", "display": "lisinopril 10 MG"}]
+                },
+                "authoredOn": "2024-02-01T09:30:00-05:00",
+            }
+        )
+        assert extracted["status"] == "active"
+        assert extracted["intent"] == "order"
+        assert extracted["code"] == "314076"
+        assert extracted["display"] == "lisinopril 10 MG"
+        assert extracted["authored_at"] == datetime(
+            2024, 2, 1, 14, 30, tzinfo=timezone.utc
+        )
+
+    def test_encounter_immunization_allergy_fields(self):
+        """List-valued and nested fields use their first element."""
+        encounter = ProjectionRegistry.get("Encounter").extract(
+            {
+                "status": "finished",
+                "class": {"code": "AMB"},
+                "type": [{"coding": [{"code": "185349003"}]}],
+                "period": {
+                    "start": "2024-01-01T10:00:00Z",
+                    "end": "2024-01-01T10:30:00Z",
+                },
+            }
+        )
+        assert encounter["class_code"] == "AMB"
+        assert encounter["type_code"] == "185349003"
+        assert encounter["period_end"] == datetime(
+            2024, 1, 1, 10, 30, tzinfo=timezone.utc
+        )
+
+        immunization = ProjectionRegistry.get("Immunization").extract(
+            {"status": "completed", "vaccineCode": {"coding": [{"code": "140"}]}}
+        )
+        assert immunization == {
+            "status": "completed",
+            "vaccine_code": "140",
+            "occurrence_at": None,
+        }
+
+        allergy = ProjectionRegistry.get("AllergyIntolerance").extract(
+            {
+                "clinicalStatus": {"coding": [{"code": "active"}]},
+                "criticality": "high",
+                "category": ["food"],
+                "code": {"coding": [{"code": "91935009"}]},
+            }
+        )
+        assert allergy["clinical_status"] == "active"
+        assert allergy["criticality"] == "high"
+        assert allergy["category"] == "food"
+        assert allergy["code"] == "91935009"
@@ -155,3 +155,189 @@ class TestProfileIntegration:
 
         for field in expected_fields:
             assert field in profile
+
+
+class TestBulkSeedPipeline:
+    """Tests for the bounded concurrent bulk seeding pipeline."""
+
+    def _write_bundles(self, tmp_path, count: int) -> list:
+        """Write minimal single-patient bundles to tmp_path."""
+        import json
+
+        paths = []
+        for i in range(count):
+            bundle = {
+                "resourceType": "Bundle",
+                "entry": [
+                    {"resource": {"resourceType": "Patient", "id": f"p{i}"}},
+                    {"resource": {"resourceType": "Condition", "id": f"c{i}"}},
+                ],
+            }
+            path = tmp_path / f"patient_bundle_{i}.json"
+            path.write_text(json.dumps(bundle))
+            paths.append(path)
+        return paths
+
+    @staticmethod
+    def _written(resources, status: str = "inserted") -> list:
+        """Build WrittenResource rows as write_bundle_resources would."""
+        import uuid
+
+        from app.services.fhir_loader import WrittenResource
+
+        return [
+            WrittenResource(
+                id=uuid.uuid4(),
+                fhir_id=r["id"],
+                resource_type=r["resourceType"],
+                data=r,
+                status=status,
+                has_embedding=status == "unchanged",
+            )
+            for r in resources
+        ]
+
+    def _patch_io(self, write_side_effect=None):
+        """Patch all database/graph/embedding I/O used by the pipeline."""
+        import uuid
+        from contextlib import ExitStack
+
+        session = MagicMock()
+        session.commit = AsyncMock()
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=None)
+
+        async def default_write(db, resources):
+            return uuid.uuid4(), self._written(resources)
+
+        stack = ExitStack()
+        stack.enter_context(
+            patch(
+                "app.scripts.seed_database.async_session_maker",
+                return_value=session,
+            )
+        )
+        write = stack.enter_context(
+            patch(
+                "app.scripts.seed_database.write_bundle_resources",
+                side_effect=write_side_effect or default_write,
+            )
+        )
+        stack.enter_context(
+            patch("app.scripts.seed_database._generate_embeddings", new=AsyncMock())
+        )
+        stack.enter_context(
+            patch("app.scripts.seed_database._store_embeddings", new=AsyncMock())
+        )
+        compile_mock = stack.enter_context(
+            patch("app.scripts.seed_database.compile_and_store", new=AsyncMock())
+        )
+        return stack, session, write, compile_mock
+
+    @pytest.mark.asyncio
+    async def test_loads_all_bundles_and_records_stage_stats(self, tmp_path):
+        """Every bundle should pass through every stage exactly once."""
+        from app.scripts.seed_database import PIPELINE_STAGES, BulkSeedPipeline
+
+        paths = self._write_bundles(tmp_path, 5)
+        graph = MagicMock()
+        graph.build_from_fhir = AsyncMock()
+
+        stack, session, _write, compile_mock = self._patch_io()
+        with stack:
+            pipeline = BulkSeedPipeline(graph, workers=3)
+            stats = await pipeline.run(paths)
+
+        assert stats == {
+            "patients_loaded": 5,
+            "resources_loaded": 10,
+            "patients_failed": 0,
+        }
+        assert graph.build_from_fhir.await_count == 5
+        assert compile_mock.await_count == 5
+        assert session.commit.await_count == 5
+        for stage in PIPELINE_STAGES:
+            assert pipeline.stage_stats[stage].bundles == 5
+        assert pipeline.stage_stats["write"].resources == 10
+
+    @pytest.mark.asyncio
+    async def test_stage_limit_bounds_concurrency(self, tmp_path):
+        """A stage limit of 1 should serialize that stage across workers."""
+        import asyncio
+        import uuid
+
+        from app.scripts.seed_database import BulkSeedPipeline
+
+        paths = self._write_bundles(tmp_path, 6)
+        graph = MagicMock()
+        graph.build_from_fhir = AsyncMock()
+
+        in_flight = 0
+        peak = 0
+
+        async def slow_write(db, resources):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return uuid.uuid4(), self._written(resources)
+
+        stack, *_ = self._patch_io(write_side_effect=slow_write)
+        with stack:
+            pipeline = BulkSeedPipeline(graph, workers=4, stage_limits={"write": 1})
+            stats = await pipeline.run(paths)
+
+        assert stats["patients_loaded"] == 6
+        assert peak == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_bundle_does_not_stop_run(self, tmp_path):
+        """A bundle that fails should be counted and the rest still loaded."""
+        from app.scripts.seed_database import BulkSeedPipeline
+
+        paths = self._write_bundles(tmp_path, 3)
+        (tmp_path / "patient_bundle_1.json").write_text('{"entry": []}')
+        graph = MagicMock()
+        graph.build_from_fhir = AsyncMock()
+
+        stack, *_ = self._patch_io()
+        with stack:
+            stats = await BulkSeedPipeline(graph, workers=2).run(paths)
+
+        assert stats["patients_loaded"] == 2
+        assert stats["patients_failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unchanged_bundle_skips_graph_embed_and_compile(self, tmp_path):
+        """Re-seeding an unchanged bundle should only run the write stage."""
+        import uuid
+
+        from app.scripts.seed_database import BulkSeedPipeline
+
+        paths = self._write_bundles(tmp_path, 2)
+        graph = MagicMock()
+        graph.build_from_fhir = AsyncMock()
+
+        async def unchanged_write(db, resources):
+            return uuid.uuid4(), self._written(resources, status="unchanged")
+
+        stack, session, _write, compile_mock = self._patch_io(
+            write_side_effect=unchanged_write
+        )
+        with stack:
+            pipeline = BulkSeedPipeline(graph, workers=2)
+            stats = await pipeline.run(paths)
+
+        assert stats["patients_loaded"] == 2
+        graph.build_from_fhir.assert_not_called()
+        compile_mock.assert_not_called()
+        assert pipeline.stage_stats["embed"].resources == 0
+        assert session.commit.await_count == 2
+
+    def test_rejects_zero_workers(self):
+        """Worker count must be positive."""
+        from app.scripts.seed_database import BulkSeedPipeline
+
+        with pytest.raises(ValueError):
+            BulkSeedPipeline(MagicMock(), workers=0)
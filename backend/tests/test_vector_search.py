@@ -10,21 +10,33 @@ Tests semantic search over FHIR resource embeddings, with focus on:
 import uuid
 from unittest.mock import AsyncMock
 
+import numpy as np
 import pytest
 import pytest_asyncio
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import cast, select, text
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import FhirResource
+from app.config import settings
+from app.models import FhirResource, NoteChunk, ResourceEmbedding
 from app.services.vector_search import (
-    VectorSearchService,
-    SearchResult,
-    DEFAULT_THRESHOLD,
     DEFAULT_LIMIT,
-    MAX_LIMIT,
+    DEFAULT_THRESHOLD,
     EMBEDDING_DIMENSION,
+    MAX_BATCH_QUERIES,
+    MAX_LIMIT,
+    MIN_RERANK_CANDIDATES,
+    PassageResult,
+    PatientVectorCache,
+    SearchResult,
+    VectorSearchService,
+    index_scan_settings,
+    invalidate_patient_vectors,
+    nearest_resources,
+    note_chunk_distance,
 )
 
-
 # =============================================================================
 # Test Fixtures
 # =============================================================================
@@ -35,7 +47,9 @@ def create_mock_embedding(value: float = 0.1, dimension: int = 1536) -> list[flo
     return [value] * dimension
 
 
-def create_normalized_embedding(values: list[float], dimension: int = 1536) -> list[float]:
+def create_normalized_embedding(
+    values: list[float], dimension: int = 1536
+) -> list[float]:
     """Create an embedding with specific first values, padded with zeros."""
     result = values + [0.0] * (dimension - len(values))
     # Normalize to unit length for proper cosine similarity
@@ -71,9 +85,15 @@ async def populated_db(
     # Create embeddings with known similarity patterns
     # Using normalized vectors for predictable cosine similarity
     base_embedding = create_normalized_embedding([1.0, 0.0, 0.0])
-    similar_embedding = create_normalized_embedding([0.95, 0.31, 0.0])  # ~0.95 similarity
-    less_similar_embedding = create_normalized_embedding([0.7, 0.7, 0.0])  # ~0.7 similarity
-    dissimilar_embedding = create_normalized_embedding([0.0, 1.0, 0.0])  # ~0.0 similarity
+    similar_embedding = create_normalized_embedding(
+        [0.95, 0.31, 0.0]
+    )  # ~0.95 similarity
+    less_similar_embedding = create_normalized_embedding(
+        [0.7, 0.7, 0.0]
+    )  # ~0.7 similarity
+    dissimilar_embedding = create_normalized_embedding(
+        [0.0, 1.0, 0.0]
+    )  # ~0.0 similarity
 
     resources = {}
 
@@ -481,7 +501,9 @@ class TestInputValidation:
         service = VectorSearchService(db_session)
         wrong_dimension_embedding = [0.1] * 768  # Wrong dimension
 
-        with pytest.raises(ValueError, match=f"must have exactly {EMBEDDING_DIMENSION} dimensions"):
+        with pytest.raises(
+            ValueError, match=f"must have exactly {EMBEDDING_DIMENSION} dimensions"
+        ):
             await service.search_similar(
                 patient_id=patient_a_id,
                 query_embedding=wrong_dimension_embedding,
@@ -767,6 +789,105 @@ class TestSearchByText:
             )
 
 
+# =============================================================================
+# VectorSearchService.search_many Tests
+# =============================================================================
+
+
+class TestSearchMany:
+    """Tests for batched multi-query search."""
+
+    @pytest.mark.asyncio
+    async def test_top_k_per_query(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        populated_db: dict,
+    ):
+        """Each query gets its own ranked results from one statement."""
+        service = VectorSearchService(db_session)
+
+        results = await service.search_similar_many(
+            patient_id=patient_a_id,
+            query_embeddings=[
+                populated_db["base_embedding"],
+                populated_db["dissimilar_embedding"],
+            ],
+            limit=2,
+            threshold=0.5,
+        )
+
+        assert len(results) == 2
+        assert [r.fhir_id for r in results[0]] == [
+            "condition-a-001",
+            "observation-a-001",
+        ]
+        assert results[1][0].fhir_id == "procedure-a-001"
+        assert all(r.score >= 0.5 for group in results for r in group)
+
+    @pytest.mark.asyncio
+    async def test_batched_results_are_patient_scoped(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        populated_db: dict,
+    ):
+        service = VectorSearchService(db_session)
+
+        results = await service.search_similar_many(
+            patient_id=patient_a_id,
+            query_embeddings=[populated_db["base_embedding"]] * 3,
+            limit=100,
+            threshold=0.0,
+        )
+
+        for group in results:
+            assert "condition-b-001" not in {r.fhir_id for r in group}
+
+    @pytest.mark.asyncio
+    async def test_search_many_embeds_distinct_queries_once(self):
+        service = VectorSearchService(AsyncMock())
+        service.search_similar_many = AsyncMock(
+            return_value=[
+                [SearchResult({}, 0.9, "Condition", "c-1")],
+                [SearchResult({}, 0.8, "Observation", "o-1")],
+            ]
+        )
+        embed_many_fn = AsyncMock(return_value=[[0.1], [0.2]])
+
+        results = await service.search_many(
+            patient_id=uuid.uuid4(),
+            queries=["diabetes", "a1c", "diabetes"],
+            embed_many_fn=embed_many_fn,
+        )
+
+        embed_many_fn.assert_awaited_once_with(["diabetes", "a1c"])
+        assert [[r.fhir_id for r in group] for group in results] == [
+            ["c-1"],
+            ["o-1"],
+            ["c-1"],
+        ]
+
+    @pytest.mark.asyncio
+    async def test_search_many_rejects_empty_queries(self):
+        service = VectorSearchService(AsyncMock())
+
+        with pytest.raises(ValueError, match="queries cannot be empty"):
+            await service.search_many(uuid.uuid4(), [], AsyncMock())
+        with pytest.raises(ValueError, match="query_text cannot be empty"):
+            await service.search_many(uuid.uuid4(), ["ok", " "], AsyncMock())
+
+    @pytest.mark.asyncio
+    async def test_too_many_queries_raises_error(self):
+        service = VectorSearchService(AsyncMock())
+
+        with pytest.raises(ValueError, match="queries at once"):
+            await service.search_similar_many(
+                patient_id=uuid.uuid4(),
+                query_embeddings=[create_mock_embedding()] * (MAX_BATCH_QUERIES + 1),
+            )
+
+
 # =============================================================================
 # VectorSearchService.search_similar_to_resource Tests
 # =============================================================================
@@ -879,3 +1000,492 @@ class TestSearchSimilarToResource:
         )
 
         assert isinstance(results, list)
+
+
+# =============================================================================
+# VectorSearchService.search_note_passages Tests
+# =============================================================================
+
+
+class TestSearchNotePassages:
+    """Tests for passage-level search over clinical note chunks."""
+
+    @pytest_asyncio.fixture
+    async def note_chunks(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        patient_b_id: uuid.UUID,
+        populated_db: dict,
+    ) -> dict:
+        """One note per patient, chunked into passages with known embeddings."""
+        notes = {}
+        for key, patient_id in (("a", patient_a_id), ("b", patient_b_id)):
+            note = FhirResource(
+                fhir_id=f"docref-{key}-001",
+                resource_type="DocumentReference",
+                patient_id=patient_id,
+                data={"resourceType": "DocumentReference", "id": f"docref-{key}-001"},
+            )
+            db_session.add(note)
+            await db_session.flush()
+            for index, (content, embedding) in enumerate(
+                [
+                    ("Chest pain on exertion.", populated_db["base_embedding"]),
+                    ("Denies fever.", populated_db["dissimilar_embedding"]),
+                ]
+            ):
+                db_session.add(
+                    NoteChunk(
+                        resource_id=note.id,
+                        patient_id=patient_id,
+                        chunk_index=index,
+                        start_offset=index * 30,
+                        content=content,
+                        embedding=embedding,
+                    )
+                )
+            notes[key] = note
+        await db_session.commit()
+        return notes
+
+    def test_passage_result_creation(self):
+        result = PassageResult(
+            text="Chest pain on exertion.",
+            score=0.9,
+            chunk_index=0,
+            start_offset=0,
+            resource={"resourceType": "DocumentReference"},
+            fhir_id="docref-1",
+        )
+
+        assert result.text == "Chest pain on exertion."
+        assert result.fhir_id == "docref-1"
+
+    @pytest.mark.asyncio
+    async def test_returns_best_passage_with_parent(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        populated_db: dict,
+        note_chunks: dict,
+    ):
+        service = VectorSearchService(db_session)
+
+        results = await service.search_note_passages(
+            patient_id=patient_a_id,
+            query_embedding=populated_db["base_embedding"],
+            threshold=0.5,
+        )
+
+        assert [r.text for r in results] == ["Chest pain on exertion."]
+        assert results[0].fhir_id == "docref-a-001"
+        assert results[0].resource["resourceType"] == "DocumentReference"
+        assert results[0].score > 0.99
+
+    @pytest.mark.asyncio
+    async def test_passages_are_patient_scoped(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        populated_db: dict,
+        note_chunks: dict,
+    ):
+        service = VectorSearchService(db_session)
+
+        results = await service.search_note_passages(
+            patient_id=patient_a_id,
+            query_embedding=populated_db["base_embedding"],
+            limit=100,
+            threshold=0.0,
+        )
+
+        assert {r.fhir_id for r in results} == {"docref-a-001"}
+
+    @pytest.mark.asyncio
+    async def test_by_text_calls_embed_fn(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        populated_db: dict,
+        note_chunks: dict,
+    ):
+        service = VectorSearchService(db_session)
+        mock_embed_fn = AsyncMock(return_value=populated_db["base_embedding"])
+
+        results = await service.search_note_passages_by_text(
+            patient_id=patient_a_id,
+            query_text="angina symptoms",
+            embed_fn=mock_embed_fn,
+            threshold=0.5,
+        )
+
+        mock_embed_fn.assert_called_once_with("angina symptoms")
+        assert len(results) == 1
+
+    @pytest.mark.asyncio
+    async def test_invalid_embedding_raises_error(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+    ):
+        service = VectorSearchService(db_session)
+
+        with pytest.raises(ValueError, match="dimensions"):
+            await service.search_note_passages(
+                patient_id=patient_a_id,
+                query_embedding=[0.1] * 10,
+            )
+
+
+class TestIndexStrategy:
+    """Tests for the configurable vector index scan strategy."""
+
+    def test_iterative_scan_settings(self):
+        scan = index_scan_settings("iterative", ef_search=80, max_scan_tuples=5000)
+
+        assert scan == {
+            "hnsw.ef_search": "80",
+            "hnsw.iterative_scan": "strict_order",
+            "hnsw.max_scan_tuples": "5000",
+        }
+
+    def test_hnsw_scan_settings_only_tune_ef_search(self):
+        assert index_scan_settings("hnsw", ef_search=200) == {"hnsw.ef_search": "200"}
+
+    def test_exact_scan_changes_no_planner_settings(self):
+        assert index_scan_settings("exact") == {}
+
+    def test_exact_note_distance_cannot_use_the_hnsw_index(self):
+        query_vector = cast(create_mock_embedding(), Vector(EMBEDDING_DIMENSION))
+        stmt = select(NoteChunk.id).order_by(
+            note_chunk_distance(query_vector, exact=True)
+        )
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+        # ORDER BY (embedding <=> q) + 0 is not an index-orderable operator
+        assert "<=>" in sql
+        assert "+" in sql.split("ORDER BY")[1]
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [{"strategy": "ivfflat"}, {"ef_search": 0}, {"max_scan_tuples": 0}],
+    )
+    def test_invalid_settings_raise(self, kwargs):
+        with pytest.raises(ValueError):
+            index_scan_settings(**kwargs)
+
+    def test_service_rejects_unknown_strategy(self, db_session: AsyncSession):
+        with pytest.raises(ValueError, match="vector_index_strategy"):
+            VectorSearchService(db_session, index_strategy="partitioned")
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("strategy", ["hnsw", "iterative"])
+    async def test_strategies_match_exact_search(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        populated_db: dict,
+        strategy: str,
+    ):
+        query_embedding = populated_db["base_embedding"]
+        exact_service = VectorSearchService(db_session, index_strategy="exact")
+        service = VectorSearchService(db_session, index_strategy=strategy)
+
+        exact = await exact_service.search_similar(
+            patient_id=patient_a_id, query_embedding=query_embedding, threshold=0.5
+        )
+        results = await service.search_similar(
+            patient_id=patient_a_id, query_embedding=query_embedding, threshold=0.5
+        )
+
+        assert [r.fhir_id for r in results] == [r.fhir_id for r in exact]
+
+    @pytest.mark.asyncio
+    async def test_settings_are_transaction_local(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        populated_db: dict,
+    ):
+        service = VectorSearchService(
+            db_session, index_strategy="iterative", ef_search=123
+        )
+        await service.search_similar(
+            patient_id=patient_a_id, query_embedding=populated_db["base_embedding"]
+        )
+        assert (await db_session.execute(text("SHOW hnsw.ef_search"))).scalar() == "123"
+
+        await db_session.rollback()
+
+        assert (await db_session.execute(text("SHOW hnsw.ef_search"))).scalar() == "40"
+
+    @pytest.mark.asyncio
+    async def test_exact_search_leaves_index_scans_enabled(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        populated_db: dict,
+    ):
+        service = VectorSearchService(db_session, index_strategy="exact")
+        await service.search_similar(
+            patient_id=patient_a_id, query_embedding=populated_db["base_embedding"]
+        )
+        await service.search_note_passages(
+            patient_id=patient_a_id, query_embedding=populated_db["base_embedding"]
+        )
+
+        assert (
+            await db_session.execute(text("SHOW enable_indexscan"))
+        ).scalar() == "on"
+
+
+class TestQuantizedSearch:
+    """Tests for quantized candidate generation with full-precision re-ranking."""
+
+    @staticmethod
+    def _sql(**kwargs) -> str:
+        query_vector = cast(create_mock_embedding(), Vector(EMBEDDING_DIMENSION))
+        stmt = nearest_resources(uuid.uuid4(), query_vector, 10, **kwargs)
+        return str(stmt.compile(dialect=postgresql.dialect()))
+
+    def test_binary_candidates_use_hamming_distance(self):
+        sql = self._sql(quantization="binary")
+
+        assert "binary_quantize" in sql
+        assert "<~>" in sql
+        # Re-ranked by full-precision cosine distance
+        assert "<=>" in sql
+
+    def test_halfvec_candidates_use_halfvec_cosine(self):
+        sql = self._sql(quantization="halfvec")
+
+        assert "HALFVEC" in sql.upper()
+        assert "binary_quantize" not in sql
+
+    def test_exact_orders_by_full_precision_only(self):
+        sql = self._sql(exact=True)
+
+        assert "binary_quantize" not in sql
+        assert "HALFVEC" not in sql.upper()
+
+    def test_candidate_pool_is_limit_times_rerank_factor(self):
+        query_vector = cast(create_mock_embedding(), Vector(EMBEDDING_DIMENSION))
+        stmt = nearest_resources(
+            uuid.uuid4(), query_vector, 30, quantization="binary", rerank_factor=5
+        )
+        params = stmt.compile(dialect=postgresql.dialect()).params
+
+        assert 150 in params.values()
+
+    def test_candidate_pool_has_a_floor(self):
+        query_vector = cast(create_mock_embedding(), Vector(EMBEDDING_DIMENSION))
+        stmt = nearest_resources(uuid.uuid4(), query_vector, 1, rerank_factor=2)
+        params = stmt.compile(dialect=postgresql.dialect()).params
+
+        assert MIN_RERANK_CANDIDATES in params.values()
+
+    def test_unknown_quantization_raises(self):
+        with pytest.raises(ValueError, match="vector_quantization"):
+            self._sql(quantization="int8")
+
+    @pytest.mark.asyncio
+    async def test_embeddings_stored_in_side_table(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        populated_db: dict,
+    ):
+        result = await db_session.execute(
+            select(ResourceEmbedding.resource_id, ResourceEmbedding.patient_id)
+        )
+        rows = {row.resource_id: row.patient_id for row in result.all()}
+
+        condition = populated_db["condition_a"]
+        assert rows[condition.id] == patient_a_id
+        # Resources without an embedding have no row
+        assert populated_db["allergy_a"].id not in rows
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("quantization", ["binary", "halfvec"])
+    async def test_reranked_results_match_exact_search(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        populated_db: dict,
+        monkeypatch: pytest.MonkeyPatch,
+        quantization: str,
+    ):
+        monkeypatch.setattr(settings, "vector_quantization", quantization)
+        query_embedding = populated_db["similar_embedding"]
+        exact = await VectorSearchService(
+            db_session, index_strategy="exact"
+        ).search_similar(patient_a_id, query_embedding, threshold=0.0)
+        results = await VectorSearchService(db_session).search_similar(
+            patient_a_id, query_embedding, threshold=0.0
+        )
+
+        assert [r.fhir_id for r in results] == [r.fhir_id for r in exact]
+        assert [r.score for r in results] == pytest.approx([r.score for r in exact])
+
+
+def _vector_cache(**kwargs) -> PatientVectorCache:
+    options = {"max_bytes": 64 * 1024 * 1024, "max_resources": 1000, "ttl_seconds": 300}
+    return PatientVectorCache(**{**options, **kwargs})
+
+
+class TestPatientVectorCache:
+    """Tests for exact in-process search over cached patient embeddings."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("threshold", [0.0, 0.5, DEFAULT_THRESHOLD, 0.99])
+    async def test_matches_pgvector_search(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        populated_db: dict,
+        threshold: float,
+    ):
+        query_embedding = create_normalized_embedding([0.9, 0.4, 0.1])
+        cached_service = VectorSearchService(db_session, vector_cache=_vector_cache())
+        sql_service = VectorSearchService(db_session, index_strategy="exact")
+
+        cached = await cached_service.search_similar(
+            patient_a_id, query_embedding, threshold=threshold
+        )
+        expected = await sql_service.search_similar(
+            patient_a_id, query_embedding, threshold=threshold
+        )
+
+        assert [r.fhir_id for r in cached] == [r.fhir_id for r in expected]
+        assert [r.resource for r in cached] == [r.resource for r in expected]
+        for got, want in zip(cached, expected):
+            assert got.score == pytest.approx(want.score, abs=1e-5)
+
+    @pytest.mark.asyncio
+    async def test_batched_search_matches_pgvector(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        populated_db: dict,
+    ):
+        queries = [
+            populated_db["base_embedding"],
+            create_normalized_embedding([0.0, 1.0, 0.0]),
+        ]
+        cached_service = VectorSearchService(db_session, vector_cache=_vector_cache())
+        sql_service = VectorSearchService(db_session, index_strategy="exact")
+
+        cached = await cached_service.search_similar_many(
+            patient_a_id, queries, threshold=0.5
+        )
+        expected = await sql_service.search_similar_many(
+            patient_a_id, queries, threshold=0.5
+        )
+
+        assert [[r.fhir_id for r in hits] for hits in cached] == [
+            [r.fhir_id for r in hits] for hits in expected
+        ]
+
+    @pytest.mark.asyncio
+    async def test_results_are_patient_scoped(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        patient_b_id: uuid.UUID,
+        populated_db: dict,
+    ):
+        service = VectorSearchService(db_session, vector_cache=_vector_cache())
+
+        results = await service.search_similar(
+            patient_id=patient_b_id,
+            query_embedding=populated_db["base_embedding"],
+            threshold=0.0,
+        )
+
+        assert [r.fhir_id for r in results] == ["condition-b-001"]
+
+    @pytest.mark.asyncio
+    async def test_patient_loaded_once(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        populated_db: dict,
+    ):
+        cache = _vector_cache()
+        service = VectorSearchService(db_session, vector_cache=cache)
+        query_embedding = populated_db["base_embedding"]
+
+        await service.search_similar(patient_a_id, query_embedding)
+        assert patient_a_id in cache
+        first = await cache.get(db_session, patient_a_id)
+        await service.search_similar(patient_a_id, query_embedding)
+
+        assert await cache.get(db_session, patient_a_id) is first
+        assert first.matrix.dtype == np.float32
+        assert first.matrix.flags["C_CONTIGUOUS"]
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_caps_memory(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        patient_b_id: uuid.UUID,
+        populated_db: dict,
+    ):
+        # Room for patient A's four vectors but not both patients
+        cache = _vector_cache(max_bytes=4 * EMBEDDING_DIMENSION * 4)
+
+        await cache.get(db_session, patient_a_id)
+        await cache.get(db_session, patient_b_id)
+
+        assert patient_a_id not in cache
+        assert cache.nbytes <= cache.max_bytes
+
+    @pytest.mark.asyncio
+    async def test_large_corpus_falls_back_to_pgvector(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        populated_db: dict,
+    ):
+        cache = _vector_cache(max_resources=1)
+        service = VectorSearchService(db_session, vector_cache=cache)
+
+        results = await service.search_similar(
+            patient_a_id, populated_db["base_embedding"], threshold=0.5
+        )
+
+        assert len(results) > 1
+        assert cache.nbytes == 0
+        assert patient_a_id not in cache
+
+    @pytest.mark.asyncio
+    async def test_invalidate_reloads_new_embeddings(
+        self,
+        db_session: AsyncSession,
+        patient_a_id: uuid.UUID,
+        populated_db: dict,
+    ):
+        cache = _vector_cache()
+        service = VectorSearchService(db_session, vector_cache=cache)
+        query_embedding = create_normalized_embedding([0.0, 0.0, 1.0])
+        assert await service.search_similar(patient_a_id, query_embedding) == []
+
+        db_session.add(
+            FhirResource(
+                fhir_id="procedure-a-new",
+                resource_type="Procedure",
+                patient_id=patient_a_id,
+                data={"resourceType": "Procedure", "id": "procedure-a-new"},
+                embedding=query_embedding,
+            )
+        )
+        await db_session.flush()
+        cache.invalidate(patient_a_id)
+
+        results = await service.search_similar(patient_a_id, query_embedding)
+        assert [r.fhir_id for r in results] == ["procedure-a-new"]
+
+    def test_invalidate_patient_vectors_accepts_string_ids(self):
+        invalidate_patient_vectors(str(uuid.uuid4()))